@@ -232,6 +232,16 @@ class BaseCollection(ABC):
     def print_terminal(self, string=None):
         return self.parent.print_terminal(string=string)
 
+    def add_entities_from_dicts(self, entity_dicts: list = None) -> list:
+        """Add several entities from a list of dictionaries shaped as self.entity_dict and return their uids.
+        This generic version calls add_entity_from_dict for each entity, and is reimplemented in subclasses
+        where entities can be added in a single batch, with one dataframe update and one signal.
+        """
+        return [
+            self.add_entity_from_dict(entity_dict=entity_dict)
+            for entity_dict in entity_dicts
+        ]
+
     def initialize_df(self):
         """Initialize Pandas dataframe. Must be called in the subclass constructor."""
         self.df = pd_DataFrame(columns=self.entity_dict_keys)
@@ -301,13 +311,16 @@ class BaseCollection(ABC):
         return self.df.loc[self.df["uid"] == uid, "parent_uid"].values[0]
 
     def set_uid_x_section(self, uid: str = None, parent_uid: str = None):
-        """Set xsection uid from uid."""
+        """Set xsection uid from uid, and update the parent index of the project."""
         self.df.loc[self.df["uid"] == uid, "parent_uid"] = parent_uid
+        self.parent.parent_index.set_parent(
+            uid=uid, collection=self, parent_uid=parent_uid
+        )
 
     def get_xuid_uid(self, xuid: str = None) -> list:
-        """Get the uids of the geological objects for the corresponding xsec uid"""
-        # Use the query method in the future?
-        return self.df.loc[self.df["parent_uid"] == xuid, "uid"].to_list()
+        """Get the uids of the geological objects for the corresponding xsec uid, from the parent index
+        of the project."""
+        return self.parent.parent_index.children(parent_uid=xuid, collection=self)
 
     def get_uid_vtk_obj(self, uid: str = None) -> vtkDataObject:
         """Get vtk object from uid."""
@@ -376,10 +389,7 @@ class BaseCollection(ABC):
         return legend_dict[0]
 
     def filter_uids(self, query: str = None, uids: list = None):
-        return list(
-            set(self.df.query(query)["uid"].tolist())
-            - (set(self.df.query(query)["uid"].tolist()) - set(uids))
-        )
+        return list(set(self.df.query(query)["uid"].tolist()) & set(uids))
 
     def select_all(self):
         """Select all entities in the collection."""
@@ -444,6 +454,46 @@ class BaseCollection(ABC):
                 "ERROR - replace_vtk with vtk of a different type not allowed."
             )
 
+    def replace_vtks(self, uids: list = None, vtk_objects: list = None) -> list:
+        """Replace the vtk objects of several uids in a single batch, as in replace_vtk, with one legend
+        update and one emission of each signal for all the replaced uids. Returns the list of replaced uids.
+        """
+        rows = self.df.index[self.df["uid"].isin(uids)]
+        row_by_uid = dict(zip(self.df.loc[rows, "uid"], rows))
+        replaced_uids = []
+        keys_removed_uids = []
+        keys_added_uids = []
+        for uid, vtk_object in zip(uids, vtk_objects):
+            row = row_by_uid[uid]
+            if not isinstance(vtk_object, type(self.df.at[row, "vtk_obj"])):
+                self.parent.print_terminal(
+                    "ERROR - replace_vtk with vtk of a different type not allowed."
+                )
+                continue
+            old_props = self.df.at[row, "properties_names"]
+            current_props = list(vtk_object.point_data_keys)
+            current_components = [
+                vtk_object.get_point_data_shape(key)[1] for key in current_props
+            ]
+            self.df.at[row, "properties_names"] = current_props
+            self.df.at[row, "properties_components"] = current_components
+            self.df.at[row, "vtk_obj"] = vtk_object
+            replaced_uids.append(uid)
+            if any(prop not in current_props for prop in old_props):
+                keys_removed_uids.append(uid)
+            if any(prop not in old_props for prop in current_props):
+                keys_added_uids.append(uid)
+        if not replaced_uids:
+            return replaced_uids
+        # Update project legend, views and trees once.
+        self.parent.prop_legend.update_widget(self.parent)
+        if keys_removed_uids:
+            self.parent.signals.data_keys_removed.emit(keys_removed_uids, self)
+        if keys_added_uids:
+            self.parent.signals.data_keys_added.emit(keys_added_uids, self)
+        self.parent.signals.geom_modified.emit(replaced_uids, self)
+        return replaced_uids
+
     # =================== Common QT methods slightly adapted to the data source ====================================
 
 
@@ -84,49 +84,80 @@ class GFBCollection(BaseCollection):
         # Then add new role / feature / scenario to the legend if needed.
         # Note that for performance reasons this is done explicitly here, when adding an entity to the
         # collection, and not with a signal telling the legend to be updated by scanning the whole collection.
-        role = entity_dict["role"]
-        feature = entity_dict["feature"]
-        scenario = entity_dict["scenario"]
-        if self.legend_df.loc[
-            (self.legend_df["role"] == role)
-            & (self.legend_df["feature"] == feature)
-            & (self.legend_df["scenario"] == scenario)
-        ].empty:
-            if color:
+        self.add_legend_rows(entity_dicts=[entity_dict], color=color)
+        # Then emit signal to update the views. A list of uids is emitted, even if the
+        # entity is just one, for future compatibility
+        self.parent.signals.entities_added.emit([entity_dict["uid"]], self)
+        return entity_dict["uid"]
+
+    def add_entities_from_dicts(self, entity_dicts: list = None) -> list:
+        """Add several entities from a list of dictionaries shaped as self.entity_dict, in a single batch.
+        The dataframe is concatenated once, the legend and the views are updated once, and a single
+        entities_added signal is emitted with all the new uids. Returns the list of new uids.
+        """
+        if not entity_dicts:
+            return []
+        # Create new uids if they are not included in the dictionaries.
+        for entity_dict in entity_dicts:
+            if not entity_dict["uid"]:
+                entity_dict["uid"] = str(uuid4())
+        self.df = pd_concat([self.df, pd_DataFrame(entity_dicts)], ignore_index=True)
+        self.modelReset.emit()
+        # Add new role / feature / scenario triplets to the legend, once each.
+        self.add_legend_rows(entity_dicts=entity_dicts)
+        uids = [entity_dict["uid"] for entity_dict in entity_dicts]
+        self.parent.signals.entities_added.emit(uids, self)
+        return uids
+
+    def add_legend_rows(
+        self, entity_dicts: list = None, color: np_ndarray = None
+    ) -> bool:
+        """Add a legend row with default values for each role / feature / scenario triplet of entity_dicts
+        that is not in the legend yet, with the given color or a random one, then update the legend widgets
+        once. Used by add_entity_from_dict and add_entities_from_dicts. Returns True if rows were added.
+        """
+        legend_keys = set(
+            zip(
+                self.legend_df["role"],
+                self.legend_df["feature"],
+                self.legend_df["scenario"],
+            )
+        )
+        new_legend_rows = []
+        for entity_dict in entity_dicts:
+            key = (entity_dict["role"], entity_dict["feature"], entity_dict["scenario"])
+            if key in legend_keys:
+                continue
+            legend_keys.add(key)
+            if color is not None:
                 R, G, B = color
             else:
                 R, G, B = np_round(np_random.random(3) * 255)
             # Use default generic values for legend.
-            # New Pandas >= 2.0.0
-            self.legend_df = pd_concat(
-                [
-                    self.legend_df,
-                    pd_DataFrame(
-                        [
-                            {
-                                "role": role,
-                                "feature": feature,
-                                "time": 0.0,
-                                "sequence": self.default_sequence,
-                                "scenario": scenario,
-                                "color_R": R,
-                                "color_G": G,
-                                "color_B": B,
-                                "line_thick": 5.0,
-                                "point_size": 10.0,
-                                "opacity": 100,
-                            }
-                        ]
-                    ),
-                ],
-                ignore_index=True,
+            new_legend_rows.append(
+                {
+                    "role": key[0],
+                    "feature": key[1],
+                    "time": 0.0,
+                    "sequence": self.default_sequence,
+                    "scenario": key[2],
+                    "color_R": R,
+                    "color_G": G,
+                    "color_B": B,
+                    "line_thick": 5.0,
+                    "point_size": 10.0,
+                    "opacity": 100,
+                }
             )
-            self.parent.legend.update_widget(self.parent)
-            self.parent.prop_legend.update_widget(self.parent)
-        # Then emit signal to update the views. A list of uids is emitted, even if the
-        # entity is just one, for future compatibility
-        self.parent.signals.entities_added.emit([entity_dict["uid"]], self)
-        return entity_dict["uid"]
+        if not new_legend_rows:
+            return False
+        # New Pandas >= 2.0.0
+        self.legend_df = pd_concat(
+            [self.legend_df, pd_DataFrame(new_legend_rows)], ignore_index=True
+        )
+        self.parent.legend.update_widget(self.parent)
+        self.parent.prop_legend.update_widget(self.parent)
+        return True
 
     def remove_entity(self, uid: str = None) -> str:
         """Remove an entity and its metadata."""
@@ -6,10 +6,14 @@ import uuid
 from copy import deepcopy
 
 from numpy import array as np_array
+from numpy import asarray as np_asarray
+from numpy import einsum as np_einsum
+from numpy import empty as np_empty
+from numpy import eye as np_eye
+from numpy import stack as np_stack
 from numpy import ndarray as np_ndarray
 from numpy import cos as np_cos
 from numpy import deg2rad as np_deg2rad
-from numpy import dot as np_dot
 from numpy import cross as np_cross
 from numpy import matmul as np_matmul
 from numpy import pi as np_pi
@@ -29,6 +33,7 @@ from pandas import DataFrame as pd_DataFrame
 from pandas import read_csv as pd_read_csv
 from pandas import unique as pd_unique
 from pandas import concat as pd_concat
+from pandas import factorize as pd_factorize
 
 from vtk import vtkPoints, vtkCellArray, vtkLine
 from vtkmodules.numpy_interface.dataset_adapter import WrapDataObject
@@ -344,6 +349,8 @@ class XSectionCollection(BaseCollection):
         self.valid_topologies = [""]
         self.editable_columns_names = ["name", "scenario"]
         self.collection_name = "xsect_coll"
+        # Cache of the 4 x 4 frame matrices used in world2plane and plane2world, with uid as key.
+        self._frames = {}
         self.initialize_df()
 
     def add_entity_from_dict(
@@ -374,6 +381,7 @@ class XSectionCollection(BaseCollection):
         if uid not in self.get_uids:
             return
         self.df.drop(self.df[self.df["uid"] == uid].index, inplace=True)
+        self._invalidate_frame(uid=uid)
         self.modelReset.emit()  # is this really necessary?
         # Emit a list of uids, even if the entity is just one
         self.parent.signals.entities_removed.emit([uid], self)
@@ -437,6 +445,7 @@ class XSectionCollection(BaseCollection):
     def set_uid_origin_x(self, uid=None, origin_x=None):
         """Set value(s) stored in the dataframe from uid."""
         self.df.loc[self.df["uid"] == uid, "origin_x"] = origin_x
+        self._invalidate_frame(uid=uid)
 
     def get_uid_origin_y(self, uid=None):
         """Get value(s) stored in the dataframe (as a pointer) from uid."""
@@ -445,6 +454,7 @@ class XSectionCollection(BaseCollection):
     def set_uid_origin_y(self, uid=None, origin_y=None):
         """Set value(s) stored in the dataframe from uid."""
         self.df.loc[self.df["uid"] == uid, "origin_y"] = origin_y
+        self._invalidate_frame(uid=uid)
 
     def get_uid_origin_z(self, uid=None):
         """Get value(s) stored in the dataframe (as a pointer) from uid."""
@@ -453,6 +463,7 @@ class XSectionCollection(BaseCollection):
     def set_uid_origin_z(self, uid=None, origin_z=None):
         """Set value(s) stored in the dataframe from uid."""
         self.df.loc[self.df["uid"] == uid, "origin_z"] = origin_z
+        self._invalidate_frame(uid=uid)
 
     # def get_uid_end_x(self, uid=None):
     #     """Get value(s) stored in the dataframe (as a pointer) from uid."""
@@ -485,6 +496,7 @@ class XSectionCollection(BaseCollection):
     def set_uid_strike(self, uid=None, strike=None):
         """Set value(s) stored in dataframe (as pointer) from uid."""
         self.df.loc[self.df["uid"] == uid, "strike"] = strike
+        self._invalidate_frame(uid=uid)
 
     def get_uid_dip(self, uid=None):
         """Get value(s) stored in dataframe (as pointer) from uid."""
@@ -493,6 +505,7 @@ class XSectionCollection(BaseCollection):
     def set_uid_dip(self, uid=None, dip=None):
         """Set value(s) stored in dataframe (as pointer) from uid."""
         self.df.loc[self.df["uid"] == uid, "dip"] = dip
+        self._invalidate_frame(uid=uid)
 
     def get_uid_length(self, uid=None):
         """Get value(s) stored in dataframe (as pointer) from uid."""
@@ -621,24 +634,13 @@ class XSectionCollection(BaseCollection):
         return deltaX, deltaY
 
     def get_uid_strike_vect(self, section_uid=None):
-        strike = self.df.loc[self.df["uid"] == section_uid, "strike"].values[0]
-        return np_array([np_sin(np_deg2rad(strike)), np_cos(np_deg2rad(strike)), 0.0])
+        return self.get_uid_frame(section_uid=section_uid)[:3, 0].copy()
 
     def get_uid_dip_vect(self, section_uid=None):
-        strike = self.df.loc[self.df["uid"] == section_uid, "strike"].values[0]
-        dip = self.df.loc[self.df["uid"] == section_uid, "dip"].values[0]
-        return np_array(
-            [
-                np_sin(np_deg2rad(strike + 90)) * np_cos(np_deg2rad(dip)),
-                np_cos(np_deg2rad(strike + 90)) * np_cos(np_deg2rad(dip)),
-                -np_sin(np_deg2rad(dip)),
-            ]
-        )
+        return self.get_uid_frame(section_uid=section_uid)[:3, 1].copy()
 
     def get_uid_normal_vect(self, section_uid=None):
-        strike_vct = self.get_uid_strike_vect(section_uid=section_uid)
-        dip_vct = self.get_uid_dip_vect(section_uid=section_uid)
-        return np_cross(strike_vct, dip_vct)
+        return self.get_uid_frame(section_uid=section_uid)[:3, 2].copy()
 
     def get_uid_normal_x(self, uid=None):
         return self.get_uid_normal_vect(uid)[0]
@@ -649,34 +651,64 @@ class XSectionCollection(BaseCollection):
     def get_uid_normal_z(self, uid=None):
         return self.get_uid_normal_vect(uid)[2]
 
+    def get_uid_frame(self, section_uid=None):
+        """Get the 4 x 4 float64 matrix that maps homogeneous UVW cross-section plane coordinates to XYZ world
+        coordinates. Columns are the strike, dip and normal unit vectors and the origin. The matrix is cached
+        and the cache entry is invalidated when the section geometry is set or its parameters are modified.
+        """
+        frame = self._frames.get(section_uid)
+        if frame is None:
+            row = self.df.loc[
+                self.df["uid"] == section_uid,
+                ["origin_x", "origin_y", "origin_z", "strike", "dip"],
+            ]
+            origin_x, origin_y, origin_z, strike, dip = row.values[0].astype(np_float64)
+            strike_vct = np_array(
+                [np_sin(np_deg2rad(strike)), np_cos(np_deg2rad(strike)), 0.0]
+            )
+            dip_vct = np_array(
+                [
+                    np_sin(np_deg2rad(strike + 90)) * np_cos(np_deg2rad(dip)),
+                    np_cos(np_deg2rad(strike + 90)) * np_cos(np_deg2rad(dip)),
+                    -np_sin(np_deg2rad(dip)),
+                ]
+            )
+            frame = np_eye(4, dtype=np_float64)
+            frame[:3, 0] = strike_vct
+            frame[:3, 1] = dip_vct
+            frame[:3, 2] = np_cross(strike_vct, dip_vct)
+            frame[:3, 3] = [origin_x, origin_y, origin_z]
+            self._frames[section_uid] = frame
+        return frame
+
+    def _invalidate_frame(self, uid=None):
+        """Remove the cached frame of a cross-section, to be rebuilt at the next transformation."""
+        self._frames.pop(uid, None)
+
+    def _frames_by_point(self, section_uids=None):
+        """Rotation matrices (n x 3 x 3) and origins (n x 3) for an array of n cross-section uids, with frames
+        read once for each distinct section. Uids are factorized with a hash table, without sorting.
+        """
+        inverse, unique_uids = pd_factorize(np_asarray(section_uids, dtype=object))
+        frames = np_stack([self.get_uid_frame(uid) for uid in unique_uids])
+        return frames[inverse, :3, :3], frames[inverse, :3, 3]
+
     def world2plane(self, section_uid=None, X=None, Y=None, Z=None, as_arr=False):
-        """Get UV cross-section plane coordinates from XYZ world coordinates."""
-        # strike, dip, normal and origin are 3-element vectors in world XYZ coordinates
-        strike_vct = np_array(
-            self.get_uid_strike_vect(section_uid=section_uid), dtype=np_float64
-        ).reshape(3)
-        dip_vct = np_array(
-            self.get_uid_dip_vect(section_uid=section_uid), dtype=np_float64
-        ).reshape(3)
-        normal_vct = np_array(
-            self.get_uid_normal_vect(section_uid=section_uid), dtype=np_float64
-        ).reshape(3)
-        origin = np_array(
-            self.get_uid_origin(uid=section_uid), dtype=np_float64
-        ).reshape(3)
-        X_arr = np_array(X, dtype=np_float64)
-        Y_arr = np_array(Y, dtype=np_float64)
-        Z_arr = np_array(Z, dtype=np_float64)
+        """Get UV cross-section plane coordinates from XYZ world coordinates, in float64."""
+        frame = self.get_uid_frame(section_uid=section_uid)
+        X_arr = np_asarray(X, dtype=np_float64)
+        Y_arr = np_asarray(Y, dtype=np_float64)
+        Z_arr = np_asarray(Z, dtype=np_float64)
         if X_arr.shape != Y_arr.shape or X_arr.shape != Z_arr.shape:
             raise ValueError("X, Y and Z must have the same shape in world2plane.")
-        XYZ = np_array([X_arr, Y_arr, Z_arr], dtype=np_float64).T
-        # vector from cross-section origin to points, in world XYZ coordinates
-        origin_2_point = XYZ - origin
-        # convert to UVW coordinates with dot products; output keeps flat input shape
-        U = np_float32(np_dot(origin_2_point, strike_vct))
-        V = np_float32(np_dot(origin_2_point, dip_vct))
-        W = np_float32(np_dot(origin_2_point, normal_vct))
-        if np_array(W**2 > 1e-10).any():
+        # vector from cross-section origin to points, in world XYZ coordinates, then
+        # converted to UVW coordinates with dot products on the strike, dip and normal axes
+        origin_2_point = np_array([X_arr, Y_arr, Z_arr]).T - frame[:3, 3]
+        UVW = origin_2_point @ frame[:3, :3]
+        U = UVW[..., 0]
+        V = UVW[..., 1]
+        W = UVW[..., 2]
+        if (W**2 > 1e-10).any():
             print(" ---> check W (should be zero): ", W)
         if as_arr:
             return np_array([U, V]).T
@@ -684,24 +716,17 @@ class XSectionCollection(BaseCollection):
             return U, V
 
     def plane2world(self, section_uid=None, U=None, V=None, as_arr=False):
-        """Get XYZ world coordinates from UV cross-section plane coordinates."""
-        # strike, dip and origin are treated as 3-element vectors in world XYZ coordinates
-        strike_vct = np_array(
-            self.get_uid_strike_vect(section_uid=section_uid), dtype=np_float64
-        ).reshape(3)
-        dip_vct = np_array(
-            self.get_uid_dip_vect(section_uid=section_uid), dtype=np_float64
-        ).reshape(3)
-        origin = np_array(
-            self.get_uid_origin(uid=section_uid), dtype=np_float64
-        ).reshape(3)
+        """Get XYZ world coordinates from UV cross-section plane coordinates, in float64."""
+        frame = self.get_uid_frame(section_uid=section_uid)
         # U and V can be scalars or arrays; keep their shape and broadcast on the XYZ axis
-        U_arr = np_array(U, dtype=np_float64)
-        V_arr = np_array(V, dtype=np_float64)
+        U_arr = np_asarray(U, dtype=np_float64)
+        V_arr = np_asarray(V, dtype=np_float64)
         if U_arr.shape != V_arr.shape:
             raise ValueError("U and V must have the same shape in plane2world.")
-        XYZ = np_float32(
-            origin + U_arr[..., None] * strike_vct + V_arr[..., None] * dip_vct
+        XYZ = (
+            frame[:3, 3]
+            + U_arr[..., None] * frame[:3, 0]
+            + V_arr[..., None] * frame[:3, 1]
         )
         if U_arr.ndim == 0:
             if as_arr:
@@ -711,9 +736,46 @@ class XSectionCollection(BaseCollection):
             return XYZ
         return XYZ[..., 0], XYZ[..., 1], XYZ[..., 2]
 
+    def world2plane_batch(self, section_uids=None, XYZ=None):
+        """Get UVW cross-section plane coordinates (n x 3) from XYZ world coordinates (n x 3) of points that
+        belong to different cross-sections, with section_uids the array of n cross-section uids, one for each
+        point, or a single uid for all points. All points are transformed in a single call, in float64.
+        W is the distance from the plane.
+        """
+        XYZ = np_asarray(XYZ, dtype=np_float64).reshape(-1, 3)
+        if isinstance(section_uids, str):
+            section_uids = [section_uids] * len(XYZ)
+        if len(section_uids) != len(XYZ):
+            raise ValueError(
+                "One section uid for each point is required in world2plane_batch."
+            )
+        if len(XYZ) == 0:
+            return np_empty((0, 3))
+        rotations, origins = self._frames_by_point(section_uids)
+        return np_einsum("ni,nij->nj", XYZ - origins, rotations)
+
+    def plane2world_batch(self, section_uids=None, UV=None):
+        """Get XYZ world coordinates (n x 3) from UV (n x 2) or UVW (n x 3) cross-section plane coordinates of
+        points that belong to different cross-sections, with section_uids the array of n cross-section uids,
+        one for each point, or a single uid for all points. All points are transformed in a single call,
+        in float64."""
+        UV = np_asarray(UV, dtype=np_float64)
+        UV = UV.reshape(len(UV), -1)
+        if isinstance(section_uids, str):
+            section_uids = [section_uids] * len(UV)
+        if len(section_uids) != len(UV):
+            raise ValueError(
+                "One section uid for each point is required in plane2world_batch."
+            )
+        if len(UV) == 0:
+            return np_empty((0, 3))
+        rotations, origins = self._frames_by_point(section_uids)
+        return origins + np_einsum("nij,nj->ni", rotations[:, :, : UV.shape[1]], UV)
+
     def set_geometry(self, uid=None):
         """Given all parameters, sets the vtkPlane origin and normal properties, and builds the frame used for
         visualization"""
+        self._invalidate_frame(uid=uid)
 
         # origin = [
         #     self.df.loc[self.df["uid"] == uid, "origin_x"].values[0],
@@ -810,16 +872,14 @@ class XSectionCollection(BaseCollection):
 
     def get_all_xsect_entities(self, xuid=None):
         """Get all entities belonging to the uid cross-section, in a dictionary sorted by collection, excluding the cross-section itself."""
-        all_entities = {}
-        out_entities = {}
-        for coll_name in self.parent.tab_collection_dict.values():
-            coll = eval(f"self.parent.{coll_name}")
-            if coll_name != "xsect_coll":
-                all_entities[coll_name] = coll.get_xuid_uid(xuid=xuid)
-        for key in all_entities.keys():
-            if all_entities[key]:
-                out_entities[key] = all_entities[key]
-        return out_entities
+        return self.parent.parent_index.all_children(
+            parent_uid=xuid,
+            collections=[
+                getattr(self.parent, coll_name)
+                for coll_name in self.parent.tab_collection_dict.values()
+                if coll_name != "xsect_coll"
+            ],
+        )
 
     def fit_to_entities(self, xuid=None, fit_method=None):
         """
@@ -2,26 +2,40 @@
 PZero© Andrea Bistacchi"""
 
 from numpy import nan as np_nan
-from numpy import append as np_append
+from numpy import arange as np_arange
 from numpy import arcsin as np_arcsin
 from numpy import arctan as np_arctan
 from numpy import arctan2 as np_arctan2
 from numpy import array as np_array
+from numpy import bincount as np_bincount
 from numpy import asarray as np_asarray
+from numpy import add as np_add
+from numpy import ascontiguousarray as np_ascontiguousarray
 from numpy import column_stack as np_column_stack
+from numpy import concatenate as np_concatenate
 from numpy import cos as np_cos
 from numpy import cross as np_cross
+from numpy import cumsum as np_cumsum
+from numpy import diff as np_diff
 from numpy import dot as np_dot
 from numpy import empty as np_empty
 from numpy import hstack as np_hstack
+from numpy import int64 as np_int64
 from numpy import ones as np_ones
 from numpy import pi as np_pi
+from numpy import repeat as np_repeat
+from numpy import roll as np_roll
+from numpy import searchsorted as np_searchsorted
 from numpy import shape as np_shape
 from numpy import sign as np_sign
+from numpy import sort as np_sort
 from numpy import size as np_size
 from numpy import sqrt as np_sqrt
 from numpy import squeeze as np_squeeze
+from numpy import stack as np_stack
 from numpy import tan as np_tan
+from numpy import unique as np_unique
+from numpy import vstack as np_vstack
 from numpy import where as np_where
 from numpy import zeros as np_zeros
 from numpy.linalg import norm as np_linalg_norm
@@ -59,7 +73,6 @@ from vtk import (
     vtkFeatureEdges,
     vtkCleanPolyData,
     vtkStripper,
-    vtkPolygon,
     vtkUnstructuredGrid,
     vtkTetra,
     vtkImageData,
@@ -74,16 +87,21 @@ from vtk import (
     vtkActor,
     vtkLocator,
     vtkQuad,
-    vtkFloatArray,
+    VTK_TETRA,
 )
 from vtkmodules.numpy_interface.dataset_adapter import (
     WrapDataObject,
     vtkDataArrayToVTKArray,
 )
-from vtkmodules.util.numpy_support import vtk_to_numpy
+from vtkmodules.util.numpy_support import (
+    numpy_to_vtk,
+    numpy_to_vtkIdTypeArray,
+    vtk_to_numpy,
+)
 from vtkmodules.vtkFiltersCore import vtkThresholdPoints
 from vtkmodules.vtkFiltersPoints import vtkConvertToPointCloud
 
+from .helpers.image_pyramid import downsample, level_for_pixels, pyramid_levels_n
 from .orientation_analysis import get_dip_dir_vectors
 
 """
@@ -205,6 +223,102 @@ Note that cell type in VTK is defined as follows (we use just a limited number o
 # ]
 
 
+def cell_array_from_numpy(cells_matrix=None, offsets=None):
+    """Build a vtkCellArray in a single call from Numpy connectivity, instead of inserting cells one by one.
+    cells_matrix can be a n_cells x n_points_per_cell matrix, for cells with the same number of points,
+    or a flat connectivity array of point ids, in which case offsets (n_cells + 1 values, the first being 0)
+    gives the position where each cell starts, as in the VTK 9 vtkCellArray storage."""
+    if offsets is None:
+        cells_matrix = np_asarray(cells_matrix)
+        if cells_matrix.ndim == 1:
+            cells_matrix = cells_matrix.reshape((-1, 1))
+        n_cells, cell_size = cells_matrix.shape
+        offsets = np_arange(n_cells + 1) * cell_size
+    connectivity = np_ascontiguousarray(cells_matrix, dtype=np_int64).ravel()
+    offsets = np_ascontiguousarray(offsets, dtype=np_int64)
+    cell_array = vtkCellArray()
+    cell_array.SetData(
+        numpy_to_vtkIdTypeArray(offsets, deep=True),
+        numpy_to_vtkIdTypeArray(connectivity, deep=True),
+    )
+    return cell_array
+
+
+def append_to_cell_array(cell_array=None, cells_matrix=None):
+    """Append the rows of a n_cells x n_points_per_cell Numpy matrix to an existing vtkCellArray.
+    A single cell is inserted directly, while many cells are appended in one call."""
+    cells_matrix = np_asarray(cells_matrix)
+    if cells_matrix.shape[0] == 1:
+        cell_array.InsertNextCell(cells_matrix.shape[1], cells_matrix[0].tolist())
+    elif cells_matrix.shape[0] > 1:
+        cell_array.Append(cell_array_from_numpy(cells_matrix), 0)
+    cell_array.Modified()
+
+
+def boundary_edges(cells_matrix=None):
+    """Find the boundary edges of a triangulated surface from its n_cells x 3 connectivity matrix, with an
+    edge table: each edge is identified by a key built from its sorted point ids, and boundary edges are
+    those whose key appears only once. Returns a n_edges x 2 matrix of point ids, with edges oriented as in
+    their triangle, and the ids of the triangles they belong to. Non-manifold edges are not included.
+    """
+    triangles = np_asarray(cells_matrix, dtype=np_int64).reshape((-1, 3))
+    if triangles.size == 0:
+        return np_empty((0, 2), dtype=np_int64), np_empty(0, dtype=np_int64)
+    # Edges (0, 1), (1, 2), (2, 0) of each triangle, so edge i belongs to triangle i // 3.
+    edges = np_stack([triangles, np_roll(triangles, -1, axis=1)], axis=2).reshape(
+        (-1, 2)
+    )
+    sorted_edges = np_sort(edges, axis=1)
+    keys = sorted_edges[:, 0] * (int(triangles.max()) + 1) + sorted_edges[:, 1]
+    _, inverse, counts = np_unique(keys, return_inverse=True, return_counts=True)
+    is_boundary = counts[inverse.ravel()] == 1
+    return edges[is_boundary], np_arange(edges.shape[0])[is_boundary] // 3
+
+
+def polyline_normals(points=None, connectivity=None, offsets=None, plane_normal=None):
+    """Calculate cell and point normals of polylines in one pass, from Numpy points and the VTK 9 offsets and
+    connectivity arrays of the line cells, so that both two-points lines and multi-point polylines are supported.
+    The normal of each segment is perpendicular to the segment and lies in the plane with normal plane_normal,
+    e.g. the cross-section plane. Cell normals are the mean of the normals of the segments in the cell, and point
+    normals the mean of the normals of the segments sharing the point, both normalized to unit vectors.
+    Degenerate segments, and points or cells where normals cancel out, get a default [0, 0, 1] normal.
+    Returns cell normals and point normals as Numpy arrays."""
+    points = np_asarray(points, dtype=float).reshape((-1, 3))
+    connectivity = np_asarray(connectivity, dtype=np_int64)
+    offsets = np_asarray(offsets, dtype=np_int64)
+    n_cells = len(offsets) - 1
+    # Segments connect consecutive ids in the connectivity array, except across cells.
+    seg_start = np_arange(max(len(connectivity) - 1, 0))
+    seg_cells = np_searchsorted(offsets, seg_start, side="right") - 1
+    in_cell = seg_start + 1 < offsets[seg_cells + 1]
+    seg_start = seg_start[in_cell]
+    seg_cells = seg_cells[in_cell]
+    p0_ids = connectivity[seg_start]
+    p1_ids = connectivity[seg_start + 1]
+    seg_normals = np_cross(
+        points[p1_ids] - points[p0_ids], np_asarray(plane_normal, dtype=float).ravel()
+    )
+
+    def _normalized(vectors):
+        norm = np_linalg_norm(vectors, axis=1)
+        vectors[norm > 0] /= norm[norm > 0, None]
+        vectors[norm == 0] = [0.0, 0.0, 1.0]
+        return vectors
+
+    seg_normals = _normalized(seg_normals)
+    # Sum segment normals by cell and by point, then normalize.
+    cell_normals = np_column_stack(
+        [
+            np_bincount(seg_cells, weights=seg_normals[:, i], minlength=n_cells)
+            for i in range(3)
+        ]
+    )
+    point_normals = np_zeros(points.shape)
+    np_add.at(point_normals, p0_ids, seg_normals)
+    np_add.at(point_normals, p1_ids, seg_normals)
+    return _normalized(cell_normals), _normalized(point_normals)
+
+
 class PolyData(vtkPolyData):
     """PolyData is an abstract class used as a base for all entities with a geological or fluid meaning, such as
     triangulated surfaces, polylines (also in cross sections), pointsets, etc., and possibly in other
@@ -287,31 +401,37 @@ class PolyData(vtkPolyData):
         pass
 
     @cells.setter
-    def cells(
-        self, cells_matrix=None
-    ):  # _______________________________________________________________ this does not work - see how to fix this that is very important - possibly use PYVISTA or BETTER numpy_to_vtk.
-        """Set all cells by applying append_cell recursively"""
-        if self.GetNumberOfCells() != 0:
-            self.DeleteCells()  # this marks the cells to be deleted
-            self.RemoveDeletedCells()  # this deletes the cells, i.e. delete the cells from the cell array
-            self.Reset()  # this resets the object and updates the cell array, resulting in an object with an empty cell array
-        for row in range(np_shape(cells_matrix)[0]):
-            self.append_cell(cell_array=cells_matrix[row, :])
+    def cells(self, cells_matrix=None):
+        """Set all cells from a Numpy connectivity matrix with n_rows = n_cells and n_columns = n_points
+        in cell, building the VTK cell array in a single call. The cell type is inferred from the number
+        of columns: 1 > vertex, 2 > line, 3 or more > polygon (triangle, quad). Existing cells are removed.
+        """
+        cells_matrix = np_asarray(cells_matrix)
+        if cells_matrix.size == 0:
+            cell_size = 0
+        else:
+            if cells_matrix.ndim == 1:
+                cells_matrix = cells_matrix.reshape((1, -1))
+            cell_size = cells_matrix.shape[1]
+        cell_array = cell_array_from_numpy(cells_matrix) if cell_size else None
+        self.SetVerts(cell_array if cell_size == 1 else vtkCellArray())
+        self.SetLines(cell_array if cell_size == 2 else vtkCellArray())
+        self.SetPolys(cell_array if cell_size >= 3 else vtkCellArray())
+        self.SetStrips(vtkCellArray())
+        self.Modified()
 
     @property
-    def cell_centers(
-        self,
-    ):  # ___________________________________________________ SEEMS USEFUL BUT NOT YET USED AND TESTED
+    def cell_centers(self):
         """Returns a 3xn array of n point coordinates at the parametric center of n cells.
         This is not necessarily the same as the geometric or bonding box center."""
         vtk_cell_ctrs = vtkCellCenters()
-        vtk_cell_ctrs.SetInputConnection(self.outputPort)
+        vtk_cell_ctrs.SetInputData(self)
         vtk_cell_ctrs.Update()
         point_ctrs = vtk_cell_ctrs.GetOutput()
-        centers_array = np_array(
-            [point_ctrs.GetPoint(i) for i in range(point_ctrs.GetNumberOfPoints())]
-        )
-        return centers_array
+        if point_ctrs.GetNumberOfPoints() == 0:
+            return np_empty((0, 3))
+        # Copy the whole array of centers at once, since the filter output is not kept.
+        return np_array(vtk_to_numpy(point_ctrs.GetPoints().GetData()))
 
     def ids_to_scalar(self):
         """Store point and cell ids on scalars named "vtkIdFilter_Ids".
@@ -702,21 +822,9 @@ class VertexSet(PolyData):
         return vset_copy
 
     def auto_cells(self):
-        """Set cells automatically assuming that the vertexes are in the correct order,
-        from first to last, and that the polyline is a single part."""
-        if self.GetNumberOfCells() != 0:
-            # Remove all cells. This is obtained calling DeleteCells without any
-            # argument and in this case RemoveDeletedCells() is not necessary.
-            self.DeleteCells()
-            self.GetVerts().Modified()
-
-        vertices = vtkCellArray()  #  vertices (cells)
-        npoints = self.points_number  #  Points present in the object
-        cellIds = [0]
-        for pid in range(npoints):
-            cellIds[0] = pid
-            vertices.InsertNextCell(1, cellIds)
-        self.SetVerts(vertices)  #  Assign the vertices to the point_cloud (vtkPolyData)
+        """Set cells automatically, with one vertex cell for each point."""
+        # The vertex cell array is replaced by a new one with all vertices, built in one call.
+        self.SetVerts(cell_array_from_numpy(np_arange(self.points_number)))
         self.Modified()
 
 
@@ -732,7 +840,7 @@ class PolyLine(PolyData):
         pline_copy.DeepCopy(self)
         return pline_copy
 
-    @property
+    @PolyData.cells.getter
     def cells(self):
         """Returns cells as Numpy array.
         In PolyLine the cells are instances of vtkLine identified by vtkCellType VTK_LINE = 3
@@ -742,37 +850,47 @@ class PolyLine(PolyData):
         )[:, 1:3]
 
     def append_cell(self, cell_array=None):
-        """Appends a single line cell from Numpy array with vertex ids."""
-        cell_array = cell_array.flat[:]  # to be sure that point_vector is a row vector
-        line = vtkLine()
-        line.GetPointIds().SetId(0, cell_array[0])
-        line.GetPointIds().SetId(1, cell_array[1])
-        if self.GetNumberOfCells() == 0:
-            pline_cells = vtkCellArray()
-            pline_cells.InsertNextCell(line)
-            self.SetLines(pline_cells)
+        """Appends line cells from Numpy array with vertex ids, either a single cell with 2 ids
+        or a n_cells x 2 matrix for many cells at once."""
+        cell_array = np_asarray(cell_array).reshape((-1, 2))
+        if self.GetNumberOfLines() == 0:
+            self.SetLines(cell_array_from_numpy(cell_array))
         else:
-            self.GetLines().InsertNextCell(line)
+            append_to_cell_array(self.GetLines(), cell_array)
         self.GetLines().Modified()
 
     def auto_cells(self):
         """Set cells automatically assuming that the vertexes are in the correct order,
         from first to last, and that the polyline is a single part."""
-        if self.GetNumberOfCells() != 0:
-            # Remove all cells. This is obtained calling DeleteCells without any
-            # argument and in this case RemoveDeletedCells() is not necessary.
-            self.DeleteCells()
-            self.GetLines().Modified()
-        pline_cells = vtkCellArray()
-        for point in range(self.points_number - 1):
-            line = vtkLine()
-            line.GetPointIds().SetId(0, point)
-            line.GetPointIds().SetId(1, point + 1)
-            pline_cells.InsertNextCell(line)
-        self.SetLines(pline_cells)
+        # The line cell array is replaced by a new one connecting consecutive points, built in one call.
+        point_ids = np_arange(max(self.points_number - 1, 0))
+        self.SetLines(
+            cell_array_from_numpy(np_column_stack([point_ids, point_ids + 1]))
+        )
         self.BuildLinks()
         self.GetLines().Modified()
 
+    def vtk_set_normals(self, plane_normal=None):
+        """Calculate point and cell normals for the PolyLine with polyline_normals, assuming that the normal
+        to each segment lies in the plane with normal plane_normal. For map traces the default is a horizontal
+        plane, i.e. normals are horizontal and perpendicular to the trace."""
+        if plane_normal is None:
+            plane_normal = [0.0, 0.0, 1.0]
+        lines = self.GetLines()
+        cell_normals, point_normals = polyline_normals(
+            points=self.points,
+            connectivity=vtk_to_numpy(lines.GetConnectivityArray()),
+            offsets=vtk_to_numpy(lines.GetOffsetsArray()),
+            plane_normal=plane_normal,
+        )
+        cell_normals = numpy_to_vtk(cell_normals.astype("float32"), deep=True)
+        cell_normals.SetName("Normals")
+        point_normals = numpy_to_vtk(point_normals.astype("float32"), deep=True)
+        point_normals.SetName("Normals")
+        self.GetCellData().SetNormals(cell_normals)
+        self.GetPointData().SetNormals(point_normals)
+        self.Modified()
+
     def sort_nodes(self):
         """Sort nodes from the first node in the first cell to the last node in the last cell."""
         if self.GetNumberOfCells() != 0:
@@ -817,7 +935,7 @@ class TriSurf(PolyData):
         trisurf_copy.DeepCopy(self)
         return trisurf_copy
 
-    @property
+    @PolyData.cells.getter
     def cells(self):
         """Returns cells as Numpy array.
         In TriSurf the cells are instances of vtkTriangle identified by vtkCellType VTK_TRIANGLE = 5
@@ -859,19 +977,13 @@ class TriSurf(PolyData):
         self.Modified()
 
     def append_cell(self, cell_array=None):
-        """Appends a single simplicial cell from Numpy. The element size is inferred from the array size:
-        2 > line, 3 > triangle, 4 > tetrahedron."""
-        cell_array = cell_array.flat[:]  # to be sure that point_vector is a row vector
-        triangle = vtkTriangle()
-        triangle.GetPointIds().SetId(0, cell_array[0])
-        triangle.GetPointIds().SetId(1, cell_array[1])
-        triangle.GetPointIds().SetId(2, cell_array[2])
-        if self.GetNumberOfCells() == 0:
-            surf_cells = vtkCellArray()
-            surf_cells.InsertNextCell(triangle)
-            self.SetPolys(surf_cells)
+        """Appends triangle cells from Numpy array with vertex ids, either a single cell with 3 ids
+        or a n_cells x 3 matrix for many cells at once."""
+        cell_array = np_asarray(cell_array).reshape((-1, 3))
+        if self.GetNumberOfPolys() == 0:
+            self.SetPolys(cell_array_from_numpy(cell_array))
         else:
-            self.GetPolys().InsertNextCell(triangle)
+            append_to_cell_array(self.GetPolys(), cell_array)
 
     def get_clean_boundary(self):
         """Gets the clean boundary both in case of single- and multi-part TriSurf's."""
@@ -904,42 +1016,30 @@ class TriSurf(PolyData):
         edges_clean_strips_clean.SetTolerance(0.0)
         edges_clean_strips_clean.SetInputConnection(edges_clean_strips.GetOutputPort())
         edges_clean_strips_clean.Update()
-        # Assemble borders.
-        border_polygons = vtkCellArray()
-        border_polygons.SetNumberOfCells(
-            edges_clean_strips_clean.GetOutput().GetNumberOfCells()
-        )
+        # Assemble borders. Each polyline with at least 3 points becomes a polygon with its own copy of the
+        # points, collected for all polygons at once from the VTK 9 offsets and connectivity arrays.
+        strips = edges_clean_strips_clean.GetOutput()
+        lines = strips.GetLines()
+        offsets = vtk_to_numpy(lines.GetOffsetsArray())
+        connectivity = vtk_to_numpy(lines.GetConnectivityArray())
+        sizes = np_diff(offsets)
+        is_polygon = sizes >= 3
+        for cell in np_where(~is_polygon)[0]:
+            print("cell: ", cell, " - degenerate cell with less than 3 points.")
         border_points = vtkPoints()
-        points_in_border = 0
-        for cell in range(edges_clean_strips_clean.GetOutput().GetNumberOfCells()):
-            if (
-                edges_clean_strips_clean.GetOutput().GetCell(cell).GetNumberOfPoints()
-                >= 3
-            ):
-                polygon = vtkPolygon()
-                polygon.GetPointIds().SetNumberOfIds(
-                    edges_clean_strips_clean.GetOutput()
-                    .GetCell(cell)
-                    .GetNumberOfPoints()
+        if strips.GetNumberOfPoints() > 0:
+            border_points.SetData(
+                numpy_to_vtk(
+                    vtk_to_numpy(strips.GetPoints().GetData())[
+                        connectivity[np_repeat(is_polygon, sizes)]
+                    ],
+                    deep=True,
                 )
-                for point_in_cell in range(
-                    edges_clean_strips_clean.GetOutput()
-                    .GetCell(cell)
-                    .GetNumberOfPoints()
-                ):
-                    point_in_border = point_in_cell + points_in_border
-                    border_points.InsertNextPoint(
-                        edges_clean_strips_clean.GetOutput()
-                        .GetCell(cell)
-                        .GetPoints()
-                        .GetPoint(point_in_cell)
-                    )
-                    polygon.GetPointIds().SetId(point_in_cell, point_in_border)
-                border_polygons.InsertNextCell(polygon)
-                points_in_polygon = polygon.GetNumberOfPoints()
-                points_in_border += points_in_polygon
-            else:
-                print("cell: ", cell, " - degenerate cell with less than 3 points.")
+            )
+        polygon_offsets = np_concatenate([[0], np_cumsum(sizes[is_polygon])])
+        border_polygons = cell_array_from_numpy(
+            cells_matrix=np_arange(polygon_offsets[-1]), offsets=polygon_offsets
+        )
         borders = vtkPolyData()
         borders.SetPoints(border_points)
         borders.SetPolys(border_polygons)
@@ -950,109 +1050,39 @@ class TriSurf(PolyData):
         """Returns a deep copy of the input TriSurf with the boundary edges translated
         outwards, parallel to the cell plane, by an amount equal to tol.
         This is similar to a dilation or a Minkowski sum."""
-        # """Deep copy the input TriSurf, in order not to permanently modify it."""
-        # trisurf_copy = self.deep_copy()
-        # """Clean topology, store point and cell ids on scalars named vtkIdFilter_Ids."""
-        # trisurf_copy.clean_topology()
-        trisurf_copy = self.clean_topology()
+        # Clean topology on a copy, in order not to permanently modify the input TriSurf.
+        trisurf_copy = TriSurf()
+        trisurf_copy.DeepCopy(self.clean_topology())
         trisurf_copy.Squeeze()
-        trisurf_copy.Modified()
-        trisurf_copy.BuildCells()
-        trisurf_copy.BuildLinks()
-        trisurf_copy.ids_to_scalar()
-        # Extract boundary cells from the trisurf_copy painted with vtkIdFilter_Ids
-        edges_filter = vtkFeatureEdges()
-        edges_filter.BoundaryEdgesOn()
-        edges_filter.NonManifoldEdgesOff()
-        edges_filter.FeatureEdgesOff()
-        edges_filter.ManifoldEdgesOff()
-        edges_filter.SetInputData(trisurf_copy)
-        edges_filter.Update()
-        edges = edges_filter.GetOutput()
-        # Extract a Numpy array of boundary point ids, and use it to build a vtkIdList.
-        # Use the for loop to insert ids since the SetArray VTK method does not work.
-        bnd_pt_ids_narray = WrapDataObject(edges).PointData["vtkIdFilter_Ids"]
-        edges_points_n = len(bnd_pt_ids_narray)
-        bnd_pt_ids = vtkIdList()
-        for bnd_pt_id in bnd_pt_ids_narray:
-            bnd_pt_ids.InsertNextId(bnd_pt_id)
-        # For each point, find the cells and edges, then calculate the dilation vector from each
-        # pair of edge and center-to-edge unit vectors, and normalize the dilation vector to have norm = tol.
-        # The transformation is applied at the end with displace_boundary_points_array in order not to alter
-        # point coordinates within the loop. In early attempts I used the VTK methods ComputeCentroid() and Normals()
-        # but the first does not return the true center of the triangle, and the second results in uncertainties
-        # if pointing upwards or downwards.
-        displace_boundary_points_array = np_empty((0, 4), dtype=float)
-        for p_i in range(edges_points_n):
-            # Loop over edge points.
-            point_id = bnd_pt_ids.GetId(p_i)
-            point_displ = np_zeros(3)
-            # Get list of cells that share the point as vtkIdList.
-            point_cells_ids = vtkIdList()
-            trisurf_copy.GetPointCells(point_id, point_cells_ids)
-            n_point_cells = point_cells_ids.GetNumberOfIds()
-            for c_i in range(n_point_cells):
-                # Loop over cells (triangles).
-                cell_id = point_cells_ids.GetId(c_i)
-                # Get the other two points in this triangle.
-                trgl_point_ids = vtkIdList()
-                trisurf_copy.GetCellPoints(cell_id, trgl_point_ids)
-                # Use the mean value of vertex coordinates to calculate the triangle center. The ComputeCentroid() VTK method yields incorrect centres not contained in the triangle plane.
-                trgl_ctr = (
-                    np_asarray(trisurf_copy.GetPoint(trgl_point_ids.GetId(0)))
-                    + np_asarray(trisurf_copy.GetPoint(trgl_point_ids.GetId(1)))
-                    + np_asarray(trisurf_copy.GetPoint(trgl_point_ids.GetId(2)))
-                ) / 3
-                for e_i in range(3):
-                    # Loop over edge points.
-                    edge_point_id = trgl_point_ids.GetId(e_i)
-                    if edge_point_id != point_id:
-                        # Exclude the cell points excluding the point to be displaced itself.
-                        edge_cells_ids = vtkIdList()
-                        trisurf_copy.GetCellEdgeNeighbors(
-                            cell_id, point_id, edge_point_id, edge_cells_ids
-                        )
-                        if edge_cells_ids.GetNumberOfIds() == 0:
-                            # Process only points on a boundary edge.
-                            # Coordinates of the point to be displaced.
-                            point_xyz = np_asarray(trisurf_copy.GetPoint(point_id))
-                            # Coordinates of the point at the other end of the edge.
-                            edge_point = np_asarray(
-                                trisurf_copy.GetPoint(edge_point_id)
-                            )
-                            # Unit vector oriented as the edge.
-                            edge_vector = edge_point - point_xyz
-                            edge_vector = edge_vector / np_linalg_norm(edge_vector)
-                            # Center of the edge.
-                            edge_ctr = (edge_point + point_xyz) / 2
-                            # Vector connecting the center of the triangle with the center of the edge, normalized to unit vector.
-                            center2edge_vector = edge_ctr - trgl_ctr
-                            center2edge_vector = center2edge_vector / np_linalg_norm(
-                                center2edge_vector
-                            )
-                            # Unit vector perpendicular to the edge and the triangle plane.
-                            trgl_normal = np_cross(edge_vector, center2edge_vector)
-                            trgl_normal = trgl_normal / np_linalg_norm(trgl_normal)
-                            # Unit vector perpendicular to the edge and parallel to the triangle plane, pointing outwards."""
-                            edge_displ = np_cross(trgl_normal, edge_vector)
-                            edge_displ = edge_displ / np_linalg_norm(edge_displ)
-                            # Add this vector to the total displacement to be applied to this point.
-                            point_displ = point_displ + edge_displ
-            # Normalize the displacement, scale by tol, and record all in an array to be used later on.
-            point_displ = point_displ / np_linalg_norm(point_displ) * tol
-            displace_boundary_points_array = np_append(
-                displace_boundary_points_array,
-                np_array([[point_id, point_displ[0], point_displ[1], point_displ[2]]]),
-                axis=0,
-            )
-        for row in displace_boundary_points_array:
-            # Here we perform the dilation, on the points and with the vectors stored in displace_boundary_points_array.
-            # Converting the first column to integer is needed since Numpy arrays store homogeneous objects, hence the point
-            # indexes are stored in the array as floats.
-            point_idx = int(row[0])
-            trisurf_copy.points_X[point_idx] = trisurf_copy.points_X[point_idx] + row[1]
-            trisurf_copy.points_Y[point_idx] = trisurf_copy.points_Y[point_idx] + row[2]
-            trisurf_copy.points_Z[point_idx] = trisurf_copy.points_Z[point_idx] + row[3]
+        points = trisurf_copy.points
+        # Boundary edges from the edge table, with the triangle they belong to.
+        edges, edge_cells = boundary_edges(trisurf_copy.cells)
+        if edges.shape[0] == 0:
+            return trisurf_copy
+        # For each boundary edge, calculate the unit vector perpendicular to the edge and parallel to the
+        # triangle plane, pointing outwards. Use the mean value of vertex coordinates to calculate the triangle
+        # center, since the ComputeCentroid() VTK method yields incorrect centres not contained in the triangle
+        # plane. The result does not depend on the orientation of the edge, so it is the same for both points.
+        xyz = np_asarray(points, dtype=float)
+        trgl_ctr = xyz[trisurf_copy.cells[edge_cells]].mean(axis=1)
+        edge_vector = xyz[edges[:, 1]] - xyz[edges[:, 0]]
+        edge_vector /= np_linalg_norm(edge_vector, axis=1)[:, None]
+        center2edge_vector = (xyz[edges[:, 0]] + xyz[edges[:, 1]]) / 2 - trgl_ctr
+        trgl_normal = np_cross(edge_vector, center2edge_vector)
+        trgl_normal /= np_linalg_norm(trgl_normal, axis=1)[:, None]
+        edge_displ = np_cross(trgl_normal, edge_vector)
+        edge_displ /= np_linalg_norm(edge_displ, axis=1)[:, None]
+        # Sum the displacements of the boundary edges sharing each point, then normalize them and scale by tol.
+        point_displ = np_zeros(xyz.shape)
+        np_add.at(point_displ, edges[:, 0], edge_displ)
+        np_add.at(point_displ, edges[:, 1], edge_displ)
+        bnd_pt_ids = np_unique(edges)
+        displ_norm = np_linalg_norm(point_displ[bnd_pt_ids], axis=1)
+        bnd_pt_ids = bnd_pt_ids[displ_norm > 0]
+        points[bnd_pt_ids] += (
+            point_displ[bnd_pt_ids] / displ_norm[displ_norm > 0][:, None] * tol
+        )
+        trisurf_copy.GetPoints().Modified()
         trisurf_copy.Modified()
         return trisurf_copy
 
@@ -1086,7 +1116,7 @@ class Frame(PolyData):
         frame_copy.DeepCopy(self)
         return frame_copy
 
-    @property
+    @PolyData.cells.getter
     def cells(self):
         """Returns cells as Numpy array.
         In Frame the cells are instances of vtkQuad identified by vtkCellType VTK_QUAD = 9
@@ -1233,86 +1263,13 @@ class XsPolyLine(PolyLine):
             )  # v is negative because of the right hand rule
         return uv[:, 0], uv[:, 1]
 
-    def vtk_set_normals(self):
+    def vtk_set_normals(self, plane_normal=None):
         """Calculate point and cell normals for the XsPolyLine, assuming
-        that the normal to each segment lies in the cross-section plane.
-        Sort lines nodes before calculating normals is raccomented.
-        """
-        import vtk
-        import numpy as np
-
-        # Get the normal to the cross-section plane
-        plane = self.parent.xsect_coll.get_uid_vtk_plane(self.x_section_uid)
-        normal = np_array([plane.GetNormal()])
-
-        # Initialize normal arrays
-        cell_normals = vtkFloatArray()
-        cell_normals.SetNumberOfComponents(3)
-        cell_normals.SetNumberOfTuples(self.cells_number)
-
-        # Loop over line segments in polyline
-        for i in range(self.cells_number):
-            # print(f'Debug Segment {i}: {self.cells[i]}')
-            try:
-                if i == self.cells_number - 1:
-                    # For the last point, use the previous segment
-                    p1_idx = self.cells[i][0]  # Last point
-                    p0_idx = self.cells[i - 1][0]  # Previous point
-                else:
-                    p0_idx = self.cells[i][0]
-                    p1_idx = self.cells[i][1]
-                p0 = np.array(self.GetPoint(p0_idx))
-                p1 = np.array(self.GetPoint(p1_idx))
-
-                # Compute segment vector and normal
-                seg_vector = p1 - p0
-                normal_vector = normal[0] if normal.shape[0] == 1 else normal
-                seg_normal = np.cross(seg_vector, normal_vector)
-
-                # Normalize the normal
-                norm = np.linalg.norm(seg_normal)
-                if norm > 0:
-                    seg_normal = seg_normal / norm
-                else:
-                    print(f"Error: setting a default vector for segment {i}")
-                    seg_normal = np.array([0, 0, 1])
-
-                # Set the normal to the cell
-                cell_normals.SetTuple3(i, *seg_normal)
-            except Exception as e:
-                self.print_terminal(f"Error in segment {i}: {e}")
-                continue
-        self.GetCellData().SetNormals(cell_normals)
-        self.Modified()
-
-        # Compute point normals as the average of cell normals
-        point_normals = vtk.vtkFloatArray()
-        point_normals.SetNumberOfComponents(3)
-        point_normals.SetNumberOfTuples(self.points_number)
-
-        for i in range(self.points_number):
-            try:
-                cell_list = vtk.vtkIdList()
-                self.GetPointCells(i, cell_list)
-                point_normal = np.zeros(3)
-
-                for j in range(cell_list.GetNumberOfIds()):
-                    cell_id = cell_list.GetId(j)
-                    cell_normal = np.array(cell_normals.GetTuple3(cell_id))
-                    point_normal += cell_normal
-
-                if cell_list.GetNumberOfIds() > 0:
-                    point_normal /= cell_list.GetNumberOfIds()
-
-                print(f"Normals in point {i}: {point_normal}")
-
-                point_normals.SetTuple3(i, *point_normal)
-            except Exception as e:
-                print(f"Error in point {i}: {e}")
-                continue
-
-        self.GetPointData().SetNormals(point_normals)
-        self.Modified()
+        that the normal to each segment lies in the cross-section plane."""
+        if plane_normal is None:
+            plane = self.parent.xsect_coll.get_uid_vtk_plane(self.x_section_uid)
+            plane_normal = plane.GetNormal()
+        super(XsPolyLine, self).vtk_set_normals(plane_normal=plane_normal)
 
 
 class XsTriSurf(TriSurf):
@@ -1397,24 +1354,29 @@ class TetraSolid(vtkUnstructuredGrid):
         """Returns cells as Numpy array
         In TetraSolid the cells are instances of vtkTetra identified by vtkCellType VTK_TETRA = 10
         """
-        return (vtkDataArrayToVTKArray(self.GetPolys().GetData())).reshape(
-            (self.GetNumberOfPolys(), 5)
+        if self.GetNumberOfCells() == 0:
+            return np_empty((0, 4), dtype=np_int64)
+        return (vtkDataArrayToVTKArray(self.GetCells().GetData())).reshape(
+            (self.GetNumberOfCells(), 5)
         )[:, 1:5]
 
+    @cells.setter
+    def cells(self, cells_matrix=None):
+        """Set all tetrahedral cells from a n_cells x 4 Numpy matrix, building the VTK cell array in a single call."""
+        cells_matrix = np_asarray(cells_matrix).reshape((-1, 4))
+        self.SetCells(VTK_TETRA, cell_array_from_numpy(cells_matrix))
+        self.Modified()
+
     def append_cell(self, cell_array=None):
-        """Appends a single tetrahedral cell from 4 x 1 Numpy array with node indexes of the four nodes of the tetrahedron."""
-        cell_array = cell_array.flat[:]  # to be sure that point_vector is a row vector
-        tetra = vtkTetra()
-        tetra.GetPointIds().SetId(0, cell_array[0])
-        tetra.GetPointIds().SetId(1, cell_array[1])
-        tetra.GetPointIds().SetId(2, cell_array[2])
-        tetra.GetPointIds().SetId(3, cell_array[3])
+        """Appends tetrahedral cells from Numpy array with node indexes of the four nodes of each tetrahedron,
+        either a single cell with 4 ids or a n_cells x 4 matrix for many cells at once.
+        """
+        cell_array = np_asarray(cell_array).reshape((-1, 4))
         if self.GetNumberOfCells() == 0:
-            solid_cells = vtkCellArray()
-            solid_cells.InsertNextCell(tetra)
-            self.SetCells(solid_cells)
+            self.cells = cell_array
         else:
-            self.GetCells().InsertNextCell(tetra)
+            # Cell types are stored separately in vtkUnstructuredGrid, so the whole mesh is reset.
+            self.cells = np_vstack([self.cells, cell_array])
 
     def get_clean_boundary(self):
         """Returns vtkPolydata polyline(s) with boundary edges."""
@@ -2328,7 +2290,7 @@ class PCDom(PolyData):
         return vtk_out_list
 
     # @profiler('/home/gabriele/STORAGE/Unibro/Libri-e-dispense/Tesi/profiler_data/normals_calc/brolla_proxy',10)
-    def vtk_set_normals(self):
+    def vtk_set_normals(self, locator=None):
         """Calculate normals for a point cloud using PCA. Since we are using PCA ,normals may point in +/- orientation,
         which may not be consistent with neighboring normals. To resolve this problem we can flip the normals using
         np_where. Once the normals are calculated we flip all of the z positive normals (mutiplying Nx,Ny,Nz by -1).
@@ -2344,6 +2306,9 @@ class PCDom(PolyData):
 
         normals_filter = vtkPCANormalEstimation()
         normals_filter.SetInputData(self)
+        if locator is not None:
+            # Point locator already built on this point cloud, e.g. from the project spatial index cache.
+            normals_filter.SetLocator(locator)
         normals_filter.SetSampleSize(15)
         normals_filter.SetNormalOrientationToGraphTraversal()
 
@@ -2486,6 +2451,68 @@ class Image(vtkImageData):
         )
         return np_squeeze(image_data)
 
+    @property
+    def levels_n(self):
+        """Number of levels in the multi-resolution pyramid, including full resolution."""
+        return pyramid_levels_n(columns=self.U_n, rows=self.V_n)
+
+    def pyramid_level(self, level=0):
+        """Returns the image data of the active scalars at a pyramid level, with the resolution halved at each
+        level. Level 0 is the image itself, other levels are vtkImageData with the same origin, direction and
+        bounds. Levels are built once, each from the previous one, and rebuilt when the active scalars change.
+        """
+        scalars = self.GetPointData().GetScalars()
+        key = (scalars.GetName(), scalars.GetMTime())
+        if getattr(self, "_pyramid_key", None) != key:
+            self._pyramid_key = key
+            self._pyramid = [self]
+            self._pyramid_textures = {}
+        level = min(max(level, 0), self.levels_n - 1)
+        while len(self._pyramid) <= level:
+            previous = self._pyramid[-1]
+            columns, rows, _ = previous.GetDimensions()
+            level_array = downsample(
+                vtk_to_numpy(previous.GetPointData().GetScalars()).reshape(
+                    rows, columns, -1
+                )
+            )
+            new_rows, new_columns = level_array.shape[:2]
+            # Keep the bounds of the full resolution image.
+            spacing = previous.GetSpacing()
+            new_spacing = [
+                spacing[0] * (columns - 1) / max(new_columns - 1, 1),
+                spacing[1] * (rows - 1) / max(new_rows - 1, 1),
+                spacing[2],
+            ]
+            vtk_array = numpy_to_vtk(
+                level_array.reshape(new_rows * new_columns, -1), deep=False
+            )
+            vtk_array.SetName(scalars.GetName())
+            level_image = vtkImageData()
+            level_image.SetOrigin(previous.GetOrigin())
+            level_image.SetSpacing(new_spacing)
+            level_image.SetDirectionMatrix(previous.GetDirectionMatrix())
+            level_image.SetDimensions(new_columns, new_rows, 1)
+            level_image.GetPointData().SetScalars(vtk_array)
+            self._pyramid.append(level_image)
+        return self._pyramid[level]
+
+    def texture_level(self, level=0):
+        """Texture of a pyramid level, cached together with the pyramid."""
+        image = self.pyramid_level(level)
+        level = self._pyramid.index(image)
+        if level not in self._pyramid_textures:
+            self._pyramid_textures[level] = pv_image_to_texture(image)
+        return self._pyramid_textures[level]
+
+    def level_for_screen(self, screen_pixels=None):
+        """Pyramid level to be textured when the longest side of the image covers screen_pixels on screen."""
+        return level_for_pixels(
+            image_pixels=max(self.U_n, self.V_n),
+            screen_pixels=screen_pixels,
+            levels_n=self.levels_n,
+        )
+
 
 class MapImage(Image):
     """MapImage is a georeferenced (possibly multi-property) 2D image, derived from
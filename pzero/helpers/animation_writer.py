@@ -0,0 +1,382 @@
+"""animation_writer.py
+PZero© Andrea Bistacchi
+
+Streaming writers for animations exported from PZero views (animated GIF, video, PNG sequence).
+Frames are encoded as soon as they are rendered, so memory is bounded by the number of frames
+in flight in the worker pool and does not grow with the length of the animation.
+"""
+
+import os
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+import numpy as np
+
+from PIL import Image
+
+# Maximum number of colours in a GIF palette.
+GIF_MAX_COLORS = 256
+
+# Backends available in open_animation_writer(), with their default file extension.
+ANIMATION_BACKENDS = {
+    "gif": ".gif",
+    "video": ".mp4",
+    "png": ".png",
+}
+
+
+def _to_rgb_image(frame=None):
+    """Convert a frame (H x W x 3 or H x W x 4 uint8 Numpy array, as returned by
+    plotter.screenshot) to a RGB PIL image."""
+    frame = np.asarray(frame)
+    if frame.ndim == 3 and frame.shape[2] == 4:
+        frame = frame[:, :, :3]
+    return Image.fromarray(np.ascontiguousarray(frame, dtype=np.uint8), mode="RGB")
+
+
+def build_shared_palette(sample_frames=None, colors=GIF_MAX_COLORS):
+    """Compute a single palette from a list of sampled frames.
+    The samples are stacked vertically in a single image and quantized once with median cut,
+    so the palette represents colours from the whole animation. Returns a "P" mode PIL image
+    to be used as palette in Image.quantize()."""
+    images = [_to_rgb_image(frame) for frame in sample_frames]
+    if not images:
+        raise ValueError("At least one sample frame is needed to build a palette.")
+    width = max(image.width for image in images)
+    height = sum(image.height for image in images)
+    montage = Image.new("RGB", (width, height))
+    offset = 0
+    for image in images:
+        montage.paste(image, (0, offset))
+        offset += image.height
+    return montage.quantize(colors=colors, method=Image.Quantize.MEDIANCUT)
+
+
+def _parse_single_frame_gif(data=None):
+    """Split a single-frame GIF produced by Pillow into (color_table, lzw_data).
+    color_table is the raw RGB global color table and lzw_data includes the LZW minimum
+    code size byte and all data sub-blocks, including the block terminator."""
+    if data[:6] not in (b"GIF87a", b"GIF89a"):
+        raise ValueError("Not a GIF stream.")
+    packed = data[10]
+    pos = 13
+    color_table = b""
+    if packed & 0x80:
+        table_size = 3 * (2 ** ((packed & 0x07) + 1))
+        color_table = data[pos : pos + table_size]
+        pos += table_size
+    while pos < len(data):
+        block = data[pos]
+        if block == 0x21:
+            # Extension block: skip label and sub-blocks.
+            pos += 2
+            while data[pos] != 0:
+                pos += data[pos] + 1
+            pos += 1
+        elif block == 0x2C:
+            # Image descriptor. A local color table, if present, replaces the global one.
+            image_packed = data[pos + 9]
+            pos += 10
+            if image_packed & 0x80:
+                table_size = 3 * (2 ** ((image_packed & 0x07) + 1))
+                color_table = data[pos : pos + table_size]
+                pos += table_size
+            start = pos
+            pos += 1  # LZW minimum code size
+            while data[pos] != 0:
+                pos += data[pos] + 1
+            pos += 1
+            return color_table, data[start:pos]
+        else:
+            break
+    raise ValueError("No image found in GIF stream.")
+
+
+def _color_table_size_bits(color_table=None):
+    """Size field of a GIF color table (the table has 2 ** (bits + 1) entries)."""
+    entries = len(color_table) // 3
+    bits = 0
+    while 2 ** (bits + 1) < entries:
+        bits += 1
+    return bits
+
+
+def _pad_color_table(color_table=None):
+    """Pad a color table to a power of two entries, as required by the GIF format."""
+    entries = len(color_table) // 3
+    size = 2 ** (_color_table_size_bits(color_table) + 1)
+    return color_table + b"\x00" * (3 * (size - entries))
+
+
+class _StreamingWriter(ABC):
+    """Base class for streaming animation writers.
+
+    Frames are passed to add_frame() in order. Encoding runs on a pool of worker threads
+    (Pillow and NumPy release the GIL while encoding), while output is written strictly in
+    frame order by the calling thread. At most max_pending frames are held in memory."""
+
+    def __init__(self, file_path=None, fps=10, workers=None, max_pending=None):
+        self.file_path = file_path
+        self.fps = fps
+        self.workers = workers or max(1, min(4, (os.cpu_count() or 2) - 1))
+        self.max_pending = max_pending or 2 * self.workers
+        self.frames_written = 0
+        self._pending = deque()
+        self._executor = ThreadPoolExecutor(max_workers=self.workers)
+        self._closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+    def add_frame(self, frame=None):
+        """Queue a frame for encoding, then write all frames already encoded, in order.
+        Blocks when max_pending frames are in flight, so memory use stays bounded."""
+        self._pending.append(
+            self._executor.submit(self._encode_frame, self._frame_job(frame))
+        )
+        while self._pending and (
+            len(self._pending) >= self.max_pending or self._pending[0].done()
+        ):
+            self._write_encoded(self._pending.popleft().result())
+            self.frames_written += 1
+
+    def close(self):
+        """Write all remaining frames and finalize the output."""
+        if self._closed:
+            return
+        while self._pending:
+            self._write_encoded(self._pending.popleft().result())
+            self.frames_written += 1
+        self._executor.shutdown(wait=True)
+        self._finalize()
+        self._closed = True
+
+    def abort(self):
+        """Stop encoding and release resources, leaving a partial output. Does nothing once closed."""
+        if self._closed:
+            return
+        for future in self._pending:
+            future.cancel()
+        self._pending.clear()
+        self._executor.shutdown(wait=True)
+        self._finalize()
+        self._closed = True
+
+    def _frame_job(self, frame=None):
+        """Job passed to _encode_frame() for a frame, built on the calling thread in frame order."""
+        return frame
+
+    @abstractmethod
+    def _encode_frame(self, frame=None):
+        """Encode the job of a frame on a worker thread."""
+
+    @abstractmethod
+    def _write_encoded(self, encoded=None):
+        """Write an encoded frame on the calling thread."""
+
+    def _finalize(self):
+        """Finalize the output. Reimplemented in subclasses."""
+        pass
+
+
+class StreamingGifWriter(_StreamingWriter):
+    """Animated GIF writer that quantizes and LZW-encodes each frame on a worker and appends
+    it to the file immediately.
+
+    If palette is None each frame gets its own optimized palette (stored as a local color
+    table), otherwise palette is a "P" mode image from build_shared_palette() that is written
+    once as global color table and used for all frames, which avoids palette flicker and
+    reduces file size."""
+
+    def __init__(
+        self,
+        file_path=None,
+        fps=10,
+        loop=0,
+        palette=None,
+        dither=True,
+        optimize=True,
+        workers=None,
+        max_pending=None,
+    ):
+        super().__init__(
+            file_path=file_path, fps=fps, workers=workers, max_pending=max_pending
+        )
+        self.loop = loop
+        self.palette = palette
+        self.dither = Image.Dither.FLOYDSTEINBERG if dither else Image.Dither.NONE
+        self.optimize = optimize
+        # GIF delays are in hundredths of a second.
+        self.delay = max(2, int(round(100 / fps)))
+        self._file = open(file_path, "wb")
+        self._size = None
+        self._global_table = None
+        if palette is not None:
+            colors = min(len(palette.getpalette()) // 3, GIF_MAX_COLORS)
+            self._global_table = _pad_color_table(
+                bytes(palette.getpalette()[: 3 * colors])
+            )
+
+    def _encode_frame(self, frame=None):
+        image = _to_rgb_image(frame)
+        if self.palette is not None:
+            indexed = image.quantize(palette=self.palette, dither=self.dither)
+        else:
+            indexed = image.quantize(
+                colors=GIF_MAX_COLORS,
+                method=Image.Quantize.MEDIANCUT,
+                dither=self.dither,
+            )
+        buffer = BytesIO()
+        # Frames are not interlaced, since the image descriptor is rewritten without that flag.
+        indexed.save(
+            buffer,
+            format="GIF",
+            optimize=self.optimize and self.palette is None,
+            interlace=False,
+        )
+        color_table, lzw_data = _parse_single_frame_gif(buffer.getvalue())
+        return image.size, color_table, lzw_data
+
+    def _write_header(self, size=None):
+        width, height = size
+        self._file.write(b"GIF89a")
+        if self._global_table is not None:
+            packed = 0x80 | 0x70 | _color_table_size_bits(self._global_table)
+        else:
+            packed = 0x70
+        self._file.write(
+            width.to_bytes(2, "little")
+            + height.to_bytes(2, "little")
+            + bytes([packed, 0, 0])
+        )
+        if self._global_table is not None:
+            self._file.write(self._global_table)
+        # NETSCAPE2.0 application extension for looping.
+        self._file.write(
+            b"\x21\xff\x0bNETSCAPE2.0\x03\x01"
+            + int(self.loop).to_bytes(2, "little")
+            + b"\x00"
+        )
+
+    def _write_encoded(self, encoded=None):
+        size, color_table, lzw_data = encoded
+        if self._size is None:
+            self._size = size
+            self._write_header(size)
+        width, height = size
+        # Graphic control extension with frame delay, disposal method 1 (do not dispose).
+        self._file.write(
+            b"\x21\xf9\x04\x04" + self.delay.to_bytes(2, "little") + b"\x00\x00"
+        )
+        descriptor = (
+            b"\x2c\x00\x00\x00\x00"
+            + width.to_bytes(2, "little")
+            + height.to_bytes(2, "little")
+        )
+        if self._global_table is not None:
+            self._file.write(descriptor + b"\x00")
+        else:
+            color_table = _pad_color_table(color_table)
+            self._file.write(
+                descriptor + bytes([0x80 | _color_table_size_bits(color_table)])
+            )
+            self._file.write(color_table)
+        self._file.write(lzw_data)
+        self._file.flush()
+
+    def _finalize(self):
+        if not self._file.closed:
+            self._file.write(b"\x3b")
+            self._file.close()
+
+
+class PngSequenceWriter(_StreamingWriter):
+    """Writes each frame as a numbered PNG file next to file_path, e.g. animation_0000.png,
+    animation_0001.png, etc. PNG compression runs on the worker pool."""
+
+    def __init__(self, file_path=None, fps=10, workers=None, max_pending=None):
+        super().__init__(
+            file_path=file_path, fps=fps, workers=workers, max_pending=max_pending
+        )
+        self._stem = os.path.splitext(file_path)[0]
+        self._index = 0
+        self.file_paths = []
+
+    def _frame_path(self, index=None):
+        return f"{self._stem}_{index:04d}.png"
+
+    def _frame_job(self, frame=None):
+        # The output path is assigned here, so that files are numbered in frame order.
+        path = self._frame_path(self._index)
+        self._index += 1
+        self.file_paths.append(path)
+        return path, frame
+
+    def _encode_frame(self, frame=None):
+        path, frame = frame
+        _to_rgb_image(frame).save(path, format="PNG")
+        return path
+
+    def _write_encoded(self, encoded=None):
+        # Each frame is written to its own file by the worker that encodes it.
+        pass
+
+
+class VideoWriter(_StreamingWriter):
+    """Video writer based on imageio-ffmpeg, that pipes each frame to ffmpeg as soon as it is
+    rendered. Encoding is done by the ffmpeg process, so no worker pool is used."""
+
+    def __init__(self, file_path=None, fps=10, quality=8, **kwargs):
+        try:
+            import imageio.v2 as iio2
+        except ImportError:
+            raise ImportError(
+                "Video export requires 'imageio' and 'imageio-ffmpeg'.\n"
+                "Please install them: pip install imageio imageio-ffmpeg"
+            )
+        super().__init__(file_path=file_path, fps=fps, workers=1, max_pending=1)
+        self._writer = iio2.get_writer(
+            file_path, fps=fps, quality=quality, macro_block_size=1
+        )
+
+    def _encode_frame(self, frame=None):
+        frame = np.asarray(frame)
+        if frame.ndim == 3 and frame.shape[2] == 4:
+            frame = frame[:, :, :3]
+        return frame
+
+    def _write_encoded(self, encoded=None):
+        self._writer.append_data(encoded)
+
+    def _finalize(self):
+        self._writer.close()
+
+
+def open_animation_writer(
+    file_path=None, fps=10, backend="gif", palette=None, optimize=True, workers=None
+):
+    """Open a streaming animation writer for backend "gif", "video" or "png"."""
+    if backend == "gif":
+        return StreamingGifWriter(
+            file_path=file_path,
+            fps=fps,
+            palette=palette,
+            optimize=optimize,
+            workers=workers,
+        )
+    elif backend == "video":
+        return VideoWriter(file_path=file_path, fps=fps)
+    elif backend == "png":
+        return PngSequenceWriter(file_path=file_path, fps=fps, workers=workers)
+    else:
+        raise ValueError(f"Unknown animation backend: {backend}")
@@ -0,0 +1,598 @@
+"""autosave.py
+PZero© Andrea Bistacchi"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from datetime import datetime
+
+from json import dump as json_dump
+from json import load as json_load
+
+from operator import attrgetter
+
+from os import getpid as os_getpid
+from os import listdir as os_listdir
+from os import makedirs as os_makedirs
+from os import name as os_name
+from os import path as os_path
+from os import replace as os_replace
+
+from shutil import rmtree
+
+from time import monotonic
+
+if os_name == "nt":
+    from msvcrt import LK_NBLCK, LK_UNLCK
+    from msvcrt import locking as msvcrt_locking
+else:
+    from fcntl import LOCK_EX, LOCK_NB, LOCK_UN
+    from fcntl import flock as fcntl_flock
+
+from PySide6.QtCore import QTimer
+
+from pzero.helpers.project_container import (
+    MANIFEST_FILE,
+    STORAGE_CONTAINER,
+    RevisionReader,
+    RevisionWriter,
+)
+
+"""Background autosave of the project. Edits are recorded from the project signals as a set of changed entities
+and a "change volume" (number of points of changed entities, plus one for each metadata or legend change). When
+enough has changed, or some time has passed since the last autosave, a snapshot is taken on the GUI thread:
+collection and legend tables are copied, and only the entities changed since the previous snapshot are deep
+copied, so a snapshot costs a fraction of a save and foreground edits never wait for the disk. The snapshot is
+then written by a single background worker as a binary container revision (see project_container.py): unchanged
+entities are read back from the previous snapshot, or from the revision the project was opened from, and copied
+to the new one. Each snapshot is written to a temporary folder and renamed when complete, so an interrupted write
+never replaces the last good snapshot, and only the last complete snapshots are kept. Autosaves are throttled:
+only one snapshot is written at a time, and the interval between snapshots grows with the time the last one took
+to write. Each PZero session writes its snapshots in a folder of its own, with a lock file that is locked while
+the session is alive and released by the operating system if it crashes, so sessions running at the same time
+never recover or remove each other's snapshots. Snapshots are removed when PZero is closed normally, so a
+snapshot found at startup in the folder of a session that is no longer alive means that the session crashed,
+and it can be recovered with ProjectWindow.load_revision()."""
+
+# Folder where the session folders are written, shared by all sessions.
+AUTOSAVE_DIR = os_path.join(os_path.expanduser("~"), ".pzero", "autosave")
+
+# Prefix of the folders of sessions, followed by a sortable date and time and the process id.
+SESSION_PREFIX = "session_"
+
+# File in the folder of a session, locked while the session is alive, with its process id.
+LOCK_FILE = "session.lock"
+
+# Prefix of the folders of complete snapshots, followed by a sortable date and time.
+SNAPSHOT_PREFIX = "snapshot_"
+
+# Prefix of the folders of snapshots being written, renamed with SNAPSHOT_PREFIX when complete.
+TMP_PREFIX = "tmp_"
+
+# File with the project file name and time of a snapshot, written last.
+INFO_FILE = "autosave.json"
+
+# Number of complete snapshots kept in the folder of a session.
+KEEP_SNAPSHOTS = 2
+
+# Change volume (points of changed entities plus metadata changes) that triggers an autosave.
+VOLUME_THRESHOLD = 1_000_000
+
+# Minimum and maximum time, in seconds, between autosaves with pending changes.
+MIN_INTERVAL = 60.0
+MAX_INTERVAL = 300.0
+
+# The interval between autosaves is at least this multiple of the time taken to write the last snapshot.
+DURATION_FACTOR = 10.0
+
+# Interval, in milliseconds, between checks of the timer.
+CHECK_INTERVAL = 5000
+
+# Collections whose entities are written in a revision, by attribute of the project, as in save_project().
+ENTITY_COLLECTIONS = [
+    "geol_coll",
+    "dom_coll",
+    "image_coll",
+    "mesh3d_coll",
+    "boundary_coll",
+    "well_coll",
+    "fluid_coll",
+    "backgrnd_coll",
+]
+
+# Tables of a revision, with the attribute of the project they are copied from, as in save_project().
+REVISION_TABLES = {
+    "geol_legend_table": "geol_coll.legend_df",
+    "others_legend_table": "others_legend_df",
+    "prop_legend_df": "prop_legend_df",
+    "well_legend_table": "well_legend_df",
+    "fluids_legend_table": "fluid_coll.legend_df",
+    "backgrounds_legend_table": "backgrnd_coll.legend_df",
+    "xsection_table": "xsect_coll.df",
+    "geological_table": "geol_coll.df",
+    "dom_table": "dom_coll.df",
+    "image_table": "image_coll.df",
+    "mesh3d_table": "mesh3d_coll.df",
+    "boundary_table": "boundary_coll.df",
+    "well_table": "well_coll.df",
+    "fluids_table": "fluid_coll.df",
+    "backgrounds_table": "backgrnd_coll.df",
+}
+
+# Columns with VTK objects, that are not written in tables.
+VTK_COLUMNS = ["vtk_obj", "vtk_plane", "vtk_frame"]
+
+
+def entity_extension(collection_name: str = None, topology: str = None):
+    """Extension of the file of an entity, as in save_project(), or None for entities that are not saved."""
+    if topology in ["DEM", "Seismics"]:
+        return ".vts"
+    if topology in ["MapImage", "XsImage", "TSDomImage", "Voxet", "XsVoxet"]:
+        return ".vti"
+    if collection_name in ["image_coll", "mesh3d_coll"]:
+        return None
+    return ".vtp"
+
+
+def revision_entities(project=None):
+    """List of (uid, extension, vtk_obj) of the entities of the project written in a revision. Columns are
+    read at once, instead of looking up each uid."""
+    entities = []
+    for collection_name in ENTITY_COLLECTIONS:
+        df = getattr(project, collection_name).df
+        for uid, topology, vtk_obj in zip(
+            df["uid"].to_list(), df["topology"].to_list(), df["vtk_obj"].to_list()
+        ):
+            extension = entity_extension(
+                collection_name=collection_name, topology=topology
+            )
+            if extension and vtk_obj is not None:
+                entities.append((uid, extension, vtk_obj))
+    return entities
+
+
+def revision_tables(project=None) -> dict:
+    """Copies of the tables of the project written in a revision, without columns with VTK objects."""
+    tables = {}
+    for name, attribute in REVISION_TABLES.items():
+        df = attrgetter(attribute)(project)
+        out_cols = [col for col in df.columns if col not in VTK_COLUMNS]
+        tables[name] = df[out_cols].copy()
+    return tables
+
+
+def _entity_volume(collection=None, uid: str = None) -> int:
+    """Number of points of an entity, counted in the change volume, or 1 if it has no points."""
+    try:
+        return max(1, collection.get_uid_vtk_obj(uid).GetNumberOfPoints())
+    except Exception:
+        return 1
+
+
+def _try_lock(lock_file=None) -> bool:
+    """Lock an open file without waiting. Returns False if it is locked by another session."""
+    try:
+        if os_name == "nt":
+            lock_file.seek(0)
+            msvcrt_locking(lock_file.fileno(), LK_NBLCK, 1)
+        else:
+            fcntl_flock(lock_file.fileno(), LOCK_EX | LOCK_NB)
+    except OSError:
+        return False
+    return True
+
+
+def _unlock(lock_file=None):
+    if os_name == "nt":
+        lock_file.seek(0)
+        msvcrt_locking(lock_file.fileno(), LK_UNLCK, 1)
+    else:
+        fcntl_flock(lock_file.fileno(), LOCK_UN)
+
+
+def open_session(autosave_dir: str = AUTOSAVE_DIR):
+    """Create the folder of a new session in autosave_dir, with its lock file locked and the process id
+    written in it. Returns the folder and the open lock file, that must stay open while the session is alive.
+    """
+    dir_name = os_path.join(
+        autosave_dir,
+        SESSION_PREFIX
+        + datetime.now().strftime("%Y-%m-%d-%H-%M-%S-%f")
+        + f"_{os_getpid()}",
+    )
+    os_makedirs(dir_name)
+    lock_file = open(os_path.join(dir_name, LOCK_FILE), "w+")
+    _try_lock(lock_file)
+    lock_file.write(str(os_getpid()))
+    lock_file.flush()
+    return dir_name, lock_file
+
+
+def close_session(lock_file=None):
+    """Release the lock of a session, that is then no longer alive."""
+    try:
+        _unlock(lock_file)
+    except OSError:
+        pass
+    lock_file.close()
+
+
+def is_alive(dir_name: str = None) -> bool:
+    """True if the session of folder dir_name holds its lock file, also when the session is this process."""
+    try:
+        lock_file = open(os_path.join(dir_name, LOCK_FILE), "r+")
+    except OSError:
+        return False
+    with lock_file:
+        if not _try_lock(lock_file):
+            return True
+        _unlock(lock_file)
+    return False
+
+
+def dead_sessions(autosave_dir: str = AUTOSAVE_DIR) -> list:
+    """Folders of the sessions in autosave_dir that are no longer alive."""
+    if not os_path.isdir(autosave_dir):
+        return []
+    return [
+        os_path.join(autosave_dir, name)
+        for name in sorted(os_listdir(autosave_dir))
+        if name.startswith(SESSION_PREFIX)
+        and not is_alive(os_path.join(autosave_dir, name))
+    ]
+
+
+def session_of(dir_name: str = None, autosave_dir: str = AUTOSAVE_DIR):
+    """Folder of the session in autosave_dir that the snapshot dir_name belongs to, or None."""
+    session_dir = os_path.dirname(os_path.normpath(dir_name))
+    if os_path.normpath(os_path.dirname(session_dir)) != os_path.normpath(
+        autosave_dir
+    ) or not os_path.basename(session_dir).startswith(SESSION_PREFIX):
+        return None
+    return session_dir
+
+
+def remove_sessions(autosave_dir: str = AUTOSAVE_DIR, keep: list = None):
+    """Remove the folders of the sessions in autosave_dir that are no longer alive, except the sessions of the
+    snapshots in keep."""
+    keep = [
+        os_path.normpath(session_of(dir_name=dir_name, autosave_dir=autosave_dir))
+        for dir_name in (keep or [])
+        if session_of(dir_name=dir_name, autosave_dir=autosave_dir)
+    ]
+    for session_dir in dead_sessions(autosave_dir):
+        if os_path.normpath(session_dir) not in keep:
+            # Memory-mapped files can be locked on Windows, they are removed at a later call.
+            rmtree(session_dir, ignore_errors=True)
+
+
+def is_complete(dir_name: str = None) -> bool:
+    """True if dir_name is a complete snapshot."""
+    return (
+        os_path.basename(os_path.normpath(dir_name)).startswith(SNAPSHOT_PREFIX)
+        and os_path.isfile(os_path.join(dir_name, MANIFEST_FILE))
+        and os_path.isfile(os_path.join(dir_name, INFO_FILE))
+    )
+
+
+def list_snapshots(session_dir: str = None) -> list:
+    """Complete snapshots in the folder of a session, from the oldest to the latest. Folders of snapshots whose
+    writing was interrupted are ignored."""
+    if not os_path.isdir(session_dir):
+        return []
+    return [
+        os_path.join(session_dir, name)
+        for name in sorted(os_listdir(session_dir))
+        if is_complete(os_path.join(session_dir, name))
+    ]
+
+
+def latest_snapshot(autosave_dir: str = AUTOSAVE_DIR):
+    """Latest complete snapshot of the sessions in autosave_dir that are no longer alive, or None. Snapshots of
+    sessions still running, including this one, are never offered for recovery."""
+    snapshots = [
+        snapshot
+        for session_dir in dead_sessions(autosave_dir)
+        for snapshot in list_snapshots(session_dir)
+    ]
+    return max(snapshots, key=os_path.basename) if snapshots else None
+
+
+def read_info(dir_name: str = None) -> dict:
+    """Project file name and time of a snapshot."""
+    with open(os_path.join(dir_name, INFO_FILE), "rt") as fin:
+        return json_load(fin)
+
+
+def remove_snapshots(session_dir: str = None, keep: list = None):
+    """Remove snapshots and interrupted snapshots from the folder of a session, except the folders in keep."""
+    if not os_path.isdir(session_dir):
+        return
+    keep = [os_path.normpath(dir_name) for dir_name in (keep or [])]
+    for name in os_listdir(session_dir):
+        dir_name = os_path.join(session_dir, name)
+        if not name.startswith((SNAPSHOT_PREFIX, TMP_PREFIX)):
+            continue
+        if os_path.normpath(dir_name) in keep:
+            continue
+        # Memory-mapped files can be locked on Windows, they are removed at a later call.
+        rmtree(dir_name, ignore_errors=True)
+
+
+class Snapshot:
+    """Tables and entities of the project at a given time, taken on the GUI thread and written by
+    write_snapshot(). Entities are (uid, extension, vtk_obj) with vtk_obj None for entities unchanged since
+    base_dir, that are copied from there."""
+
+    def __init__(self, tables=None, entities=None, base_dir=None, info=None):
+        self.tables = tables
+        self.entities = entities
+        self.base_dir = base_dir
+        self.info = info
+
+    @property
+    def copied_uids(self) -> set:
+        """Uids of the entities copied in the snapshot."""
+        return {uid for uid, _, vtk_obj in self.entities if vtk_obj is not None}
+
+
+def write_snapshot(snapshot: Snapshot = None, session_dir: str = None) -> str:
+    """Write a snapshot as a binary container revision in the folder of a session and return its folder. Runs
+    on the background worker. Older snapshots are removed, except the last KEEP_SNAPSHOTS ones. Raises
+    FileNotFoundError if an unchanged entity is missing from the base revision.
+    """
+    stamp = snapshot.info["stamp"]
+    tmp_dir_name = os_path.join(session_dir, TMP_PREFIX + stamp)
+    out_dir_name = os_path.join(session_dir, SNAPSHOT_PREFIX + stamp)
+    base = RevisionReader(dir_name=snapshot.base_dir) if snapshot.base_dir else None
+    missing = [
+        uid
+        for uid, extension, vtk_obj in snapshot.entities
+        if vtk_obj is None
+        and (base is None or not base.has_entity(uid=uid, extension=extension))
+    ]
+    if missing:
+        raise FileNotFoundError(
+            f"entities {', '.join(missing)} not found in {snapshot.base_dir}"
+        )
+    os_makedirs(tmp_dir_name)
+    revision = RevisionWriter(dir_name=tmp_dir_name, storage=STORAGE_CONTAINER)
+    for name, df in snapshot.tables.items():
+        revision.write_table(name=name, df=df)
+    for uid, extension, vtk_obj in snapshot.entities:
+        if vtk_obj is None:
+            vtk_obj = base.read_entity(uid=uid, extension=extension)
+        revision.write_entity(uid=uid, vtk_obj=vtk_obj, extension=extension)
+    revision.close()
+    # Release the memory map of the base before it is removed.
+    del base
+    with open(os_path.join(tmp_dir_name, INFO_FILE), "wt") as fout:
+        json_dump(snapshot.info, fout)
+    # The snapshot becomes visible only when complete.
+    os_replace(tmp_dir_name, out_dir_name)
+    remove_snapshots(
+        session_dir=session_dir,
+        keep=list_snapshots(session_dir)[-KEEP_SNAPSHOTS:],
+    )
+    return out_dir_name
+
+
+class AutosaveService:
+    """Autosave of the project, owned by ProjectWindow. Changes are recorded by the methods connected to the
+    project signals, tick() is called by a timer on the GUI thread, and snapshots are written in background.
+    """
+
+    def __init__(self, project=None, autosave_dir: str = AUTOSAVE_DIR):
+        self.project = project
+        self.autosave_dir = autosave_dir
+        # Folder and open lock file of this session, created when the first snapshot is due.
+        self.session_dir = None
+        self._lock_file = None
+        # Revision that unchanged entities are copied from: the last snapshot or the saved/opened revision.
+        self.base_dir = None
+        # uid -> MTime of the entity when it was last written, to detect edits that do not emit signals.
+        self._mtimes = {}
+        # Uids of entities changed since the last snapshot.
+        self._dirty = set()
+        self.tables_dirty = False
+        self.volume = 0
+        self.last_duration = 0.0
+        self._last_save_time = monotonic()
+        self._counter = 0
+        # (snapshot, start time, future) of the snapshot being written.
+        self._writing = None
+        self._executor = None
+        self._timer = None
+
+    def open_session(self):
+        """Create the folder of this session, if not yet created."""
+        if self.session_dir is None:
+            self.session_dir, self._lock_file = open_session(self.autosave_dir)
+
+    def start(self):
+        """Start checking for changes with a timer on the GUI thread."""
+        self.open_session()
+        if self._timer is None:
+            self._timer = QTimer()
+            self._timer.setInterval(CHECK_INTERVAL)
+            self._timer.timeout.connect(lambda: self.tick())
+        self._timer.start()
+
+    def stop(self, clear: bool = True):
+        """Stop the timer, wait for the snapshot being written and release the session. If clear, remove the
+        folder of this session and the one of the snapshot the project was recovered from, as done when PZero
+        is closed normally, otherwise the snapshots are left for recovery."""
+        if self._timer is not None:
+            self._timer.stop()
+        self.collect(wait=True)
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        if self.session_dir is None:
+            return
+        if clear:
+            remove_snapshots(session_dir=self.session_dir)
+        close_session(self._lock_file)
+        if clear:
+            rmtree(self.session_dir, ignore_errors=True)
+            recovered_dir = (
+                session_of(dir_name=self.base_dir, autosave_dir=self.autosave_dir)
+                if self.base_dir
+                else None
+            )
+            if recovered_dir is not None and not is_alive(recovered_dir):
+                rmtree(recovered_dir, ignore_errors=True)
+        self.session_dir = None
+        self._lock_file = None
+
+    # ---- Recording changes, connected to project signals. ----
+
+    def entities_changed(self, uids=None, collection=None):
+        """Entities added, or with geometry, properties or values modified."""
+        for uid in uids:
+            self._dirty.add(uid)
+            self.volume += _entity_volume(collection=collection, uid=uid)
+        self.tables_dirty = True
+
+    def entities_removed(self, uids=None, collection=None):
+        """Entities removed from a collection."""
+        for uid in uids:
+            self._dirty.discard(uid)
+            self._mtimes.pop(uid, None)
+        self.volume += len(uids)
+        self.tables_dirty = True
+
+    def tables_changed(self, uids=None, collection=None):
+        """Metadata or legend modified."""
+        self.volume += max(1, len(uids or []))
+        self.tables_dirty = True
+
+    @property
+    def pending(self) -> bool:
+        """True if there are changes not yet in a snapshot."""
+        return self.tables_dirty or bool(self._dirty)
+
+    @property
+    def is_writing(self) -> bool:
+        """True while a snapshot is written in background."""
+        return self._writing is not None
+
+    # ---- Throttling and snapshots. ----
+
+    def interval(self) -> float:
+        """Minimum time between autosaves, longer if writing the last snapshot took long."""
+        return max(MIN_INTERVAL, DURATION_FACTOR * self.last_duration)
+
+    def is_due(self, now: float = None) -> bool:
+        """True if a snapshot must be taken now: changes are pending, no snapshot is being written, and either
+        the change volume reached VOLUME_THRESHOLD or MAX_INTERVAL has passed since the last autosave.
+        """
+        if not self.pending or self.is_writing:
+            return False
+        elapsed = now - self._last_save_time
+        if elapsed < self.interval():
+            return False
+        return self.volume >= VOLUME_THRESHOLD or elapsed >= MAX_INTERVAL
+
+    def tick(self, now: float = None):
+        """Collect the snapshot written in background, if finished, and take a new one if due."""
+        if now is None:
+            now = monotonic()
+        self.collect()
+        if self.is_due(now):
+            self.save_snapshot(now=now)
+
+    def take_snapshot(self) -> Snapshot:
+        """Copy tables and changed entities of the project. Runs on the GUI thread, and does not touch the disk.
+        Entities are copied if changed since the last snapshot, if their MTime changed, or if there is no base.
+        """
+        entities = []
+        mtimes = {}
+        for uid, extension, vtk_obj in revision_entities(self.project):
+            mtime = vtk_obj.GetMTime()
+            copy = None
+            if (
+                self.base_dir is None
+                or uid in self._dirty
+                or self._mtimes.get(uid) != mtime
+            ):
+                copy = vtk_obj.NewInstance()
+                copy.DeepCopy(vtk_obj)
+            entities.append((uid, extension, copy))
+            mtimes[uid] = mtime
+        self._counter += 1
+        now = datetime.now()
+        info = {
+            "project_file": getattr(self.project, "out_file_name", None) or "",
+            "time": now.strftime("%Y-%m-%d %H:%M:%S"),
+            "stamp": now.strftime("%Y-%m-%d-%H-%M-%S-%f") + f"-{self._counter:06d}",
+        }
+        snapshot = Snapshot(
+            tables=revision_tables(self.project),
+            entities=entities,
+            base_dir=self.base_dir,
+            info=info,
+        )
+        self._mtimes = mtimes
+        self._dirty = set()
+        self.tables_dirty = False
+        self.volume = 0
+        return snapshot
+
+    def save_snapshot(self, now: float = None):
+        """Take a snapshot and write it in background."""
+        if now is None:
+            now = monotonic()
+        self.open_session()
+        snapshot = self.take_snapshot()
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="autosave"
+            )
+        self._writing = (
+            snapshot,
+            now,
+            self._executor.submit(write_snapshot, snapshot, self.session_dir),
+        )
+        self._last_save_time = now
+
+    def collect(self, wait: bool = False):
+        """Check the snapshot written in background: when complete it becomes the base of the next one, when
+        failed all its entities are marked as changed again, so the next snapshot copies them instead of reading
+        them from a base that may miss them. Returns the folder of the snapshot, or None.
+        """
+        if self._writing is None:
+            return None
+        snapshot, start, future = self._writing
+        if not wait and not future.done():
+            return None
+        self._writing = None
+        self.last_duration = monotonic() - start
+        try:
+            out_dir_name = future.result()
+        except Exception as exception:
+            print(f"autosave failed: {exception}")
+            self._dirty |= {uid for uid, _, _ in snapshot.entities}
+            self.tables_dirty = True
+            return None
+        self.base_dir = out_dir_name
+        return out_dir_name
+
+    def reset(self, base_dir: str = None):
+        """The project has been created, opened, saved or recovered: unchanged entities are now copied from
+        base_dir (None for a new project), changes recorded so far are dropped, and previous snapshots of this
+        session and of sessions that are no longer alive are removed, except base_dir if it is a snapshot.
+        """
+        self.collect(wait=True)
+        self.base_dir = base_dir
+        self._mtimes = {
+            uid: vtk_obj.GetMTime()
+            for uid, _, vtk_obj in revision_entities(self.project)
+        }
+        self._dirty = set()
+        self.tables_dirty = False
+        self.volume = 0
+        self._last_save_time = monotonic()
+        keep = [base_dir] if base_dir else []
+        if self.session_dir is not None:
+            remove_snapshots(session_dir=self.session_dir, keep=keep)
+        remove_sessions(autosave_dir=self.autosave_dir, keep=keep)
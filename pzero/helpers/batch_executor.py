@@ -0,0 +1,51 @@
+"""batch_executor.py
+PZero© Andrea Bistacchi"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from os import cpu_count
+
+from time import perf_counter
+
+"""Parallel execution of per-entity processing pipelines. VTK filters release the GIL while running, so pipelines
+that process different entities run in parallel on a thread pool. Pipelines must not use Qt objects or collections:
+each one receives its own input and returns new objects, that are collected in input order on the calling thread,
+where they can be added to a collection in a single batch."""
+
+
+def batch_workers(n_tasks=None):
+    """Number of worker threads used for n_tasks tasks, limited by the number of CPUs."""
+    return max(1, min(int(n_tasks), cpu_count() or 1))
+
+
+def run_batch(pipeline=None, inputs=None, workers=None):
+    """Run pipeline(item) for each (key, item) pair in inputs, on a pool of worker threads.
+
+    Returns a list of dictionaries, one for each input and in the same order, with "key", "output",
+    "elapsed" (seconds spent in the pipeline) and "error" (the exception raised by the pipeline, or None).
+    An exception raised for one entity does not stop the others."""
+    inputs = list(inputs)
+
+    def timed_pipeline(key, item):
+        start = perf_counter()
+        try:
+            output = pipeline(item)
+            error = None
+        except Exception as exception:
+            output = None
+            error = exception
+        return {
+            "key": key,
+            "output": output,
+            "elapsed": perf_counter() - start,
+            "error": error,
+        }
+
+    if workers is None:
+        workers = batch_workers(len(inputs))
+    if workers <= 1 or len(inputs) <= 1:
+        return [timed_pipeline(key, item) for key, item in inputs]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(timed_pipeline, key, item) for key, item in inputs]
+        # Results are collected on the calling thread, in input order.
+        return [future.result() for future in futures]
@@ -0,0 +1,167 @@
+"""dem_projection.py
+PZero© Andrea Bistacchi"""
+
+from numpy import argsort as np_argsort
+from numpy import asarray as np_asarray
+from numpy import clip as np_clip
+from numpy import concatenate as np_concatenate
+from numpy import cumsum as np_cumsum
+from numpy import diff as np_diff
+from numpy import empty as np_empty
+from numpy import float64 as np_float64
+from numpy import floor as np_floor
+from numpy import isnan as np_isnan
+from numpy import nonzero as np_nonzero
+from numpy import rint as np_rint
+from numpy import split as np_split
+from numpy import zeros as np_zeros
+
+from vtkmodules.util.numpy_support import numpy_to_vtk, vtk_to_numpy
+from vtkmodules.vtkCommonCore import vtkPoints
+from vtkmodules.vtkCommonDataModel import vtkPolyData
+from vtkmodules.vtkFiltersPoints import vtkPointInterpolator2D, vtkVoronoiKernel
+
+"""Vertical projection of points (vertices of lines, point sets, attitudes) onto DEMs. DEMs imported from rasters
+are vtkStructuredGrids with nodes on a regular grid, so the elevation below a point is sampled directly by grid
+index with bilinear interpolation, instead of searching the nodes as scattered data. Points are processed by raster
+tile, so each pass gathers values from a compact window of the elevation array, and the elevation array is a view
+on the VTK array, never copied. Points of all the entities to be projected are sampled together, and the results
+split back by entity. DEMs whose nodes are not on a regular grid (e.g. warped or resampled) use the Voronoi kernel
+of vtkPointInterpolator2D on all the points in a single call, as formerly done for each entity."""
+
+# Relative tolerance on node spacing for a DEM to be treated as a regular grid.
+GRID_TOLERANCE = 1e-6
+
+# Size, in raster cells, of the square tiles used to group points.
+TILE_SIZE = 512
+
+
+def _elevation_array(dem=None):
+    """Elevation of DEM nodes, from the "elevation" property if present, otherwise from Z."""
+    if dem.GetPointData().GetArray("elevation") is not None:
+        return vtk_to_numpy(dem.GetPointData().GetArray("elevation")).reshape(-1)
+    return vtk_to_numpy(dem.GetPoints().GetData())[:, 2]
+
+
+def regular_grid(dem=None, tolerance: float = GRID_TOLERANCE):
+    """Describe a DEM whose nodes lie on a regular grid aligned with X and Y. Returns a dictionary with the
+    coordinates of the first node "x0" and "y0", the node spacings "dx" and "dy" (negative for rasters stored
+    north to south) and the elevations "z" as a (ny, nx) view on the VTK array, or None for other DEMs.
+    """
+    dims = dem.GetDimensions()
+    if dims[2] != 1 or dims[0] < 2 or dims[1] < 2 or dem.GetPoints() is None:
+        return None
+    points = vtk_to_numpy(dem.GetPoints().GetData()).reshape(dims[1], dims[0], 3)
+    elevation = _elevation_array(dem).reshape(dims[1], dims[0])
+    # Nodes are stored with the first dimension varying fastest, that can follow either X or Y.
+    for grid_points, grid_z in [
+        (points, elevation),
+        (points.transpose(1, 0, 2), elevation.T),
+    ]:
+        x = grid_points[0, :, 0]
+        y = grid_points[:, 0, 1]
+        dx = (x[-1] - x[0]) / (len(x) - 1)
+        dy = (y[-1] - y[0]) / (len(y) - 1)
+        if dx == 0 or dy == 0:
+            continue
+        if (
+            abs(np_diff(x) - dx).max() > tolerance * abs(dx)
+            or abs(np_diff(y) - dy).max() > tolerance * abs(dy)
+            or abs(grid_points[:, :, 0] - x[None, :]).max() > tolerance * abs(dx)
+            or abs(grid_points[:, :, 1] - y[:, None]).max() > tolerance * abs(dy)
+        ):
+            continue
+        return {"x0": x[0], "y0": y[0], "dx": dx, "dy": dy, "z": grid_z}
+    return None
+
+
+def _sample_window(z=None, fx=None, fy=None, row0: int = 0, col0: int = 0):
+    """Bilinear sampling of z at fractional indices, relative to the window starting at row0, col0. Points
+    whose bilinear value is NaN (next to nodata nodes) get the value of the nearest node, as with the Voronoi
+    kernel."""
+    ny, nx = z.shape
+    ix = np_clip(np_floor(fx).astype(int), 0, nx - 2)
+    iy = np_clip(np_floor(fy).astype(int), 0, ny - 2)
+    tx = fx - ix
+    ty = fy - iy
+    rows = iy - row0
+    cols = ix - col0
+    window = z[row0 : rows.max() + row0 + 2, col0 : cols.max() + col0 + 2]
+    values = (
+        window[rows, cols] * (1.0 - tx) * (1.0 - ty)
+        + window[rows, cols + 1] * tx * (1.0 - ty)
+        + window[rows + 1, cols] * (1.0 - tx) * ty
+        + window[rows + 1, cols + 1] * tx * ty
+    )
+    nans = np_isnan(values)
+    if nans.any():
+        values[nans] = window[
+            np_rint(fy[nans]).astype(int) - row0, np_rint(fx[nans]).astype(int) - col0
+        ]
+    return values
+
+
+def sample_regular_grid(grid=None, xy=None, tile_size: int = TILE_SIZE):
+    """Elevations below the (n, 2) or (n, 3) points xy, from a grid returned by regular_grid(). Points outside
+    the DEM get the elevation of its nearest edge."""
+    ny, nx = grid["z"].shape
+    fx = np_clip((xy[:, 0] - grid["x0"]) / grid["dx"], 0.0, nx - 1.0)
+    fy = np_clip((xy[:, 1] - grid["y0"]) / grid["dy"], 0.0, ny - 1.0)
+    values = np_empty(len(fx), dtype=np_float64)
+    if len(fx) == 0:
+        return values
+    # Group points by tile, so each pass reads a window of at most (tile_size + 1) ** 2 nodes.
+    tile_rows = np_clip(fy.astype(int), 0, ny - 2) // tile_size
+    tile_cols = np_clip(fx.astype(int), 0, nx - 2) // tile_size
+    tile_keys = tile_rows * (nx // tile_size + 1) + tile_cols
+    order = np_argsort(tile_keys, kind="stable")
+    sorted_keys = tile_keys[order]
+    starts = np_concatenate(([0], np_nonzero(np_diff(sorted_keys))[0] + 1))
+    ends = np_concatenate((starts[1:], [len(order)]))
+    for start, end in zip(starts, ends):
+        selected = order[start:end]
+        values[selected] = _sample_window(
+            z=grid["z"],
+            fx=fx[selected],
+            fy=fy[selected],
+            row0=int(tile_rows[selected[0]]) * tile_size,
+            col0=int(tile_cols[selected[0]]) * tile_size,
+        )
+    return values
+
+
+def sample_scattered(dem=None, xy=None):
+    """Elevations below the (n, 3) points xy from any DEM, with the Voronoi kernel of vtkPointInterpolator2D
+    (closest node, also for points outside the DEM)."""
+    vtk_points = vtkPoints()
+    vtk_points.SetData(numpy_to_vtk(np_asarray(xy, dtype=np_float64), deep=True))
+    points = vtkPolyData()
+    points.SetPoints(vtk_points)
+    interpolator = vtkPointInterpolator2D()
+    interpolator.SetInputData(points)
+    interpolator.SetSourceData(dem)
+    interpolator.SetKernel(vtkVoronoiKernel())
+    interpolator.SetNullPointsStrategyToClosestPoint()
+    interpolator.SetZArrayName("elevation")
+    interpolator.Update()
+    return vtk_to_numpy(
+        interpolator.GetOutput().GetPointData().GetArray("elevation")
+    ).astype(np_float64)
+
+
+def project_to_dem(dem=None, points_list: list = None) -> list:
+    """Elevations of the DEM below each array of points in points_list, as a list of 1D arrays in the same
+    order. All points are sampled in a single call, by grid index if the DEM is regular.
+    """
+    lengths = [len(points) for points in points_list]
+    if sum(lengths) == 0:
+        return [np_zeros(0, dtype=np_float64) for _ in lengths]
+    xy = np_concatenate(
+        [np_asarray(points, dtype=np_float64).reshape(-1, 3) for points in points_list]
+    )
+    grid = regular_grid(dem)
+    if grid is not None:
+        elevations = sample_regular_grid(grid=grid, xy=xy)
+    else:
+        elevations = sample_scattered(dem=dem, xy=xy)
+    return np_split(elevations, np_cumsum(lengths)[:-1])
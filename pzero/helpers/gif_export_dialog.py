@@ -5,6 +5,8 @@ High-quality GIF animation export dialog with camera orbit controls,
 animation settings, and quality options for showcasing 3D geomodelling structures.
 """
 
+from functools import partial
+
 import numpy as np
 import tempfile
 import os
@@ -33,6 +35,16 @@ from PySide6.QtWidgets import (
 import pyvista as pv
 
 from ..properties_manager import PropertiesCMaps
+from .tiled_export import (
+    add_shared_actors,
+    colormap_lookup_table,
+    scalar_bar_actors,
+)
+from .animation_writer import (
+    ANIMATION_BACKENDS,
+    build_shared_palette,
+    open_animation_writer,
+)
 
 
 class GifExportDialog(QDialog):
@@ -88,6 +100,22 @@ class GifExportDialog(QDialog):
         "Gradient (Black-Gray)",
     ]
 
+    # Output formats: (name, backend, file filter)
+    FORMAT_OPTIONS = [
+        ("Animated GIF", "gif", "GIF files (*.gif)"),
+        ("Video (MP4)", "video", "MP4 video files (*.mp4)"),
+        ("PNG sequence", "png", "PNG files (*.png)"),
+    ]
+
+    # GIF palette modes: (name, shared)
+    PALETTE_OPTIONS = [
+        ("Per-frame palette", False),
+        ("Shared palette (sampled frames)", True),
+    ]
+
+    # Number of frames rendered in advance to compute a shared GIF palette
+    PALETTE_SAMPLE_FRAMES = 8
+
     # Easing functions for smooth animations
     EASING_OPTIONS = [
         "Linear",
@@ -288,6 +316,16 @@ class GifExportDialog(QDialog):
         group = QGroupBox("Output Settings")
         form = QFormLayout(group)
 
+        # Output format
+        self.format_combo = QComboBox()
+        for name, _, _ in self.FORMAT_OPTIONS:
+            self.format_combo.addItem(name)
+        self.format_combo.setToolTip(
+            "Frames are encoded while they are rendered, so memory use\n"
+            "does not grow with the number of frames."
+        )
+        form.addRow("Format:", self.format_combo)
+
         # Resolution preset
         self.resolution_combo = QComboBox()
         for name, _, _ in self.RESOLUTION_PRESETS:
@@ -403,6 +441,17 @@ class GifExportDialog(QDialog):
         )
         form.addRow("", self.optimize_check)
 
+        # GIF palette mode
+        self.palette_combo = QComboBox()
+        for name, _ in self.PALETTE_OPTIONS:
+            self.palette_combo.addItem(name)
+        self.palette_combo.setToolTip(
+            "Per-frame: each frame gets its own optimized palette.\n"
+            "Shared: a single palette is computed from frames sampled along\n"
+            "the animation, avoiding colour flicker between frames."
+        )
+        form.addRow("GIF Palette:", self.palette_combo)
+
         parent_layout.addWidget(group)
 
     def _create_buttons(self, parent_layout):
@@ -417,7 +466,7 @@ class GifExportDialog(QDialog):
         button_layout.addStretch()
 
         # Export button
-        export_btn = QPushButton("Create GIF")
+        export_btn = QPushButton("Create Animation")
         export_btn.setStyleSheet(
             "background-color: #2E7D32; color: white; "
             "font-weight: bold; padding: 8px 16px;"
@@ -435,6 +484,7 @@ class GifExportDialog(QDialog):
     def _connect_signals(self):
         """Connect widget signals to handlers."""
         self.animation_combo.currentIndexChanged.connect(self._on_animation_changed)
+        self.format_combo.currentIndexChanged.connect(self._on_format_changed)
         self.resolution_combo.currentIndexChanged.connect(self._on_resolution_changed)
         self.duration_spin.valueChanged.connect(self._update_info_label)
         self.fps_spin.valueChanged.connect(self._update_info_label)
@@ -445,6 +495,7 @@ class GifExportDialog(QDialog):
         """Update UI element states based on current selections."""
         self._on_animation_changed(self.animation_combo.currentIndex())
         self._on_resolution_changed(self.resolution_combo.currentIndex())
+        self._on_format_changed(self.format_combo.currentIndex())
 
     def _on_animation_changed(self, index):
         """Handle animation preset selection."""
@@ -462,6 +513,12 @@ class GifExportDialog(QDialog):
         is_oscillate = "oscillate" in anim_type
         # Direction still makes sense for oscillate
 
+    def _on_format_changed(self, index):
+        """Handle output format selection. Palette options apply to GIF only."""
+        _, backend, _ = self.FORMAT_OPTIONS[index]
+        self.palette_combo.setEnabled(backend == "gif")
+        self.optimize_check.setEnabled(backend == "gif")
+
     def _on_resolution_changed(self, index):
         """Handle resolution preset selection."""
         if index < len(self.RESOLUTION_PRESETS) - 1:  # Not "Custom"
@@ -571,110 +628,45 @@ class GifExportDialog(QDialog):
         # Do initial render to ensure everything is set up
         plotter.render()
 
-    def _copy_actors_to_plotter(self, target_plotter, is_dark_bg):
-        """Copy actors from source plotter to target plotter.
+    def _copy_actors_to_plotter(self, target_plotter, is_dark_bg, export_size=None):
+        """Add clones of the visible actors of the source plotter to the target plotter. The clones share data,
+        lookup tables and textures with the source actors (see helpers/tiled_export.py), so nothing is wrapped or
+        coloured again.
 
         Args:
             target_plotter: The plotter to copy actors to
             is_dark_bg: Whether using a dark background
+            export_size: Size of the exported image, if larger than the target plotter window
         """
         if self.plotter is None or not hasattr(self.plotter, "renderer"):
             return
 
-        line_scale = self.line_scale_spin.value()
-        point_scale = self.point_scale_spin.value()
-        resolution_scale = self._get_resolution_scale(target_plotter)
+        if export_size is None:
+            export_size = self._get_plotter_size(target_plotter)
+        resolution_scale = self._get_resolution_scale(export_size)
         selected_cmap = self.colormap_combo.currentText()
         use_custom_cmap = selected_cmap != "(Use Current)"
-        show_scalar_bar = self.show_scalar_bar_check.isChecked()
-
         text_color = "white" if is_dark_bg else "black"
 
         try:
-            for uid, actor in self.plotter.renderer.actors.items():
-                try:
-                    if not hasattr(actor, "GetMapper") or actor.GetMapper() is None:
-                        continue
-
-                    mapper = actor.GetMapper()
-                    if mapper.GetInput() is None:
-                        continue
-
-                    # Wrap the data in PyVista
-                    data = mapper.GetInput()
-                    mesh = pv.wrap(data)
-
-                    # Get actor properties
-                    prop = actor.GetProperty()
-                    color = prop.GetColor() if prop else (1, 1, 1)
-                    opacity = prop.GetOpacity() if prop else 1.0
-                    orig_line_width = prop.GetLineWidth() if prop else 1.0
-                    orig_point_size = prop.GetPointSize() if prop else 5.0
-                    representation = prop.GetRepresentation() if prop else 2
-                    render_points_as_spheres = (
-                        bool(prop.GetRenderPointsAsSpheres()) if prop else False
-                    )
-                    render_lines_as_tubes = (
-                        bool(prop.GetRenderLinesAsTubes()) if prop else False
-                    )
-                    visibility = actor.GetVisibility()
-                    texture = (
-                        actor.GetTexture() if hasattr(actor, "GetTexture") else None
-                    )
-
-                    if not visibility:
-                        continue
-
-                    # Scale line width and point size
-                    scaled_line_width = max(
-                        orig_line_width * line_scale * resolution_scale, 1.0
-                    )
-                    scaled_point_size = max(
-                        orig_point_size * point_scale * resolution_scale, 3.0
-                    )
-
-                    # Determine style
-                    style = "surface"
-                    if representation == 0:
-                        style = "points"
-                    elif representation == 1:
-                        style = "wireframe"
-
-                    scalars, cmap, rgb, clim = self._get_actor_scalar_rendering(
-                        actor_uid=uid,
-                        mapper=mapper,
-                        mesh=mesh,
-                        use_custom_cmap=use_custom_cmap,
-                        selected_cmap=selected_cmap,
-                    )
-
-                    # Add mesh to target plotter
-                    target_plotter.add_mesh(
-                        mesh,
-                        color=color if scalars is None and texture is None else None,
-                        scalars=scalars,
-                        cmap=cmap,
-                        rgb=rgb,
-                        clim=clim,
-                        texture=texture,
-                        opacity=opacity,
-                        style=style,
-                        line_width=scaled_line_width,
-                        point_size=scaled_point_size,
-                        render_points_as_spheres=render_points_as_spheres,
-                        render_lines_as_tubes=render_lines_as_tubes,
-                        show_scalar_bar=show_scalar_bar and scalars is not None,
-                        scalar_bar_args=(
-                            {
-                                "color": text_color,
-                            }
-                            if show_scalar_bar
-                            else None
-                        ),
-                    )
-                except Exception:
-                    # Skip actors that can't be copied
-                    continue
+            scalar_clones = add_shared_actors(
+                source_renderer=self.plotter.renderer,
+                target_renderer=target_plotter.renderer,
+                line_width_scale=self.line_scale_spin.value() * resolution_scale,
+                point_size_scale=self.point_scale_spin.value() * resolution_scale,
+                lookup_table_factory=(
+                    partial(colormap_lookup_table, selected_cmap)
+                    if use_custom_cmap
+                    else None
+                ),
+            )
+            if self.show_scalar_bar_check.isChecked():
+                for bar in scalar_bar_actors(
+                    clones=scalar_clones,
+                    color=pv.Color(text_color).float_rgb,
+                    font_size=16,
+                ):
+                    target_plotter.renderer.AddActor2D(bar)
         except Exception:
             pass
 
@@ -691,10 +683,10 @@ class GifExportDialog(QDialog):
             pass
         return None, None
 
-    def _get_resolution_scale(self, target_plotter):
+    def _get_resolution_scale(self, export_size):
         """Scale widths/sizes so exports match on-screen legend proportions."""
         src_w, src_h = self._get_plotter_size(self.plotter)
-        dst_w, dst_h = self._get_plotter_size(target_plotter)
+        dst_w, dst_h = export_size
         if (
             src_w is None
             or src_h is None
@@ -708,110 +700,6 @@ class GifExportDialog(QDialog):
         scale_y = dst_h / src_h
         return max((scale_x + scale_y) * 0.5, 0.1)
 
-    @staticmethod
-    def _normalize_property_name(prop_name):
-        if prop_name is None:
-            return None
-        if isinstance(prop_name, str):
-            prop_name = prop_name.strip()
-            return None if prop_name.lower() == "none" or prop_name == "" else prop_name
-        try:
-            if np.isnan(prop_name):
-                return None
-        except Exception:
-            pass
-        return prop_name
-
-    def _get_shown_property_for_actor(self, actor_uid):
-        if self.parent_view is None or not hasattr(self.parent_view, "actors_df"):
-            return None
-        try:
-            shown = self.parent_view.actors_df.loc[
-                self.parent_view.actors_df["uid"] == actor_uid, "show_property"
-            ]
-            if len(shown) == 0:
-                return None
-            return self._normalize_property_name(shown.values[0])
-        except Exception:
-            return None
-
-    def _get_property_cmap(self, property_name):
-        property_name = self._normalize_property_name(property_name)
-        if property_name is None:
-            return None
-
-        project_window = getattr(self.parent_view, "parent", None)
-        if project_window is None or not hasattr(project_window, "prop_legend_df"):
-            return None
-        try:
-            cmap_row = project_window.prop_legend_df.loc[
-                project_window.prop_legend_df["property_name"] == property_name,
-                "colormap",
-            ]
-            if len(cmap_row) == 0:
-                return None
-            cmap = cmap_row.values[0]
-            if isinstance(cmap, str) and cmap.strip():
-                return cmap
-        except Exception:
-            return None
-        return None
-
-    def _get_actor_scalar_rendering(
-        self, actor_uid, mapper, mesh, use_custom_cmap, selected_cmap
-    ):
-        """Resolve scalar/rgb/cmap settings from the source actor mapper."""
-        if mapper is None or not mapper.GetScalarVisibility():
-            return None, None, False, None
-
-        scalars = mapper.GetArrayName()
-        if scalars and scalars not in mesh.array_names:
-            scalars = None
-        if scalars is None:
-            scalars = mesh.active_scalars_name
-        if scalars is None:
-            return None, None, False, None
-
-        rgb = False
-        try:
-            color_mode = mapper.GetColorModeAsString().lower()
-            rgb = "direct" in color_mode
-        except Exception:
-            rgb = False
-
-        if not rgb:
-            try:
-                scalar_values = mesh[scalars]
-                if (
-                    hasattr(scalar_values, "shape")
-                    and len(scalar_values.shape) > 1
-                    and scalar_values.shape[-1] in (3, 4)
-                ):
-                    rgb = True
-            except Exception:
-                pass
-
-        cmap = None
-        if not rgb:
-            if use_custom_cmap:
-                cmap = selected_cmap
-            else:
-                shown_property = self._get_shown_property_for_actor(actor_uid)
-                cmap = self._get_property_cmap(shown_property)
-                if cmap is None:
-                    cmap = self._get_property_cmap(scalars)
-
-        clim = None
-        if not rgb:
-            try:
-                scalar_range = mapper.GetScalarRange()
-                if scalar_range and len(scalar_range) == 2:
-                    clim = scalar_range
-            except Exception:
-                pass
-
-        return scalars, cmap, rgb, clim
-
     def _apply_easing(self, t, easing_type):
         """Apply easing function to normalized time value.
 
@@ -1130,25 +1018,36 @@ class GifExportDialog(QDialog):
             )
 
     def _export_gif(self):
-        """Export the animated GIF."""
+        """Export the animation. Frames are streamed to the selected writer as soon as they are
+        rendered, so no frame is kept in memory after it has been encoded."""
+        _, backend, file_filter = self.FORMAT_OPTIONS[self.format_combo.currentIndex()]
+        extension = ANIMATION_BACKENDS[backend]
+
         # Default filename
-        default_name = f"pzero_{self.view_name.lower().replace(' ', '_')}_animation.gif"
+        default_name = (
+            f"pzero_{self.view_name.lower().replace(' ', '_')}_animation{extension}"
+        )
 
         # Ask for save location
         file_path, _ = QFileDialog.getSaveFileName(
             self,
-            "Export Animated GIF",
+            "Export Animation",
             default_name,
-            "GIF files (*.gif);;All files (*.*)",
+            f"{file_filter};;All files (*.*)",
         )
 
         if not file_path:
             return
 
-        # Ensure .gif extension
-        if not file_path.lower().endswith(".gif"):
-            file_path += ".gif"
+        # Ensure correct extension
+        if not file_path.lower().endswith(extension):
+            file_path += extension
 
+        # Set before the try block, so that a failure can release whatever was opened.
+        progress = None
+        writer = None
+        export_plotter = None
+        finished = False
         try:
             # Get settings
             width = self.width_spin.value()
@@ -1159,7 +1058,7 @@ class GifExportDialog(QDialog):
 
             # Create progress dialog
             progress = QProgressDialog(
-                "Creating animated GIF...", "Cancel", 0, num_frames + 2, self
+                "Creating animation...", "Cancel", 0, num_frames + 2, self
             )
             progress.setWindowTitle("Exporting Animation")
             progress.setWindowModality(Qt.WindowModal)
@@ -1184,11 +1083,39 @@ class GifExportDialog(QDialog):
             # Generate camera path
             camera_positions = self._generate_camera_path(export_plotter, num_frames)
 
-            # Collect frames
-            frames = []
+            # Shared GIF palette, computed from a few frames sampled along the camera path.
+            palette = None
+            if (
+                backend == "gif"
+                and self.PALETTE_OPTIONS[self.palette_combo.currentIndex()][1]
+            ):
+                progress.setLabelText("Computing shared palette...")
+                sample_ids = np.unique(
+                    np.linspace(
+                        0,
+                        len(camera_positions) - 1,
+                        min(self.PALETTE_SAMPLE_FRAMES, len(camera_positions)),
+                    ).astype(int)
+                )
+                sample_frames = []
+                for i in sample_ids:
+                    export_plotter.camera_position = camera_positions[i]
+                    export_plotter.render()
+                    sample_frames.append(export_plotter.screenshot(return_img=True))
+                palette = build_shared_palette(sample_frames)
+                del sample_frames
+
+            writer = open_animation_writer(
+                file_path=file_path,
+                fps=fps,
+                backend=backend,
+                palette=palette,
+                optimize=self.optimize_check.isChecked(),
+            )
 
             for i, cam_pos in enumerate(camera_positions):
                 if progress.wasCanceled():
+                    writer.abort()
                     export_plotter.close()
                     return
 
@@ -1203,76 +1130,65 @@ class GifExportDialog(QDialog):
                 # Force render update - this is critical!
                 export_plotter.render()
 
-                # Capture frame
-                frame = export_plotter.screenshot(return_img=True)
-                frames.append(frame)
+                # Capture frame and pass it to the writer, that encodes it in the background
+                writer.add_frame(export_plotter.screenshot(return_img=True))
 
             export_plotter.close()
 
-            progress.setLabelText("Assembling GIF...")
+            progress.setLabelText("Finalizing animation...")
             progress.setValue(num_frames)
-
-            # Try to use imageio for GIF creation
-            try:
-                import imageio.v3 as iio
-
-                # Calculate frame duration in milliseconds
-                frame_duration = int(1000 / fps)
-
-                # Write GIF
-                iio.imwrite(
-                    file_path,
-                    frames,
-                    duration=frame_duration,
-                    loop=0,  # Infinite loop
-                )
-
-            except ImportError:
-                # Fallback to PIL/Pillow
-                try:
-                    from PIL import Image
-
-                    # Convert frames to PIL Images
-                    pil_frames = [Image.fromarray(f) for f in frames]
-
-                    # Calculate frame duration in milliseconds
-                    frame_duration = int(1000 / fps)
-
-                    # Save as GIF
-                    pil_frames[0].save(
-                        file_path,
-                        save_all=True,
-                        append_images=pil_frames[1:],
-                        duration=frame_duration,
-                        loop=0,
-                        optimize=self.optimize_check.isChecked(),
-                    )
-
-                except ImportError:
-                    raise ImportError(
-                        "Neither 'imageio' nor 'Pillow' is installed.\n"
-                        "Please install one of them: pip install imageio pillow"
-                    )
+            writer.close()
+            finished = True
+            frames_written = writer.frames_written
 
             progress.setValue(num_frames + 2)
             progress.close()
 
-            # Calculate file size
-            file_size_mb = os.path.getsize(file_path) / (1024 * 1024)
+            # Calculate file size. The PNG backend writes one numbered file per frame instead of file_path.
+            if backend == "png":
+                file_size_mb = sum(
+                    os.path.getsize(path) for path in writer.file_paths
+                ) / (1024 * 1024)
+                output_text = (
+                    f"{len(writer.file_paths)} PNG files exported to:\n"
+                    f"{os.path.dirname(os.path.abspath(writer.file_paths[0]))}\n"
+                    f"({os.path.basename(writer.file_paths[0])} to "
+                    f"{os.path.basename(writer.file_paths[-1])})"
+                    if writer.file_paths
+                    else "No PNG files exported."
+                )
+            else:
+                file_size_mb = os.path.getsize(file_path) / (1024 * 1024)
+                output_text = f"Animation exported to:\n{file_path}"
 
             QMessageBox.information(
                 self,
                 "Export Successful",
-                f"Animation exported to:\n{file_path}\n\n"
+                f"{output_text}\n\n"
                 f"Resolution: {width} × {height} pixels\n"
-                f"Frames: {len(frames)}\n"
-                f"Duration: {len(frames) / fps:.1f} seconds\n"
+                f"Frames: {frames_written}\n"
+                f"Duration: {frames_written / fps:.1f} seconds\n"
                 f"File size: {file_size_mb:.2f} MB",
             )
 
             self.accept()
 
         except Exception as e:
+            # Stop the encoder threads and close the output and the off-screen plotter, then remove the
+            # partial output of an animation that was not finished.
+            if writer is not None:
+                try:
+                    writer.abort()
+                except Exception:
+                    pass
+                if not finished:
+                    for path in getattr(writer, "file_paths", [file_path]):
+                        if os.path.isfile(path):
+                            os.remove(path)
+            if export_plotter is not None:
+                export_plotter.close()
+            if progress is not None:
+                progress.close()
             QMessageBox.critical(
                 self, "Export Failed", f"Failed to export animation:\n{str(e)}"
             )
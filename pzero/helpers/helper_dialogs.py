@@ -137,13 +137,24 @@ def open_files_dialog(parent=None, caption=None, filter=None):
     return in_file_name[0]
 
 
-def save_file_dialog(parent=None, caption=None, filter=None, directory=False):
+def save_file_dialog(
+    parent=None, caption=None, filter=None, directory=False, selected_filter=None
+):
     """Open a dialog and input a file or folder name.
-    If the dialog is closed without a valid file name, it returns None."""
+    If the dialog is closed without a valid file name, it returns None.
+    If selected_filter is given, it is selected at first, and the file name is returned
+    together with the filter selected by the user."""
     if directory:
         out_file_name = [
             QFileDialog.getExistingDirectory(parent=parent, caption=caption)
         ]
+    elif selected_filter is not None:
+        return QFileDialog.getSaveFileName(
+            parent=parent,
+            caption=caption,
+            filter=filter,
+            selectedFilter=selected_filter,
+        )
     else:
         out_file_name = QFileDialog.getSaveFileName(
             parent=parent, caption=caption, filter=filter
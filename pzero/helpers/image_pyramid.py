@@ -0,0 +1,84 @@
+"""image_pyramid.py
+PZero© Andrea Bistacchi"""
+
+from numpy import ceil as np_ceil
+from numpy import empty as np_empty
+from numpy import floor as np_floor
+from numpy import log2 as np_log2
+from numpy import pad as np_pad
+from numpy import result_type as np_result_type
+
+from rasterio.windows import Window as rio_Window
+
+"""Windowed reading of raster bands and multi-resolution pyramids for images. Bands are read by GDAL
+directly into a single C-contiguous, pixel-interleaved buffer (rows x columns x components), one window
+of rows at a time, so no per-band arrays, stacking or reordering copies are needed and the buffer can be
+wrapped by a VTK array without copying. Pyramid levels halve the resolution at each step with 2 x 2 block
+averages, and views texture the level that matches the current zoom."""
+
+# Target size in bytes of each window read by GDAL.
+WINDOW_BYTES = 2**24
+
+# Pyramids stop at the first level with both sides not larger than this, in pixels.
+PYRAMID_MIN_SIZE = 256
+
+
+def read_bands(rio_image=None, indexes=None):
+    """Read the bands listed in indexes (1-based, as in rasterio) from an open rasterio dataset into a
+    C-contiguous array with shape (rows, columns) for a single band or (rows, columns, bands) otherwise.
+    Data are read in windows of full rows, aligned to the dataset blocks, straight into the output array.
+    """
+    rows = rio_image.height
+    columns = rio_image.width
+    dtype = rio_image.dtypes[indexes[0] - 1]
+    out = np_empty((rows, columns, len(indexes)), dtype=dtype)
+    block_rows = rio_image.block_shapes[0][0]
+    row_bytes = max(columns * len(indexes) * out.itemsize, 1)
+    window_rows = max(block_rows, WINDOW_BYTES // row_bytes // block_rows * block_rows)
+    for row in range(0, rows, window_rows):
+        n_rows = min(window_rows, rows - row)
+        # GDAL writes into the strided (bands, rows, columns) view of the pixel-interleaved buffer.
+        rio_image.read(
+            indexes=indexes,
+            out=out[row : row + n_rows].transpose(2, 0, 1),
+            window=rio_Window(0, row, columns, n_rows),
+        )
+    if len(indexes) == 1:
+        return out.reshape(rows, columns)
+    return out
+
+
+def downsample(image_array=None):
+    """Halve the resolution of a (rows, columns) or (rows, columns, components) array with 2 x 2 block
+    averages. Odd sizes are padded by repeating the last row or column. Integer types are rounded and kept.
+    """
+    rows, columns = image_array.shape[:2]
+    pad = [(0, rows % 2), (0, columns % 2)] + [(0, 0)] * (image_array.ndim - 2)
+    if rows % 2 or columns % 2:
+        image_array = np_pad(image_array, pad, mode="edge")
+    blocks = image_array.reshape(
+        (image_array.shape[0] // 2, 2, image_array.shape[1] // 2, 2)
+        + image_array.shape[2:]
+    )
+    mean = blocks.mean(axis=(1, 3), dtype=np_result_type(image_array.dtype, 1.0))
+    if image_array.dtype.kind in "iub":
+        mean = mean.round()
+    return mean.astype(image_array.dtype)
+
+
+def pyramid_levels_n(columns=None, rows=None, min_size=PYRAMID_MIN_SIZE):
+    """Number of pyramid levels, including full resolution, for an image with this size in pixels."""
+    largest = max(columns, rows, 1)
+    if largest <= min_size:
+        return 1
+    return int(np_ceil(np_log2(largest / min_size))) + 1
+
+
+def level_for_pixels(image_pixels=None, screen_pixels=None, levels_n=None):
+    """Coarsest pyramid level that still has at least one image pixel for each screen pixel, given the size
+    of the image in pixels and its size on screen in pixels, measured along the same side.
+    """
+    if not screen_pixels or screen_pixels <= 0 or screen_pixels >= image_pixels:
+        return 0
+    level = int(np_floor(np_log2(image_pixels / screen_pixels)))
+    return min(max(level, 0), levels_n - 1)
@@ -0,0 +1,202 @@
+"""line_batch.py
+PZero© Andrea Bistacchi"""
+
+from numpy import arange as np_arange
+from numpy import asarray as np_asarray
+from numpy import bincount as np_bincount
+from numpy import ceil as np_ceil
+from numpy import clip as np_clip
+from numpy import concatenate as np_concatenate
+from numpy import cumsum as np_cumsum
+from numpy import diff as np_diff
+from numpy import empty as np_empty
+from numpy import floor as np_floor
+from numpy import int64 as np_int64
+from numpy import log2 as np_log2
+from numpy import repeat as np_repeat
+from numpy import searchsorted as np_searchsorted
+from numpy import split as np_split
+from numpy import where as np_where
+from numpy import zeros as np_zeros
+from numpy.linalg import norm as np_norm
+
+from shapely import get_coordinates as shp_get_coordinates
+from shapely import linestrings as shp_linestrings
+from shapely import simplify as shp_simplify
+
+"""Batch resampling and simplification of many lines at once. Lines are packed in a single flat array of
+2D coordinates (map XY or cross-section UV) with offsets, as in VTK 9 cell arrays: line i has coordinates
+flat_uv[offsets[i]:offsets[i + 1]]. All functions work on the whole packed array with vectorized Numpy
+operations and return packed results, so the cost does not depend on the number of lines."""
+
+
+def pack_lines(lines_uv=None):
+    """Pack a list of n x 2 coordinate arrays in a flat array with offsets."""
+    lengths = [len(line_uv) for line_uv in lines_uv]
+    offsets = np_concatenate([[0], np_cumsum(lengths)]).astype(np_int64)
+    if offsets[-1] == 0:
+        return np_empty((0, 2)), offsets
+    flat_uv = np_concatenate(
+        [np_asarray(line_uv, dtype=float).reshape(-1, 2) for line_uv in lines_uv]
+    )
+    return flat_uv, offsets
+
+
+def unpack_lines(flat_uv=None, offsets=None):
+    """Split a flat coordinate array into a list of n x 2 arrays, one for each line."""
+    return np_split(flat_uv, offsets[1:-1])
+
+
+def _lengths(flat_uv=None, offsets=None):
+    """Segment lengths (zero across lines), cumulative length at each point measured from the first point
+    of all lines, and length of each line."""
+    seg_length = np_zeros(len(flat_uv))
+    if len(flat_uv) > 1:
+        seg_length[:-1] = np_norm(np_diff(flat_uv, axis=0), axis=1)
+    # The "segment" from the last point of a line to the first point of the next one has zero length.
+    seg_length[offsets[1:] - 1] = 0.0
+    cum_length = np_concatenate([[0.0], np_cumsum(seg_length)[:-1]])
+    line_length = np_zeros(len(offsets) - 1)
+    not_empty = offsets[1:] > offsets[:-1]
+    line_length[not_empty] = (
+        cum_length[offsets[1:][not_empty] - 1] - cum_length[offsets[:-1][not_empty]]
+    )
+    return seg_length, cum_length, line_length
+
+
+def _interpolate(flat_uv=None, offsets=None, line_ids=None, distances=None):
+    """Points at the given distances along the given lines, as with Shapely interpolate, for all lines at once."""
+    seg_length, cum_length, _ = _lengths(flat_uv, offsets)
+    global_distance = cum_length[offsets[line_ids]] + distances
+    point_ids = np_searchsorted(cum_length, global_distance, side="right") - 1
+    # Keep the segment inside its line, also for points at the end of the line.
+    point_ids = np_clip(point_ids, offsets[line_ids], offsets[line_ids + 1] - 2)
+    length = seg_length[point_ids]
+    t = np_where(
+        length > 0,
+        (global_distance - cum_length[point_ids]) / np_where(length > 0, length, 1.0),
+        0.0,
+    )
+    t = np_clip(t, 0.0, 1.0)
+    return flat_uv[point_ids] + t[:, None] * (
+        flat_uv[point_ids + 1] - flat_uv[point_ids]
+    )
+
+
+def _resample(flat_uv=None, offsets=None, counts=None, spacing=None, end_point=True):
+    """Resample each line with counts[i] points at distance spacing[i] from the first point, optionally
+    adding the last point of the line, and return packed results."""
+    line_ids = np_repeat(np_arange(len(counts)), counts)
+    first_sample = np_concatenate([[0], np_cumsum(counts)[:-1]])
+    sample_ids = np_arange(counts.sum()) - np_repeat(first_sample, counts)
+    samples = _interpolate(
+        flat_uv=flat_uv,
+        offsets=offsets,
+        line_ids=line_ids,
+        distances=sample_ids * np_repeat(spacing, counts),
+    )
+    if not end_point:
+        return samples, np_concatenate([[0], np_cumsum(counts)]).astype(np_int64)
+    # Insert the last point of each line after its samples.
+    out_counts = counts + 1
+    out_offsets = np_concatenate([[0], np_cumsum(out_counts)]).astype(np_int64)
+    out_uv = np_empty((out_offsets[-1], 2))
+    is_end = np_zeros(out_offsets[-1], dtype=bool)
+    is_end[out_offsets[1:] - 1] = True
+    out_uv[~is_end] = samples
+    out_uv[is_end] = flat_uv[offsets[1:] - 1]
+    return out_uv, out_offsets
+
+
+def _valid_lines(offsets=None, line_length=None):
+    """Lines with at least two points and length > 0. Other lines are returned unchanged."""
+    return (np_diff(offsets) >= 2) & (line_length > 0)
+
+
+def _select_lines(flat_uv=None, offsets=None, selected=None):
+    """Pack only the lines where selected is True."""
+    counts = np_diff(offsets)
+    out_offsets = np_concatenate([[0], np_cumsum(counts[selected])]).astype(np_int64)
+    return flat_uv[np_repeat(selected, counts)], out_offsets
+
+
+def _replace_lines(
+    flat_uv=None, offsets=None, selected=None, new_uv=None, new_offsets=None
+):
+    """Replace the lines where selected is True with the packed new lines, keeping the order of lines."""
+    counts = np_diff(offsets)
+    out_counts = counts.copy()
+    out_counts[selected] = np_diff(new_offsets)
+    out_offsets = np_concatenate([[0], np_cumsum(out_counts)]).astype(np_int64)
+    out_uv = np_empty((out_offsets[-1], 2))
+    is_new = np_repeat(selected, out_counts)
+    out_uv[is_new] = new_uv
+    out_uv[~is_new] = flat_uv[~np_repeat(selected, counts)]
+    return out_uv, out_offsets
+
+
+def resample_by_distance(flat_uv=None, offsets=None, distance=None):
+    """Resample all lines with constant spacing, starting from the first point and always keeping the last one.
+    Where spacing is not smaller than the line length, it is halved until it is, for that line only.
+    Returns packed resampled coordinates, offsets and the spacing used for each line."""
+    flat_uv = np_asarray(flat_uv, dtype=float)
+    offsets = np_asarray(offsets, dtype=np_int64)
+    _, _, line_length = _lengths(flat_uv, offsets)
+    valid = _valid_lines(offsets, line_length)
+    spacing = np_zeros(len(line_length)) + distance
+    length = line_length[valid]
+    halvings = np_where(distance >= length, np_floor(np_log2(distance / length)) + 1, 0)
+    spacing[valid] = distance / 2.0**halvings
+    # Correct rounding errors in log2, so that spacing < length as with repeated halving.
+    too_long = valid & (spacing >= line_length)
+    while too_long.any():
+        spacing[too_long] /= 2.0
+        too_long = valid & (spacing >= line_length)
+    sub_uv, sub_offsets = _select_lines(flat_uv, offsets, valid)
+    new_uv, new_offsets = _resample(
+        flat_uv=sub_uv,
+        offsets=sub_offsets,
+        counts=np_ceil(length / spacing[valid]).astype(np_int64),
+        spacing=spacing[valid],
+    )
+    out_uv, out_offsets = _replace_lines(flat_uv, offsets, valid, new_uv, new_offsets)
+    return out_uv, out_offsets, spacing
+
+
+def resample_by_number(flat_uv=None, offsets=None, number_of_points=None):
+    """Resample all lines with number_of_points evenly spaced points, including the first and last one.
+    Returns packed resampled coordinates and offsets."""
+    flat_uv = np_asarray(flat_uv, dtype=float)
+    offsets = np_asarray(offsets, dtype=np_int64)
+    _, _, line_length = _lengths(flat_uv, offsets)
+    valid = _valid_lines(offsets, line_length)
+    sub_uv, sub_offsets = _select_lines(flat_uv, offsets, valid)
+    new_uv, new_offsets = _resample(
+        flat_uv=sub_uv,
+        offsets=sub_offsets,
+        counts=np_zeros(valid.sum(), dtype=np_int64) + number_of_points - 1,
+        spacing=line_length[valid] / (number_of_points - 1),
+    )
+    return _replace_lines(flat_uv, offsets, valid, new_uv, new_offsets)
+
+
+def simplify_lines(flat_uv=None, offsets=None, tolerance=None):
+    """Douglas-Peucker simplification of all lines at once, with the vectorized Shapely functions that build,
+    simplify and read back all geometries in single calls. Lines with less than two points are returned
+    unchanged. Returns packed simplified coordinates and offsets."""
+    flat_uv = np_asarray(flat_uv, dtype=float)
+    offsets = np_asarray(offsets, dtype=np_int64)
+    counts = np_diff(offsets)
+    valid = counts >= 2
+    if not valid.any():
+        return flat_uv, offsets
+    sub_uv, sub_offsets = _select_lines(flat_uv, offsets, valid)
+    lines = shp_linestrings(
+        sub_uv, indices=np_repeat(np_arange(valid.sum()), np_diff(sub_offsets))
+    )
+    new_uv, line_ids = shp_get_coordinates(
+        shp_simplify(lines, tolerance, preserve_topology=False), return_index=True
+    )
+    new_counts = np_bincount(line_ids, minlength=valid.sum())
+    new_offsets = np_concatenate([[0], np_cumsum(new_counts)]).astype(np_int64)
+    return _replace_lines(flat_uv, offsets, valid, new_uv, new_offsets)
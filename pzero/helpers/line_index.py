@@ -0,0 +1,98 @@
+"""line_index.py
+PZero© Andrea Bistacchi"""
+
+from numpy import array as np_array
+from numpy import asarray as np_asarray
+from numpy import empty as np_empty
+from numpy import lexsort as np_lexsort
+from numpy import union1d as np_union1d
+
+from shapely import STRtree as shp_STRtree
+from shapely import bounds as shp_bounds
+from shapely import intersection as shp_intersection
+from shapely import intersects as shp_intersects
+from shapely.geometry import LineString as shp_linestring
+
+"""Spatial index over the 2D (map XY or cross-section UV) coordinates of a set of lines, built once per
+operation and shared by the 2D line tools (snap, split, extension and node insertion). Candidates are found
+with an STRtree on the line envelopes and then checked with vectorized Shapely predicates, so the cost
+scales with the number of actual intersections instead of the number of pairs of lines."""
+
+
+class LineIndex:
+    """STRtree index of lines identified by uid, with line coordinates that can be updated while a tool is
+    running. The tree itself is static (Shapely STRtree cannot be modified), so lines whose envelope grows
+    beyond the indexed one are always included in the candidates, while exact checks are made on the current
+    geometries."""
+
+    def __init__(self, line_uv=None):
+        """line_uv is a dictionary with uid as key and a n x 2 Numpy array of coordinates as value."""
+        self.uids = list(line_uv.keys())
+        self._positions = {uid: i for i, uid in enumerate(self.uids)}
+        self.geometries = np_empty(len(self.uids), dtype=object)
+        self.geometries[:] = [shp_linestring(line_uv[uid]) for uid in self.uids]
+        self._tree = shp_STRtree(self.geometries)
+        self._tree_bounds = shp_bounds(self.geometries)
+        self._grown = set()
+
+    def geometry(self, uid=None):
+        """Current Shapely geometry of the line with this uid."""
+        return self.geometries[self._positions[uid]]
+
+    def update(self, uid=None, line_coords=None):
+        """Replace the coordinates of the line with this uid."""
+        position = self._positions[uid]
+        self.geometries[position] = shp_linestring(line_coords)
+        new_bounds = self.geometries[position].bounds
+        old_bounds = self._tree_bounds[position]
+        if (
+            new_bounds[0] < old_bounds[0]
+            or new_bounds[1] < old_bounds[1]
+            or new_bounds[2] > old_bounds[2]
+            or new_bounds[3] > old_bounds[3]
+        ):
+            self._grown.add(position)
+
+    def _candidate_positions(self, geometry=None, exclude=None):
+        """Sorted positions of lines that can intersect geometry, from the tree and the grown lines."""
+        positions = self._tree.query(geometry)
+        if self._grown:
+            positions = np_union1d(positions, list(self._grown))
+        else:
+            positions.sort()
+        if exclude is not None:
+            positions = positions[positions != self._positions[exclude]]
+        return positions
+
+    def candidates(self, geometry=None, exclude=None):
+        """Uids of the lines that intersect geometry, in the order of the input dictionary.
+        The line with uid = exclude is never returned."""
+        positions = self._candidate_positions(geometry=geometry, exclude=exclude)
+        positions = positions[shp_intersects(geometry, self.geometries[positions])]
+        return [self.uids[position] for position in positions]
+
+    def intersections(self, geometry=None, exclude=None):
+        """List of (uid, intersection geometry) for the lines that intersect geometry, in the order of the
+        input dictionary. Intersections are calculated in a single vectorized call."""
+        positions = self._candidate_positions(geometry=geometry, exclude=exclude)
+        positions = positions[shp_intersects(geometry, self.geometries[positions])]
+        geometries = shp_intersection(geometry, self.geometries[positions])
+        return [
+            (self.uids[position], geom) for position, geom in zip(positions, geometries)
+        ]
+
+    def intersecting_pairs(self):
+        """Pairs (uid_a, uid_b) of lines that intersect, with uid_a before uid_b in the input dictionary,
+        sorted as in a double loop over the input lines. Found with a single bulk query of the tree.
+        """
+        if not self.uids:
+            return []
+        left, right = self._tree.query(self.geometries, predicate="intersects")
+        keep = left < right
+        left = np_asarray(left[keep])
+        right = np_asarray(right[keep])
+        order = np_lexsort((right, left))
+        return [
+            (self.uids[a], self.uids[b])
+            for a, b in np_array([left[order], right[order]]).T
+        ]
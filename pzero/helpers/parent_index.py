@@ -0,0 +1,120 @@
+"""parent_index.py
+PZero© Andrea Bistacchi"""
+
+"""Index of parent/child relationships across collections, from the parent_uid column: entities belonging to a
+cross-section (including the cross-section itself, that is its own parent), markers and annotations belonging to a
+well, DOMs and images belonging to a cross-section. Membership queries (cross-section views, fitting sections to
+their entities, merging) are dictionary lookups instead of a scan of every row of every collection.
+The index belongs to the project and is updated incrementally, before views are updated, when entities_added,
+entities_removed and metadata_modified are emitted. A collection whose dataframe has been replaced without
+signals (e.g. when a project is opened) is indexed again at the first query."""
+
+
+def _valid_parent(parent_uid=None):
+    """True for parent uids that can be indexed. Empty strings, None, NaN and lists (as in the well table) mean
+    that the entity has no parent."""
+    return isinstance(parent_uid, str) and parent_uid != ""
+
+
+class ParentIndex:
+    """Children of each parent uid by collection name, and parent of each child uid. Children are stored as
+    dictionary keys, so they are returned in the order they have been indexed."""
+
+    def __init__(self):
+        # parent uid -> {collection name -> {child uid: None}}
+        self._children = {}
+        # child uid -> (collection name, parent uid)
+        self._parents = {}
+        # collection name -> dataframe indexed last, used to detect dataframes replaced without signals
+        self._dfs = {}
+
+    def _add(self, uid=None, coll_name=None, parent_uid=None):
+        if not _valid_parent(parent_uid):
+            return
+        self._children.setdefault(parent_uid, {}).setdefault(coll_name, {})[uid] = None
+        self._parents[uid] = (coll_name, parent_uid)
+
+    def _discard(self, uid=None):
+        entry = self._parents.pop(uid, None)
+        if entry is None:
+            return
+        coll_name, parent_uid = entry
+        by_coll = self._children[parent_uid]
+        by_coll[coll_name].pop(uid, None)
+        if not by_coll[coll_name]:
+            del by_coll[coll_name]
+        if not by_coll:
+            del self._children[parent_uid]
+
+    def _ensure_current(self, collection=None):
+        """Index the collection again if its dataframe has been replaced since it was last indexed."""
+        if self._dfs.get(collection.collection_name) is not collection.df:
+            self.rebuild(collection)
+
+    def rebuild(self, collection=None):
+        """Index all entities of a collection from scratch."""
+        coll_name = collection.collection_name
+        for uid in [
+            uid for uid, entry in self._parents.items() if entry[0] == coll_name
+        ]:
+            self._discard(uid)
+        df = collection.df
+        if "parent_uid" in df.columns:
+            for uid, parent_uid in zip(df["uid"].to_list(), df["parent_uid"].to_list()):
+                self._add(uid=uid, coll_name=coll_name, parent_uid=parent_uid)
+        self._dfs[coll_name] = df
+
+    def update(self, uids=None, collection=None):
+        """Index again entities added to a collection or with modified metadata."""
+        if self._dfs.get(collection.collection_name) is None:
+            # Never indexed, the first query will index the whole collection.
+            return
+        df = collection.df
+        for uid in uids:
+            self._discard(uid)
+        if "parent_uid" in df.columns:
+            rows = df.loc[df["uid"].isin(uids), ["uid", "parent_uid"]]
+            for uid, parent_uid in zip(
+                rows["uid"].to_list(), rows["parent_uid"].to_list()
+            ):
+                self._add(
+                    uid=uid, coll_name=collection.collection_name, parent_uid=parent_uid
+                )
+        self._dfs[collection.collection_name] = df
+
+    def set_parent(self, uid=None, collection=None, parent_uid=None):
+        """Index a new parent for an entity, when parent_uid is set without signals."""
+        self._ensure_current(collection)
+        self._discard(uid)
+        self._add(uid=uid, coll_name=collection.collection_name, parent_uid=parent_uid)
+        self._dfs[collection.collection_name] = collection.df
+
+    def remove(self, uids=None, collection=None):
+        """Remove entities removed from a collection. Their children are kept, as in the dataframes."""
+        for uid in uids:
+            self._discard(uid)
+        if collection is not None and collection.collection_name in self._dfs:
+            self._dfs[collection.collection_name] = collection.df
+
+    def children(self, parent_uid=None, collection=None) -> list:
+        """Uids of the entities of a collection belonging to parent_uid."""
+        self._ensure_current(collection)
+        return list(
+            self._children.get(parent_uid, {}).get(collection.collection_name, {})
+        )
+
+    def all_children(self, parent_uid=None, collections=None) -> dict:
+        """Uids of the entities belonging to parent_uid, in a dictionary by collection name, for the collections
+        with at least one of them."""
+        out_children = {}
+        for collection in collections:
+            uids = self.children(parent_uid=parent_uid, collection=collection)
+            if uids:
+                out_children[collection.collection_name] = uids
+        return out_children
+
+    def parent(self, uid=None, collection=None):
+        """Parent uid of an entity, or None if it has no parent."""
+        self._ensure_current(collection)
+        entry = self._parents.get(uid)
+        return None if entry is None else entry[1]
@@ -0,0 +1,435 @@
+"""project_container.py
+PZero© Andrea Bistacchi"""
+
+from json import dump as json_dump
+from json import load as json_load
+
+from os import path as os_path
+
+from zlib import compress as zlib_compress
+from zlib import decompress as zlib_decompress
+
+from numpy import ascontiguousarray as np_ascontiguousarray
+from numpy import dtype as np_dtype
+from numpy import empty as np_empty
+from numpy import memmap as np_memmap
+from numpy import uint8 as np_uint8
+
+from pandas import DataFrame as pd_DataFrame
+from pandas import Series as pd_Series
+from pandas import read_csv as pd_read_csv
+from pandas import read_json as pd_read_json
+
+from vtkmodules.util.numpy_support import numpy_to_vtk, vtk_to_numpy
+from vtkmodules.vtkCommonCore import vtkDataArray, vtkPoints, vtkStringArray
+from vtkmodules.vtkCommonDataModel import (
+    vtkCellArray,
+    vtkImageData,
+    vtkPolyData,
+    vtkStructuredGrid,
+)
+from vtkmodules.vtkIOXML import (
+    vtkXMLImageDataReader,
+    vtkXMLImageDataWriter,
+    vtkXMLPolyDataReader,
+    vtkXMLPolyDataWriter,
+    vtkXMLStructuredGridReader,
+    vtkXMLStructuredGridWriter,
+)
+
+"""Storage of project revisions. Besides the original layout (one VTK XML file per entity, with base64/zlib
+encoded arrays, and one JSON table per collection and legend), a revision can be saved as a binary container:
+all point, cell and attribute arrays of all entities are written one after the other, aligned, in a single
+ARRAYS_FILE, and MANIFEST_FILE describes the dataset type, structure and arrays of each entity. Tables are stored
+column by column in the same container: numeric columns as binary arrays, and text or list columns as JSON lists
+in the manifest. When a container revision is opened, ARRAYS_FILE is memory-mapped and arrays are wrapped in VTK
+arrays without copies, so opening a project does not parse or decode anything and data is read from disk only
+when it is used. The memory map is copy-on-write, so editing an entity never modifies the saved revision.
+Arrays can optionally be compressed with zlib at its fastest level, in chunks, and are then decompressed on
+open. RevisionWriter and RevisionReader hide the storage from save_project() and open_project(), and revisions
+saved with VTK XML files can always be opened."""
+
+# Storage back ends of a revision.
+STORAGE_XML = "xml"
+STORAGE_CONTAINER = "container"
+
+# Filters of the save dialog, selecting the storage of the saved revision.
+PROJECT_FILTERS = {
+    STORAGE_XML: "PZero (*.p0)",
+    STORAGE_CONTAINER: "PZero, binary container (*.p0)",
+}
+
+# Files of a container revision.
+MANIFEST_FILE = "manifest.json"
+ARRAYS_FILE = "arrays.bin"
+
+# Version of the manifest, increased when the layout changes.
+FORMAT_VERSION = 1
+
+# Alignment, in bytes, of arrays in ARRAYS_FILE, so memory-mapped arrays are aligned for any dtype.
+ALIGNMENT = 64
+
+# Size, in bytes, of the chunks compressed independently.
+CHUNK_BYTES = 1 << 22
+
+# Compression level used by zlib, the fastest one.
+ZLIB_LEVEL = 1
+
+# Dataset classes and extensions of the VTK XML files.
+_XML_READERS = {
+    ".vtp": vtkXMLPolyDataReader,
+    ".vts": vtkXMLStructuredGridReader,
+    ".vti": vtkXMLImageDataReader,
+}
+_XML_WRITERS = {
+    ".vtp": vtkXMLPolyDataWriter,
+    ".vts": vtkXMLStructuredGridWriter,
+    ".vti": vtkXMLImageDataWriter,
+}
+
+# Cell arrays of vtkPolyData.
+_POLY_CELLS = ["Verts", "Lines", "Polys", "Strips"]
+
+# Active attributes of point and cell data that are restored by name.
+_ATTRIBUTES = ["Scalars", "Vectors", "Normals", "TCoords"]
+
+
+def is_container(dir_name: str = None) -> bool:
+    """True if the revision folder has been saved as a binary container."""
+    return os_path.isfile(os_path.join(dir_name, MANIFEST_FILE))
+
+
+# ----------------------------------------------------------------------------- writer
+
+
+def _json_default(value=None):
+    """Numpy scalars and arrays found in text or list columns of tables."""
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    raise TypeError(f"{type(value).__name__} cannot be saved in a table")
+
+
+class RevisionWriter:
+    """Writes the tables and entities of a revision folder, as a binary container or as JSON tables and VTK XML
+    files. Call close() when all tables and entities are written."""
+
+    def __init__(
+        self, dir_name: str = None, storage: str = STORAGE_CONTAINER, compression=None
+    ):
+        self.dir_name = dir_name
+        self.storage = storage
+        self.compression = compression
+        if storage == STORAGE_CONTAINER:
+            self._file = open(os_path.join(dir_name, ARRAYS_FILE), "wb")
+            self.manifest = {
+                "version": FORMAT_VERSION,
+                "alignment": ALIGNMENT,
+                "tables": {},
+                "entities": {},
+            }
+
+    def write_table(self, name: str = None, df=None):
+        """Write a table, with its index, as <name>.json or in the container."""
+        if self.storage != STORAGE_CONTAINER:
+            df.to_json(os_path.join(self.dir_name, name + ".json"), orient="index")
+            return
+        columns = []
+        for column in df.columns:
+            values = df[column]
+            if values.dtype.kind in "biuf":
+                columns.append(
+                    {"name": column, "array": self._write_array(values.to_numpy())}
+                )
+            else:
+                columns.append(
+                    {
+                        "name": column,
+                        "dtype": str(values.dtype),
+                        "values": values.tolist(),
+                    }
+                )
+        index = df.index.tolist()
+        self.manifest["tables"][name] = {
+            "index": None if index == list(range(len(index))) else index,
+            "columns": columns,
+        }
+
+    def write_entity(self, uid: str = None, vtk_obj=None, extension: str = None):
+        """Write the dataset of an entity, as <uid><extension> or in the container. Datasets with arrays that
+        cannot be stored in the container are written as VTK XML files in any case."""
+        if self.storage == STORAGE_CONTAINER:
+            entry = self._dataset_entry(vtk_obj)
+            if entry is not None:
+                self.manifest["entities"][uid] = entry
+                return
+        writer = _XML_WRITERS[extension]()
+        writer.SetFileName(os_path.join(self.dir_name, uid + extension))
+        writer.SetInputData(vtk_obj)
+        writer.Write()
+
+    def close(self):
+        if self.storage != STORAGE_CONTAINER:
+            return
+        self._file.close()
+        with open(os_path.join(self.dir_name, MANIFEST_FILE), "w") as manifest_file:
+            json_dump(self.manifest, manifest_file, default=_json_default)
+
+    def _write_array(self, array=None, vtk_type: int = None) -> dict:
+        """Append an array to ARRAYS_FILE, aligned to ALIGNMENT, and return its manifest entry."""
+        array = np_ascontiguousarray(array)
+        offset = self._file.tell()
+        padding = -offset % ALIGNMENT
+        if padding:
+            self._file.write(b"\0" * padding)
+            offset += padding
+        entry = {
+            "offset": offset,
+            "dtype": array.dtype.str,
+            "shape": list(array.shape),
+            "vtk_type": vtk_type,
+        }
+        data = memoryview(array.reshape(-1).view(np_uint8))
+        if self.compression == "zlib" and array.nbytes > 0:
+            chunks = []
+            for start in range(0, array.nbytes, CHUNK_BYTES):
+                chunk = zlib_compress(data[start : start + CHUNK_BYTES], ZLIB_LEVEL)
+                self._file.write(chunk)
+                chunks.append(len(chunk))
+            entry["codec"] = "zlib"
+            entry["chunks"] = chunks
+        else:
+            self._file.write(data)
+            entry["codec"] = None
+        return entry
+
+    def _attribute_arrays(self, attributes=None):
+        """Manifest entries of the arrays of point, cell or field data, or None if one cannot be stored."""
+        arrays = []
+        for i in range(attributes.GetNumberOfArrays()):
+            abstract_array = attributes.GetAbstractArray(i)
+            entry = {
+                "name": abstract_array.GetName(),
+                "components": abstract_array.GetNumberOfComponents(),
+            }
+            if isinstance(abstract_array, vtkStringArray):
+                entry["values"] = [
+                    abstract_array.GetValue(j)
+                    for j in range(abstract_array.GetNumberOfValues())
+                ]
+            elif isinstance(abstract_array, vtkDataArray):
+                try:
+                    values = vtk_to_numpy(abstract_array)
+                except (TypeError, ValueError, AttributeError):
+                    return None
+                entry["array"] = self._write_array(
+                    values, vtk_type=abstract_array.GetDataType()
+                )
+            else:
+                return None
+            arrays.append(entry)
+        active = {}
+        for attribute in _ATTRIBUTES:
+            get_attribute = getattr(attributes, f"Get{attribute}", None)
+            if get_attribute is not None and get_attribute() is not None:
+                active[attribute] = get_attribute().GetName()
+        return {"arrays": arrays, "active": active}
+
+    def _dataset_entry(self, vtk_obj=None):
+        """Write the arrays of a dataset and return its manifest entry, or None if it cannot be stored."""
+        if vtk_obj.IsA("vtkPolyData"):
+            entry = {"type": "vtkPolyData"}
+            for cells in _POLY_CELLS:
+                cell_array = getattr(vtk_obj, f"Get{cells}")()
+                if cell_array is None or cell_array.GetNumberOfCells() == 0:
+                    continue
+                entry[cells] = {
+                    "offsets": self._write_array(
+                        vtk_to_numpy(cell_array.GetOffsetsArray()),
+                        vtk_type=cell_array.GetOffsetsArray().GetDataType(),
+                    ),
+                    "connectivity": self._write_array(
+                        vtk_to_numpy(cell_array.GetConnectivityArray()),
+                        vtk_type=cell_array.GetConnectivityArray().GetDataType(),
+                    ),
+                }
+        elif vtk_obj.IsA("vtkStructuredGrid"):
+            entry = {"type": "vtkStructuredGrid", "dimensions": vtk_obj.GetDimensions()}
+        elif vtk_obj.IsA("vtkImageData"):
+            direction = vtk_obj.GetDirectionMatrix()
+            entry = {
+                "type": "vtkImageData",
+                "extent": vtk_obj.GetExtent(),
+                "origin": vtk_obj.GetOrigin(),
+                "spacing": vtk_obj.GetSpacing(),
+                "direction": [direction.GetElement(i // 3, i % 3) for i in range(9)],
+            }
+        else:
+            return None
+        if not vtk_obj.IsA("vtkImageData") and vtk_obj.GetPoints() is not None:
+            points = vtk_obj.GetPoints().GetData()
+            entry["points"] = self._write_array(
+                vtk_to_numpy(points), vtk_type=points.GetDataType()
+            )
+        for data_name in ["point_data", "cell_data", "field_data"]:
+            attributes = {
+                "point_data": vtk_obj.GetPointData,
+                "cell_data": vtk_obj.GetCellData,
+                "field_data": vtk_obj.GetFieldData,
+            }[data_name]()
+            entry[data_name] = self._attribute_arrays(attributes)
+            if entry[data_name] is None:
+                return None
+        return entry
+
+
+# ----------------------------------------------------------------------------- reader
+
+
+class RevisionReader:
+    """Reads the tables and entities of a revision folder saved with RevisionWriter, or with JSON (or old CSV)
+    tables and VTK XML files. Entities of container revisions share memory with the memory-mapped ARRAYS_FILE.
+    """
+
+    def __init__(self, dir_name: str = None):
+        self.dir_name = dir_name
+        self.storage = STORAGE_CONTAINER if is_container(dir_name) else STORAGE_XML
+        self.manifest = {"tables": {}, "entities": {}}
+        self._buffer = None
+        if self.storage == STORAGE_CONTAINER:
+            with open(os_path.join(dir_name, MANIFEST_FILE), "r") as manifest_file:
+                self.manifest = json_load(manifest_file)
+            arrays_path = os_path.join(dir_name, ARRAYS_FILE)
+            if os_path.getsize(arrays_path) > 0:
+                # Copy-on-write, so arrays are writable for VTK and changes stay in memory.
+                self._buffer = np_memmap(arrays_path, dtype=np_uint8, mode="c")
+
+    def _path(self, name: str = None) -> str:
+        return os_path.join(self.dir_name, name)
+
+    def has_table(self, name: str = None) -> bool:
+        return (
+            name in self.manifest["tables"]
+            or os_path.isfile(self._path(name + ".json"))
+            or os_path.isfile(self._path(name + ".csv"))
+        )
+
+    def read_table(self, name: str = None, dtype: dict = None):
+        """Read a table as a Pandas dataframe, from the container, with the saved column types, or from
+        <name>.json or <name>.csv, with the column types in dtype."""
+        if name in self.manifest["tables"]:
+            table = self.manifest["tables"][name]
+            df = pd_DataFrame(
+                {
+                    column["name"]: (
+                        self._read_array(column["array"])
+                        if "array" in column
+                        else pd_Series(column["values"], dtype=column["dtype"])
+                    )
+                    for column in table["columns"]
+                },
+                columns=[column["name"] for column in table["columns"]],
+            )
+            if table["index"] is not None:
+                df.index = table["index"]
+            return df
+        if os_path.isfile(self._path(name + ".json")):
+            return pd_read_json(self._path(name + ".json"), orient="index", dtype=dtype)
+        return pd_read_csv(
+            self._path(name + ".csv"),
+            encoding="utf-8",
+            dtype=dtype,
+            keep_default_na=False,
+        )
+
+    def has_entity(self, uid: str = None, extension: str = None) -> bool:
+        return uid in self.manifest["entities"] or os_path.isfile(
+            self._path(uid + extension)
+        )
+
+    def read_entity(self, uid: str = None, extension: str = None):
+        """Read the dataset of an entity, from the container or from <uid><extension>, to be shallow-copied
+        into the entity."""
+        if uid in self.manifest["entities"]:
+            return self._read_dataset(self.manifest["entities"][uid])
+        reader = _XML_READERS[extension]()
+        reader.SetFileName(self._path(uid + extension))
+        reader.Update()
+        return reader.GetOutput()
+
+    def _read_array(self, entry: dict = None):
+        """Numpy array of a manifest entry, as a view of the memory map if it is not compressed."""
+        dtype = np_dtype(entry["dtype"])
+        shape = tuple(entry["shape"])
+        count = 1
+        for size in shape:
+            count *= size
+        # An empty arrays.bin is not memory-mapped, and zero-length arrays have no data in it.
+        if count == 0 or self._buffer is None:
+            return np_empty(shape, dtype=dtype)
+        offset = entry["offset"]
+        if entry["codec"] is None:
+            return (
+                self._buffer[offset : offset + count * dtype.itemsize]
+                .view(dtype)
+                .reshape(shape)
+            )
+        array = np_empty(shape, dtype=dtype)
+        out = array.reshape(-1).view(np_uint8)
+        position = 0
+        for chunk_size in entry["chunks"]:
+            chunk = zlib_decompress(self._buffer[offset : offset + chunk_size])
+            out[position : position + len(chunk)] = memoryview(chunk)
+            position += len(chunk)
+            offset += chunk_size
+        return array
+
+    def _read_vtk_array(self, entry: dict = None):
+        return numpy_to_vtk(
+            self._read_array(entry), deep=False, array_type=entry["vtk_type"]
+        )
+
+    def _read_attributes(self, attributes=None, entry: dict = None):
+        for array_entry in entry["arrays"]:
+            if "values" in array_entry:
+                vtk_array = vtkStringArray()
+                vtk_array.SetNumberOfComponents(array_entry["components"])
+                for value in array_entry["values"]:
+                    vtk_array.InsertNextValue(value)
+            else:
+                vtk_array = self._read_vtk_array(array_entry["array"])
+                vtk_array.SetNumberOfComponents(array_entry["components"])
+            if array_entry["name"] is not None:
+                vtk_array.SetName(array_entry["name"])
+            attributes.AddArray(vtk_array)
+        for attribute, name in entry["active"].items():
+            getattr(attributes, f"SetActive{attribute}")(name)
+
+    def _read_dataset(self, entry: dict = None):
+        if entry["type"] == "vtkPolyData":
+            dataset = vtkPolyData()
+            for cells in _POLY_CELLS:
+                if cells not in entry:
+                    continue
+                cell_array = vtkCellArray()
+                cell_array.SetData(
+                    self._read_vtk_array(entry[cells]["offsets"]),
+                    self._read_vtk_array(entry[cells]["connectivity"]),
+                )
+                getattr(dataset, f"Set{cells}")(cell_array)
+        elif entry["type"] == "vtkStructuredGrid":
+            dataset = vtkStructuredGrid()
+            dataset.SetDimensions(entry["dimensions"])
+        else:
+            dataset = vtkImageData()
+            dataset.SetExtent(entry["extent"])
+            dataset.SetOrigin(entry["origin"])
+            dataset.SetSpacing(entry["spacing"])
+            dataset.SetDirectionMatrix(entry["direction"])
+        if "points" in entry:
+            points = vtkPoints()
+            points.SetData(self._read_vtk_array(entry["points"]))
+            dataset.SetPoints(points)
+        self._read_attributes(dataset.GetPointData(), entry["point_data"])
+        self._read_attributes(dataset.GetCellData(), entry["cell_data"])
+        self._read_attributes(dataset.GetFieldData(), entry["field_data"])
+        return dataset
@@ -0,0 +1,133 @@
+"""render_cache.py
+PZero© Andrea Bistacchi"""
+
+from numpy import column_stack as np_column_stack
+from numpy import nanmax as np_nanmax
+from numpy import nanmin as np_nanmin
+from numpy import ndarray as np_ndarray
+
+from vtk import vtkAppendPolyData
+
+from pyvista import Disc as pv_Disc
+from pyvista import Line as pv_Line
+
+from ..orientation_analysis import get_dip_dir_vectors
+
+"""Render resources derived from entities (normal glyphs, RGB arrays of point clouds, scalar ranges) cached per
+entity and shared by all open views, so that opening more views does not compute them again for each view.
+A single cache belongs to the project and is invalidated once for each modification, when geom_modified,
+data_keys_added, data_keys_removed or entities_removed are emitted, before views are updated. Each resource is
+also stored with the modification time of the vtk object it was derived from, so a resource is never used after
+the entity has changed. VTK mappers and their OpenGL buffers belong to the render window of each view, and are
+not shared: views share the vtk objects used as mapper inputs, that are the entities themselves."""
+
+
+def build_normal_discs(vtk_obj=None, radius=None):
+    """Discs normal to the Normals point data, with dip and direction lines, as drawn for attitudes in 3D and
+    cross-section views. Discs are glyphs of a single disc source instead of one disc per point.
+    """
+    normals = vtk_obj.get_point_data("Normals")
+    dip_vectors, dir_vectors = get_dip_dir_vectors(normals=normals)
+    # The glyph filter aligns the X axis of the source with the vector, so the source disc is normal to X.
+    disc = pv_Disc(center=(0, 0, 0), normal=(1, 0, 0), inner=0, outer=radius, c_res=30)
+    line1 = pv_Line(pointa=(0, 0, 0), pointb=(radius, 0, 0))
+    line2 = pv_Line(pointa=(-radius, 0, 0), pointb=(radius, 0, 0))
+    appender = vtkAppendPolyData()
+    appender.AddInputData(vtk_obj.glyph(geometry=disc, prop=normals))
+    appender.AddInputData(vtk_obj.glyph(geometry=line1, prop=dip_vectors))
+    appender.AddInputData(vtk_obj.glyph(geometry=line2, prop=dir_vectors))
+    appender.Update()
+    return appender.GetOutput()
+
+
+def build_normal_map_glyphs(vtk_obj=None, radius=None):
+    """Azimuth and direction lines of the Normals point data, as drawn for attitudes in map views."""
+    normals = vtk_obj.get_point_data("Normals")
+    az_vectors, dir_vectors = get_dip_dir_vectors(normals=normals, az=True)
+    line1 = pv_Line(pointa=(0, 0, 0), pointb=(radius, 0, 0))
+    line2 = pv_Line(pointa=(-radius, 0, 0), pointb=(radius, 0, 0))
+    appender = vtkAppendPolyData()
+    appender.AddInputData(vtk_obj.glyph(geometry=line1, prop=az_vectors))
+    appender.AddInputData(vtk_obj.glyph(geometry=line2, prop=dir_vectors))
+    appender.Update()
+    return appender.GetOutput()
+
+
+def build_rgb_total(vtk_obj=None):
+    """Nx3 RGB array for point cloud rendering, from a vector 'RGB' array or from separate scalar arrays named
+    'RGB[0]', 'RGB[1]', 'RGB[2]'. Returns None if not available."""
+    try:
+        if "RGB" in vtk_obj.point_data_keys:
+            rgb = vtk_obj.get_point_data("RGB")
+            if isinstance(rgb, np_ndarray) and (
+                (
+                    rgb.ndim == 2
+                    and rgb.shape[1] >= 3
+                    and rgb.shape[0] == vtk_obj.points_number
+                )
+                or (rgb.ndim == 1 and vtk_obj.points_number == 1 and rgb.shape[0] >= 3)
+            ):
+                if rgb.ndim == 1:
+                    return rgb[:3].reshape((1, 3))
+                return rgb[:, :3]
+    except Exception:
+        pass
+
+    try:
+        keys = ("RGB[0]", "RGB[1]", "RGB[2]")
+        if all(key in vtk_obj.point_data_keys for key in keys):
+            r = vtk_obj.get_point_data(keys[0])
+            g = vtk_obj.get_point_data(keys[1])
+            b = vtk_obj.get_point_data(keys[2])
+            return np_column_stack((r, g, b))
+    except Exception:
+        pass
+
+    return None
+
+
+def build_scalar_range(vtk_obj=None, property_name=None):
+    """Range [min, max] of a single-component point data property, ignoring NaNs, as used for the colormap."""
+    values = vtk_obj.get_point_data(property_name)
+    return [float(np_nanmin(values)), float(np_nanmax(values))]
+
+
+# Functions used to build each kind of resource.
+RESOURCE_BUILDERS = {
+    "normal_discs": build_normal_discs,
+    "normal_map_glyphs": build_normal_map_glyphs,
+    "rgb_total": build_rgb_total,
+    "scalar_range": build_scalar_range,
+}
+
+
+class RenderResourceCache:
+    """Cache of render resources by entity uid, kind of resource and build parameters (e.g. the glyph radius or
+    the property name). Resources must be treated as read-only by views, since they are shared.
+    """
+
+    def __init__(self):
+        # (uid, kind, params) -> (vtk object MTime, resource)
+        self._entries = {}
+
+    def get(self, uid=None, vtk_obj=None, kind=None, params=()):
+        """Resource of this kind for the entity with this uid, built if missing or if the entity has changed.
+        params is a tuple of further arguments passed to the builder."""
+        params = tuple(params)
+        key = (uid, kind, params)
+        mtime = vtk_obj.GetMTime()
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == mtime:
+            return entry[1]
+        resource = RESOURCE_BUILDERS[kind](vtk_obj, *params)
+        self._entries[key] = (mtime, resource)
+        return resource
+
+    def invalidate(self, uids=None):
+        """Discard resources of the entities with these uids, or of all entities if uids is None."""
+        if uids is None:
+            self._entries.clear()
+            return
+        uids = set(uids)
+        for key in [key for key in self._entries if key[0] in uids]:
+            del self._entries[key]
@@ -5,8 +5,12 @@ High-quality screenshot export dialog with resolution presets, format options,
 view settings, and colormap selection.
 """
 
+from functools import partial
+
 import numpy as np
 
+from PIL import Image
+
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QImage, QPixmap
 from PySide6.QtWidgets import (
@@ -29,6 +33,13 @@ from PySide6.QtWidgets import (
 import pyvista as pv
 
 from ..properties_manager import PropertiesCMaps
+from .tiled_export import (
+    add_shared_actors,
+    colormap_lookup_table,
+    render_tiled,
+    scalar_bar_actors,
+    tile_grid,
+)
 
 
 class ScreenshotExportDialog(QDialog):
@@ -351,11 +362,12 @@ class ScreenshotExportDialog(QDialog):
         else:
             self.transparent_check.setChecked(False)
 
-    def _setup_export_plotter(self, plotter):
+    def _setup_export_plotter(self, plotter, export_size=None):
         """Configure the off-screen plotter for export.
 
         Args:
             plotter: PyVista Plotter to configure
+            export_size: Size of the exported image, if rendered in tiles smaller than it
         """
         # Background color
         bg_choice = self.background_combo.currentText()
@@ -393,7 +405,7 @@ class ScreenshotExportDialog(QDialog):
         text_color = "white" if is_dark_bg else "black"
 
         # Copy actors from source plotter
-        self._copy_actors_to_plotter(plotter, is_dark_bg)
+        self._copy_actors_to_plotter(plotter, is_dark_bg, export_size=export_size)
 
         # Camera view
         view_choice = self.view_combo.currentText()
@@ -417,114 +429,45 @@ class ScreenshotExportDialog(QDialog):
                 color=text_color,
             )
 
-    def _copy_actors_to_plotter(self, target_plotter, is_dark_bg):
-        """Copy actors from source plotter to target plotter.
+    def _copy_actors_to_plotter(self, target_plotter, is_dark_bg, export_size=None):
+        """Add clones of the visible actors of the source plotter to the target plotter. The clones share data,
+        lookup tables and textures with the source actors (see helpers/tiled_export.py), so nothing is wrapped or
+        coloured again.
 
         Args:
             target_plotter: The plotter to copy actors to
             is_dark_bg: Whether using a dark background
+            export_size: Size of the exported image, if larger than the target plotter window
         """
         if self.plotter is None or not hasattr(self.plotter, "renderer"):
             return
 
-        line_scale = self.line_scale_spin.value()
-        point_scale = self.point_scale_spin.value()
-        resolution_scale = self._get_resolution_scale(target_plotter)
+        if export_size is None:
+            export_size = self._get_plotter_size(target_plotter)
+        resolution_scale = self._get_resolution_scale(export_size)
         selected_cmap = self.colormap_combo.currentText()
         use_custom_cmap = selected_cmap != "(Use Current)"
-        show_scalar_bar = self.show_scalar_bar_check.isChecked()
-
         text_color = "white" if is_dark_bg else "black"
 
         try:
-            for uid, actor in self.plotter.renderer.actors.items():
-                try:
-                    if not hasattr(actor, "GetMapper") or actor.GetMapper() is None:
-                        continue
-
-                    mapper = actor.GetMapper()
-                    if mapper.GetInput() is None:
-                        continue
-
-                    # Wrap the data in PyVista
-                    data = mapper.GetInput()
-                    mesh = pv.wrap(data)
-
-                    # Get actor properties
-                    prop = actor.GetProperty()
-                    color = prop.GetColor() if prop else (1, 1, 1)
-                    opacity = prop.GetOpacity() if prop else 1.0
-                    orig_line_width = prop.GetLineWidth() if prop else 1.0
-                    orig_point_size = prop.GetPointSize() if prop else 5.0
-                    representation = prop.GetRepresentation() if prop else 2
-                    render_points_as_spheres = (
-                        bool(prop.GetRenderPointsAsSpheres()) if prop else False
-                    )
-                    render_lines_as_tubes = (
-                        bool(prop.GetRenderLinesAsTubes()) if prop else False
-                    )
-                    visibility = actor.GetVisibility()
-                    texture = (
-                        actor.GetTexture() if hasattr(actor, "GetTexture") else None
-                    )
-
-                    if not visibility:
-                        continue
-
-                    # Scale line width and point size
-                    scaled_line_width = max(
-                        orig_line_width * line_scale * resolution_scale, 1.0
-                    )
-                    scaled_point_size = max(
-                        orig_point_size * point_scale * resolution_scale, 3.0
-                    )
-
-                    # Determine style
-                    style = "surface"
-                    if representation == 0:
-                        style = "points"
-                    elif representation == 1:
-                        style = "wireframe"
-
-                    scalars, cmap, rgb, clim = self._get_actor_scalar_rendering(
-                        actor_uid=uid,
-                        mapper=mapper,
-                        mesh=mesh,
-                        use_custom_cmap=use_custom_cmap,
-                        selected_cmap=selected_cmap,
-                    )
-
-                    # Add mesh to target plotter
-                    target_plotter.add_mesh(
-                        mesh,
-                        color=color if scalars is None and texture is None else None,
-                        scalars=scalars,
-                        cmap=cmap,
-                        rgb=rgb,
-                        clim=clim,
-                        texture=texture,
-                        opacity=opacity,
-                        style=style,
-                        line_width=scaled_line_width,
-                        point_size=scaled_point_size,
-                        render_points_as_spheres=render_points_as_spheres,
-                        render_lines_as_tubes=render_lines_as_tubes,
-                        show_scalar_bar=show_scalar_bar and scalars is not None,
-                        scalar_bar_args=(
-                            {
-                                "color": text_color,
-                                "title_font_size": self.font_size_spin.value(),
-                                "label_font_size": max(
-                                    8, self.font_size_spin.value() - 4
-                                ),
-                            }
-                            if show_scalar_bar
-                            else None
-                        ),
-                    )
-                except Exception:
-                    # Skip actors that can't be copied
-                    continue
+            scalar_clones = add_shared_actors(
+                source_renderer=self.plotter.renderer,
+                target_renderer=target_plotter.renderer,
+                line_width_scale=self.line_scale_spin.value() * resolution_scale,
+                point_size_scale=self.point_scale_spin.value() * resolution_scale,
+                lookup_table_factory=(
+                    partial(colormap_lookup_table, selected_cmap)
+                    if use_custom_cmap
+                    else None
+                ),
+            )
+            if self.show_scalar_bar_check.isChecked():
+                for bar in scalar_bar_actors(
+                    clones=scalar_clones,
+                    color=pv.Color(text_color).float_rgb,
+                    font_size=self.font_size_spin.value(),
+                ):
+                    target_plotter.renderer.AddActor2D(bar)
         except Exception:
             pass
 
@@ -541,10 +484,10 @@ class ScreenshotExportDialog(QDialog):
             pass
         return None, None
 
-    def _get_resolution_scale(self, target_plotter):
+    def _get_resolution_scale(self, export_size):
         """Scale widths/sizes so exports match on-screen legend proportions."""
         src_w, src_h = self._get_plotter_size(self.plotter)
-        dst_w, dst_h = self._get_plotter_size(target_plotter)
+        dst_w, dst_h = export_size
         if (
             src_w is None
             or src_h is None
@@ -558,110 +501,6 @@ class ScreenshotExportDialog(QDialog):
         scale_y = dst_h / src_h
         return max((scale_x + scale_y) * 0.5, 0.1)
 
-    @staticmethod
-    def _normalize_property_name(prop_name):
-        if prop_name is None:
-            return None
-        if isinstance(prop_name, str):
-            prop_name = prop_name.strip()
-            return None if prop_name.lower() == "none" or prop_name == "" else prop_name
-        try:
-            if np.isnan(prop_name):
-                return None
-        except Exception:
-            pass
-        return prop_name
-
-    def _get_shown_property_for_actor(self, actor_uid):
-        if self.parent_view is None or not hasattr(self.parent_view, "actors_df"):
-            return None
-        try:
-            shown = self.parent_view.actors_df.loc[
-                self.parent_view.actors_df["uid"] == actor_uid, "show_property"
-            ]
-            if len(shown) == 0:
-                return None
-            return self._normalize_property_name(shown.values[0])
-        except Exception:
-            return None
-
-    def _get_property_cmap(self, property_name):
-        property_name = self._normalize_property_name(property_name)
-        if property_name is None:
-            return None
-
-        project_window = getattr(self.parent_view, "parent", None)
-        if project_window is None or not hasattr(project_window, "prop_legend_df"):
-            return None
-        try:
-            cmap_row = project_window.prop_legend_df.loc[
-                project_window.prop_legend_df["property_name"] == property_name,
-                "colormap",
-            ]
-            if len(cmap_row) == 0:
-                return None
-            cmap = cmap_row.values[0]
-            if isinstance(cmap, str) and cmap.strip():
-                return cmap
-        except Exception:
-            return None
-        return None
-
-    def _get_actor_scalar_rendering(
-        self, actor_uid, mapper, mesh, use_custom_cmap, selected_cmap
-    ):
-        """Resolve scalar/rgb/cmap settings from the source actor mapper."""
-        if mapper is None or not mapper.GetScalarVisibility():
-            return None, None, False, None
-
-        scalars = mapper.GetArrayName()
-        if scalars and scalars not in mesh.array_names:
-            scalars = None
-        if scalars is None:
-            scalars = mesh.active_scalars_name
-        if scalars is None:
-            return None, None, False, None
-
-        rgb = False
-        try:
-            color_mode = mapper.GetColorModeAsString().lower()
-            rgb = "direct" in color_mode
-        except Exception:
-            rgb = False
-
-        if not rgb:
-            try:
-                scalar_values = mesh[scalars]
-                if (
-                    hasattr(scalar_values, "shape")
-                    and len(scalar_values.shape) > 1
-                    and scalar_values.shape[-1] in (3, 4)
-                ):
-                    rgb = True
-            except Exception:
-                pass
-
-        cmap = None
-        if not rgb:
-            if use_custom_cmap:
-                cmap = selected_cmap
-            else:
-                shown_property = self._get_shown_property_for_actor(actor_uid)
-                cmap = self._get_property_cmap(shown_property)
-                if cmap is None:
-                    cmap = self._get_property_cmap(scalars)
-
-        clim = None
-        if not rgb:
-            try:
-                scalar_range = mapper.GetScalarRange()
-                if scalar_range and len(scalar_range) == 2:
-                    clim = scalar_range
-            except Exception:
-                pass
-
-        return scalars, cmap, rgb, clim
-
     def _apply_camera_view(self, plotter, view_choice):
         """Apply the selected camera view to the plotter.
 
@@ -757,14 +596,28 @@ class ScreenshotExportDialog(QDialog):
             return
 
         try:
-            # Create high-resolution off-screen plotter
+            # Create high-resolution off-screen plotter. Raster images larger than a tile are rendered in tiles
+            # with a window of the size of one tile.
             width = self.width_spin.value()
             height = self.height_spin.value()
+            is_vector = ext in ["pdf", "svg", "eps"]
+            n_tiles, tile_width, tile_height = tile_grid(width=width, height=height)
+            if is_vector:
+                n_tiles, tile_width, tile_height = 1, width, height
+
+            # Determine if transparent background
+            use_transparent = (
+                self.background_combo.currentText() == "Transparent"
+                or self.transparent_check.isChecked()
+            )
 
             export_plotter = pv.Plotter(
                 off_screen=True,
-                window_size=[width, height],
+                window_size=[tile_width, tile_height],
             )
+            # Alpha bit planes must be set before the first render creates the context.
+            if use_transparent:
+                export_plotter.ren_win.SetAlphaBitPlanes(1)
 
             # Apply anti-aliasing
             if self.aa_check.isChecked():
@@ -773,24 +626,31 @@ class ScreenshotExportDialog(QDialog):
                 )
 
             # Setup the plotter
-            self._setup_export_plotter(export_plotter)
-
-            # Determine if transparent background
-            use_transparent = (
-                self.background_combo.currentText() == "Transparent"
-                or self.transparent_check.isChecked()
-            )
+            self._setup_export_plotter(export_plotter, export_size=(width, height))
 
             # Export based on format
-            if ext in ["pdf", "svg", "eps"]:
+            if is_vector:
                 # Vector formats
                 export_plotter.save_graphic(file_path)
-            else:
+            elif n_tiles == 1:
                 # Raster formats
                 export_plotter.screenshot(
                     file_path,
                     transparent_background=use_transparent,
                 )
+            else:
+                # First render through PyVista, that sets up the camera as for screenshot()
+                export_plotter.screenshot(return_img=True)
+                image = render_tiled(
+                    render_window=export_plotter.ren_win,
+                    renderer=export_plotter.renderer,
+                    width=width,
+                    height=height,
+                    transparent=use_transparent,
+                )
+                if ext == "jpg":
+                    image = image[:, :, :3]
+                Image.fromarray(np.ascontiguousarray(image)).save(file_path)
 
             export_plotter.close()
 
@@ -0,0 +1,323 @@
+"""section_intersection.py
+PZero© Andrea Bistacchi"""
+
+from numpy import abs as np_abs
+from numpy import arange as np_arange
+from numpy import argsort as np_argsort
+from numpy import array as np_array
+from numpy import clip as np_clip
+from numpy import concatenate as np_concatenate
+from numpy import cumsum as np_cumsum
+from numpy import diff as np_diff
+from numpy import dot as np_dot
+from numpy import float64 as np_float64
+from numpy import maximum as np_maximum
+from numpy import minimum as np_minimum
+from numpy import repeat as np_repeat
+from numpy import searchsorted as np_searchsorted
+from numpy import unique as np_unique
+from numpy import zeros as np_zeros
+
+from vtkmodules.util.numpy_support import (
+    numpy_to_vtk,
+    numpy_to_vtkIdTypeArray,
+    vtk_to_numpy,
+)
+from vtkmodules.vtkCommonDataModel import vtkCellArray, vtkPlane, vtkPolyData
+from vtkmodules.vtkCommonCore import vtkPoints
+from vtkmodules.vtkFiltersCore import (
+    vtkCleanPolyData,
+    vtkCutter,
+    vtkPolyDataConnectivityFilter,
+    vtkStripper,
+    vtkTriangleFilter,
+)
+
+"""Intersection of many entities with many cross-sections. Cross-section planes with the same normal (e.g. a fence
+of parallel sections) are grouped and cut in a single pass of vtkCutter, with one contour value per section on a
+shared plane function. Entity/section pairs are culled beforehand with the bounding box of each entity, that is
+intersected by a plane if its corners lie on both sides of it, and only cells that straddle at least one of the
+planes are passed to the cutter. The cut is then split by section, using the distance of each output point along
+the shared normal. These functions do not use Qt objects or collections, so entities can be cut in parallel with
+run_batch() and the results added to collections in a single batch on the GUI thread."""
+
+# Tolerance on the dot product of unit normals for sections to be cut in the same pass.
+PARALLEL_TOLERANCE = 1e-9
+
+
+def _unit_normal(normal=None):
+    """Unit normal with the sign that makes its first non-zero component positive, so that opposite normals
+    are grouped together."""
+    normal = np_array(normal, dtype=np_float64)
+    normal = normal / (normal @ normal) ** 0.5
+    for component in normal:
+        if abs(component) > PARALLEL_TOLERANCE:
+            if component < 0:
+                normal = -normal
+            break
+    return normal
+
+
+def plane_groups(planes=None):
+    """Group planes with the same normal. planes is a list of (key, vtkPlane) pairs. Returns a list of
+    dictionaries with "normal", the sorted "offsets" of the planes along the normal, and their "keys".
+    """
+    groups = []
+    for key, plane in planes:
+        normal = _unit_normal(plane.GetNormal())
+        offset = float(np_dot(normal, plane.GetOrigin()))
+        for group in groups:
+            if abs(float(np_dot(group["normal"], normal))) > 1.0 - PARALLEL_TOLERANCE:
+                group["offsets"].append(offset)
+                group["keys"].append(key)
+                break
+        else:
+            groups.append({"normal": normal, "offsets": [offset], "keys": [key]})
+    for group in groups:
+        order = np_argsort(group["offsets"], kind="stable")
+        group["offsets"] = np_array(group["offsets"])[order]
+        group["keys"] = [group["keys"][i] for i in order]
+    return groups
+
+
+def _box_corners(bounds=None):
+    xmin, xmax, ymin, ymax, zmin, zmax = bounds
+    return np_array(
+        [[x, y, z] for x in (xmin, xmax) for y in (ymin, ymax) for z in (zmin, zmax)]
+    )
+
+
+def cull_groups(bounds=None, groups=None, tolerance=0.0):
+    """Planes of each group that intersect the bounding box (xmin, xmax, ymin, ymax, zmin, zmax), as a list
+    of groups shaped as in plane_groups(). Groups with no intersecting plane are left out.
+    """
+    corners = _box_corners(bounds)
+    culled = []
+    for group in groups:
+        distances = corners @ group["normal"]
+        first = np_searchsorted(group["offsets"], distances.min() - tolerance, "left")
+        last = np_searchsorted(group["offsets"], distances.max() + tolerance, "right")
+        if last > first:
+            culled.append(
+                {
+                    "normal": group["normal"],
+                    "offsets": group["offsets"][first:last],
+                    "keys": group["keys"][first:last],
+                }
+            )
+    return culled
+
+
+def _cell_arrays(vtk_obj=None):
+    """Offsets and connectivity of the polygons of vtk_obj, or of its lines if it has no polygons."""
+    cells = vtk_obj.GetPolys() if vtk_obj.GetNumberOfPolys() > 0 else vtk_obj.GetLines()
+    return (
+        vtk_to_numpy(cells.GetOffsetsArray()),
+        vtk_to_numpy(cells.GetConnectivityArray()),
+    )
+
+
+def _gather_cells(offsets=None, connectivity=None, selected=None):
+    """Offsets and connectivity of the selected cells of a cell array."""
+    sizes = np_diff(offsets)[selected]
+    starts = offsets[:-1][selected]
+    new_offsets = np_zeros(len(sizes) + 1, dtype=offsets.dtype)
+    np_cumsum(sizes, out=new_offsets[1:])
+    # Index of each connectivity entry of the selected cells in the old connectivity.
+    positions = np_repeat(starts - new_offsets[:-1], sizes) + np_arange(new_offsets[-1])
+    return new_offsets, connectivity[positions]
+
+
+def _subset_polydata(points=None, point_data=None, cells=None):
+    """Polydata with the given cells, as a dictionary {"verts"/"lines"/"polys": (offsets, connectivity)}, and
+    only the points they use, with their point data. points is the Nx3 array of the source points.
+    """
+    used_points = np_unique(np_concatenate([conn for _, conn in cells.values()]))
+    subset = vtkPolyData()
+    subset_points = vtkPoints()
+    subset_points.SetData(numpy_to_vtk(points[used_points], deep=True))
+    subset.SetPoints(subset_points)
+    for kind, (new_offsets, new_connectivity) in cells.items():
+        cell_array = vtkCellArray()
+        cell_array.SetData(
+            numpy_to_vtkIdTypeArray(new_offsets, deep=True),
+            numpy_to_vtkIdTypeArray(
+                np_searchsorted(used_points, new_connectivity), deep=True
+            ),
+        )
+        if kind == "verts":
+            subset.SetVerts(cell_array)
+        elif kind == "lines":
+            subset.SetLines(cell_array)
+        else:
+            subset.SetPolys(cell_array)
+    for i in range(point_data.GetNumberOfArrays()):
+        vtk_array = point_data.GetArray(i)
+        if vtk_array is None:
+            continue
+        subset_array = numpy_to_vtk(vtk_to_numpy(vtk_array)[used_points], deep=True)
+        subset_array.SetName(vtk_array.GetName())
+        subset.GetPointData().AddArray(subset_array)
+    return subset
+
+
+def near_plane_cells(vtk_obj=None, normal=None, offsets=None):
+    """Polydata with only the cells of vtk_obj (polygons, or lines for polylines) that straddle at least one of
+    the planes with this normal and offsets, and the points they use, so that the cutter does not visit cells
+    and points far from all planes."""
+    cell_offsets, connectivity = _cell_arrays(vtk_obj)
+    sizes = np_diff(cell_offsets)
+    if len(sizes) == 0 or sizes.min() == 0:
+        return vtk_obj
+    points = vtk_to_numpy(vtk_obj.GetPoints().GetData())
+    cell_distances = (points @ normal)[connectivity]
+    cell_min = np_minimum.reduceat(cell_distances, cell_offsets[:-1])
+    cell_max = np_maximum.reduceat(cell_distances, cell_offsets[:-1])
+    selected = np_searchsorted(offsets, cell_max, "right") > np_searchsorted(
+        offsets, cell_min, "left"
+    )
+    if selected.all() or not selected.any():
+        return vtk_obj
+    kind = "polys" if vtk_obj.GetNumberOfPolys() > 0 else "lines"
+    return _subset_polydata(
+        points=points,
+        point_data=vtk_obj.GetPointData(),
+        cells={
+            kind: _gather_cells(
+                offsets=cell_offsets, connectivity=connectivity, selected=selected
+            )
+        },
+    )
+
+
+def multi_plane_cut(vtk_obj=None, normal=None, offsets=None):
+    """Cut vtk_obj with all planes with this normal and offsets in a single pass, with one contour value for
+    each plane on a shared vtkPlane."""
+    plane = vtkPlane()
+    plane.SetOrigin(0.0, 0.0, 0.0)
+    plane.SetNormal(normal)
+    cutter = vtkCutter()
+    cutter.SetCutFunction(plane)
+    for i, offset in enumerate(offsets):
+        cutter.SetValue(i, offset)
+    cutter.SetInputData(
+        near_plane_cells(vtk_obj=vtk_obj, normal=normal, offsets=offsets)
+    )
+    cutter.Update()
+    return cutter.GetOutput()
+
+
+def split_by_plane(cut=None, normal=None, offsets=None):
+    """Split the output of multi_plane_cut() in one polydata for each plane, assigning each output point to the
+    nearest plane. Returns a list with a polydata, or None if empty, for each offset."""
+    n_points = cut.GetNumberOfPoints()
+    if n_points == 0:
+        return [None] * len(offsets)
+    points = vtk_to_numpy(cut.GetPoints().GetData())
+    distances = points @ normal
+    # Index of the nearest offset for each point.
+    right = np_clip(np_searchsorted(offsets, distances), 1, max(len(offsets) - 1, 1))
+    left = right - 1
+    if len(offsets) == 1:
+        plane_of_point = np_zeros(n_points, dtype=int)
+    else:
+        plane_of_point = left + (
+            np_abs(distances - offsets[right]) < np_abs(distances - offsets[left])
+        )
+    kinds = []
+    for kind, cells in [("verts", cut.GetVerts()), ("lines", cut.GetLines())]:
+        if cells.GetNumberOfCells() > 0:
+            cell_offsets = vtk_to_numpy(cells.GetOffsetsArray())
+            connectivity = vtk_to_numpy(cells.GetConnectivityArray())
+            plane_of_cell = plane_of_point[connectivity[cell_offsets[:-1]]]
+            kinds.append((kind, cell_offsets, connectivity, plane_of_cell))
+    pieces = []
+    for index in range(len(offsets)):
+        piece_cells = {}
+        for kind, cell_offsets, connectivity, plane_of_cell in kinds:
+            selected = plane_of_cell == index
+            if selected.any():
+                piece_cells[kind] = _gather_cells(
+                    offsets=cell_offsets, connectivity=connectivity, selected=selected
+                )
+        if piece_cells:
+            pieces.append(
+                _subset_polydata(
+                    points=points, point_data=cut.GetPointData(), cells=piece_cells
+                )
+            )
+        else:
+            pieces.append(None)
+    return pieces
+
+
+def polyline_parts(cut=None):
+    """Join the segments cut from a surface in polylines, and split them in connected parts, as in the
+    XsPolyLine entities created by intersections. Returns a list of polydata."""
+    cut_clean = vtkCleanPolyData()
+    cut_clean.ConvertLinesToPointsOff()
+    cut_clean.ConvertPolysToLinesOff()
+    cut_clean.ConvertStripsToPolysOff()
+    cut_clean.SetTolerance(0.0)
+    cut_clean.SetInputData(cut)
+    # Strips, then clean again to sort nodes and cells in the right order.
+    strips = vtkStripper()
+    strips.JoinContiguousSegmentsOn()
+    strips.SetInputConnection(cut_clean.GetOutputPort())
+    strips_clean = vtkCleanPolyData()
+    strips_clean.ConvertLinesToPointsOff()
+    strips_clean.ConvertPolysToLinesOff()
+    strips_clean.ConvertStripsToPolysOff()
+    strips_clean.SetTolerance(0.0)
+    strips_clean.SetInputConnection(strips.GetOutputPort())
+    # Convert polyline cells back to lines.
+    triangle = vtkTriangleFilter()
+    triangle.SetInputConnection(strips_clean.GetOutputPort())
+    triangle.Update()
+    if triangle.GetOutput().GetNumberOfPoints() == 0:
+        return []
+    # Get the number of parts with .SetExtractionModeToAllRegions(), then extract them with
+    # .SetExtractionModeToSpecifiedRegions().
+    connectivity = vtkPolyDataConnectivityFilter()
+    connectivity.SetInputConnection(triangle.GetOutputPort())
+    connectivity.SetExtractionModeToAllRegions()
+    connectivity.Update()
+    n_regions = connectivity.GetNumberOfExtractedRegions()
+    connectivity.SetExtractionModeToSpecifiedRegions()
+    parts = []
+    for region in range(n_regions):
+        connectivity.InitializeSpecifiedRegionList()
+        connectivity.AddSpecifiedRegion(region)
+        # Remove orphan points left behind by connectivity.
+        connectivity_clean = vtkCleanPolyData()
+        connectivity_clean.SetInputConnection(connectivity.GetOutputPort())
+        connectivity_clean.Update()
+        if connectivity_clean.GetOutput().GetNumberOfPoints() > 0:
+            part = vtkPolyData()
+            part.DeepCopy(connectivity_clean.GetOutput())
+            parts.append(part)
+    return parts
+
+
+def intersection_pipeline(item=None):
+    """Pipeline used with run_batch(). item is a (vtk_obj, groups) pair, with groups already culled for the
+    entity. Surfaces give a list of polyline parts for each section, polylines give one vertex set.
+    Returns a list of (section key, list of polydata) pairs, for sections with a non-empty intersection.
+    """
+    vtk_obj, groups = item
+    is_surface = vtk_obj.GetNumberOfPolys() > 0
+    results = []
+    for group in groups:
+        cut = multi_plane_cut(
+            vtk_obj=vtk_obj, normal=group["normal"], offsets=group["offsets"]
+        )
+        pieces = split_by_plane(
+            cut=cut, normal=group["normal"], offsets=group["offsets"]
+        )
+        for key, piece in zip(group["keys"], pieces):
+            if piece is None:
+                continue
+            parts = polyline_parts(piece) if is_surface else [piece]
+            if parts:
+                results.append((key, parts))
+    return results
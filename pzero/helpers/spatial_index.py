@@ -0,0 +1,215 @@
+"""spatial_index.py
+PZero© Andrea Bistacchi"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from os import path as os_path
+
+from pickle import HIGHEST_PROTOCOL as pickle_HIGHEST_PROTOCOL
+from pickle import UnpicklingError
+from pickle import Unpickler
+from pickle import dump as pickle_dump
+
+from threading import Lock
+
+from numpy import array_equal as np_array_equal
+
+from scipy.spatial import cKDTree
+
+from vtkmodules.util.numpy_support import vtk_to_numpy
+from vtkmodules.vtkCommonDataModel import vtkOctreePointLocator, vtkStaticPointLocator
+
+"""Spatial indexes (scipy kd-trees and VTK point locators) cached per entity and shared by all tools, so that
+picking, neighbour queries and point cloud filters do not rebuild a multi-second index every time they run.
+Indexes are built lazily, optionally in a background thread, and each one is stored with the modification time
+of the points it was built on, so an index is rebuilt only when the geometry changes, and not when properties
+or active scalars change. Kd-trees can be saved next to the entity files and are loaded, after checking that
+they match the points, when the project is opened again."""
+
+# Extension of kd-tree files saved next to the entity files, named <uid>.kdtree
+INDEX_EXTENSION = ".kdtree"
+
+# Classes that can be loaded from a kd-tree file, everything else is refused.
+_SAFE_GLOBALS = {
+    ("scipy.spatial._ckdtree", "cKDTree"),
+    ("numpy", "dtype"),
+    ("numpy", "ndarray"),
+    ("numpy._core.numeric", "_frombuffer"),
+    ("numpy.core.numeric", "_frombuffer"),
+    ("numpy._core.multiarray", "_reconstruct"),
+    ("numpy.core.multiarray", "_reconstruct"),
+}
+
+
+class _IndexUnpickler(Unpickler):
+    """Unpickler restricted to kd-trees and Numpy arrays, since kd-tree files are read from project folders."""
+
+    def find_class(self, module, name):
+        if (module, name) not in _SAFE_GLOBALS:
+            raise UnpicklingError(f"{module}.{name} not allowed in a kd-tree file")
+        return super().find_class(module, name)
+
+
+def geometry_mtime(vtk_obj=None):
+    """Modification time of the geometry of vtk_obj: the MTime of its vtkPoints for point sets, otherwise the
+    MTime of the whole object."""
+    points = vtk_obj.GetPoints() if hasattr(vtk_obj, "GetPoints") else None
+    if points is None:
+        return vtk_obj.GetMTime()
+    return points.GetMTime()
+
+
+def build_kdtree(vtk_obj=None):
+    """Scipy kd-tree on the points of vtk_obj."""
+    return cKDTree(vtk_to_numpy(vtk_obj.GetPoints().GetData()))
+
+
+def build_point_locator(vtk_obj=None):
+    """VTK static point locator on vtk_obj, that can be passed to VTK point filters with SetLocator(). The
+    search structure is not rebuilt by filters when only properties change, the cache takes care of that.
+    """
+    locator = vtkStaticPointLocator()
+    locator.SetDataSet(vtk_obj)
+    locator.BuildLocator()
+    locator.SetUseExistingSearchStructure(True)
+    return locator
+
+
+def build_octree(vtk_obj=None):
+    """VTK octree point locator on vtk_obj, that can also generate a representation of its octants."""
+    locator = vtkOctreePointLocator()
+    locator.SetDataSet(vtk_obj)
+    locator.BuildLocator()
+    locator.SetUseExistingSearchStructure(True)
+    return locator
+
+
+# Functions used to build each kind of index.
+INDEX_BUILDERS = {
+    "kdtree": build_kdtree,
+    "point_locator": build_point_locator,
+    "octree": build_octree,
+}
+
+
+class SpatialIndexCache:
+    """Cache of spatial indexes by entity uid and kind of index ("kdtree", "point_locator" or "octree").
+    A single cache belongs to the project, and entries are invalidated when geom_modified or entities_removed
+    are emitted, besides being checked against the modification time of the points."""
+
+    def __init__(self):
+        # (uid, kind) -> (geometry MTime, index)
+        self._entries = {}
+        # (uid, kind) -> (geometry MTime, future of an index built in background)
+        self._pending = {}
+        # uid -> path of a kd-tree saved with the project, loaded on first use
+        self._saved = {}
+        self._lock = Lock()
+        self._executor = None
+
+    def get(self, uid=None, vtk_obj=None, kind="kdtree"):
+        """Index of this kind for the entity with this uid, built if missing or if the points have changed."""
+        key = (uid, kind)
+        mtime = geometry_mtime(vtk_obj)
+        with self._lock:
+            entry = self._entries.get(key)
+            pending = self._pending.pop(key, None)
+        if entry is not None and entry[0] == mtime:
+            return entry[1]
+        index = None
+        if pending is not None and pending[0] == mtime:
+            try:
+                index = pending[1].result()
+            except Exception as exception:
+                print(f"background {kind} for {uid} failed: {exception}")
+        if index is None and kind == "kdtree" and uid in self._saved:
+            index = self._load(uid=uid, vtk_obj=vtk_obj)
+        if index is None:
+            index = INDEX_BUILDERS[kind](vtk_obj)
+        with self._lock:
+            self._entries[key] = (mtime, index)
+        return index
+
+    def kdtree(self, uid=None, vtk_obj=None):
+        """Scipy kd-tree on the points of the entity with this uid."""
+        return self.get(uid=uid, vtk_obj=vtk_obj, kind="kdtree")
+
+    def point_locator(self, uid=None, vtk_obj=None):
+        """VTK static point locator on the entity with this uid."""
+        return self.get(uid=uid, vtk_obj=vtk_obj, kind="point_locator")
+
+    def is_valid(self, uid=None, vtk_obj=None, kind="kdtree"):
+        """True if a valid index of this kind is cached for the entity with this uid."""
+        with self._lock:
+            entry = self._entries.get((uid, kind))
+        return entry is not None and entry[0] == geometry_mtime(vtk_obj)
+
+    def prefetch(self, uid=None, vtk_obj=None, kind="kdtree"):
+        """Start building the index in a background thread, if it is not already valid or being built.
+        The index is collected by the first call to get()."""
+        key = (uid, kind)
+        mtime = geometry_mtime(vtk_obj)
+        if self.is_valid(uid=uid, vtk_obj=vtk_obj, kind=kind):
+            return
+        with self._lock:
+            pending = self._pending.get(key)
+            if pending is not None and pending[0] == mtime:
+                return
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="spatial_index"
+                )
+            self._pending[key] = (
+                mtime,
+                self._executor.submit(INDEX_BUILDERS[kind], vtk_obj),
+            )
+
+    def invalidate(self, uids=None):
+        """Discard indexes of the entities with these uids, or of all entities if uids is None."""
+        with self._lock:
+            if uids is None:
+                self._entries.clear()
+                self._pending.clear()
+                self._saved.clear()
+                return
+            uids = set(uids)
+            for cache in (self._entries, self._pending):
+                for key in [key for key in cache if key[0] in uids]:
+                    del cache[key]
+            for uid in uids:
+                self._saved.pop(uid, None)
+
+    def save(self, uid=None, vtk_obj=None, path=None):
+        """Write the cached kd-tree of the entity with this uid to path, if a valid one exists, without building
+        it. Returns True if the file has been written."""
+        if not self.is_valid(uid=uid, vtk_obj=vtk_obj, kind="kdtree"):
+            return False
+        with open(path, "wb") as file:
+            pickle_dump(
+                self._entries[(uid, "kdtree")][1],
+                file,
+                protocol=pickle_HIGHEST_PROTOCOL,
+            )
+        return True
+
+    def register_saved(self, uid=None, path=None):
+        """Record a kd-tree file saved with the project for the entity with this uid, if it exists."""
+        if os_path.isfile(path):
+            self._saved[uid] = path
+
+    def _load(self, uid=None, vtk_obj=None):
+        """Read the saved kd-tree of the entity with this uid, that is used only if it has been built on
+        exactly the same points. Returns None otherwise."""
+        path = self._saved.pop(uid)
+        try:
+            with open(path, "rb") as file:
+                tree = _IndexUnpickler(file).load()
+        except Exception as exception:
+            print(f"kd-tree file {path} not loaded: {exception}")
+            return None
+        if not isinstance(tree, cKDTree):
+            return None
+        points = vtk_to_numpy(vtk_obj.GetPoints().GetData())
+        if tree.data.shape != points.shape or not np_array_equal(tree.data, points):
+            return None
+        return tree
@@ -0,0 +1,365 @@
+"""surface_reconstruction.py
+PZero© Andrea Bistacchi"""
+
+from collections import deque
+from math import ceil, isinf
+
+from numpy import all as np_all
+from numpy import arange as np_arange
+from numpy import argsort as np_argsort
+from numpy import array_split as np_array_split
+from numpy import ascontiguousarray as np_ascontiguousarray
+from numpy import concatenate as np_concatenate
+from numpy import empty as np_empty
+from numpy import float32 as np_float32
+from numpy import float64 as np_float64
+from numpy import inf as np_inf
+from numpy import median as np_median
+from numpy import meshgrid as np_meshgrid
+from numpy import ptp as np_ptp
+
+from scipy.ndimage import map_coordinates as sp_map_coordinates
+from scipy.spatial import cKDTree as sp_cKDTree
+
+from vtkmodules.util.numpy_support import numpy_to_vtk, vtk_to_numpy
+from vtkmodules.vtkCommonCore import vtkPoints
+from vtkmodules.vtkCommonDataModel import vtkImageData, vtkPolyData
+from vtkmodules.vtkFiltersCore import vtkContourFilter
+from vtkmodules.vtkImagingHybrid import vtkSurfaceReconstructionFilter
+
+from pzero.helpers.batch_executor import run_batch
+
+"""Surface reconstruction from point clouds with vtkSurfaceReconstructionFilter, scaled to large point sets.
+Input points are wrapped in vtkPoints without copying the numpy arrays. When no sample spacing is given, the grid
+spacing follows the density of the points (the median distance to their nearest neighbours) instead of the
+bounding box volume. The time spent by vtkSurfaceReconstructionFilter to orient normals grows faster than the
+number of points, and its grid covers the whole bounding box, so large point sets are split in tiles along the
+two longest dimensions of the cloud, each with a similar number of points. Tiles overlap by a few grid cells and
+their signed distances are computed in parallel with run_batch(). Each tile resamples its signed distance on a
+lattice with the same origin and spacing for all tiles, in the nodes of its own core region, so the lattice is
+filled without gaps or duplicates and contoured once, and the surface has no cracks between tiles. The sign of each
+tile, that depends on how vtkSurfaceReconstructionFilter orients the normals, is made consistent with its
+neighbours where they overlap."""
+
+# Maximum number of points reconstructed in a single tile.
+MAX_TILE_POINTS = 5000
+
+# Width of the overlap between tiles, in grid cells.
+OVERLAP_CELLS = 5
+
+# Number of points used to estimate the sample density.
+DENSITY_SAMPLES = 10000
+
+# Border of the shared lattice around the points, in grid cells, as the border of vtkSurfaceReconstructionFilter.
+LATTICE_BORDER = 2
+
+# Nodes beyond the core region of a tile resampled to compare its sign with the neighbours.
+SIGN_NODES = 2
+
+
+def points_to_polydata(points=None):
+    """vtkPolyData with points and no cells, sharing memory with the (n, 3) numpy array points (that is copied
+    only if it is not a contiguous float array)."""
+    points = np_ascontiguousarray(points)
+    if points.dtype.kind != "f":
+        points = points.astype(np_float64)
+    vtk_points = vtkPoints()
+    # numpy_to_vtk keeps a reference to the array, that stays alive with the vtkPoints.
+    vtk_points.SetData(numpy_to_vtk(points, deep=False))
+    polydata = vtkPolyData()
+    polydata.SetPoints(vtk_points)
+    return polydata
+
+
+def density_spacing(points=None, neighbors: int = 4, n_samples: int = DENSITY_SAMPLES):
+    """Typical distance between neighbouring points: the median distance of a regular subset of points
+    to their neighbors-th nearest neighbour in the whole set."""
+    step = max(1, len(points) // n_samples)
+    distances, _ = sp_cKDTree(points).query(points[::step], k=neighbors + 1)
+    return float(np_median(distances[:, -1]))
+
+
+def _split_indices(values=None, n_parts: int = 1):
+    """Split the indices of values in n_parts groups of consecutive values with the same number of elements.
+    Returns a list of (indices, low, high), where low and high bound the values of each group.
+    """
+    order = np_argsort(values, kind="stable")
+    parts = [part for part in np_array_split(order, n_parts) if len(part) > 0]
+    out_parts = []
+    for i, part in enumerate(parts):
+        low = -np_inf if i == 0 else float(values[part[0]])
+        high = np_inf if i == len(parts) - 1 else float(values[parts[i + 1][0]])
+        out_parts.append((part, low, high))
+    return out_parts
+
+
+def tile_regions(points=None, max_tile_points: int = MAX_TILE_POINTS):
+    """Core regions of the tiles, as a list of (axes, lows, highs), where axes are the two longest dimensions
+    of the point cloud. Each region contains about max_tile_points points, and regions on the border extend to
+    infinity."""
+    n_tiles = ceil(len(points) / max_tile_points)
+    extents = np_ptp(points, axis=0)
+    axes = [int(axis) for axis in np_argsort(extents)[::-1][:2]]
+    ratio = extents[axes[0]] / max(extents[axes[1]], 1e-12)
+    n_u = max(1, min(n_tiles, round((n_tiles * ratio) ** 0.5)))
+    n_v = ceil(n_tiles / n_u)
+    regions = []
+    for slab, u_low, u_high in _split_indices(points[:, axes[0]], n_u):
+        for _, v_low, v_high in _split_indices(points[slab, axes[1]], n_v):
+            regions.append((axes, (u_low, v_low), (u_high, v_high)))
+    return regions
+
+
+def _in_region(coords=None, axes=None, lows=None, highs=None, margin: float = 0.0):
+    """Boolean mask of coordinates inside a region enlarged by margin."""
+    return np_all(
+        [
+            (coords[:, axis] >= low - margin) & (coords[:, axis] < high + margin)
+            for axis, low, high in zip(axes, lows, highs)
+        ],
+        axis=0,
+    )
+
+
+def signed_distance(
+    points=None, sample_spacing: float = None, neighborhood_size: int = 20
+):
+    """Signed distance from the surface through an (n, 3) array of points, computed by
+    vtkSurfaceReconstructionFilter on a grid around the points. Returns a vtkImageData.
+    """
+    surf_from_points = vtkSurfaceReconstructionFilter()
+    surf_from_points.SetInputData(points_to_polydata(points))
+    surf_from_points.SetSampleSpacing(sample_spacing)
+    surf_from_points.SetNeighborhoodSize(int(neighborhood_size))
+    surf_from_points.Update()  # executes the interpolation. Output is vtkImageData
+    return surf_from_points.GetOutput()
+
+
+def _contour(image=None):
+    """Triangulated zero level of a signed distance vtkImageData. Returns a vtkPolyData."""
+    contour_surface = vtkContourFilter()
+    contour_surface.SetInputData(image)
+    contour_surface.SetValue(0, 0.0)
+    # The scalars of the contour would all be zero.
+    contour_surface.ComputeScalarsOff()
+    contour_surface.Update()
+    return contour_surface.GetOutput()
+
+
+def reconstruct(points=None, sample_spacing: float = None, neighborhood_size: int = 20):
+    """Reconstruct a triangulated surface from an (n, 3) array of points with vtkSurfaceReconstructionFilter,
+    contouring its signed distance grid at zero. Returns a vtkPolyData."""
+    return _contour(
+        signed_distance(
+            points=points,
+            sample_spacing=sample_spacing,
+            neighborhood_size=neighborhood_size,
+        )
+    )
+
+
+def shared_lattice(points=None, sample_spacing: float = None):
+    """Origin and dimensions of the lattice, with spacing sample_spacing, shared by all tiles of a point cloud."""
+    origin = points.min(axis=0) - LATTICE_BORDER * sample_spacing
+    dims = [
+        ceil(extent / sample_spacing) + 2 * LATTICE_BORDER + 1
+        for extent in np_ptp(points, axis=0)
+    ]
+    return origin, dims
+
+
+def _node_range(low=None, high=None, origin=None, spacing=None, dim=None):
+    """Indexes (start, stop) of the lattice nodes with low <= coordinate < high along an axis."""
+    start = 0 if isinf(low) else min(max(ceil((low - origin) / spacing), 0), dim)
+    stop = dim if isinf(high) else min(max(ceil((high - origin) / spacing), 0), dim)
+    return start, stop
+
+
+def node_box(region=None, origin=None, spacing: float = None, dims=None):
+    """Lattice nodes in the core region of a tile, as (start, stop) indexes along x, y and z."""
+    axes, lows, highs = region
+    box = [(0, dim) for dim in dims]
+    for axis, low, high in zip(axes, lows, highs):
+        box[axis] = _node_range(
+            low=low, high=high, origin=origin[axis], spacing=spacing, dim=dims[axis]
+        )
+    return box
+
+
+def _grow_box(box=None, axes=None, nodes: int = 0, dims=None):
+    """Box enlarged by nodes along axes, within the lattice."""
+    box = list(box)
+    for axis in axes:
+        box[axis] = (
+            max(box[axis][0] - nodes, 0),
+            min(box[axis][1] + nodes, dims[axis]),
+        )
+    return box
+
+
+def resample_on_lattice(image=None, box=None, origin=None, spacing: float = None):
+    """Values of a vtkImageData at the lattice nodes of box, with trilinear interpolation and the nearest
+    value of the image outside it. Returns a float32 array with shape (nz, ny, nx) as VTK images.
+    """
+    values = vtk_to_numpy(image.GetPointData().GetScalars()).reshape(
+        image.GetDimensions()[::-1]
+    )
+    image_origin = image.GetOrigin()
+    image_spacing = image.GetSpacing()
+    # Fractional indexes of the lattice nodes in the image, in z, y, x order.
+    indexes = [
+        (origin[axis] + np_arange(*box[axis]) * spacing - image_origin[axis])
+        / image_spacing[axis]
+        for axis in (2, 1, 0)
+    ]
+    return sp_map_coordinates(
+        values,
+        np_meshgrid(*indexes, indexing="ij"),
+        order=1,
+        mode="nearest",
+        output=np_float32,
+    )
+
+
+def _overlap(box_a=None, box_b=None):
+    """Intersection of two boxes of lattice nodes, or None."""
+    box = [(max(a[0], b[0]), min(a[1], b[1])) for a, b in zip(box_a, box_b)]
+    return box if all(start < stop for start, stop in box) else None
+
+
+def _box_slice(box=None, inner=None):
+    """Slice, in z, y, x order, of the nodes of inner in an array with the nodes of box."""
+    return tuple(
+        slice(inner[axis][0] - box[axis][0], inner[axis][1] - box[axis][0])
+        for axis in (2, 1, 0)
+    )
+
+
+def orient_tiles(boxes=None, values=None):
+    """Signs (+1 or -1) that make the signed distances of the tiles agree where their boxes overlap,
+    propagated from the first tile to its neighbours."""
+    signs = [0] * len(boxes)
+    for first in range(len(boxes)):
+        if signs[first]:
+            continue
+        signs[first] = 1
+        queue = deque([first])
+        while queue:
+            i = queue.popleft()
+            for j in range(len(boxes)):
+                if signs[j]:
+                    continue
+                overlap = _overlap(boxes[i], boxes[j])
+                if overlap is None:
+                    continue
+                agreement = float(
+                    (
+                        values[i][_box_slice(boxes[i], overlap)].astype(np_float64)
+                        * values[j][_box_slice(boxes[j], overlap)]
+                    ).sum()
+                )
+                signs[j] = signs[i] if agreement >= 0 else -signs[i]
+                queue.append(j)
+    return signs
+
+
+def _tile_pipeline(item=None):
+    """Signed distance of one tile on the shared lattice, passed as
+    (points, box, origin, sample_spacing, neighborhood_size)."""
+    points, box, origin, sample_spacing, neighborhood_size = item
+    image = signed_distance(
+        points=points,
+        sample_spacing=sample_spacing,
+        neighborhood_size=neighborhood_size,
+    )
+    return resample_on_lattice(
+        image=image, box=box, origin=origin, spacing=sample_spacing
+    )
+
+
+def reconstruct_surface(
+    points=None,
+    sample_spacing: float = None,
+    neighborhood_size: int = 20,
+    max_tile_points: int = MAX_TILE_POINTS,
+    workers: int = None,
+):
+    """Reconstruct a triangulated surface from an (n, 3) array of points. If sample_spacing is None or not
+    positive, it is estimated from the density of the points. Point sets larger than max_tile_points are
+    split in overlapping tiles, whose signed distances are computed in parallel on a shared lattice and
+    contoured together. Returns the vtkPolyData surface and the number of tiles."""
+    if sample_spacing is None or sample_spacing <= 0:
+        sample_spacing = density_spacing(points)
+    if len(points) <= max_tile_points:
+        return (
+            reconstruct(
+                points=points,
+                sample_spacing=sample_spacing,
+                neighborhood_size=neighborhood_size,
+            ),
+            1,
+        )
+    origin, dims = shared_lattice(points=points, sample_spacing=sample_spacing)
+    margin = OVERLAP_CELLS * sample_spacing
+    inputs = []
+    core_boxes = []
+    for i, (axes, lows, highs) in enumerate(
+        tile_regions(points=points, max_tile_points=max_tile_points)
+    ):
+        core_box = node_box(
+            region=(axes, lows, highs),
+            origin=origin,
+            spacing=sample_spacing,
+            dims=dims,
+        )
+        if any(start == stop for start, stop in core_box):
+            continue
+        tile_points = points[
+            _in_region(coords=points, axes=axes, lows=lows, highs=highs, margin=margin)
+        ]
+        inputs.append(
+            (
+                i,
+                (
+                    tile_points,
+                    _grow_box(box=core_box, axes=axes, nodes=SIGN_NODES, dims=dims),
+                    origin,
+                    sample_spacing,
+                    neighborhood_size,
+                ),
+            )
+        )
+        core_boxes.append(core_box)
+    results = run_batch(pipeline=_tile_pipeline, inputs=inputs, workers=workers)
+    for result in results:
+        if result["error"] is not None:
+            raise result["error"]
+    boxes = [item[1] for _, item in inputs]
+    values = [result["output"] for result in results]
+    signs = orient_tiles(boxes=boxes, values=values)
+    # Core regions partition the lattice, so each node is filled by exactly one tile.
+    lattice_values = np_empty(dims[::-1], dtype=np_float32)
+    for box, core_box, tile_values, sign in zip(boxes, core_boxes, values, signs):
+        lattice_values[_box_slice(box=[(0, dim) for dim in dims], inner=core_box)] = (
+            sign * tile_values[_box_slice(box=box, inner=core_box)]
+        )
+    lattice = vtkImageData()
+    lattice.SetOrigin(origin)
+    lattice.SetSpacing(sample_spacing, sample_spacing, sample_spacing)
+    lattice.SetDimensions(dims)
+    lattice.GetPointData().SetScalars(
+        numpy_to_vtk(lattice_values.reshape(-1), deep=False)
+    )
+    return _contour(lattice), len(inputs)
+
+
+def gather_points(vtk_objs=None):
+    """Points of several vtk objects as a single (n, 3) array, without copy for a single object."""
+    arrays = [
+        vtk_to_numpy(vtk_obj.GetPoints().GetData())
+        for vtk_obj in vtk_objs
+        if vtk_obj.GetPoints() is not None and vtk_obj.GetNumberOfPoints() > 0
+    ]
+    if len(arrays) == 1:
+        return arrays[0]
+    return np_concatenate(arrays) if arrays else None
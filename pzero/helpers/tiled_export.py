@@ -0,0 +1,377 @@
+"""tiled_export.py
+PZero© Andrea Bistacchi"""
+
+from math import atan, ceil, degrees, radians, tan
+
+from numpy import empty as np_empty
+from numpy import uint8 as np_uint8
+
+from pyvista import LookupTable as pv_LookupTable
+
+from vtkmodules.util.numpy_support import vtk_to_numpy
+from vtkmodules.vtkCommonCore import vtkLookupTable
+from vtkmodules.vtkRenderingAnnotation import vtkCornerAnnotation, vtkScalarBarActor
+from vtkmodules.vtkRenderingCore import (
+    vtkActor,
+    vtkProperty,
+    vtkTextActor,
+    vtkTexture,
+    vtkWindowToImageFilter,
+)
+
+"""Export of views at high resolution. Actors of the view are cloned for the off-screen export plotter with a new
+mapper and property that share the input data, lookup table, scalar settings and texture image of the view actors,
+so nothing is wrapped again or coloured again, and only the clones upload geometry to the export render window.
+Images larger than TILE_SIZE are rendered in tiles with a render window of the size of one tile: for each tile the
+camera is narrowed by the number of tiles and its window centre shifted onto the tile, 2D actors (title, scalar
+bars) are moved to their position in the whole image, and vertical gradient backgrounds are split between tile
+rows. Tiles are copied into the output image, so the memory used by the render window does not depend on the
+output resolution. Rendering uses the off-screen render window of VTK, so it also works headless with VTK builds
+using OSMesa or EGL."""
+
+# Largest width or height of the render window used for exports, in pixels.
+TILE_SIZE = 2048
+
+# Margin, in pixels, of corner annotations from the image border.
+CORNER_MARGIN = 5
+
+# Position in the image, and horizontal and vertical justification, of the text in each corner of a
+# vtkCornerAnnotation: lower left, lower right, upper left, upper right, lower edge, right edge, left edge, upper edge.
+CORNER_LAYOUT = [
+    (0.0, 0.0, "Left", "Bottom"),
+    (1.0, 0.0, "Right", "Bottom"),
+    (0.0, 1.0, "Left", "Top"),
+    (1.0, 1.0, "Right", "Top"),
+    (0.5, 0.0, "Centered", "Bottom"),
+    (1.0, 0.5, "Right", "Centered"),
+    (0.0, 0.5, "Left", "Centered"),
+    (0.5, 1.0, "Centered", "Top"),
+]
+
+
+def tile_grid(width: int = None, height: int = None, tile_size: int = TILE_SIZE):
+    """Number of tiles per side and size of each tile to render a width x height image. The tiles cover an
+    image of (n_tiles * tile_width) x (n_tiles * tile_height) pixels, that is at most n_tiles - 1 pixels larger
+    than requested on each side, with the same camera framing."""
+    n_tiles = max(1, ceil(max(width, height) / tile_size))
+    return n_tiles, ceil(width / n_tiles), ceil(height / n_tiles)
+
+
+# ----------------------------------------------------------------------------- actors
+
+
+def clone_actor(
+    actor=None, line_width_scale: float = 1.0, point_size_scale: float = 1.0
+):
+    """New vtkActor for another render window, with a mapper of the same class sharing input data, lookup
+    table and scalar settings, a copy of the property with scaled line width and point size, and a texture
+    sharing the same image. Mappers and textures are not shared between render windows, since they hold GPU
+    resources of their own window."""
+    mapper = actor.GetMapper()
+    clone_mapper = mapper.NewInstance()
+    clone_mapper.ShallowCopy(mapper)
+    if clone_mapper.GetInputConnection(0, 0) is None:
+        clone_mapper.SetInputDataObject(mapper.GetInputDataObject(0, 0))
+    clone = vtkActor()
+    clone.ShallowCopy(actor)
+    clone.SetMapper(clone_mapper)
+    prop = vtkProperty()
+    prop.DeepCopy(actor.GetProperty())
+    prop.SetLineWidth(max(prop.GetLineWidth() * line_width_scale, 1.0))
+    prop.SetPointSize(max(prop.GetPointSize() * point_size_scale, 3.0))
+    clone.SetProperty(prop)
+    texture = actor.GetTexture()
+    if texture is not None:
+        clone_texture = vtkTexture()
+        clone_texture.SetInputDataObject(texture.GetInputDataObject(0, 0))
+        clone_texture.SetInterpolate(texture.GetInterpolate())
+        clone_texture.SetRepeat(texture.GetRepeat())
+        clone_texture.SetEdgeClamp(texture.GetEdgeClamp())
+        clone_texture.SetColorMode(texture.GetColorMode())
+        clone.SetTexture(clone_texture)
+    return clone
+
+
+def colormap_lookup_table(cmap=None, scalar_range=None):
+    """Lookup table with a named colormap (matplotlib or colorcet) over scalar_range."""
+    lookup_table = pv_LookupTable(cmap=cmap)
+    lookup_table.scalar_range = scalar_range
+    return lookup_table
+
+
+def _maps_scalars(mapper=None) -> bool:
+    """True for mappers that colour their actor with a lookup table."""
+    return bool(mapper.GetScalarVisibility()) and mapper.GetColorMode() != 2
+
+
+def add_shared_actors(
+    source_renderer=None,
+    target_renderer=None,
+    line_width_scale: float = 1.0,
+    point_size_scale: float = 1.0,
+    lookup_table_factory=None,
+) -> list:
+    """Add clones of the visible actors of source_renderer, with data, to target_renderer. If
+    lookup_table_factory is given, it is called with the scalar range of each actor coloured with scalars, and
+    the lookup table it returns replaces the shared one (e.g. to export with another colormap). Returns the
+    clones coloured with scalars, to add scalar bars."""
+    scalar_clones = []
+    for actor in list(source_renderer.GetActors()):
+        if not isinstance(actor, vtkActor) or not actor.GetVisibility():
+            continue
+        mapper = actor.GetMapper()
+        if mapper is None or mapper.GetInputDataObject(0, 0) is None:
+            continue
+        clone = clone_actor(
+            actor=actor,
+            line_width_scale=line_width_scale,
+            point_size_scale=point_size_scale,
+        )
+        target_renderer.AddActor(clone)
+        if _maps_scalars(mapper):
+            if lookup_table_factory is not None:
+                clone.GetMapper().SetLookupTable(
+                    lookup_table_factory(mapper.GetScalarRange())
+                )
+                clone.GetMapper().SetScalarRange(mapper.GetScalarRange())
+            scalar_clones.append(clone)
+    return scalar_clones
+
+
+def scalar_bar_actors(clones=None, color=(1.0, 1.0, 1.0), font_size: int = 16) -> list:
+    """One scalar bar for each array name shown with a lookup table by the clones."""
+    bars = {}
+    for clone in clones:
+        mapper = clone.GetMapper()
+        title = mapper.GetArrayName() or ""
+        if title in bars or not isinstance(mapper.GetLookupTable(), vtkLookupTable):
+            continue
+        bar = vtkScalarBarActor()
+        bar.SetLookupTable(mapper.GetLookupTable())
+        bar.SetTitle(title)
+        bar.UnconstrainedFontSizeOn()
+        for text_property in [bar.GetTitleTextProperty(), bar.GetLabelTextProperty()]:
+            text_property.SetColor(color)
+            text_property.ShadowOff()
+        bar.GetTitleTextProperty().SetFontSize(font_size)
+        bar.GetLabelTextProperty().SetFontSize(max(8, font_size - 4))
+        bar.SetPosition(0.9 - 0.1 * len(bars), 0.1)
+        bar.SetWidth(0.08)
+        bar.SetHeight(0.8)
+        bars[title] = bar
+    return list(bars.values())
+
+
+# ----------------------------------------------------------------------------- tiles
+
+
+class _TiledView:
+    """Camera, 2D actors, additional renderers and gradient background of a render window set up for the
+    tiles of an image n_tiles times larger, restored by restore()."""
+
+    def __init__(self, render_window=None, renderer=None, n_tiles: int = 1):
+        self.render_window = render_window
+        self.renderer = renderer
+        self.n_tiles = n_tiles
+        self.tile_size = render_window.GetSize()
+        camera = renderer.GetActiveCamera()
+        self.camera = camera
+        self.window_center = camera.GetWindowCenter()
+        self.view_angle = camera.GetViewAngle()
+        self.parallel_scale = camera.GetParallelScale()
+        self.gradient = bool(renderer.GetGradientBackground())
+        self.background = renderer.GetBackground()
+        self.background2 = renderer.GetBackground2()
+        self.other_renderers = [
+            (other, other.GetDraw())
+            for other in _renderers(render_window)
+            if other is not renderer
+        ]
+        # Narrow the camera to one tile.
+        camera.SetViewAngle(
+            degrees(2.0 * atan(tan(radians(self.view_angle) / 2.0) / n_tiles))
+        )
+        camera.SetParallelScale(self.parallel_scale / n_tiles)
+        # Place 2D actors at display coordinates in the whole image.
+        self.actors_2d = []
+        for actor in list(renderer.GetActors2D()):
+            if not actor.GetVisibility() or isinstance(actor, vtkCornerAnnotation):
+                continue
+            coords = [actor.GetPositionCoordinate(), actor.GetPosition2Coordinate()]
+            saved = [
+                (
+                    coord.GetCoordinateSystem(),
+                    coord.GetReferenceCoordinate(),
+                    coord.GetValue(),
+                )
+                for coord in coords
+            ]
+            display = [
+                [
+                    value * n_tiles
+                    for value in coord.GetComputedDoubleDisplayValue(renderer)
+                ]
+                for coord in coords
+            ]
+            for coord in coords:
+                coord.SetReferenceCoordinate(None)
+                coord.SetCoordinateSystemToDisplay()
+            self.actors_2d.append((coords, saved, display))
+        # Corner annotations are laid out in each viewport, so they are replaced by text actors laid out in the
+        # whole image, with the font size they would have in it.
+        self.corner_annotations = []
+        self.corner_texts = []
+        width, height = self.tile_size[0] * n_tiles, self.tile_size[1] * n_tiles
+        for actor in list(renderer.GetActors2D()):
+            if not isinstance(actor, vtkCornerAnnotation) or not actor.GetVisibility():
+                continue
+            font_size = actor.GetLinearFontScaleFactor() * (width * height) ** (
+                actor.GetNonlinearFontScaleFactor()
+            )
+            font_size = int(
+                min(
+                    max(font_size, actor.GetMinimumFontSize()),
+                    actor.GetMaximumFontSize(),
+                )
+            )
+            for corner, (rel_x, rel_y, justification, vertical) in enumerate(
+                CORNER_LAYOUT
+            ):
+                text = actor.GetText(corner)
+                if not text:
+                    continue
+                text_actor = vtkTextActor()
+                text_actor.SetInput(text)
+                text_actor.GetTextProperty().ShallowCopy(actor.GetTextProperty())
+                text_actor.GetTextProperty().SetFontSize(font_size)
+                text_property = text_actor.GetTextProperty()
+                getattr(text_property, f"SetJustificationTo{justification}")()
+                getattr(text_property, f"SetVerticalJustificationTo{vertical}")()
+                coord = text_actor.GetPositionCoordinate()
+                coord.SetCoordinateSystemToDisplay()
+                display = [
+                    (
+                        CORNER_MARGIN + rel_x * (width - 2 * CORNER_MARGIN),
+                        CORNER_MARGIN + rel_y * (height - 2 * CORNER_MARGIN),
+                    )
+                ]
+                renderer.AddActor2D(text_actor)
+                self.corner_texts.append(text_actor)
+                self.actors_2d.append(([coord], None, display))
+            actor.VisibilityOff()
+            self.corner_annotations.append(actor)
+
+    def set_tile(self, x: int = 0, y: int = 0):
+        """Set up the render window for tile x, y, counted from the bottom left corner."""
+        n_tiles = self.n_tiles
+        self.camera.SetWindowCenter(
+            x * 2 - n_tiles * (1 - self.window_center[0]) + 1,
+            y * 2 - n_tiles * (1 - self.window_center[1]) + 1,
+        )
+        for coords, _, display in self.actors_2d:
+            for coord, (display_x, display_y) in zip(coords, display):
+                coord.SetValue(
+                    display_x - x * self.tile_size[0],
+                    display_y - y * self.tile_size[1],
+                    0.0,
+                )
+        # Orientation axes and other overlays are drawn once, in the bottom left tile.
+        for other, draw in self.other_renderers:
+            other.SetDraw(draw if x == 0 and y == 0 else 0)
+        if self.gradient:
+            self.renderer.SetBackground(
+                _blend(self.background, self.background2, y / n_tiles)
+            )
+            self.renderer.SetBackground2(
+                _blend(self.background, self.background2, (y + 1) / n_tiles)
+            )
+
+    def restore(self):
+        self.camera.SetWindowCenter(*self.window_center)
+        self.camera.SetViewAngle(self.view_angle)
+        self.camera.SetParallelScale(self.parallel_scale)
+        for text_actor in self.corner_texts:
+            self.renderer.RemoveActor2D(text_actor)
+        for actor in self.corner_annotations:
+            actor.VisibilityOn()
+        for coords, saved, _ in self.actors_2d:
+            if saved is None:
+                continue
+            for coord, (system, reference, value) in zip(coords, saved):
+                coord.SetCoordinateSystem(system)
+                coord.SetReferenceCoordinate(reference)
+                coord.SetValue(value)
+        for other, draw in self.other_renderers:
+            other.SetDraw(draw)
+        self.renderer.SetBackground(self.background)
+        self.renderer.SetBackground2(self.background2)
+
+
+def _renderers(render_window=None) -> list:
+    renderers = render_window.GetRenderers()
+    renderers.InitTraversal()
+    return [renderers.GetNextItem() for _ in range(renderers.GetNumberOfItems())]
+
+
+def _blend(color_0=None, color_1=None, t: float = 0.0):
+    return tuple(c0 + (c1 - c0) * t for c0, c1 in zip(color_0, color_1))
+
+
+def render_tiled(
+    render_window=None,
+    renderer=None,
+    width: int = None,
+    height: int = None,
+    transparent: bool = False,
+):
+    """Render the scene of renderer at width x height pixels, in tiles of the current size of render_window
+    (see tile_grid), and return the image as a (height, width, 3) uint8 array, or (height, width, 4) with
+    transparent background, with the top row first. For a transparent background, alpha bit planes should be
+    set before the first render of render_window, otherwise its context is recreated with them.
+    """
+    if transparent and not render_window.GetAlphaBitPlanes():
+        # The alpha bit planes are requested when the context is created, so a window that was already rendered
+        # is finalized and its context recreated by the next render.
+        render_window.SetAlphaBitPlanes(1)
+        if not render_window.GetNeverRendered():
+            render_window.Finalize()
+    tile_width, tile_height = render_window.GetSize()
+    n_tiles = max(ceil(width / tile_width), ceil(height / tile_height))
+    channels = 4 if transparent else 3
+    image = np_empty(
+        (n_tiles * tile_height, n_tiles * tile_width, channels), dtype=np_uint8
+    )
+    window_to_image = vtkWindowToImageFilter()
+    window_to_image.SetInput(render_window)
+    window_to_image.ReadFrontBufferOff()
+    window_to_image.ShouldRerenderOff()
+    if transparent:
+        window_to_image.SetInputBufferTypeToRGBA()
+        background_alpha = renderer.GetBackgroundAlpha()
+        renderer.SetBackgroundAlpha(0.0)
+    tiled_view = _TiledView(
+        render_window=render_window, renderer=renderer, n_tiles=n_tiles
+    )
+    try:
+        for y in range(n_tiles):
+            for x in range(n_tiles):
+                tiled_view.set_tile(x=x, y=y)
+                render_window.Render()
+                window_to_image.Modified()
+                window_to_image.Update()
+                tile = vtk_to_numpy(
+                    window_to_image.GetOutput().GetPointData().GetScalars()
+                ).reshape(tile_height, tile_width, channels)
+                # VTK images start from the bottom row.
+                row = (n_tiles - 1 - y) * tile_height
+                image[
+                    row : row + tile_height, x * tile_width : (x + 1) * tile_width
+                ] = tile[::-1]
+    finally:
+        tiled_view.restore()
+        if transparent:
+            renderer.SetBackgroundAlpha(background_alpha)
+    # Crop the few extra pixels of the tiles evenly on each side.
+    top = (image.shape[0] - height) // 2
+    left = (image.shape[1] - width) // 2
+    return image[top : top + height, left : left + width]
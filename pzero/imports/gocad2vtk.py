@@ -3,28 +3,40 @@ PZero© Andrea Bistacchi"""
 
 from uuid import uuid4
 from copy import deepcopy
-
+from re import compile as re_compile
+from re import MULTILINE
+from warnings import catch_warnings, simplefilter
+
+from numpy import arange as np_arange
+from numpy import array as np_array
+from numpy import array_equal as np_array_equal
+from numpy import asarray as np_asarray
+from numpy import ascontiguousarray as np_ascontiguousarray
 from numpy import column_stack as np_column_stack
-from numpy import shape as np_shape
+from numpy import concatenate as np_concatenate
+from numpy import empty as np_empty
+from numpy import float32 as np_float32
+from numpy import float64 as np_float64
+from numpy import fromstring as np_fromstring
+from numpy import full as np_full
+from numpy import int64 as np_int64
+from numpy import nan as np_nan
+from numpy import zeros as np_zeros
 from numpy import rad2deg as np_rad2deg
 from numpy import arctan2 as np_arctan2
 from numpy import sqrt as np_sqrt
 
 from vtk import (
     vtkPoints,
-    vtkCellArray,
-    vtkDataArrayCollection,
-    vtkFloatArray,
-    vtkLine,
-    vtkTriangle,
-    vtkVertex,
     vtkAppendPolyData,
 )
 from vtkmodules.numpy_interface.dataset_adapter import WrapDataObject
+from vtkmodules.util.numpy_support import numpy_to_vtk
 
 from pzero.collections.boundary_collection import BoundaryCollection
 from pzero.collections.geological_collection import GeologicalCollection
 from pzero.entities_factory import (
+    cell_array_from_numpy,
     VertexSet,
     PolyLine,
     TriSurf,
@@ -97,6 +109,184 @@ from pzero.collections.xsection_collection import XSectionCollection
 #     'BORDER'
 
 
+# Keywords of the GOCAD records with vertex coordinates and topology. These records make up almost all the lines of a
+# large file, so they are not parsed line by line but collected for each object and converted to numpy in bulk.
+GOCAD_RECORD_KEYWORDS = ["VRTX", "PVRTX", "ATOM", "SEG", "TRGL"]
+
+_GOCAD_OBJECT_START = re_compile(r"^[ \t]*GOCAD[ \t]+(\S+)", MULTILINE)
+_GOCAD_RECORDS = {
+    keyword: re_compile(rf"^[ \t]*{keyword}[ \t]+(.*?)[ \t]*$", MULTILINE)
+    for keyword in GOCAD_RECORD_KEYWORDS
+}
+_GOCAD_RECORD_LINES = re_compile(
+    r"^[ \t]*(?:" + "|".join(GOCAD_RECORD_KEYWORDS) + r")[ \t].*\n?", MULTILINE
+)
+
+
+def _parse_gocad_records(rows=None, n_columns=None):
+    """Convert a list of GOCAD records (the fields following the keyword) to a (n_rows, n_columns) float64 array
+    with a single numpy call. Records with additional non-numeric fields (e.g. CNXYZ flags) are split one by one.
+    """
+    if not rows:
+        return np_empty((0, n_columns), dtype=np_float64)
+    try:
+        with catch_warnings():
+            simplefilter("error", DeprecationWarning)
+            values = np_fromstring(" ".join(rows), dtype=np_float64, sep=" ")
+        if values.size == len(rows) * n_columns:
+            return values.reshape((len(rows), n_columns))
+    except (ValueError, DeprecationWarning):
+        pass
+    return np_array([row.split()[:n_columns] for row in rows], dtype=np_float64)
+
+
+def _read_gocad_block(gocad_type=None, block=None):
+    """Parse the text of a single GOCAD object. See read_gocad_objects()."""
+    # Header lines are all lines that are not vertex or topology records.
+    header = [
+        line for line in _GOCAD_RECORD_LINES.sub("", block).splitlines() if line.strip()
+    ]
+    properties_names = []
+    properties_components = []
+    for line in header:
+        clean_line = line.split()
+        if clean_line[0] == "PROPERTIES":
+            properties_names = clean_line[1:]
+        elif clean_line[0] == "ESIZES":
+            properties_components = [int(size) for size in clean_line[1:]]
+    if len(properties_components) != len(properties_names):
+        # ESIZES missing or inconsistent, so properties are assumed to be scalars.
+        properties_components = [1] * len(properties_names)
+    vrtx = _parse_gocad_records(_GOCAD_RECORDS["VRTX"].findall(block), 4)
+    pvrtx = _parse_gocad_records(
+        _GOCAD_RECORDS["PVRTX"].findall(block), 4 + sum(properties_components)
+    )
+    atoms = _parse_gocad_records(_GOCAD_RECORDS["ATOM"].findall(block), 2)
+    # "-1" since first vertex has index 0 in VTK
+    vrtx_ids = vrtx[:, 0].astype(np_int64) - 1
+    pvrtx_ids = pvrtx[:, 0].astype(np_int64) - 1
+    atoms = atoms.astype(np_int64) - 1
+    all_ids = np_concatenate([vrtx_ids, pvrtx_ids, atoms[:, 0]])
+    n_points = int(all_ids.max()) + 1 if all_ids.size > 0 else 0
+    points = np_zeros((n_points, 3), dtype=np_float64)
+    points[vrtx_ids] = vrtx[:, 1:4]
+    points[pvrtx_ids] = pvrtx[:, 1:4]
+    # Values of properties for vertexes defined by VRTX records, if any, are set to NaN.
+    properties = {}
+    column = 4
+    for name, components in zip(properties_names, properties_components):
+        values = np_full((n_points, components), np_nan, dtype=np_float64)
+        values[pvrtx_ids] = pvrtx[:, column : column + components]
+        properties[name] = values
+        column += components
+    if atoms.shape[0] > 0:
+        # ATOM id1 id2 (where id1 > id2) indicates a vertex with index id1 that shares the same XYZ position
+        # as a previous vertex with id2. This is used in Gocad to create co-located vertexes that are
+        # disconnected in topological sense. In PZero we create two independent vertexes with the same
+        # coordinates. Since id2 can be an atom itself, the original vertex is found by pointer jumping.
+        source = np_arange(n_points)
+        source[atoms[:, 0]] = atoms[:, 1]
+        while True:
+            next_source = source[source]
+            if np_array_equal(next_source, source):
+                break
+            source = next_source
+        points[atoms[:, 0]] = points[source[atoms[:, 0]]]
+        for values in properties.values():
+            values[atoms[:, 0]] = values[source[atoms[:, 0]]]
+    for name, values in properties.items():
+        if values.shape[1] == 1:
+            properties[name] = values[:, 0]
+    if gocad_type == "PLine":
+        cells = _parse_gocad_records(_GOCAD_RECORDS["SEG"].findall(block), 2)
+    elif gocad_type == "TSurf":
+        cells = _parse_gocad_records(_GOCAD_RECORDS["TRGL"].findall(block), 3)
+    else:
+        cells = None
+    if cells is not None:
+        cells = cells.astype(np_int64) - 1
+    return {
+        "type": gocad_type,
+        "header": header,
+        "points": points,
+        "properties": properties,
+        "cells": cells,
+    }
+
+
+def read_gocad_objects(in_file_name=None):
+    """
+    Block parser for GOCAD ASCII files. The file is read at once and split in objects starting with the GOCAD
+    keyword. For each object, VRTX, PVRTX, ATOM, SEG and TRGL records are converted to numpy arrays in bulk, and
+    a dictionary is returned with:
+    "type": the GOCAD object type (e.g. VSet, PLine, TSurf),
+    "header": all other lines, to be interpreted by the calling function,
+    "points": (n_points, 3) array of coordinates, where row i is the GOCAD vertex with id i + 1,
+    "properties": dictionary of point properties from PVRTX records, as (n_points,) or (n_points, n_components) arrays,
+    "cells": (n_cells, 2) array of SEG or (n_cells, 3) array of TRGL records with 0-based ids, or None for VSet.
+    """
+    with open(in_file_name, "rt") as fin:
+        text = fin.read()
+    starts = list(_GOCAD_OBJECT_START.finditer(text))
+    gocad_objects = []
+    for n, start in enumerate(starts):
+        end = starts[n + 1].start() if n + 1 < len(starts) else len(text)
+        gocad_objects.append(
+            _read_gocad_block(
+                gocad_type=start.group(1), block=text[start.start() : end]
+            )
+        )
+    return gocad_objects
+
+
+def gocad_object_to_vtk(gocad_object=None, vtk_obj=None, properties=True):
+    """
+    Copy points, cells and (optionally) properties of an object read by read_gocad_objects() to a
+    VertexSet, PolyLine or TriSurf (or their cross-section versions), building the VTK arrays directly
+    from numpy. Vertex sets get a vertex cell for each point.
+    """
+    vtk_points = vtkPoints()
+    vtk_points.SetData(numpy_to_vtk(gocad_object["points"], deep=True))
+    vtk_obj.SetPoints(vtk_points)
+    cells = gocad_object["cells"]
+    if cells is None:
+        n_points = gocad_object["points"].shape[0]
+        vtk_obj.SetVerts(cell_array_from_numpy(np_arange(n_points).reshape((-1, 1))))
+    elif cells.shape[1] == 2:
+        vtk_obj.SetLines(cell_array_from_numpy(cells))
+    else:
+        vtk_obj.SetPolys(cell_array_from_numpy(cells))
+    if properties:
+        for name, values in gocad_object["properties"].items():
+            vtk_array = numpy_to_vtk(
+                np_ascontiguousarray(values, dtype=np_float32), deep=True
+            )
+            vtk_array.SetName(name)
+            vtk_obj.GetPointData().AddArray(vtk_array)
+
+
+# Number of rows formatted at once by write_gocad_records(), to limit the size of temporary strings.
+GOCAD_WRITE_CHUNK = 100000
+
+
+def write_gocad_records(fout=None, keyword=None, values=None, numbered=False):
+    """
+    Write the rows of a numpy array as GOCAD records with the same keyword (e.g. VRTX, PVRTX, SEG, TRGL).
+    Values are converted to text by numpy and whole chunks of rows are formatted with a single string
+    operation. With numbered=True a record id starting from 1 is written after the keyword, as for VRTX and PVRTX.
+    """
+    values = np_asarray(values)
+    if values.ndim == 1:
+        values = values.reshape((-1, 1))
+    row_format = keyword + " %s" * (values.shape[1] + int(numbered)) + "\n"
+    for first in range(0, values.shape[0], GOCAD_WRITE_CHUNK):
+        chunk = values[first : first + GOCAD_WRITE_CHUNK].astype(str)
+        if numbered:
+            ids = np_arange(first + 1, first + 1 + chunk.shape[0]).astype(str)
+            chunk = np_column_stack([ids, chunk])
+        fout.write((row_format * chunk.shape[0]) % tuple(chunk.ravel().tolist()))
+
+
 def gocad2vtk(self=None, in_file_name=None, uid_from_name=None):
     """
     Read a GOCAD ASCII file and add, to the geol_coll GeologicalCollection(), all the
@@ -139,323 +329,137 @@ def gocad2vtk(self=None, in_file_name=None, uid_from_name=None):
         reset_legend = True
     else:
         reset_legend = False
-    # Open input file as fin.
-    fin = open(in_file_name, "rt")
     # Record the number of entities before importing and initialize entity_counter
     n_entities_before = self.geol_coll.get_number_of_entities
     entity_counter = 0
-    # Parse fin file.
-    for line in fin:
-        # Read one line from file ad decide what to do with it.
-        # The effect of the following if/elif cascade is to loop for every single object marked by
-        # GOCAD keywords (see above), reading the lines that we want to import and skipping the others.
-        clean_line = line.strip().split()
-        if clean_line[0] == "GOCAD":
-            # A new entity starts here in a GOCAD file, so here we create a new empty dictionary,
-            # then we will fill its components in the next lines. Use deepcopy otherwise the
-            # original dictionary would be altered.
-            curr_obj_dict = deepcopy(self.geol_coll.entity_dict)
-            curr_obj_dict["name"] = "undef"
-            curr_obj_dict["scenario"] = scenario_default
-            curr_obj_dict["role"] = role_default
-
-            # Store uid of new entity.
-            curr_obj_dict["uid"] = str(uuid4())
-
-            # Create the empty vtk object with class = topology.
-            if clean_line[1] == "VSet":
-                curr_obj_dict["topology"] = "VertexSet"
-                curr_obj_dict["vtk_obj"] = VertexSet()
-            elif clean_line[1] == "PLine":
-                curr_obj_dict["topology"] = "PolyLine"
-                curr_obj_dict["vtk_obj"] = PolyLine()
-            elif clean_line[1] == "TSurf":
-                curr_obj_dict["topology"] = "TriSurf"
-                curr_obj_dict["vtk_obj"] = TriSurf()
-            else:
-                # Here topology different from the allowed ones are handled.
-                # At the moment THIS WILL CAUSE ERRORS - KEEP THIS MESSAGE JUST FOR DEBUGGING.
-                # This must be reimplemented in such a way that, if non-valid objects are found,
-                # the file reader jumps to the next line starting with the 'GOCAD' keyword (if any).
-                self.print_terminal("gocad2vtk - entity type not recognized ERROR.")
-
-            # Create empty arrays for coordinates and topology and a counter for properties.
-            curr_obj_points = vtkPoints()
-            curr_obj_cells = vtkCellArray()
-            curr_obj_properties_collection = vtkDataArrayCollection()
-            properties_number = 0
-
-            # Initialize color
-            curr_obj_color_r = None
-            curr_obj_color_g = None
-            curr_obj_color_b = None
-
-        elif "*solid*color:" in clean_line[0]:
-            try:
-                curr_obj_color_r = float(round(float(clean_line[1]) * 255))
-                curr_obj_color_g = float(round(float(clean_line[2]) * 255))
-                curr_obj_color_b = float(round(float(clean_line[3]) * 255))
-            except:
-                pass
-
-        elif "name:" in clean_line[0]:
-            # "name:" has the same meaning as "name" in PZero
-            if line[:5] == "name:":
-                # this check solves a problem with a property sometimes called "gname"
-                if clean_line[0] == "name:":
-                    # standard import
-                    curr_obj_dict["name"] = "_".join(
-                        clean_line[1:]
-                    )  # see if a suffix must be added to split multipart
-                    if feature_from_name:
-                        curr_obj_dict["feature"] = curr_obj_dict["name"]
-                else:
-                    # solves a bug in some other software that does not add a space after name:
-                    curr_obj_dict["name"] = "_".join(clean_line[:])
-                    curr_obj_dict["name"] = curr_obj_dict["name"][
-                        5:
-                    ]  # this removes 'name:'
-                    if feature_from_name:
-                        curr_obj_dict["feature"] = curr_obj_dict["name"]
-                if uid_from_name:
-                    curr_obj_dict["uid"] = curr_obj_dict["name"]
-
-        elif clean_line[0] == "GEOLOGICAL_TYPE":
-            # "GEOLOGICAL_TYPE" has the same meaning as "role" in PZero
-            curr_obj_dict["role"] = ("_".join(clean_line[1:])).lower()
-            if curr_obj_dict["role"] not in self.geol_coll.valid_roles:
-                if "Fault" in curr_obj_dict["role"]:
-                    curr_obj_dict["role"] = "fault"
-                elif "Horizon" in curr_obj_dict["role"]:
-                    curr_obj_dict["role"] = "top"
-                else:
-                    curr_obj_dict["role"] = "undef"
-
-        elif clean_line[0] == "GEOLOGICAL_FEATURE":
-            # "GEOLOGICAL_FEATURE" has the same meaning as "feature" in PZero
-            curr_obj_dict["feature"] = "_".join(clean_line[1:])
-
-        elif clean_line[0] == "PROPERTIES":
-            # Populate the list of property names, the properties number, and initialize the VTK arrays.
-            for prop in clean_line[1:]:
-                curr_obj_dict["properties_names"].append(prop)
-            properties_number = len(curr_obj_dict["properties_names"])
-            for i in range(properties_number):
-                new_prop = vtkFloatArray()
-                curr_obj_properties_collection.AddItem(new_prop)
-                curr_obj_properties_collection.GetItem(i).SetName(
-                    curr_obj_dict["properties_names"][i]
-                )
-
-        elif clean_line[0] == "ESIZES":
-            # Populate the list of property components.
-            ESZ_str = clean_line[1:]
-            for i in range(len(ESZ_str)):
-                curr_obj_dict["properties_components"].append(int(ESZ_str[i]))
-                curr_obj_properties_collection.GetItem(i).SetNumberOfComponents(
-                    int(ESZ_str[i])
-                )
-
-        elif clean_line[0] == "SUBVSET":
-            # see in the future if and how to start a new SUBVSET part here
-            pass
-
-        elif clean_line[0] == "ILINE":
-            # see in the future if and how to start a new ILINE part here
-            pass
-
-        elif clean_line[0] == "TFACE":
-            # see in the future if and how to start a new TFACE part here
-            pass
-
-        elif clean_line[0] in ["VRTX", "PVRTX", "SEG", "TRGL", "ATOM"]:
-            # This inner condition is required to handle multipart entities.
-            if clean_line[0] == "VRTX":
-                # vtkPoint with ID, X, Y Z, "-1" since first vertex has index 0 in VTK
-                curr_obj_points.InsertPoint(
-                    int(clean_line[1]) - 1,
-                    float(clean_line[2]),
-                    float(clean_line[3]),
-                    float(clean_line[4]),
-                )
-
-            elif clean_line[0] == "PVRTX":
-                # vtkPoint with ID, X, Y Z, "-1" since first vertex has index 0 in VTK
-                curr_obj_points.InsertPoint(
-                    int(clean_line[1]) - 1,
-                    float(clean_line[2]),
-                    float(clean_line[3]),
-                    float(clean_line[4]),
-                )
-                if properties_number > 0:
-                    # Now we set values in the properties float arrays
-                    # _____________Check if all is OK here with vector properties_______________________________________
-                    i = 5  # i = 5 since the first five elements have already been read: PVRTX, id, X, Y, Z
-                    for j in range(properties_number):
-                        this_prop = curr_obj_properties_collection.GetItem(j)
-                        if curr_obj_dict["properties_components"][j] == 1:
-                            this_prop.InsertTuple1(
-                                int(clean_line[1]) - 1, float(clean_line[i])
-                            )
-                            i = i + 1
-                        elif curr_obj_dict["properties_components"][j] == 2:
-                            this_prop.InsertTuple2(
-                                int(clean_line[1]) - 1,
-                                float(clean_line[i]),
-                                float(clean_line[i + 1]),
-                            )
-                            i = i + 2
-                        elif curr_obj_dict["properties_components"][j] == 3:
-                            this_prop.InsertTuple3(
-                                int(clean_line[1]) - 1,
-                                float(clean_line[i]),
-                                float(clean_line[i + 1]),
-                                float(clean_line[i + 2]),
-                            )
-                            i = i + 3
-                        elif curr_obj_dict["properties_components"][j] == 4:
-                            this_prop.InsertTuple4(
-                                int(clean_line[1]) - 1,
-                                float(clean_line[i]),
-                                float(clean_line[i + 1]),
-                                float(clean_line[i + 2]),
-                                float(clean_line[i + 3]),
-                            )
-                            i = i + 4
-                        elif curr_obj_dict["properties_components"][j] == 6:
-                            this_prop.InsertTuple4(
-                                int(clean_line[1]) - 1,
-                                float(clean_line[i]),
-                                float(clean_line[i + 1]),
-                                float(clean_line[i + 2]),
-                                float(clean_line[i + 3]),
-                                float(clean_line[i + 4]),
-                                float(clean_line[i + 5]),
-                            )
-                            i = i + 6
-                        elif curr_obj_dict["properties_components"][j] == 9:
-                            this_prop.InsertTuple4(
-                                int(clean_line[1]) - 1,
-                                float(clean_line[i]),
-                                float(clean_line[i + 1]),
-                                float(clean_line[i + 2]),
-                                float(clean_line[i + 3]),
-                                float(clean_line[i + 4]),
-                                float(clean_line[i + 5]),
-                                float(clean_line[i + 6]),
-                                float(clean_line[i + 7]),
-                                float(clean_line[i + 8]),
-                            )
-                            i = i + 9
-                        else:
-                            # Discard property if it is not 1D, 2D, 3D, 4D, 6D or 9D.
-                            i = i + curr_obj_dict["properties_components"][j]
-                            curr_obj_dict["properties_names"] = curr_obj_dict[
-                                "properties_names"
-                            ].remove(j)
-                            properties_number = properties_number - 1
-                            curr_obj_dict["properties_components"].remove(j)
-                            curr_obj_properties_collection.RemoveItem(j)
-
-            elif clean_line[0] == "ATOM":
-                # ATOM id1 id2 (where id1 > id2) indicates a vertex with index id1 that shares the same XYZ position
-                # as a previous vertex with id2. This is used in Gocad to create co-located vertexes that are
-                # disconnected in topological sense. In PZero we create two independent vertexes with the same
-                # coordinates.
-                this_atom_id = int(clean_line[1]) - 1
-                from_vrtx_id = int(clean_line[2]) - 1
-                curr_obj_points.InsertPoint(
-                    this_atom_id, curr_obj_points.GetPoint(from_vrtx_id)
-                )
-
-            elif clean_line[0] == "SEG":
-                line = vtkLine()
-                line.GetPointIds().SetId(
-                    0, int(clean_line[1]) - 1
-                )  # "-1" since first vertex has index 0 in VTK
-                line.GetPointIds().SetId(1, int(clean_line[2]) - 1)
-                curr_obj_cells.InsertNextCell(line)
-
-            elif clean_line[0] == "TRGL":
-                triangle = vtkTriangle()
-                triangle.GetPointIds().SetId(
-                    0, int(clean_line[1]) - 1
-                )  # "-1" since first vertex has index 0 in VTK
-                triangle.GetPointIds().SetId(1, int(clean_line[2]) - 1)
-                triangle.GetPointIds().SetId(2, int(clean_line[3]) - 1)
-                curr_obj_cells.InsertNextCell(triangle)
-
-        elif clean_line[0] == "BSTONE":
-            # NOT YET IMPLEMENTED
-            pass
+    # Parse the file. Vertexes and topology of each object marked by the GOCAD keyword are converted to
+    # numpy arrays by read_gocad_objects(), then here we read the header lines that we want to import,
+    # skipping the others.
+    for gocad_object in read_gocad_objects(in_file_name=in_file_name):
+        # A new entity starts here, so here we create a new empty dictionary, then we will fill
+        # its components. Use deepcopy otherwise the original dictionary would be altered.
+        curr_obj_dict = deepcopy(self.geol_coll.entity_dict)
+        curr_obj_dict["name"] = "undef"
+        curr_obj_dict["scenario"] = scenario_default
+        curr_obj_dict["role"] = role_default
+
+        # Store uid of new entity.
+        curr_obj_dict["uid"] = str(uuid4())
+
+        # Create the empty vtk object with class = topology.
+        if gocad_object["type"] == "VSet":
+            curr_obj_dict["topology"] = "VertexSet"
+            curr_obj_dict["vtk_obj"] = VertexSet()
+        elif gocad_object["type"] == "PLine":
+            curr_obj_dict["topology"] = "PolyLine"
+            curr_obj_dict["vtk_obj"] = PolyLine()
+        elif gocad_object["type"] == "TSurf":
+            curr_obj_dict["topology"] = "TriSurf"
+            curr_obj_dict["vtk_obj"] = TriSurf()
+        else:
+            # Objects with topology different from the allowed ones are skipped.
+            self.print_terminal(
+                f"gocad2vtk - entity type {gocad_object['type']} not recognized, skipped."
+            )
+            continue
+
+        # Initialize color
+        curr_obj_color_r = None
+        curr_obj_color_g = None
+        curr_obj_color_b = None
+
+        for line in gocad_object["header"]:
+            clean_line = line.strip().split()
+            if "*solid*color:" in clean_line[0]:
+                try:
+                    curr_obj_color_r = float(round(float(clean_line[1]) * 255))
+                    curr_obj_color_g = float(round(float(clean_line[2]) * 255))
+                    curr_obj_color_b = float(round(float(clean_line[3]) * 255))
+                except:
+                    pass
+
+            elif "name:" in clean_line[0]:
+                # "name:" has the same meaning as "name" in PZero
+                if line[:5] == "name:":
+                    # this check solves a problem with a property sometimes called "gname"
+                    if clean_line[0] == "name:":
+                        # standard import
+                        curr_obj_dict["name"] = "_".join(
+                            clean_line[1:]
+                        )  # see if a suffix must be added to split multipart
+                        if feature_from_name:
+                            curr_obj_dict["feature"] = curr_obj_dict["name"]
+                    else:
+                        # solves a bug in some other software that does not add a space after name:
+                        curr_obj_dict["name"] = "_".join(clean_line[:])
+                        curr_obj_dict["name"] = curr_obj_dict["name"][
+                            5:
+                        ]  # this removes 'name:'
+                        if feature_from_name:
+                            curr_obj_dict["feature"] = curr_obj_dict["name"]
+                    if uid_from_name:
+                        curr_obj_dict["uid"] = curr_obj_dict["name"]
+
+            elif clean_line[0] == "GEOLOGICAL_TYPE":
+                # "GEOLOGICAL_TYPE" has the same meaning as "role" in PZero
+                curr_obj_dict["role"] = ("_".join(clean_line[1:])).lower()
+                if curr_obj_dict["role"] not in self.geol_coll.valid_roles:
+                    if "Fault" in curr_obj_dict["role"]:
+                        curr_obj_dict["role"] = "fault"
+                    elif "Horizon" in curr_obj_dict["role"]:
+                        curr_obj_dict["role"] = "top"
+                    else:
+                        curr_obj_dict["role"] = "undef"
+
+            elif clean_line[0] == "GEOLOGICAL_FEATURE":
+                # "GEOLOGICAL_FEATURE" has the same meaning as "feature" in PZero
+                curr_obj_dict["feature"] = "_".join(clean_line[1:])
+
+        # Property names and components come from the PROPERTIES and ESIZES keywords,
+        # already parsed together with PVRTX records.
+        for name, values in gocad_object["properties"].items():
+            curr_obj_dict["properties_names"].append(name)
+            curr_obj_dict["properties_components"].append(
+                1 if values.ndim == 1 else values.shape[1]
+            )
 
-        elif clean_line[0] == "BORDER":
-            # NOT YET IMPLEMENTED
-            pass
+        # Process the arrays and write the VTK entity with properties to the project geol_coll
+        # update entity counter
+        entity_counter += 1
 
-        elif clean_line[0] == "END":
-            # When END reached, process the arrays and write the VTK entity with
-            # properties to the project geol_coll
-            # update entity counter
-            entity_counter += 1
+        # Write points, cells and properties TO VTK OBJECT
+        if curr_obj_dict["topology"] == "VertexSet":
+            self.print_terminal(
+                f"Importing Gocad VSet (VertexSet) as a PolyData 0D in VTK with name: {curr_obj_dict['name']}"
+            )
+        elif curr_obj_dict["topology"] == "PolyLine":
+            self.print_terminal(
+                f"Importing GOCAD PLine (PolyLine) as a PolyData 1D in VTK with name: {curr_obj_dict['name']}"
+            )
+        elif curr_obj_dict["topology"] == "TriSurf":
+            self.print_terminal(
+                f"Importing GOCAD TSurf (TriSurf) as a PolyData 2D in VTK with name: {curr_obj_dict['name']}"
+            )
+        gocad_object_to_vtk(gocad_object=gocad_object, vtk_obj=curr_obj_dict["vtk_obj"])
 
-            # Write points and cells TO VTK OBJECT
+        # Add current_entity to entities collection, after checking if the entity is valid.
+        if curr_obj_dict["vtk_obj"].points_number > 0:
             if curr_obj_dict["topology"] == "VertexSet":
-                self.print_terminal(
-                    f"Importing Gocad VSet (VertexSet) as a PolyData 0D in VTK with name: {curr_obj_dict['name']}"
-                )
-                curr_obj_dict["vtk_obj"].SetPoints(curr_obj_points)
-
-                # Vertex cells, one for each point, are added here.
-                for pid in range(curr_obj_dict["vtk_obj"].GetNumberOfPoints()):
-                    vertex = vtkVertex()
-                    vertex.GetPointIds().SetId(0, pid)
-                    curr_obj_cells.InsertNextCell(vertex)
-                curr_obj_dict["vtk_obj"].SetVerts(curr_obj_cells)
-
-            elif curr_obj_dict["topology"] == "PolyLine":
-                self.print_terminal(
-                    f"Importing GOCAD PLine (PolyLine) as a PolyData 1D in VTK with name: {curr_obj_dict['name']}"
-                )
-                curr_obj_dict["vtk_obj"].SetPoints(curr_obj_points)
-                curr_obj_dict["vtk_obj"].SetLines(curr_obj_cells)
-
-            elif curr_obj_dict["topology"] == "TriSurf":
-                self.print_terminal(
-                    f"Importing GOCAD TSurf (TriSurf) as a PolyData 2D in VTK with name: {curr_obj_dict['name']}"
-                )
-                curr_obj_dict["vtk_obj"].SetPoints(curr_obj_points)
-                curr_obj_dict["vtk_obj"].SetPolys(curr_obj_cells)
-
-            if properties_number > 0:
-                for i in range(properties_number):
-                    curr_obj_dict["vtk_obj"].GetPointData().AddArray(
-                        curr_obj_properties_collection.GetItem(i)
-                    )
-
-            # print(curr_obj_dict["vtk_obj"])
-
-            # Add current_entity to entities collection, after checking if the entity is valid.
-            if curr_obj_dict["vtk_obj"].points_number > 0:
-                if curr_obj_dict["topology"] == "VertexSet":
+                self.geol_coll.add_entity_from_dict(entity_dict=curr_obj_dict)
+            else:
+                if curr_obj_dict["vtk_obj"].cells_number > 0:
                     self.geol_coll.add_entity_from_dict(entity_dict=curr_obj_dict)
-                else:
-                    if curr_obj_dict["vtk_obj"].cells_number > 0:
-                        self.geol_coll.add_entity_from_dict(entity_dict=curr_obj_dict)
-                if reset_legend and curr_obj_color_r:
-                    self.geol_coll.set_uid_legend(
-                        uid=curr_obj_dict["uid"],
-                        color_R=curr_obj_color_r,
-                        color_G=curr_obj_color_g,
-                        color_B=curr_obj_color_b,
-                    )
-            del curr_obj_points
-            del curr_obj_cells
-            del curr_obj_properties_collection
-            del curr_obj_dict
+            if reset_legend and curr_obj_color_r:
+                self.geol_coll.set_uid_legend(
+                    uid=curr_obj_dict["uid"],
+                    color_R=curr_obj_color_r,
+                    color_G=curr_obj_color_g,
+                    color_B=curr_obj_color_b,
+                )
+        del curr_obj_dict
 
-            # Closing message
-            self.print_terminal(f"Object n. {str(entity_counter)} saved")
+        # Closing message
+        self.print_terminal(f"Object n. {str(entity_counter)} saved")
 
     n_entities_after = self.geol_coll.get_number_of_entities
     self.print_terminal(f"Entities before importing: {str(n_entities_before)}")
@@ -480,254 +484,105 @@ def gocad2vtk_section(
     This is the specific implementation for objects belonging to a cross-section.
     <self> is the calling ProjectWindow() instance.
     """
-    # Open input file.
-    fin = open(in_file_name, "rt")
     # Number of entities before importing.
     n_entities_before = self.geol_coll.get_number_of_entities
     # Initialize entity_counter and input uids.
     entity_counter = 0
     input_uids = []
-    # Parse fin file.
-    for line in fin:
-        # Read one line from file.
-        clean_line = line.strip().split()
-
-        # The effect of the following if/elif cascade is to loop for every single object marked by
-        # the GOCAD keyword, reading the lines that we want to import and skipping the others.
-        if clean_line[0] == "GOCAD":
-            # A new entity starts here in a GOCAD file, so here we create a new empty dictionary,
-            # then we will fill its components in the next lines. Use deepcopy otherwise the
-            # original dictionary would be altered.
-            curr_obj_dict = deepcopy(self.geol_coll.entity_dict)
-            curr_obj_dict["parent_uid"] = x_section_uid
-            curr_obj_dict["scenario"] = scenario_default
-            # Store uid and topological type of new entity.
-            curr_obj_dict["uid"] = str(uuid4())
-            input_uids.append(curr_obj_dict["uid"])
-            # Create the empty vtk object with class = topological_type.
-            if clean_line[1] == "VSet":
-                curr_obj_dict["vtk_obj"] = XsVertexSet(
-                    x_section_uid=x_section_uid, parent=self
-                )
-                curr_obj_dict["topology"] = "XsVertexSet"
-                curr_obj_dict["role"] = role_default
-            elif clean_line[1] == "PLine":
-                curr_obj_dict["vtk_obj"] = XsPolyLine(
-                    x_section_uid=x_section_uid, parent=self
-                )
-                curr_obj_dict["topology"] = "XsPolyLine"
-                curr_obj_dict["role"] = role_default
-            else:
-                # Here topological types different from the allowed ones are handled.
-                # At the moment THIS WILL CAUSE ERRORS - KEEP THIS MESSAGE JUST FOR DEBUGGING.
-                # This must be reimplementende in sucha way that, is non-valid objects are found,
-                # the file reader jumps to the next line starting with the 'GOCAD' keyword (if any).
-                self.print_terminal("gocad2vtk - entity type not recognized ERROR.")
-            # Create empty arrays for coordinates and topology and a counter for properties.
-            curr_obj_points = vtkPoints()
-            curr_obj_cells = vtkCellArray()
-            curr_obj_properties_collection = vtkDataArrayCollection()
-            properties_number = 0
-
-        elif "name:" in clean_line[0]:
-            if clean_line[0] == "name:":
-                # standard import
-                curr_obj_dict["name"] = "_".join(
-                    clean_line[1:]
-                )  # see if a suffix must be added to split multipart
-                if feature_from_name:
-                    curr_obj_dict["feature"] = curr_obj_dict["name"]
-            else:
-                # solves a bug in some other software that does not add a space after name:
-                curr_obj_dict["name"] = "_".join(clean_line[:])
-                curr_obj_dict["name"] = curr_obj_dict["name"][
-                    5:
-                ]  # this removes 'name:'
-                if feature_from_name:
-                    curr_obj_dict["feature"] = curr_obj_dict["name"]
-            if uid_from_name:
-                curr_obj_dict["uid"] = curr_obj_dict["name"]
+    # Parse the file, looping over every single object marked by the GOCAD keyword, with vertexes and
+    # topology already converted to numpy arrays by read_gocad_objects().
+    for gocad_object in read_gocad_objects(in_file_name=in_file_name):
+        # A new entity starts here, so here we create a new empty dictionary, then we will fill
+        # its components. Use deepcopy otherwise the original dictionary would be altered.
+        curr_obj_dict = deepcopy(self.geol_coll.entity_dict)
+        curr_obj_dict["parent_uid"] = x_section_uid
+        curr_obj_dict["scenario"] = scenario_default
+        # Store uid and topological type of new entity.
+        curr_obj_dict["uid"] = str(uuid4())
+        # Create the empty vtk object with class = topological_type.
+        if gocad_object["type"] == "VSet":
+            curr_obj_dict["vtk_obj"] = XsVertexSet(
+                x_section_uid=x_section_uid, parent=self
+            )
+            curr_obj_dict["topology"] = "XsVertexSet"
+            curr_obj_dict["role"] = role_default
+        elif gocad_object["type"] == "PLine":
+            curr_obj_dict["vtk_obj"] = XsPolyLine(
+                x_section_uid=x_section_uid, parent=self
+            )
+            curr_obj_dict["topology"] = "XsPolyLine"
+            curr_obj_dict["role"] = role_default
+        else:
+            # Objects with topological types different from the allowed ones are skipped.
+            self.print_terminal(
+                f"gocad2vtk - entity type {gocad_object['type']} not recognized, skipped."
+            )
+            continue
 
-        elif clean_line[0] == "GEOLOGICAL_TYPE":
-            curr_obj_dict["role"] = ("_".join(clean_line[1:])).lower()
-            if curr_obj_dict["role"] not in self.geol_coll.valid_roles:
-                if "Fault" in curr_obj_dict["role"]:
-                    curr_obj_dict["role"] = "fault"
-                elif "fault" in curr_obj_dict["role"]:
-                    curr_obj_dict["role"] = "fault"
-                elif "Horizon" in curr_obj_dict["role"]:
-                    curr_obj_dict["role"] = "top"
+        for line in gocad_object["header"]:
+            clean_line = line.strip().split()
+            if "name:" in clean_line[0]:
+                if clean_line[0] == "name:":
+                    # standard import
+                    curr_obj_dict["name"] = "_".join(
+                        clean_line[1:]
+                    )  # see if a suffix must be added to split multipart
+                    if feature_from_name:
+                        curr_obj_dict["feature"] = curr_obj_dict["name"]
                 else:
-                    curr_obj_dict["role"] = "undef"
-
-        elif clean_line[0] == "GEOLOGICAL_FEATURE":
-            curr_obj_dict["feature"] = "_".join(clean_line[1:])
-
-        elif clean_line[0] == "PROPERTIES":
-            # Populate the list of property names, the properties number, and initialize the VTK arrays.
-            for prop in clean_line[1:]:
-                curr_obj_dict["properties_names"].append(prop)
-            properties_number = len(curr_obj_dict["properties_names"])
-            for i in range(properties_number):
-                new_prop = vtkFloatArray()
-                curr_obj_properties_collection.AddItem(new_prop)
-                curr_obj_properties_collection.GetItem(i).SetName(
-                    curr_obj_dict["properties_names"][i]
-                )
-
-        elif clean_line[0] == "ESIZES":
-            ESZ_str = clean_line[1:]
-            for i in range(len(ESZ_str)):
-                curr_obj_dict["properties_components"].append(int(ESZ_str[i]))
-                curr_obj_properties_collection.GetItem(i).SetNumberOfComponents(
-                    int(ESZ_str[i])
-                )
-
-        elif (
-            clean_line[0] == "SUBVSET"
-        ):  # see if and how to start a new SUBVSET part here
-            pass
-
-        elif clean_line[0] == "ILINE":  # see if and how to start a new ILINE part here
-            pass
-
-        elif clean_line[0] == "VRTX":
-            curr_obj_points.InsertPoint(
-                int(clean_line[1]) - 1,
-                float(clean_line[2]),
-                float(clean_line[3]),
-                float(clean_line[4]),
-            )  # vtkPoint with ID, X, Y Z, "-1" since first vertex has index 0 in VTK
+                    # solves a bug in some other software that does not add a space after name:
+                    curr_obj_dict["name"] = "_".join(clean_line[:])
+                    curr_obj_dict["name"] = curr_obj_dict["name"][
+                        5:
+                    ]  # this removes 'name:'
+                    if feature_from_name:
+                        curr_obj_dict["feature"] = curr_obj_dict["name"]
+                if uid_from_name:
+                    curr_obj_dict["uid"] = curr_obj_dict["name"]
 
-        elif clean_line[0] == "PVRTX":
-            curr_obj_points.InsertPoint(
-                int(clean_line[1]) - 1,
-                float(clean_line[2]),
-                float(clean_line[3]),
-                float(clean_line[4]),
-            )  # vtkPoint with ID, X, Y Z, "-1" since first vertex has index 0 in VTK
-            if properties_number > 0:
-                # Now we set values in the properties float arrays
-                # _____________Check if all is OK here with vector properties_________________________________________________
-                i = 5  # i = 5 since the first five elements have already been read: PVRTX, id, X, Y, Z
-                for j in range(properties_number):
-                    this_prop = curr_obj_properties_collection.GetItem(j)
-                    if curr_obj_dict["properties_components"][j] == 1:
-                        this_prop.InsertTuple1(
-                            int(clean_line[1]) - 1, float(clean_line[i])
-                        )
-                        i = i + 1
-                    elif curr_obj_dict["properties_components"][j] == 2:
-                        this_prop.InsertTuple2(
-                            int(clean_line[1]) - 1,
-                            float(clean_line[i]),
-                            float(clean_line[i + 1]),
-                        )
-                        i = i + 2
-                    elif curr_obj_dict["properties_components"][j] == 3:
-                        this_prop.InsertTuple3(
-                            int(clean_line[1]) - 1,
-                            float(clean_line[i]),
-                            float(clean_line[i + 1]),
-                            float(clean_line[i + 2]),
-                        )
-                        i = i + 3
-                    elif curr_obj_dict["properties_components"][j] == 4:
-                        this_prop.InsertTuple4(
-                            int(clean_line[1]) - 1,
-                            float(clean_line[i]),
-                            float(clean_line[i + 1]),
-                            float(clean_line[i + 2]),
-                            float(clean_line[i + 3]),
-                        )
-                        i = i + 4
-                    elif curr_obj_dict["properties_components"][j] == 6:
-                        this_prop.InsertTuple4(
-                            int(clean_line[1]) - 1,
-                            float(clean_line[i]),
-                            float(clean_line[i + 1]),
-                            float(clean_line[i + 2]),
-                            float(clean_line[i + 3]),
-                            float(clean_line[i + 4]),
-                            float(clean_line[i + 5]),
-                        )
-                        i = i + 6
-                    elif curr_obj_dict["properties_components"][j] == 9:
-                        this_prop.InsertTuple4(
-                            int(clean_line[1]) - 1,
-                            float(clean_line[i]),
-                            float(clean_line[i + 1]),
-                            float(clean_line[i + 2]),
-                            float(clean_line[i + 3]),
-                            float(clean_line[i + 4]),
-                            float(clean_line[i + 5]),
-                            float(clean_line[i + 6]),
-                            float(clean_line[i + 7]),
-                            float(clean_line[i + 8]),
-                        )
-                        i = i + 9
+            elif clean_line[0] == "GEOLOGICAL_TYPE":
+                curr_obj_dict["role"] = ("_".join(clean_line[1:])).lower()
+                if curr_obj_dict["role"] not in self.geol_coll.valid_roles:
+                    if "Fault" in curr_obj_dict["role"]:
+                        curr_obj_dict["role"] = "fault"
+                    elif "fault" in curr_obj_dict["role"]:
+                        curr_obj_dict["role"] = "fault"
+                    elif "Horizon" in curr_obj_dict["role"]:
+                        curr_obj_dict["role"] = "top"
                     else:
-                        # Discard property if it is not 1D, 2D, 3D, 4D, 6D or 9D
-                        i = i + curr_obj_dict["properties_components"][j]
-                        curr_obj_dict["properties_names"] = curr_obj_dict[
-                            "properties_names"
-                        ].remove(j)
-                        properties_number = properties_number - 1
-                        curr_obj_dict["properties_components"].remove(j)
-                        curr_obj_properties_collection.RemoveItem(j)
-
-        elif clean_line[0] == "ATOM":
-            # atom_id = int(clean_line[1]) - 1
-            # vrtx_id = int(clean_line[2]) - 1
-            pass
-
-        elif clean_line[0] == "SEG":
-            line = vtkLine()
-            line.GetPointIds().SetId(
-                0, int(clean_line[1]) - 1
-            )  # "-1" since first vertex has index 0 in VTK
-            line.GetPointIds().SetId(1, int(clean_line[2]) - 1)
-            curr_obj_cells.InsertNextCell(line)
+                        curr_obj_dict["role"] = "undef"
 
-        elif clean_line[0] == "END":
-            # When END reached, process the arrays and write the VTK entity with properties to the project geol_coll
-            entity_counter += 1  # update entity counter
+            elif clean_line[0] == "GEOLOGICAL_FEATURE":
+                curr_obj_dict["feature"] = "_".join(clean_line[1:])
 
-            # Write points and cells TO VTK OBJECT
-            if curr_obj_dict["topology"] == "XsVertexSet":
-                self.print_terminal(
-                    f"Importing Gocad VSet (VertexSet) as a PolyData 0D in VTK with name:\n{curr_obj_dict['name']}"
-                )
-                curr_obj_dict["vtk_obj"].SetPoints(curr_obj_points)
-                # Vertex cells, one for each point, are added here.
-                for pid in range(curr_obj_dict["vtk_obj"].GetNumberOfPoints()):
-                    vertex = vtkVertex()
-                    vertex.GetPointIds().SetId(0, pid)
-                    curr_obj_cells.InsertNextCell(vertex)
-                curr_obj_dict["vtk_obj"].SetVerts(curr_obj_cells)
+        # Property names and components come from the PROPERTIES and ESIZES keywords.
+        for name, values in gocad_object["properties"].items():
+            curr_obj_dict["properties_names"].append(name)
+            curr_obj_dict["properties_components"].append(
+                1 if values.ndim == 1 else values.shape[1]
+            )
+        input_uids.append(curr_obj_dict["uid"])
 
-            elif curr_obj_dict["topology"] == "XsPolyLine":
-                self.print_terminal(
-                    f"Importing GOCAD PLine (PolyLine) as a PolyData 1D in VTK with name: {curr_obj_dict['name']}"
-                )
-                curr_obj_dict["vtk_obj"].SetPoints(curr_obj_points)
-                curr_obj_dict["vtk_obj"].SetLines(curr_obj_cells)
+        # Process the arrays and write the VTK entity with properties to the project geol_coll
+        entity_counter += 1  # update entity counter
 
-            if properties_number > 0:
-                for i in range(properties_number):
-                    curr_obj_dict["vtk_obj"].GetPointData().AddArray(
-                        curr_obj_properties_collection.GetItem(i)
-                    )
+        # Write points, cells and properties TO VTK OBJECT
+        if curr_obj_dict["topology"] == "XsVertexSet":
+            self.print_terminal(
+                f"Importing Gocad VSet (VertexSet) as a PolyData 0D in VTK with name: {curr_obj_dict['name']}"
+            )
+        elif curr_obj_dict["topology"] == "XsPolyLine":
+            self.print_terminal(
+                f"Importing GOCAD PLine (PolyLine) as a PolyData 1D in VTK with name: {curr_obj_dict['name']}"
+            )
+        gocad_object_to_vtk(gocad_object=gocad_object, vtk_obj=curr_obj_dict["vtk_obj"])
 
-            # Add current_entity to entities collection
-            self.geol_coll.add_entity_from_dict(entity_dict=curr_obj_dict)
-            del curr_obj_points
-            del curr_obj_cells
-            del curr_obj_properties_collection
-            del curr_obj_dict
+        # Add current_entity to entities collection
+        self.geol_coll.add_entity_from_dict(entity_dict=curr_obj_dict)
+        del curr_obj_dict
 
-            # Closing message
-            self.print_terminal(f"Object n. {str(entity_counter)} saved")
+        # Closing message
+        self.print_terminal(f"Object n. {str(entity_counter)} saved")
 
     n_entities_after = self.geol_coll.get_number_of_entities
     self.print_terminal(f"Entities before importing: {str(n_entities_before)}")
@@ -855,249 +710,76 @@ def gocad2vtk_boundary(self=None, in_file_name=None, uid_from_name=None):
     #     feature_from_name = True
     # else:
     #     feature_from_name = False
-    # Open input file
-    fin = open(in_file_name, "rt")
     # Number of entities before importing________________________________
     n_entities_before = self.boundary_coll.get_number_of_entities
     # Initialize entity_counter
     entity_counter = 0
-    # Parse fin file
-    for line in fin:
-        # Read one line from file.
-        clean_line = line.strip().split()
-
-        # The effect of the following if/elif cascade is to loop for every single object marked by
-        # the GOCAD keyword, reading the lines that we want to import and skipping the others.
-        if clean_line[0] == "GOCAD":
-            # A new entity starts here in a GOCAD file, so here we create a new empty dictionary,
-            # then we will fill its components in the next lines. Use deepcopy otherwise the
-            # original dictionary would be altered.
-            curr_obj_dict = deepcopy(BoundaryCollection.entity_dict)
-            # curr_obj_dict['scenario'] = scenario_default
-
-            # Store uid and topological type of new entity.
-            curr_obj_dict["uid"] = str(uuid4())
-
-            # Create the empty vtk object with class = topology.
-            # if clean_line[1] == 'VSet':
-            #     curr_obj_dict['topology'] = 'VertexSet'
-            #     curr_obj_dict['vtk_obj'] = VertexSet()
-            #     curr_obj_dict['role'] = role_default
-            if clean_line[1] == "PLine":
-                curr_obj_dict["topology"] = "PolyLine"
-                curr_obj_dict["vtk_obj"] = PolyLine()
-                # curr_obj_dict['role'] = role_default
-            elif clean_line[1] == "TSurf":
-                curr_obj_dict["topology"] = "TriSurf"
-                curr_obj_dict["vtk_obj"] = TriSurf()
-                # curr_obj_dict['role'] = role_default
-            else:
-                # Here topological types different from the allowed ones are handled.
-                # At the moment THIS WILL CAUSE ERRORS - KEEP THIS MESSAGE JUST FOR DEBUGGING.
-                # This must be reimplementende in sucha way that, is non-valid objects are found,
-                # the file reader jumps to the next line starting with the 'GOCAD' keyword (if any).
-                self.print_terminal("gocad2vtk - entity type not recognized ERROR.")
-
-            # Create empty arrays for coordinates and topology and a counter for properties.
-            curr_obj_points = vtkPoints()
-            curr_obj_cells = vtkCellArray()
-            # curr_obj_properties_collection = vtkDataArrayCollection()
-            # properties_number = 0
-
-        elif "name:" in clean_line[0]:
-            if clean_line[0] == "name:":
-                # standard import
-                curr_obj_dict["name"] = "_".join(
-                    clean_line[1:]
-                )  # see if a suffix must be added to split multipart
-                # if feature_from_name:
-                #     curr_obj_dict['feature'] = curr_obj_dict['name']
-            else:
-                # solves a bug in some other software that does not add a space after name:
-                curr_obj_dict["name"] = "_".join(clean_line[:])
-                curr_obj_dict["name"] = curr_obj_dict["name"][
-                    5:
-                ]  # this removes 'name:'
-                # if feature_from_name:
-                #     curr_obj_dict['feature'] = curr_obj_dict['name']
-            if uid_from_name:
-                curr_obj_dict["uid"] = curr_obj_dict["name"]
-
-        # elif clean_line[0] == 'GEOLOGICAL_TYPE':
-        #     curr_obj_dict['role'] = ("_".join(clean_line[1:])).lower()
-        #     if curr_obj_dict['role'] not in self.geol_coll.valid_roles:
-        #         if "Fault" in curr_obj_dict['role']:
-        #             curr_obj_dict['role'] = "fault"
-        #         elif "fault" in curr_obj_dict['role']:
-        #             curr_obj_dict['role'] = "fault"
-        #         elif  "Horizon" in curr_obj_dict['role']:
-        #             curr_obj_dict['role'] = "top"
-        #         else:
-        #             curr_obj_dict['role'] = "undef"
-        #
-        # elif clean_line[0] == 'GEOLOGICAL_FEATURE':
-        #     curr_obj_dict['feature'] = ("_".join(clean_line[1:]))
-        #
-        # elif clean_line[0] == 'PROPERTIES':
-        #     """Populate the list of property names, the properties number, and initialize the VTK arrays."""
-        #     for prop in clean_line[1:]:
-        #         curr_obj_dict['properties_names'].append(prop)
-        #     properties_number = len(curr_obj_dict['properties_names'])
-        #     for i in range(properties_number):
-        #         new_prop = vtkFloatArray()
-        #         curr_obj_properties_collection.AddItem(new_prop)
-        #         curr_obj_properties_collection.GetItem(i).SetName(curr_obj_dict['properties_names'][i])
-        #
-        # elif clean_line[0] == 'ESIZES':
-        #     ESZ_str = clean_line[1:]
-        #     for i in range(len(ESZ_str)):
-        #         curr_obj_dict['properties_components'].append(int(ESZ_str[i]))
-        #         curr_obj_properties_collection.GetItem(i).SetNumberOfComponents(int(ESZ_str[i]))
-
-        elif (
-            clean_line[0] == "SUBVSET"
-        ):  # see if and how to start a new SUBVSET part here
-            pass
-
-        elif clean_line[0] == "ILINE":  # see if and how to start a new ILINE part here
-            pass
-
-        elif clean_line[0] == "TFACE":  # see if and how to start a new TFACE part here
-            pass
-
-        elif (clean_line[0] == "VRTX") or (clean_line[0] == "PVRTX"):
-            # VRTX or PVRTX is the same here since properties are not imported.
-            curr_obj_points.InsertPoint(
-                int(clean_line[1]) - 1,
-                float(clean_line[2]),
-                float(clean_line[3]),
-                float(clean_line[4]),
-            )  # vtkPoint with ID, X, Y Z, "-1" since first vertex has index 0 in VTK
-
-        # elif clean_line[0] == 'PVRTX':
-        #     curr_obj_points.InsertPoint(int(clean_line[1]) - 1, float(clean_line[2]), float(clean_line[3]), float(clean_line[4]))  # vtkPoint with ID, X, Y Z, "-1" since first vertex has index 0 in VTK
-        #     if properties_number > 0:
-        #         """Now we set values in the properties float arrays"""
-        #         """_____________Check if all is OK here with vector properties_________________________________________________"""
-        #         i = 5  # i = 5 since the first five elements have already been read: PVRTX, id, X, Y, Z
-        #         for j in range(properties_number):
-        #             this_prop = curr_obj_properties_collection.GetItem(j)
-        #             if curr_obj_dict['properties_components'][j] == 1:
-        #                 this_prop.InsertTuple1(int(clean_line[1]) - 1,
-        #                                        float(clean_line[i]))
-        #                 i = i + 1
-        #             elif curr_obj_dict['properties_components'][j] == 2:
-        #                 this_prop.InsertTuple2(int(clean_line[1]) - 1,
-        #                                        float(clean_line[i]),
-        #                                        float(clean_line[i + 1]))
-        #                 i = i + 2
-        #             elif curr_obj_dict['properties_components'][j] == 3:
-        #                 this_prop.InsertTuple3(int(clean_line[1]) - 1,
-        #                                        float(clean_line[i]),
-        #                                        float(clean_line[i + 1]),
-        #                                        float(clean_line[i + 2]))
-        #                 i = i + 3
-        #             elif curr_obj_dict['properties_components'][j] == 4:
-        #                 this_prop.InsertTuple4(int(clean_line[1]) - 1,
-        #                                        float(clean_line[i]),
-        #                                        float(clean_line[i + 1]),
-        #                                        float(clean_line[i + 2]),
-        #                                        float(clean_line[i + 3]))
-        #                 i = i + 4
-        #             elif curr_obj_dict['properties_components'][j] == 6:
-        #                 this_prop.InsertTuple4(int(clean_line[1]) - 1,
-        #                                        float(clean_line[i]),
-        #                                        float(clean_line[i + 1]),
-        #                                        float(clean_line[i + 2]),
-        #                                        float(clean_line[i + 3]),
-        #                                        float(clean_line[i + 4]),
-        #                                        float(clean_line[i + 5]))
-        #                 i = i + 6
-        #             elif curr_obj_dict['properties_components'][j] == 9:
-        #                 this_prop.InsertTuple4(int(clean_line[1]) - 1,
-        #                                        float(clean_line[i]),
-        #                                        float(clean_line[i + 1]),
-        #                                        float(clean_line[i + 2]),
-        #                                        float(clean_line[i + 3]),
-        #                                        float(clean_line[i + 4]),
-        #                                        float(clean_line[i + 5]),
-        #                                        float(clean_line[i + 6]),
-        #                                        float(clean_line[i + 7]),
-        #                                        float(clean_line[i + 8]))
-        #                 i = i + 9
-        #             else:
-        #                 """Discard property if it is not 1D, 2D, 3D, 4D, 6D or 9D"""
-        #                 i = i + curr_obj_dict['properties_components'][j]
-        #                 curr_obj_dict['properties_names'] = curr_obj_dict['properties_names'].remove(j)
-        #                 properties_number = properties_number - 1
-        #                 curr_obj_dict['properties_components'].remove(j)
-        #                 curr_obj_properties_collection.RemoveItem(j)
-
-        elif clean_line[0] == "ATOM":
-            # NOT YET IMPLEMENTED
-            # atom_id = int(clean_line[1]) - 1
-            # vrtx_id = int(clean_line[2]) - 1
-            pass
-
-        elif clean_line[0] == "SEG":
-            line = vtkLine()
-            line.GetPointIds().SetId(
-                0, int(clean_line[1]) - 1
-            )  # "-1" since first vertex has index 0 in VTK
-            line.GetPointIds().SetId(1, int(clean_line[2]) - 1)
-            curr_obj_cells.InsertNextCell(line)
-
-        elif clean_line[0] == "TRGL":
-            triangle = vtkTriangle()
-            triangle.GetPointIds().SetId(
-                0, int(clean_line[1]) - 1
-            )  # "-1" since first vertex has index 0 in VTK
-            triangle.GetPointIds().SetId(1, int(clean_line[2]) - 1)
-            triangle.GetPointIds().SetId(2, int(clean_line[3]) - 1)
-            curr_obj_cells.InsertNextCell(triangle)
-
-        elif clean_line[0] == "END":
-            # When END reached, process the arrays and write the VTK entity with properties to the project geol_coll
-            entity_counter += 1  # update entity counter
+    # Parse the file, looping over every single object marked by the GOCAD keyword, with vertexes and
+    # topology already converted to numpy arrays by read_gocad_objects().
+    for gocad_object in read_gocad_objects(in_file_name=in_file_name):
+        # A new entity starts here, so here we create a new empty dictionary, then we will fill
+        # its components. Use deepcopy otherwise the original dictionary would be altered.
+        curr_obj_dict = deepcopy(BoundaryCollection.entity_dict)
+        # curr_obj_dict['scenario'] = scenario_default
+
+        # Store uid and topological type of new entity.
+        curr_obj_dict["uid"] = str(uuid4())
+
+        # Create the empty vtk object with class = topology.
+        if gocad_object["type"] == "PLine":
+            curr_obj_dict["topology"] = "PolyLine"
+            curr_obj_dict["vtk_obj"] = PolyLine()
+        elif gocad_object["type"] == "TSurf":
+            curr_obj_dict["topology"] = "TriSurf"
+            curr_obj_dict["vtk_obj"] = TriSurf()
+        else:
+            # Objects with topological types different from the allowed ones are skipped.
+            self.print_terminal(
+                f"gocad2vtk - entity type {gocad_object['type']} not recognized, skipped."
+            )
+            continue
 
-            # Write points and cells TO VTK OBJECT
-            # if curr_obj_dict['topology'] == 'VertexSet':
-            #     self.print_terminal("Importing Gocad VSet (VertexSet) as a PolyData 0D in VTK with name: " + curr_obj_dict['name'])
-            #     curr_obj_dict['vtk_obj'].SetPoints(curr_obj_points)
-            #     """Vertex cells, one for each point, are added here."""
-            #     for pid in range(curr_obj_dict['vtk_obj'].GetNumberOfPoints()):
-            #         vertex = vtkVertex()
-            #         vertex.GetPointIds().SetId(0, pid)
-            #         curr_obj_cells.InsertNextCell(vertex)
-            #     curr_obj_dict['vtk_obj'].SetVerts(curr_obj_cells)
-            #
-            if curr_obj_dict["topology"] == "PolyLine":
-                self.print_terminal(
-                    f"Importing GOCAD PLine (PolyLine) as a PolyData 1D in VTK with name: {curr_obj_dict['name']}"
-                )
-                curr_obj_dict["vtk_obj"].SetPoints(curr_obj_points)
-                curr_obj_dict["vtk_obj"].SetLines(curr_obj_cells)
+        for line in gocad_object["header"]:
+            clean_line = line.strip().split()
+            if "name:" in clean_line[0]:
+                if clean_line[0] == "name:":
+                    # standard import
+                    curr_obj_dict["name"] = "_".join(
+                        clean_line[1:]
+                    )  # see if a suffix must be added to split multipart
+                else:
+                    # solves a bug in some other software that does not add a space after name:
+                    curr_obj_dict["name"] = "_".join(clean_line[:])
+                    curr_obj_dict["name"] = curr_obj_dict["name"][
+                        5:
+                    ]  # this removes 'name:'
+                if uid_from_name:
+                    curr_obj_dict["uid"] = curr_obj_dict["name"]
 
-            elif curr_obj_dict["topology"] == "TriSurf":
-                self.print_terminal(
-                    f"Importing GOCAD TSurf (TriSurf) as a PolyData 2D in VTK with name: {curr_obj_dict['name']}"
-                )
-                curr_obj_dict["vtk_obj"].SetPoints(curr_obj_points)
-                curr_obj_dict["vtk_obj"].SetPolys(curr_obj_cells)
+        # Process the arrays and write the VTK entity to the project boundary_coll
+        entity_counter += 1  # update entity counter
 
-            # if properties_number > 0:
-            #     for i in range(properties_number):
-            #         curr_obj_dict['vtk_obj'].GetPointData().AddArray(curr_obj_properties_collection.GetItem(i))
+        # Write points and cells TO VTK OBJECT. Properties are not imported for boundaries.
+        if curr_obj_dict["topology"] == "PolyLine":
+            self.print_terminal(
+                f"Importing GOCAD PLine (PolyLine) as a PolyData 1D in VTK with name: {curr_obj_dict['name']}"
+            )
+        elif curr_obj_dict["topology"] == "TriSurf":
+            self.print_terminal(
+                f"Importing GOCAD TSurf (TriSurf) as a PolyData 2D in VTK with name: {curr_obj_dict['name']}"
+            )
+        gocad_object_to_vtk(
+            gocad_object=gocad_object,
+            vtk_obj=curr_obj_dict["vtk_obj"],
+            properties=False,
+        )
 
-            # Add current_entity to entities collection
-            self.boundary_coll.add_entity_from_dict(entity_dict=curr_obj_dict)
-            del curr_obj_points
-            del curr_obj_cells
-            # del curr_obj_properties_collection
-            del curr_obj_dict
+        # Add current_entity to entities collection
+        self.boundary_coll.add_entity_from_dict(entity_dict=curr_obj_dict)
+        del curr_obj_dict
 
-            # Closing message
-            self.print_terminal(f"Object n. {str(entity_counter)} saved")
+        # Closing message
+        self.print_terminal(f"Object n. {str(entity_counter)} saved")
 
     n_entities_after = self.boundary_coll.get_number_of_entities
     self.print_terminal(f"Entities before importing: {str(n_entities_before)}")
@@ -1216,48 +898,31 @@ def vtk2gocad(self=None, out_file_name=None):
             #     fout.write("TVOLUME\n")
             #     """Build connectivity matrix here."""
             #     connectivity = self.geol_coll.get_uid_vtk_obj(uid).cells
-            # Write VRTX or PVRTX
+            # Write VRTX or PVRTX, with ids starting from 1 as in Gocad Ascii.
+            # Whole arrays are formatted at once by write_gocad_records().
             if properties_names != []:
-                for row in range(np_shape(pvrtx_mtx)[0]):
-                    data_row = " ".join(
-                        ["{}".format(cell) for cell in pvrtx_mtx[row, :]]
-                    )
-                    fout.write(
-                        "PVRTX " + str(row + 1) + " " + data_row + "\n"
-                    )  # row+1 since indexes in Gocad Ascii start from 1
+                write_gocad_records(
+                    fout=fout, keyword="PVRTX", values=pvrtx_mtx, numbered=True
+                )
                 del pvrtx_mtx
             else:
-                for row in range(np_shape(vrtx_mtx)[0]):
-                    data_row = " ".join(
-                        ["{}".format(cell) for cell in vrtx_mtx[row, :]]
-                    )
-                    fout.write(
-                        "VRTX " + str(row + 1) + " " + data_row + "\n"
-                    )  # row+1 since indexes in Gocad Ascii start from 1
+                write_gocad_records(
+                    fout=fout, keyword="VRTX", values=vrtx_mtx, numbered=True
+                )
                 del vrtx_mtx
             # Write connectivity
+            # +1 since indexes in Gocad Ascii start from 1 - this creates a new array and does not alter
+            # connectivity that is a shallow copy
             if topology in ["VertexSet", "XsVertexSet"]:
                 pass
             elif topology in ["PolyLine", "XsPolyLine"]:
-                for row in range(np_shape(connectivity)[0]):
-                    data_row = " ".join(
-                        ["{}".format(cell + 1) for cell in connectivity[row, :]]
-                    )  # cell+1 since indexes in Gocad Ascii start from 1 - do not alter connectivity that is a shallow copy
-                    fout.write("SEG " + data_row + "\n")
+                write_gocad_records(fout=fout, keyword="SEG", values=connectivity + 1)
                 del connectivity
             elif topology in ["TriSurf"]:
-                for row in range(np_shape(connectivity)[0]):
-                    data_row = " ".join(
-                        ["{}".format(cell + 1) for cell in connectivity[row, :]]
-                    )  # cell+1 since indexes in Gocad Ascii start from 1 - do not alter connectivity that is a shallow copy
-                    fout.write("TRGL " + data_row + "\n")
+                write_gocad_records(fout=fout, keyword="TRGL", values=connectivity + 1)
                 del connectivity
             # elif topology in ["TetraSolid"]:
-            #     for row in range(np_shape(connectivity)[0]):
-            #         data_row = " ".join(
-            #             ["{}".format(cell + 1) for cell in connectivity[row, :]]
-            #         )  # cell+1 since indexes in Gocad Ascii start from 1 - do not alter connectivity that is a shallow copy
-            #         fout.write("TETRA " + data_row + "\n")
+            #     write_gocad_records(fout=fout, keyword="TETRA", values=connectivity + 1)
             #     del connectivity
             fout.write("END\n")
             self.print_terminal(f"Written entity {uid} to file {out_file_name}")
@@ -12,7 +12,6 @@ import rasterio.plot as rio_plt
 
 from numpy import abs as np_abs
 from numpy import cos as np_cos
-from numpy import dstack as np_dstack
 from numpy import pi as np_pi
 from numpy import sin as np_sin
 from numpy import nan_to_num as np_nan_to_num
@@ -25,27 +24,26 @@ from vtkmodules.util import numpy_support
 from pzero.collections.image_collection import ImageCollection
 from pzero.entities_factory import MapImage, XsImage
 from pzero.helpers.helper_dialogs import multiple_input_dialog
+from pzero.helpers.image_pyramid import read_bands
 
 
 def image_file_to_vtk(self=None, rio_image=None):
-    """Generic function used to read an image from a rasterio image object and convert it to a VTK array."""
-    # Deep copy used since the image is read now from file.
+    """Generic function used to read an image from a rasterio image object and convert it to a VTK array.
+    Bands are read window by window into a single pixel-interleaved buffer (see helpers/image_pyramid.py),
+    that is wrapped by the VTK array without copying, so the image is held in memory only once.
+    """
     # DO NOT specify the array type as e.g. in array_type=vtk.VTK_CHAR
     n_bands = rio_image.count
 
     if n_bands == 1 or n_bands == 2:
         # Greyscale or Greyscale with alpha channel
-        vtk_array = numpy_support.numpy_to_vtk(rio_image.read(1).ravel(), deep=True)
+        numpy_array = read_bands(rio_image=rio_image, indexes=[1])
+        vtk_array = numpy_support.numpy_to_vtk(numpy_array.reshape(-1), deep=False)
         prop_name = "greyscale"
     elif n_bands == 3 or n_bands == 4:
         # RGB or RGBA (RGB with alpha channel)
-        vtk_r_property = rio_image.read(1)
-        vtk_g_property = rio_image.read(2)
-        vtk_b_property = rio_image.read(3)
-        numpy_array = np_dstack((vtk_r_property, vtk_g_property, vtk_b_property))
-        vtk_array = numpy_support.numpy_to_vtk(
-            numpy_array.swapaxes(0, 1).reshape((-1, 3), order="F"), deep=True
-        )
+        numpy_array = read_bands(rio_image=rio_image, indexes=[1, 2, 3])
+        vtk_array = numpy_support.numpy_to_vtk(numpy_array.reshape(-1, 3), deep=False)
         prop_name = "RGB"
     # elif n_bands == 4:
     #     # RGBA - not yet supported, so we just drop the alpha channel in the previous case --------------------------
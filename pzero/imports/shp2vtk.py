@@ -5,21 +5,34 @@ from copy import deepcopy
 
 from geopandas import read_file as gpd_read_file
 
-from numpy import array as np_array
+from numpy import arange as np_arange
 from numpy import asarray as np_asarray
 from numpy import atleast_1d as np_atleast_1d
+from numpy import bincount as np_bincount
 from numpy import column_stack as np_column_stack
-from numpy import shape as np_shape
-from numpy import zeros as np_zeros
-
-from vtk import vtkAppendPolyData
+from numpy import concatenate as np_concatenate
+from numpy import cumsum as np_cumsum
+from numpy import flatnonzero as np_flatnonzero
+from numpy import int64 as np_int64
+from numpy import isnan as np_isnan
+from numpy import searchsorted as np_searchsorted
 
 from pandas import DataFrame as pd_DataFrame
 
+from shapely import get_coordinates as shp_get_coordinates
+from shapely import get_parts as shp_get_parts
+from shapely import is_empty as shp_is_empty
+from shapely import is_missing as shp_is_missing
+
 from pzero.collections.background_collection import BackgroundCollection
 from pzero.collections.fluid_collection import FluidCollection
 from pzero.collections.geological_collection import GeologicalCollection
-from pzero.entities_factory import PolyLine, VertexSet, Attitude
+from pzero.entities_factory import (
+    Attitude,
+    PolyLine,
+    VertexSet,
+    cell_array_from_numpy,
+)
 from pzero.helpers.helper_dialogs import ShapefileAssignmentDialog, options_dialog
 from pzero.orientation_analysis import dip_directions2normals
 
@@ -32,9 +45,8 @@ USER_DEFINED_NAME_COLUMN = "__pzero_user_defined_name__"
 USER_DEFINED_SCENARIO_TOKEN = "__user_defined_scenario__"
 USER_DEFINED_SCENARIO_COLUMN = "__pzero_user_defined_scenario__"
 
-# Importer for SHP files and other GIS formats, to be improved IN THE FUTURE.
-# Known bugs for multi-part polylines.
-# Points not handled correctly.
+# Importer for SHP files and other GIS formats. Geometries of a whole layer are converted at once
+# with vectorized Shapely functions and entities are added to the collection with a single bulk insert.
 
 
 def _get_valid_roles_for_collection(collection):
@@ -138,6 +150,136 @@ def _print_import_summary(caller, imported_count, total_entities, invalid_role_c
     caller.print_terminal(msg)
 
 
+def _xyz_coordinates(geometries=None):
+    """Coordinates of all the geometries in an array, in a single call, as a n x 3 array, together with the
+    index of the geometry each point belongs to. Z is set to 0 for 2D geometries."""
+    points, point_geoms = shp_get_coordinates(
+        geometries, include_z=True, return_index=True
+    )
+    points[np_isnan(points[:, 2]), 2] = 0.0
+    return points, point_geoms
+
+
+def _offsets(ids=None, n=None):
+    """Offsets of the groups of a sorted array of ids in range(n), with empty groups allowed."""
+    return np_concatenate([[0], np_cumsum(np_bincount(ids, minlength=n))]).astype(
+        np_int64
+    )
+
+
+def _line_entity_dicts(
+    gdf=None, entity_dict=None, props_map=None, column_names=None, label_col=None
+):
+    """Build a list of PolyLine entity dictionaries, one for each row of a layer of LineString and
+    MultiLineString geometries. Points and segments of the whole layer are built at once with vectorized
+    Shapely and Numpy functions and then split into entities with offsets. Each part of a MultiLineString
+    gives its own segments, as with PolyLine.auto_cells() for each part. Rows without points are skipped.
+    """
+    n_rows = gdf.shape[0]
+    parts, part_rows = shp_get_parts(gdf.geometry.values, return_index=True)
+    points, point_parts = _xyz_coordinates(parts)
+    point_rows = part_rows[point_parts]
+    point_offsets = _offsets(point_rows, n_rows)
+    # Segments connect consecutive points of the same part, with point ids local to each entity.
+    seg_starts = np_flatnonzero(point_parts[:-1] == point_parts[1:])
+    seg_rows = point_rows[seg_starts]
+    seg_offsets = _offsets(seg_rows, n_rows)
+    segments = (
+        np_column_stack([seg_starts, seg_starts + 1]) - point_offsets[seg_rows][:, None]
+    )
+    columns = {
+        pzero_prop: gdf[shp_col].values
+        for pzero_prop, shp_col in props_map.items()
+        if shp_col in column_names
+    }
+    labels = gdf[label_col].values if label_col in column_names else None
+    entity_dicts = []
+    for row in np_flatnonzero(point_offsets[1:] > point_offsets[:-1]):
+        curr_obj_dict = deepcopy(entity_dict)
+        for pzero_prop, values in columns.items():
+            curr_obj_dict[pzero_prop] = values[row]
+        vtk_obj = PolyLine()
+        vtk_obj.points = points[point_offsets[row] : point_offsets[row + 1]]
+        vtk_obj.SetLines(
+            cell_array_from_numpy(segments[seg_offsets[row] : seg_offsets[row + 1]])
+        )
+        vtk_obj.BuildLinks()
+        if labels is not None:
+            vtk_obj.set_field_data(name="name", data=np_asarray([labels[row]]))
+        curr_obj_dict["topology"] = "PolyLine"
+        curr_obj_dict["vtk_obj"] = vtk_obj
+        entity_dicts.append(curr_obj_dict)
+    return entity_dicts
+
+
+def _point_entity_dicts(
+    gdf=None,
+    entity_dict=None,
+    props_map=None,
+    column_names=None,
+    group_cols=None,
+    orient_map=None,
+    label_col=None,
+):
+    """Build a list of VertexSet (or Attitude, if a dip column is mapped in orient_map) entity dictionaries,
+    one for each group of Point rows with the same group_cols values. Coordinates, dip directions and normals
+    of the whole layer are calculated at once and then sliced for each group. Empty and missing geometries
+    have no coordinates, so their rows are skipped, and a group made only of such rows gives no entity.
+    """
+    geometries = gdf.geometry.values
+    gdf = gdf[~(shp_is_empty(geometries) | shp_is_missing(geometries))]
+    points, point_rows = _xyz_coordinates(gdf.geometry.values)
+    # Row of the first point of each row, for rows in positional order.
+    first_points = np_searchsorted(point_rows, np_arange(gdf.shape[0]))
+    dip_col = orient_map.get("dip")
+    has_dip = bool(dip_col and dip_col in column_names)
+    point_data = {}
+    if has_dip:
+        point_data["dip"] = gdf[dip_col].values
+        dir_col = orient_map.get("dir")
+        dip_dir_col = orient_map.get("dip_dir")
+        if dir_col and dir_col in column_names:
+            # Convert dir to dip_dir by adding 90 degrees
+            point_data["dip_dir"] = (gdf[dir_col].values + 90) % 360
+        elif dip_dir_col and dip_dir_col in column_names:
+            point_data["dip_dir"] = gdf[dip_dir_col].values
+        if "dip_dir" in point_data:
+            point_data["Normals"] = dip_directions2normals(
+                point_data["dip"], point_data["dip_dir"]
+            )
+    columns = {
+        pzero_prop: gdf[shp_col].values
+        for pzero_prop, shp_col in props_map.items()
+        if shp_col in column_names
+    }
+    labels = gdf[label_col].values if label_col in column_names else None
+    entity_dicts = []
+    for rows in gdf.groupby(group_cols).indices.values():
+        curr_obj_dict = deepcopy(entity_dict)
+        # Assign entity properties from the first row of the group
+        for pzero_prop, values in columns.items():
+            curr_obj_dict[pzero_prop] = values[rows[0]]
+        vtk_obj = Attitude() if has_dip else VertexSet()
+        vtk_obj.points = points[first_points[rows]]
+        for key, values in point_data.items():
+            vtk_obj.set_point_data(key, np_atleast_1d(values[rows]))
+        vtk_obj.auto_cells()
+        if label_col is not None:
+            if labels is not None:
+                vtk_obj.set_field_data(name="name", data=np_asarray(labels[rows]))
+            else:
+                vtk_obj.set_field_data(name="name")
+        curr_obj_dict["topology"] = "VertexSet"
+        curr_obj_dict["vtk_obj"] = vtk_obj
+        properties_names = vtk_obj.point_data_keys
+        curr_obj_dict["properties_names"] = properties_names
+        curr_obj_dict["properties_components"] = [
+            vtk_obj.get_point_data_shape(key)[1] for key in properties_names
+        ]
+        entity_dicts.append(curr_obj_dict)
+    return entity_dicts
+
+
 def shp2vtk(self=None, in_file_name=None, collection=None):
     """Import and add a points and polylines from shape files as VertexSet and PolyLine entities.
     <self> is the calling ProjectWindow() instance."""
@@ -289,381 +431,40 @@ def shp2vtk(self=None, in_file_name=None, collection=None):
             )
             return
 
+    # Build all entities of the layer at once, then add them with a single bulk insert.
     if collection == "Geology":
-        if (gdf.geom_type[0] == "LineString") or (
-            gdf.geom_type[0] == "MultiLineString"
-        ):
-            imported_count = 0
-            for row in range(gdf.shape[0]):
-                curr_obj_dict = deepcopy(GeologicalCollection().entity_dict)
-                # Use props_map to assign properties
-                for pzero_prop, shp_col in props_map.items():
-                    if shp_col in column_names:
-                        curr_obj_dict[pzero_prop] = gdf.loc[row, shp_col]
-                curr_obj_dict["topology"] = "PolyLine"
-                curr_obj_dict["vtk_obj"] = PolyLine()
-                if gdf.geom_type[row] == "LineString":
-                    outXYZ = np_array(list(gdf.loc[row].geometry.coords), dtype=float)
-                    if np_shape(outXYZ)[1] == 2:
-                        outZ = np_zeros((np_shape(outXYZ)[0], 1))
-                        outXYZ = np_column_stack((outXYZ, outZ))
-                    curr_obj_dict["vtk_obj"].points = outXYZ
-                    curr_obj_dict["vtk_obj"].auto_cells()
-                elif gdf.geom_type[row] == "MultiLineString":
-                    # to be solved with https://shapely.readthedocs.io/en/stable/migration.html ???
-                    outXYZ_list = np_array(gdf.loc[row].geometry)
-                    vtkappend = vtkAppendPolyData()
-                    for outXYZ in outXYZ_list:
-                        temp_vtk = PolyLine()
-                        # print("outXYZ:\n", outXYZ)
-                        # print("np_shape(outXYZ):\n", np_shape(outXYZ))
-                        if np_shape(outXYZ)[1] == 2:
-                            outZ = np_zeros((np_shape(outXYZ)[0], 1))
-                            # print("outZ:\n", outZ)
-                            outXYZ = np_column_stack((outXYZ, outZ))
-                        # print("outXYZ:\n", outXYZ)
-                        temp_vtk.points = outXYZ
-                        temp_vtk.auto_cells()
-                        vtkappend.AddInputData(temp_vtk)
-                    vtkappend.Update()
-                    curr_obj_dict["vtk_obj"].ShallowCopy(vtkappend.GetOutput())
-                # Create entity from the dictionary and run left_right.
-                if curr_obj_dict["vtk_obj"].points_number > 0:
-                    output_uid = self.geol_coll.add_entity_from_dict(curr_obj_dict)
-                    imported_count += 1
-                else:
-                    print("Empty object")
-                # else:
-                # except:
-                #     print("Invalid object")
-                del curr_obj_dict
-            _print_import_summary(
-                self, imported_count, total_entities, invalid_role_count
-            )
-        elif gdf.geom_type[0] == "Point":
-            feature_col = props_map.get("feature")
-            group_cols = _get_point_group_columns(props_map, column_names)
-            if feature_col and feature_col in column_names and group_cols:
-                imported_count = 0
-                for _group_key, group_df in gdf.groupby(group_cols):
-                    curr_obj_dict = deepcopy(GeologicalCollection().entity_dict)
-                    # Check if we have dip data (Attitude)
-                    dip_col = orient_map.get("dip")
-                    if dip_col and dip_col in gdf.columns:
-                        vtk_obj = Attitude()
-                    else:
-                        vtk_obj = VertexSet()
-                    # Assign entity properties from the first row of the group
-                    for pzero_prop, shp_col in props_map.items():
-                        if shp_col in column_names:
-                            curr_obj_dict[pzero_prop] = group_df.iloc[0][shp_col]
-                    curr_obj_dict["topology"] = "VertexSet"
-                    curr_obj_dict["vtk_obj"] = vtk_obj
-                    # Extract coordinates from all points in the group
-                    outXYZ = np_array(
-                        [np_array(geom.coords[0]) for geom in group_df.geometry]
-                    )
-                    if outXYZ.ndim == 1:
-                        outXYZ = outXYZ.reshape(-1, np_shape(outXYZ)[0])
-                    if np_shape(outXYZ)[1] == 2:
-                        outZ = np_zeros((np_shape(outXYZ)[0], 1))
-                        outXYZ = np_column_stack((outXYZ, outZ))
-                    curr_obj_dict["vtk_obj"].points = outXYZ
-
-                    # Handle dip data using mapping
-                    dip_col = orient_map.get("dip")
-                    if dip_col and dip_col in column_names:
-                        dip_values = np_atleast_1d(group_df[dip_col].values)
-                        curr_obj_dict["vtk_obj"].set_point_data("dip", dip_values)
-
-                    # Handle dip_dir or dir (dir needs conversion: dir + 90° = dip_dir)
-                    has_angle_data = False
-                    dir_col = orient_map.get("dir")
-                    if dir_col and dir_col in column_names:
-                        # Convert dir to dip_dir by adding 90 degrees (as in original)
-                        direction = (group_df[dir_col].values + 90) % 360
-                        curr_obj_dict["vtk_obj"].set_point_data(
-                            "dip_dir", np_atleast_1d(direction)
-                        )
-                        has_angle_data = True
-                    else:
-                        # Try dip_dir directly
-                        dip_dir_col = orient_map.get("dip_dir")
-                        if dip_dir_col and dip_dir_col in column_names:
-                            dip_dir_values = np_atleast_1d(group_df[dip_dir_col].values)
-                            curr_obj_dict["vtk_obj"].set_point_data(
-                                "dip_dir", dip_dir_values
-                            )
-                            has_angle_data = True
-
-                    # Calculate normals if we have both dip and angle data
-                    if dip_col and dip_col in column_names and has_angle_data:
-                        normals = dip_directions2normals(
-                            curr_obj_dict["vtk_obj"].get_point_data("dip"),
-                            curr_obj_dict["vtk_obj"].get_point_data("dip_dir"),
-                        )
-                        curr_obj_dict["vtk_obj"].set_point_data("Normals", normals)
-                    curr_obj_dict["vtk_obj"].auto_cells()
-                    properties_names = curr_obj_dict["vtk_obj"].point_data_keys
-                    properties_components = [
-                        curr_obj_dict["vtk_obj"].get_point_data_shape(key)[1]
-                        for key in properties_names
-                    ]
-                    curr_obj_dict["properties_names"] = properties_names
-                    curr_obj_dict["properties_components"] = properties_components
-                    self.geol_coll.add_entity_from_dict(curr_obj_dict)
-                    imported_count += 1
-                    del curr_obj_dict
-                _print_import_summary(
-                    self, imported_count, total_entities, invalid_role_count
-                )
-            else:
-                self.print_terminal(
-                    "Incomplete data. Feature property is required but not found in mapping."
-                )
+        target_coll = self.geol_coll
     elif collection == "Fluid contacts":
-        print(gdf.geom_type[0])
-        if (gdf.geom_type[0] == "LineString") or (
-            gdf.geom_type[0] == "MultiLineString"
-        ):
-            imported_count = 0
-            for row in range(gdf.shape[0]):
-                curr_obj_dict = deepcopy(FluidCollection().entity_dict)
-                for pzero_prop, shp_col in props_map.items():
-                    if shp_col in column_names:
-                        curr_obj_dict[pzero_prop] = gdf.loc[row, shp_col]
-                curr_obj_dict["topology"] = "PolyLine"
-                curr_obj_dict["vtk_obj"] = PolyLine()
-
-                if gdf.geom_type[row] == "LineString":
-                    outXYZ = np_array(list(gdf.loc[row].geometry.coords), dtype=float)
-                    if np_shape(outXYZ)[1] == 2:
-                        outZ = np_zeros((np_shape(outXYZ)[0], 1))
-                        # print("outZ:\n", outZ)
-                        outXYZ = np_column_stack((outXYZ, outZ))
-                    # print("outXYZ:\n", outXYZ)
-                    curr_obj_dict["vtk_obj"].points = outXYZ
-                    curr_obj_dict["vtk_obj"].auto_cells()
-                elif gdf.geom_type[row] == "MultiLineString":
-                    outXYZ_list = np_array(gdf.loc[row].geometry)
-                    vtkappend = vtkAppendPolyData()
-                    for outXYZ in outXYZ_list:
-                        temp_vtk = PolyLine()
-                        if np_shape(outXYZ)[1] == 2:
-                            outZ = np_zeros((np_shape(outXYZ)[0], 1))
-                            # print("outZ:\n", outZ)
-                            outXYZ = np_column_stack((outXYZ, outZ))
-                        # print("outXYZ:\n", outXYZ)
-                        temp_vtk.points = outXYZ
-                        temp_vtk.auto_cells()
-                        vtkappend.AddInputData(temp_vtk)
-                    vtkappend.Update()
-                    curr_obj_dict["vtk_obj"].ShallowCopy(vtkappend.GetOutput())
-                # Create entity from the dictionary and run left_right.
-                if curr_obj_dict["vtk_obj"].points_number > 0:
-                    output_uid = self.fluid_coll.add_entity_from_dict(curr_obj_dict)
-                    imported_count += 1
-                else:
-                    print("Empty object")
-                # else:
-                # except:
-                #     print("Invalid object")
-                del curr_obj_dict
-            _print_import_summary(
-                self, imported_count, total_entities, invalid_role_count
-            )
-        elif gdf.geom_type[0] == "Point":
-            feature_col = props_map.get("feature")
-            group_cols = _get_point_group_columns(props_map, column_names)
-            if feature_col and feature_col in column_names and group_cols:
-                imported_count = 0
-                for _group_key, group_df in gdf.groupby(group_cols):
-                    curr_obj_dict = deepcopy(FluidCollection().entity_dict)
-                    dip_col = orient_map.get("dip")
-                    vtk_obj = (
-                        Attitude()
-                        if (dip_col and dip_col in gdf.columns)
-                        else VertexSet()
-                    )
-                    # Assign entity properties from the first row of the group
-                    for pzero_prop, shp_col in props_map.items():
-                        if shp_col in column_names:
-                            curr_obj_dict[pzero_prop] = group_df.iloc[0][shp_col]
-                    curr_obj_dict["topology"] = "VertexSet"
-                    curr_obj_dict["vtk_obj"] = vtk_obj
-                    # Extract coordinates from all points in the group
-                    outXYZ = np_array(
-                        [np_array(geom.coords[0]) for geom in group_df.geometry]
-                    )
-                    if outXYZ.ndim == 1:
-                        outXYZ = outXYZ.reshape(-1, np_shape(outXYZ)[0])
-                    if np_shape(outXYZ)[1] == 2:
-                        outZ = np_zeros((np_shape(outXYZ)[0], 1))
-                        outXYZ = np_column_stack((outXYZ, outZ))
-                    curr_obj_dict["vtk_obj"].points = outXYZ
-
-                    # Handle orientation data for Attitude objects
-                    if isinstance(vtk_obj, Attitude):
-                        # Handle dip data
-                        dip_col = orient_map.get("dip")
-                        if dip_col and dip_col in column_names:
-                            dip_values = np_atleast_1d(group_df[dip_col].values)
-                            curr_obj_dict["vtk_obj"].set_point_data("dip", dip_values)
-
-                        # Handle dip_dir or dir (dir needs conversion: dir + 90° = dip_dir)
-                        has_angle_data = False
-                        dir_col = orient_map.get("dir")
-                        if dir_col and dir_col in column_names:
-                            # Convert dir to dip_dir by adding 90 degrees
-                            direction = (group_df[dir_col].values + 90) % 360
-                            curr_obj_dict["vtk_obj"].set_point_data(
-                                "dip_dir", np_atleast_1d(direction)
-                            )
-                            has_angle_data = True
-                        else:
-                            # Try dip_dir directly
-                            dip_dir_col = orient_map.get("dip_dir")
-                            if dip_dir_col and dip_dir_col in column_names:
-                                dip_dir_values = np_atleast_1d(
-                                    group_df[dip_dir_col].values
-                                )
-                                curr_obj_dict["vtk_obj"].set_point_data(
-                                    "dip_dir", dip_dir_values
-                                )
-                                has_angle_data = True
-
-                        # Calculate normals if we have both dip and angle data
-                        if dip_col and dip_col in column_names and has_angle_data:
-                            normals = dip_directions2normals(
-                                curr_obj_dict["vtk_obj"].get_point_data("dip"),
-                                curr_obj_dict["vtk_obj"].get_point_data("dip_dir"),
-                            )
-                            curr_obj_dict["vtk_obj"].set_point_data("Normals", normals)
-
-                    curr_obj_dict["vtk_obj"].auto_cells()
-                    properties_names = curr_obj_dict["vtk_obj"].point_data_keys
-                    properties_components = [
-                        curr_obj_dict["vtk_obj"].get_point_data_shape(key)[1]
-                        for key in properties_names
-                    ]
-                    curr_obj_dict["properties_names"] = properties_names
-                    curr_obj_dict["properties_components"] = properties_components
-                    self.fluid_coll.add_entity_from_dict(curr_obj_dict)
-                    imported_count += 1
-                    del curr_obj_dict
-                _print_import_summary(
-                    self, imported_count, total_entities, invalid_role_count
-                )
-            else:
-                self.print_terminal(
-                    "Incomplete data. Feature property is required but not found in mapping."
-                )
+        target_coll = self.fluid_coll
     elif collection == "Background data":
-        if (gdf.geom_type[0] == "LineString") or (
-            gdf.geom_type[0] == "MultiLineString"
-        ):
-            imported_count = 0
-            for row in range(gdf.shape[0]):
-                curr_obj_dict = deepcopy(BackgroundCollection().entity_dict)
-                for pzero_prop, shp_col in props_map.items():
-                    if shp_col in column_names:
-                        curr_obj_dict[pzero_prop] = gdf.loc[row, shp_col]
-                curr_obj_dict["topology"] = "PolyLine"
-                curr_obj_dict["vtk_obj"] = PolyLine()
-                if gdf.geom_type[row] == "LineString":
-                    outXYZ = np_array(list(gdf.loc[row].geometry.coords), dtype=float)
-                    # print("outXYZ:\n", outXYZ)
-                    if np_shape(outXYZ)[1] == 2:
-                        outZ = np_zeros((np_shape(outXYZ)[0], 1))
-                        # print("outZ:\n", outZ)
-                        outXYZ = np_column_stack((outXYZ, outZ))
-                    # print("outXYZ:\n", outXYZ)
-                    curr_obj_dict["vtk_obj"].points = outXYZ
-                    curr_obj_dict["vtk_obj"].auto_cells()
-                    # Handle label field if present in mapping
-                    label_col = props_map.get("label")
-                    if label_col and label_col in column_names:
-                        curr_obj_dict["vtk_obj"].set_field_data(
-                            name="name", data=gdf[label_col].values
-                        )
-                elif gdf.geom_type[row] == "MultiLineString":
-                    outXYZ_list = np_array(gdf.loc[row].geometry)
-                    vtkappend = vtkAppendPolyData()
-                    for outXYZ in outXYZ_list:
-                        temp_vtk = PolyLine()
-                        # print("outXYZ:\n", outXYZ)
-                        # print("np_shape(outXYZ):\n", np_shape(outXYZ))
-                        if np_shape(outXYZ)[1] == 2:
-                            outZ = np_zeros((np_shape(outXYZ)[0], 1))
-                            # print("outZ:\n", outZ)
-                            outXYZ = np_column_stack((outXYZ, outZ))
-                        # print("outXYZ:\n", outXYZ)
-                        temp_vtk.points = outXYZ
-                        temp_vtk.auto_cells()
-                        vtkappend.AddInputData(temp_vtk)
-                    vtkappend.Update()
-                    # Handle label field if present in mapping
-                    label_col = props_map.get("label")
-                    if label_col and label_col in column_names:
-                        out_vtk = PolyLine()
-                        out_vtk.ShallowCopy(vtkappend.GetOutput())
-                        out_vtk.set_field_data(name="name", data=gdf[label_col].values)
-                        curr_obj_dict["vtk_obj"].ShallowCopy(out_vtk)
-                    else:
-                        curr_obj_dict["vtk_obj"].ShallowCopy(vtkappend.GetOutput())
-
-                if curr_obj_dict["vtk_obj"].points_number > 0:
-                    self.backgrnd_coll.add_entity_from_dict(curr_obj_dict)
-                    imported_count += 1
-                else:
-                    self.print_terminal("Empty object")
-                del curr_obj_dict
-            _print_import_summary(
-                self, imported_count, total_entities, invalid_role_count
+        target_coll = self.backgrnd_coll
+    else:
+        return
+    label_col = props_map.get("label") if collection == "Background data" else None
+    if geom_type in ["LineString", "MultiLineString"]:
+        entity_dicts = _line_entity_dicts(
+            gdf=gdf,
+            entity_dict=target_coll.entity_dict,
+            props_map=props_map,
+            column_names=column_names,
+            label_col=label_col,
+        )
+    else:
+        feature_col = props_map.get("feature")
+        group_cols = _get_point_group_columns(props_map, column_names)
+        if not (feature_col and feature_col in column_names and group_cols):
+            self.print_terminal(
+                "Incomplete data. Feature property is required but not found in mapping."
             )
-            # Points
-        elif gdf.geom_type[0] == "Point":
-            feature_col = props_map.get("feature")
-            group_cols = _get_point_group_columns(props_map, column_names)
-            if feature_col and feature_col in column_names and group_cols:
-                imported_count = 0
-                for _group_key, group_df in gdf.groupby(group_cols):
-                    curr_obj_dict = deepcopy(BackgroundCollection().entity_dict)
-                    vtk_obj = VertexSet()
-                    # Assign entity properties from the first row of the group
-                    for pzero_prop, shp_col in props_map.items():
-                        if shp_col in column_names:
-                            curr_obj_dict[pzero_prop] = group_df.iloc[0][shp_col]
-                    curr_obj_dict["topology"] = "VertexSet"
-                    curr_obj_dict["vtk_obj"] = vtk_obj
-                    # Extract coordinates from all points in the group
-                    outXYZ = np_array(
-                        [np_array(geom.coords[0]) for geom in group_df.geometry]
-                    )
-                    if outXYZ.ndim == 1:
-                        outXYZ = outXYZ.reshape(-1, np_shape(outXYZ)[0])
-                    if np_shape(outXYZ)[1] == 2:
-                        outZ = np_zeros((np_shape(outXYZ)[0], 1))
-                        outXYZ = np_column_stack((outXYZ, outZ))
-                    curr_obj_dict["vtk_obj"].points = outXYZ
-                    curr_obj_dict["vtk_obj"].auto_cells()
-                    # Handle label field if present in mapping
-                    label_col = props_map.get("label")
-                    if label_col and label_col in column_names:
-                        curr_obj_dict["vtk_obj"].set_field_data(
-                            name="name", data=np_asarray(group_df[label_col].values)
-                        )
-                    else:
-                        curr_obj_dict["vtk_obj"].set_field_data(name="name")
-
-                    if curr_obj_dict["vtk_obj"].points_number > 0:
-                        self.backgrnd_coll.add_entity_from_dict(curr_obj_dict)
-                        imported_count += 1
-                    del curr_obj_dict
-                _print_import_summary(
-                    self, imported_count, total_entities, invalid_role_count
-                )
-            else:
-                self.print_terminal(
-                    "Incomplete data. Feature property is required but not found in mapping."
-                )
+            return
+        entity_dicts = _point_entity_dicts(
+            gdf=gdf,
+            entity_dict=target_coll.entity_dict,
+            props_map=props_map,
+            column_names=column_names,
+            group_cols=group_cols,
+            orient_map=orient_map if collection != "Background data" else {},
+            label_col=label_col,
+        )
+    target_coll.add_entities_from_dicts(entity_dicts=entity_dicts)
+    _print_import_summary(self, len(entity_dicts), total_entities, invalid_role_count)
@@ -226,7 +226,10 @@ def set_normals(self):
                 self.dom_coll.append_uid_property(
                     uid=uid, property_name="Normals", property_components=3
                 )
-                self.dom_coll.get_uid_vtk_obj(uid).vtk_set_normals()
+                vtk_obj = self.dom_coll.get_uid_vtk_obj(uid)
+                vtk_obj.vtk_set_normals(
+                    locator=self.spatial_index.point_locator(uid=uid, vtk_obj=vtk_obj)
+                )
                 self.prop_legend.update_widget(self)
                 # self.print_terminal(self.prop_legend_df)
             self.print_terminal("Done")
@@ -270,6 +270,9 @@ def segment_pc(self):
         vtk_obj.GetPointData().SetActiveScalars("dip direction")
         connectivity_filter_dd = vtkEuclideanClusterExtraction()
         connectivity_filter_dd.SetInputData(vtk_obj)
+        connectivity_filter_dd.SetLocator(
+            self.parent.spatial_index.point_locator(uid=uid, vtk_obj=vtk_obj)
+        )
         connectivity_filter_dd.SetRadius(dialog["rad"])
         connectivity_filter_dd.SetExtractionModeToAllClusters()
         connectivity_filter_dd.ScalarConnectivityOn()
@@ -7,6 +7,35 @@ import os
 import struct
 import numpy as np
 
+# Big-endian dtypes of samples in the input file, by SEG-Y data sample format code.
+SAMPLE_DTYPES = {
+    1: ">u4",  # IBM Float, decoded with ibm_to_ieee
+    2: ">i4",  # 32-bit Integer
+    3: ">i2",  # 16-bit Integer
+    5: ">f4",  # IEEE Float
+    8: "i1",  # 8-bit Integer
+}
+
+# Fields of the 240-byte trace header that are updated for PZero, at their byte offsets.
+TRACE_HEADER_DTYPE = np.dtype(
+    {
+        "names": [
+            "num_samples",
+            "sample_interval",
+            "cdp_x",
+            "cdp_y",
+            "inline",
+            "xline",
+        ],
+        "formats": [">u2", ">u2", ">i4", ">i4", ">u2", ">u2"],
+        "offsets": [114, 116, 180, 184, 188, 192],
+        "itemsize": 240,
+    }
+)
+
+# Target size in bytes of each chunk of traces converted and written at once.
+CHUNK_BYTES = 2**26
+
 
 def read_binary_header(file):
     """Read basic binary header values"""
@@ -38,6 +67,9 @@ def analyze_segy_parameters(input_file):
         sample_size = 4  # We'll convert everything to 4-byte IEEE float
         trace_data_size = num_samples * sample_size
         trace_size = trace_header_size + trace_data_size
+        # Size of samples and traces in the input file, that depends on the format code
+        input_sample_size = np.dtype(SAMPLE_DTYPES.get(format_code, ">u4")).itemsize
+        input_trace_size = trace_header_size + num_samples * input_sample_size
 
         return {
             "num_samples": num_samples,
@@ -46,6 +78,8 @@ def analyze_segy_parameters(input_file):
             "trace_size": trace_size,
             "trace_header_size": trace_header_size,
             "sample_size": sample_size,
+            "input_sample_size": input_sample_size,
+            "input_trace_size": input_trace_size,
         }
 
 
@@ -96,8 +130,42 @@ def update_to_rev2(binary_header, trace_count, samples_per_trace):
     return header
 
 
+def ibm_to_ieee(ibm=None):
+    """Convert an array of 32-bit IBM System/360 floats, given as unsigned integers, to IEEE float32."""
+    ibm = np.asarray(ibm, dtype=np.uint32)
+    sign = np.where(ibm >> 31, -1.0, 1.0)
+    exponent = ((ibm >> 24) & 0x7F).astype(np.int64)
+    # IBM floats are 0.mantissa x 16 ** (exponent - 64), with a 24-bit mantissa.
+    mantissa = (ibm & 0x00FFFFFF).astype(np.float64)
+    return (sign * np.ldexp(mantissa, 4 * (exponent - 64) - 24)).astype(np.float32)
+
+
+def decode_samples(samples=None, format_code=None):
+    """Convert an array of raw samples read with SAMPLE_DTYPES[format_code] to float32.
+    Unsupported format codes give zeros, as in the former sample-by-sample conversion.
+    """
+    if format_code == 1:
+        return ibm_to_ieee(samples)
+    if format_code in SAMPLE_DTYPES:
+        return samples.astype(np.float32)
+    return np.zeros(samples.shape, dtype=np.float32)
+
+
+def trace_dtype(num_samples=None, sample_dtype=None):
+    """Structured dtype of a SEG-Y trace: the 240-byte header, with the fields updated for PZero,
+    followed by num_samples samples of sample_dtype."""
+    return np.dtype(
+        [
+            ("header", TRACE_HEADER_DTYPE),
+            ("samples", sample_dtype, (num_samples,)),
+        ]
+    )
+
+
 def standardize_segy_for_pzero(input_file, output_file, print_fn=print):
-    """Standardize SEGY file specifically for PZero compatibility"""
+    """Standardize SEGY file specifically for PZero compatibility.
+    The input file is memory-mapped as an array of traces with a structured dtype, and traces are
+    converted and written in large chunks with vectorized operations."""
     # Get parameters from analysis
     params = analyze_segy_parameters(input_file)
     num_samples = params["num_samples"]
@@ -110,6 +178,8 @@ def standardize_segy_for_pzero(input_file, output_file, print_fn=print):
     print_fn(f"- Trace size: {trace_size} bytes")
     print_fn(f"- Sample interval: {sample_interval} μs")
     print_fn(f"- Format code: {format_code}")
+    if format_code not in SAMPLE_DTYPES:
+        print_fn(f"Format code {format_code} not supported: samples set to zero")
 
     with open(input_file, "rb") as infile, open(output_file, "wb") as outfile:
         # Read headers
@@ -117,9 +187,15 @@ def standardize_segy_for_pzero(input_file, output_file, print_fn=print):
         binary_header = bytearray(infile.read(400))
 
         # Calculate grid dimensions for inline/crossline
+        in_dtype = trace_dtype(
+            num_samples=num_samples,
+            sample_dtype=SAMPLE_DTYPES.get(format_code, ">u4"),
+        )
         file_size = os.path.getsize(input_file)
-        total_traces = (file_size - 3600) // trace_size
+        total_traces = (file_size - 3600) // in_dtype.itemsize
         grid_size = int(np.sqrt(total_traces))
+        # Only the traces that fill the square inline/crossline grid are written.
+        trace_count = grid_size * grid_size
 
         # Update binary header for PZero compatibility
         binary_header[20:22] = struct.pack(">H", num_samples)  # Samples per trace
@@ -133,82 +209,36 @@ def standardize_segy_for_pzero(input_file, output_file, print_fn=print):
         outfile.write(textual_header)
         outfile.write(binary_header)
 
-        # Process traces with PZero-specific headers
-        pos = 3600
-        trace_count = 0
-
-        for inline in range(grid_size):
-            for xline in range(grid_size):
-                if pos >= file_size:
-                    break
-
-                infile.seek(pos)
-                trace_header = bytearray(infile.read(240))
-
-                if len(trace_header) != 240:
-                    break
-
-                # Update trace header for PZero
-                # Inline number (bytes 189-190)
-                trace_header[188:190] = struct.pack(">H", inline + 1)
-
-                # Crossline number (bytes 193-194)
-                trace_header[192:194] = struct.pack(">H", xline + 1)
-
-                # CDP X coordinate (bytes 181-184)
-                trace_header[180:184] = struct.pack(">l", inline * 100)
-
-                # CDP Y coordinate (bytes 185-188)
-                trace_header[184:188] = struct.pack(">l", xline * 100)
-
-                # Number of samples (bytes 115-116)
-                trace_header[114:116] = struct.pack(">H", num_samples)
-
-                # Sample interval (bytes 117-118)
-                trace_header[116:118] = struct.pack(">H", sample_interval)
-
-                outfile.write(trace_header)
-
-                # Process trace data
-                data_size = num_samples * 4
-                data = infile.read(data_size)
-
-                if len(data) < data_size:
-                    data = data.ljust(data_size, b"\x00")
-                elif len(data) > data_size:
-                    data = data[:data_size]
-
-                # Convert samples based on format code
-                samples = []
-                for i in range(0, len(data), 4):
-                    sample_bytes = data[i : i + 4].ljust(4, b"\x00")
-                    try:
-                        if format_code == 1:  # IBM Float
-                            sample = struct.unpack(">f", sample_bytes)[0]
-                        elif format_code == 2:  # 32-bit Integer
-                            sample = float(struct.unpack(">l", sample_bytes)[0])
-                        elif format_code == 3:  # 16-bit Integer
-                            sample = float(struct.unpack(">h", sample_bytes[:2])[0])
-                        elif format_code == 5:  # IEEE Float
-                            sample = struct.unpack(">f", sample_bytes)[0]
-                        elif format_code == 8:  # 8-bit Integer
-                            sample = float(struct.unpack("b", sample_bytes[:1])[0])
-                        else:
-                            sample = 0.0
-                    except struct.error:
-                        sample = 0.0
-
-                    samples.append(sample)
-
-                # Write converted samples
-                for sample in samples:
-                    outfile.write(struct.pack(">f", sample))
-
-                trace_count += 1
-                pos = infile.tell()
-
-                if trace_count % 1000 == 0:
-                    print_fn(f"Processed {trace_count}/{total_traces} traces")
+        if trace_count > 0:
+            in_traces = np.memmap(
+                input_file, dtype=in_dtype, mode="r", offset=3600, shape=(trace_count,)
+            )
+            out_dtype = trace_dtype(num_samples=num_samples, sample_dtype=">f4")
+            chunk_traces = max(1, CHUNK_BYTES // out_dtype.itemsize)
+            for start in range(0, trace_count, chunk_traces):
+                stop = min(start + chunk_traces, trace_count)
+                chunk = in_traces[start:stop]
+                out_chunk = np.empty(stop - start, dtype=out_dtype)
+                # Copy all header bytes, then update the PZero fields in place.
+                out_chunk.view(np.uint8).reshape(len(out_chunk), -1)[:, :240] = (
+                    chunk.view(np.uint8).reshape(len(chunk), -1)[:, :240]
+                )
+                trace_ids = np.arange(start, stop)
+                inline = trace_ids // grid_size
+                xline = trace_ids % grid_size
+                header = out_chunk["header"]
+                header["inline"] = inline + 1
+                header["xline"] = xline + 1
+                header["cdp_x"] = inline * 100
+                header["cdp_y"] = xline * 100
+                header["num_samples"] = num_samples
+                header["sample_interval"] = sample_interval
+                out_chunk["samples"] = decode_samples(
+                    samples=chunk["samples"], format_code=format_code
+                )
+                outfile.write(out_chunk.tobytes())
+                print_fn(f"Processed {stop}/{trace_count} traces")
+            del in_traces
 
         # Update final trace count
         print_fn(f"\nStandardization completed:")
@@ -26,20 +26,12 @@ from PySide6.QtGui import QAction, QDesktopServices, QPixmap
 from PySide6.QtCore import Qt, QTimer
 
 from pandas import DataFrame as pd_DataFrame
-from pandas import read_csv as pd_read_csv
-from pandas import read_json as pd_read_json
 from pandas import concat as pd_concat
 
 from vtk import (
     vtkPolyData,
     vtkAppendPolyData,
-    vtkOctreePointLocator,
     vtkXMLPolyDataWriter,
-    vtkXMLStructuredGridWriter,
-    vtkXMLImageDataWriter,
-    vtkXMLStructuredGridReader,
-    vtkXMLPolyDataReader,
-    vtkXMLImageDataReader,
 )
 
 from pzero.collections.background_collection import BackgroundCollection
@@ -51,6 +43,7 @@ from pzero.collections.image_collection import ImageCollection
 from pzero.collections.mesh3d_collection import Mesh3DCollection
 from pzero.collections.well_collection import WellCollection
 from pzero.collections.xsection_collection import XSectionCollection
+from pzero.helpers.autosave import AutosaveService, latest_snapshot, read_info
 from pzero.helpers.helper_dialogs import (
     options_dialog,
     save_file_dialog,
@@ -65,6 +58,16 @@ from pzero.helpers.helper_dialogs import (
     PreviewWidget,
     input_text_dialog,
 )
+from pzero.helpers.parent_index import ParentIndex
+from pzero.helpers.project_container import (
+    PROJECT_FILTERS,
+    STORAGE_CONTAINER,
+    STORAGE_XML,
+    RevisionReader,
+    RevisionWriter,
+)
+from pzero.helpers.render_cache import RenderResourceCache
+from pzero.helpers.spatial_index import INDEX_EXTENSION, SpatialIndexCache
 from pzero.imports.cesium2vtk import vtk2cesium
 from pzero.imports.dem2vtk import dem2vtk
 from pzero.imports.dxf2vtk import vtk2dxf
@@ -213,6 +216,11 @@ class ProjectWindow(QMainWindow, Ui_ProjectWindow):
         """Initialize empty project."""
         self.create_empty()
 
+        """Autosave service, writing snapshots of the project in background. Snapshots left by a session that
+        was not closed normally are offered for recovery once the window is shown."""
+        self.autosave = AutosaveService(project=self)
+        QTimer.singleShot(0, self.recover_autosave)
+
         """File>Project actions -> slots"""
         self.actionProjectNew.triggered.connect(self.new_project)
         self.actionProjectOpen.triggered.connect(self.open_project)
@@ -252,6 +260,68 @@ class ProjectWindow(QMainWindow, Ui_ProjectWindow):
 
         self.actionBuildOctree.triggered.connect(self.build_octree)
 
+        """Spatial indexes are discarded when geometries change or entities are removed"""
+        self.signals.geom_modified.connect(
+            lambda uids, collection: self.spatial_index.invalidate(uids)
+        )
+        self.signals.entities_removed.connect(
+            lambda uids, collection: self.spatial_index.invalidate(uids)
+        )
+
+        """Render resources shared by views are discarded once, before views are updated, when geometries or
+        properties change or entities are removed"""
+        for signal in [
+            self.signals.geom_modified,
+            self.signals.data_keys_added,
+            self.signals.data_keys_removed,
+            self.signals.entities_removed,
+        ]:
+            signal.connect(lambda uids, collection: self.render_cache.invalidate(uids))
+
+        """The parent index is updated before views, that use it to select the entities they show"""
+        for signal in [self.signals.entities_added, self.signals.metadata_modified]:
+            signal.connect(
+                lambda uids, collection: self.parent_index.update(
+                    uids=uids, collection=collection
+                )
+            )
+        self.signals.entities_removed.connect(
+            lambda uids, collection: self.parent_index.remove(
+                uids=uids, collection=collection
+            )
+        )
+
+        """Changes are recorded by the autosave service, that decides when to take a snapshot"""
+        for signal in [
+            self.signals.entities_added,
+            self.signals.geom_modified,
+            self.signals.data_keys_added,
+            self.signals.data_keys_removed,
+            self.signals.data_val_modified,
+        ]:
+            signal.connect(
+                lambda uids, collection: self.autosave.entities_changed(
+                    uids=uids, collection=collection
+                )
+            )
+        self.signals.entities_removed.connect(
+            lambda uids, collection: self.autosave.entities_removed(
+                uids=uids, collection=collection
+            )
+        )
+        for signal in [
+            self.signals.metadata_modified,
+            self.signals.legend_color_modified,
+            self.signals.legend_thick_modified,
+            self.signals.legend_point_size_modified,
+            self.signals.legend_opacity_modified,
+        ]:
+            signal.connect(
+                lambda uids, collection: self.autosave.tables_changed(
+                    uids=uids, collection=collection
+                )
+            )
+
         """Interpolation actions -> slots"""
         self.actionDelaunay2D.triggered.connect(lambda: interpolation_delaunay_2d(self))
         self.actionPoisson.triggered.connect(lambda: poisson_interpolation(self))
@@ -318,6 +388,8 @@ class ProjectWindow(QMainWindow, Ui_ProjectWindow):
         )
         if reply == QMessageBox.Yes:
             self.signals.project_close.emit()  # this is used to delete open windows when the current project is closed
+            # Snapshots are removed on a normal exit, so they are not offered for recovery at the next start.
+            self.autosave.stop(clear=True)
             event.accept()
         else:
             event.ignore()
@@ -924,10 +996,9 @@ class ProjectWindow(QMainWindow, Ui_ProjectWindow):
                 elif self.shown_table == "tabWells":
                     entity = self.well_coll.get_uid_vtk_obj(uid)
 
-                octree = vtkOctreePointLocator()
-                octree.SetDataSet(entity)
-                octree.BuildLocator()
-                entity.locator = octree
+                entity.locator = self.spatial_index.get(
+                    uid=uid, vtk_obj=entity, kind="octree"
+                )
 
     def decimate_pc_dialog(self):
         if self.selected_uids:
@@ -1183,6 +1254,15 @@ class ProjectWindow(QMainWindow, Ui_ProjectWindow):
         # Ui_ProjectWindow). Setting the model also updates the view.
         self.backgrnd_coll = BackgroundCollection(parent=self)
         self.BackgroundsTableView.setModel(self.backgrnd_coll.proxy_table_model)
+
+        # Create the spatial_index SpatialIndexCache, with kd-trees and point locators shared by all tools.
+        self.spatial_index = SpatialIndexCache()
+        # Create the render_cache RenderResourceCache, with render resources shared by all views.
+        self.render_cache = RenderResourceCache()
+        # Create the parent_index ParentIndex, with the entities belonging to each cross-section or well.
+        self.parent_index = ParentIndex()
+        # Storage of the revisions saved by save_project, VTK XML files and JSON tables or binary container.
+        self.project_storage = STORAGE_XML
         for table_view, collection in [
             (self.GeologyTableView, self.geol_coll),
             (self.FluidsTableView, self.fluid_coll),
@@ -1305,16 +1385,27 @@ class ProjectWindow(QMainWindow, Ui_ProjectWindow):
         # Get date and time, used to save incremental revisions.
         now = datetime.now().strftime("%Y-%m-%d-%H-%M-%S")
         # Select and open output file and folder. Saving always performs a complete backup since the output folder
-        # is named with the present date and time "rev_<now>".
-        self.out_file_name = save_file_dialog(
-            parent=self, caption="Save project.", filter="PZero (*.p0)"
+        # is named with the present date and time "rev_<now>". The filter selects the storage of the revision.
+        self.out_file_name, selected_filter = save_file_dialog(
+            parent=self,
+            caption="Save project.",
+            filter=";;".join(PROJECT_FILTERS.values()),
+            selected_filter=PROJECT_FILTERS[self.project_storage],
         )
         if not self.out_file_name:
             return
+        for storage, project_filter in PROJECT_FILTERS.items():
+            if selected_filter == project_filter:
+                self.project_storage = storage
         out_dir_name = self.out_file_name[:-3] + "_p0/rev_" + now
-        self.print_terminal(
-            f"Saving project as VTK files and csv tables with metada and legend.\nIn file/folder: {self.out_file_name}/{out_dir_name}\n"
-        )
+        if self.project_storage == STORAGE_CONTAINER:
+            self.print_terminal(
+                f"Saving project as binary container with metada and legend.\nIn file/folder: {self.out_file_name}/{out_dir_name}\n"
+            )
+        else:
+            self.print_terminal(
+                f"Saving project as VTK files and csv tables with metada and legend.\nIn file/folder: {self.out_file_name}/{out_dir_name}\n"
+            )
         # Create the folder if it does not exist already.
         if not os_path.isdir(self.out_file_name[:-3] + "_p0"):
             os_mkdir(self.out_file_name[:-3] + "_p0")
@@ -1331,53 +1422,42 @@ class ProjectWindow(QMainWindow, Ui_ProjectWindow):
         fout.write(f"{test_epsg}\n")
         fout.close()
 
+        # Tables and entities are written as JSON tables and VTK files, or in the binary container.
+        revision = RevisionWriter(dir_name=out_dir_name, storage=self.project_storage)
+
         # --------------------- SAVE LEGENDS ---------------------
 
-        # Save geological legend table to JSON file. Keep old CSV table format here in comments, in case it might be useful in the future.
-        self.geol_coll.legend_df.to_json(
-            out_dir_name + "/geol_legend_table.json", orient="index"
-        )
+        # Save geological legend table. Keep old CSV table format here in comments, in case it might be useful in the future.
+        revision.write_table(name="geol_legend_table", df=self.geol_coll.legend_df)
         # self.geol_coll.legend_df.to_csv(out_dir_name + '/geol_legend_table.csv', encoding='utf-8', index=False)
-        # Save others legend table to JSON file.
-        self.others_legend_df.to_json(
-            out_dir_name + "/others_legend_table.json", orient="index"
-        )
+        # Save others legend table.
+        revision.write_table(name="others_legend_table", df=self.others_legend_df)
         # self.others_legend_df.to_csv(out_dir_name + '/others_legend_table.csv', encoding='utf-8', index=False)
-        # Save properties legend table to JSON file.
-        self.prop_legend_df.to_json(
-            out_dir_name + "/prop_legend_df.json", orient="index"
-        )
+        # Save properties legend table.
+        revision.write_table(name="prop_legend_df", df=self.prop_legend_df)
         # self.prop_legend_df.to_csv(out_dir_name + '/prop_legend_df.csv', encoding='utf-8', index=False)
 
-        self.well_legend_df.to_json(
-            out_dir_name + "/well_legend_table.json", orient="index"
-        )
+        revision.write_table(name="well_legend_table", df=self.well_legend_df)
 
-        self.fluid_coll.legend_df.to_json(
-            out_dir_name + "/fluids_legend_table.json", orient="index"
-        )
+        revision.write_table(name="fluids_legend_table", df=self.fluid_coll.legend_df)
 
-        self.backgrnd_coll.legend_df.to_json(
-            out_dir_name + "/backgrounds_legend_table.json", orient="index"
+        revision.write_table(
+            name="backgrounds_legend_table", df=self.backgrnd_coll.legend_df
         )
 
         # --------------------- SAVE tables ---------------------
 
-        # Save x-section table to JSON file.
+        # Save x-section table.
         out_cols = list(self.xsect_coll.df.columns)
         out_cols.remove("vtk_plane")
         out_cols.remove("vtk_frame")
-        self.xsect_coll.df[out_cols].to_json(
-            out_dir_name + "/xsection_table.json", orient="index"
-        )
+        revision.write_table(name="xsection_table", df=self.xsect_coll.df[out_cols])
         # self.xsect_coll.df[out_cols].to_csv(out_dir_name + '/xsection_table.csv', encoding='utf-8', index=False)
 
-        # Save geological collection table to JSON file and entities as VTK.
+        # Save geological collection table and entities.
         out_cols = list(self.geol_coll.df.columns)
         out_cols.remove("vtk_obj")
-        self.geol_coll.df[out_cols].to_json(
-            out_dir_name + "/geological_table.json", orient="index"
-        )
+        revision.write_table(name="geological_table", df=self.geol_coll.df[out_cols])
         # self.geol_coll.df[out_cols].to_csv(out_dir_name + '/geological_table.csv', encoding='utf-8', index=False)
         prgs_bar = progress_dialog(
             max_value=self.geol_coll.df.shape[0],
@@ -1387,18 +1467,15 @@ class ProjectWindow(QMainWindow, Ui_ProjectWindow):
             parent=self,
         )
         for uid in self.geol_coll.df["uid"].to_list():
-            pd_writer = vtkXMLPolyDataWriter()
-            pd_writer.SetFileName(out_dir_name + "/" + uid + ".vtp")
-            pd_writer.SetInputData(self.geol_coll.get_uid_vtk_obj(uid))
-            pd_writer.Write()
+            revision.write_entity(
+                uid=uid, vtk_obj=self.geol_coll.get_uid_vtk_obj(uid), extension=".vtp"
+            )
             prgs_bar.add_one()
 
-        # Save DOM collection table to JSON file and entities as VTK.
+        # Save DOM collection table and entities.
         out_cols = list(self.dom_coll.df.columns)
         out_cols.remove("vtk_obj")
-        self.dom_coll.df[out_cols].to_json(
-            out_dir_name + "/dom_table.json", orient="index"
-        )
+        revision.write_table(name="dom_table", df=self.dom_coll.df[out_cols])
         # self.dom_coll.df[out_cols].to_csv(out_dir_name + '/dom_table.csv', encoding='utf-8', index=False)
         prgs_bar = progress_dialog(
             max_value=self.dom_coll.df.shape[0],
@@ -1414,10 +1491,11 @@ class ProjectWindow(QMainWindow, Ui_ProjectWindow):
                 ]
                 == "DEM"
             ):
-                sg_writer = vtkXMLStructuredGridWriter()
-                sg_writer.SetFileName(out_dir_name + "/" + uid + ".vts")
-                sg_writer.SetInputData(self.dom_coll.get_uid_vtk_obj(uid))
-                sg_writer.Write()
+                revision.write_entity(
+                    uid=uid,
+                    vtk_obj=self.dom_coll.get_uid_vtk_obj(uid),
+                    extension=".vts",
+                )
                 prgs_bar.add_one()
             elif (
                 self.dom_coll.df.loc[self.dom_coll.df["uid"] == uid, "topology"].values[
@@ -1425,10 +1503,11 @@ class ProjectWindow(QMainWindow, Ui_ProjectWindow):
                 ]
                 == "DomXs"
             ):
-                pl_writer = vtkXMLPolyDataWriter()
-                pl_writer.SetFileName(out_dir_name + "/" + uid + ".vtp")
-                pl_writer.SetInputData(self.dom_coll.get_uid_vtk_obj(uid))
-                pl_writer.Write()
+                revision.write_entity(
+                    uid=uid,
+                    vtk_obj=self.dom_coll.get_uid_vtk_obj(uid),
+                    extension=".vtp",
+                )
                 prgs_bar.add_one()
             elif (
                 self.dom_coll.df.loc[self.dom_coll.df["uid"] == uid, "topology"].values[
@@ -1436,19 +1515,24 @@ class ProjectWindow(QMainWindow, Ui_ProjectWindow):
                 ]
                 == "PCDom"
             ):  # _____________ PROBABLY THE SAME WILL WORK FOR TSDOMs
-                # Save PCDOm collection entities as VTK.
-                pd_writer = vtkXMLPolyDataWriter()
-                pd_writer.SetFileName(out_dir_name + "/" + uid + ".vtp")
-                pd_writer.SetInputData(self.dom_coll.get_uid_vtk_obj(uid))
-                pd_writer.Write()
+                # Save PCDOm collection entities.
+                revision.write_entity(
+                    uid=uid,
+                    vtk_obj=self.dom_coll.get_uid_vtk_obj(uid),
+                    extension=".vtp",
+                )
+                # Save the kd-tree too, if already built, so it is not rebuilt when the project is opened.
+                self.spatial_index.save(
+                    uid=uid,
+                    vtk_obj=self.dom_coll.get_uid_vtk_obj(uid),
+                    path=out_dir_name + "/" + uid + INDEX_EXTENSION,
+                )
                 prgs_bar.add_one()
 
-        # Save image collection table to JSON file and entities as VTK.
+        # Save image collection table and entities.
         out_cols = list(self.image_coll.df.columns)
         out_cols.remove("vtk_obj")
-        self.image_coll.df[out_cols].to_json(
-            out_dir_name + "/image_table.json", orient="index"
-        )
+        revision.write_table(name="image_table", df=self.image_coll.df[out_cols])
         # self.image_coll.df[out_cols].to_csv(out_dir_name + '/image_table.csv', encoding='utf-8', index=False)
         prgs_bar = progress_dialog(
             max_value=self.image_coll.df.shape[0],
@@ -1461,25 +1545,25 @@ class ProjectWindow(QMainWindow, Ui_ProjectWindow):
             if self.image_coll.df.loc[
                 self.image_coll.df["uid"] == uid, "topology"
             ].values[0] in ["MapImage", "XsImage", "TSDomImage"]:
-                im_writer = vtkXMLImageDataWriter()
-                im_writer.SetFileName(out_dir_name + "/" + uid + ".vti")
-                im_writer.SetInputData(self.image_coll.get_uid_vtk_obj(uid))
-                im_writer.Write()
+                revision.write_entity(
+                    uid=uid,
+                    vtk_obj=self.image_coll.get_uid_vtk_obj(uid),
+                    extension=".vti",
+                )
                 prgs_bar.add_one()
             elif self.image_coll.df.loc[
                 self.image_coll.df["uid"] == uid, "topology"
             ].values[0] in ["Seismics"]:
-                sg_writer = vtkXMLStructuredGridWriter()
-                sg_writer.SetFileName(out_dir_name + "/" + uid + ".vts")
-                sg_writer.SetInputData(self.image_coll.get_uid_vtk_obj(uid))
-                sg_writer.Write()
+                revision.write_entity(
+                    uid=uid,
+                    vtk_obj=self.image_coll.get_uid_vtk_obj(uid),
+                    extension=".vts",
+                )
 
-        # Save mesh3d collection table to JSON file and entities as VTK.
+        # Save mesh3d collection table and entities.
         out_cols = list(self.mesh3d_coll.df.columns)
         out_cols.remove("vtk_obj")
-        self.mesh3d_coll.df[out_cols].to_json(
-            out_dir_name + "/mesh3d_table.json", orient="index"
-        )
+        revision.write_table(name="mesh3d_table", df=self.mesh3d_coll.df[out_cols])
         # self.mesh3d_coll.df[out_cols].to_csv(out_dir_name + '/mesh3d_table.csv', encoding='utf-8', index=False)
         prgs_bar = progress_dialog(
             max_value=self.mesh3d_coll.df.shape[0],
@@ -1492,18 +1576,17 @@ class ProjectWindow(QMainWindow, Ui_ProjectWindow):
             if self.mesh3d_coll.df.loc[
                 self.mesh3d_coll.df["uid"] == uid, "topology"
             ].values[0] in ["Voxet", "XsVoxet"]:
-                im_writer = vtkXMLImageDataWriter()
-                im_writer.SetFileName(out_dir_name + "/" + uid + ".vti")
-                im_writer.SetInputData(self.mesh3d_coll.get_uid_vtk_obj(uid))
-                im_writer.Write()
+                revision.write_entity(
+                    uid=uid,
+                    vtk_obj=self.mesh3d_coll.get_uid_vtk_obj(uid),
+                    extension=".vti",
+                )
             prgs_bar.add_one()
 
-        # Save boundaries collection table to CSV and JSON files.
+        # Save boundaries collection table and entities.
         out_cols = list(self.boundary_coll.df.columns)
         out_cols.remove("vtk_obj")
-        self.boundary_coll.df[out_cols].to_json(
-            out_dir_name + "/boundary_table.json", orient="index"
-        )
+        revision.write_table(name="boundary_table", df=self.boundary_coll.df[out_cols])
         # self.boundary_coll.df[out_cols].to_csv(out_dir_name + '/boundary_table.csv', encoding='utf-8', index=False)
         prgs_bar = progress_dialog(
             max_value=self.boundary_coll.df.shape[0],
@@ -1513,19 +1596,18 @@ class ProjectWindow(QMainWindow, Ui_ProjectWindow):
             parent=self,
         )
         for uid in self.boundary_coll.df["uid"].to_list():
-            pd_writer = vtkXMLPolyDataWriter()
-            pd_writer.SetFileName(out_dir_name + "/" + uid + ".vtp")
-            pd_writer.SetInputData(self.boundary_coll.get_uid_vtk_obj(uid))
-            pd_writer.Write()
+            revision.write_entity(
+                uid=uid,
+                vtk_obj=self.boundary_coll.get_uid_vtk_obj(uid),
+                extension=".vtp",
+            )
             prgs_bar.add_one()
 
-        # Save wells collection table to CSV and JSON files.
+        # Save wells collection table and entities.
 
         out_cols = list(self.well_coll.df.columns)
         out_cols.remove("vtk_obj")
-        self.well_coll.df[out_cols].to_json(
-            out_dir_name + "/well_table.json", orient="index"
-        )
+        revision.write_table(name="well_table", df=self.well_coll.df[out_cols])
         # self.boundary_coll.df[out_cols].to_csv(out_dir_name + '/boundary_table.csv', encoding='utf-8', index=False)
         prgs_bar = progress_dialog(
             max_value=self.well_coll.df.shape[0],
@@ -1535,18 +1617,15 @@ class ProjectWindow(QMainWindow, Ui_ProjectWindow):
             parent=self,
         )
         for uid in self.well_coll.df["uid"].to_list():
-            pd_writer = vtkXMLPolyDataWriter()
-            pd_writer.SetFileName(out_dir_name + "/" + uid + ".vtp")
-            pd_writer.SetInputData(self.well_coll.get_uid_vtk_obj(uid))
-            pd_writer.Write()
+            revision.write_entity(
+                uid=uid, vtk_obj=self.well_coll.get_uid_vtk_obj(uid), extension=".vtp"
+            )
             prgs_bar.add_one()
 
-        # Save fluids collection table to CSV and JSON files.
+        # Save fluids collection table and entities.
         out_cols = list(self.fluid_coll.df.columns)
         out_cols.remove("vtk_obj")
-        self.fluid_coll.df[out_cols].to_json(
-            out_dir_name + "/fluids_table.json", orient="index"
-        )
+        revision.write_table(name="fluids_table", df=self.fluid_coll.df[out_cols])
         # self.geol_coll.df[out_cols].to_csv(out_dir_name + '/geological_table.csv', encoding='utf-8', index=False)
         prgs_bar = progress_dialog(
             max_value=self.fluid_coll.df.shape[0],
@@ -1556,17 +1635,18 @@ class ProjectWindow(QMainWindow, Ui_ProjectWindow):
             parent=self,
         )
         for uid in self.fluid_coll.df["uid"].to_list():
-            pd_writer = vtkXMLPolyDataWriter()
-            pd_writer.SetFileName(out_dir_name + "/" + uid + ".vtp")
-            pd_writer.SetInputData(self.fluid_coll.get_uid_vtk_obj(uid))
-            pd_writer.Write()
+            revision.write_entity(
+                uid=uid,
+                vtk_obj=self.fluid_coll.get_uid_vtk_obj(uid),
+                extension=".vtp",
+            )
             prgs_bar.add_one()
 
-        # Save Backgrounds collection table to CSV and JSON files.
+        # Save Backgrounds collection table and entities.
         out_cols = list(self.backgrnd_coll.df.columns)
         out_cols.remove("vtk_obj")
-        self.backgrnd_coll.df[out_cols].to_json(
-            out_dir_name + "/backgrounds_table.json", orient="index"
+        revision.write_table(
+            name="backgrounds_table", df=self.backgrnd_coll.df[out_cols]
         )
         # self.geol_coll.df[out_cols].to_csv(out_dir_name + '/geological_table.csv', encoding='utf-8', index=False)
         prgs_bar = progress_dialog(
@@ -1577,12 +1657,19 @@ class ProjectWindow(QMainWindow, Ui_ProjectWindow):
             parent=self,
         )
         for uid in self.backgrnd_coll.df["uid"].to_list():
-            pd_writer = vtkXMLPolyDataWriter()
-            pd_writer.SetFileName(out_dir_name + "/" + uid + ".vtp")
-            pd_writer.SetInputData(self.backgrnd_coll.get_uid_vtk_obj(uid))
-            pd_writer.Write()
+            revision.write_entity(
+                uid=uid,
+                vtk_obj=self.backgrnd_coll.get_uid_vtk_obj(uid),
+                extension=".vtp",
+            )
             prgs_bar.add_one()
 
+        # Write the manifest of the binary container.
+        revision.close()
+
+        # Autosave snapshots are now older than the saved revision, that unchanged entities are copied from.
+        self.autosave.reset(base_dir=out_dir_name)
+
     def new_project(self):
         """Creates a new empty project, after having cleared all variables."""
         # Ask confirmation if the project already contains entities in the geological collection.
@@ -1598,6 +1685,7 @@ class ProjectWindow(QMainWindow, Ui_ProjectWindow):
                 return
         # Create empty containers.
         self.create_empty()
+        self.autosave.reset()
         # """Save a new empty project to file"""
         # self.save_project()
 
@@ -1629,6 +1717,7 @@ class ProjectWindow(QMainWindow, Ui_ProjectWindow):
                 return
 
         self.create_empty()
+        self.autosave.reset()
 
         # Select and open project file.
         in_file_name = open_file_dialog(
@@ -1660,1209 +1749,1005 @@ class ProjectWindow(QMainWindow, Ui_ProjectWindow):
                 self.print_terminal(in_dir_name)
                 self.print_terminal("-- ERROR: missing folder --")
                 return
+            self.load_revision(in_dir_name=in_dir_name)
+            self.autosave.reset(base_dir=in_dir_name)
 
-            #  In the following it is still possible to open old projects with metadata stored
-            #  as CSV tables, however JSON is used now because it leads to fewer problems and errors
-            #  for numeric and list fields. In fact, reading Pandas dataframes from JSON, dtype
-            #  from the class definitions specifies the type of each column.
-            # ______ CONSIDER REMOVING THE POSSIBILITY TO OPEN OLD PROJECTS WITH CSV TABLES
-            # ______ THAT WILL CAUSE ERRORS IN CASE OF LISTS
+        except BaseException as e:
+            # Get current system exception
+            import sys
+            import traceback
 
-            # --------------------- READ LEGENDS ---------------------
+            ex_type, ex_value, ex_traceback = sys.exc_info()
 
-            # Read geological legend tables.
-            if os_path.isfile(
-                (in_dir_name + "/geol_legend_table.csv")
-            ) or os_path.isfile((in_dir_name + "/geol_legend_table.json")):
-                if os_path.isfile((in_dir_name + "/geol_legend_table.json")):
-                    new_geol_coll_legend_df = pd_read_json(
-                        in_dir_name + "/geol_legend_table.json",
-                        orient="index",
-                        dtype=Legend.legend_dict_types,
-                    )
-                else:
-                    new_geol_coll_legend_df = pd_read_csv(
-                        in_dir_name + "/geol_legend_table.csv",
-                        encoding="utf-8",
-                        dtype=Legend.legend_dict_types,
-                        keep_default_na=False,
-                    )
-                if not new_geol_coll_legend_df.empty:
-                    self.geol_coll.legend_df = new_geol_coll_legend_df
-
-                in_keys = set(self.geol_coll.legend_df.keys())
-                def_keys = set(Legend.geol_legend_dict.keys())
-                to_add = def_keys.difference(in_keys)
-                to_remove = in_keys.difference(def_keys)
-                if len(to_add) > 0:
-                    for col in to_add:
-                        self.geol_coll.legend_df[col] = Legend.geol_legend_dict[col]
-                        self.print_terminal(f"column {col} added to geological legend")
-                if len(to_remove) > 0:
-                    for col in to_remove:
-                        self.geol_coll.legend_df.drop(columns=col)
-                        self.print_terminal(
-                            f"column {col} removed from geological legend"
-                        )
+            # Extract unformatter stack traces as tuples
+            trace_back = traceback.extract_tb(ex_traceback)
 
-                self.geol_coll.legend_df.sort_values(
-                    by="time", ascending=True, inplace=True
+            # Format stacktrace
+            stack_trace = list()
+
+            for trace in trace_back:
+                stack_trace.append(
+                    "File : %s , Line : %d, Func.Name : %s, Message : %s"
+                    % (trace[0], trace[1], trace[2], trace[3])
                 )
 
-            # Read well legend tables.
-            if os_path.isfile(
-                (in_dir_name + "/well_legend_table.csv")
-            ) or os_path.isfile((in_dir_name + "/well_legend_table.json")):
-                if os_path.isfile((in_dir_name + "/well_legend_table.json")):
-                    new_well_legend_df = pd_read_json(
-                        in_dir_name + "/well_legend_table.json",
-                        orient="index",
-                        dtype=Legend.legend_dict_types,
-                    )
-                else:
-                    new_well_legend_df = pd_read_csv(
-                        in_dir_name + "/well_legend_table.csv",
-                        encoding="utf-8",
-                        dtype=Legend.legend_dict_types,
-                        keep_default_na=False,
-                    )
-                if not new_well_legend_df.empty:
-                    self.well_legend_df = new_well_legend_df
-                in_keys = set(self.well_legend_df.keys())
-                def_keys = set(Legend.well_legend_dict.keys())
-
-                diffs = def_keys.difference(in_keys)
-
-                if len(diffs) > 0:
-                    self.print_terminal(f"well_legend_table diffs: {diffs}")
-                    for diff in diffs:
-                        self.well_legend_df[diff] = Legend.well_legend_dict[diff]
-                    self.well_legend_df.sort_values(
-                        by="name", ascending=True, inplace=True
-                    )
+            print("Exception type : %s " % ex_type.__name__)
+            print("Exception message : %s" % ex_value)
+            print("Stack trace : %s" % stack_trace)
 
-            # Read fluids legend tables.
-            if os_path.isfile(
-                (in_dir_name + "/fluids_legend_table.csv")
-            ) or os_path.isfile((in_dir_name + "/fluids_legend_table.json")):
-                if os_path.isfile((in_dir_name + "/fluids_legend_table.json")):
-                    new_fluids_legend_df = pd_read_json(
-                        in_dir_name + "/fluids_legend_table.json",
-                        orient="index",
-                        dtype=Legend.legend_dict_types,
-                    )
-                else:
-                    new_fluids_legend_df = pd_read_csv(
-                        in_dir_name + "/fluids_legend_table.csv",
-                        encoding="utf-8",
-                        dtype=Legend.legend_dict_types,
-                        keep_default_na=False,
-                    )
-                if not new_fluids_legend_df.empty:
-                    self.fluid_coll.legend_df = new_fluids_legend_df
-                in_keys = set(self.fluid_coll.legend_df.keys())
-                def_keys = set(Legend.fluids_legend_dict.keys())
-
-                diffs = def_keys.difference(in_keys)
-
-                if len(diffs) > 0:
-                    self.print_terminal(f"fluids_legend_table diffs: {diffs}")
-                    for diff in diffs:
-                        self.fluid_coll.legend_df[diff] = Legend.fluids_legend_dict[
-                            diff
-                        ]
-                    self.fluid_coll.legend_df.sort_values(
-                        by="time", ascending=True, inplace=True
-                    )
+            self.print_terminal("Error - tried to open invalid project.")
 
-            # Read Backgrounds legend tables.
-            if os_path.isfile(
-                (in_dir_name + "/backgrounds_legend_table.csv")
-            ) or os_path.isfile((in_dir_name + "/backgrounds_legend_table.json")):
-                if os_path.isfile((in_dir_name + "/backgrounds_legend_table.json")):
-                    new_backgrounds_legend_df = pd_read_json(
-                        in_dir_name + "/backgrounds_legend_table.json",
-                        orient="index",
-                        dtype=Legend.legend_dict_types,
-                    )
-                else:
-                    new_backgrounds_legend_df = pd_read_csv(
-                        in_dir_name + "/backgrounds_legend_table.csv",
-                        encoding="utf-8",
-                        dtype=Legend.legend_dict_types,
-                        keep_default_na=False,
-                    )
-                if not new_backgrounds_legend_df.empty:
-                    self.backgrnd_coll.legend_df = new_backgrounds_legend_df
-                in_keys = set(self.backgrnd_coll.legend_df.keys())
-                def_keys = set(Legend.backgrounds_legend_dict.keys())
-
-                diffs = def_keys.difference(in_keys)
-
-                if len(diffs) > 0:
-                    self.print_terminal(f"backgrounds_legend_table diffs: {diffs}")
-                    for diff in diffs:
-                        self.backgrnd_coll.legend_df[diff] = (
-                            Legend.backgrounds_legend_dict[diff]
-                        )
+    def load_revision(self, in_dir_name=None):
+        """Load legends, tables and entities of a revision folder into the present (empty) project.
+        Used by open_project and to recover autosaved projects. Errors are raised to the caller.
+        """
+        # Tables and entities are read from JSON (or CSV) tables and VTK files, or from the binary container.
+        revision = RevisionReader(dir_name=in_dir_name)
+        self.project_storage = revision.storage
+
+        #  In the following it is still possible to open old projects with metadata stored
+        #  as CSV tables, however JSON is used now because it leads to fewer problems and errors
+        #  for numeric and list fields. In fact, reading Pandas dataframes from JSON, dtype
+        #  from the class definitions specifies the type of each column.
+        # ______ CONSIDER REMOVING THE POSSIBILITY TO OPEN OLD PROJECTS WITH CSV TABLES
+        # ______ THAT WILL CAUSE ERRORS IN CASE OF LISTS
+
+        # --------------------- READ LEGENDS ---------------------
+
+        # Read geological legend tables.
+        if revision.has_table("geol_legend_table"):
+            new_geol_coll_legend_df = revision.read_table(
+                name="geol_legend_table", dtype=Legend.legend_dict_types
+            )
+            if not new_geol_coll_legend_df.empty:
+                self.geol_coll.legend_df = new_geol_coll_legend_df
+
+            in_keys = set(self.geol_coll.legend_df.keys())
+            def_keys = set(Legend.geol_legend_dict.keys())
+            to_add = def_keys.difference(in_keys)
+            to_remove = in_keys.difference(def_keys)
+            if len(to_add) > 0:
+                for col in to_add:
+                    self.geol_coll.legend_df[col] = Legend.geol_legend_dict[col]
+                    self.print_terminal(f"column {col} added to geological legend")
+            if len(to_remove) > 0:
+                for col in to_remove:
+                    self.geol_coll.legend_df.drop(columns=col)
+                    self.print_terminal(f"column {col} removed from geological legend")
+
+            self.geol_coll.legend_df.sort_values(
+                by="time", ascending=True, inplace=True
+            )
 
-            # Read other legend tables.
-            if os_path.isfile(
-                (in_dir_name + "/others_legend_table.csv")
-            ) or os_path.isfile((in_dir_name + "/others_legend_table.json")):
-                if os_path.isfile((in_dir_name + "/others_legend_table.json")):
-                    new_others_legend_df = pd_read_json(
-                        in_dir_name + "/others_legend_table.json",
-                        orient="index",
-                        dtype=Legend.legend_dict_types,
-                    )
-                else:
-                    new_others_legend_df = pd_read_csv(
-                        in_dir_name + "/others_legend_table.csv",
-                        encoding="utf-8",
-                        dtype=Legend.legend_dict_types,
-                        keep_default_na=False,
-                    )
-                in_keys = set(self.others_legend_df.keys())
-                def_keys = set(Legend.others_legend_dict.keys())
+        # Read well legend tables.
+        if revision.has_table("well_legend_table"):
+            new_well_legend_df = revision.read_table(
+                name="well_legend_table", dtype=Legend.legend_dict_types
+            )
+            if not new_well_legend_df.empty:
+                self.well_legend_df = new_well_legend_df
+            in_keys = set(self.well_legend_df.keys())
+            def_keys = set(Legend.well_legend_dict.keys())
+
+            diffs = def_keys.difference(in_keys)
+
+            if len(diffs) > 0:
+                self.print_terminal(f"well_legend_table diffs: {diffs}")
+                for diff in diffs:
+                    self.well_legend_df[diff] = Legend.well_legend_dict[diff]
+                self.well_legend_df.sort_values(by="name", ascending=True, inplace=True)
+
+        # Read fluids legend tables.
+        if revision.has_table("fluids_legend_table"):
+            new_fluids_legend_df = revision.read_table(
+                name="fluids_legend_table", dtype=Legend.legend_dict_types
+            )
+            if not new_fluids_legend_df.empty:
+                self.fluid_coll.legend_df = new_fluids_legend_df
+            in_keys = set(self.fluid_coll.legend_df.keys())
+            def_keys = set(Legend.fluids_legend_dict.keys())
+
+            diffs = def_keys.difference(in_keys)
+
+            if len(diffs) > 0:
+                self.print_terminal(f"fluids_legend_table diffs: {diffs}")
+                for diff in diffs:
+                    self.fluid_coll.legend_df[diff] = Legend.fluids_legend_dict[diff]
+                self.fluid_coll.legend_df.sort_values(
+                    by="time", ascending=True, inplace=True
+                )
 
-                diffs = def_keys.difference(in_keys)
+        # Read Backgrounds legend tables.
+        if revision.has_table("backgrounds_legend_table"):
+            new_backgrounds_legend_df = revision.read_table(
+                name="backgrounds_legend_table", dtype=Legend.legend_dict_types
+            )
+            if not new_backgrounds_legend_df.empty:
+                self.backgrnd_coll.legend_df = new_backgrounds_legend_df
+            in_keys = set(self.backgrnd_coll.legend_df.keys())
+            def_keys = set(Legend.backgrounds_legend_dict.keys())
+
+            diffs = def_keys.difference(in_keys)
+
+            if len(diffs) > 0:
+                self.print_terminal(f"backgrounds_legend_table diffs: {diffs}")
+                for diff in diffs:
+                    self.backgrnd_coll.legend_df[diff] = Legend.backgrounds_legend_dict[
+                        diff
+                    ]
+
+        # Read other legend tables.
+        if revision.has_table("others_legend_table"):
+            new_others_legend_df = revision.read_table(
+                name="others_legend_table", dtype=Legend.legend_dict_types
+            )
+            in_keys = set(self.others_legend_df.keys())
+            def_keys = set(Legend.others_legend_dict.keys())
+
+            diffs = def_keys.difference(in_keys)
 
-                if len(diffs) > 0:
-                    self.print_terminal(f"others_legend_table diffs: {diffs}")
-                    for diff in diffs:
-                        self.others_legend_df[diff] = Legend.others_legend_dict[diff]
+            if len(diffs) > 0:
+                self.print_terminal(f"others_legend_table diffs: {diffs}")
+                for diff in diffs:
+                    self.others_legend_df[diff] = Legend.others_legend_dict[diff]
 
-            if os_path.isfile((in_dir_name + "/prop_legend_df.csv")) or os_path.isfile(
+        if revision.has_table("prop_legend_df"):
+            # Old CSV property legends are not read, and the legend is rebuilt.
+            if os_path.isfile(
                 (in_dir_name + "/prop_legend_df.json")
-            ):
-                if os_path.isfile((in_dir_name + "/prop_legend_df.json")):
-                    new_prop_legend_df = pd_read_json(
-                        in_dir_name + "/prop_legend_df.json",
-                        orient="index",
-                        dtype=PropertiesCMaps.prop_cmap_dict_types,
-                    )
-                    if not new_prop_legend_df.empty:
-                        self.prop_legend_df = new_prop_legend_df
-                else:
-                    self.prop_legend.update_widget(parent=self)
+            ) or not os_path.isfile((in_dir_name + "/prop_legend_df.csv")):
+                new_prop_legend_df = revision.read_table(
+                    name="prop_legend_df",
+                    dtype=PropertiesCMaps.prop_cmap_dict_types,
+                )
+                if not new_prop_legend_df.empty:
+                    self.prop_legend_df = new_prop_legend_df
+            else:
+                self.prop_legend.update_widget(parent=self)
 
-            # Update all legends.
-            self.legend.update_widget(parent=self)
+        # Update all legends.
+        self.legend.update_widget(parent=self)
 
-            # --------------------- READ TABLES ---------------------
+        # --------------------- READ TABLES ---------------------
 
-            # Read x-section table and build cross-sections. Note beginResetModel() and endResetModel().
-            if os_path.isfile((in_dir_name + "/xsection_table.csv")) or os_path.isfile(
-                (in_dir_name + "/xsection_table.json")
-            ):
-                self.xsect_coll.table_model.beginResetModel()
-                if os_path.isfile((in_dir_name + "/xsection_table.json")):
-                    # noinspection PyTypeChecker
-                    new_xsect_coll_df = pd_read_json(
-                        in_dir_name + "/xsection_table.json",
-                        orient="index",
-                        dtype=XSectionCollection.entity_dict_types,
-                    )
-                else:
-                    # noinspection PyTypeChecker
-                    new_xsect_coll_df = pd_read_csv(
-                        in_dir_name + "/xsection_table.csv",
-                        encoding="utf-8",
-                        dtype=XSectionCollection.entity_dict_types,
-                        keep_default_na=False,
-                    )
-                # reindex new_dom_coll_df to catch any problem with non-consecutive indices
-                new_xsect_coll_df.reset_index(drop=True, inplace=True)
-                if not new_xsect_coll_df.empty:
-                    if not "height" in new_xsect_coll_df:
-                        # case for old projects before simplification of cross-section collection columns
-                        if "azimuth" in new_xsect_coll_df.columns:
-                            new_xsect_coll_df.rename(
-                                columns={"azimuth": "strike"}, inplace=True
-                            )
-                            self.print_terminal(
-                                "column azimuth renamed as strike in x-section table"
-                            )
-                        if not "parent_uid" in new_xsect_coll_df.columns:
-                            new_xsect_coll_df["parent_uid"] = new_xsect_coll_df["uid"]
-                            self.print_terminal(
-                                "column top renamed as origin_z in x-section table"
-                            )
+        # Read x-section table and build cross-sections. Note beginResetModel() and endResetModel().
+        if revision.has_table("xsection_table"):
+            self.xsect_coll.table_model.beginResetModel()
+            new_xsect_coll_df = revision.read_table(
+                name="xsection_table", dtype=XSectionCollection.entity_dict_types
+            )
+            # reindex new_dom_coll_df to catch any problem with non-consecutive indices
+            new_xsect_coll_df.reset_index(drop=True, inplace=True)
+            if not new_xsect_coll_df.empty:
+                if not "height" in new_xsect_coll_df:
+                    # case for old projects before simplification of cross-section collection columns
+                    if "azimuth" in new_xsect_coll_df.columns:
+                        new_xsect_coll_df.rename(
+                            columns={"azimuth": "strike"}, inplace=True
+                        )
+                        self.print_terminal(
+                            "column azimuth renamed as strike in x-section table"
+                        )
+                    if not "parent_uid" in new_xsect_coll_df.columns:
+                        new_xsect_coll_df["parent_uid"] = new_xsect_coll_df["uid"]
+                        self.print_terminal(
+                            "column top renamed as origin_z in x-section table"
+                        )
 
-                        if not "width" in new_xsect_coll_df:
-                            # case for very old projects, before the introduction of inclined cross-sections
-                            # these sections have the base point on top
-                            if "base_x" in new_xsect_coll_df.columns:
-                                new_xsect_coll_df.rename(
-                                    columns={"base_x": "origin_x"}, inplace=True
-                                )
-                                self.print_terminal(
-                                    "column base_x renamed as origin_x in x-section table"
-                                )
-                            if "base_y" in new_xsect_coll_df.columns:
-                                new_xsect_coll_df.rename(
-                                    columns={"base_y": "origin_y"}, inplace=True
-                                )
-                                self.print_terminal(
-                                    "column base_y renamed as origin_y in x-section table"
-                                )
-                            if "top" in new_xsect_coll_df.columns:
-                                new_xsect_coll_df.insert(
-                                    15,
-                                    "height",
-                                    abs(
-                                        new_xsect_coll_df.top - new_xsect_coll_df.bottom
-                                    ),
-                                )
-                                self.print_terminal(
-                                    "column height added to xsect table"
-                                )
-                            if "top" in new_xsect_coll_df.columns:
-                                if "bottom" in new_xsect_coll_df.columns:
-                                    new_xsect_coll_df.loc[
-                                        new_xsect_coll_df["bottom"]
-                                        > new_xsect_coll_df["top"],
-                                        "top",
-                                    ] = new_xsect_coll_df["bottom"]
-                                new_xsect_coll_df.rename(
-                                    columns={"top": "origin_z"}, inplace=True
-                                )
-                                self.print_terminal(
-                                    "column top renamed as origin_z in x-section table"
-                                )
-                        else:
-                            # case for intermediate age projects, after the introduction of inclined cross-sections,
-                            # but before columns simplification,
-                            # these sections have the base point on bottom, that must be projected to the
-                            # top along dip, and width was ok, and must be renames to height
-                            new_xsect_coll_df.rename(
-                                columns={"width": "height"}, inplace=True
-                            )
-                            self.print_terminal(
-                                "column width renamed as height in x-section table"
-                            )
+                    if not "width" in new_xsect_coll_df:
+                        # case for very old projects, before the introduction of inclined cross-sections
+                        # these sections have the base point on top
+                        if "base_x" in new_xsect_coll_df.columns:
                             new_xsect_coll_df.rename(
                                 columns={"base_x": "origin_x"}, inplace=True
                             )
                             self.print_terminal(
                                 "column base_x renamed as origin_x in x-section table"
                             )
+                        if "base_y" in new_xsect_coll_df.columns:
                             new_xsect_coll_df.rename(
                                 columns={"base_y": "origin_y"}, inplace=True
                             )
                             self.print_terminal(
                                 "column base_y renamed as origin_y in x-section table"
                             )
+                        if "top" in new_xsect_coll_df.columns:
+                            new_xsect_coll_df.insert(
+                                15,
+                                "height",
+                                abs(new_xsect_coll_df.top - new_xsect_coll_df.bottom),
+                            )
+                            self.print_terminal("column height added to xsect table")
+                        if "top" in new_xsect_coll_df.columns:
+                            if "bottom" in new_xsect_coll_df.columns:
+                                new_xsect_coll_df.loc[
+                                    new_xsect_coll_df["bottom"]
+                                    > new_xsect_coll_df["top"],
+                                    "top",
+                                ] = new_xsect_coll_df["bottom"]
                             new_xsect_coll_df.rename(
-                                columns={"base_z": "origin_z"}, inplace=True
+                                columns={"top": "origin_z"}, inplace=True
                             )
                             self.print_terminal(
-                                "column base_z renamed as origin_z in x-section table"
-                            )
-                            new_xsect_coll_df["origin_x"] += (
-                                new_xsect_coll_df["height"]
-                                * np_cos(new_xsect_coll_df["dip"] * np_pi / 180)
-                                * np_cos(
-                                    (new_xsect_coll_df["strike"] + 180 % 360)
-                                    * np_pi
-                                    / 180
-                                )
-                            )
-                            new_xsect_coll_df["origin_y"] += (
-                                new_xsect_coll_df["height"]
-                                * np_cos(new_xsect_coll_df["dip"] * np_pi / 180)
-                                * np_sin(
-                                    (new_xsect_coll_df["strike"] + 180 % 360)
-                                    * np_pi
-                                    / 180
-                                )
-                            )
-                            new_xsect_coll_df["origin_z"] += new_xsect_coll_df[
-                                "height"
-                            ] * np_sin(new_xsect_coll_df["dip"] * np_pi / 180)
-
-                    for new_column in new_xsect_coll_df.columns.values.tolist():
-                        # drop columns not included in the standard dictionary
-                        if new_column not in self.xsect_coll.df.columns.values.tolist():
-                            new_xsect_coll_df.drop(new_column, axis=1, inplace=True)
-                        self.print_terminal(
-                            f"column {new_column} removed from xsect table"
-                        )
-                    for column in self.xsect_coll.df.columns.values.tolist():
-                        # add missing columns with default values
-                        if column not in new_xsect_coll_df.columns.values.tolist():
-                            missing_column = pd_DataFrame(
-                                [{column: self.xsect_coll.entity_dict[column]}]
-                                * len(new_xsect_coll_df)
-                            )
-                            # concat with axis=1 to add the column, and ignore_index=False to keep
-                            # the column names of the joined dataframes
-                            new_xsect_coll_df = pd_concat(
-                                [new_xsect_coll_df, missing_column],
-                                ignore_index=False,
-                                axis=1,
+                                "column top renamed as origin_z in x-section table"
                             )
-                            self.print_terminal(f"column {column} added to xsect table")
-
-                    # reorder columns
-                    new_xsect_coll_df = new_xsect_coll_df[self.xsect_coll.df.columns]
-
-                    # finally, set the imported dataframe into the project dataframe
-                    self.xsect_coll.df = new_xsect_coll_df
-
-                for uid in self.xsect_coll.df["uid"].tolist():
-                    self.xsect_coll.set_geometry(uid=uid)
-                self.xsect_coll.table_model.endResetModel()
-
-            # Read DOM table and files. Note beginResetModel() and endResetModel().
-            if os_path.isfile((in_dir_name + "/dom_table.csv")) or os_path.isfile(
-                (in_dir_name + "/dom_table.json")
-            ):
-                self.dom_coll.table_model.beginResetModel()
-                if os_path.isfile((in_dir_name + "/dom_table.json")):
-                    # noinspection PyTypeChecker
-                    new_dom_coll_df = pd_read_json(
-                        in_dir_name + "/dom_table.json",
-                        orient="index",
-                        dtype=DomCollection.entity_dict_types,
-                    )
-                else:
-                    # noinspection PyTypeChecker
-                    new_dom_coll_df = pd_read_csv(
-                        in_dir_name + "/dom_table.csv",
-                        encoding="utf-8",
-                        dtype=DomCollection.entity_dict_types,
-                        keep_default_na=False,
-                    )
-
-                # reindex new_dom_coll_df to catch any problem with non-consecutive indices
-                new_dom_coll_df.reset_index(drop=True, inplace=True)
-
-                if not new_dom_coll_df.empty:
-                    # fix old projects with texture_uid column name
-                    if "texture_uids" in new_dom_coll_df.columns:
-                        new_dom_coll_df.rename(
-                            columns={"texture_uids": "textures"}, inplace=True
+                    else:
+                        # case for intermediate age projects, after the introduction of inclined cross-sections,
+                        # but before columns simplification,
+                        # these sections have the base point on bottom, that must be projected to the
+                        # top along dip, and width was ok, and must be renames to height
+                        new_xsect_coll_df.rename(
+                            columns={"width": "height"}, inplace=True
                         )
                         self.print_terminal(
-                            "column texture_uids renamed as textures in dom table"
+                            "column width renamed as height in x-section table"
                         )
-                    if "texture_uid" in new_dom_coll_df.columns:
-                        new_dom_coll_df.rename(
-                            columns={"texture_uid": "textures"}, inplace=True
+                        new_xsect_coll_df.rename(
+                            columns={"base_x": "origin_x"}, inplace=True
                         )
                         self.print_terminal(
-                            "column texture_uid renamed as textures in dom table"
+                            "column base_x renamed as origin_x in x-section table"
                         )
-                    if "x_section" in new_dom_coll_df.columns:
-                        new_dom_coll_df.rename(
-                            columns={"x_section": "parent_uid"}, inplace=True
+                        new_xsect_coll_df.rename(
+                            columns={"base_y": "origin_y"}, inplace=True
                         )
                         self.print_terminal(
-                            "column x_section renamed as parent_uid in dom table"
+                            "column base_y renamed as origin_y in x-section table"
                         )
-
-                    if None in new_dom_coll_df["textures"].to_list():
-                        new_dom_coll_df["textures"] = new_dom_coll_df["textures"].apply(
-                            lambda x: [] if x is None else x
+                        new_xsect_coll_df.rename(
+                            columns={"base_z": "origin_z"}, inplace=True
                         )
                         self.print_terminal(
-                            "None value replaced with [] in textures column of dom table"
+                            "column base_z renamed as origin_z in x-section table"
                         )
-
-                    for new_column in new_dom_coll_df.columns.values.tolist():
-                        if new_column not in self.dom_coll.df.columns.values.tolist():
-                            new_dom_coll_df.drop(new_column, axis=1, inplace=True)
-                            self.print_terminal(
-                                f"column {new_column} removed from dom table"
-                            )
-                    for column in self.dom_coll.df.columns.values.tolist():
-                        if column not in new_dom_coll_df.columns.values.tolist():
-                            missing_column = pd_DataFrame(
-                                [{column: self.dom_coll.entity_dict[column]}]
-                                * len(new_dom_coll_df)
+                        new_xsect_coll_df["origin_x"] += (
+                            new_xsect_coll_df["height"]
+                            * np_cos(new_xsect_coll_df["dip"] * np_pi / 180)
+                            * np_cos(
+                                (new_xsect_coll_df["strike"] + 180 % 360) * np_pi / 180
                             )
-                            # concat with axis=1 to add the column, and ignore_index=False to keep
-                            # the column names of the joined dataframes
-                            new_dom_coll_df = pd_concat(
-                                [new_dom_coll_df, missing_column],
-                                ignore_index=False,
-                                axis=1,
+                        )
+                        new_xsect_coll_df["origin_y"] += (
+                            new_xsect_coll_df["height"]
+                            * np_cos(new_xsect_coll_df["dip"] * np_pi / 180)
+                            * np_sin(
+                                (new_xsect_coll_df["strike"] + 180 % 360) * np_pi / 180
                             )
-                            self.print_terminal(f"column {column} added to dom table")
+                        )
+                        new_xsect_coll_df["origin_z"] += new_xsect_coll_df[
+                            "height"
+                        ] * np_sin(new_xsect_coll_df["dip"] * np_pi / 180)
+
+                for new_column in new_xsect_coll_df.columns.values.tolist():
+                    # drop columns not included in the standard dictionary
+                    if new_column not in self.xsect_coll.df.columns.values.tolist():
+                        new_xsect_coll_df.drop(new_column, axis=1, inplace=True)
+                    self.print_terminal(f"column {new_column} removed from xsect table")
+                for column in self.xsect_coll.df.columns.values.tolist():
+                    # add missing columns with default values
+                    if column not in new_xsect_coll_df.columns.values.tolist():
+                        missing_column = pd_DataFrame(
+                            [{column: self.xsect_coll.entity_dict[column]}]
+                            * len(new_xsect_coll_df)
+                        )
+                        # concat with axis=1 to add the column, and ignore_index=False to keep
+                        # the column names of the joined dataframes
+                        new_xsect_coll_df = pd_concat(
+                            [new_xsect_coll_df, missing_column],
+                            ignore_index=False,
+                            axis=1,
+                        )
+                        self.print_terminal(f"column {column} added to xsect table")
 
-                    # reorder columns
-                    new_dom_coll_df = new_dom_coll_df[self.dom_coll.df.columns]
+                # reorder columns
+                new_xsect_coll_df = new_xsect_coll_df[self.xsect_coll.df.columns]
 
-                    self.dom_coll.df = new_dom_coll_df
+                # finally, set the imported dataframe into the project dataframe
+                self.xsect_coll.df = new_xsect_coll_df
 
-                prgs_bar = progress_dialog(
-                    max_value=self.dom_coll.df.shape[0],
-                    title_txt="Open DOM",
-                    label_txt="Opening DOM objects...",
-                    cancel_txt=None,
-                    parent=self,
-                )
-                for uid in self.dom_coll.df["uid"].to_list():
-                    if self.dom_coll.get_uid_topology(uid) == "DEM":
-                        if not os_path.isfile((in_dir_name + "/" + uid + ".vts")):
-                            print("error: missing VTK file")
-                            return
-                        vtk_object = DEM()
-                        sg_reader = vtkXMLStructuredGridReader()
-                        sg_reader.SetFileName(in_dir_name + "/" + uid + ".vts")
-                        sg_reader.Update()
-                        vtk_object.ShallowCopy(sg_reader.GetOutput())
-                        vtk_object.Modified()
-                    elif self.dom_coll.get_uid_topology(uid) == "DomXs":
-                        xsect_uid = self.dom_coll.get_uid_x_section(uid)
-                        vtk_object = XsPolyLine(x_section_uid=xsect_uid, parent=self)
-                        pl_reader = vtkXMLPolyDataReader()
-                        pl_reader.SetFileName(in_dir_name + "/" + uid + ".vtp")
-                        pl_reader.Update()
-                        vtk_object.ShallowCopy(pl_reader.GetOutput())
-                        vtk_object.Modified()
-                    elif (
-                        self.dom_coll.df.loc[
-                            self.dom_coll.df["uid"] == uid, "topology"
-                        ].values[0]
-                        == "TSDom"
-                    ):
-                        # Add code to read TSDOM here__________"""
-                        vtk_object = TSDom()
-                    elif (
-                        self.dom_coll.df.loc[
-                            self.dom_coll.df["uid"] == uid, "topology"
-                        ].values[0]
-                        == "PCDom"
-                    ):
-                        # Open saved PCDoms data
-                        vtk_object = PCDom()
-                        pd_reader = vtkXMLPolyDataReader()
-                        pd_reader.SetFileName(in_dir_name + "/" + uid + ".vtp")
-                        pd_reader.Update()
-                        vtk_object.ShallowCopy(pd_reader.GetOutput())
-                        vtk_object.Modified()
-                    self.dom_coll.set_uid_vtk_obj(uid=uid, vtk_obj=vtk_object)
-                    prgs_bar.add_one()
-                self.dom_coll.table_model.endResetModel()
-
-            # Read image collection and files.
-            if os_path.isfile((in_dir_name + "/image_table.csv")) or os_path.isfile(
-                (in_dir_name + "/image_table.json")
-            ):
-                self.image_coll.table_model.beginResetModel()
-                if os_path.isfile((in_dir_name + "/image_table.json")):
-                    # noinspection PyTypeChecker
-                    new_image_coll_df = pd_read_json(
-                        in_dir_name + "/image_table.json",
-                        orient="index",
-                        dtype=ImageCollection.entity_dict_types,
+            for uid in self.xsect_coll.df["uid"].tolist():
+                self.xsect_coll.set_geometry(uid=uid)
+            self.xsect_coll.table_model.endResetModel()
+
+        # Read DOM table and files. Note beginResetModel() and endResetModel().
+        if revision.has_table("dom_table"):
+            self.dom_coll.table_model.beginResetModel()
+            new_dom_coll_df = revision.read_table(
+                name="dom_table", dtype=DomCollection.entity_dict_types
+            )
+
+            # reindex new_dom_coll_df to catch any problem with non-consecutive indices
+            new_dom_coll_df.reset_index(drop=True, inplace=True)
+
+            if not new_dom_coll_df.empty:
+                # fix old projects with texture_uid column name
+                if "texture_uids" in new_dom_coll_df.columns:
+                    new_dom_coll_df.rename(
+                        columns={"texture_uids": "textures"}, inplace=True
                     )
-                else:
-                    # noinspection PyTypeChecker
-                    new_image_coll_df = pd_read_csv(
-                        in_dir_name + "/image_table.csv",
-                        encoding="utf-8",
-                        dtype=ImageCollection.entity_dict_types,
-                        keep_default_na=False,
+                    self.print_terminal(
+                        "column texture_uids renamed as textures in dom table"
+                    )
+                if "texture_uid" in new_dom_coll_df.columns:
+                    new_dom_coll_df.rename(
+                        columns={"texture_uid": "textures"}, inplace=True
+                    )
+                    self.print_terminal(
+                        "column texture_uid renamed as textures in dom table"
+                    )
+                if "x_section" in new_dom_coll_df.columns:
+                    new_dom_coll_df.rename(
+                        columns={"x_section": "parent_uid"}, inplace=True
+                    )
+                    self.print_terminal(
+                        "column x_section renamed as parent_uid in dom table"
                     )
 
-                # reindex new_dom_coll_df to catch any problem with non-consecutive indices
-                new_image_coll_df.reset_index(drop=True, inplace=True)
+                if None in new_dom_coll_df["textures"].to_list():
+                    new_dom_coll_df["textures"] = new_dom_coll_df["textures"].apply(
+                        lambda x: [] if x is None else x
+                    )
+                    self.print_terminal(
+                        "None value replaced with [] in textures column of dom table"
+                    )
 
-                if not new_image_coll_df.empty:
-                    if "x_section" in new_image_coll_df.columns:
-                        new_image_coll_df.rename(
-                            columns={"x_section": "parent_uid"}, inplace=True
-                        )
+                for new_column in new_dom_coll_df.columns.values.tolist():
+                    if new_column not in self.dom_coll.df.columns.values.tolist():
+                        new_dom_coll_df.drop(new_column, axis=1, inplace=True)
                         self.print_terminal(
-                            "column x_section renamed as parent_uid in image table"
+                            f"column {new_column} removed from dom table"
                         )
+                for column in self.dom_coll.df.columns.values.tolist():
+                    if column not in new_dom_coll_df.columns.values.tolist():
+                        missing_column = pd_DataFrame(
+                            [{column: self.dom_coll.entity_dict[column]}]
+                            * len(new_dom_coll_df)
+                        )
+                        # concat with axis=1 to add the column, and ignore_index=False to keep
+                        # the column names of the joined dataframes
+                        new_dom_coll_df = pd_concat(
+                            [new_dom_coll_df, missing_column],
+                            ignore_index=False,
+                            axis=1,
+                        )
+                        self.print_terminal(f"column {column} added to dom table")
 
-                    for new_column in new_image_coll_df.columns.values.tolist():
-                        if new_column not in self.image_coll.df.columns.values.tolist():
-                            new_image_coll_df.drop(new_column, axis=1, inplace=True)
-                            self.print_terminal(
-                                f"column {new_column} removed from image table"
-                            )
-                    for column in self.image_coll.df.columns.values.tolist():
-                        if column not in new_image_coll_df.columns.values.tolist():
-                            missing_column = pd_DataFrame(
-                                [{column: self.image_coll.entity_dict[column]}]
-                                * len(new_image_coll_df)
-                            )
-                            # concat with axis=1 to add the column, and ignore_index=False to keep
-                            # the column names of the joined dataframes
-                            new_image_coll_df = pd_concat(
-                                [new_image_coll_df, missing_column],
-                                ignore_index=False,
-                                axis=1,
-                            )
-                            self.print_terminal(f"column {column} added to image table")
-
-                    # reorder columns
-                    new_image_coll_df = new_image_coll_df[self.image_coll.df.columns]
+                # reorder columns
+                new_dom_coll_df = new_dom_coll_df[self.dom_coll.df.columns]
 
-                    self.image_coll.df = new_image_coll_df
+                self.dom_coll.df = new_dom_coll_df
 
-                prgs_bar = progress_dialog(
-                    max_value=self.image_coll.df.shape[0],
-                    title_txt="Open image",
-                    label_txt="Opening image objects...",
-                    cancel_txt=None,
-                    parent=self,
-                )
-                for uid in self.image_coll.df["uid"].to_list():
-                    if self.image_coll.df.loc[
-                        self.image_coll.df["uid"] == uid, "topology"
-                    ].values[0] in ["MapImage", "TSDomImage"]:
-                        if not os_path.isfile((in_dir_name + "/" + uid + ".vti")):
-                            print("error: missing image file")
-                            return
-                        vtk_object = MapImage()
-                        im_reader = vtkXMLImageDataReader()
-                        im_reader.SetFileName(in_dir_name + "/" + uid + ".vti")
-                        im_reader.Update()
-                        vtk_object.ShallowCopy(im_reader.GetOutput())
-                        vtk_object.Modified()
-                    elif self.image_coll.df.loc[
-                        self.image_coll.df["uid"] == uid, "topology"
-                    ].values[0] in ["XsImage"]:
-                        if not os_path.isfile((in_dir_name + "/" + uid + ".vti")):
-                            print("error: missing image file")
-                            return
-                        vtk_object = XsImage(
-                            parent=self,
-                            x_section_uid=self.image_coll.df.loc[
-                                self.image_coll.df["uid"] == uid, "parent_uid"
-                            ].values[0],
-                        )
-                        im_reader = vtkXMLImageDataReader()
-                        im_reader.SetFileName(in_dir_name + "/" + uid + ".vti")
-                        im_reader.Update()
-                        vtk_object.ShallowCopy(im_reader.GetOutput())
-                        vtk_object.Modified()
-                    elif self.image_coll.df.loc[
-                        self.image_coll.df["uid"] == uid, "topology"
-                    ].values[0] in ["Seismics"]:
-                        if not os_path.isfile((in_dir_name + "/" + uid + ".vts")):
-                            print("error: missing VTK file")
-                            return
-                        vtk_object = Seismics()
-                        sg_reader = vtkXMLStructuredGridReader()
-                        sg_reader.SetFileName(in_dir_name + "/" + uid + ".vts")
-                        sg_reader.Update()
-                        vtk_object.ShallowCopy(sg_reader.GetOutput())
-                        vtk_object.Modified()
-                    self.image_coll.set_uid_vtk_obj(uid=uid, vtk_obj=vtk_object)
-                    prgs_bar.add_one()
-                self.image_coll.table_model.endResetModel()
-
-            # Read mesh3d collection and files.
-            if os_path.isfile((in_dir_name + "/mesh3d_table.csv")) or os_path.isfile(
-                (in_dir_name + "/mesh3d_table.json")
-            ):
-                self.mesh3d_coll.table_model.beginResetModel()
-                if os_path.isfile((in_dir_name + "/mesh3d_table.json")):
-                    # noinspection PyTypeChecker
-                    new_mesh3d_coll_df = pd_read_json(
-                        in_dir_name + "/mesh3d_table.json",
-                        orient="index",
-                        dtype=Mesh3DCollection.entity_dict_types,
+            prgs_bar = progress_dialog(
+                max_value=self.dom_coll.df.shape[0],
+                title_txt="Open DOM",
+                label_txt="Opening DOM objects...",
+                cancel_txt=None,
+                parent=self,
+            )
+            for uid in self.dom_coll.df["uid"].to_list():
+                if self.dom_coll.get_uid_topology(uid) == "DEM":
+                    if not revision.has_entity(uid=uid, extension=".vts"):
+                        prgs_bar.close()
+                        raise FileNotFoundError(f"missing VTK file of entity {uid}")
+                    vtk_object = DEM()
+                    vtk_object.ShallowCopy(
+                        revision.read_entity(uid=uid, extension=".vts")
                     )
-                else:
-                    # noinspection PyTypeChecker
-                    new_mesh3d_coll_df = pd_read_csv(
-                        in_dir_name + "/mesh3d_table.csv",
-                        encoding="utf-8",
-                        dtype=Mesh3DCollection.entity_dict_types,
-                        keep_default_na=False,
+                    vtk_object.Modified()
+                elif self.dom_coll.get_uid_topology(uid) == "DomXs":
+                    xsect_uid = self.dom_coll.get_uid_x_section(uid)
+                    vtk_object = XsPolyLine(x_section_uid=xsect_uid, parent=self)
+                    vtk_object.ShallowCopy(
+                        revision.read_entity(uid=uid, extension=".vtp")
+                    )
+                    vtk_object.Modified()
+                elif (
+                    self.dom_coll.df.loc[
+                        self.dom_coll.df["uid"] == uid, "topology"
+                    ].values[0]
+                    == "TSDom"
+                ):
+                    # Add code to read TSDOM here__________"""
+                    vtk_object = TSDom()
+                elif (
+                    self.dom_coll.df.loc[
+                        self.dom_coll.df["uid"] == uid, "topology"
+                    ].values[0]
+                    == "PCDom"
+                ):
+                    # Open saved PCDoms data
+                    vtk_object = PCDom()
+                    vtk_object.ShallowCopy(
+                        revision.read_entity(uid=uid, extension=".vtp")
+                    )
+                    vtk_object.Modified()
+                    self.spatial_index.register_saved(
+                        uid=uid, path=in_dir_name + "/" + uid + INDEX_EXTENSION
                     )
+                self.dom_coll.set_uid_vtk_obj(uid=uid, vtk_obj=vtk_object)
+                prgs_bar.add_one()
+            self.dom_coll.table_model.endResetModel()
 
-                # reindex new_dom_coll_df to catch any problem with non-consecutive indices
-                new_mesh3d_coll_df.reset_index(drop=True, inplace=True)
+        # Read image collection and files.
+        if revision.has_table("image_table"):
+            self.image_coll.table_model.beginResetModel()
+            new_image_coll_df = revision.read_table(
+                name="image_table", dtype=ImageCollection.entity_dict_types
+            )
 
-                if not new_mesh3d_coll_df.empty:
-                    if "x_section" in new_mesh3d_coll_df.columns:
-                        new_mesh3d_coll_df.rename(
-                            columns={"x_section": "parent_uid"}, inplace=True
-                        )
+            # reindex new_dom_coll_df to catch any problem with non-consecutive indices
+            new_image_coll_df.reset_index(drop=True, inplace=True)
+
+            if not new_image_coll_df.empty:
+                if "x_section" in new_image_coll_df.columns:
+                    new_image_coll_df.rename(
+                        columns={"x_section": "parent_uid"}, inplace=True
+                    )
+                    self.print_terminal(
+                        "column x_section renamed as parent_uid in image table"
+                    )
+
+                for new_column in new_image_coll_df.columns.values.tolist():
+                    if new_column not in self.image_coll.df.columns.values.tolist():
+                        new_image_coll_df.drop(new_column, axis=1, inplace=True)
                         self.print_terminal(
-                            "column x_section renamed as parent_uid in mesh3d table"
+                            f"column {new_column} removed from image table"
                         )
+                for column in self.image_coll.df.columns.values.tolist():
+                    if column not in new_image_coll_df.columns.values.tolist():
+                        missing_column = pd_DataFrame(
+                            [{column: self.image_coll.entity_dict[column]}]
+                            * len(new_image_coll_df)
+                        )
+                        # concat with axis=1 to add the column, and ignore_index=False to keep
+                        # the column names of the joined dataframes
+                        new_image_coll_df = pd_concat(
+                            [new_image_coll_df, missing_column],
+                            ignore_index=False,
+                            axis=1,
+                        )
+                        self.print_terminal(f"column {column} added to image table")
 
-                    for new_column in new_mesh3d_coll_df.columns.values.tolist():
-                        if (
-                            new_column
-                            not in self.mesh3d_coll.df.columns.values.tolist()
-                        ):
-                            new_mesh3d_coll_df.drop(new_column, axis=1, inplace=True)
-                            self.print_terminal(
-                                f"column {new_column} removed from mesh3d table"
-                            )
-                    for column in self.mesh3d_coll.df.columns.values.tolist():
-                        if column not in new_mesh3d_coll_df.columns.values.tolist():
-                            missing_column = pd_DataFrame(
-                                [{column: self.mesh3d_coll.entity_dict[column]}]
-                                * len(new_mesh3d_coll_df)
-                            )
-                            # concat with axis=1 to add the column, and ignore_index=False to keep
-                            # the column names of the joined dataframes
-                            new_mesh3d_coll_df = pd_concat(
-                                [new_mesh3d_coll_df, missing_column],
-                                ignore_index=False,
-                                axis=1,
-                            )
-                            self.print_terminal(
-                                f"column {column} added to mesh3d table"
-                            )
-
-                    # reorder columns
-                    new_mesh3d_coll_df = new_mesh3d_coll_df[self.mesh3d_coll.df.columns]
+                # reorder columns
+                new_image_coll_df = new_image_coll_df[self.image_coll.df.columns]
 
-                    self.mesh3d_coll.df = new_mesh3d_coll_df
+                self.image_coll.df = new_image_coll_df
 
-                prgs_bar = progress_dialog(
-                    max_value=self.mesh3d_coll.df.shape[0],
-                    title_txt="Open 3D mesh",
-                    label_txt="Opening 3D mesh objects...",
-                    cancel_txt=None,
-                    parent=self,
-                )
-                for uid in self.mesh3d_coll.df["uid"].to_list():
-                    if self.mesh3d_coll.df.loc[
-                        self.mesh3d_coll.df["uid"] == uid, "topology"
-                    ].values[0] in ["Voxet"]:
-                        if not os_path.isfile((in_dir_name + "/" + uid + ".vti")):
-                            print("error: missing .mesh3d file")
-                            return
-                        vtk_object = Voxet()
-                        im_reader = vtkXMLImageDataReader()
-                        im_reader.SetFileName(in_dir_name + "/" + uid + ".vti")
-                        im_reader.Update()
-                        vtk_object.ShallowCopy(im_reader.GetOutput())
-                        vtk_object.Modified()
-                    elif self.mesh3d_coll.df.loc[
-                        self.mesh3d_coll.df["uid"] == uid, "topology"
-                    ].values[0] in ["XsVoxet"]:
-                        if not os_path.isfile((in_dir_name + "/" + uid + ".vti")):
-                            print("error: missing .mesh3d file")
-                            return
-                        vtk_object = XsVoxet(
-                            x_section_uid=self.mesh3d_coll.df.loc[
-                                self.mesh3d_coll.df["uid"] == uid, "parent_uid"
-                            ].values[0],
-                            parent=self,
-                        )
-                        im_reader = vtkXMLImageDataReader()
-                        im_reader.SetFileName(in_dir_name + "/" + uid + ".vti")
-                        im_reader.Update()
-                        vtk_object.ShallowCopy(im_reader.GetOutput())
-                        vtk_object.Modified()
-                    self.mesh3d_coll.set_uid_vtk_obj(uid=uid, vtk_obj=vtk_object)
-                    prgs_bar.add_one()
-                self.mesh3d_coll.table_model.endResetModel()
-
-            # Read boundaries collection and files.
-            if os_path.isfile((in_dir_name + "/boundary_table.csv")) or os_path.isfile(
-                (in_dir_name + "/boundary_table.json")
-            ):
-                self.boundary_coll.table_model.beginResetModel()
-                if os_path.isfile((in_dir_name + "/boundary_table.json")):
-                    # noinspection PyTypeChecker
-                    new_boundary_coll_df = pd_read_json(
-                        in_dir_name + "/boundary_table.json",
-                        orient="index",
-                        dtype=BoundaryCollection.entity_dict_types,
+            prgs_bar = progress_dialog(
+                max_value=self.image_coll.df.shape[0],
+                title_txt="Open image",
+                label_txt="Opening image objects...",
+                cancel_txt=None,
+                parent=self,
+            )
+            for uid in self.image_coll.df["uid"].to_list():
+                if self.image_coll.df.loc[
+                    self.image_coll.df["uid"] == uid, "topology"
+                ].values[0] in ["MapImage", "TSDomImage"]:
+                    if not revision.has_entity(uid=uid, extension=".vti"):
+                        prgs_bar.close()
+                        raise FileNotFoundError(f"missing image file of entity {uid}")
+                    vtk_object = MapImage()
+                    vtk_object.ShallowCopy(
+                        revision.read_entity(uid=uid, extension=".vti")
                     )
-                else:
-                    # noinspection PyTypeChecker
-                    new_boundary_coll_df = pd_read_csv(
-                        in_dir_name + "/boundary_table.csv",
-                        encoding="utf-8",
-                        dtype=BoundaryCollection.entity_dict_types,
-                        keep_default_na=False,
+                    vtk_object.Modified()
+                elif self.image_coll.df.loc[
+                    self.image_coll.df["uid"] == uid, "topology"
+                ].values[0] in ["XsImage"]:
+                    if not revision.has_entity(uid=uid, extension=".vti"):
+                        prgs_bar.close()
+                        raise FileNotFoundError(f"missing image file of entity {uid}")
+                    vtk_object = XsImage(
+                        parent=self,
+                        x_section_uid=self.image_coll.df.loc[
+                            self.image_coll.df["uid"] == uid, "parent_uid"
+                        ].values[0],
+                    )
+                    vtk_object.ShallowCopy(
+                        revision.read_entity(uid=uid, extension=".vti")
+                    )
+                    vtk_object.Modified()
+                elif self.image_coll.df.loc[
+                    self.image_coll.df["uid"] == uid, "topology"
+                ].values[0] in ["Seismics"]:
+                    if not revision.has_entity(uid=uid, extension=".vts"):
+                        prgs_bar.close()
+                        raise FileNotFoundError(f"missing VTK file of entity {uid}")
+                    vtk_object = Seismics()
+                    vtk_object.ShallowCopy(
+                        revision.read_entity(uid=uid, extension=".vts")
                     )
+                    vtk_object.Modified()
+                self.image_coll.set_uid_vtk_obj(uid=uid, vtk_obj=vtk_object)
+                prgs_bar.add_one()
+            self.image_coll.table_model.endResetModel()
 
-                # reindex new_dom_coll_df to catch any problem with non-consecutive indices
-                new_boundary_coll_df.reset_index(drop=True, inplace=True)
+        # Read mesh3d collection and files.
+        if revision.has_table("mesh3d_table"):
+            self.mesh3d_coll.table_model.beginResetModel()
+            new_mesh3d_coll_df = revision.read_table(
+                name="mesh3d_table", dtype=Mesh3DCollection.entity_dict_types
+            )
 
-                if not new_boundary_coll_df.empty:
-                    if "x_section" in new_boundary_coll_df.columns:
-                        new_boundary_coll_df.rename(
-                            columns={"x_section": "parent_uid"}, inplace=True
-                        )
+            # reindex new_dom_coll_df to catch any problem with non-consecutive indices
+            new_mesh3d_coll_df.reset_index(drop=True, inplace=True)
+
+            if not new_mesh3d_coll_df.empty:
+                if "x_section" in new_mesh3d_coll_df.columns:
+                    new_mesh3d_coll_df.rename(
+                        columns={"x_section": "parent_uid"}, inplace=True
+                    )
+                    self.print_terminal(
+                        "column x_section renamed as parent_uid in mesh3d table"
+                    )
+
+                for new_column in new_mesh3d_coll_df.columns.values.tolist():
+                    if new_column not in self.mesh3d_coll.df.columns.values.tolist():
+                        new_mesh3d_coll_df.drop(new_column, axis=1, inplace=True)
                         self.print_terminal(
-                            "column x_section renamed as parent_uid in boundary table"
+                            f"column {new_column} removed from mesh3d table"
                         )
+                for column in self.mesh3d_coll.df.columns.values.tolist():
+                    if column not in new_mesh3d_coll_df.columns.values.tolist():
+                        missing_column = pd_DataFrame(
+                            [{column: self.mesh3d_coll.entity_dict[column]}]
+                            * len(new_mesh3d_coll_df)
+                        )
+                        # concat with axis=1 to add the column, and ignore_index=False to keep
+                        # the column names of the joined dataframes
+                        new_mesh3d_coll_df = pd_concat(
+                            [new_mesh3d_coll_df, missing_column],
+                            ignore_index=False,
+                            axis=1,
+                        )
+                        self.print_terminal(f"column {column} added to mesh3d table")
 
-                    for new_column in new_boundary_coll_df.columns.values.tolist():
-                        if (
-                            new_column
-                            not in self.boundary_coll.df.columns.values.tolist()
-                        ):
-                            new_boundary_coll_df.drop(new_column, axis=1, inplace=True)
-                            self.print_terminal(
-                                f"column {new_column} removed from boundary table"
-                            )
-                    for column in self.boundary_coll.df.columns.values.tolist():
-                        if column not in new_boundary_coll_df.columns.values.tolist():
-                            missing_column = pd_DataFrame(
-                                [{column: self.boundary_coll.entity_dict[column]}]
-                                * len(new_boundary_coll_df)
-                            )
-                            # concat with axis=1 to add the column, and ignore_index=False to keep
-                            # the column names of the joined dataframes
-                            new_boundary_coll_df = pd_concat(
-                                [new_boundary_coll_df, missing_column],
-                                ignore_index=False,
-                                axis=1,
-                            )
-                            self.print_terminal(
-                                f"column {column} added to boundary table"
-                            )
-
-                    # reorder columns
-                    new_boundary_coll_df = new_boundary_coll_df[
-                        self.boundary_coll.df.columns
-                    ]
+                # reorder columns
+                new_mesh3d_coll_df = new_mesh3d_coll_df[self.mesh3d_coll.df.columns]
 
-                    self.boundary_coll.df = new_boundary_coll_df
+                self.mesh3d_coll.df = new_mesh3d_coll_df
 
-                prgs_bar = progress_dialog(
-                    max_value=self.boundary_coll.df.shape[0],
-                    title_txt="Open boundary",
-                    label_txt="Opening boundary objects...",
-                    cancel_txt=None,
-                    parent=self,
-                )
-                for uid in self.boundary_coll.df["uid"].to_list():
-                    if not os_path.isfile((in_dir_name + "/" + uid + ".vtp")):
-                        print("error: missing VTK file")
-                        return
-                    if self.boundary_coll.get_uid_topology(uid) == "PolyLine":
-                        vtk_object = PolyLine()
-                    elif self.boundary_coll.get_uid_topology(uid) == "TriSurf":
-                        vtk_object = TriSurf()
-                    pd_reader = vtkXMLPolyDataReader()
-                    pd_reader.SetFileName(in_dir_name + "/" + uid + ".vtp")
-                    pd_reader.Update()
-                    vtk_object.ShallowCopy(pd_reader.GetOutput())
+            prgs_bar = progress_dialog(
+                max_value=self.mesh3d_coll.df.shape[0],
+                title_txt="Open 3D mesh",
+                label_txt="Opening 3D mesh objects...",
+                cancel_txt=None,
+                parent=self,
+            )
+            for uid in self.mesh3d_coll.df["uid"].to_list():
+                if self.mesh3d_coll.df.loc[
+                    self.mesh3d_coll.df["uid"] == uid, "topology"
+                ].values[0] in ["Voxet"]:
+                    if not revision.has_entity(uid=uid, extension=".vti"):
+                        prgs_bar.close()
+                        raise FileNotFoundError(f"missing .mesh3d file of entity {uid}")
+                    vtk_object = Voxet()
+                    vtk_object.ShallowCopy(
+                        revision.read_entity(uid=uid, extension=".vti")
+                    )
                     vtk_object.Modified()
-                    self.boundary_coll.set_uid_vtk_obj(uid=uid, vtk_obj=vtk_object)
-                    prgs_bar.add_one()
-                self.boundary_coll.table_model.endResetModel()
-
-            # Read well table and files.
-            if os_path.isfile((in_dir_name + "/well_table.csv")) or os_path.isfile(
-                (in_dir_name + "/well_table.json")
-            ):
-                self.well_coll.table_model.beginResetModel()
-                if os_path.isfile((in_dir_name + "/well_table.json")):
-                    # noinspection PyTypeChecker
-                    new_well_coll_df = pd_read_json(
-                        in_dir_name + "/well_table.json",
-                        orient="index",
-                        dtype=WellCollection.entity_dict_types,
+                elif self.mesh3d_coll.df.loc[
+                    self.mesh3d_coll.df["uid"] == uid, "topology"
+                ].values[0] in ["XsVoxet"]:
+                    if not revision.has_entity(uid=uid, extension=".vti"):
+                        prgs_bar.close()
+                        raise FileNotFoundError(f"missing .mesh3d file of entity {uid}")
+                    vtk_object = XsVoxet(
+                        x_section_uid=self.mesh3d_coll.df.loc[
+                            self.mesh3d_coll.df["uid"] == uid, "parent_uid"
+                        ].values[0],
+                        parent=self,
                     )
-                else:
-                    # noinspection PyTypeChecker
-                    new_well_coll_df = pd_read_csv(
-                        in_dir_name + "/well_table.csv",
-                        encoding="utf-8",
-                        dtype=WellCollection.entity_dict_types,
-                        keep_default_na=False,
+                    vtk_object.ShallowCopy(
+                        revision.read_entity(uid=uid, extension=".vti")
                     )
+                    vtk_object.Modified()
+                self.mesh3d_coll.set_uid_vtk_obj(uid=uid, vtk_obj=vtk_object)
+                prgs_bar.add_one()
+            self.mesh3d_coll.table_model.endResetModel()
 
-                # reindex new_dom_coll_df to catch any problem with non-consecutive indices
-                new_well_coll_df.reset_index(drop=True, inplace=True)
+        # Read boundaries collection and files.
+        if revision.has_table("boundary_table"):
+            self.boundary_coll.table_model.beginResetModel()
+            new_boundary_coll_df = revision.read_table(
+                name="boundary_table", dtype=BoundaryCollection.entity_dict_types
+            )
 
-                if not new_well_coll_df.empty:
-                    if "x_section" in new_well_coll_df.columns:
-                        new_well_coll_df.rename(
-                            columns={"x_section": "parent_uid"}, inplace=True
-                        )
+            # reindex new_dom_coll_df to catch any problem with non-consecutive indices
+            new_boundary_coll_df.reset_index(drop=True, inplace=True)
+
+            if not new_boundary_coll_df.empty:
+                if "x_section" in new_boundary_coll_df.columns:
+                    new_boundary_coll_df.rename(
+                        columns={"x_section": "parent_uid"}, inplace=True
+                    )
+                    self.print_terminal(
+                        "column x_section renamed as parent_uid in boundary table"
+                    )
+
+                for new_column in new_boundary_coll_df.columns.values.tolist():
+                    if new_column not in self.boundary_coll.df.columns.values.tolist():
+                        new_boundary_coll_df.drop(new_column, axis=1, inplace=True)
                         self.print_terminal(
-                            "column x_section renamed as parent_uid in wells table"
+                            f"column {new_column} removed from boundary table"
+                        )
+                for column in self.boundary_coll.df.columns.values.tolist():
+                    if column not in new_boundary_coll_df.columns.values.tolist():
+                        missing_column = pd_DataFrame(
+                            [{column: self.boundary_coll.entity_dict[column]}]
+                            * len(new_boundary_coll_df)
                         )
+                        # concat with axis=1 to add the column, and ignore_index=False to keep
+                        # the column names of the joined dataframes
+                        new_boundary_coll_df = pd_concat(
+                            [new_boundary_coll_df, missing_column],
+                            ignore_index=False,
+                            axis=1,
+                        )
+                        self.print_terminal(f"column {column} added to boundary table")
 
-                    for new_column in new_well_coll_df.columns.values.tolist():
-                        if new_column not in self.well_coll.df.columns.values.tolist():
-                            new_well_coll_df.drop(new_column, axis=1, inplace=True)
-                            self.print_terminal(
-                                f"column {new_column} removed from wells table"
-                            )
-                    for column in self.well_coll.df.columns.values.tolist():
-                        if column not in new_well_coll_df.columns.values.tolist():
-                            missing_column = pd_DataFrame(
-                                [{column: self.well_coll.entity_dict[column]}]
-                                * len(new_well_coll_df)
-                            )
-                            # concat with axis=1 to add the column, and ignore_index=False to keep
-                            # the column names of the joined dataframes
-                            new_well_coll_df = pd_concat(
-                                [new_well_coll_df, missing_column],
-                                ignore_index=False,
-                                axis=1,
-                            )
-                            self.print_terminal(f"column {column} added to wells table")
+                # reorder columns
+                new_boundary_coll_df = new_boundary_coll_df[
+                    self.boundary_coll.df.columns
+                ]
 
-                    # reorder columns
-                    new_well_coll_df = new_well_coll_df[self.well_coll.df.columns]
+                self.boundary_coll.df = new_boundary_coll_df
 
-                    self.well_coll.df = new_well_coll_df
+            prgs_bar = progress_dialog(
+                max_value=self.boundary_coll.df.shape[0],
+                title_txt="Open boundary",
+                label_txt="Opening boundary objects...",
+                cancel_txt=None,
+                parent=self,
+            )
+            for uid in self.boundary_coll.df["uid"].to_list():
+                if not revision.has_entity(uid=uid, extension=".vtp"):
+                    prgs_bar.close()
+                    raise FileNotFoundError(f"missing VTK file of entity {uid}")
+                if self.boundary_coll.get_uid_topology(uid) == "PolyLine":
+                    vtk_object = PolyLine()
+                elif self.boundary_coll.get_uid_topology(uid) == "TriSurf":
+                    vtk_object = TriSurf()
+                vtk_object.ShallowCopy(revision.read_entity(uid=uid, extension=".vtp"))
+                vtk_object.Modified()
+                self.boundary_coll.set_uid_vtk_obj(uid=uid, vtk_obj=vtk_object)
+                prgs_bar.add_one()
+            self.boundary_coll.table_model.endResetModel()
 
-                prgs_bar = progress_dialog(
-                    max_value=self.well_coll.df.shape[0],
-                    title_txt="Open wells",
-                    label_txt="Opening well objects...",
-                    cancel_txt=None,
-                    parent=self,
-                )
-                for uid in self.well_coll.df["uid"].to_list():
-                    if not os_path.isfile((in_dir_name + "/" + uid + ".vtp")):
-                        print("error: missing VTK file")
-                        return
-                    vtk_object = Well()
-                    pd_reader = vtkXMLPolyDataReader()
-                    pd_reader.SetFileName(in_dir_name + "/" + uid + ".vtp")
-                    pd_reader.Update()
-                    vtk_object.trace = pd_reader.GetOutput()
-
-                    self.well_coll.set_uid_vtk_obj(uid=uid, vtk_obj=vtk_object.trace)
-                    # Don't know if I like it.
-                    # Maybe it's better to always add to the vtkobject column the
-                    # Well and not the WellTrace instance and then call well.trace/head where needed
-                    prgs_bar.add_one()
-                self.well_coll.table_model.endResetModel()
-            self.prop_legend.update_widget(parent=self)
+        # Read well table and files.
+        if revision.has_table("well_table"):
+            self.well_coll.table_model.beginResetModel()
+            new_well_coll_df = revision.read_table(
+                name="well_table", dtype=WellCollection.entity_dict_types
+            )
 
-            # Read geological table and files.
-            if os_path.isfile(
-                (in_dir_name + "/geological_table.csv")
-            ) or os_path.isfile((in_dir_name + "/geological_table.json")):
-                self.geol_coll.table_model.beginResetModel()
-                if os_path.isfile((in_dir_name + "/geological_table.json")):
-                    # noinspection PyTypeChecker
-                    new_geol_coll_df = pd_read_json(
-                        in_dir_name + "/geological_table.json",
-                        orient="index",
-                        dtype=GeologicalCollection.entity_dict_types,
+            # reindex new_dom_coll_df to catch any problem with non-consecutive indices
+            new_well_coll_df.reset_index(drop=True, inplace=True)
+
+            if not new_well_coll_df.empty:
+                if "x_section" in new_well_coll_df.columns:
+                    new_well_coll_df.rename(
+                        columns={"x_section": "parent_uid"}, inplace=True
                     )
-                else:
-                    # noinspection PyTypeChecker
-                    new_geol_coll_df = pd_read_csv(
-                        in_dir_name + "/geological_table.csv",
-                        encoding="utf-8",
-                        dtype=GeologicalCollection.entity_dict_types,
-                        keep_default_na=False,
+                    self.print_terminal(
+                        "column x_section renamed as parent_uid in wells table"
                     )
 
-                # reindex new_dom_coll_df to catch any problem with non-consecutive indices
-                new_geol_coll_df.reset_index(drop=True, inplace=True)
-
-                if not new_geol_coll_df.empty:
-                    if "x_section" in new_geol_coll_df.columns:
-                        new_geol_coll_df.rename(
-                            columns={"x_section": "parent_uid"}, inplace=True
-                        )
+                for new_column in new_well_coll_df.columns.values.tolist():
+                    if new_column not in self.well_coll.df.columns.values.tolist():
+                        new_well_coll_df.drop(new_column, axis=1, inplace=True)
                         self.print_terminal(
-                            "column x_section renamed as parent_uid in geology table"
+                            f"column {new_column} removed from wells table"
+                        )
+                for column in self.well_coll.df.columns.values.tolist():
+                    if column not in new_well_coll_df.columns.values.tolist():
+                        missing_column = pd_DataFrame(
+                            [{column: self.well_coll.entity_dict[column]}]
+                            * len(new_well_coll_df)
                         )
+                        # concat with axis=1 to add the column, and ignore_index=False to keep
+                        # the column names of the joined dataframes
+                        new_well_coll_df = pd_concat(
+                            [new_well_coll_df, missing_column],
+                            ignore_index=False,
+                            axis=1,
+                        )
+                        self.print_terminal(f"column {column} added to wells table")
 
-                    for new_column in new_geol_coll_df.columns.values.tolist():
-                        if new_column not in self.geol_coll.df.columns.values.tolist():
-                            new_geol_coll_df.drop(new_column, axis=1, inplace=True)
-                            self.print_terminal(
-                                f"column {new_column} removed from geology table"
-                            )
-                    for column in self.geol_coll.df.columns.values.tolist():
-                        if column not in new_geol_coll_df.columns.values.tolist():
-                            missing_column = pd_DataFrame(
-                                [{column: self.geol_coll.entity_dict[column]}]
-                                * len(new_geol_coll_df)
-                            )
-                            # concat with axis=1 to add the column, and ignore_index=False to keep
-                            # the column names of the joined dataframes
-                            new_geol_coll_df = pd_concat(
-                                [new_geol_coll_df, missing_column],
-                                ignore_index=False,
-                                axis=1,
-                            )
-                            self.print_terminal(
-                                f"column {column} added to geology table"
-                            )
+                # reorder columns
+                new_well_coll_df = new_well_coll_df[self.well_coll.df.columns]
 
-                    # reorder columns
-                    new_geol_coll_df = new_geol_coll_df[self.geol_coll.df.columns]
+                self.well_coll.df = new_well_coll_df
 
-                    self.geol_coll.df = new_geol_coll_df
+            prgs_bar = progress_dialog(
+                max_value=self.well_coll.df.shape[0],
+                title_txt="Open wells",
+                label_txt="Opening well objects...",
+                cancel_txt=None,
+                parent=self,
+            )
+            for uid in self.well_coll.df["uid"].to_list():
+                if not revision.has_entity(uid=uid, extension=".vtp"):
+                    prgs_bar.close()
+                    raise FileNotFoundError(f"missing VTK file of entity {uid}")
+                vtk_object = Well()
+                vtk_object.trace = revision.read_entity(uid=uid, extension=".vtp")
+
+                self.well_coll.set_uid_vtk_obj(uid=uid, vtk_obj=vtk_object.trace)
+                # Don't know if I like it.
+                # Maybe it's better to always add to the vtkobject column the
+                # Well and not the WellTrace instance and then call well.trace/head where needed
+                prgs_bar.add_one()
+            self.well_coll.table_model.endResetModel()
+        self.prop_legend.update_widget(parent=self)
 
-                prgs_bar = progress_dialog(
-                    max_value=self.geol_coll.df.shape[0],
-                    title_txt="Open geology",
-                    label_txt="Opening geological objects...",
-                    cancel_txt=None,
-                    parent=self,
-                )
-                for uid in self.geol_coll.df["uid"].to_list():
-                    if not os_path.isfile((in_dir_name + "/" + uid + ".vtp")):
-                        print("error: missing VTK file")
-                        return
-                    if self.geol_coll.get_uid_topology(uid) == "VertexSet":
-                        if "dip" in self.geol_coll.get_uid_properties_names(uid):
-                            vtk_object = Attitude()
-                        else:
-                            vtk_object = VertexSet()
-                    elif self.geol_coll.get_uid_topology(uid) == "PolyLine":
-                        vtk_object = PolyLine()
-                    elif self.geol_coll.get_uid_topology(uid) == "TriSurf":
-                        vtk_object = TriSurf()
-                    elif self.geol_coll.get_uid_topology(uid) == "XsVertexSet":
-                        vtk_object = XsVertexSet(
-                            self.geol_coll.get_uid_x_section(uid), parent=self
-                        )
-                    elif self.geol_coll.get_uid_topology(uid) == "XsPolyLine":
-                        vtk_object = XsPolyLine(
-                            self.geol_coll.get_uid_x_section(uid), parent=self
-                        )
-                    pd_reader = vtkXMLPolyDataReader()
-                    pd_reader.SetFileName(in_dir_name + "/" + uid + ".vtp")
-                    pd_reader.Update()
-                    vtk_object.ShallowCopy(pd_reader.GetOutput())
-                    vtk_object.Modified()
-                    self.geol_coll.set_uid_vtk_obj(uid=uid, vtk_obj=vtk_object)
-                    prgs_bar.add_one()
-                self.geol_coll.table_model.endResetModel()
-            # Update legend.
-            self.prop_legend.update_widget(parent=self)
+        # Read geological table and files.
+        if revision.has_table("geological_table"):
+            self.geol_coll.table_model.beginResetModel()
+            new_geol_coll_df = revision.read_table(
+                name="geological_table",
+                dtype=GeologicalCollection.entity_dict_types,
+            )
 
-            # Read fluids table and files.
-            if os_path.isfile((in_dir_name + "/fluids_table.csv")) or os_path.isfile(
-                (in_dir_name + "/fluids_table.json")
-            ):
-                self.fluid_coll.table_model.beginResetModel()
-                if os_path.isfile((in_dir_name + "/fluids_table.json")):
-                    # noinspection PyTypeChecker
-                    new_fluids_coll_df = pd_read_json(
-                        in_dir_name + "/fluids_table.json",
-                        orient="index",
-                        dtype=FluidCollection.entity_dict_types,
+            # reindex new_dom_coll_df to catch any problem with non-consecutive indices
+            new_geol_coll_df.reset_index(drop=True, inplace=True)
+
+            if not new_geol_coll_df.empty:
+                if "x_section" in new_geol_coll_df.columns:
+                    new_geol_coll_df.rename(
+                        columns={"x_section": "parent_uid"}, inplace=True
                     )
-                else:
-                    # noinspection PyTypeChecker
-                    new_fluids_coll_df = pd_read_csv(
-                        in_dir_name + "/fluids_table.csv",
-                        encoding="utf-8",
-                        dtype=FluidCollection.entity_dict_types,
-                        keep_default_na=False,
+                    self.print_terminal(
+                        "column x_section renamed as parent_uid in geology table"
                     )
 
-                # reindex new_dom_coll_df to catch any problem with non-consecutive indices
-                new_fluids_coll_df.reset_index(drop=True, inplace=True)
-
-                if not new_fluids_coll_df.empty:
-                    if "x_section" in new_fluids_coll_df.columns:
-                        new_fluids_coll_df.rename(
-                            columns={"x_section": "parent_uid"}, inplace=True
-                        )
+                for new_column in new_geol_coll_df.columns.values.tolist():
+                    if new_column not in self.geol_coll.df.columns.values.tolist():
+                        new_geol_coll_df.drop(new_column, axis=1, inplace=True)
                         self.print_terminal(
-                            "column x_section renamed as parent_uid in fluids table"
+                            f"column {new_column} removed from geology table"
                         )
+                for column in self.geol_coll.df.columns.values.tolist():
+                    if column not in new_geol_coll_df.columns.values.tolist():
+                        missing_column = pd_DataFrame(
+                            [{column: self.geol_coll.entity_dict[column]}]
+                            * len(new_geol_coll_df)
+                        )
+                        # concat with axis=1 to add the column, and ignore_index=False to keep
+                        # the column names of the joined dataframes
+                        new_geol_coll_df = pd_concat(
+                            [new_geol_coll_df, missing_column],
+                            ignore_index=False,
+                            axis=1,
+                        )
+                        self.print_terminal(f"column {column} added to geology table")
 
-                    for new_column in new_fluids_coll_df.columns.values.tolist():
-                        if new_column not in self.fluid_coll.df.columns.values.tolist():
-                            new_fluids_coll_df.drop(new_column, axis=1, inplace=True)
-                            self.print_terminal(
-                                f"column {new_column} removed from fluids table"
-                            )
-                    for column in self.fluid_coll.df.columns.values.tolist():
-                        if column not in new_fluids_coll_df.columns.values.tolist():
-                            missing_column = pd_DataFrame(
-                                [{column: self.fluid_coll.entity_dict[column]}]
-                                * len(new_fluids_coll_df)
-                            )
-                            # concat with axis=1 to add the column, and ignore_index=False to keep
-                            # the column names of the joined dataframes
-                            new_fluids_coll_df = pd_concat(
-                                [new_fluids_coll_df, missing_column],
-                                ignore_index=False,
-                                axis=1,
-                            )
-                            self.print_terminal(
-                                f"column {column} added to fluids table"
-                            )
-
-                    # reorder columns
-                    new_fluids_coll_df = new_fluids_coll_df[self.fluid_coll.df.columns]
+                # reorder columns
+                new_geol_coll_df = new_geol_coll_df[self.geol_coll.df.columns]
 
-                    self.fluid_coll.df = new_fluids_coll_df
+                self.geol_coll.df = new_geol_coll_df
 
-                prgs_bar = progress_dialog(
-                    max_value=self.fluid_coll.df.shape[0],
-                    title_txt="Open fluids",
-                    label_txt="Opening fluid objects...",
-                    cancel_txt=None,
-                    parent=self,
-                )
-                for uid in self.fluid_coll.df["uid"].to_list():
-                    if not os_path.isfile((in_dir_name + "/" + uid + ".vtp")):
-                        print("error: missing VTK file")
-                        return
-                    if self.fluid_coll.get_uid_topology(uid) == "VertexSet":
+            prgs_bar = progress_dialog(
+                max_value=self.geol_coll.df.shape[0],
+                title_txt="Open geology",
+                label_txt="Opening geological objects...",
+                cancel_txt=None,
+                parent=self,
+            )
+            for uid in self.geol_coll.df["uid"].to_list():
+                if not revision.has_entity(uid=uid, extension=".vtp"):
+                    prgs_bar.close()
+                    raise FileNotFoundError(f"missing VTK file of entity {uid}")
+                if self.geol_coll.get_uid_topology(uid) == "VertexSet":
+                    if "dip" in self.geol_coll.get_uid_properties_names(uid):
+                        vtk_object = Attitude()
+                    else:
                         vtk_object = VertexSet()
-                    elif self.fluid_coll.get_uid_topology(uid) == "PolyLine":
-                        vtk_object = PolyLine()
-                    elif self.fluid_coll.get_uid_topology(uid) == "TriSurf":
-                        vtk_object = TriSurf()
-                    elif self.fluid_coll.get_uid_topology(uid) == "XsVertexSet":
-                        vtk_object = XsVertexSet(
-                            self.fluid_coll.get_uid_x_section(uid), parent=self
-                        )
-                    elif self.fluid_coll.get_uid_topology(uid) == "XsPolyLine":
-                        vtk_object = XsPolyLine(
-                            self.fluid_coll.get_uid_x_section(uid), parent=self
-                        )
-                    pd_reader = vtkXMLPolyDataReader()
-                    pd_reader.SetFileName(in_dir_name + "/" + uid + ".vtp")
-                    pd_reader.Update()
-                    vtk_object.ShallowCopy(pd_reader.GetOutput())
-                    vtk_object.Modified()
-                    self.fluid_coll.set_uid_vtk_obj(uid=uid, vtk_obj=vtk_object)
-                    prgs_bar.add_one()
-                self.fluid_coll.table_model.endResetModel()
-            # Update legend.
-            self.prop_legend.update_widget(parent=self)
-
-            # Read Backgrounds table and files."""
-            if os_path.isfile(
-                (in_dir_name + "/backgrounds_table.csv")
-            ) or os_path.isfile((in_dir_name + "/backgrounds_table.json")):
-                self.backgrnd_coll.table_model.beginResetModel()
-                if os_path.isfile((in_dir_name + "/backgrounds_table.json")):
-                    # noinspection PyTypeChecker
-                    new_backgrounds_coll_df = pd_read_json(
-                        in_dir_name + "/backgrounds_table.json",
-                        orient="index",
-                        dtype=FluidCollection.entity_dict_types,
+                elif self.geol_coll.get_uid_topology(uid) == "PolyLine":
+                    vtk_object = PolyLine()
+                elif self.geol_coll.get_uid_topology(uid) == "TriSurf":
+                    vtk_object = TriSurf()
+                elif self.geol_coll.get_uid_topology(uid) == "XsVertexSet":
+                    vtk_object = XsVertexSet(
+                        self.geol_coll.get_uid_x_section(uid), parent=self
                     )
-                else:
-                    # noinspection PyTypeChecker
-                    new_backgrounds_coll_df = pd_read_csv(
-                        in_dir_name + "/backgrounds_table.csv",
-                        encoding="utf-8",
-                        dtype=FluidCollection.entity_dict_types,
-                        keep_default_na=False,
+                elif self.geol_coll.get_uid_topology(uid) == "XsPolyLine":
+                    vtk_object = XsPolyLine(
+                        self.geol_coll.get_uid_x_section(uid), parent=self
                     )
+                vtk_object.ShallowCopy(revision.read_entity(uid=uid, extension=".vtp"))
+                vtk_object.Modified()
+                self.geol_coll.set_uid_vtk_obj(uid=uid, vtk_obj=vtk_object)
+                prgs_bar.add_one()
+            self.geol_coll.table_model.endResetModel()
+        # Update legend.
+        self.prop_legend.update_widget(parent=self)
+
+        # Read fluids table and files.
+        if revision.has_table("fluids_table"):
+            self.fluid_coll.table_model.beginResetModel()
+            new_fluids_coll_df = revision.read_table(
+                name="fluids_table", dtype=FluidCollection.entity_dict_types
+            )
 
-                # reindex new_dom_coll_df to catch any problem with non-consecutive indices
-                new_backgrounds_coll_df.reset_index(drop=True, inplace=True)
+            # reindex new_dom_coll_df to catch any problem with non-consecutive indices
+            new_fluids_coll_df.reset_index(drop=True, inplace=True)
 
-                if not new_backgrounds_coll_df.empty:
-                    if "x_section" in new_backgrounds_coll_df.columns:
-                        new_backgrounds_coll_df.rename(
-                            columns={"x_section": "parent_uid"}, inplace=True
-                        )
+            if not new_fluids_coll_df.empty:
+                if "x_section" in new_fluids_coll_df.columns:
+                    new_fluids_coll_df.rename(
+                        columns={"x_section": "parent_uid"}, inplace=True
+                    )
+                    self.print_terminal(
+                        "column x_section renamed as parent_uid in fluids table"
+                    )
+
+                for new_column in new_fluids_coll_df.columns.values.tolist():
+                    if new_column not in self.fluid_coll.df.columns.values.tolist():
+                        new_fluids_coll_df.drop(new_column, axis=1, inplace=True)
                         self.print_terminal(
-                            "column x_section renamed as parent_uid in background table"
+                            f"column {new_column} removed from fluids table"
+                        )
+                for column in self.fluid_coll.df.columns.values.tolist():
+                    if column not in new_fluids_coll_df.columns.values.tolist():
+                        missing_column = pd_DataFrame(
+                            [{column: self.fluid_coll.entity_dict[column]}]
+                            * len(new_fluids_coll_df)
                         )
+                        # concat with axis=1 to add the column, and ignore_index=False to keep
+                        # the column names of the joined dataframes
+                        new_fluids_coll_df = pd_concat(
+                            [new_fluids_coll_df, missing_column],
+                            ignore_index=False,
+                            axis=1,
+                        )
+                        self.print_terminal(f"column {column} added to fluids table")
 
-                    for new_column in new_backgrounds_coll_df.columns.values.tolist():
-                        if (
-                            new_column
-                            not in self.backgrnd_coll.df.columns.values.tolist()
-                        ):
-                            new_backgrounds_coll_df.drop(
-                                new_column, axis=1, inplace=True
-                            )
-                            self.print_terminal(
-                                f"column {new_column} removed from background table"
-                            )
-                    for column in self.backgrnd_coll.df.columns.values.tolist():
-                        if (
-                            column
-                            not in new_backgrounds_coll_df.columns.values.tolist()
-                        ):
-                            missing_column = pd_DataFrame(
-                                [{column: self.backgrnd_coll.entity_dict[column]}]
-                                * len(new_backgrounds_coll_df)
-                            )
-                            # concat with axis=1 to add the column, and ignore_index=False to keep
-                            # the column names of the joined dataframes
-                            new_backgrounds_coll_df = pd_concat(
-                                [new_backgrounds_coll_df, missing_column],
-                                ignore_index=False,
-                                axis=1,
-                            )
-                            self.print_terminal(
-                                f"column {column} added to background table"
-                            )
+                # reorder columns
+                new_fluids_coll_df = new_fluids_coll_df[self.fluid_coll.df.columns]
 
-                    # reorder columns
-                    new_backgrounds_coll_df = new_backgrounds_coll_df[
-                        self.backgrnd_coll.df.columns
-                    ]
+                self.fluid_coll.df = new_fluids_coll_df
 
-                    self.backgrnd_coll.df = new_backgrounds_coll_df
+            prgs_bar = progress_dialog(
+                max_value=self.fluid_coll.df.shape[0],
+                title_txt="Open fluids",
+                label_txt="Opening fluid objects...",
+                cancel_txt=None,
+                parent=self,
+            )
+            for uid in self.fluid_coll.df["uid"].to_list():
+                if not revision.has_entity(uid=uid, extension=".vtp"):
+                    prgs_bar.close()
+                    raise FileNotFoundError(f"missing VTK file of entity {uid}")
+                if self.fluid_coll.get_uid_topology(uid) == "VertexSet":
+                    vtk_object = VertexSet()
+                elif self.fluid_coll.get_uid_topology(uid) == "PolyLine":
+                    vtk_object = PolyLine()
+                elif self.fluid_coll.get_uid_topology(uid) == "TriSurf":
+                    vtk_object = TriSurf()
+                elif self.fluid_coll.get_uid_topology(uid) == "XsVertexSet":
+                    vtk_object = XsVertexSet(
+                        self.fluid_coll.get_uid_x_section(uid), parent=self
+                    )
+                elif self.fluid_coll.get_uid_topology(uid) == "XsPolyLine":
+                    vtk_object = XsPolyLine(
+                        self.fluid_coll.get_uid_x_section(uid), parent=self
+                    )
+                vtk_object.ShallowCopy(revision.read_entity(uid=uid, extension=".vtp"))
+                vtk_object.Modified()
+                self.fluid_coll.set_uid_vtk_obj(uid=uid, vtk_obj=vtk_object)
+                prgs_bar.add_one()
+            self.fluid_coll.table_model.endResetModel()
+        # Update legend.
+        self.prop_legend.update_widget(parent=self)
 
-                prgs_bar = progress_dialog(
-                    max_value=self.backgrnd_coll.df.shape[0],
-                    title_txt="Open fluids",
-                    label_txt="Opening fluid objects...",
-                    cancel_txt=None,
-                    parent=self,
-                )
-                for uid in self.backgrnd_coll.df["uid"].to_list():
-                    if not os_path.isfile((in_dir_name + "/" + uid + ".vtp")):
-                        print("error: missing VTK file")
-                        return
-                    if self.backgrnd_coll.get_uid_topology(uid) == "VertexSet":
-                        vtk_object = VertexSet()
-                    elif self.backgrnd_coll.get_uid_topology(uid) == "PolyLine":
-                        vtk_object = PolyLine()
-                    # elif self.backgrnd_coll.get_uid_topology(uid) == 'TriSurf':
-                    #     vtk_object = TriSurf()
-                    # elif self.backgrnd_coll.get_uid_topology(uid) == 'XsVertexSet':
-                    #     vtk_object = XsVertexSet(self.backgrnd_coll.get_uid_x_section(uid), parent=self)
-                    # elif self.backgrnd_coll.get_uid_topology(uid) == 'XsPolyLine':
-                    #     vtk_object = XsPolyLine(self.backgrnd_coll.get_uid_x_section(uid), parent=self)
-                    pd_reader = vtkXMLPolyDataReader()
-                    pd_reader.SetFileName(in_dir_name + "/" + uid + ".vtp")
-                    pd_reader.Update()
-                    vtk_object.ShallowCopy(pd_reader.GetOutput())
-                    vtk_object.Modified()
-                    self.backgrnd_coll.set_uid_vtk_obj(uid=uid, vtk_obj=vtk_object)
-                    prgs_bar.add_one()
-                self.backgrnd_coll.table_model.endResetModel()
-            # Update legend.
-            self.prop_legend.update_widget(parent=self)
+        # Read Backgrounds table and files."""
+        if revision.has_table("backgrounds_table"):
+            self.backgrnd_coll.table_model.beginResetModel()
+            new_backgrounds_coll_df = revision.read_table(
+                name="backgrounds_table", dtype=FluidCollection.entity_dict_types
+            )
 
-        except BaseException as e:
-            # Get current system exception
-            import sys
-            import traceback
+            # reindex new_dom_coll_df to catch any problem with non-consecutive indices
+            new_backgrounds_coll_df.reset_index(drop=True, inplace=True)
 
-            ex_type, ex_value, ex_traceback = sys.exc_info()
+            if not new_backgrounds_coll_df.empty:
+                if "x_section" in new_backgrounds_coll_df.columns:
+                    new_backgrounds_coll_df.rename(
+                        columns={"x_section": "parent_uid"}, inplace=True
+                    )
+                    self.print_terminal(
+                        "column x_section renamed as parent_uid in background table"
+                    )
 
-            # Extract unformatter stack traces as tuples
-            trace_back = traceback.extract_tb(ex_traceback)
+                for new_column in new_backgrounds_coll_df.columns.values.tolist():
+                    if new_column not in self.backgrnd_coll.df.columns.values.tolist():
+                        new_backgrounds_coll_df.drop(new_column, axis=1, inplace=True)
+                        self.print_terminal(
+                            f"column {new_column} removed from background table"
+                        )
+                for column in self.backgrnd_coll.df.columns.values.tolist():
+                    if column not in new_backgrounds_coll_df.columns.values.tolist():
+                        missing_column = pd_DataFrame(
+                            [{column: self.backgrnd_coll.entity_dict[column]}]
+                            * len(new_backgrounds_coll_df)
+                        )
+                        # concat with axis=1 to add the column, and ignore_index=False to keep
+                        # the column names of the joined dataframes
+                        new_backgrounds_coll_df = pd_concat(
+                            [new_backgrounds_coll_df, missing_column],
+                            ignore_index=False,
+                            axis=1,
+                        )
+                        self.print_terminal(
+                            f"column {column} added to background table"
+                        )
 
-            # Format stacktrace
-            stack_trace = list()
+                # reorder columns
+                new_backgrounds_coll_df = new_backgrounds_coll_df[
+                    self.backgrnd_coll.df.columns
+                ]
 
-            for trace in trace_back:
-                stack_trace.append(
-                    "File : %s , Line : %d, Func.Name : %s, Message : %s"
-                    % (trace[0], trace[1], trace[2], trace[3])
-                )
+                self.backgrnd_coll.df = new_backgrounds_coll_df
 
-            print("Exception type : %s " % ex_type.__name__)
-            print("Exception message : %s" % ex_value)
-            print("Stack trace : %s" % stack_trace)
+            prgs_bar = progress_dialog(
+                max_value=self.backgrnd_coll.df.shape[0],
+                title_txt="Open fluids",
+                label_txt="Opening fluid objects...",
+                cancel_txt=None,
+                parent=self,
+            )
+            for uid in self.backgrnd_coll.df["uid"].to_list():
+                if not revision.has_entity(uid=uid, extension=".vtp"):
+                    prgs_bar.close()
+                    raise FileNotFoundError(f"missing VTK file of entity {uid}")
+                if self.backgrnd_coll.get_uid_topology(uid) == "VertexSet":
+                    vtk_object = VertexSet()
+                elif self.backgrnd_coll.get_uid_topology(uid) == "PolyLine":
+                    vtk_object = PolyLine()
+                # elif self.backgrnd_coll.get_uid_topology(uid) == 'TriSurf':
+                #     vtk_object = TriSurf()
+                # elif self.backgrnd_coll.get_uid_topology(uid) == 'XsVertexSet':
+                #     vtk_object = XsVertexSet(self.backgrnd_coll.get_uid_x_section(uid), parent=self)
+                # elif self.backgrnd_coll.get_uid_topology(uid) == 'XsPolyLine':
+                #     vtk_object = XsPolyLine(self.backgrnd_coll.get_uid_x_section(uid), parent=self)
+                vtk_object.ShallowCopy(revision.read_entity(uid=uid, extension=".vtp"))
+                vtk_object.Modified()
+                self.backgrnd_coll.set_uid_vtk_obj(uid=uid, vtk_obj=vtk_object)
+                prgs_bar.add_one()
+            self.backgrnd_coll.table_model.endResetModel()
+        # Update legend.
+        self.prop_legend.update_widget(parent=self)
 
-            self.print_terminal("Error - tried to open invalid project.")
+    def recover_autosave(self):
+        """Offer to recover the latest complete autosave snapshot, left by a session that was not closed
+        normally, then start the autosave service."""
+        snapshot_dir = latest_snapshot(self.autosave.autosave_dir)
+        if snapshot_dir:
+            info = read_info(snapshot_dir)
+            confirm_recover = options_dialog(
+                title="Recover project",
+                message=f"PZero was not closed normally.\nRecover the project {info['project_file']} autosaved on {info['time']}?",
+                yes_role="Recover",
+                no_role="Discard",
+            )
+            if confirm_recover == 0:
+                self.create_empty()
+                try:
+                    self.load_revision(in_dir_name=snapshot_dir)
+                    self.out_file_name = info["project_file"]
+                    self.print_terminal(
+                        f"Recovered project autosaved on {info['time']}. Save it to keep the recovered version.\n"
+                    )
+                except BaseException as e:
+                    self.print_terminal(f"Error - autosave not recovered: {e}")
+                    snapshot_dir = None
+            else:
+                snapshot_dir = None
+            # The recovered snapshot is kept as base of the next ones, the others are removed.
+            self.autosave.reset(base_dir=snapshot_dir)
+        self.autosave.start()
 
     # ---- Methods used to import entities from other file formats. ----
 
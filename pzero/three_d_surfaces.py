@@ -3,6 +3,8 @@ PZero© Andrea Bistacchi"""
 
 from copy import deepcopy
 
+from functools import partial
+
 from uuid import uuid4
 
 from PySide6.QtWidgets import QDockWidget
@@ -11,26 +13,31 @@ from pyvista import PolyData as pv_PolyData
 
 from numpy import abs as np_abs
 from numpy import around as np_around
+from numpy import asarray as np_asarray
 from numpy import cbrt as np_cbrt
+from numpy import concatenate as np_concatenate
 from numpy import cos as np_cos
+from numpy import empty as np_empty
 from numpy import flip as np_flip
 from numpy import float32 as np_float32
 from numpy import float64 as np_float64
+from numpy import full as np_full
+from numpy import nan as np_nan
 from numpy import ndarray as np_ndarray
 from numpy import pi as np_pi
 from numpy import sin as np_sin
 from numpy import sqrt as np_sqrt
+from numpy import unique as np_unique
+from numpy import vstack as np_vstack
 from numpy import zeros as np_zeros
 
 from pandas import DataFrame as pd_DataFrame
-from pandas import concat as pd_concat
 
 from scipy.interpolate import griddata as sp_griddata
 
 from vtk import (
     vtkAppendPolyData,
     vtkDelaunay2D,
-    vtkSurfaceReconstructionFilter,
     vtkPoints,
     vtkPolyData,
     vtkContourFilter,
@@ -43,13 +50,10 @@ from vtk import (
     vtkLinearSubdivisionFilter,
     vtkButterflySubdivisionFilter,
     vtkLoopSubdivisionFilter,
-    vtkStripper,
     vtkCleanPolyData,
     vtkTriangleFilter,
     vtkImageData,
     vtkCutter,
-    vtkPointInterpolator2D,
-    vtkVoronoiKernel,
     vtkThresholdPoints,
     vtkDataObject,
     vtkPolyDataConnectivityFilter,
@@ -82,6 +86,14 @@ from .entities_factory import (
     XsVertexSet,
     Attitude,
 )
+from .helpers.batch_executor import batch_workers, run_batch
+from .helpers.dem_projection import project_to_dem
+from .helpers.surface_reconstruction import gather_points, reconstruct_surface
+from .helpers.section_intersection import (
+    cull_groups,
+    intersection_pipeline,
+    plane_groups,
+)
 from .helpers.helper_functions import freeze_gui_onoff, freeze_gui_on, freeze_gui_off
 
 
@@ -469,7 +481,8 @@ def interpolation_delaunay_2d(self):
 @freeze_gui_onoff
 def poisson_interpolation(self):
     """vtkSurfaceReconstructionFilter can be used to reconstruct surfaces from point clouds. Input is a vtkDataSet
-    defining points assumed to lie on the surface of a 3D object."""
+    defining points assumed to lie on the surface of a 3D object. Large point sets are reconstructed in overlapping
+    tiles, see helpers/surface_reconstruction.py."""
     self.print_terminal(
         "Interpolation from point cloud: build surface from interpolation"
     )
@@ -523,59 +536,33 @@ def poisson_interpolation(self):
         surf_dict[key] = surf_dict_updt[key]
     surf_dict["topology"] = "TriSurf"
     surf_dict["vtk_obj"] = TriSurf()
-    # Create a new instance of the interpolation class
-    surf_from_points = vtkSurfaceReconstructionFilter()
     sample_spacing = input_one_value_dialog(
         title="Surface interpolation from point cloud",
-        label="Sample Spacing",
+        label="Sample Spacing (<= 0 from point density)",
         default_value=-1.0,
     )
-    if sample_spacing is None:
-        pass
-    else:
-        surf_from_points.SetSampleSpacing(sample_spacing)
     neighborhood_size = input_one_value_dialog(
         title="Surface interpolation from point cloud",
         label="Neighborhood Size",
         default_value=20,
     )
     if neighborhood_size is None:
-        pass
-    else:
-        surf_from_points.SetNeighborhoodSize(int(neighborhood_size))
-    # Create a vtkAppendPolyData filter to merge all input vtk objects.
-    vtkappend = vtkAppendPolyData()
-    for uid in input_uids:
-        if (
-            self.geol_coll.get_uid_topology(input_uids[0]) == "XsPolyLine"
-            or self.geol_coll.get_uid_topology(input_uids[0]) == "PolyLine"
-            or self.geol_coll.get_uid_topology(input_uids[0]) == "TriSurf"
-        ):
-            # Extract points from vtkpolydata
-            point_coord = self.geol_coll.get_uid_vtk_obj(uid).points
-            points = vtkPoints()
-            x = 0
-            for row in point_coord:
-                points.InsertPoint(
-                    x, point_coord[x, 0], point_coord[x, 1], point_coord[x, 2]
-                )
-                x += 1
-            polydata = vtkPolyData()
-            polydata.SetPoints(points)
-            vtkappend.AddInputData(polydata)
-        elif self.geol_coll.get_uid_topology(input_uids[0]) == "VertexSet":
-            vtkappend.AddInputData(self.geol_coll.get_uid_vtk_obj(uid))
-    vtkappend.Update()
-    # The created vtkPolyData is used as the input for vtkSurfaceReconstructionFilter
-    surf_from_points.SetInputDataObject(vtkappend.GetOutput())
-    surf_from_points.Update()  # executes the interpolation. Output is vtkImageData
-    # Contour the grid at zero to extract the surface
-    contour_surface = vtkContourFilter()
-    contour_surface.SetInputData(surf_from_points.GetOutput())
-    contour_surface.SetValue(0, 0.0)
-    contour_surface.Update()
+        neighborhood_size = 20
+    # Points of all input entities, wrapped without copies by reconstruct_surface.
+    points = gather_points([self.geol_coll.get_uid_vtk_obj(uid) for uid in input_uids])
+    if points is None:
+        self.print_terminal(" -- empty object -- ")
+        return
+    tic(parent=self)
+    surface, n_tiles = reconstruct_surface(
+        points=points,
+        sample_spacing=sample_spacing,
+        neighborhood_size=int(neighborhood_size),
+    )
+    toc(parent=self)
+    self.print_terminal(f"-> {len(points)} points reconstructed in {n_tiles} tiles")
     # ShallowCopy is the way to copy the new interpolated surface into the TriSurf instance created at the beginning
-    surf_dict["vtk_obj"].ShallowCopy(contour_surface.GetOutput())
+    surf_dict["vtk_obj"].ShallowCopy(surface)
     surf_dict["vtk_obj"].Modified()
     # Add new entity from surf_dict. Function add_entity_from_dict creates a new uid
     if surf_dict["vtk_obj"].points_number > 0:
@@ -584,6 +571,51 @@ def poisson_interpolation(self):
         self.print_terminal(" -- empty object -- ")
 
 
+def split_isosurfaces_by_value(iso_polydata=None, values=None, scalar_name=None):
+    """Split the triangulated output of a multi-value contour pass into one TriSurf for each value.
+    Each triangle is assigned to the value closest to the scalar of its first vertex (with ComputeScalarsOn
+    all vertexes of a contour triangle carry the contour value). Points and point data are then compacted
+    with a single np_unique call for each value. Returns a dictionary value -> TriSurf (possibly empty).
+    """
+    values = [float(value) for value in values]
+    iso_surfaces = {value: TriSurf() for value in values}
+    if iso_polydata.GetNumberOfPolys() == 0 or not values:
+        return iso_surfaces
+    points = numpy_support.vtk_to_numpy(iso_polydata.GetPoints().GetData())
+    triangles = numpy_support.vtk_to_numpy(
+        iso_polydata.GetPolys().GetConnectivityArray()
+    ).reshape(-1, 3)
+    scalars = numpy_support.vtk_to_numpy(
+        iso_polydata.GetPointData().GetArray(scalar_name)
+    )
+    if scalars.ndim > 1:
+        scalars = scalars[:, 0]
+    values_array = np_asarray(values, dtype=np_float64)
+    trgl_value_idx = np_abs(
+        scalars[triangles[:, 0]][:, None].astype(np_float64) - values_array[None, :]
+    ).argmin(axis=1)
+    point_arrays = [
+        iso_polydata.GetPointData().GetArray(i)
+        for i in range(iso_polydata.GetPointData().GetNumberOfArrays())
+    ]
+    for i, value in enumerate(values):
+        value_triangles = triangles[trgl_value_idx == i]
+        if value_triangles.shape[0] == 0:
+            continue
+        # Renumber points used by this surface, so that each TriSurf owns a compact point array.
+        used_points, new_ids = np_unique(value_triangles, return_inverse=True)
+        surf = iso_surfaces[value]
+        surf.points = points[used_points]
+        surf.cells = new_ids.reshape((-1, 3))
+        for vtk_array in point_arrays:
+            numpy_array = numpy_support.vtk_to_numpy(vtk_array)[used_points]
+            surf_array = numpy_support.numpy_to_vtk(numpy_array, deep=True)
+            surf_array.SetName(vtk_array.GetName())
+            surf.GetPointData().AddArray(surf_array)
+        surf.Modified()
+    return iso_surfaces
+
+
 @freeze_gui_onoff
 def implicit_model_loop_structural(self):
     """Function to call LoopStructural's implicit modelling algorithms.
@@ -637,10 +669,16 @@ def implicit_model_loop_structural(self):
         "tz": None,
         "coord": None,
     }
-    # Create empty dataframe to collect all input data.
+    # Collect input data as Numpy blocks, one for each selected entity, and build the input dataframe
+    # once at the end. Calling pd_concat in the loop copies the whole dataframe at every step.
     self.print_terminal("-> creating input dataframe...")
     tic(parent=self)
-    all_input_data_df = pd_DataFrame(columns=list(loop_input_dict.keys()))
+    xyz_blocks = []
+    normals_blocks = []
+    feature_name_blocks = []
+    val_blocks = []
+    # The (sequence, time) pair of each legend row is looked up once for each role-feature-scenario.
+    legend_lookup = {}
     # For every selected item extract interesting data: XYZ, feature_name, val, etc.
     prgs_bar = progress_dialog(
         max_value=len(input_uids),
@@ -650,59 +688,68 @@ def implicit_model_loop_structural(self):
         parent=self,
     )
     for uid in input_uids:
-        # Create empty dataframe to collect input data for this object.
-        entity_input_data_df = pd_DataFrame(columns=list(loop_input_dict.keys()))
         # XYZ data for every selected entity.
-        # Adding all columns at once is about 10% faster than adding them separately, but still slow.
-        entity_input_data_df[["X", "Y", "Z"]] = self.geol_coll.get_uid_vtk_obj(
-            uid
-        ).points
+        xyz = np_asarray(self.geol_coll.get_uid_vtk_obj(uid).points, dtype=np_float64)
+        n_points = xyz.shape[0]
+        xyz_blocks.append(xyz)
         if "Normals" in self.geol_coll.get_uid_properties_names(uid):
-            entity_input_data_df[["nx", "ny", "nz"]] = self.geol_coll.get_uid_property(
-                uid=uid, property_name="Normals"
+            normals_blocks.append(
+                np_asarray(
+                    self.geol_coll.get_uid_property(uid=uid, property_name="Normals"),
+                    dtype=np_float64,
+                ).reshape(n_points, 3)
             )
-        # feature_name value
-        featname_single = self.geol_coll.legend_df.loc[
-            (self.geol_coll.legend_df["role"] == self.geol_coll.get_uid_role(uid))
-            & (
-                self.geol_coll.legend_df["feature"]
-                == self.geol_coll.get_uid_feature(uid)
-            )
-            & (
-                self.geol_coll.legend_df["scenario"]
-                == self.geol_coll.get_uid_scenario(uid)
-            ),
-            "sequence",
-        ].values[0]
-        entity_input_data_df["feature_name"] = featname_single
-        # val value
-        val_single = self.geol_coll.legend_df.loc[
-            (self.geol_coll.legend_df["role"] == self.geol_coll.get_uid_role(uid))
-            & (
-                self.geol_coll.legend_df["feature"]
-                == self.geol_coll.get_uid_feature(uid)
-            )
-            & (
-                self.geol_coll.legend_df["scenario"]
-                == self.geol_coll.get_uid_scenario(uid)
-            ),
-            "time",
-        ].values[0]
-        if val_single == -999999.0:
-            val_single = float("nan")
-        entity_input_data_df["val"] = val_single
+        else:
+            normals_blocks.append(np_full((n_points, 3), np_nan))
+        # feature_name and val values, from sequence and time in the legend.
+        legend_key = (
+            self.geol_coll.get_uid_role(uid),
+            self.geol_coll.get_uid_feature(uid),
+            self.geol_coll.get_uid_scenario(uid),
+        )
+        if legend_key not in legend_lookup:
+            legend_row = self.geol_coll.legend_df.loc[
+                (self.geol_coll.legend_df["role"] == legend_key[0])
+                & (self.geol_coll.legend_df["feature"] == legend_key[1])
+                & (self.geol_coll.legend_df["scenario"] == legend_key[2]),
+                ["sequence", "time"],
+            ].values[0]
+            val_single = float(legend_row[1])
+            if val_single == -999999.0:
+                val_single = float("nan")
+            legend_lookup[legend_key] = (legend_row[0], val_single)
+        featname_single, val_single = legend_lookup[legend_key]
+        feature_name_blocks.append(np_full(n_points, featname_single, dtype=object))
+        val_blocks.append(np_full(n_points, val_single))
         # nx, ny and nz: TO BE IMPLEMENTED
         # gx, gy and gz: TO BE IMPLEMENTED
-        # Append dataframe for this input entity to the general input dataframe.
-        # Old Pandas <= 1.5.3
-        # all_input_data_df = all_input_data_df.append(
-        #     entity_input_data_df, ignore_index=True
-        # )
-        # New Pandas >= 2.0.0
-        all_input_data_df = pd_concat(
-            [all_input_data_df, entity_input_data_df], ignore_index=True
-        )
         prgs_bar.add_one()
+    # Build the input dataframe in one step from the stacked Numpy blocks.
+    # Columns that are not filled (interface, gx, ..., coord) are all NaNs and are dropped below.
+    n_rows = sum(block.shape[0] for block in xyz_blocks)
+    xyz_all = np_vstack(xyz_blocks) if xyz_blocks else np_empty((0, 3))
+    normals_all = np_vstack(normals_blocks) if normals_blocks else np_empty((0, 3))
+    loop_input_columns = {
+        "X": xyz_all[:, 0],
+        "Y": xyz_all[:, 1],
+        "Z": xyz_all[:, 2],
+        "feature_name": (
+            np_concatenate(feature_name_blocks)
+            if feature_name_blocks
+            else np_empty(0, dtype=object)
+        ),
+        "val": np_concatenate(val_blocks) if val_blocks else np_empty(0),
+        "interface": np_full(n_rows, np_nan),
+        "nx": normals_all[:, 0],
+        "ny": normals_all[:, 1],
+        "nz": normals_all[:, 2],
+    }
+    for key in loop_input_dict:
+        if key not in loop_input_columns:
+            loop_input_columns[key] = np_full(n_rows, np_nan)
+    all_input_data_df = pd_DataFrame(
+        {key: loop_input_columns[key] for key in loop_input_dict}
+    )
     toc(parent=self)
     prgs_bar.close()
     # Drop columns with no valid value (i.e. all NaNs).
@@ -984,37 +1031,38 @@ def implicit_model_loop_structural(self):
         return
     voxet_dict["vtk_obj"].Modified()
     toc(parent=self)
-    # Extract isosurfaces with vtkFlyingEdges3D. Documentation in:
+    # Extract all isosurfaces in a single contour pass with all values, then split the output by value.
+    # For vtkImageData input, vtkContourFilter delegates to vtkFlyingEdges3D or vtkSynchronizedTemplates3D.
+    # Documentation in:
     # https://vtk.org/doc/nightly/html/classvtkFlyingEdges3D.html
     # https://python.hotexamples.com/examples/vtk/-/vtkFlyingEdges3D/python-vtkflyingedges3d-function-examples.html
     self.print_terminal("-> extract isosurfaces...")
     tic(parent=self)
-    for value in all_input_data_df["val"].dropna().unique():
-        value = float(value)
-        voxet_dict["vtk_obj"].GetPointData().SetActiveScalars("strati_0")
+    iso_values = [float(value) for value in all_input_data_df["val"].dropna().unique()]
+    voxet_dict["vtk_obj"].GetPointData().SetActiveScalars("strati_0")
+    iso_surface = vtkContourFilter()
+    iso_surface.SetInputData(voxet_dict["vtk_obj"])
+    iso_surface.ComputeScalarsOn()
+    iso_surface.ComputeGradientsOn()
+    iso_surface.SetArrayComponent(0)
+    iso_surface.GenerateTrianglesOn()
+    iso_surface.UseScalarTreeOn()
+    iso_surface.SetNumberOfContours(len(iso_values))
+    for i, value in enumerate(iso_values):
+        iso_surface.SetValue(i, value)
+    iso_surface.Update()
+    iso_surfaces = split_isosurfaces_by_value(
+        iso_polydata=iso_surface.GetOutput(),
+        values=iso_values,
+        scalar_name="strati_0",
+    )
+    for value in iso_values:
         self.print_terminal(f"-> extract iso-surface at value = {value}")
         # Get metadata of first geological feature of this time
-        role = self.geol_coll.legend_df.loc[
-            self.geol_coll.legend_df["time"] == value, "role"
+        legend_row = self.geol_coll.legend_df.loc[
+            self.geol_coll.legend_df["time"] == value, ["role", "feature", "scenario"]
         ].values[0]
-        feature = self.geol_coll.legend_df.loc[
-            self.geol_coll.legend_df["time"] == value, "feature"
-        ].values[0]
-        scenario = self.geol_coll.legend_df.loc[
-            self.geol_coll.legend_df["time"] == value, "scenario"
-        ].values[0]
-        # Iso-surface algorithm
-        iso_surface = vtkContourFilter()
-        # iso_surface = vtkFlyingEdges3D()
-        # iso_surface = vtkMarchingCubes()
-        iso_surface.SetInputData(voxet_dict["vtk_obj"])
-        iso_surface.ComputeScalarsOn()
-        iso_surface.ComputeGradientsOn()
-        iso_surface.SetArrayComponent(0)
-        iso_surface.GenerateTrianglesOn()
-        iso_surface.UseScalarTreeOn()
-        iso_surface.SetValue(0, value)
-        iso_surface.Update()
+        role, feature, scenario = legend_row
         # Create new TriSurf and populate with iso-surface
         surf_dict = deepcopy(self.geol_coll.entity_dict)
         surf_dict["name"] = feature + "_from_" + model_name
@@ -1022,31 +1070,101 @@ def implicit_model_loop_structural(self):
         surf_dict["role"] = role
         surf_dict["feature"] = feature
         surf_dict["scenario"] = scenario
-        surf_dict["vtk_obj"] = TriSurf()
-        surf_dict["vtk_obj"].ShallowCopy(iso_surface.GetOutput())
+        surf_dict["vtk_obj"] = iso_surfaces[value]
 
         # vtkContourFilter does NOT apply the direction matrix to its output,
         # so we need to manually transform the isosurface from aligned space to OBB world space
-        if use_obb_alignment:
+        if use_obb_alignment and surf_dict["vtk_obj"].points_number > 0:
             surf_dict["vtk_obj"] = transform_vtk_to_obb(
                 surf_dict["vtk_obj"], obb_info, voxet_world_origin
             )
             self.print_terminal(f"-> iso-surface transformed to OBB coordinate system")
 
         surf_dict["vtk_obj"].Modified()
-        if isinstance(surf_dict["vtk_obj"].points, np_ndarray):
-            if len(surf_dict["vtk_obj"].points) > 0:
-                # Add entity to geological collection only if it is not empty
-                self.geol_coll.add_entity_from_dict(surf_dict)
-                self.print_terminal(
-                    f"-> iso-surface at value = {value} has been created"
-                )
-            else:
-                self.print_terminal(" -- empty object -- ")
+        if surf_dict["vtk_obj"].points_number > 0:
+            # Add entity to geological collection only if it is not empty
+            self.geol_coll.add_entity_from_dict(surf_dict)
+            self.print_terminal(f"-> iso-surface at value = {value} has been created")
+        else:
+            self.print_terminal(" -- empty object -- ")
     toc(parent=self)
     self.print_terminal("Loop interpolation completed.")
 
 
+def _private_copy(vtk_obj=None):
+    """Shallow copy of a TriSurf that shares points, cells and data arrays with the original, used as input of
+    pipelines running in parallel, so that each thread builds cell links and other lazy structures on its own copy.
+    """
+    private_copy = TriSurf()
+    private_copy.ShallowCopy(vtk_obj)
+    return private_copy
+
+
+def run_surface_batch(self, pipeline=None, input_uids=None, name_suffix=None):
+    """Run a per-entity VTK pipeline on all TriSurf in input_uids in parallel, then add all the results to the
+    geological collection in a single batch, and print the time spent on each entity.
+    pipeline takes a TriSurf and returns a vtkPolyData, that is copied to a new TriSurf named with name_suffix,
+    or a list of dictionaries with "name_suffix", "topology" and "vtk_obj" keys (and optionally
+    "properties_names" and "properties_components") when more than one entity is created from each input.
+    Returns the list of new uids."""
+    inputs = [
+        (uid, _private_copy(self.geol_coll.get_uid_vtk_obj(uid))) for uid in input_uids
+    ]
+    self.print_terminal(
+        f"-> processing {len(inputs)} entities on {batch_workers(len(inputs))} threads"
+    )
+    tic(parent=self)
+    results = run_batch(pipeline=pipeline, inputs=inputs)
+    # Results are collected here, on the GUI thread, and added to the collection all together.
+    new_dicts = []
+    for result in results:
+        uid = result["key"]
+        name = self.geol_coll.get_uid_name(uid)
+        if result["error"] is not None:
+            self.print_terminal(f"-> {name}: ERROR {result['error']}")
+            continue
+        self.print_terminal(f"-> {name}: {result['elapsed']:.3f} s")
+        outputs = result["output"]
+        if not isinstance(outputs, list):
+            vtk_obj = TriSurf()
+            vtk_obj.ShallowCopy(outputs)
+            outputs = [
+                {"name_suffix": name_suffix, "topology": "TriSurf", "vtk_obj": vtk_obj}
+            ]
+        for output in outputs:
+            # Create deepcopy of the geological entity dictionary.
+            surf_dict = deepcopy(self.geol_coll.entity_dict)
+            surf_dict["name"] = name + output["name_suffix"]
+            surf_dict["feature"] = self.geol_coll.get_uid_feature(uid)
+            surf_dict["scenario"] = self.geol_coll.get_uid_scenario(uid)
+            surf_dict["role"] = self.geol_coll.get_uid_role(uid)
+            surf_dict["topology"] = output["topology"]
+            surf_dict["vtk_obj"] = output["vtk_obj"]
+            surf_dict["properties_names"] = output.get("properties_names", [])
+            surf_dict["properties_components"] = output.get("properties_components", [])
+            surf_dict["vtk_obj"].Modified()
+            if surf_dict["vtk_obj"].points_number > 0:
+                new_dicts.append(surf_dict)
+            else:
+                self.print_terminal(f" -- empty object from {name} -- ")
+    new_uids = self.geol_coll.add_entities_from_dicts(entity_dicts=new_dicts)
+    toc(parent=self)
+    return new_uids
+
+
+def _smoothing_pipeline(
+    mesh=None, convergence_value=1, boundary_smoothing=False, edge_smoothing=False
+):
+    """vtkSmoothPolyDataFilter pipeline used by surface_smoothing."""
+    smoother = vtkSmoothPolyDataFilter()
+    smoother.SetInputData(mesh)
+    smoother.SetConvergence(float(convergence_value))
+    smoother.SetBoundarySmoothing(boundary_smoothing)
+    smoother.SetFeatureEdgeSmoothing(edge_smoothing)
+    smoother.Update()
+    return smoother.GetOutput()
+
+
 @freeze_gui_onoff
 def surface_smoothing(
     self, mode=0, convergence_value=1, boundary_smoothing=False, edge_smoothing=False
@@ -1064,37 +1182,23 @@ def surface_smoothing(
         # Deep copy list of selected uids needed otherwise problems can arise if the main geology table is deseselcted while the dataframe is being built
         input_uids = deepcopy(self.selected_uids)
     for uid in input_uids:
-        if isinstance(self.geol_coll.get_uid_vtk_obj(uid), TriSurf):
-            smoother = vtkSmoothPolyDataFilter()
-            smoother.SetInputData(self.geol_coll.get_uid_vtk_obj(uid))
-            if convergence_value is None:
-                convergence_value = 1
-            smoother.SetConvergence(float(convergence_value))
-            smoother.SetBoundarySmoothing(boundary_smoothing)
-            smoother.SetFeatureEdgeSmoothing(edge_smoothing)
-            smoother.Update()
-            if mode:
-                return smoother.GetOutput()
-            else:
-                # Create deepcopy of the geological entity dictionary.
-                surf_dict = deepcopy(self.geol_coll.entity_dict)
-                surf_dict["name"] = self.geol_coll.get_uid_name(uid) + "_smoothed"
-                surf_dict["feature"] = self.geol_coll.get_uid_feature(uid)
-                surf_dict["scenario"] = self.geol_coll.get_uid_scenario(uid)
-                surf_dict["role"] = self.geol_coll.get_uid_role(uid)
-                surf_dict["topology"] = "TriSurf"
-                surf_dict["vtk_obj"] = TriSurf()
-                surf_dict["vtk_obj"].ShallowCopy(smoother.GetOutput())
-                surf_dict["vtk_obj"].Modified()
-
-                if surf_dict["vtk_obj"].points_number > 0:
-                    self.geol_coll.add_entity_from_dict(surf_dict)
-                else:
-                    self.print_terminal(" -- empty object -- ")
-
-        else:
+        if not isinstance(self.geol_coll.get_uid_vtk_obj(uid), TriSurf):
             self.print_terminal(" -- Error input type: only TriSurf type -- ")
             return
+    if convergence_value is None:
+        convergence_value = 1
+    pipeline = partial(
+        _smoothing_pipeline,
+        convergence_value=convergence_value,
+        boundary_smoothing=boundary_smoothing,
+        edge_smoothing=edge_smoothing,
+    )
+    if mode:
+        # Preview of the first entity only.
+        return pipeline(self.geol_coll.get_uid_vtk_obj(input_uids[0]))
+    run_surface_batch(
+        self, pipeline=pipeline, input_uids=input_uids, name_suffix="_smoothed"
+    )
     # Create deepcopy of the geological entity dictionary.
     # surf_dict = deepcopy(self.geol_coll.entity_dict)
     # input_dict = {'name': ['TriSurf name: ', self.geol_coll.get_uid_name(input_uids[0]) + '_smooth'], 'role': ['Role: ', self.parent.geol_coll.valid_roles], 'feature': ['Feature: ', self.geol_coll.get_uid_feature(input_uids[0])], 'scenario': ['Scenario: ', self.geol_coll.get_uid_scenario(input_uids[0])]}
@@ -1266,6 +1370,36 @@ def linear_extrusion(self):
         self.print_terminal(" -- empty object -- ")
 
 
+def _decimation_pro_pipeline(
+    mesh=None,
+    tar_reduct=0.5,
+    preserve_topology=None,
+    bound_vert_del=None,
+    splitting=None,
+):
+    """vtkDecimatePro pipeline used by decimation_pro_resampling. Switches set to None keep the VTK default."""
+    deci = vtkDecimatePro()
+    deci.SetInputData(mesh)
+    deci.SetTargetReduction(float(tar_reduct))
+    if preserve_topology is not None:
+        deci.SetPreserveTopology(preserve_topology)
+    if bound_vert_del is not None:
+        deci.SetBoundaryVertexDeletion(bound_vert_del)
+    if splitting is not None:
+        deci.SetSplitting(splitting)
+    deci.Update()
+    return deci.GetOutput()
+
+
+def _on_off_switch(text=None):
+    """Convert an ON/OFF string from a dialog to True/False, or None if the dialog was cancelled."""
+    if text in ["ON", "on"]:
+        return True
+    elif text in ["OFF", "off"]:
+        return False
+    return None
+
+
 @freeze_gui_onoff
 def decimation_pro_resampling(self):
     """Decimation reduces the number of triangles in a triangle mesh while maintaining a faithful approximation to
@@ -1289,17 +1423,6 @@ def decimation_pro_resampling(self):
         else:
             self.print_terminal(" -- Error input type: only TriSurf type -- ")
             return
-    # Create deepcopy of the geological entity dictionary.
-    surf_dict = deepcopy(self.geol_coll.entity_dict)
-    surf_dict["name"] = self.geol_coll.get_uid_name(input_uids[0]) + "_decimated"
-    surf_dict["feature"] = self.geol_coll.get_uid_feature(input_uids[0])
-    surf_dict["scenario"] = self.geol_coll.get_uid_scenario(input_uids[0])
-    surf_dict["role"] = self.geol_coll.get_uid_role(input_uids[0])
-    surf_dict["topology"] = "TriSurf"
-    surf_dict["vtk_obj"] = TriSurf()
-    # Create a new instance of the decimation class
-    deci = vtkDecimatePro()
-    deci.SetInputData(self.geol_coll.get_uid_vtk_obj(input_uids[0]))
     # Target Reduction value. Specify the desired reduction in the total number of polygons (e.g., when
     # Reduction is set to 0.9, this filter will try to reduce the data set to 10% of its original size).
     tar_reduct = input_one_value_dialog(
@@ -1309,31 +1432,18 @@ def decimation_pro_resampling(self):
     )
     if tar_reduct is None:
         tar_reduct = 0.5
-    deci.SetTargetReduction(tar_reduct)
     # Preserve Topology switch. Turn on/off whether to preserve the topology of the original mesh.
     preserve_topology = input_text_dialog(
         title="Decimation Resampling parameters",
         label="Preserve Topology (ON/OFF)",
         default_text="ON",
     )
-    if preserve_topology is None:
-        pass
-    elif preserve_topology == "ON" or preserve_topology == "on":
-        deci.PreserveTopologyOn()
-    elif preserve_topology == "OFF" or preserve_topology == "off":
-        deci.PreserveTopologyOff()
     # Boundary Vertex Deletion switch. Turn on/off the deletion of vertices on the boundary of a mesh.
     bound_vert_del = input_text_dialog(
         title="Decimation Resampling parameters",
         label="Boundary Vertex Deletion (ON/OFF)",
         default_text="OFF",
     )
-    if bound_vert_del is None:
-        pass
-    elif bound_vert_del == "ON" or bound_vert_del == "on":
-        deci.BoundaryVertexDeletionOn()
-    elif bound_vert_del == "OFF" or bound_vert_del == "off":
-        deci.BoundaryVertexDeletionOff()
     # Splitting switch. Turn on/off the splitting of the mesh at corners, along edges, at non-manifold points, or
     # anywhere else a split is required.
     splitting = input_text_dialog(
@@ -1341,21 +1451,28 @@ def decimation_pro_resampling(self):
         label="Splitting (ON to preserve original topology/OFF)",
         default_text="ON",
     )
-    if splitting is None:
-        pass
-    elif splitting == "ON" or splitting == "on":
-        deci.SplittingOn()
-    elif splitting == "OFF" or splitting == "off":
-        deci.SplittingOff()
+    # The same parameters are applied to all selected surfaces, processed in parallel.
+    run_surface_batch(
+        self,
+        pipeline=partial(
+            _decimation_pro_pipeline,
+            tar_reduct=tar_reduct,
+            preserve_topology=_on_off_switch(preserve_topology),
+            bound_vert_del=_on_off_switch(bound_vert_del),
+            splitting=_on_off_switch(splitting),
+        ),
+        input_uids=input_uids,
+        name_suffix="_decimated",
+    )
+
+
+def _decimation_quadric_pipeline(mesh=None, tar_reduct=0.5):
+    """vtkQuadricDecimation pipeline used by decimation_quadric_resampling."""
+    deci = vtkQuadricDecimation()
+    deci.SetInputData(mesh)
+    deci.SetTargetReduction(float(tar_reduct))
     deci.Update()
-    # ShallowCopy is the way to copy the new interpolated surface into the TriSurf instance created at the beginning
-    surf_dict["vtk_obj"].ShallowCopy(deci.GetOutput())
-    surf_dict["vtk_obj"].Modified()
-    # Add new entity from surf_dict. Function add_entity_from_dict creates a new uid
-    if surf_dict["vtk_obj"].points_number > 0:
-        self.geol_coll.add_entity_from_dict(surf_dict)
-    else:
-        self.print_terminal(" -- empty object -- ")
+    return deci.GetOutput()
 
 
 @freeze_gui_onoff
@@ -1381,17 +1498,6 @@ def decimation_quadric_resampling(self):
         else:
             self.print_terminal(" -- Error input type: only TriSurf type -- ")
             return
-    # Create deepcopy of the geological entity dictionary.
-    surf_dict = deepcopy(self.geol_coll.entity_dict)
-    surf_dict["name"] = self.geol_coll.get_uid_name(input_uids[0]) + "_decimated"
-    surf_dict["feature"] = self.geol_coll.get_uid_feature(input_uids[0])
-    surf_dict["scenario"] = self.geol_coll.get_uid_scenario(input_uids[0])
-    surf_dict["role"] = self.geol_coll.get_uid_role(input_uids[0])
-    surf_dict["topology"] = "TriSurf"
-    surf_dict["vtk_obj"] = TriSurf()
-    # Create a new instance of the decimation class
-    deci = vtkQuadricDecimation()
-    deci.SetInputData(self.geol_coll.get_uid_vtk_obj(input_uids[0]))
     # Target Reduction value. Specify the desired reduction in the total number of polygons (e.g., when
     # Target Reduction is set to 0.9, this filter will try to reduce the data set to 10% of its original size).
     tar_reduct = input_one_value_dialog(
@@ -1400,17 +1506,28 @@ def decimation_quadric_resampling(self):
         default_value=0.5,
     )
     if tar_reduct is None:
-        tar_reduct = "0.5"
-    deci.SetTargetReduction(tar_reduct)
-    deci.Update()
-    # ShallowCopy is the way to copy the new interpolated surface into the TriSurf instance created at the beginning
-    surf_dict["vtk_obj"].ShallowCopy(deci.GetOutput())
-    surf_dict["vtk_obj"].Modified()
-    # Add new entity from surf_dict. Function add_entity_from_dict creates a new uid
-    if surf_dict["vtk_obj"].points_number > 0:
-        self.geol_coll.add_entity_from_dict(surf_dict)
-    else:
-        self.print_terminal(" -- empty object -- ")
+        tar_reduct = 0.5
+    # The same parameters are applied to all selected surfaces, processed in parallel.
+    run_surface_batch(
+        self,
+        pipeline=partial(_decimation_quadric_pipeline, tar_reduct=tar_reduct),
+        input_uids=input_uids,
+        name_suffix="_decimated",
+    )
+
+
+def _subdivision_pipeline(mesh=None, type="linear", n_subd=2):
+    """Subdivision pipeline used by subdivision_resampling."""
+    if type == "linear":
+        subdiv_filter = vtkLinearSubdivisionFilter()
+    elif type == "butterfly":
+        subdiv_filter = vtkButterflySubdivisionFilter()
+    elif type == "loop":
+        subdiv_filter = vtkLoopSubdivisionFilter()
+    subdiv_filter.SetInputData(mesh)
+    subdiv_filter.SetNumberOfSubdivisions(int(n_subd))
+    subdiv_filter.Update()
+    return subdiv_filter.GetOutput()
 
 
 @freeze_gui_onoff
@@ -1435,43 +1552,113 @@ def subdivision_resampling(self, mode=0, type="linear", n_subd=2):
         # deseselcted while the dataframe is being built
         input_uids = deepcopy(self.selected_uids)
     for uid in input_uids:
-        if isinstance(self.geol_coll.get_uid_vtk_obj(uid), TriSurf):
-            if type == "linear":
-                subdiv_filter = vtkLinearSubdivisionFilter()
-            elif type == "butterfly":
-                subdiv_filter = vtkButterflySubdivisionFilter()
-            elif type == "loop":
-                subdiv_filter = vtkLoopSubdivisionFilter()
-            # Create a new instance of the decimation class
-
-            subdiv_filter.SetInputData(self.geol_coll.get_uid_vtk_obj(uid))
-            subdiv_filter.SetNumberOfSubdivisions(int(n_subd))
-            subdiv_filter.Update()
-            # ShallowCopy is the way to copy the new interpolated surface into the
-            #    TriSurf instance created at the beginning
-
-            if mode:
-                return subdiv_filter.GetOutput()
-            else:
-                # Add new entity from surf_dict. Function add_entity_from_dict creates a new uid
-                # Create deepcopy of the geological entity dictionary.
-                surf_dict = deepcopy(self.geol_coll.entity_dict)
-                surf_dict["name"] = self.geol_coll.get_uid_name(uid) + "_subdivided"
-                surf_dict["feature"] = self.geol_coll.get_uid_feature(uid)
-                surf_dict["scenario"] = self.geol_coll.get_uid_scenario(uid)
-                surf_dict["role"] = self.geol_coll.get_uid_role(uid)
-                surf_dict["topology"] = "TriSurf"
-                surf_dict["vtk_obj"] = TriSurf()
-                surf_dict["vtk_obj"].ShallowCopy(subdiv_filter.GetOutput())
-                surf_dict["vtk_obj"].Modified()
-
-                if surf_dict["vtk_obj"].points_number > 0:
-                    self.geol_coll.add_entity_from_dict(surf_dict)
-                else:
-                    self.print_terminal(" -- empty object -- ")
-        else:
+        if not isinstance(self.geol_coll.get_uid_vtk_obj(uid), TriSurf):
             self.print_terminal(" -- Error input type: only TriSurf type -- ")
             return
+    pipeline = partial(_subdivision_pipeline, type=type, n_subd=n_subd)
+    if mode:
+        # Preview of the first entity only.
+        return pipeline(self.geol_coll.get_uid_vtk_obj(input_uids[0]))
+    run_surface_batch(
+        self, pipeline=pipeline, input_uids=input_uids, name_suffix="_subdivided"
+    )
+
+
+def _intersection_dict(self, uid=None, xsect_uid=None, part=None, is_surface=None):
+    """Entity dictionary for a part of the intersection of a geological entity with a cross-section, with the
+    metadata and properties of the source entity."""
+    obj_dict = deepcopy(self.geol_coll.entity_dict)
+    obj_dict["parent_uid"] = xsect_uid
+    if is_surface:
+        obj_dict["topology"] = "XsPolyLine"
+        obj_dict["vtk_obj"] = XsPolyLine(x_section_uid=xsect_uid, parent=self)
+    else:
+        obj_dict["topology"] = "XsVertexSet"
+        obj_dict["vtk_obj"] = XsVertexSet(x_section_uid=xsect_uid, parent=self)
+    obj_dict["name"] = (
+        f"{self.geol_coll.get_uid_name(uid)}_int_{self.xsect_coll.get_uid_name(xsect_uid)}"
+    )
+    obj_dict["role"] = self.geol_coll.get_uid_role(uid)
+    obj_dict["feature"] = self.geol_coll.get_uid_feature(uid)
+    obj_dict["scenario"] = self.geol_coll.get_uid_scenario(uid)
+    obj_dict["properties_names"] = self.geol_coll.get_uid_properties_names(uid)
+    obj_dict["properties_components"] = self.geol_coll.get_uid_properties_components(
+        uid
+    )
+    obj_dict["vtk_obj"].ShallowCopy(part)
+    for data_key in obj_dict["vtk_obj"].point_data_keys:
+        if not data_key in obj_dict["properties_names"]:
+            obj_dict["vtk_obj"].remove_point_data(data_key)
+    return obj_dict
+
+
+def intersection_xs_geology(self, input_uids=None, xsect_uids=None):
+    """Intersect geological surfaces (giving XsPolyLine) and polylines (giving XsVertexSet) with cross-sections.
+    Parallel cross-sections are cut in a single pass for each entity, pairs whose bounding box does not reach the
+    cross-section are skipped, entities are processed in parallel, and all new entities are added in a single
+    batch. See helpers/section_intersection.py."""
+    groups = plane_groups(
+        [
+            (xsect_uid, self.xsect_coll.get_uid_vtk_plane(xsect_uid))
+            for xsect_uid in xsect_uids
+        ]
+    )
+    inputs = []
+    is_surface = {}
+    for uid in input_uids:
+        topology = self.geol_coll.get_uid_topology(uid)
+        if topology == "TriSurf":
+            is_surface[uid] = True
+        elif topology in ["PolyLine", "XsPolyLine"]:
+            is_surface[uid] = False
+        else:
+            continue
+        vtk_obj = self.geol_coll.get_uid_vtk_obj(uid)
+        if vtk_obj.GetNumberOfPoints() == 0:
+            continue
+        culled = cull_groups(bounds=vtk_obj.GetBounds(), groups=groups)
+        if not is_surface[uid]:
+            # No intersection of polylines with their own cross-section.
+            own_xsect_uid = self.geol_coll.get_uid_x_section(uid)
+            for group in culled:
+                keep = [key != own_xsect_uid for key in group["keys"]]
+                group["offsets"] = group["offsets"][keep]
+                group["keys"] = [key for key, k in zip(group["keys"], keep) if k]
+            culled = [group for group in culled if group["keys"]]
+        if culled:
+            # Shallow copy shared with the entity, so that each thread works on its own vtk object.
+            private_copy = vtkPolyData()
+            private_copy.ShallowCopy(vtk_obj)
+            inputs.append((uid, (private_copy, culled)))
+    self.print_terminal(
+        f"-> {len(inputs)} entities reach the cross-sections, processed on {batch_workers(len(inputs))} threads"
+    )
+    if not inputs:
+        return []
+    tic(parent=self)
+    results = run_batch(pipeline=intersection_pipeline, inputs=inputs)
+    # Results are collected here, on the GUI thread, by cross-section as in the cross-section list.
+    parts_by_xsect = {xsect_uid: [] for xsect_uid in xsect_uids}
+    for result in results:
+        uid = result["key"]
+        if result["error"] is not None:
+            self.print_terminal(
+                f"-> {self.geol_coll.get_uid_name(uid)}: ERROR {result['error']}"
+            )
+            continue
+        for xsect_uid, parts in result["output"]:
+            parts_by_xsect[xsect_uid].extend((uid, part) for part in parts)
+    new_dicts = [
+        _intersection_dict(
+            self, uid=uid, xsect_uid=xsect_uid, part=part, is_surface=is_surface[uid]
+        )
+        for xsect_uid in xsect_uids
+        for uid, part in parts_by_xsect[xsect_uid]
+    ]
+    new_uids = self.geol_coll.add_entities_from_dicts(entity_dicts=new_dicts)
+    toc(parent=self)
+    self.print_terminal(f"-> {len(new_uids)} intersections added")
+    return new_uids
 
 
 @freeze_gui_onoff
@@ -1499,161 +1686,16 @@ def intersection_xs(self):
     )
     if xsect_names is None:
         return
-    # xsect_uids = []
-    for sec_name in xsect_names:  # this is redundant
-        xsect_uid = self.xsect_coll.df.loc[
-            self.xsect_coll.df["name"] == sec_name, "uid"
-        ].values[0]
+    xsect_uids = [
+        self.xsect_coll.df.loc[self.xsect_coll.df["name"] == sec_name, "uid"].values[0]
+        for sec_name in xsect_names
+    ]
+    if self.shown_table == "tabGeology":
+        intersection_xs_geology(self, input_uids=input_uids, xsect_uids=xsect_uids)
+        return
+    for sec_name, xsect_uid in zip(xsect_names, xsect_uids):
         postfix = f"_int_{sec_name}"
-        if self.shown_table == "tabGeology":
-            for uid in input_uids:
-                if self.geol_coll.get_uid_topology(uid) in [
-                    "PolyLine",
-                    "XsPolyLine",
-                ]:
-                    # Intersection for PolyLine and XsPolyLine.
-                    if self.geol_coll.get_uid_x_section(uid) != xsect_uid:
-                        # cutter
-                        cutter = vtkCutter()
-                        cutter.SetCutFunction(
-                            self.xsect_coll.get_uid_vtk_plane(xsect_uid)
-                        )
-                        cutter.SetInputData(self.geol_coll.get_uid_vtk_obj(uid))
-                        cutter.Update()
-                        if cutter.GetOutput().GetNumberOfPoints() > 0:
-                            # Create new dict for the new XsVertexSet
-
-                            obj_dict = deepcopy(self.geol_coll.entity_dict)
-                            obj_dict["parent_uid"] = xsect_uid
-                            obj_dict["topology"] = "XsVertexSet"
-                            obj_dict["vtk_obj"] = XsVertexSet(
-                                x_section_uid=xsect_uid, parent=self
-                            )
-                            obj_dict["name"] = (
-                                f"{self.geol_coll.get_uid_name(uid)}{postfix}"
-                            )
-                            obj_dict["role"] = self.geol_coll.get_uid_role(uid)
-                            obj_dict["feature"] = self.geol_coll.get_uid_feature(uid)
-                            obj_dict["scenario"] = self.geol_coll.get_uid_scenario(uid)
-                            obj_dict["properties_names"] = (
-                                self.geol_coll.get_uid_properties_names(uid)
-                            )
-                            obj_dict["properties_components"] = (
-                                self.geol_coll.get_uid_properties_components(uid)
-                            )
-                            obj_dict["vtk_obj"].DeepCopy(cutter.GetOutput())
-                            for data_key in obj_dict["vtk_obj"].point_data_keys:
-                                if not data_key in obj_dict["properties_names"]:
-                                    obj_dict["vtk_obj"].remove_point_data(data_key)
-                            self.geol_coll.add_entity_from_dict(obj_dict)
-                        else:
-                            self.print_terminal(" -- empty object from cutter -- ")
-                    else:
-                        self.print_terminal(
-                            " -- no intersection of XsPolyLine with its own XSection -- "
-                        )
-                elif self.geol_coll.get_uid_topology(uid) == "TriSurf":
-                    # cutter
-                    cutter = vtkCutter()
-                    cutter.SetCutFunction(self.xsect_coll.get_uid_vtk_plane(xsect_uid))
-                    cutter.SetInputData(self.geol_coll.get_uid_vtk_obj(uid))
-                    cutter.Update()
-                    # cutter_clean
-                    cutter_clean = vtkCleanPolyData()
-                    cutter_clean.ConvertLinesToPointsOff()
-                    cutter_clean.ConvertPolysToLinesOff()
-                    cutter_clean.ConvertStripsToPolysOff()
-                    cutter_clean.SetTolerance(0.0)
-                    cutter_clean.SetInputConnection(cutter.GetOutputPort())
-                    cutter_clean.Update()
-                    # cutter_clean_strips
-                    cutter_clean_strips = vtkStripper()
-                    cutter_clean_strips.JoinContiguousSegmentsOn()
-                    cutter_clean_strips.SetInputConnection(cutter_clean.GetOutputPort())
-                    cutter_clean_strips.Update()
-                    # cutter_clean_strips_clean, needed to sort the nodes and cells in the right order
-                    cutter_clean_strips_clean = vtkCleanPolyData()
-                    cutter_clean_strips_clean.ConvertLinesToPointsOff()
-                    cutter_clean_strips_clean.ConvertPolysToLinesOff()
-                    cutter_clean_strips_clean.ConvertStripsToPolysOff()
-                    cutter_clean_strips_clean.SetTolerance(0.0)
-                    cutter_clean_strips_clean.SetInputConnection(
-                        cutter_clean_strips.GetOutputPort()
-                    )
-                    cutter_clean_strips_clean.Update()
-                    # cutter_clean_strips_clean_triangle, used to convert polyline cells back to lines
-                    cutter_clean_strips_clean_triangle = vtkTriangleFilter()
-                    cutter_clean_strips_clean_triangle.SetInputConnection(
-                        cutter_clean_strips_clean.GetOutputPort()
-                    )
-                    cutter_clean_strips_clean_triangle.Update()
-                    # connectivity, split multiple part polylines, first using .SetExtractionModeToAllRegions()
-                    # to get the number of parts/regions, then switching to .SetExtractionModeToSpecifiedRegions()
-                    # to extract the parts/regions sequentially
-                    if (
-                        cutter_clean_strips_clean_triangle.GetOutput().GetNumberOfPoints()
-                        > 0
-                    ):
-                        connectivity = vtkPolyDataConnectivityFilter()
-                        connectivity.SetInputConnection(
-                            cutter_clean_strips_clean_triangle.GetOutputPort()
-                        )
-                        connectivity.SetExtractionModeToAllRegions()
-                        connectivity.Update()
-                        n_regions = connectivity.GetNumberOfExtractedRegions()
-                        connectivity.SetExtractionModeToSpecifiedRegions()
-                        connectivity.Update()
-                        for region in range(n_regions):
-                            connectivity.InitializeSpecifiedRegionList()
-                            connectivity.AddSpecifiedRegion(region)
-                            connectivity.Update()
-                            # connectivity_clean, used to remove orphan points left behind by connectivity
-                            connectivity_clean = vtkCleanPolyData()
-                            connectivity_clean.SetInputConnection(
-                                connectivity.GetOutputPort()
-                            )
-                            connectivity_clean.Update()
-                            # Check if polyline really exists then create entity
-                            if connectivity_clean.GetOutput().GetNumberOfPoints() > 0:
-                                # Create new dict for the new XsPolyLine
-                                obj_dict = deepcopy(self.geol_coll.entity_dict)
-                                obj_dict["parent_uid"] = xsect_uid
-                                obj_dict["topology"] = "XsPolyLine"
-                                obj_dict["vtk_obj"] = XsPolyLine(
-                                    x_section_uid=xsect_uid, parent=self
-                                )
-                                obj_dict["name"] = (
-                                    f"{self.geol_coll.get_uid_name(uid)}{postfix}"
-                                )
-                                obj_dict["role"] = self.geol_coll.get_uid_role(uid)
-                                obj_dict["feature"] = self.geol_coll.get_uid_feature(
-                                    uid
-                                )
-                                obj_dict["scenario"] = self.geol_coll.get_uid_scenario(
-                                    uid
-                                )
-                                obj_dict["properties_names"] = (
-                                    self.geol_coll.get_uid_properties_names(uid)
-                                )
-                                obj_dict["properties_components"] = (
-                                    self.geol_coll.get_uid_properties_components(uid)
-                                )
-                                obj_dict["vtk_obj"].DeepCopy(
-                                    connectivity_clean.GetOutput()
-                                )
-                                for data_key in obj_dict["vtk_obj"].point_data_keys:
-                                    if not data_key in obj_dict["properties_names"]:
-                                        obj_dict["vtk_obj"].remove_point_data(data_key)
-                                self.geol_coll.add_entity_from_dict(obj_dict)
-                            else:
-                                self.print_terminal(
-                                    " -- empty object from connectivity_clean-- "
-                                )
-                    else:
-                        self.print_terminal(
-                            " -- empty object from cutter_clean_strips_clean_triangle -- "
-                        )
-        elif self.shown_table == "tabMeshes":
+        if self.shown_table == "tabMeshes":
             for uid in input_uids:
                 if self.mesh3d_coll.get_uid_mesh3d_type(uid) == "Voxet":
                     # Get cutter - a polydata slice cut across the voxet.
@@ -1848,6 +1890,81 @@ def intersection_xs(self):
             )
 
 
+def project_2_dem_entities(
+    self, input_uids: list = None, dom_uid: str = None, replace: bool = True
+) -> list:
+    """Project PolyLine, Attitude and VertexSet geological entities vertically onto a DEM, all together with
+    project_to_dem(). With replace the projected geometry replaces the entities, otherwise projected copies are
+    added. Both are done in a single batch. The elevation below each point is also stored as the "elevation"
+    property, as with vtkPointInterpolator2D. Returns the uids of projected entities."""
+    source_uids = []
+    projected_objs = []
+    for uid in input_uids:
+        vtk_obj = self.geol_coll.get_uid_vtk_obj(uid)
+        # Attitude is tested before VertexSet, that is its parent class.
+        if isinstance(vtk_obj, PolyLine):
+            projected_obj = PolyLine()
+        elif isinstance(vtk_obj, Attitude):
+            projected_obj = Attitude()
+        elif isinstance(vtk_obj, VertexSet):
+            projected_obj = VertexSet()
+        else:
+            self.print_terminal(f" -- Unknown object type for uid {uid} -- ")
+            continue
+        if vtk_obj.points_number == 0:
+            self.print_terminal(" -- empty object -- ")
+            continue
+        projected_obj.DeepCopy(vtk_obj)
+        source_uids.append(uid)
+        projected_objs.append(projected_obj)
+    if not source_uids:
+        return []
+    tic(parent=self)
+    elevations = project_to_dem(
+        dem=self.dom_coll.get_uid_vtk_obj(dom_uid),
+        points_list=[projected_obj.points for projected_obj in projected_objs],
+    )
+    for projected_obj, elevation in zip(projected_objs, elevations):
+        # Recreate the points array to ensure VTK recognizes the change.
+        new_points = projected_obj.points.copy()
+        new_points[:, 2] = elevation
+        projected_obj.points = new_points
+        projected_obj.set_point_data(data_key="elevation", attribute_matrix=elevation)
+        projected_obj.Modified()
+    new_names = [f"{self.geol_coll.get_uid_name(uid)}_proj_DEM" for uid in source_uids]
+    if replace:
+        # Note: replace_vtks already emits the geom_modified signal
+        out_uids = self.geol_coll.replace_vtks(
+            uids=source_uids, vtk_objects=projected_objs
+        )
+        for uid, name in zip(source_uids, new_names):
+            if uid in out_uids:
+                self.geol_coll.set_uid_name(uid=uid, name=name)
+        if out_uids:
+            self.signals.metadata_modified.emit(out_uids, self.geol_coll)
+    else:
+        obj_dicts = []
+        for uid, name, projected_obj in zip(source_uids, new_names, projected_objs):
+            obj_dict = deepcopy(self.geol_coll.entity_dict)
+            obj_dict["uid"] = None  # Will generate new uid
+            obj_dict["name"] = name
+            obj_dict["feature"] = self.geol_coll.get_uid_feature(uid)
+            obj_dict["scenario"] = self.geol_coll.get_uid_scenario(uid)
+            obj_dict["role"] = self.geol_coll.get_uid_role(uid)
+            obj_dict["topology"] = self.geol_coll.get_uid_topology(uid)
+            obj_dict["properties_names"] = projected_obj.point_data_keys
+            obj_dict["properties_components"] = [
+                projected_obj.get_point_data_shape(key)[1]
+                for key in projected_obj.point_data_keys
+            ]
+            obj_dict["vtk_obj"] = projected_obj
+            obj_dicts.append(obj_dict)
+        out_uids = self.geol_coll.add_entities_from_dicts(entity_dicts=obj_dicts)
+    toc(parent=self)
+    self.print_terminal(f"-> {len(out_uids)} entities projected to DEM")
+    return out_uids
+
+
 @freeze_gui_onoff
 def project_2_dem(self):
     """vtkProjectedTerrainPath projects an input polyline onto a terrain image.
@@ -1912,113 +2029,12 @@ def project_2_dem(self):
     #         return
     #     img_uid = self.image_coll.df.loc[self.image_coll.df['name'] == img_name, 'uid'].values[0]
     # ----- some check is needed here. Check if the chosen image is a 2D map with elevation values -----
-    prgs_bar = progress_dialog(
-        max_value=len(input_uids),
-        title_txt="Input dataframe",
-        label_txt="Projecting data to DEM...",
-        cancel_txt=None,
-        parent=self,
+    project_2_dem_entities(
+        self,
+        input_uids=input_uids,
+        dom_uid=dom_uid,
+        replace=replace_on_off == 0,
     )
-    # Track UIDs to update at the end
-    updated_uids = []
-
-    for uid in input_uids:
-        # Determine which entity to project
-        if replace_on_off == 1:  # No - first create a copy, then project only the copy
-            # Create a copy of the original entity (not projected)
-            obj_dict = deepcopy(self.geol_coll.entity_dict)
-            obj_dict["uid"] = None  # Will generate new uid
-            obj_dict["name"] = f"{self.geol_coll.get_uid_name(uid)}_proj_DEM"
-            obj_dict["feature"] = self.geol_coll.get_uid_feature(uid)
-            obj_dict["scenario"] = self.geol_coll.get_uid_scenario(uid)
-            obj_dict["role"] = self.geol_coll.get_uid_role(uid)
-            obj_dict["topology"] = self.geol_coll.get_uid_topology(uid)
-            obj_dict["properties_names"] = self.geol_coll.get_uid_properties_names(uid)
-            obj_dict["properties_components"] = (
-                self.geol_coll.get_uid_properties_components(uid)
-            )
-
-            # Create VTK object and copy geometry from original
-            if isinstance(self.geol_coll.get_uid_vtk_obj(uid), PolyLine):
-                obj_dict["vtk_obj"] = PolyLine()
-            elif isinstance(self.geol_coll.get_uid_vtk_obj(uid), Attitude):
-                obj_dict["vtk_obj"] = Attitude()
-            elif isinstance(self.geol_coll.get_uid_vtk_obj(uid), VertexSet):
-                obj_dict["vtk_obj"] = VertexSet()
-
-            obj_dict["vtk_obj"].DeepCopy(self.geol_coll.get_uid_vtk_obj(uid))
-
-            # Add the copy to collection
-            if obj_dict["vtk_obj"].points_number > 0:
-                new_uid = self.geol_coll.add_entity_from_dict(obj_dict)
-                uid_to_project = new_uid
-            else:
-                self.print_terminal(" -- empty object -- ")
-                prgs_bar.add_one()
-                continue
-        else:  # Yes - project original entity directly
-            uid_to_project = uid
-
-        # Now project the target entity (either original or the new copy)
-        projection = vtkPointInterpolator2D()
-        projection.SetInputData(self.geol_coll.get_uid_vtk_obj(uid_to_project))
-        projection.SetSourceData(self.dom_coll.get_uid_vtk_obj(dom_uid))
-        projection.SetKernel(vtkVoronoiKernel())
-        projection.SetNullPointsStrategyToClosestPoint()
-        projection.SetZArrayName("elevation")
-        projection.Update()
-
-        # Create temporary object to hold projected geometry
-        projected_obj = None
-        if isinstance(self.geol_coll.get_uid_vtk_obj(uid_to_project), PolyLine):
-            projected_obj = PolyLine()
-        elif isinstance(self.geol_coll.get_uid_vtk_obj(uid_to_project), Attitude):
-            projected_obj = Attitude()
-        elif isinstance(self.geol_coll.get_uid_vtk_obj(uid_to_project), VertexSet):
-            projected_obj = VertexSet()
-
-        if projected_obj is None:
-            self.print_terminal(f" -- Unknown object type for uid {uid_to_project} -- ")
-            prgs_bar.add_one()
-            continue
-
-        # Apply projection - use DeepCopy to ensure complete copy of geometry
-        projected_obj.DeepCopy(projection.GetOutput())
-        # Update Z coordinates with elevation data - recreate points array to ensure VTK recognizes the change
-        elevation = projected_obj.get_point_data("elevation")
-        new_points = projected_obj.points.copy()
-        new_points[:, 2] = elevation
-        projected_obj.points = new_points
-        # Force update of internal VTK structures
-        projected_obj.Modified()
-
-        if projected_obj.points_number == 0:
-            self.print_terminal(" -- empty object after projection -- ")
-            prgs_bar.add_one()
-            continue
-
-        # Update the entity with projected geometry
-        # Note: replace_vtk already emits geom_modified signal
-        self.geol_coll.replace_vtk(uid=uid_to_project, vtk_object=projected_obj)
-
-        # Update entity name
-        if replace_on_off == 1:  # No - set name for new entity
-            self.geol_coll.set_uid_name(
-                uid=uid_to_project, name=f"{self.geol_coll.get_uid_name(uid)}_proj_DEM"
-            )
-        else:  # Yes - set name for original entity
-            self.geol_coll.set_uid_name(
-                uid=uid_to_project, name=f"{self.geol_coll.get_uid_name(uid)}_proj_DEM"
-            )
-
-        updated_uids.append(uid_to_project)
-        prgs_bar.add_one()
-
-    prgs_bar.close()
-
-    # Emit metadata_modified signal for name changes (geom_modified already emitted by replace_vtk)
-    if updated_uids:
-        self.signals.metadata_modified.emit(updated_uids, self.geol_coll)
 
     # Force render in all views to ensure visual update
     from pzero.views.dock_window import DockWindow
@@ -2262,6 +2278,73 @@ def project_2_xs(self):
                     self.print_terminal(" -- empty object -- ")
 
 
+def _split_surf_pipeline(paper_surf=None, scissor_surf=None):
+    """Split paper_surf with scissor_surf, as used by split_surf. Returns the split surface and the
+    intersection line, both with the RegionId property calculated by connected_calc().
+    """
+    # cutter = vtkIntersectionPolyDataFilter()
+    # cutter.SetInputDataObject(0, paper_surf)
+    # cutter.SetInputDataObject(1, scissor_surf)
+
+    temp_surf = pv_PolyData()
+    temp_surf.ShallowCopy(paper_surf)
+    line_intersection = PolyLine()
+    intersection, intersect, _ = temp_surf.intersection(
+        scissor_surf, split_first=True, split_second=False
+    )
+    line_intersection.ShallowCopy(intersection)
+    implicit_dist = temp_surf.compute_implicit_distance(scissor_surf)
+    implicit_dist.set_active_scalars("implicit_distance")
+    intersect = vtkClipPolyData()
+    intersect.SetInputData(implicit_dist)
+    intersect.GenerateClippedOutputOn()
+
+    intersect.Update()
+
+    appender = vtkAppendPolyData()
+
+    # The parts are always 2 even if the surf is crossed more than once
+    # (the implicit distance is calculated orthogonal to the ref. surface).
+    # For multiple intersections the splitting will result in a multipart
+    # object that can be further split using split_parts(). We can then
+    # append each single part in a multipart object and assign
+    # the RegionId property using connected_calc().
+    parts = [intersect.GetOutput(), intersect.GetClippedOutput()]
+
+    for part in parts:
+        temp = TriSurf()
+        temp.ShallowCopy(part)
+        subparts = temp.split_parts()
+        for subpart in subparts:
+            appender.AddInputData(subpart)
+
+    appender.Update()
+
+    final_obj = TriSurf()
+    final_obj.DeepCopy(appender.GetOutput())
+
+    # Calculate connectivity for the splitted surface and the intersection line
+    final_obj.connected_calc()
+    line_intersection.connected_calc()
+
+    return [
+        {
+            "name_suffix": "_split",
+            "topology": "TriSurf",
+            "vtk_obj": final_obj,
+            "properties_names": ["RegionId"],
+            "properties_components": [1],
+        },
+        {
+            "name_suffix": "_line_int",
+            "topology": "PolyLine",
+            "vtk_obj": line_intersection,
+            "properties_names": ["RegionId"],
+            "properties_components": [1],
+        },
+    ]
+
+
 @freeze_gui_onoff
 def split_surf(self):
     """Split two surfaces. This should be integrated with intersection_xs in one function since is the same thing"""
@@ -2274,117 +2357,52 @@ def split_surf(self):
     else:
         # Deep copy list of selected uids needed otherwise problems can arise if the main geology table
         # is deseselcted while the dataframe is being built
-        # print(self.selected_uids_all())
         # 0. Define the reference surface and target surfaces
         # if input_uids[0] not in self.geol_coll.get_uids():
         #     ref_surf = self.dom_coll.get_uid_vtk_obj(input_uids[0])
         #     pld = pv_PolyData(ref_surf.points)
         #     pld.delaunay_2d(inplace=True)
         # else:
-        scissor_surf = self.geol_coll.get_uid_vtk_obj(self.selected_uids[-1])
-
-        for paper_uid in self.selected_uids[:-1]:  # for every target surface
-            paper_surf = self.geol_coll.get_uid_vtk_obj(paper_uid)
-
-            # cutter = vtkIntersectionPolyDataFilter()
-            # cutter.SetInputDataObject(0, paper_surf)
-            # cutter.SetInputDataObject(1, scissor_surf)
-
-            temp_surf = pv_PolyData()
-            temp_surf.ShallowCopy(paper_surf)
-            line_intersection = PolyLine()
-            intersection, intersect, _ = temp_surf.intersection(
-                scissor_surf, split_first=True, split_second=False
-            )
-            line_intersection.ShallowCopy(intersection)
-            paper_intersection = TriSurf()
-            paper_intersection.ShallowCopy(intersect)
-            # print(temp_surf.array_names)
-            implicit_dist = temp_surf.compute_implicit_distance(scissor_surf)
-            implicit_dist.set_active_scalars("implicit_distance")
-            intersect = vtkClipPolyData()
-            intersect.SetInputData(implicit_dist)
-            intersect.GenerateClippedOutputOn()
-
-            intersect.Update()
-
-            appender = vtkAppendPolyData()
-
-            # The parts are always 2 even if the surf is crossed more than once
-            # (the implicit distance is calculated orthogonal to the ref. surface).
-            # For multiple intersections the splitting will result in a multipart
-            # object that can be further split using split_parts(). We can then
-            # append each single part in a multipart object and assign
-            # the RegionId property using connected_calc().
-            parts = [intersect.GetOutput(), intersect.GetClippedOutput()]
-
-            for part in parts:
-                temp = TriSurf()
-                temp.ShallowCopy(part)
-                subparts = temp.split_parts()
-                for subpart in subparts:
-                    appender.AddInputData(subpart)
-
-            appender.Update()
-
-            final_obj = TriSurf()
-            final_obj.DeepCopy(appender.GetOutput())
-
-            obj_dict = deepcopy(self.geol_coll.entity_dict)
-
-            obj_dict["uid"] = str(uuid4())
-
-            obj_dict["topology"] = self.geol_coll.get_uid_topology(paper_uid)
-
-            obj_dict["vtk_obj"] = final_obj
-
-            obj_dict["name"] = self.geol_coll.get_uid_name(paper_uid) + "_split"
-
-            obj_dict["role"] = self.geol_coll.get_uid_role(paper_uid)
-
-            obj_dict["feature"] = self.geol_coll.get_uid_feature(paper_uid)
-
-            obj_dict["scenario"] = self.geol_coll.get_uid_scenario(paper_uid)
-
-            self.geol_coll.add_entity_from_dict(obj_dict)
-
-            # Calculate connectivity for the splitted surface
-
-            self.geol_coll.append_uid_property(
-                uid=obj_dict["uid"], property_name="RegionId", property_components=1
-            )
-
-            self.geol_coll.get_uid_vtk_obj(obj_dict["uid"]).connected_calc()
-
-            # Add line intersection
-            obj_dict = deepcopy(self.geol_coll.entity_dict)
-
-            obj_dict["uid"] = str(uuid4())
-
-            obj_dict["topology"] = "PolyLine"
+        input_uids = deepcopy(self.selected_uids)
+        scissor_surf = self.geol_coll.get_uid_vtk_obj(input_uids[-1])
 
-            obj_dict["vtk_obj"] = line_intersection
+        # Every target surface is split in parallel, each thread with its own copy of the scissor surface.
+        run_surface_batch(
+            self,
+            pipeline=lambda paper_surf: _split_surf_pipeline(
+                paper_surf=paper_surf, scissor_surf=_private_copy(scissor_surf)
+            ),
+            input_uids=input_uids[:-1],
+        )
 
-            obj_dict["name"] = self.geol_coll.get_uid_name(paper_uid) + "_line_int"
+        self.prop_legend.update_widget(self)
 
-            obj_dict["role"] = self.geol_coll.get_uid_role(paper_uid)
+        # 1. Calculate the implicit distance of the target surface[1,2,3,4,..] from the reference surface[0]
 
-            obj_dict["feature"] = self.geol_coll.get_uid_feature(paper_uid)
 
-            obj_dict["scenario"] = self.geol_coll.get_uid_scenario(paper_uid)
+def _retopo_pipeline(mesh=None, dec_int=0.2, n_iter=40, rel_fac=0.1):
+    """vtkQuadricDecimation -> vtkSmoothPolyDataFilter -> vtkCleanPolyData pipeline used by retopo."""
+    dec = vtkQuadricDecimation()
+    dec.SetInputData(mesh)
+    # tr.SetSourceData(bord)
+    dec.SetTargetReduction(float(dec_int))
+    dec.VolumePreservationOn()
+    dec.Update()
 
-            self.geol_coll.add_entity_from_dict(obj_dict)
-            self.geol_coll.append_uid_property(
-                uid=obj_dict["uid"], property_name="RegionId", property_components=1
-            )
-            self.geol_coll.get_uid_vtk_obj(obj_dict["uid"]).connected_calc()
+    smooth = vtkSmoothPolyDataFilter()
+    smooth.SetInputConnection(dec.GetOutputPort())
 
-            self.prop_legend.update_widget(self)
+    # smooth.SetInputData(surf)
+    smooth.SetNumberOfIterations(int(n_iter))
+    smooth.SetRelaxationFactor(float(rel_fac))
+    smooth.BoundarySmoothingOn()
+    smooth.FeatureEdgeSmoothingOn()
+    smooth.Update()
 
-            del temp_surf
-            del intersection
-
-        # 1. Calculate the implicit distance of the target surface[1,2,3,4,..] from the reference surface[0]
+    clean = vtkCleanPolyData()
+    clean.SetInputConnection(smooth.GetOutputPort())
+    clean.Update()
+    return clean.GetOutput()
 
 
 @freeze_gui_onoff
@@ -2410,47 +2428,15 @@ def retopo(self, mode=0, dec_int=0.2, n_iter=40, rel_fac=0.1):
         input_uids = deepcopy(self.selected_uids)
 
         for uid in input_uids:
-            if isinstance(self.geol_coll.get_uid_vtk_obj(uid), TriSurf):
-                mesh = self.geol_coll.get_uid_vtk_obj(uid)
-                dec = vtkQuadricDecimation()
-                dec.SetInputData(mesh)
-                # tr.SetSourceData(bord)
-                dec.SetTargetReduction(float(dec_int))
-                dec.VolumePreservationOn()
-                dec.Update()
-
-                smooth = vtkSmoothPolyDataFilter()
-                smooth.SetInputConnection(dec.GetOutputPort())
-
-                # smooth.SetInputData(surf)
-                smooth.SetNumberOfIterations(int(n_iter))
-                smooth.SetRelaxationFactor(float(rel_fac))
-                smooth.BoundarySmoothingOn()
-                smooth.FeatureEdgeSmoothingOn()
-                smooth.Update()
-
-                clean = vtkCleanPolyData()
-                clean.SetInputConnection(smooth.GetOutputPort())
-                clean.Update()
-
-                if mode:
-                    return clean.GetOutput()
-                else:
-                    # Create deepcopy of the geological entity dictionary.
-                    surf_dict = deepcopy(self.geol_coll.entity_dict)
-                    surf_dict["name"] = self.geol_coll.get_uid_name(uid) + "_retopo"
-                    surf_dict["feature"] = self.geol_coll.get_uid_feature(uid)
-                    surf_dict["scenario"] = self.geol_coll.get_uid_scenario(uid)
-                    surf_dict["role"] = self.geol_coll.get_uid_role(uid)
-                    surf_dict["topology"] = "TriSurf"
-                    surf_dict["vtk_obj"] = TriSurf()
-                    surf_dict["vtk_obj"].ShallowCopy(clean.GetOutput())
-                    surf_dict["vtk_obj"].Modified()
-
-                    if surf_dict["vtk_obj"].points_number > 0:
-                        self.geol_coll.add_entity_from_dict(surf_dict)
-                    else:
-                        self.print_terminal(" -- empty object -- ")
-            else:
+            if not isinstance(self.geol_coll.get_uid_vtk_obj(uid), TriSurf):
                 self.print_terminal(" -- Error input type: only TriSurf type -- ")
                 return
+        pipeline = partial(
+            _retopo_pipeline, dec_int=dec_int, n_iter=n_iter, rel_fac=rel_fac
+        )
+        if mode:
+            # Preview of the first entity only.
+            return pipeline(self.geol_coll.get_uid_vtk_obj(input_uids[0]))
+        run_surface_batch(
+            self, pipeline=pipeline, input_uids=input_uids, name_suffix="_retopo"
+        )
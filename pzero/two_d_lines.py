@@ -16,6 +16,10 @@ from numpy import round as np_round
 from numpy import shape as np_shape
 from numpy import zeros as np_zeros
 from numpy import concatenate as np_concatenate
+from numpy import cumsum as np_cumsum
+from numpy import clip as np_clip
+from numpy import ones as np_ones
+from numpy import where as np_where
 from numpy.linalg import norm as np_norm
 
 # from shapely import affinity
@@ -35,6 +39,13 @@ from .helpers.helper_dialogs import (
 )
 from .helpers.helper_widgets import Editor, Tracer, Tracer3D
 from .helpers.helper_functions import freeze_gui_onoff, freeze_gui_on, freeze_gui_off
+from .helpers.line_batch import (
+    resample_by_distance,
+    resample_by_number,
+    simplify_lines,
+    unpack_lines,
+)
+from .helpers.line_index import LineIndex
 from .entities_factory import PolyLine, XsPolyLine
 
 from .views.view_map import ViewMap
@@ -294,7 +305,7 @@ def edit_line(self):
         return
     # self.disable_actions()
     sel_uid = self.selected_uids[0]
-    actor = self.plotter.renderer.actors[sel_uid]
+    actor = self.get_actor_by_uid(sel_uid)
     data = actor.mapper.dataset
     # self.tracer.SetInputData(data)
     editor = Editor(self)
@@ -539,6 +550,9 @@ def split_line_line(self):
     inUV_scissors = np_column_stack((inU, inV))
     shp_line_in_scissors = shp_linestring(inUV_scissors)
 
+    # Collect paper lines in 2D coordinates and index them, so that only lines touched by the
+    # scissors (or by the scissors extended as in int_node) are processed.
+    paper_uv = {}
     for current_uid_paper in self.selected_uids[:-1]:
         if (
             self.parent.geol_coll.get_uid_topology(current_uid_paper) != "PolyLine"
@@ -559,7 +573,12 @@ def split_line_line(self):
                 Y=in_vtk_obj.points_Y,
                 Z=in_vtk_obj.points_Z,
             )
-        inUV_paper = np_column_stack((inU, inV))
+        paper_uv[current_uid_paper] = np_column_stack((inU, inV))
+    paper_index = LineIndex(paper_uv)
+    paper_uids = paper_index.candidates(_extend_line(shp_line_in_scissors))
+
+    for current_uid_paper in paper_uids:
+        inUV_paper = paper_uv[current_uid_paper]
 
         # Create deepcopies of the selected entities. Split U- and V-coordinates.
         # inU_paper = deepcopy(self.parent.geol_coll.get_uid_vtk_obj(current_uid_paper).points[:, 0])
@@ -579,12 +598,10 @@ def split_line_line(self):
         if not shp_line_in_paper.crosses(shp_line_in_scissors):
             paper_to_split, splitter = int_node(shp_line_in_paper, shp_line_in_scissors)
         if not paper_to_split.intersects(splitter):
-            self.clear_selection()
-            return
+            continue
         split_lines = shp_split(paper_to_split, splitter)
         if len(split_lines.geoms) < 2:
-            self.clear_selection()
-            return
+            continue
         replace = 1  # replace = 1 for the first line to operate replace_vtk
         uids = [current_uid_scissors]
         for line in split_lines.geoms:
@@ -870,7 +887,10 @@ def merge_lines(self):
     else:
         new_line["vtk_obj"] = PolyLine()
     # Add points to new merged line.
+    # Oriented parts are collected in a list and concatenated once at the end. Only the
+    # first and last point of the merged line are needed to orient the next part.
     points_0 = self.parent.geol_coll.get_uid_vtk_obj(in_uids[0]).points.copy()
+    merged_parts = [points_0]
     for uid in in_uids[1::]:
         points_1 = self.parent.geol_coll.get_uid_vtk_obj(uid).points.copy()
         first2first = points_0[1, :] - points_1[1, :]
@@ -886,10 +906,10 @@ def merge_lines(self):
         )
         # Smaller norm first2first_norm -> join first node of points_0 to first point of points_1 -> need to revert points_0
         if scores.argmin() == 0:
-            points_0 = np_flipud(points_0)
+            merged_parts = [np_flipud(part) for part in merged_parts[::-1]]
         # Smaller norm first2last_norm -> join first node of points_0 to last point of points_1 -> need to revert both
         if scores.argmin() == 1:
-            points_0 = np_flipud(points_0)
+            merged_parts = [np_flipud(part) for part in merged_parts[::-1]]
             points_1 = np_flipud(points_1)
         # Smaller norm last2first_norm -> join last node of points_0 to first point of points_1 -> need to revert none
         if scores.argmin() == 2:
@@ -897,8 +917,11 @@ def merge_lines(self):
         # Smaller norm last2last_norm -> join last node of points_0 to last point of points_1 -> need to revert points_1
         if scores.argmin() == 3:
             points_1 = np_flipud(points_1)
-        points_0 = np_concatenate((points_0, points_1), axis=0)
-    new_line["vtk_obj"].points = points_0
+        merged_parts.append(points_1)
+        points_0 = np_concatenate(
+            (merged_parts[0][:2, :], merged_parts[-1][-1:, :]), axis=0
+        )
+    new_line["vtk_obj"].points = np_concatenate(merged_parts, axis=0)
     # Automatically create all line cells.
     new_line["vtk_obj"].auto_cells()
     # Add merged line first. Remove source lines only if add succeeds.
@@ -951,18 +974,36 @@ def _extract_intersection_points(geometry):
     return []
 
 
+def _unique_points(points, eps=1e-8):
+    """Remove points closer than eps to a previous point, keeping the first one."""
+    if len(points) <= 1:
+        return points
+    points_array = np_array(points, dtype=float).reshape(-1, 2)
+    distances = np_norm(points_array[:, None, :] - points_array[None, :, :], axis=2)
+    keep = np_ones(len(points_array), dtype=bool)
+    for i in range(len(points_array)):
+        if keep[i]:
+            keep[i + 1 :] &= distances[i, i + 1 :] > eps
+    return [points[i] for i in np_where(keep)[0]]
+
+
 def _insert_point_on_line_coords(line_coords, point, eps=1e-8):
-    for vertex in line_coords:
-        if np_norm(vertex - point) <= eps:
-            return line_coords
-    point_geom = shp_point(float(point[0]), float(point[1]))
-    for i in range(len(line_coords) - 1):
-        segment = shp_linestring([line_coords[i], line_coords[i + 1]])
-        if segment.distance(point_geom) <= eps:
-            return np_concatenate(
-                (line_coords[: i + 1], point.reshape(1, 2), line_coords[i + 1 :]),
-                axis=0,
-            )
+    # Distances from the point to all vertexes and segments are calculated at once.
+    if (np_norm(line_coords - point, axis=1) <= eps).any():
+        return line_coords
+    seg_start = line_coords[:-1]
+    seg_vector = line_coords[1:] - seg_start
+    seg_length2 = (seg_vector**2).sum(axis=1)
+    seg_length2[seg_length2 == 0] = 1.0
+    t = np_clip(((point - seg_start) * seg_vector).sum(axis=1) / seg_length2, 0, 1)
+    distances = np_norm(seg_start + t[:, None] * seg_vector - point, axis=1)
+    hits = np_where(distances <= eps)[0]
+    if hits.size > 0:
+        i = hits[0]
+        return np_concatenate(
+            (line_coords[: i + 1], point.reshape(1, 2), line_coords[i + 1 :]),
+            axis=0,
+        )
     return line_coords
 
 
@@ -1108,65 +1149,67 @@ def snap_line(self):
     trimmed_uids = set()
     endpoint_snap_count = 0
 
+    # A single spatial index is shared by both steps. Lines are only shortened in step 1,
+    # so candidate pairs found at the start are a superset of the pairs intersecting later.
+    line_index = LineIndex(line_uv)
+
+    def set_line_uv(uid, line_coords):
+        line_uv[uid] = line_coords
+        line_index.update(uid, line_coords)
+
     # Step 1: detect intersections and trim short terminal branches.
-    for idx_a, uid_a in enumerate(ordered_selected_uids):
-        for uid_b in ordered_selected_uids[idx_a + 1 :]:
-            if len(line_uv[uid_a]) < 2 or len(line_uv[uid_b]) < 2:
-                continue
-            line_a = shp_linestring(line_uv[uid_a])
-            line_b = shp_linestring(line_uv[uid_b])
-            if not line_a.intersects(line_b):
-                continue
+    for uid_a, uid_b in line_index.intersecting_pairs():
+        if len(line_uv[uid_a]) < 2 or len(line_uv[uid_b]) < 2:
+            continue
+        line_a = line_index.geometry(uid_a)
+        line_b = line_index.geometry(uid_b)
+        if not line_a.intersects(line_b):
+            continue
 
-            raw_points = _extract_intersection_points(line_a.intersection(line_b))
-            intersection_points = []
-            for point in raw_points:
-                if any(np_norm(point - saved) <= eps for saved in intersection_points):
-                    continue
-                intersection_points.append(point)
+        intersection_points = _unique_points(
+            _extract_intersection_points(line_a.intersection(line_b)), eps=eps
+        )
 
-            for point in intersection_points:
-                before_a = line_uv[uid_a]
-                before_b = line_uv[uid_b]
-                nearest_dist_a = min(
-                    np_norm(point - before_a[0]), np_norm(point - before_a[-1])
-                )
-                nearest_dist_b = min(
-                    np_norm(point - before_b[0]), np_norm(point - before_b[-1])
-                )
-                if (nearest_dist_a > max_dist + eps) and (
-                    nearest_dist_b > max_dist + eps
-                ):
-                    continue
+        for point in intersection_points:
+            before_a = line_uv[uid_a]
+            before_b = line_uv[uid_b]
+            nearest_dist_a = min(
+                np_norm(point - before_a[0]), np_norm(point - before_a[-1])
+            )
+            nearest_dist_b = min(
+                np_norm(point - before_b[0]), np_norm(point - before_b[-1])
+            )
+            if (nearest_dist_a > max_dist + eps) and (nearest_dist_b > max_dist + eps):
+                continue
 
-                out_a = _insert_point_on_line_coords(before_a, point, eps=eps)
-                out_a = _dedupe_consecutive_coords(out_a, eps=eps)
-                out_b = _insert_point_on_line_coords(before_b, point, eps=eps)
-                out_b = _dedupe_consecutive_coords(out_b, eps=eps)
-                if _coords_changed(before_a, out_a, eps=eps):
+            out_a = _insert_point_on_line_coords(before_a, point, eps=eps)
+            out_a = _dedupe_consecutive_coords(out_a, eps=eps)
+            out_b = _insert_point_on_line_coords(before_b, point, eps=eps)
+            out_b = _dedupe_consecutive_coords(out_b, eps=eps)
+            if _coords_changed(before_a, out_a, eps=eps):
+                changed_uids.add(uid_a)
+            if _coords_changed(before_b, out_b, eps=eps):
+                changed_uids.add(uid_b)
+            set_line_uv(uid_a, out_a)
+            set_line_uv(uid_b, out_b)
+
+            if nearest_dist_a <= max_dist + eps:
+                trimmed_a, did_trim_a = _trim_terminal_branch(
+                    line_uv[uid_a], point, max_dist, eps=eps
+                )
+                set_line_uv(uid_a, trimmed_a)
+                if did_trim_a:
                     changed_uids.add(uid_a)
-                if _coords_changed(before_b, out_b, eps=eps):
-                    changed_uids.add(uid_b)
-                line_uv[uid_a] = out_a
-                line_uv[uid_b] = out_b
+                    trimmed_uids.add(uid_a)
 
-                if nearest_dist_a <= max_dist + eps:
-                    trimmed_a, did_trim_a = _trim_terminal_branch(
-                        line_uv[uid_a], point, max_dist, eps=eps
-                    )
-                    line_uv[uid_a] = trimmed_a
-                    if did_trim_a:
-                        changed_uids.add(uid_a)
-                        trimmed_uids.add(uid_a)
-
-                if nearest_dist_b <= max_dist + eps:
-                    trimmed_b, did_trim_b = _trim_terminal_branch(
-                        line_uv[uid_b], point, max_dist, eps=eps
-                    )
-                    line_uv[uid_b] = trimmed_b
-                    if did_trim_b:
-                        changed_uids.add(uid_b)
-                        trimmed_uids.add(uid_b)
+            if nearest_dist_b <= max_dist + eps:
+                trimmed_b, did_trim_b = _trim_terminal_branch(
+                    line_uv[uid_b], point, max_dist, eps=eps
+                )
+                set_line_uv(uid_b, trimmed_b)
+                if did_trim_b:
+                    changed_uids.add(uid_b)
+                    trimmed_uids.add(uid_b)
 
     # Step 2: extend every endpoint to the closest reachable line and add node on target.
     for uid in ordered_selected_uids:
@@ -1183,13 +1226,12 @@ def snap_line(self):
             zero_target_uid = None
             zero_hit_point = None
 
-            for other_uid in ordered_selected_uids:
-                if other_uid == uid or len(line_uv[other_uid]) < 2:
+            for other_uid, ray_intersection in line_index.intersections(
+                ray, exclude=uid
+            ):
+                if len(line_uv[other_uid]) < 2:
                     continue
-                other_line = shp_linestring(line_uv[other_uid])
-                intersections = _extract_intersection_points(
-                    ray.intersection(other_line)
-                )
+                intersections = _extract_intersection_points(ray_intersection)
                 for candidate in intersections:
                     vec = candidate - anchor
                     proj = float(vec[0] * direction[0] + vec[1] * direction[1])
@@ -1223,7 +1265,7 @@ def snap_line(self):
                     active_after = np_concatenate(
                         (active_before, hit_point.reshape(1, 2)), axis=0
                     )
-                    line_uv[uid] = _dedupe_consecutive_coords(active_after, eps=eps)
+                    set_line_uv(uid, _dedupe_consecutive_coords(active_after, eps=eps))
                     changed_uids.add(uid)
                     endpoint_snap_count += 1
             else:
@@ -1231,7 +1273,7 @@ def snap_line(self):
                     active_after = np_concatenate(
                         (hit_point.reshape(1, 2), active_before), axis=0
                     )
-                    line_uv[uid] = _dedupe_consecutive_coords(active_after, eps=eps)
+                    set_line_uv(uid, _dedupe_consecutive_coords(active_after, eps=eps))
                     changed_uids.add(uid)
                     endpoint_snap_count += 1
 
@@ -1241,7 +1283,7 @@ def snap_line(self):
             )
             target_after = _dedupe_consecutive_coords(target_after, eps=eps)
             if _coords_changed(target_before, target_after, eps=eps):
-                line_uv[target_uid] = target_after
+                set_line_uv(target_uid, target_after)
                 changed_uids.add(target_uid)
 
     if not changed_uids:
@@ -1284,9 +1326,76 @@ def snap_line(self):
     self.clear_selection()
 
 
+def _selected_lines_uv(self):
+    """Collect the selected lines in 2D view coordinates (map XY or cross-section UV), packed in a flat
+    array with offsets for the batch line tools. Cross-section lines are projected with a single
+    world2plane call. Entities that are not lines are skipped. Returns uids, flat_uv and offsets.
+    """
+    uids = []
+    lines_xyz = []
+    for current_uid in self.selected_uids:
+        if (self.parent.geol_coll.get_uid_topology(current_uid) != "PolyLine") and (
+            self.parent.geol_coll.get_uid_topology(current_uid) != "XsPolyLine"
+        ):
+            self.print_terminal(f" -- Selected data is not a line: {current_uid} -- ")
+            continue
+        vtk_obj = self.parent.geol_coll.get_uid_vtk_obj(current_uid)
+        if vtk_obj is None or vtk_obj.points_number <= 0:
+            self.print_terminal(f" --  Object not valid for {current_uid} -- ")
+            continue
+        uids.append(current_uid)
+        lines_xyz.append(np_array(vtk_obj.points))
+    if not uids:
+        return uids, np_zeros((0, 2)), np_zeros(1, dtype=int)
+    flat_xyz = np_concatenate(lines_xyz, axis=0)
+    if isinstance(self, ViewXsection):
+        flat_u, flat_v = self.parent.xsect_coll.world2plane(
+            section_uid=self.this_x_section_uid,
+            X=flat_xyz[:, 0],
+            Y=flat_xyz[:, 1],
+            Z=flat_xyz[:, 2],
+        )
+        flat_xyz = np_column_stack((flat_u, flat_v))
+    offsets = np_concatenate(([0], np_cumsum([len(xyz) for xyz in lines_xyz])))
+    return uids, np_column_stack((flat_xyz[:, 0], flat_xyz[:, 1])), offsets
+
+
+def _replace_lines_uv(self, uids, flat_uv, offsets):
+    """Replace the VTK objects of the lines in uids with packed 2D coordinates, as returned by the batch line
+    tools. Cross-section lines are projected back with a single plane2world call, and all lines are replaced
+    in the collection as a single batch, with one redraw. Returns the list of replaced uids.
+    """
+    if isinstance(self, ViewMap):
+        flat_xyz = np_column_stack((flat_uv, np_zeros(len(flat_uv))))
+    else:
+        out_x, out_y, out_z = self.parent.xsect_coll.plane2world(
+            self.this_x_section_uid, flat_uv[:, 0], flat_uv[:, 1]
+        )
+        flat_xyz = np_column_stack((out_x, out_y, out_z))
+    replace_uids = []
+    vtk_objects = []
+    for current_uid, out_xyz in zip(uids, unpack_lines(flat_xyz, offsets)):
+        if len(out_xyz) == 0:
+            self.print_terminal(f" -- Empty geometry {current_uid} -- ")
+            continue
+        if isinstance(self, ViewMap):
+            out_vtk = PolyLine()
+        else:
+            out_vtk = XsPolyLine(self.this_x_section_uid, parent=self.parent)
+        out_vtk.points = out_xyz
+        out_vtk.auto_cells()
+        replace_uids.append(current_uid)
+        vtk_objects.append(out_vtk)
+    return self.parent.geol_coll.replace_vtks(
+        uids=replace_uids, vtk_objects=vtk_objects
+    )
+
+
 @freeze_gui_onoff
 def resample_lines_distance(self):
-    """Resample selected line with constant specified spacing."""
+    """Resample selected lines with constant specified spacing.
+    All lines are resampled together with the batch functions in helpers/line_batch.py.
+    """
     # Check if at least a line is selected.
     if not self.selected_uids:
         self.print_terminal(" -- No input data selected -- ")
@@ -1310,87 +1419,31 @@ def resample_lines_distance(self):
     ):
         self.print_terminal(" -- Distance is None -- ")
         return
-    # distance_delta = int(distance_delta)
-    for current_uid in self.selected_uids:
-        if (self.parent.geol_coll.get_uid_topology(current_uid) != "PolyLine") and (
-            self.parent.geol_coll.get_uid_topology(current_uid) != "XsPolyLine"
-        ):
-            self.print_terminal(" -- Selected data is not a line -- ")
-            return
-        # Create empty dictionary for the output line.
-        new_line = deepcopy(self.parent.geol_coll.entity_dict)
-        # Define topology and parent_uid. Get coordinates of input line.
-        if isinstance(self, ViewMap):
-            new_line["topology"] = "PolyLine"
-            new_line["parent_uid"] = None
-            inU = deepcopy(
-                self.parent.geol_coll.get_uid_vtk_obj(current_uid).points[:, 0]
-            )
-            inV = deepcopy(
-                self.parent.geol_coll.get_uid_vtk_obj(current_uid).points[:, 1]
-            )
-        elif isinstance(self, ViewXsection):
-            new_line["topology"] = "XsPolyLine"
-            new_line["parent_uid"] = self.this_x_section_uid
-            in_vtk_obj = self.parent.geol_coll.get_uid_vtk_obj(current_uid)
-            inU, inV = self.parent.xsect_coll.world2plane(
-                section_uid=self.this_x_section_uid,
-                X=in_vtk_obj.points_X,
-                Y=in_vtk_obj.points_Y,
-                Z=in_vtk_obj.points_Z,
-            )
-        # Stack coordinates in two-columns matrix.
-        inUV = np_column_stack((inU, inV))
-        # Run the Shapely function.
-        shp_line_in = shp_linestring(inUV)
-        if distance_delta >= shp_line_in.length:
-            while distance_delta >= shp_line_in.length:
-                distance_delta = distance_delta / 2
-        distances = np_arange(0, shp_line_in.length, distance_delta)
-        points = [
-            tuple(shp_line_in.interpolate(distance).coords[0]) for distance in distances
-        ]
-        points.append(tuple(shp_line_in.coords[-1]))
-        shp_line_out = shp_linestring(points)
-        outUV = deepcopy(np_array(shp_line_out.coords))
-        # Un-stack output coordinates and write them to the empty dictionary.
-        outU = outUV[:, 0]
-        outV = outUV[:, 1]
-        if isinstance(self, ViewMap):
-            outX = outU
-            outY = outV
-            outZ = np_zeros(np_shape(outX))
-            new_line["vtk_obj"] = PolyLine()
-        elif isinstance(self, ViewXsection):
-            outX, outY, outZ = self.parent.xsect_coll.plane2world(
-                self.this_x_section_uid, outU, outV
-            )
-            new_line["vtk_obj"] = XsPolyLine(
-                self.this_x_section_uid, parent=self.parent
-            )
-        outXYZ = np_column_stack((outX, outY, outZ))
-        new_line["vtk_obj"].points = outXYZ
-        new_line["vtk_obj"].auto_cells()
-        # Replace VTK object.
-        if new_line["vtk_obj"].points_number > 0:
-            self.parent.geol_coll.replace_vtk(
-                uid=current_uid, vtk_object=new_line["vtk_obj"]
+    uids, flat_uv, offsets = _selected_lines_uv(self)
+    if not uids:
+        return
+    out_uv, out_offsets, spacing = resample_by_distance(
+        flat_uv=flat_uv, offsets=offsets, distance=distance_delta
+    )
+    # Deselect input lines and replace all of them with a single redraw.
+    self.clear_selection()
+    replaced_uids = _replace_lines_uv(self, uids, out_uv, out_offsets)
+    for current_uid, line_spacing in zip(uids, spacing):
+        if line_spacing != distance_delta:
+            self.print_terminal(
+                f"Line {current_uid} shorter than spacing, resampled with distance = {line_spacing}"
             )
-            del new_line
-        else:
-            self.print_terminal(" -- Empty object -- ")
-        # Deselect input line and emit uid as list to force redraw.
-        self.clear_selection()
-        self.parent.signals.geom_modified.emit([current_uid], self.parent.geol_coll)
-        self.print_terminal(
-            f"Line {current_uid} resampled with distance = {distance_delta}"
-        )
+    self.print_terminal(
+        f"{len(replaced_uids)} line(s) resampled with distance = {distance_delta}"
+    )
 
 
 @freeze_gui_onoff
 def resample_lines_number_points(self):
     # this must be done per-part___________________________________________________
-    """Resample selected line with constant spacing defined by a specified number of nodes."""
+    """Resample selected lines with constant spacing defined by a specified number of nodes.
+    All lines are resampled together with the batch functions in helpers/line_batch.py.
+    """
     # Check if at least a line is selected.
     if not self.selected_uids:
         self.print_terminal(" -- No input data selected -- ")
@@ -1419,85 +1472,25 @@ def resample_lines_number_points(self):
         return
     else:
         number_of_points = int(number_of_points)
-    for current_uid in self.selected_uids:
-        if (self.parent.geol_coll.get_uid_topology(current_uid) != "PolyLine") and (
-            self.parent.geol_coll.get_uid_topology(current_uid) != "XsPolyLine"
-        ):
-            self.print_terminal(" -- Selected data is not a line -- ")
-            return
-        # Create empty dictionary for the output line.
-        new_line = deepcopy(self.parent.geol_coll.entity_dict)
-        # Define topology and parent_uid. Get coordinates of input line.
-        if isinstance(self, ViewMap):
-            new_line["topology"] = "PolyLine"
-            new_line["parent_uid"] = None
-            inU = deepcopy(
-                self.parent.geol_coll.get_uid_vtk_obj(current_uid).points[:, 0]
-            )
-            inV = deepcopy(
-                self.parent.geol_coll.get_uid_vtk_obj(current_uid).points[:, 1]
-            )
-        elif isinstance(self, ViewXsection):
-            new_line["topology"] = "XsPolyLine"
-            new_line["parent_uid"] = self.this_x_section_uid
-            in_vtk_obj = self.parent.geol_coll.get_uid_vtk_obj(current_uid)
-            inU, inV = self.parent.xsect_coll.world2plane(
-                section_uid=self.this_x_section_uid,
-                X=in_vtk_obj.points_X,
-                Y=in_vtk_obj.points_Y,
-                Z=in_vtk_obj.points_Z,
-            )
-        # Stack coordinates in two-columns matrix.
-        inUV = np_column_stack((inU, inV))
-        # Run the Shapely function.
-        shp_line_in = shp_linestring(inUV)
-        distances = (
-            shp_line_in.length * i / (number_of_points - 1)
-            for i in range(number_of_points)
-        )
-        points = [
-            tuple(shp_line_in.interpolate(distance).coords[0]) for distance in distances
-        ]
-        points.append(tuple(shp_line_in.coords[-1]))
-        shp_line_out = shp_linestring(points)
-        outUV = deepcopy(np_array(shp_line_out.coords))
-        # Un-stack output coordinates and write them to the empty dictionary.
-        outU = outUV[:, 0]
-        outV = outUV[:, 1]
-        if isinstance(self, ViewMap):
-            outX = outU
-            outY = outV
-            outZ = np_zeros(np_shape(outX))
-            new_line["vtk_obj"] = PolyLine()
-        elif isinstance(self, ViewXsection):
-            outX, outY, outZ = self.parent.xsect_coll.plane2world(
-                self.this_x_section_uid, outU, outV
-            )
-            new_line["vtk_obj"] = XsPolyLine(
-                self.this_x_section_uid, parent=self.parent
-            )
-        outXYZ = np_column_stack((outX, outY, outZ))
-        new_line["vtk_obj"].points = outXYZ
-        new_line["vtk_obj"].auto_cells()
-        # Replace VTK object.
-        if new_line["vtk_obj"].points_number > 0:
-            self.parent.geol_coll.replace_vtk(
-                uid=current_uid, vtk_object=new_line["vtk_obj"]
-            )
-            del new_line
-        else:
-            self.print_terminal(" -- Empty object -- ")
-        # Deselect input line and emit uid as list to force redraw.
-        self.clear_selection()
-        self.parent.signals.geom_modified.emit([current_uid], self.parent.geol_coll)
-        self.print_terminal(
-            f"Line {current_uid} resampled with number of points = {number_of_points}"
-        )
+    uids, flat_uv, offsets = _selected_lines_uv(self)
+    if not uids:
+        return
+    out_uv, out_offsets = resample_by_number(
+        flat_uv=flat_uv, offsets=offsets, number_of_points=number_of_points
+    )
+    # Deselect input lines and replace all of them with a single redraw.
+    self.clear_selection()
+    replaced_uids = _replace_lines_uv(self, uids, out_uv, out_offsets)
+    self.print_terminal(
+        f"{len(replaced_uids)} line(s) resampled with number of points = {number_of_points}"
+    )
 
 
 @freeze_gui_onoff
 def simplify_line(self):
-    """Return a simplified representation of the line. Permits the user to choose a value for the Tolerance parameter."""
+    """Return a simplified representation of the selected lines. Permits the user to choose a value for the
+    Tolerance parameter. All lines are simplified together with the batch functions in helpers/line_batch.py.
+    """
     self.print_terminal(
         "Simplify line. Define tolerance value: "
         "small values result in more vertices and great similarity with the input line."
@@ -1522,89 +1515,12 @@ def simplify_line(self):
         tolerance_p = 0.1
 
     try:
-        for current_uid in self.selected_uids:
-            if (self.parent.geol_coll.get_uid_topology(current_uid) != "PolyLine") and (
-                self.parent.geol_coll.get_uid_topology(current_uid) != "XsPolyLine"
-            ):
-                self.print_terminal(" -- Selected data is not a line -- ")
-                continue
-
-            vtk_obj = self.parent.geol_coll.get_uid_vtk_obj(current_uid)
-            if vtk_obj is None or vtk_obj.points_number <= 0:
-                self.print_terminal(f" --  Object not valid for {current_uid} -- ")
-                continue
-
-            # Editing loop. Create empty dictionary for the output line
-            new_line = deepcopy(self.parent.geol_coll.entity_dict)
-
-            # Get coordinates of input line.
-            if isinstance(self, ViewMap):
-                new_line["topology"] = "PolyLine"
-                inU = vtk_obj.points_X
-                inV = vtk_obj.points_Y
-                new_line["vtk_obj"] = PolyLine()
-            elif isinstance(self, ViewXsection):
-                new_line["topology"] = "XsPolyLine"
-                new_line["parent_uid"] = self.this_x_section_uid
-                inU, inV = self.parent.xsect_coll.world2plane(
-                    section_uid=self.this_x_section_uid,
-                    X=vtk_obj.points_X,
-                    Y=vtk_obj.points_Y,
-                    Z=vtk_obj.points_Z,
-                )
-                new_line["vtk_obj"] = XsPolyLine(
-                    self.this_x_section_uid, parent=self.parent
-                )
-
-            # Stack coordinates in two-columns matrix
-            inUV = np_column_stack((inU, inV))
-
-            # Run the Shapely function.
-            shp_line_in = shp_linestring(inUV)
-
-            shp_line_out = shp_line_in.simplify(tolerance_p, preserve_topology=False)
-
-            if shp_line_out.is_empty:
-                self.print_terminal(f"Empty geometry {current_uid}")
-                continue
-
-            if len(shp_line_out.coords) == 0:
-                self.print_terminal(f"No points in line {current_uid}")
-                continue
-
-            outUV = np_array(shp_line_out.coords)
-
-            # Un-stack output coordinates and write them to the empty dictionary.
-            outU = outUV[:, 0]
-            outV = outUV[:, 1]
-
-            if isinstance(self, ViewMap):
-                outX = outU
-                outY = outV
-                outZ = np_zeros(np_shape(outX))
-            elif isinstance(self, ViewXsection):
-                outX, outY, outZ = self.parent.xsect_coll.plane2world(
-                    self.this_x_section_uid, outU, outV
-                )
-
-            # Create new vtk
-            new_points = np_column_stack((outX, outY, outZ))
-            new_line["vtk_obj"].points = new_points
-            new_line["vtk_obj"].auto_cells()
-
-            # Replace VTK object
-            if new_line["vtk_obj"].points_number > 0:
-                self.parent.geol_coll.replace_vtk(
-                    uid=current_uid, vtk_object=new_line["vtk_obj"]
-                )
-                self.parent.signals.geom_modified.emit(
-                    [current_uid], self.parent.geol_coll
-                )
-            else:
-                self.print_terminal(
-                    f"Empty geometry after parallel offset {current_uid}"
-                )
-
+        uids, flat_uv, offsets = _selected_lines_uv(self)
+        if uids:
+            out_uv, out_offsets = simplify_lines(
+                flat_uv=flat_uv, offsets=offsets, tolerance=tolerance_p
+            )
+            _replace_lines_uv(self, uids, out_uv, out_offsets)
     except Exception as e:
         self.print_terminal(f"Error: {str(e)}")
 
@@ -2067,7 +1983,6 @@ def int_node(line1, line2):
     3. Three or more segments extend the first and last segment using the end of the first and the start of the last.
     """
 
-    fac = 100
     if line1.crosses(line2):
         split_lines1 = shp_split(line1, line2)
         outcoords1 = [list(i.coords) for i in split_lines1.geoms]
@@ -2076,50 +1991,54 @@ def int_node(line1, line2):
         extended_line = line2
 
     else:
-        if len(line2.coords) == 2:
-            scaled_segment1 = shp_scale(
-                line2, xfact=fac, yfact=fac, origin=line2.coords[0]
-            )
-            scaled_segment2 = shp_scale(
-                scaled_segment1,
-                xfact=fac,
-                yfact=fac,
-                origin=scaled_segment1.coords[-1],
-            )
-            extended_line = shp_linestring(scaled_segment2)
-        elif len(line2.coords) == 3:
-            first_seg = shp_linestring(line2.coords[:2])
-            last_seg = shp_linestring(line2.coords[-2:])
-            scaled_first_segment = shp_scale(
-                first_seg, xfact=fac, yfact=fac, origin=first_seg.coords[-1]
-            )
-            scaled_last_segment = shp_scale(
-                last_seg, xfact=fac, yfact=fac, origin=last_seg.coords[0]
-            )
-            extended_line = shp_linestring(
-                [*scaled_first_segment.coords, *scaled_last_segment.coords]
-            )
-        else:
-            first_seg = shp_linestring(line2.coords[:2])
-            last_seg = shp_linestring(line2.coords[-2:])
-
-            scaled_first_segment = shp_scale(
-                first_seg, xfact=fac, yfact=fac, origin=first_seg.coords[-1]
-            )
-            scaled_last_segment = shp_scale(
-                last_seg, xfact=fac, yfact=fac, origin=last_seg.coords[0]
-            )
-            extended_line = shp_linestring(
-                [
-                    *scaled_first_segment.coords,
-                    *line2.coords[2:-2],
-                    *scaled_last_segment.coords,
-                ]
-            )
-
+        extended_line = _extend_line(line2)
         split_lines = shp_split(line1, extended_line)
 
         outcoords = [list(i.coords) for i in split_lines.geoms]
         new_line = shp_linestring([i for sublist in outcoords for i in sublist])
 
     return new_line, extended_line
+
+
+def _extend_line(line2, fac=100):
+    """Extend the first and last segments of line2 by a factor fac, as described in int_node.
+    Also used to find lines that can be split by line2 before running int_node."""
+    if len(line2.coords) == 2:
+        scaled_segment1 = shp_scale(line2, xfact=fac, yfact=fac, origin=line2.coords[0])
+        scaled_segment2 = shp_scale(
+            scaled_segment1,
+            xfact=fac,
+            yfact=fac,
+            origin=scaled_segment1.coords[-1],
+        )
+        extended_line = shp_linestring(scaled_segment2)
+    elif len(line2.coords) == 3:
+        first_seg = shp_linestring(line2.coords[:2])
+        last_seg = shp_linestring(line2.coords[-2:])
+        scaled_first_segment = shp_scale(
+            first_seg, xfact=fac, yfact=fac, origin=first_seg.coords[-1]
+        )
+        scaled_last_segment = shp_scale(
+            last_seg, xfact=fac, yfact=fac, origin=last_seg.coords[0]
+        )
+        extended_line = shp_linestring(
+            [*scaled_first_segment.coords, *scaled_last_segment.coords]
+        )
+    else:
+        first_seg = shp_linestring(line2.coords[:2])
+        last_seg = shp_linestring(line2.coords[-2:])
+
+        scaled_first_segment = shp_scale(
+            first_seg, xfact=fac, yfact=fac, origin=first_seg.coords[-1]
+        )
+        scaled_last_segment = shp_scale(
+            last_seg, xfact=fac, yfact=fac, origin=last_seg.coords[0]
+        )
+        extended_line = shp_linestring(
+            [
+                *scaled_first_segment.coords,
+                *line2.coords[2:-2],
+                *scaled_last_segment.coords,
+            ]
+        )
+    return extended_line
@@ -332,10 +332,18 @@ class BaseView(QMainWindow, Ui_BaseViewWindow):
             self.print_terminal("Error in tree_from_coll")
             return None
 
+    def view_uids(self, collection=None) -> list:
+        """Uids of the entities of a collection shown in this view, selected with self.view_filter."""
+        return collection.df.query(self.view_filter)["uid"].tolist()
+
+    def filter_view_uids(self, collection=None, uids=None) -> list:
+        """Uids in the list that are shown in this view, selected with self.view_filter."""
+        return collection.filter_uids(query=self.view_filter, uids=uids)
+
     def entities_added_update_views(self, updated_uids=None, collection=None):
         """This is called when an entity is added to a collection."""
         # remove from updated_list the uid's that are excluded from this view by self.view_filter.
-        updated_uids = collection.filter_uids(query=self.view_filter, uids=updated_uids)
+        updated_uids = self.filter_view_uids(collection=collection, uids=updated_uids)
         tree = self.tree_from_coll(coll=collection)
         for uid in updated_uids:
             this_actor = self.show_actor_with_property(
@@ -389,7 +397,7 @@ class BaseView(QMainWindow, Ui_BaseViewWindow):
     def entities_geom_modified_update_views(self, updated_uids=None, collection=None):
         """This is called when an entity geometry or topology is modified (i.e. the vtk object is modified)."""
         # remove from updated_list the uid's that are excluded from this view by self.view_filter.
-        updated_uids = collection.filter_uids(query=self.view_filter, uids=updated_uids)
+        updated_uids = self.filter_view_uids(collection=collection, uids=updated_uids)
         for uid in updated_uids:
             # This replaces the previous copy of the actor with the same uid, and updates the actors dataframe.
             # See issue #33 for a discussion on actors replacement by the PyVista add_mesh and add_volume methods.
@@ -408,7 +416,7 @@ class BaseView(QMainWindow, Ui_BaseViewWindow):
         """This is called when point or cell data (properties) are added."""
         # AT THE MOMENT THIS IS IDENTICAL TO entities_data_keys_removed_update_views
         # remove from updated_list the uid's that are excluded from this view by self.view_filter.
-        updated_uids = collection.filter_uids(query=self.view_filter, uids=updated_uids)
+        updated_uids = self.filter_view_uids(collection=collection, uids=updated_uids)
         tree = self.tree_from_coll(coll=collection)
         for uid in updated_uids:
             # Replace the previous copy of the actor with the same uid, and update the actors dataframe, only if a
@@ -455,7 +463,7 @@ class BaseView(QMainWindow, Ui_BaseViewWindow):
         """This is called when entity point or cell data are modified. The actor is modified just if the
         modified property is currently shown. Trees do not need to be modified."""
         # remove from updated_list the uid's that are excluded from this view by self.view_filter.
-        updated_uids = collection.filter_uids(query=self.view_filter, uids=updated_uids)
+        updated_uids = self.filter_view_uids(collection=collection, uids=updated_uids)
         for uid in updated_uids:
             # Replace the previous copy of the actor with the same uid, and update the actors dataframe, only if a
             # property that has been removed is shown at the moment. See issue #33 for a discussion on actors
@@ -489,7 +497,7 @@ class BaseView(QMainWindow, Ui_BaseViewWindow):
         to the collection view tree, if they are set, are disconnected to avoid a nasty loop that would disrupt them.
         """
         # remove from updated_list the uid's that are excluded from this view by self.view_filter.
-        updated_uids = collection.filter_uids(query=self.view_filter, uids=updated_uids)
+        updated_uids = self.filter_view_uids(collection=collection, uids=updated_uids)
         tree = self.tree_from_coll(coll=collection)
         self.change_actor_color(collection=collection, updated_uids=updated_uids)
         self.change_actor_point_size(collection=collection, updated_uids=updated_uids)
@@ -641,53 +649,77 @@ class BaseView(QMainWindow, Ui_BaseViewWindow):
         """
         Add all entities in project collections.
         All objects are visible by default -> show = True.
+        Entities are first recorded in actors_df, so that trees and signals work on all of them at once, then
+        their actors are built by populate_entities().
         """
+        recorded_uids = set(self.actors_df["uid"].to_list())
+        entries = []
         for collection_name in self.tree_collection_dict.values():
-            coll_df = eval(f"self.parent.{collection_name}").df
             try:
-                filtered_uids = coll_df.query(self.view_filter)["uid"].tolist()
+                filtered_uids = self.view_uids(
+                    collection=eval(f"self.parent.{collection_name}")
+                )
             except Exception as e:
                 # This collection's DataFrame doesn't have the columns this
                 # view's filter depends on (e.g. xsect_coll has no
                 # "properties_names" column) - nothing to add from it for this view.
                 continue
-            prgs_bar = progress_dialog(
-                max_value=len(filtered_uids),
-                title_txt="Opening view",
-                label_txt=f"Adding objects from {collection_name}...",
-                cancel_txt=None,
-                parent=self,
+            entries.extend(
+                (uid, collection_name)
+                for uid in filtered_uids
+                if uid not in recorded_uids
             )
-            for uid in (
-                eval(f"self.parent.{collection_name}")
-                .df.query(self.view_filter)["uid"]
-                .tolist()
-            ):
-                this_actor = self.show_actor_with_property(
-                    uid=uid,
-                    coll_name=collection_name,
-                    show_property=None,
-                    visible=True,
-                )
-                # New Pandas >= 2.0.0
-                self.actors_df = pd_concat(
-                    [
-                        self.actors_df,
-                        pd_DataFrame(
-                            [
-                                {
-                                    "uid": uid,
-                                    "actor": this_actor,
-                                    "show": True,
-                                    "collection": collection_name,
-                                    "show_property": None,
-                                }
-                            ]
-                        ),
-                    ],
-                    ignore_index=True,
-                )
-                prgs_bar.add_one()
+        if not entries:
+            return
+        # New Pandas >= 2.0.0
+        self.actors_df = pd_concat(
+            [
+                self.actors_df,
+                pd_DataFrame(
+                    {
+                        "uid": [uid for uid, _ in entries],
+                        "actor": [None] * len(entries),
+                        "show": [True] * len(entries),
+                        "collection": [
+                            collection_name for _, collection_name in entries
+                        ],
+                        "show_property": [None] * len(entries),
+                    }
+                ),
+            ],
+            ignore_index=True,
+        )
+        self.populate_entities(entries=entries)
+
+    def populate_entities(self, entries=None):
+        """
+        Build the actors of entities already recorded in actors_df, given as a list of (uid, collection name).
+        Here all actors are built at once with a progress dialog. VTK views reimplement this to build them
+        progressively.
+        """
+        prgs_bar = progress_dialog(
+            max_value=len(entries),
+            title_txt="Opening view",
+            label_txt="Adding objects...",
+            cancel_txt=None,
+            parent=self,
+        )
+        for uid, collection_name in entries:
+            self.build_entity_actor(uid=uid, coll_name=collection_name)
+            prgs_bar.add_one()
+
+    def build_entity_actor(self, uid=None, coll_name=None):
+        """Build the actor of an entity recorded in actors_df, with the visibility and property recorded there,
+        that may have been changed before the actor is built."""
+        index = self.actors_df.index[self.actors_df["uid"] == uid][0]
+        this_actor = self.show_actor_with_property(
+            uid=uid,
+            coll_name=coll_name,
+            show_property=self.actors_df.at[index, "show_property"],
+            visible=self.actors_df.at[index, "show"],
+        )
+        self.actors_df.at[index, "actor"] = this_actor
+        return this_actor
 
     # ================================  General methods shared by all views - built incrementally =====================
 
@@ -1,33 +1,43 @@
 """abstract_view_vtk.py
 PZero© Andrea Bistacchi"""
 
+# Python imports____
+from time import perf_counter
+
 # PySide6 imports____
+from PySide6.QtCore import QTimer
 from PySide6.QtGui import QAction
 from PySide6.QtWidgets import QAbstractItemView
 
 # numpy import____
-from numpy import column_stack as np_column_stack
+from numpy import array as np_array
+from numpy import deg2rad as np_deg2rad
+from numpy import tan as np_tan
+from numpy.linalg import norm as np_linalg_norm
 from numpy import ndarray as np_ndarray
 
 # VTK imports incl. VTK-Numpy interface____
 from vtkmodules.vtkRenderingCore import vtkCellPicker
-from vtk import vtkAppendPolyData
 
 # PyVista imports____
 from pyvista import global_theme as pv_global_theme
 from pyvistaqt import QtInteractor as pvQtInteractor
 from pyvista import Box as pv_Box
-from pyvista import Line as pv_Line
-from pyvista import Disc as pv_Disc
 from pyvista import PointSet as pvPointSet
 
 # PZero imports____
 from .abstract_base_view import BaseView
 from ..helpers.helper_functions import freeze_gui_onoff, freeze_gui_on, freeze_gui_off
-from ..orientation_analysis import get_dip_dir_vectors
 from ..helpers.helper_dialogs import input_one_value_dialog, save_file_dialog
 from ..helpers.screenshot_dialog import ScreenshotExportDialog
 from ..helpers.gif_export_dialog import GifExportDialog
+from .render_batch import (
+    BATCH_COLLECTIONS,
+    RenderBatch,
+    RenderBatches,
+    batch_style_key,
+)
+from .view_population import PopulationQueue, entity_proxy, valid_bounds
 from ..entities_factory import (
     VertexSet,
     PolyLine,
@@ -51,53 +61,21 @@ class ViewVTK(BaseView):
 
     RGB_TOTAL_PROPERTY = "RGB total"
 
+    # When True, entities of geological, fluid and background collections that share a legend style are drawn
+    # by a single batch actor (see render_batch.py). Toggled for each view in the View menu.
+    batch_rendering = False
+
+    # Seconds spent building actors in each time slice while the view is populated progressively, short
+    # enough to keep the camera interactive (see view_population.py).
+    population_slice_time = 0.03
+    # Colour of the placeholders drawn until actors are built.
+    PLACEHOLDER_COLOR = [0.6, 0.6, 0.6]
+
     def __init__(self, *args, **kwargs):
         super(ViewVTK, self).__init__(*args, **kwargs)
 
     # ================================  General methods shared by all views - built incrementally =====================
 
-    def _get_point_cloud_rgb_total(self, plot_entity):
-        """Return a Nx3 RGB array for point-cloud rendering, if available.
-
-        Supports either a vector 'RGB' array or separate scalar arrays named
-        'RGB[0]', 'RGB[1]', 'RGB[2]'.
-        """
-        if plot_entity is None:
-            return None
-
-        try:
-            if "RGB" in plot_entity.point_data_keys:
-                rgb = plot_entity.get_point_data("RGB")
-                if isinstance(rgb, np_ndarray) and (
-                    (
-                        rgb.ndim == 2
-                        and rgb.shape[1] >= 3
-                        and rgb.shape[0] == plot_entity.points_number
-                    )
-                    or (
-                        rgb.ndim == 1
-                        and plot_entity.points_number == 1
-                        and rgb.shape[0] >= 3
-                    )
-                ):
-                    if rgb.ndim == 1:
-                        return rgb[:3].reshape((1, 3))
-                    return rgb[:, :3]
-        except Exception:
-            pass
-
-        try:
-            keys = ("RGB[0]", "RGB[1]", "RGB[2]")
-            if all(key in plot_entity.point_data_keys for key in keys):
-                r = plot_entity.get_point_data(keys[0])
-                g = plot_entity.get_point_data(keys[1])
-                b = plot_entity.get_point_data(keys[2])
-                return np_column_stack((r, g, b))
-        except Exception:
-            pass
-
-        return None
-
     def initialize_menu_tools(self):
         """This method collects menus and actions in superclasses and then adds custom ones, specific to this view."""
         # append code from superclass
@@ -137,6 +115,12 @@ class ViewVTK(BaseView):
         self.CheckGridView.triggered.connect(self.toggle_grid)
         self.menuView.insertAction(self.CheckGridView, self.CheckGridView)
 
+        self.CheckBatchRendering = QAction(
+            "Batched rendering", self, checkable=True, checked=self.batch_rendering
+        )
+        self.CheckBatchRendering.triggered.connect(self.toggle_batch_rendering)
+        self.menuView.addAction(self.CheckBatchRendering)
+
     # ================================  Methods required by BaseView(), (re-)implemented here =========================
 
     def closeEvent(self, event):
@@ -144,6 +128,8 @@ class ViewVTK(BaseView):
         (ii) closing the plotter for vtk windows."""
         self.enable_actions()
         self.disconnect_all_signals()
+        # Stop progressive population, if still running.
+        self.population_queue = None
         # To cleanly close the vtk plotter, the following line is needed. This is the only difference
         # with the closeEvent() method in the BaseView() class.
         self.plotter.renderer.Finalize()
@@ -154,7 +140,20 @@ class ViewVTK(BaseView):
         """
         Get an actor by uid in a VTK/PyVista plotter. Here we use self.plotter.renderer.actors
         that is a dictionary with key = uid string and value = actor.
+        A batched entity is first taken out of its batch and drawn with its own actor, since callers
+        use the actor to edit the entity. Use render_actor() to get the actor without unbatching.
         """
+        if self.is_pending(uid):
+            self.build_pending(uid)
+        if uid in self.render_batches:
+            self.unbatch_uid(uid)
+        return self.plotter.renderer.actors[uid]
+
+    def render_actor(self, uid: str = None):
+        """Actor that draws the entity with this uid, that is the batch actor for batched entities."""
+        batch_actor = self.render_batches.actor(uid)
+        if batch_actor is not None:
+            return batch_actor
         return self.plotter.renderer.actors[uid]
 
     def get_uid_from_actor(self, actor=None):
@@ -171,6 +170,10 @@ class ViewVTK(BaseView):
 
     def actor_shown(self, uid: str = None):
         """Method to check if an actor is shown in a VTK/PyVista plotter. Returns a boolean."""
+        if uid in self.render_batches:
+            return self.render_batches.batch(uid).visibility(uid)
+        if self.is_pending(uid):
+            return self.placeholders.visibility(uid)
         return self.plotter.renderer.actors[uid].GetVisibility()
 
     def show_actors(self, uids: list = None):
@@ -179,6 +182,9 @@ class ViewVTK(BaseView):
         for uid, actor in actors.items():
             if uid in uids:
                 actor.SetVisibility(True)
+        for uid in uids:
+            if uid in self.render_batches:
+                self.render_batches.batch(uid).set_visibility(uid, True)
 
     def hide_actors(self, uids: list = None):
         """Method to show actors in uids list in a VTK/PyVista plotter."""
@@ -186,6 +192,9 @@ class ViewVTK(BaseView):
         for uid, actor in actors.items():
             if uid in uids:
                 actor.SetVisibility(False)
+        for uid in uids:
+            if uid in self.render_batches:
+                self.render_batches.batch(uid).set_visibility(uid, False)
 
     def change_actor_color(self, updated_uids: list = None, collection=None):
         """Change color for VTK plots."""
@@ -196,7 +205,11 @@ class ViewVTK(BaseView):
                 color_G = collection.get_uid_legend(uid=uid)["color_G"]
                 color_B = collection.get_uid_legend(uid=uid)["color_B"]
                 color_RGB = [color_R / 255, color_G / 255, color_B / 255]
-                # Now update color for actor uid
+                # Now update color for actor uid, or for its block if batched
+                if uid in self.render_batches:
+                    self.render_batches.batch(uid).set_color(uid, color_RGB)
+                    self.request_render()
+                    continue
                 self.get_actor_by_uid(uid).GetProperty().SetColor(color_RGB)
             else:
                 continue
@@ -207,7 +220,11 @@ class ViewVTK(BaseView):
             if uid in self.uids_in_view:
                 # Get color from legend
                 opacity = collection.get_uid_legend(uid=uid)["opacity"] / 100
-                # Now update color for actor uid
+                # Now update color for actor uid, or for its block if batched
+                if uid in self.render_batches:
+                    self.render_batches.batch(uid).set_opacity(uid, opacity)
+                    self.request_render()
+                    continue
                 self.get_actor_by_uid(uid).GetProperty().SetOpacity(opacity)
             else:
                 continue
@@ -218,6 +235,10 @@ class ViewVTK(BaseView):
             if uid in self.uids_in_view:
                 # Get color from legend
                 line_thick = collection.get_uid_legend(uid=uid)["line_thick"]
+                # Batched entities move to the batch with the new line thickness
+                if uid in self.render_batches:
+                    self.redraw_uid(uid)
+                    continue
                 # Now update color for actor uid
                 self.get_actor_by_uid(uid).GetProperty().SetLineWidth(line_thick)
             else:
@@ -253,6 +274,9 @@ class ViewVTK(BaseView):
                         show_property=show_property,
                         visible=show,
                     )
+                elif uid in self.render_batches:
+                    # Batched entities move to the batch with the new point size
+                    self.redraw_uid(uid)
                 else:
                     self.get_actor_by_uid(uid).GetProperty().SetPointSize(point_size)
 
@@ -271,6 +295,18 @@ class ViewVTK(BaseView):
             except Exception:
                 pass
 
+        if uid in self.render_batches:
+            # Only the block visibility changes, the batch is not rebuilt.
+            self.render_batches.batch(uid).set_visibility(uid, visible)
+            if collection == "backgrnd_coll":
+                _set_visibility_for(f"{uid}_name-labels")
+            self.request_render()
+            return
+
+        if self.is_pending(uid):
+            # The actor will be built with the visibility recorded in actors_df.
+            self.placeholders.set_visibility(uid, visible)
+
         try:
             this_actor = actors[uid]
         except Exception:
@@ -298,6 +334,14 @@ class ViewVTK(BaseView):
         # plotter.remove_actor can remove a single entity or a list of entities as actors ->
         # here we remove a single entity
         if not self.actors_df.loc[self.actors_df["uid"] == uid].empty:
+            if uid in self.render_batches:
+                self.remove_from_batch(uid)
+                self.request_render()
+                return
+            if self.is_pending(uid):
+                # Never built, the population queue skips removed entities.
+                self.placeholders.remove(uid)
+                return
             this_actor = self.get_actor_by_uid(uid)
             success = self.plotter.remove_actor(this_actor)
 
@@ -311,6 +355,14 @@ class ViewVTK(BaseView):
         self.ViewFrameLayout.addWidget(self.plotter.interactor)
         # self.plotter.show_axes_all()
 
+        # Batches of entities drawn by a single actor, and uids temporarily drawn with their own actor.
+        self.render_batches = RenderBatches()
+        self.batch_exclude = set()
+        self._render_pending = False
+        # Entities waiting for their actor and their placeholders, while the view is populated progressively.
+        self.population_queue = None
+        self.placeholders = None
+
         # Set orientation widget
 
         # # In an old version it was turned on after the qt canvas was shown, but this does not seem necessary
@@ -339,6 +391,236 @@ class ViewVTK(BaseView):
 
         self.set_orientation_widget()
 
+        # Texture images with the pyramid level matching the zoom at the end of each camera interaction.
+        self.plotter.iren.interactor.AddObserver(
+            "EndInteractionEvent", self.update_image_textures
+        )
+
+    def image_screen_pixels(self, plot_entity=None):
+        """Approximate length in screen pixels of the longest side of an image, from the current camera.
+        Before any actor is plotted the camera is not set, and the image is assumed to fill the view.
+        """
+        width_pixels, height_pixels = self.plotter.renderer.GetSize()
+        if self.actors_df.empty or height_pixels <= 0:
+            return max(width_pixels, height_pixels)
+        spacing = plot_entity.spacing
+        world_length = max(
+            abs(spacing[0]) * (plot_entity.U_n - 1),
+            abs(spacing[1]) * (plot_entity.V_n - 1),
+        )
+        camera = self.plotter.renderer.GetActiveCamera()
+        if camera.GetParallelProjection():
+            view_height = 2.0 * camera.GetParallelScale()
+        else:
+            bounds = np_array(plot_entity.bounds).reshape(3, 2)
+            distance = np_linalg_norm(
+                np_array(camera.GetPosition()) - bounds.mean(axis=1)
+            )
+            view_height = 2.0 * distance * np_tan(np_deg2rad(camera.GetViewAngle()) / 2)
+        if view_height <= 0:
+            return max(width_pixels, height_pixels)
+        return world_length * height_pixels / view_height
+
+    def image_texture(self, plot_entity=None):
+        """Texture of the image pyramid level that matches its current size on screen."""
+        return plot_entity.texture_level(
+            plot_entity.level_for_screen(self.image_screen_pixels(plot_entity))
+        )
+
+    def update_image_textures(self, *args):
+        """Replace the texture of visible images when the zoom requires a different pyramid level."""
+        images = self.actors_df.loc[self.actors_df["collection"] == "image_coll"]
+        changed = False
+        for uid, actor, show in zip(images["uid"], images["actor"], images["show"]):
+            if not show or actor is None or actor.GetTexture() is None:
+                continue
+            texture = self.image_texture(self.parent.image_coll.get_uid_vtk_obj(uid))
+            if actor.GetTexture() is not texture:
+                actor.SetTexture(texture)
+                changed = True
+        if changed:
+            self.plotter.render()
+
+    def populate_entities(self, entries=None):
+        """Progressive population. All entities are drawn at once with low-resolution placeholders, so that
+        the view can be shown and moved, then their actors are built in time slices by populate_slice().
+        Entities with no bounds (e.g. empty ones) have no placeholder and are built at once.
+        """
+        if self.population_queue is None:
+            self.population_queue = PopulationQueue()
+            self.placeholders = RenderBatch(kind="lines", line_thick=1, point_size=2)
+        for uid, coll_name in entries:
+            vtk_obj = getattr(self.parent, coll_name).get_uid_vtk_obj(uid)
+            bounds = valid_bounds(vtk_obj)
+            if bounds is None:
+                self.build_entity_actor(uid=uid, coll_name=coll_name)
+                continue
+            self.placeholders.add(
+                uid=uid,
+                vtk_obj=entity_proxy(vtk_obj=vtk_obj, bounds=bounds),
+                color=self.PLACEHOLDER_COLOR,
+            )
+            self.population_queue.add(uid=uid, coll_name=coll_name, bounds=bounds)
+        if len(self.population_queue) == 0:
+            self.finish_population()
+            return
+        if self.placeholders.actor not in self.plotter.renderer.actors.values():
+            # The camera is fitted to the placeholders of all entities when the view is opened.
+            self.plotter.add_actor(
+                self.placeholders.actor,
+                name="population_placeholders",
+                reset_camera=not self.plotter.camera_set,
+                pickable=False,
+                render=False,
+            )
+        self.schedule_population()
+
+    def schedule_population(self):
+        """Run the next time slice of progressive population when the event loop is idle."""
+        QTimer.singleShot(0, self, self.populate_slice)
+
+    def populate_slice(self):
+        """Build actors for population_slice_time seconds, entities largest on screen first, then give control
+        back to the event loop, so that the view is rendered and can be moved between slices.
+        """
+        if self.population_queue is None:
+            return
+        camera = self.plotter.renderer.GetActiveCamera()
+        entries = self.population_queue.pop_largest(
+            camera_position=camera.GetPosition(),
+            parallel_projection=bool(camera.GetParallelProjection()),
+        )
+        start = perf_counter()
+        n_done = 0
+        for uid, coll_name, bounds in entries:
+            if n_done > 0 and perf_counter() - start > self.population_slice_time:
+                break
+            n_done += 1
+            # Entities removed, or built on request, while waiting are skipped.
+            if self.is_pending(uid):
+                self.build_pending(uid)
+        for uid, coll_name, bounds in entries[n_done:]:
+            self.population_queue.add(uid=uid, coll_name=coll_name, bounds=bounds)
+        if len(self.population_queue) == 0:
+            self.finish_population()
+        else:
+            self.schedule_population()
+        self.plotter.render()
+
+    def finish_population(self):
+        """Remove the placeholders when all actors have been built."""
+        if self.placeholders is not None:
+            self.plotter.remove_actor(self.placeholders.actor, render=False)
+        self.population_queue = None
+        self.placeholders = None
+
+    def is_pending(self, uid=None):
+        """True if the entity is still drawn by a placeholder, waiting for its actor."""
+        return self.placeholders is not None and uid in self.placeholders
+
+    def build_pending(self, uid=None):
+        """Build the actor of an entity waiting in the population queue, e.g. when it is needed by a tool."""
+        self.placeholders.remove(uid)
+        coll_name = self.actors_df.loc[
+            self.actors_df["uid"] == uid, "collection"
+        ].values[0]
+        return self.build_entity_actor(uid=uid, coll_name=coll_name)
+
+    def show_in_batch(self, uid=None, coll_name=None, show_property=None, visible=None):
+        """Draw the entity as a block of the batch for its legend style, if batched rendering is on and the
+        entity can be batched. Returns the batch actor, or None if the entity must be drawn with its own actor,
+        after removing it from its batch if it was batched."""
+        key = None
+        if (
+            self.batch_rendering
+            and uid not in self.batch_exclude
+            and coll_name in BATCH_COLLECTIONS
+        ):
+            this_coll = getattr(self.parent, coll_name)
+            legend = this_coll.get_uid_legend(uid=uid)
+            plot_entity = this_coll.get_uid_vtk_obj(uid)
+            key = batch_style_key(
+                plot_entity=plot_entity,
+                coll_name=coll_name,
+                show_property=show_property,
+                line_thick=legend["line_thick"],
+                point_size=legend["point_size"],
+            )
+        if key is None:
+            if uid in self.render_batches:
+                self.remove_from_batch(uid)
+            return None
+        # The entity may have been drawn with its own actor before.
+        if uid in self.plotter.renderer.actors:
+            self.plotter.remove_actor(uid, render=False)
+        batch, created = self.render_batches.add(
+            uid=uid,
+            vtk_obj=plot_entity,
+            key=key,
+            color=[
+                legend["color_R"] / 255,
+                legend["color_G"] / 255,
+                legend["color_B"] / 255,
+            ],
+            opacity=legend["opacity"] / 100,
+            visible=visible,
+        )
+        if created:
+            self.plotter.add_actor(
+                batch.actor,
+                name=batch.name,
+                reset_camera=False,
+                pickable=batch.pickable,
+                render=False,
+            )
+        # As plot_mesh, fit the camera to the scene until it has been set.
+        if not self.plotter.camera_set:
+            self.plotter.reset_camera(render=False)
+        self.request_render()
+        return batch.actor
+
+    def remove_from_batch(self, uid=None):
+        """Remove the entity from its batch, and the batch actor if the batch is left empty."""
+        empty_batch = self.render_batches.remove(uid)
+        if empty_batch is not None:
+            self.plotter.remove_actor(empty_batch.actor, render=False)
+
+    def redraw_uid(self, uid=None):
+        """Draw the entity again with the collection, property and visibility recorded in actors_df."""
+        row = self.actors_df.loc[self.actors_df["uid"] == uid]
+        self.show_actor_with_property(
+            uid=uid,
+            coll_name=row["collection"].values[0],
+            show_property=row["show_property"].values[0],
+            visible=row["show"].values[0],
+        )
+
+    def unbatch_uid(self, uid=None):
+        """Take the entity out of its batch and draw it with its own actor."""
+        self.batch_exclude.add(uid)
+        try:
+            self.redraw_uid(uid)
+        finally:
+            self.batch_exclude.discard(uid)
+
+    def toggle_batch_rendering(self, checked):
+        """Switch batched rendering on or off and draw all entities again."""
+        self.batch_rendering = checked
+        for uid in self.actors_df["uid"].to_list():
+            self.redraw_uid(uid)
+        self.request_render()
+
+    def request_render(self):
+        """Render once at the next iteration of the event loop, so that many changes to batches result in a
+        single render."""
+        if not self._render_pending:
+            self._render_pending = True
+            QTimer.singleShot(0, self._deferred_render)
+
+    def _deferred_render(self):
+        self._render_pending = False
+        self.plotter.render()
+
     def show_actor_with_property(
         self, uid=None, coll_name=None, show_property=None, visible=None
     ):
@@ -346,6 +628,12 @@ class ViewVTK(BaseView):
         Show actor with scalar property (default None). See details in:
         https://github.com/pyvista/pyvista/blob/140b15be1d4021b81ded46b1c212c70e86a98ee7/pyvista/plotting/plotting.py#L1045
         """
+        # Entities that can be batched are drawn by the batch actor for their legend style.
+        batch_actor = self.show_in_batch(
+            uid=uid, coll_name=coll_name, show_property=show_property, visible=visible
+        )
+        if batch_actor is not None:
+            return batch_actor
 
         # First get the vtk object from its collection.
         if show_property:
@@ -474,24 +762,13 @@ class ViewVTK(BaseView):
                         show_property_title = None
                         show_property = None
                         style = "surface"
-                        appender = vtkAppendPolyData()
-                        r = point_size
-                        points = plot_entity.points
-                        normals = plot_entity.get_point_data("Normals")
-                        dip_vectors, dir_vectors = get_dip_dir_vectors(normals=normals)
-                        line1 = pv_Line(pointa=(0, 0, 0), pointb=(r, 0, 0))
-                        line2 = pv_Line(pointa=(-r, 0, 0), pointb=(r, 0, 0))
-                        for point, normal in zip(points, normals):
-                            base = pv_Disc(
-                                center=point, normal=normal, inner=0, outer=r, c_res=30
-                            )
-                            appender.AddInputData(base)
-                        dip_glyph = plot_entity.glyph(geometry=line1, prop=dip_vectors)
-                        dir_glyph = plot_entity.glyph(geometry=line2, prop=dir_vectors)
-                        appender.AddInputData(dip_glyph)
-                        appender.AddInputData(dir_glyph)
-                        appender.Update()
-                        plot_entity = appender.GetOutput()
+                        # Discs are shared by all views, see render_cache.py
+                        plot_entity = self.parent.render_cache.get(
+                            uid=uid,
+                            vtk_obj=plot_entity,
+                            kind="normal_discs",
+                            params=(point_size,),
+                        )
                     else:
                         # extract the specified component from the vector property
                         show_property = plot_entity.get_point_data(original_prop)[
@@ -501,28 +778,13 @@ class ViewVTK(BaseView):
                     show_property_title = None
                     show_property = None
                     style = "surface"
-                    appender = vtkAppendPolyData()
-                    r = point_size
-                    points = plot_entity.points
-                    normals = plot_entity.get_point_data("Normals")
-                    dip_vectors, dir_vectors = get_dip_dir_vectors(normals=normals)
-                    line1 = pv_Line(pointa=(0, 0, 0), pointb=(r, 0, 0))
-                    line2 = pv_Line(pointa=(-r, 0, 0), pointb=(r, 0, 0))
-
-                    for point, normal in zip(points, normals):
-                        # base = pv_Plane(center=point, direction=normal,i_size=r,j_size=r)
-                        base = pv_Disc(
-                            center=point, normal=normal, inner=0, outer=r, c_res=30
-                        )
-                        appender.AddInputData(base)
-
-                    dip_glyph = plot_entity.glyph(geometry=line1, prop=dip_vectors)
-                    dir_glyph = plot_entity.glyph(geometry=line2, prop=dir_vectors)
-
-                    appender.AddInputData(dip_glyph)
-                    appender.AddInputData(dir_glyph)
-                    appender.Update()
-                    plot_entity = appender.GetOutput()
+                    # Discs are shared by all views, see render_cache.py
+                    plot_entity = self.parent.render_cache.get(
+                        uid=uid,
+                        vtk_obj=plot_entity,
+                        kind="normal_discs",
+                        params=(point_size,),
+                    )
 
                 elif show_property == "name":
                     point = plot_entity.points
@@ -631,6 +893,7 @@ class ViewVTK(BaseView):
                 )
         elif isinstance(plot_entity, PCDom):
             plot_rgb_option = None
+            color_bar_range = None
             new_plot = pvPointSet()
             new_plot.ShallowCopy(plot_entity)  # this is temporary
             file = self.parent.dom_coll.df.loc[
@@ -643,7 +906,9 @@ class ViewVTK(BaseView):
                 if show_property == "none" or show_property is None:
                     pass
                 elif show_property == self.RGB_TOTAL_PROPERTY:
-                    show_property_value = self._get_point_cloud_rgb_total(plot_entity)
+                    show_property_value = self.parent.render_cache.get(
+                        uid=uid, vtk_obj=plot_entity, kind="rgb_total"
+                    )
                     if show_property_value is not None:
                         plot_rgb_option = True
                 elif show_property == "X":
@@ -682,12 +947,20 @@ class ViewVTK(BaseView):
                         # Get the n of components for the given property. If it's > 1 then treat it as RGB(A).
                         if n_comp > 1:
                             plot_rgb_option = True
+                        else:
+                            # The range of large point clouds is computed once for all views.
+                            color_bar_range = self.parent.render_cache.get(
+                                uid=uid,
+                                vtk_obj=plot_entity,
+                                kind="scalar_range",
+                                params=(show_property,),
+                            )
             this_actor = self.plot_PC_3D(
                 uid=uid,
                 plot_entity=new_plot,
                 color_RGB=color_RGB,
                 show_property=show_property_value,
-                color_bar_range=None,
+                color_bar_range=color_bar_range,
                 show_property_title=show_property_title,
                 plot_rgb_option=plot_rgb_option,
                 visible=visible,
@@ -701,7 +974,7 @@ class ViewVTK(BaseView):
             if show_property == "none" or show_property is None:
                 plot_texture_option = None
             else:
-                plot_texture_option = plot_entity.texture
+                plot_texture_option = self.image_texture(plot_entity)
             this_actor = self.plot_mesh(
                 uid=uid,
                 plot_entity=plot_entity.frame,
@@ -1253,10 +1526,16 @@ class ViewVTK(BaseView):
         self.print_terminal(f"Picker output: {picker_output}")
         # self.print_terminal(f"Picker actor: {actor}")
 
-        # proceed if an actor is selected
-        if self.get_uid_from_actor(actor=actor):
-            # Get uid of picked actor
+        # Blocks of batch actors are resolved to the uid of the entity through the flat block index.
+        if self.render_batches.is_batch_actor(actor):
+            sel_uid = self.render_batches.uid_from_pick(
+                actor=actor, flat_index=picker.GetFlatBlockIndex()
+            )
+        else:
             sel_uid = self.get_uid_from_actor(actor=actor)
+
+        # proceed if an actor is selected
+        if sel_uid:
             self.print_terminal(f"Picked uid: {sel_uid}")
 
             # Add uid of picked actor to selected_uids list, with SHIFT-SELECT option
@@ -1268,11 +1547,14 @@ class ViewVTK(BaseView):
 
             # Show selected actors in yellow
             for sel_uid in self.selected_uids:
-                sel_actor = self.get_actor_by_uid(sel_uid)
                 collection = self.actors_df.loc[
                     self.actors_df["uid"] == sel_uid, "collection"
                 ].values[0]
-                mesh = sel_actor.GetMapper().GetInput()
+                if sel_uid in self.render_batches:
+                    mesh = self.render_batches.batch(sel_uid).block(sel_uid)
+                else:
+                    sel_actor = self.get_actor_by_uid(sel_uid)
+                    mesh = sel_actor.GetMapper().GetInput()
                 name = f"{sel_uid}_silh"
                 name_list.add(name)
                 if collection == "dom_coll":
@@ -0,0 +1,163 @@
+"""grid_slicer.py
+PZero© Andrea Bistacchi"""
+
+# Numpy imports____
+from numpy import arange as np_arange
+from numpy import array as np_array
+from numpy import copyto as np_copyto
+from numpy import float64 as np_float64
+from numpy import meshgrid as np_meshgrid
+from numpy import ones as np_ones
+from numpy import rint as np_rint
+
+# VTK imports____
+from vtk import vtkImageData, vtkPoints, vtkStructuredGrid
+from vtkmodules.util.numpy_support import numpy_to_vtk, vtk_to_numpy
+
+# PyVista imports____
+from pyvista import StructuredGrid as pv_StructuredGrid
+
+"""Index-based slicer for regular grids. Voxet and XsVoxet (vtkImageData) and Seismics (vtkStructuredGrid) are
+sliced along the i, j or k axis by extracting a plane of points by index, with no implicit function and no cutter.
+The output is a single StructuredGrid that owns its point and attribute buffers: moving the slice along the same
+axis rewrites these buffers in place, so the mapper and actor that show the slice never need to be recreated."""
+
+# Slice types used by the mesh slicer in View3D are mapped to grid axes: X -> i, Y -> j, Z -> k.
+SLICE_TYPE_AXIS = {"X": 0, "Y": 1, "Z": 2}
+
+
+def is_index_sliceable(entity=None):
+    """True if the entity is a regular grid that can be sliced by index."""
+    return isinstance(entity, (vtkImageData, vtkStructuredGrid))
+
+
+class GridSlice:
+    """Axis-aligned slice of a vtkImageData or vtkStructuredGrid, extracted by index.
+
+    entity is the grid to be sliced, slice_type is "X", "Y" or "Z" (i, j, k axes), and
+    coordinate_property can be "X", "Y" or "Z" to add a point array with that coordinate
+    (used when the entity is shown with a coordinate pseudo-property)."""
+
+    def __init__(self, entity=None, slice_type="X", coordinate_property=None):
+        self.entity = entity
+        self.slice_type = slice_type
+        self.axis = SLICE_TYPE_AXIS[slice_type]
+        self.coordinate_property = coordinate_property
+        self.dimensions = entity.GetDimensions()
+        self.index = None
+        # Shape of the slice plane in VTK point order (the first in-plane axis varies fastest).
+        plane_dimensions = list(self.dimensions)
+        plane_dimensions[self.axis] = 1
+        self._plane_n = plane_dimensions[0] * plane_dimensions[1] * plane_dimensions[2]
+        # Numpy views of the output buffers, kept to be rewritten in place.
+        self._points_buffer = None
+        self._array_buffers = {}
+        self.output = pv_StructuredGrid()
+        self.output.SetDimensions(plane_dimensions)
+
+    def index_from_normalized(self, normalized_position=None):
+        """Convert a normalized position (0 to 1) to a point index along the slice axis."""
+        n = self.dimensions[self.axis]
+        normalized_position = min(max(float(normalized_position), 0.0), 1.0)
+        return int(np_rint(normalized_position * (n - 1)))
+
+    def _plane(self, array=None, index=None):
+        """Return the plane at index from a point array in VTK order, flattened in VTK order.
+        Point arrays are reshaped to (nk, nj, ni, components) without copying."""
+        ni, nj, nk = self.dimensions
+        volume = array.reshape((nk, nj, ni, -1))
+        if self.axis == 0:
+            plane = volume[:, :, index, :]
+        elif self.axis == 1:
+            plane = volume[:, index, :, :]
+        else:
+            plane = volume[index, :, :, :]
+        return plane.reshape((self._plane_n, -1))
+
+    def _plane_points(self, index=None):
+        """Point coordinates of the plane at index, in world coordinates."""
+        if isinstance(self.entity, vtkImageData):
+            # Image data do not store points, so they are computed from the index-to-physical matrix,
+            # that takes into account origin, spacing, extent and direction matrix.
+            extent = self.entity.GetExtent()
+            ranges = [
+                np_arange(extent[0], extent[1] + 1, dtype=np_float64),
+                np_arange(extent[2], extent[3] + 1, dtype=np_float64),
+                np_arange(extent[4], extent[5] + 1, dtype=np_float64),
+            ]
+            ranges[self.axis] = np_array(
+                [extent[2 * self.axis] + index], dtype=np_float64
+            )
+            k, j, i = np_meshgrid(ranges[2], ranges[1], ranges[0], indexing="ij")
+            ijk_h = np_ones((self._plane_n, 4), dtype=np_float64)
+            ijk_h[:, 0] = i.ravel()
+            ijk_h[:, 1] = j.ravel()
+            ijk_h[:, 2] = k.ravel()
+            matrix = self.entity.GetIndexToPhysicalMatrix()
+            matrix = np_array(
+                [[matrix.GetElement(r, c) for c in range(4)] for r in range(4)]
+            )
+            return (ijk_h @ matrix.T)[:, :3]
+        else:
+            points = vtk_to_numpy(self.entity.GetPoints().GetData())
+            return self._plane(points, index)
+
+    def update(self, normalized_position=None):
+        """Move the slice to normalized_position, rewriting the output buffers in place.
+        Returns True if the slice moved, False if it stays on the same grid index."""
+        index = self.index_from_normalized(normalized_position)
+        if index == self.index:
+            return False
+        points = self._plane_points(index)
+        if self._points_buffer is None:
+            self._points_buffer = points.astype(np_float64, copy=True)
+            vtk_points = vtkPoints()
+            vtk_points.SetData(numpy_to_vtk(self._points_buffer, deep=False))
+            self.output.SetPoints(vtk_points)
+        else:
+            np_copyto(self._points_buffer, points)
+            self.output.GetPoints().GetData().Modified()
+            self.output.GetPoints().Modified()
+        point_data = self.entity.GetPointData()
+        for a in range(point_data.GetNumberOfArrays()):
+            vtk_array = point_data.GetArray(a)
+            if vtk_array is None or not vtk_array.GetName():
+                continue
+            name = vtk_array.GetName()
+            plane = self._plane(vtk_to_numpy(vtk_array), index)
+            self._write_array(name, plane)
+        if self.coordinate_property in SLICE_TYPE_AXIS:
+            self._write_array(
+                self.coordinate_property,
+                self._points_buffer[:, SLICE_TYPE_AXIS[self.coordinate_property]],
+            )
+        self.index = index
+        self.output.Modified()
+        return True
+
+    def _write_array(self, name=None, values=None):
+        """Copy values into the output point array called name, creating it only the first time."""
+        if values.ndim == 2 and values.shape[1] == 1:
+            values = values[:, 0]
+        if name not in self._array_buffers:
+            buffer = values.copy()
+            self._array_buffers[name] = buffer
+            vtk_array = numpy_to_vtk(buffer, deep=False)
+            vtk_array.SetName(name)
+            self.output.GetPointData().AddArray(vtk_array)
+        else:
+            np_copyto(self._array_buffers[name], values)
+            self.output.GetPointData().GetArray(name).Modified()
+
+    def data_range(self, name=None):
+        """Range of the property name over the whole entity, used to keep a fixed colormap while slicing."""
+        if name in SLICE_TYPE_AXIS:
+            bounds = self.entity.GetBounds()
+            return (
+                bounds[2 * SLICE_TYPE_AXIS[name]],
+                bounds[2 * SLICE_TYPE_AXIS[name] + 1],
+            )
+        vtk_array = self.entity.GetPointData().GetArray(name)
+        if vtk_array is None:
+            return None
+        return vtk_array.GetRange()
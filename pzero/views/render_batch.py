@@ -0,0 +1,255 @@
+"""render_batch.py
+PZero© Andrea Bistacchi"""
+
+# VTK imports____
+from vtkmodules.vtkCommonDataModel import vtkMultiBlockDataSet
+from vtkmodules.vtkRenderingCore import (
+    vtkActor,
+    vtkCompositeDataDisplayAttributes,
+    vtkCompositePolyDataMapper,
+)
+
+# PZero imports____
+from ..entities_factory import (
+    Attitude,
+    PolyLine,
+    TriSurf,
+    VertexSet,
+    WellTrace,
+    XsPolyLine,
+    XsVertexSet,
+)
+
+"""Batched rendering of many small entities. Entities that share a legend style (collection, line thickness and
+point size) are packed as blocks of a single vtkMultiBlockDataSet, drawn by one composite mapper and one actor,
+so thousands of contacts, traces and attitudes are drawn with a few draw calls instead of one per entity. Colour,
+visibility and opacity are per-block overrides, so changing them for a single entity never rebuilds
+the batch. Blocks are the entity vtk objects themselves, not copies, and a picked block is resolved to its uid
+through the flat block index returned by vtkCellPicker."""
+
+# Collections with entities that can be batched, with a legend for each uid.
+BATCH_COLLECTIONS = ["geol_coll", "fluid_coll", "backgrnd_coll"]
+
+
+def batch_style_key(
+    plot_entity=None,
+    coll_name=None,
+    show_property=None,
+    line_thick=None,
+    point_size=None,
+):
+    """Key of the batch that can draw plot_entity, or None if it must have its own actor. Only entities of
+    geological, fluid and background collections, with a uniform legend colour (no property shown) and with
+    points, are batched. Points and lines/surfaces go to different batches since they are rendered differently,
+    and attitudes have their own batches since, as with their own actor, they cannot be picked.
+    """
+    if coll_name not in BATCH_COLLECTIONS:
+        return None
+    if show_property not in [None, "none", ""]:
+        return None
+    if isinstance(plot_entity, WellTrace):
+        return None
+    if isinstance(plot_entity, (PolyLine, TriSurf, XsPolyLine)):
+        kind = "lines"
+    elif isinstance(plot_entity, Attitude):
+        kind = "attitudes"
+    elif isinstance(plot_entity, (VertexSet, XsVertexSet)):
+        kind = "points"
+    else:
+        return None
+    if plot_entity.GetNumberOfPoints() == 0:
+        return None
+    return coll_name, kind, line_thick, point_size
+
+
+class RenderBatch:
+    """Entities drawn by a single actor with a composite mapper. Block positions of removed entities are left
+    empty and reused, so the flat index of the other blocks never changes."""
+
+    def __init__(self, kind="lines", line_thick=None, point_size=None):
+        self.kind = kind
+        self.dataset = vtkMultiBlockDataSet()
+        self.attributes = vtkCompositeDataDisplayAttributes()
+        self.mapper = vtkCompositePolyDataMapper()
+        self.mapper.SetInputDataObject(self.dataset)
+        self.mapper.SetCompositeDataDisplayAttributes(self.attributes)
+        # Entities are coloured by their legend, never by the active scalars.
+        self.mapper.ScalarVisibilityOff()
+        self.actor = vtkActor()
+        self.actor.SetMapper(self.mapper)
+        actor_property = self.actor.GetProperty()
+        actor_property.SetAmbient(0.0)
+        actor_property.SetDiffuse(1.0)
+        actor_property.SetSpecular(0.0)
+        if line_thick is not None:
+            actor_property.SetLineWidth(line_thick)
+        if point_size is not None:
+            actor_property.SetPointSize(point_size)
+        if kind in ["points", "attitudes"]:
+            actor_property.SetRepresentationToPoints()
+            actor_property.SetRenderPointsAsSpheres(True)
+        self.pickable = kind != "attitudes"
+        self.actor.SetPickable(self.pickable)
+        # Name of the actor in the plotter, set by RenderBatches
+        self.name = None
+        # block position -> uid (None for empty positions) and uid -> block position
+        self.uids = []
+        self.positions = {}
+        self.free_positions = []
+
+    def __len__(self):
+        return len(self.positions)
+
+    def __contains__(self, uid):
+        return uid in self.positions
+
+    def add(self, uid=None, vtk_obj=None, color=None, opacity=1.0, visible=True):
+        """Add the entity as a block, in an empty position if any."""
+        if uid in self.positions:
+            self.replace(uid=uid, vtk_obj=vtk_obj)
+        else:
+            if self.free_positions:
+                position = self.free_positions.pop()
+                self.uids[position] = uid
+            else:
+                position = len(self.uids)
+                self.uids.append(uid)
+            self.positions[uid] = position
+            self.dataset.SetBlock(position, vtk_obj)
+        self.attributes.SetBlockColor(vtk_obj, color)
+        self.attributes.SetBlockOpacity(vtk_obj, opacity)
+        self.attributes.SetBlockVisibility(vtk_obj, bool(visible))
+        self.modified()
+
+    def replace(self, uid=None, vtk_obj=None):
+        """Replace the vtk object of a block, e.g. after the geometry of the entity has been replaced, keeping its
+        position and display attributes."""
+        old_obj = self.block(uid)
+        if old_obj is not vtk_obj:
+            color = [0.0, 0.0, 0.0]
+            self.attributes.GetBlockColor(old_obj, color)
+            opacity = self.attributes.GetBlockOpacity(old_obj)
+            visible = self.attributes.GetBlockVisibility(old_obj)
+            self._remove_attributes(old_obj)
+            self.dataset.SetBlock(self.positions[uid], vtk_obj)
+            self.attributes.SetBlockColor(vtk_obj, color)
+            self.attributes.SetBlockOpacity(vtk_obj, opacity)
+            self.attributes.SetBlockVisibility(vtk_obj, visible)
+        self.modified()
+
+    def remove(self, uid=None):
+        """Remove the block of the entity, leaving its position empty."""
+        position = self.positions.pop(uid)
+        self._remove_attributes(self.dataset.GetBlock(position))
+        self.dataset.SetBlock(position, None)
+        self.uids[position] = None
+        self.free_positions.append(position)
+        self.modified()
+
+    def _remove_attributes(self, vtk_obj=None):
+        self.attributes.RemoveBlockColor(vtk_obj)
+        self.attributes.RemoveBlockOpacity(vtk_obj)
+        self.attributes.RemoveBlockVisibility(vtk_obj)
+
+    def block(self, uid=None):
+        """vtk object drawn for the entity."""
+        return self.dataset.GetBlock(self.positions[uid])
+
+    def set_visibility(self, uid=None, visible=None):
+        self.attributes.SetBlockVisibility(self.block(uid), bool(visible))
+        self.modified()
+
+    def visibility(self, uid=None):
+        return self.attributes.GetBlockVisibility(self.block(uid))
+
+    def set_color(self, uid=None, color=None):
+        self.attributes.SetBlockColor(self.block(uid), color)
+        self.modified()
+
+    def set_opacity(self, uid=None, opacity=None):
+        self.attributes.SetBlockOpacity(self.block(uid), opacity)
+        self.modified()
+
+    def uid_at(self, flat_index=None):
+        """Uid of the block with this flat index, as returned by vtkCellPicker.GetFlatBlockIndex(). The root
+        multiblock has flat index 0 and each block position n has flat index n + 1. The cell picker does not
+        skip hidden blocks, so None is returned for them as for empty positions."""
+        position = flat_index - 1
+        if 0 <= position < len(self.uids):
+            uid = self.uids[position]
+            if uid is not None and self.visibility(uid):
+                return uid
+        return None
+
+    def modified(self):
+        """Mark the mapper as modified, so the batch is redrawn at the next render."""
+        self.mapper.Modified()
+
+
+class RenderBatches:
+    """All batches of a view, by style key, with the batch of each batched uid."""
+
+    def __init__(self):
+        self.batches = {}
+        self.uid_keys = {}
+
+    def __contains__(self, uid):
+        return uid in self.uid_keys
+
+    def batch(self, uid=None):
+        """Batch that draws the entity with this uid."""
+        return self.batches[self.uid_keys[uid]]
+
+    def actor(self, uid=None):
+        """Actor of the batch that draws the entity with this uid, or None if it is not batched."""
+        if uid in self.uid_keys:
+            return self.batch(uid).actor
+        return None
+
+    def actors(self):
+        """Actors of all batches."""
+        return [batch.actor for batch in self.batches.values()]
+
+    def add(
+        self, uid=None, vtk_obj=None, key=None, color=None, opacity=1.0, visible=True
+    ):
+        """Add or update the entity in the batch with this key, moving it from another batch if its style has
+        changed. Returns the batch and True if the batch has been created by this call, so that the view can add
+        its actor to the plotter."""
+        if uid in self.uid_keys and self.uid_keys[uid] != key:
+            self.remove(uid)
+        created = key not in self.batches
+        if created:
+            coll_name, kind, line_thick, point_size = key
+            self.batches[key] = RenderBatch(
+                kind=kind, line_thick=line_thick, point_size=point_size
+            )
+            # Name of the batch actor in the plotter, that cannot clash with uids.
+            self.batches[key].name = "batch_" + "_".join(str(item) for item in key)
+        batch = self.batches[key]
+        batch.add(
+            uid=uid, vtk_obj=vtk_obj, color=color, opacity=opacity, visible=visible
+        )
+        self.uid_keys[uid] = key
+        return batch, created
+
+    def remove(self, uid=None):
+        """Remove the entity from its batch. Returns the batch if it is left empty, so that the view can remove
+        its actor from the plotter, otherwise None."""
+        key = self.uid_keys.pop(uid)
+        batch = self.batches[key]
+        batch.remove(uid)
+        if len(batch) == 0:
+            del self.batches[key]
+            return batch
+        return None
+
+    def uid_from_pick(self, actor=None, flat_index=None):
+        """Uid of the entity picked on a batch actor, or None if actor is not a batch actor."""
+        for batch in self.batches.values():
+            if batch.actor is actor:
+                return batch.uid_at(flat_index)
+        return None
+
+    def is_batch_actor(self, actor=None):
+        return any(batch.actor is actor for batch in self.batches.values())
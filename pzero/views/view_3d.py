@@ -46,7 +46,7 @@ from PySide6.QtWidgets import (
 )
 import time
 from PySide6.QtGui import QAction
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QTimer
 from PySide6.QtCore import Signal as pyqtSignal
 from PySide6.QtWidgets import QWidget
 
@@ -65,6 +65,7 @@ from ..helpers.helper_functions import best_fitting_plane, gen_frame, freeze_gui
 from ..collections.geological_collection import GeologicalCollection
 from ..entities_factory import PolyData, Attitude
 from ..two_d_lines import draw_line_3d
+from .grid_slicer import GridSlice, is_index_sliceable
 
 
 class View3D(ViewVTK):
@@ -288,9 +289,6 @@ class View3D(ViewVTK):
                 "Y": [0, position, 0],
                 "Z": [0, 0, position],
             }[axis]
-            slice_data = pv_entity.slice(normal=normal, origin=origin_vec)
-            if slice_data.n_points <= 0:
-                return
             # Resolve property
             main_uid = self.get_entity_uid_by_name(labeled_name)
             prop_text = enforced_prop
@@ -304,6 +302,23 @@ class View3D(ViewVTK):
                     prop_text = self.actors_df.loc[
                         self.actors_df["uid"] == main_uid, "show_property"
                     ].values[0]
+            grid_slicer = getattr(self, "grid_slicers", {}).get(slice_uid, None)
+            if grid_slicer is not None and grid_slicer.index is not None:
+                # Index-based slice: rebuild it on the same grid index, with the new property.
+                n = grid_slicer.dimensions[grid_slicer.axis]
+                grid_slicer = GridSlice(
+                    entity=entity, slice_type=axis, coordinate_property=prop_text
+                )
+                grid_slicer.update(
+                    self.grid_slicers[slice_uid].index / (n - 1) if n > 1 else 0.0
+                )
+                self.grid_slicers[slice_uid] = grid_slicer
+                slice_data = grid_slicer.output
+            else:
+                grid_slicer = None
+                slice_data = pv_entity.slice(normal=normal, origin=origin_vec)
+            if slice_data.n_points <= 0:
+                return
             # Style
             scalar_array = None
             cmap = None
@@ -312,7 +327,10 @@ class View3D(ViewVTK):
                 color_RGB = self._legend_color_for_uid(main_uid)
             elif prop_text in ["X", "Y", "Z"]:
                 idx = {"X": 0, "Y": 1, "Z": 2}[prop_text]
-                scalar_array = slice_data.points[:, idx]
+                if grid_slicer is not None:
+                    scalar_array = prop_text
+                else:
+                    scalar_array = slice_data.points[:, idx]
                 if (
                     hasattr(self.parent, "prop_legend_df")
                     and self.parent.prop_legend_df is not None
@@ -341,7 +359,13 @@ class View3D(ViewVTK):
                 name=slice_uid,
                 scalars=scalar_array,
                 cmap=cmap,
-                clim=pv_entity.get_data_range(scalar_array) if scalar_array else None,
+                clim=(
+                    grid_slicer.data_range(scalar_array)
+                    if grid_slicer is not None and isinstance(scalar_array, str)
+                    else (
+                        pv_entity.get_data_range(scalar_array) if scalar_array else None
+                    )
+                ),
                 show_scalar_bar=False,
                 opacity=1.0,
                 interpolate_before_map=True,
@@ -442,6 +466,13 @@ class View3D(ViewVTK):
         except Exception:
             pass
 
+    def _render_slices(self):
+        """Render after a slice update, recording how long a frame takes so that slider
+        updates can be throttled to the actual render rate."""
+        start = time.perf_counter()
+        self.plotter.render()
+        self._slice_render_time = time.perf_counter() - start
+
     # ================================  Methods required by ViewVTK(), (re-)implemented here ==========================
 
     def set_orientation_widget(self):
@@ -520,8 +551,9 @@ class View3D(ViewVTK):
         # ].values
         # for actor in visible_actors:
         #     off_screen_plot.add_actor(actor)
-        for uid in self.shown_uids:
-            off_screen_plot.add_actor(self.get_actor_by_uid(uid))
+        # Batched entities share the batch actor, that is added once.
+        for actor in dict.fromkeys(self.render_actor(uid) for uid in self.shown_uids):
+            off_screen_plot.add_actor(actor)
 
         # off_screen_plot.show(auto_close=False)
         n_points = int(opt_dict["fps"] * opt_dict["length"])
@@ -580,6 +612,12 @@ class View3D(ViewVTK):
             set_opt = multiple_input_dialog(
                 title="Create measure set", input_dict=input_dict
             )
+            # Start building kd-trees of the shown DOMs in background, so they are ready at the first pick.
+            for uid in self.shown_uids:
+                if uid in self.parent.dom_coll.get_uids:
+                    self.parent.spatial_index.prefetch(
+                        uid=uid, vtk_obj=self.parent.dom_coll.get_uid_vtk_obj(uid)
+                    )
             self.plotter.enable_point_picking(
                 callback=lambda mesh, pid: self.pkd_point(mesh, pid, set_opt),
                 show_message=False,
@@ -600,18 +638,25 @@ class View3D(ViewVTK):
         sph_r = 0.2  # radius of the selection sphere
         center = mesh.points[pid]
 
-        sphere = vtkSphere()
-        sphere.SetCenter(center)
-        sphere.SetRadius(sph_r)
-
-        extr = vtkExtractPoints()
-
-        extr.SetImplicitFunction(sphere)
-        extr.SetInputData(obj)
-        extr.ExtractInsideOn()
-        extr.Update()
-        #  We could try to do this with vtkPCANormalEstimation
-        points = numpy_support.vtk_to_numpy(extr.GetOutput().GetPoints().GetData())
+        uid = self.get_uid_from_actor(actor=self.plotter.iren.picker.GetActor())
+        if uid in self.parent.dom_coll.get_uids:
+            # Query the kd-tree cached by the project, that is built once and not at every pick.
+            vtk_obj = self.parent.dom_coll.get_uid_vtk_obj(uid)
+            tree = self.parent.spatial_index.kdtree(uid=uid, vtk_obj=vtk_obj)
+            points = vtk_obj.points[tree.query_ball_point(center, sph_r)]
+        else:
+            sphere = vtkSphere()
+            sphere.SetCenter(center)
+            sphere.SetRadius(sph_r)
+
+            extr = vtkExtractPoints()
+
+            extr.SetImplicitFunction(sphere)
+            extr.SetInputData(obj)
+            extr.ExtractInsideOn()
+            extr.Update()
+            #  We could try to do this with vtkPCANormalEstimation
+            points = numpy_support.vtk_to_numpy(extr.GetOutput().GetPoints().GetData())
         plane_c, plane_n = best_fitting_plane(points)
 
         if plane_n[2] > 0:  # If Z is positive flip the normals
@@ -654,9 +699,6 @@ class View3D(ViewVTK):
             # Add to entity collection.
             self.parent.geol_coll.add_entity_from_dict(entity_dict=curr_obj_dict)
 
-            del extr
-            del sphere
-
     def plot_PC_3D(
         self,
         uid=None,
@@ -1607,6 +1649,8 @@ class View3D(ViewVTK):
                             del self.slice_meta[uid]
                     except Exception:
                         pass
+                    if hasattr(self, "grid_slicers"):
+                        self.grid_slicers.pop(uid, None)
                     print(f"Removed slice {uid}")
 
             self.plotter.render()
@@ -1782,6 +1826,8 @@ class View3D(ViewVTK):
             self.slice_actors = {}
             if hasattr(self, "slice_meta"):
                 self.slice_meta = {}
+            # Release the buffers held by index-based grid slices
+            self.grid_slicers = {}
 
             # Force a final render
             self.plotter.render()
@@ -2099,26 +2145,58 @@ class View3D(ViewVTK):
                 print(f"Entity {entity_name} not found")
                 return
 
-            # Determine and persist the current main-mesh property for this entity
-            try:
-                main_uid = self.get_entity_uid_by_name(entity_name)
-                if main_uid is not None:
-                    current_prop = self.actors_df.loc[
-                        self.actors_df["uid"] == main_uid, "show_property"
-                    ].values[0]
-                    if not hasattr(self, "slice_prop_by_entity"):
-                        self.slice_prop_by_entity = {}
-                    self.slice_prop_by_entity[entity_name] = current_prop
-            except Exception:
-                pass
+            # Determine and persist the current main-mesh property for this entity.
+            # Not needed when an existing slice is just moved, so actors_df is not queried while dragging.
+            if not (fast_update and slice_uid in self.slice_actors):
+                try:
+                    main_uid = self.get_entity_uid_by_name(entity_name)
+                    if main_uid is not None:
+                        current_prop = self.actors_df.loc[
+                            self.actors_df["uid"] == main_uid, "show_property"
+                        ].values[0]
+                        if not hasattr(self, "slice_prop_by_entity"):
+                            self.slice_prop_by_entity = {}
+                        self.slice_prop_by_entity[entity_name] = current_prop
+                except Exception:
+                    pass
 
             try:
                 # Convert to PyVista object
                 pv_entity = pv.wrap(entity)
                 bounds = pv_entity.bounds
-
+                grid_slicer = None
+
+                if is_index_sliceable(entity):
+                    # Voxet, XsVoxet and Seismics are sliced by index along i, j, k. On fast updates the
+                    # GridSlice of this slice rewrites in place the buffers already shown by the slice actor.
+                    if not hasattr(self, "grid_slicers"):
+                        self.grid_slicers = {}
+                    grid_slicer = self.grid_slicers.get(slice_uid, None)
+                    if (
+                        fast_update
+                        and slice_uid in self.slice_actors
+                        and grid_slicer is not None
+                        and grid_slicer.entity is entity
+                        and self.slice_actors[slice_uid].GetMapper().GetInput()
+                        is grid_slicer.output
+                    ):
+                        if grid_slicer.update(normalized_position):
+                            if not specific_slice_id:
+                                self._render_slices()
+                        return
+                    prop_text = getattr(self, "slice_prop_by_entity", {}).get(
+                        entity_name, None
+                    )
+                    grid_slicer = GridSlice(
+                        entity=entity,
+                        slice_type=slice_type,
+                        coordinate_property=prop_text,
+                    )
+                    grid_slicer.update(normalized_position)
+                    self.grid_slicers[slice_uid] = grid_slicer
+                    slice_data = grid_slicer.output
                 # Calculate the position in world coordinates
-                if slice_type == "X":
+                elif slice_type == "X":
                     position = bounds[0] + normalized_position * (bounds[1] - bounds[0])
                     slice_data = pv_entity.slice(
                         normal=[1, 0, 0], origin=[position, 0, 0]
@@ -2230,7 +2308,11 @@ class View3D(ViewVTK):
                             elif current_prop in ["X", "Y", "Z"]:
                                 # derive from slice geometry
                                 idx = {"X": 0, "Y": 1, "Z": 2}[current_prop]
-                                scalar_array = slice_data.points[:, idx]
+                                if grid_slicer is not None:
+                                    # GridSlice keeps coordinate arrays updated in place
+                                    scalar_array = current_prop
+                                else:
+                                    scalar_array = slice_data.points[:, idx]
                                 if (
                                     hasattr(self.parent, "prop_legend_df")
                                     and self.parent.prop_legend_df is not None
@@ -2263,16 +2345,20 @@ class View3D(ViewVTK):
                         self.plotter.remove_actor(self.slice_actors[slice_uid])
 
                     # Create a new actor with the latest scalar properties
+                    if grid_slicer is not None and isinstance(scalar_array, str):
+                        clim = grid_slicer.data_range(scalar_array)
+                    else:
+                        clim = (
+                            pv_entity.get_data_range(scalar_array)
+                            if scalar_array
+                            else None
+                        )
                     self.slice_actors[slice_uid] = self.plotter.add_mesh(
                         slice_data,
                         name=slice_uid,
                         scalars=scalar_array,
                         cmap=cmap,
-                        clim=(
-                            pv_entity.get_data_range(scalar_array)
-                            if scalar_array
-                            else None
-                        ),
+                        clim=clim,
                         show_scalar_bar=False,
                         opacity=1.0,
                         interpolate_before_map=True,
@@ -2293,7 +2379,7 @@ class View3D(ViewVTK):
                 # Manipulation callbacks often trigger many updates quickly; render once at the end.
                 # Let the calling function (toggle_multi_manipulation or slider change) handle final render.
                 if not fast_update or not specific_slice_id:
-                    self.plotter.render()
+                    self._render_slices()
 
             except Exception as e:
                 print(f"Error updating slice {slice_uid}: {e}")
@@ -2475,9 +2561,17 @@ class View3D(ViewVTK):
             if not entity_name:
                 return
 
-            # Throttle updates for smoother performance
+            # Throttle updates to the render rate. Instead of dropping the event, the latest slider
+            # is applied once the previous frame has been rendered, so the slice always ends where the
+            # slider is released.
             current_time = time.time()
-            if current_time - self.last_slider_update < slider_throttle:
+            throttle = max(slider_throttle, getattr(self, "_slice_render_time", 0.0))
+            if current_time - self.last_slider_update < throttle:
+                self._pending_slider = slider_type
+                if not getattr(self, "_pending_slider_scheduled", False):
+                    self._pending_slider_scheduled = True
+                    delay = throttle - (current_time - self.last_slider_update)
+                    QTimer.singleShot(max(1, int(delay * 1000)), flush_pending_slider)
                 return
 
             try:
@@ -2510,6 +2604,14 @@ class View3D(ViewVTK):
             finally:
                 self._updating_visualization = False
 
+        def flush_pending_slider():
+            """Apply the last slider event received while throttled."""
+            self._pending_slider_scheduled = False
+            pending_slider = getattr(self, "_pending_slider", None)
+            self._pending_slider = None
+            if pending_slider is not None:
+                on_slider_changed(pending_slider)
+
         def initialize_entity_controls(entity_name):
             """Initialize controls when a new entity is selected."""
             if not entity_name:
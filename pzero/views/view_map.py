@@ -7,11 +7,7 @@ from PySide6.QtGui import QAction
 # Numpy imports____
 from numpy import ndarray as np_ndarray
 
-# VTK imports____
-from vtkmodules.vtkFiltersCore import vtkAppendPolyData
-
 # PyVista imports____
-from pyvista import Line as pv_Line
 from pyvista import PointSet as pv_PointSet
 
 # PZero imports____
@@ -32,7 +28,6 @@ from ..entities_factory import (
     WellTrace,
     Attitude,
 )
-from ..orientation_analysis import get_dip_dir_vectors
 from ..collections.xsection_collection import section_from_strike
 from ..collections.boundary_collection import (
     boundary_from_points,
@@ -89,6 +84,12 @@ class ViewMap(View2D):
         """Show actor with scalar property (default None)
         https://github.com/pyvista/pyvista/blob/140b15be1d4021b81ded46b1c212c70e86a98ee7/pyvista/plotting/plotting.py#L1045
         """
+        # Entities that can be batched are drawn by the batch actor for their legend style.
+        batch_actor = self.show_in_batch(
+            uid=uid, coll_name=coll_name, show_property=show_property, visible=visible
+        )
+        if batch_actor is not None:
+            return batch_actor
         # ___________________________________________________see if this reimplementation from VTKView can be avoided
         # First get the vtk object from its collection.
         if show_property:
@@ -213,26 +214,17 @@ class ViewMap(View2D):
                         show_property = None
                         style = "surface"
                         smooth_shading = True
-                        appender = vtkAppendPolyData()
                         r = (
                             self.parent.geol_coll.get_uid_legend(uid=uid)["point_size"]
                             * 4
                         )
-                        normals = plot_entity.get_point_data("Normals")
-                        az_vectors, dir_vectors = get_dip_dir_vectors(
-                            normals=normals, az=True
+                        # glyph lines in map view, shared by all map views, see render_cache.py
+                        plot_entity = self.parent.render_cache.get(
+                            uid=uid,
+                            vtk_obj=plot_entity,
+                            kind="normal_map_glyphs",
+                            params=(r,),
                         )
-                        # glyph lines in map view
-                        line1 = pv_Line(pointa=(0, 0, 0), pointb=(r, 0, 0))
-                        line2 = pv_Line(pointa=(-r, 0, 0), pointb=(r, 0, 0))
-
-                        az_glyph = plot_entity.glyph(geometry=line1, prop=az_vectors)
-                        dir_glyph = plot_entity.glyph(geometry=line2, prop=dir_vectors)
-
-                        appender.AddInputData(az_glyph)
-                        appender.AddInputData(dir_glyph)
-                        appender.Update()
-                        plot_entity = appender.GetOutput()
                     else:
                         show_property = plot_entity.get_point_data(original_prop)[
                             :, comp_index
@@ -242,22 +234,14 @@ class ViewMap(View2D):
                     show_property = None
                     style = "surface"
                     smooth_shading = True
-                    appender = vtkAppendPolyData()
                     r = self.parent.geol_coll.get_uid_legend(uid=uid)["point_size"] * 4
-                    normals = plot_entity.get_point_data("Normals")
-                    az_vectors, dir_vectors = get_dip_dir_vectors(
-                        normals=normals, az=True
+                    # Glyph lines shared by all map views, see render_cache.py
+                    plot_entity = self.parent.render_cache.get(
+                        uid=uid,
+                        vtk_obj=plot_entity,
+                        kind="normal_map_glyphs",
+                        params=(r,),
                     )
-                    line1 = pv_Line(pointa=(0, 0, 0), pointb=(r, 0, 0))
-                    line2 = pv_Line(pointa=(-r, 0, 0), pointb=(r, 0, 0))
-
-                    az_glyph = plot_entity.glyph(geometry=line1, prop=az_vectors)
-                    dir_glyph = plot_entity.glyph(geometry=line2, prop=dir_vectors)
-
-                    appender.AddInputData(az_glyph)
-                    appender.AddInputData(dir_glyph)
-                    appender.Update()
-                    plot_entity = appender.GetOutput()
 
                 elif show_property == "name":
                     point = plot_entity.points
@@ -348,6 +332,7 @@ class ViewMap(View2D):
                 )
         elif isinstance(plot_entity, PCDom):
             plot_rgb_option = None
+            color_bar_range = None
             new_plot = pv_PointSet()
             new_plot.ShallowCopy(plot_entity)  # this is temporary
             file = self.parent.dom_coll.df.loc[
@@ -360,7 +345,9 @@ class ViewMap(View2D):
                 if show_property == "none" or show_property is None:
                     pass
                 elif show_property == self.RGB_TOTAL_PROPERTY:
-                    show_property_value = self._get_point_cloud_rgb_total(plot_entity)
+                    show_property_value = self.parent.render_cache.get(
+                        uid=uid, vtk_obj=plot_entity, kind="rgb_total"
+                    )
                     if show_property_value is not None:
                         plot_rgb_option = True
                 elif show_property == "X":
@@ -399,12 +386,20 @@ class ViewMap(View2D):
                         # Get the n of components for the given property. If it's > 1 then treat it as RGB(A).
                         if n_comp > 1:
                             plot_rgb_option = True
+                        else:
+                            # The range of large point clouds is computed once for all views.
+                            color_bar_range = self.parent.render_cache.get(
+                                uid=uid,
+                                vtk_obj=plot_entity,
+                                kind="scalar_range",
+                                params=(show_property,),
+                            )
             this_actor = self.plot_PC_3D(
                 uid=uid,
                 plot_entity=new_plot,
                 color_RGB=color_RGB,
                 show_property=show_property_value,
-                color_bar_range=None,
+                color_bar_range=color_bar_range,
                 show_property_title=show_property_title,
                 plot_rgb_option=plot_rgb_option,
                 visible=visible,
@@ -418,7 +413,7 @@ class ViewMap(View2D):
             if show_property == "none" or show_property is None:
                 plot_texture_option = None
             else:
-                plot_texture_option = plot_entity.texture
+                plot_texture_option = self.image_texture(plot_entity)
             this_actor = self.plot_mesh(
                 uid=uid,
                 plot_entity=plot_entity.frame,
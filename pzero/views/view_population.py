@@ -0,0 +1,151 @@
+"""view_population.py
+PZero© Andrea Bistacchi"""
+
+from numpy import argsort as np_argsort
+from numpy import array as np_array
+from numpy import ceil as np_ceil
+from numpy import isfinite as np_isfinite
+from numpy import maximum as np_maximum
+
+from vtkmodules.util.numpy_support import numpy_to_vtk, numpy_to_vtkIdTypeArray
+from vtkmodules.vtkCommonCore import vtkPoints
+from vtkmodules.vtkCommonDataModel import vtkCellArray, vtkPolyData
+
+from numpy.linalg import norm as np_linalg_norm
+
+from ..entities_factory import PCDom
+
+"""Progressive population of VTK views. When a view is opened, every entity is first drawn with a cheap
+placeholder, the outline of its bounding box or, for large point clouds, a regular subsample of its points.
+Actors are then built in short time slices run by the Qt event loop, so the view can be rendered and the camera
+moved while actors are still being added. Entities are built in order of their current size on screen, so the
+largest entities in the current view appear first."""
+
+# Maximum number of points in the proxy of a point cloud.
+PROXY_POINTS = 20000
+
+# Corners of a unit box and edges of its outline, as indexes in the corners.
+_BOX_CORNERS = np_array(
+    [[i & 1, (i >> 1) & 1, (i >> 2) & 1] for i in range(8)], dtype=float
+)
+_BOX_EDGES = np_array(
+    [
+        [0, 1],
+        [2, 3],
+        [4, 5],
+        [6, 7],
+        [0, 2],
+        [1, 3],
+        [4, 6],
+        [5, 7],
+        [0, 4],
+        [1, 5],
+        [2, 6],
+        [3, 7],
+    ]
+)
+
+
+def bounds_outline(bounds=None):
+    """vtkPolyData with the 12 edges of the box with these bounds (xmin, xmax, ymin, ymax, zmin, zmax)."""
+    bounds = np_array(bounds, dtype=float).reshape(3, 2)
+    corners = bounds[:, 0] + _BOX_CORNERS * (bounds[:, 1] - bounds[:, 0])
+    points = vtkPoints()
+    points.SetData(numpy_to_vtk(corners, deep=True))
+    lines = vtkCellArray()
+    lines.SetData(
+        numpy_to_vtkIdTypeArray(np_array(range(0, 25, 2)), deep=True),
+        numpy_to_vtkIdTypeArray(_BOX_EDGES.ravel(), deep=True),
+    )
+    outline = vtkPolyData()
+    outline.SetPoints(points)
+    outline.SetLines(lines)
+    return outline
+
+
+def points_proxy(points=None, max_points=PROXY_POINTS):
+    """vtkPolyData with a regular subsample of at most max_points points, as vertices."""
+    step = int(np_ceil(len(points) / max_points))
+    subsample = points[::step]
+    n_points = len(subsample)
+    vtk_points = vtkPoints()
+    vtk_points.SetData(numpy_to_vtk(subsample, deep=True))
+    verts = vtkCellArray()
+    verts.SetData(
+        numpy_to_vtkIdTypeArray(np_array(range(n_points + 1)), deep=True),
+        numpy_to_vtkIdTypeArray(np_array(range(n_points)), deep=True),
+    )
+    proxy = vtkPolyData()
+    proxy.SetPoints(vtk_points)
+    proxy.SetVerts(verts)
+    return proxy
+
+
+def valid_bounds(vtk_obj=None):
+    """Bounds of vtk_obj, or None if it is empty or has no bounds."""
+    try:
+        if vtk_obj.GetNumberOfPoints() == 0:
+            return None
+        bounds = vtk_obj.GetBounds()
+    except Exception:
+        return None
+    if not all(np_isfinite(bounds)) or bounds[0] > bounds[1]:
+        return None
+    return bounds
+
+
+def entity_proxy(vtk_obj=None, bounds=None, max_points=PROXY_POINTS):
+    """Low-resolution proxy drawn until the actor of the entity is built: a subsample of large point clouds,
+    otherwise the outline of the bounding box."""
+    if isinstance(vtk_obj, PCDom) and vtk_obj.GetNumberOfPoints() > max_points:
+        return points_proxy(points=vtk_obj.points, max_points=max_points)
+    return bounds_outline(bounds)
+
+
+class PopulationQueue:
+    """Entities waiting for their actor, with the centre and diagonal of their bounding box, used to pick the
+    entities that are largest on screen first."""
+
+    def __init__(self):
+        self.uids = []
+        self.coll_names = []
+        self.bounds = []
+
+    def __len__(self):
+        return len(self.uids)
+
+    def add(self, uid=None, coll_name=None, bounds=None):
+        self.uids.append(uid)
+        self.coll_names.append(coll_name)
+        self.bounds.append(bounds)
+
+    def footprints(self, camera_position=None, parallel_projection=False):
+        """Size on screen of each entity, up to a constant factor: the diagonal of the bounding box, divided by
+        its distance from the camera with perspective projection."""
+        bounds = np_array(self.bounds, dtype=float).reshape(-1, 3, 2)
+        diagonals = np_linalg_norm(bounds[:, :, 1] - bounds[:, :, 0], axis=1)
+        if parallel_projection or camera_position is None:
+            return diagonals
+        centers = bounds.mean(axis=2)
+        distances = np_linalg_norm(centers - np_array(camera_position), axis=1)
+        # Entities around the camera are as large as the view.
+        return diagonals / np_maximum(distances, diagonals / 2 + 1e-12)
+
+    def pop_largest(self, camera_position=None, parallel_projection=False):
+        """Remove all entities from the queue and return their (uid, collection name, bounds) entries, from the
+        largest on screen to the smallest. Entries not built in a time slice are put back with add().
+        """
+        if not self.uids:
+            return []
+        order = np_argsort(
+            -self.footprints(
+                camera_position=camera_position,
+                parallel_projection=parallel_projection,
+            ),
+            kind="stable",
+        )
+        entries = [
+            (self.uids[i], self.coll_names[i], self.bounds[i]) for i in order.tolist()
+        ]
+        self.uids, self.coll_names, self.bounds = [], [], []
+        return entries
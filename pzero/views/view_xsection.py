@@ -48,6 +48,7 @@ class ViewXsection(View2D):
         # Set a filter for entities belonging to this cross-section.
         # Note that in past releases this filter was not returning the cross-section itself.
         # This is now fixed since cross-sections have their own uid as parent_uid.
+        # Entities are actually selected with the parent index of the project, see view_uids().
         self.view_filter = (
             f'parent_uid.str.contains("{self.this_x_section_uid}", na=False)'
         )
@@ -83,6 +84,17 @@ class ViewXsection(View2D):
         self.fitFrameButton.triggered.connect(self.fit_frame)
         self.menuModify.addAction(self.fitFrameButton)
 
+    def view_uids(self, collection=None) -> list:
+        """Uids of the entities of a collection belonging to this cross-section, from the parent index."""
+        return self.parent.parent_index.children(
+            parent_uid=self.this_x_section_uid, collection=collection
+        )
+
+    def filter_view_uids(self, collection=None, uids=None) -> list:
+        """Uids in the list that belong to this cross-section, from the parent index."""
+        children = set(self.view_uids(collection=collection))
+        return [uid for uid in uids if uid in children]
+
     # # --- AGGIUNTA: funzione di slot per sincronizzazione selezione ---
     # def on_selection_changed(self, collection):
     #     print("DEBUG SLOT: selection_changed ricevuto per collection:", collection)
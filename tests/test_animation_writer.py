@@ -0,0 +1,179 @@
+"""
+test_animation_writer.py
+PZero© Andrea Bistacchi
+
+How to run
+----------
+    pytest test_animation_writer.py -v
+
+Or together with all other tests:
+
+    pytest -v
+
+"""
+
+import tracemalloc
+
+import numpy as np
+from PIL import Image, ImageSequence
+
+from pzero.helpers.animation_writer import (
+    StreamingGifWriter,
+    PngSequenceWriter,
+    build_shared_palette,
+    open_animation_writer,
+)
+
+# =============================================================================
+# HELPERS
+# =============================================================================
+
+
+def _make_frame(i: int, width: int = 320, height: int = 240) -> np.ndarray:
+    """
+    Return a synthetic RGB frame with a colour gradient and a moving square,
+    similar to a rendered view with a few coloured objects.
+    """
+    frame = np.zeros((height, width, 3), dtype=np.uint8)
+    frame[:, :, 0] = np.linspace(0, 255, width, dtype=np.uint8)[None, :]
+    frame[:, :, 1] = (i * 7) % 256
+    x0 = (i * 5) % (width - 40)
+    frame[height // 3 : height // 2, x0 : x0 + 40] = [255, 255, 255]
+    return frame
+
+
+def _peak_memory_writing(tmp_path, n_frames: int, palette=None) -> int:
+    """
+    Stream n_frames synthetic frames to a GIF and return the peak traced memory.
+    Frames are generated on the fly, as when they are rendered by the export dialog.
+    """
+    tracemalloc.start()
+    with StreamingGifWriter(
+        file_path=str(tmp_path / f"anim_{n_frames}.gif"),
+        fps=10,
+        palette=palette,
+        workers=2,
+    ) as writer:
+        for i in range(n_frames):
+            writer.add_frame(_make_frame(i))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+# =============================================================================
+# TEST CLASS
+# =============================================================================
+
+
+class TestStreamingGifWriter:
+    """
+    Tests for StreamingGifWriter defined in helpers/animation_writer.py.
+    """
+
+    def test_frames_round_trip(self, tmp_path):
+        """
+        Each decoded frame must be identical to the frame quantized by Pillow,
+        i.e. the streaming container does not alter the encoded image data.
+        """
+        frames = [_make_frame(i, 80, 60) for i in range(6)]
+        path = tmp_path / "round_trip.gif"
+        with open_animation_writer(file_path=str(path), fps=20) as writer:
+            for frame in frames:
+                writer.add_frame(frame)
+
+        gif = Image.open(path)
+        assert gif.n_frames == len(frames)
+        assert gif.info["loop"] == 0
+        assert gif.info["duration"] == 50
+        for frame, decoded in zip(frames, ImageSequence.Iterator(gif)):
+            expected = Image.fromarray(frame).quantize(
+                colors=256,
+                method=Image.Quantize.MEDIANCUT,
+                dither=Image.Dither.FLOYDSTEINBERG,
+            )
+            assert np.array_equal(
+                np.asarray(decoded.convert("RGB")), np.asarray(expected.convert("RGB"))
+            )
+
+    def test_shared_palette(self, tmp_path):
+        """
+        With a shared palette all frames are mapped to the same colours,
+        written once in the global color table.
+        """
+        frames = [_make_frame(i, 80, 60) for i in range(6)]
+        palette = build_shared_palette(frames[::2])
+        path = tmp_path / "shared.gif"
+        with open_animation_writer(
+            file_path=str(path), fps=10, palette=palette
+        ) as writer:
+            for frame in frames:
+                writer.add_frame(frame)
+
+        palette_colors = {
+            tuple(palette.getpalette()[i : i + 3])
+            for i in range(0, len(palette.getpalette()), 3)
+        }
+        gif = Image.open(path)
+        assert gif.n_frames == len(frames)
+        for decoded in ImageSequence.Iterator(gif):
+            colors = np.unique(
+                np.asarray(decoded.convert("RGB")).reshape(-1, 3), axis=0
+            )
+            assert all(tuple(color) in palette_colors for color in colors)
+
+    def test_memory_stays_flat(self, tmp_path):
+        """
+        Peak memory must not grow with the number of frames, since each frame
+        is encoded and written as soon as it is added.
+        """
+        peak_short = _peak_memory_writing(tmp_path, 10)
+        peak_long = _peak_memory_writing(tmp_path, 80)
+        # Keeping all frames in memory would make the long run ~8x larger.
+        assert peak_long < 1.5 * peak_short
+
+    def test_abort(self, tmp_path):
+        """
+        Aborting releases the encoder and leaves a readable partial GIF, and aborting
+        after close, as done when the export fails later, does not rewrite the output.
+        """
+        path = tmp_path / "aborted.gif"
+        writer = StreamingGifWriter(file_path=str(path), fps=10, workers=2)
+        for i in range(4):
+            writer.add_frame(_make_frame(i, 80, 60))
+        writer.abort()
+        assert writer._executor._shutdown
+        assert Image.open(path).n_frames <= 4
+
+        path = tmp_path / "closed.gif"
+        writer = StreamingGifWriter(file_path=str(path), fps=10, workers=2)
+        for i in range(4):
+            writer.add_frame(_make_frame(i, 80, 60))
+        writer.close()
+        size = path.stat().st_size
+        writer.abort()
+        assert path.stat().st_size == size
+        assert Image.open(path).n_frames == 4
+
+
+class TestPngSequenceWriter:
+    """
+    Tests for PngSequenceWriter defined in helpers/animation_writer.py.
+    """
+
+    def test_numbered_files(self, tmp_path):
+        """
+        Each frame is written to its own numbered PNG file, in frame order.
+        """
+        frames = [_make_frame(i, 80, 60) for i in range(5)]
+        with PngSequenceWriter(file_path=str(tmp_path / "seq.png")) as writer:
+            for frame in frames:
+                writer.add_frame(frame)
+
+        assert writer.frames_written == len(frames)
+        assert writer.file_paths == [
+            str(tmp_path / f"seq_{i:04d}.png") for i in range(len(frames))
+        ]
+        for i, frame in enumerate(frames):
+            decoded = np.asarray(Image.open(tmp_path / f"seq_{i:04d}.png"))
+            assert np.array_equal(decoded, frame)
@@ -0,0 +1,375 @@
+"""
+test_autosave.py
+PZero© Andrea Bistacchi
+
+How to run
+----------
+    pytest test_autosave.py -v
+
+Or together with all other tests:
+
+    pytest -v
+
+"""
+
+import os
+from copy import deepcopy
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+from pandas import DataFrame as pd_DataFrame
+from pyvista import StructuredGrid as pv_StructuredGrid
+from pyvista import wrap as pv_wrap
+
+from pzero.collections.background_collection import BackgroundCollection
+from pzero.collections.boundary_collection import BoundaryCollection
+from pzero.collections.dom_collection import DomCollection
+from pzero.collections.fluid_collection import FluidCollection
+from pzero.collections.geological_collection import GeologicalCollection
+from pzero.collections.image_collection import ImageCollection
+from pzero.collections.mesh3d_collection import Mesh3DCollection
+from pzero.collections.well_collection import WellCollection
+from pzero.collections.xsection_collection import XSectionCollection
+from pzero.entities_factory import DEM, PCDom, PolyLine
+from pzero.helpers.autosave import (
+    INFO_FILE,
+    KEEP_SNAPSHOTS,
+    MAX_INTERVAL,
+    MIN_INTERVAL,
+    LOCK_FILE,
+    REVISION_TABLES,
+    SESSION_PREFIX,
+    SNAPSHOT_PREFIX,
+    TMP_PREFIX,
+    VOLUME_THRESHOLD,
+    AutosaveService,
+    close_session,
+    dead_sessions,
+    is_alive,
+    latest_snapshot,
+    list_snapshots,
+    open_session,
+    read_info,
+    write_snapshot,
+)
+from pzero.helpers.project_container import (
+    MANIFEST_FILE,
+    STORAGE_CONTAINER,
+    RevisionReader,
+    RevisionWriter,
+)
+from pzero.legend_manager import Legend
+
+# =============================================================================
+# HELPERS
+# =============================================================================
+
+
+def _make_project():
+    """Mock project with real (empty) collections and legend tables, as built by create_empty."""
+    project = MagicMock()
+    project.out_file_name = "/data/project.p0"
+    with patch("pzero.collections.AbstractCollection.BaseTableModel"):
+        project.geol_coll = GeologicalCollection(parent=project)
+        project.xsect_coll = XSectionCollection(parent=project)
+        project.dom_coll = DomCollection(parent=project)
+        project.image_coll = ImageCollection(parent=project)
+        project.mesh3d_coll = Mesh3DCollection(parent=project)
+        project.boundary_coll = BoundaryCollection(parent=project)
+        project.well_coll = WellCollection(parent=project)
+        project.fluid_coll = FluidCollection(parent=project)
+        project.backgrnd_coll = BackgroundCollection(parent=project)
+    project.geol_coll.legend_df = pd_DataFrame([Legend.geol_legend_dict])
+    project.fluid_coll.legend_df = pd_DataFrame([Legend.fluids_legend_dict])
+    project.backgrnd_coll.legend_df = pd_DataFrame([Legend.backgrounds_legend_dict])
+    project.well_legend_df = pd_DataFrame([Legend.well_legend_dict])
+    project.others_legend_df = pd_DataFrame(deepcopy(Legend.others_legend_dict))
+    project.prop_legend_df = pd_DataFrame(
+        {"property_name": ["intensity"], "colormap": ["viridis"]}
+    )
+    return project
+
+
+def _add_entity(collection=None, name=None, topology=None, vtk_obj=None) -> str:
+    entity_dict = deepcopy(collection.entity_dict)
+    entity_dict.update(name=name, topology=topology, vtk_obj=vtk_obj)
+    with patch("pzero.collections.AbstractCollection.BaseTableModel"):
+        return collection.add_entity_from_dict(entity_dict=entity_dict)
+
+
+def _make_polyline(n_points: int = 50) -> PolyLine:
+    line = PolyLine()
+    points = np.zeros((n_points, 3))
+    points[:, 0] = np.arange(n_points)
+    line.points = points
+    line.auto_cells()
+    return line
+
+
+def _make_dem(nx: int = 30, ny: int = 20) -> DEM:
+    xx, yy = np.meshgrid(np.arange(nx) * 10.0, np.arange(ny) * 10.0)
+    temp_obj = pv_StructuredGrid(xx, yy, 0.1 * xx)
+    dem = DEM()
+    dem.ShallowCopy(temp_obj)
+    return dem
+
+
+def _make_point_cloud(n_points: int = 200000, seed: int = 0) -> PCDom:
+    rng = np.random.default_rng(seed)
+    point_cloud = PCDom()
+    point_cloud.points = rng.uniform(0.0, 1000.0, (n_points, 3))
+    point_cloud.generate_cells()
+    point_cloud.set_point_data("intensity", rng.uniform(0.0, 1.0, n_points))
+    return point_cloud
+
+
+def _populated_project():
+    project = _make_project()
+    uids = {
+        "line": _add_entity(project.geol_coll, "line", "PolyLine", _make_polyline()),
+        "dem": _add_entity(project.dom_coll, "dem", "DEM", _make_dem()),
+        "pc": _add_entity(
+            project.dom_coll, "pc", "PCDom", _make_point_cloud(n_points=1000)
+        ),
+    }
+    return project, uids
+
+
+def _points(vtk_obj=None):
+    return np.array(pv_wrap(vtk_obj).points)
+
+
+def _make_session_dir(autosave_dir=None, name=None):
+    """Folder of a session that crashed, with a lock file that no process holds."""
+    dir_name = autosave_dir / (SESSION_PREFIX + name)
+    dir_name.mkdir()
+    (dir_name / LOCK_FILE).write_text("999999")
+    return dir_name
+
+
+def _make_snapshot_dir(session_dir=None, stamp=None, complete=True):
+    """Folder of a snapshot with a given stamp, complete or left by an interrupted write."""
+    prefix = SNAPSHOT_PREFIX if complete else TMP_PREFIX
+    dir_name = session_dir / (prefix + stamp)
+    dir_name.mkdir()
+    (dir_name / MANIFEST_FILE).write_text("{}")
+    if complete:
+        (dir_name / INFO_FILE).write_text(
+            f'{{"project_file": "", "time": "{stamp}", "stamp": "{stamp}"}}'
+        )
+    return dir_name
+
+
+# =============================================================================
+# TEST CLASS
+# =============================================================================
+
+
+class TestAutosave:
+    """
+    Tests for the background autosave defined in helpers/autosave.py
+    and used by ProjectWindow.
+    """
+
+    def test_snapshot_isolation(self, tmp_path):
+        """Snapshots are not affected by later edits, and only changed entities are copied after the first one."""
+        project, uids = _populated_project()
+        service = AutosaveService(project=project, autosave_dir=str(tmp_path))
+        line = project.geol_coll.get_uid_vtk_obj(uids["line"])
+        original = _points(line)
+
+        snapshot = service.take_snapshot()
+        assert snapshot.copied_uids == set(uids.values())
+        assert set(snapshot.tables) == set(REVISION_TABLES)
+        assert "vtk_obj" not in snapshot.tables["geological_table"].columns
+        # Edits after the snapshot, in the entity and in the tables, do not reach it.
+        line.points[:, 2] = 100.0
+        line.Modified()
+        project.geol_coll.df.loc[0, "name"] = "renamed"
+        service.entities_changed(uids=[uids["line"]], collection=project.geol_coll)
+        out_dir_name = write_snapshot(snapshot=snapshot, session_dir=str(tmp_path))
+        revision = RevisionReader(dir_name=out_dir_name)
+        assert revision.storage == STORAGE_CONTAINER
+        assert np.allclose(
+            _points(revision.read_entity(uid=uids["line"], extension=".vtp")),
+            original,
+        )
+        assert list(revision.read_table("geological_table", dtype=None)["name"]) == [
+            "line"
+        ]
+        assert read_info(out_dir_name)["project_file"] == "/data/project.p0"
+        del revision
+
+        # The next snapshot copies the changed entity only, also when edited in place without signals.
+        service.base_dir = out_dir_name
+        dem = project.dom_coll.get_uid_vtk_obj(uids["dem"])
+        dem.points[:, 2] += 1.0
+        dem.Modified()
+        snapshot = service.take_snapshot()
+        assert snapshot.copied_uids == {uids["line"], uids["dem"]}
+        out_dir_name = write_snapshot(snapshot=snapshot, session_dir=str(tmp_path))
+        revision = RevisionReader(dir_name=out_dir_name)
+        for uid, extension, collection in [
+            (uids["line"], ".vtp", project.geol_coll),
+            (uids["dem"], ".vts", project.dom_coll),
+            (uids["pc"], ".vtp", project.dom_coll),
+        ]:
+            assert np.allclose(
+                _points(revision.read_entity(uid=uid, extension=extension)),
+                _points(collection.get_uid_vtk_obj(uid)),
+            )
+        assert service.take_snapshot().copied_uids == set()
+
+    def test_throttling(self, tmp_path):
+        """Snapshots are taken when the change volume is large, or after MAX_INTERVAL, never more than one at a time."""
+        project, uids = _populated_project()
+        service = AutosaveService(project=project, autosave_dir=str(tmp_path))
+        service.reset()
+        start = service._last_save_time
+        assert not service.is_due(now=start + 10 * MAX_INTERVAL)
+        # Small changes wait for MAX_INTERVAL.
+        service.tables_changed(uids=[uids["line"]], collection=project.geol_coll)
+        assert service.volume == 1
+        assert not service.is_due(now=start + MIN_INTERVAL)
+        assert service.is_due(now=start + MAX_INTERVAL)
+        # Large changes are saved after MIN_INTERVAL, counting the points of the entities.
+        service.entities_changed(uids=[uids["pc"]], collection=project.dom_coll)
+        assert service.volume == 1 + 1000
+        service.volume += VOLUME_THRESHOLD
+        assert not service.is_due(now=start + MIN_INTERVAL / 2)
+        assert service.is_due(now=start + MIN_INTERVAL)
+        # The interval grows with the time taken to write the last snapshot.
+        service.last_duration = MAX_INTERVAL
+        assert service.interval() > MAX_INTERVAL
+        assert not service.is_due(now=start + MAX_INTERVAL)
+        service.last_duration = 0.0
+
+        # Snapshots are written in background, and no snapshot is taken while one is being written.
+        service.tick(now=start + MAX_INTERVAL)
+        assert service.is_writing and not service.pending
+        service.entities_changed(uids=[uids["line"]], collection=project.geol_coll)
+        service.volume += VOLUME_THRESHOLD
+        assert not service.is_due(now=start + 10 * MAX_INTERVAL)
+        out_dir_name = service.collect(wait=True)
+        assert service.base_dir == out_dir_name
+        session_dir = service.session_dir
+        assert list_snapshots(session_dir) == [out_dir_name]
+        assert service.is_due(now=start + 10 * MAX_INTERVAL)
+        service.stop(clear=True)
+        assert os.listdir(tmp_path) == []
+
+    def test_recovery(self, tmp_path):
+        """Recovery picks the latest complete snapshot of crashed sessions, failed writes keep changes pending, old snapshots are removed."""
+        crashed = _make_session_dir(tmp_path, "2026-01-01-09-00-00-000000_100")
+        _make_snapshot_dir(crashed, "2026-01-01-10-00-00-000000-000001")
+        other_crashed = _make_session_dir(tmp_path, "2026-01-01-09-30-00-000000_200")
+        latest = _make_snapshot_dir(other_crashed, "2026-01-01-11-00-00-000000-000002")
+        # Interrupted writes and snapshots without info are ignored.
+        _make_snapshot_dir(crashed, "2026-01-01-12-00-00-000000-000003", False)
+        (crashed / (SNAPSHOT_PREFIX + "2026-01-01-13-00-00-000000-000004")).mkdir()
+        # Snapshots of a session still running are neither offered nor removed.
+        running_dir, running_lock = open_session(str(tmp_path))
+        running_snapshot = _make_snapshot_dir(
+            tmp_path / os.path.basename(running_dir),
+            "2026-01-01-14-00-00-000000-000001",
+        )
+        assert is_alive(running_dir)
+        assert dead_sessions(str(tmp_path)) == [str(crashed), str(other_crashed)]
+        assert latest_snapshot(str(tmp_path)) == str(latest)
+        assert latest_snapshot(str(tmp_path / "missing")) is None
+
+        # Resetting on the recovered snapshot removes the other crashed sessions.
+        project, uids = _populated_project()
+        service = AutosaveService(project=project, autosave_dir=str(tmp_path))
+        service.start()
+        service.reset(base_dir=str(latest))
+        assert sorted(os.listdir(tmp_path)) == sorted(
+            [
+                other_crashed.name,
+                os.path.basename(running_dir),
+                os.path.basename(service.session_dir),
+            ]
+        )
+        assert running_snapshot.is_dir()
+
+        # A snapshot that cannot be written leaves the last complete one in place and its changes pending.
+        service.entities_changed(uids=[uids["line"]], collection=project.geol_coll)
+        service.save_snapshot()
+        assert service.collect(wait=True) is None
+        assert service.pending
+        assert latest_snapshot(str(tmp_path)) == str(latest)
+
+        # Complete snapshots replace older ones in the folder of the session, keeping the last KEEP_SNAPSHOTS.
+        service.reset()
+        assert not other_crashed.exists()
+        for _ in range(KEEP_SNAPSHOTS + 2):
+            service.entities_changed(uids=[uids["line"]], collection=project.geol_coll)
+            service.save_snapshot()
+            out_dir_name = service.collect(wait=True)
+        session_dir = service.session_dir
+        snapshots = list_snapshots(session_dir)
+        assert len(snapshots) == KEEP_SNAPSHOTS
+        assert snapshots[-1] == out_dir_name
+        assert not [
+            name for name in os.listdir(session_dir) if name.startswith(TMP_PREFIX)
+        ]
+        revision = RevisionReader(dir_name=out_dir_name)
+        for uid, extension in [
+            (uids["line"], ".vtp"),
+            (uids["dem"], ".vts"),
+            (uids["pc"], ".vtp"),
+        ]:
+            assert revision.has_entity(uid=uid, extension=extension)
+        del revision
+        # Sessions still alive are not offered for recovery, and a session stopped without clearing is not alive.
+        assert latest_snapshot(str(tmp_path)) is None
+        service.stop(clear=False)
+        assert list_snapshots(session_dir) == snapshots
+        assert latest_snapshot(str(tmp_path)) == out_dir_name
+        close_session(running_lock)
+        assert running_dir in dead_sessions(str(tmp_path))
+
+    def test_missing_base_entity(self, tmp_path):
+        """An unchanged entity missing from the base fails the write, and the next snapshot copies it."""
+        project, uids = _populated_project()
+        service = AutosaveService(project=project, autosave_dir=str(tmp_path))
+        service.save_snapshot()
+        base_dir = service.collect(wait=True)
+        # Base revision without the point cloud.
+        incomplete_dir = tmp_path / "incomplete"
+        incomplete_dir.mkdir()
+        revision = RevisionWriter(
+            dir_name=str(incomplete_dir), storage=STORAGE_CONTAINER
+        )
+        base = RevisionReader(dir_name=base_dir)
+        for uid, extension in [(uids["line"], ".vtp"), (uids["dem"], ".vts")]:
+            revision.write_entity(
+                uid=uid,
+                vtk_obj=base.read_entity(uid=uid, extension=extension),
+                extension=extension,
+            )
+        revision.close()
+        del base
+        service.reset(base_dir=str(incomplete_dir))
+
+        service.tables_changed(uids=[uids["line"]], collection=project.geol_coll)
+        service.save_snapshot()
+        assert service.collect(wait=True) is None
+        assert uids["pc"] in service._dirty
+        assert not [
+            name
+            for name in os.listdir(service.session_dir)
+            if name.startswith(TMP_PREFIX)
+        ]
+        snapshot = service.take_snapshot()
+        assert uids["pc"] in snapshot.copied_uids
+        out_dir_name = write_snapshot(
+            snapshot=snapshot, session_dir=service.session_dir
+        )
+        point_cloud = RevisionReader(dir_name=out_dir_name).read_entity(
+            uid=uids["pc"], extension=".vtp"
+        )
+        assert np.allclose(
+            _points(point_cloud), _points(project.dom_coll.get_uid_vtk_obj(uids["pc"]))
+        )
+        service.stop(clear=True)
@@ -0,0 +1,191 @@
+"""
+test_batch_executor.py
+PZero© Andrea Bistacchi
+
+How to run
+----------
+    pytest test_batch_executor.py -v
+
+Or together with all other tests:
+
+    pytest -v
+
+"""
+
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+from pandas import DataFrame as pd_DataFrame
+from vtk import vtkPoints, vtkCellArray
+from vtkmodules.util.numpy_support import numpy_to_vtk, numpy_to_vtkIdTypeArray
+
+from pzero.collections.geological_collection import GeologicalCollection
+from pzero.entities_factory import TriSurf
+from pzero.helpers.batch_executor import run_batch
+from pzero.legend_manager import Legend
+from pzero.three_d_surfaces import _retopo_pipeline, retopo
+
+# =============================================================================
+# HELPERS
+# =============================================================================
+
+
+def _make_trisurf(n: int = 40, z_shift: float = 0.0) -> TriSurf:
+    """Return a wavy n x n grid TriSurf."""
+    x, y = np.meshgrid(np.linspace(0.0, 100.0, n), np.linspace(0.0, 100.0, n))
+    z = 5.0 * np.sin(x / 10.0) * np.cos(y / 15.0) + z_shift
+    ids = np.arange(n * n).reshape((n, n))
+    triangles = np.concatenate(
+        [
+            np.column_stack(
+                [ids[:-1, :-1].ravel(), ids[:-1, 1:].ravel(), ids[1:, :-1].ravel()]
+            ),
+            np.column_stack(
+                [ids[:-1, 1:].ravel(), ids[1:, 1:].ravel(), ids[1:, :-1].ravel()]
+            ),
+        ]
+    )
+    surf = TriSurf()
+    points = vtkPoints()
+    points.SetData(
+        numpy_to_vtk(np.column_stack([x.ravel(), y.ravel(), z.ravel()]), deep=True)
+    )
+    surf.SetPoints(points)
+    cells = vtkCellArray()
+    cells.SetData(
+        3, numpy_to_vtkIdTypeArray(triangles.ravel().astype(np.int64), deep=True)
+    )
+    surf.SetPolys(cells)
+    return surf
+
+
+def _make_self(n_surfaces: int) -> MagicMock:
+    """
+    Build a MagicMock that behaves like the project window, with a real
+    GeologicalCollection containing n_surfaces selected TriSurf entities.
+    """
+    self_mock = MagicMock()
+    self_mock.shown_table = "tabGeology"
+    # The Qt table model needs a real QObject parent, so it is replaced by a mock.
+    with patch("pzero.collections.AbstractCollection.BaseTableModel"):
+        self_mock.geol_coll = GeologicalCollection(parent=self_mock)
+    self_mock.geol_coll.legend_df = pd_DataFrame(
+        columns=list(Legend.geol_legend_dict.keys())
+    )
+    entity_dicts = []
+    for i in range(n_surfaces):
+        entity_dict = dict(self_mock.geol_coll.entity_dict)
+        entity_dict["name"] = f"horizon_{i}"
+        entity_dict["topology"] = "TriSurf"
+        entity_dict["role"] = "top"
+        entity_dict["feature"] = f"horizon_{i}"
+        entity_dict["vtk_obj"] = _make_trisurf(z_shift=10.0 * i)
+        entity_dicts.append(entity_dict)
+    self_mock.selected_uids = self_mock.geol_coll.add_entities_from_dicts(
+        entity_dicts=entity_dicts
+    )
+    self_mock.signals.entities_added.emit.reset_mock()
+    return self_mock
+
+
+# =============================================================================
+# TEST CLASS
+# =============================================================================
+
+
+class TestRunBatch:
+    """
+    Tests for run_batch defined in helpers/batch_executor.py.
+    """
+
+    def test_results_in_input_order(self):
+        """Results are returned in input order, with key and elapsed time."""
+        inputs = [(f"uid_{i}", i) for i in range(20)]
+        results = run_batch(pipeline=lambda item: item * 2, inputs=inputs, workers=4)
+        assert [result["key"] for result in results] == [key for key, _ in inputs]
+        assert [result["output"] for result in results] == [2 * i for i in range(20)]
+        assert all(result["elapsed"] >= 0.0 for result in results)
+        assert all(result["error"] is None for result in results)
+
+    def test_error_does_not_stop_batch(self):
+        """An exception in one pipeline is reported and the others complete."""
+
+        def pipeline(item):
+            if item == 3:
+                raise ValueError("bad entity")
+            return item
+
+        results = run_batch(
+            pipeline=pipeline, inputs=[(i, i) for i in range(6)], workers=3
+        )
+        assert isinstance(results[3]["error"], ValueError)
+        assert results[3]["output"] is None
+        assert [result["output"] for result in results if result["key"] != 3] == [
+            0,
+            1,
+            2,
+            4,
+            5,
+        ]
+
+
+class TestBatchSurfaceTools:
+    """
+    Tests for the batch surface tools defined in three_d_surfaces.py.
+    """
+
+    def test_retopo_batch_insertion(self):
+        """
+        Retopology of several surfaces adds all outputs to the collection
+        with a single entities_added signal, matching the serial result.
+        """
+        self_mock = _make_self(4)
+        input_uids = list(self_mock.selected_uids)
+        retopo(self_mock, mode=0, dec_int=0.5, n_iter=10, rel_fac=0.1)
+
+        coll = self_mock.geol_coll
+        assert coll.get_number_of_entities == 8
+        self_mock.signals.entities_added.emit.assert_called_once()
+        new_uids = self_mock.signals.entities_added.emit.call_args[0][0]
+        assert len(new_uids) == 4
+        for uid, new_uid in zip(input_uids, new_uids):
+            assert coll.get_uid_name(new_uid) == coll.get_uid_name(uid) + "_retopo"
+            assert coll.get_uid_feature(new_uid) == coll.get_uid_feature(uid)
+            original = coll.get_uid_vtk_obj(uid)
+            retopologized = coll.get_uid_vtk_obj(new_uid)
+            assert 0 < retopologized.GetNumberOfCells() < original.GetNumberOfCells()
+            serial = _retopo_pipeline(original, dec_int=0.5, n_iter=10, rel_fac=0.1)
+            assert retopologized.GetNumberOfCells() == serial.GetNumberOfCells()
+            assert np.allclose(retopologized.points, serial.GetPoints().GetData())
+
+    def test_legend_rows_single_and_batch(self):
+        """
+        Adding entities one by one or in a batch adds the same legend rows, once
+        for each new role / feature / scenario, updating the legend widget once.
+        """
+        single, batch = _make_self(0), _make_self(0)
+        entity_dicts = []
+        for feature in ["horizon_a", "horizon_b", "horizon_a"]:
+            entity_dict = dict(single.geol_coll.entity_dict)
+            entity_dict.update(topology="TriSurf", role="top", feature=feature)
+            entity_dicts.append(entity_dict)
+        for entity_dict in entity_dicts:
+            single.geol_coll.add_entity_from_dict(entity_dict=dict(entity_dict))
+        batch.legend.update_widget.reset_mock()
+        batch.geol_coll.add_entities_from_dicts(
+            entity_dicts=[dict(entity_dict) for entity_dict in entity_dicts]
+        )
+        batch.legend.update_widget.assert_called_once()
+
+        colors = ["color_R", "color_G", "color_B"]
+        single_legend = single.geol_coll.legend_df.drop(columns=colors)
+        batch_legend = batch.geol_coll.legend_df.drop(columns=colors)
+        assert single_legend.equals(batch_legend)
+        assert list(batch_legend["feature"]) == ["horizon_a", "horizon_b"]
+        assert batch_legend["line_thick"].tolist() == [5.0, 5.0]
+        # A given color is used for the new legend row.
+        single.geol_coll.add_entity_from_dict(
+            entity_dict=dict(entity_dicts[0], feature="horizon_c"),
+            color=np.array([1, 2, 3]),
+        )
+        assert single.geol_coll.legend_df.iloc[-1][colors].tolist() == [1, 2, 3]
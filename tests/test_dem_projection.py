@@ -0,0 +1,234 @@
+"""
+test_dem_projection.py
+PZero© Andrea Bistacchi
+
+How to run
+----------
+    pytest test_dem_projection.py -v
+
+Or together with all other tests:
+
+    pytest -v
+
+"""
+
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+from pandas import DataFrame as pd_DataFrame
+from pyvista import StructuredGrid as pv_StructuredGrid
+from vtkmodules.vtkFiltersPoints import vtkPointInterpolator2D, vtkVoronoiKernel
+
+from pzero.collections.dom_collection import DomCollection
+from pzero.collections.geological_collection import GeologicalCollection
+from pzero.entities_factory import DEM, PolyLine, VertexSet
+from pzero.helpers.dem_projection import (
+    project_to_dem,
+    regular_grid,
+    sample_regular_grid,
+)
+from pzero.legend_manager import Legend
+from pzero.three_d_surfaces import project_2_dem_entities
+
+# =============================================================================
+# HELPERS
+# =============================================================================
+
+
+def _make_dem(
+    nx: int = 50, ny: int = 40, step: float = 10.0, warp: bool = False
+) -> DEM:
+    """DEM built as in dem2vtk, with rows stored north to south and a planar elevation
+    z = 0.1 x - 0.2 y + 100, optionally with nodes moved off the regular grid."""
+    x = np.arange(nx) * step + 1000.0
+    y = np.arange(ny)[::-1] * step + 5000.0
+    xx, yy = np.meshgrid(x, y)
+    if warp:
+        xx = xx + 0.3 * step * np.sin(yy / 37.0)
+    zz = 0.1 * xx - 0.2 * yy + 100.0
+    temp_obj = pv_StructuredGrid(xx, yy, zz)
+    temp_obj["elevation"] = zz.ravel(order="F")
+    dem = DEM()
+    dem.ShallowCopy(temp_obj)
+    return dem
+
+
+def _make_line(rng=None, bounds=None, n_points: int = 100) -> PolyLine:
+    line = PolyLine()
+    points = np.zeros((n_points, 3))
+    points[:, 0] = rng.uniform(bounds[0], bounds[1], n_points)
+    points[:, 1] = rng.uniform(bounds[2], bounds[3], n_points)
+    line.points = points
+    line.auto_cells()
+    return line
+
+
+def _legacy_projection(dem=None, vtk_obj=None) -> np.ndarray:
+    """One scattered-data interpolation per entity, as formerly done by project_2_dem."""
+    projection = vtkPointInterpolator2D()
+    projection.SetInputData(vtk_obj)
+    projection.SetSourceData(dem)
+    projection.SetKernel(vtkVoronoiKernel())
+    projection.SetNullPointsStrategyToClosestPoint()
+    projection.SetZArrayName("elevation")
+    projection.Update()
+    out_obj = PolyLine()
+    out_obj.DeepCopy(projection.GetOutput())
+    return out_obj.get_point_data("elevation")
+
+
+def _make_project(dem=None) -> MagicMock:
+    """MagicMock project with real geological and DOM collections."""
+    project = MagicMock()
+    with patch("pzero.collections.AbstractCollection.BaseTableModel"):
+        project.geol_coll = GeologicalCollection(parent=project)
+        project.dom_coll = DomCollection(parent=project)
+    project.geol_coll.legend_df = pd_DataFrame(
+        columns=list(Legend.geol_legend_dict.keys())
+    )
+    dom_dict = dict(project.dom_coll.entity_dict)
+    dom_dict.update(name="dem", topology="DEM", vtk_obj=dem)
+    project.dom_uid = project.dom_coll.add_entity_from_dict(entity_dict=dom_dict)
+    return project
+
+
+# =============================================================================
+# TEST CLASS
+# =============================================================================
+
+
+class TestDemProjection:
+    """
+    Tests for the projection engine defined in helpers/dem_projection.py
+    and used by project_2_dem.
+    """
+
+    def test_regular_grid(self):
+        """Raster DEMs are sampled by grid index, bilinearly, with nodata and outside points handled."""
+        dem = _make_dem()
+        grid = regular_grid(dem)
+        assert grid is not None
+        assert grid["z"].shape == (40, 50)
+        assert grid["dy"] < 0
+        assert regular_grid(_make_dem(warp=True)) is None
+
+        xy = np.array(
+            [
+                [1000.0, 5390.0, 0.0],  # first node
+                [1234.5, 5123.4, 0.0],
+                [1489.0, 5001.0, 0.0],
+            ]
+        )
+        assert np.allclose(
+            sample_regular_grid(grid=grid, xy=xy),
+            0.1 * xy[:, 0] - 0.2 * xy[:, 1] + 100.0,
+        )
+        # Outside points get the elevation of the nearest edge.
+        assert np.isclose(
+            sample_regular_grid(grid=grid, xy=np.array([[900.0, 5390.0, 0.0]]))[0],
+            0.1 * 1000.0 - 0.2 * 5390.0 + 100.0,
+        )
+        # Small tiles give the same result.
+        rng = np.random.default_rng(0)
+        xy = np.column_stack(
+            (
+                rng.uniform(990, 1500, 1000),
+                rng.uniform(4990, 5400, 1000),
+                np.zeros(1000),
+            )
+        )
+        assert np.allclose(
+            sample_regular_grid(grid=grid, xy=xy, tile_size=7),
+            sample_regular_grid(grid=grid, xy=xy),
+        )
+        # Next to nodata nodes, the nearest node is used.
+        grid["z"] = grid["z"].copy()
+        grid["z"][39, 1] = np.nan
+        values = sample_regular_grid(
+            grid=grid, xy=np.array([[1002.0, 5001.0, 0.0], [1008.0, 5001.0, 0.0]])
+        )
+        assert np.isclose(values[0], 0.1 * 1000.0 - 0.2 * 5000.0 + 100.0)
+        assert np.isnan(values[1])
+
+    def test_same_result_as_legacy(self):
+        """Irregular DEMs keep the Voronoi kernel, now in a single call for all entities."""
+        rng = np.random.default_rng(1)
+        dem = _make_dem(warp=True)
+        lines = [_make_line(rng=rng, bounds=dem.GetBounds()) for _ in range(5)]
+        elevations = project_to_dem(
+            dem=dem, points_list=[line.points for line in lines]
+        )
+        for line, elevation in zip(lines, elevations):
+            assert np.allclose(elevation, _legacy_projection(dem=dem, vtk_obj=line))
+
+        # On regular DEMs, nodes give the same elevation as the Voronoi kernel.
+        dem = _make_dem()
+        nodes = VertexSet()
+        nodes.points = dem.points[::7].copy()
+        nodes.auto_cells()
+        assert np.allclose(
+            project_to_dem(dem=dem, points_list=[nodes.points])[0],
+            _legacy_projection(dem=dem, vtk_obj=nodes),
+        )
+
+    def test_project_entities(self):
+        """Selected entities are projected, or copied and projected, in a single batch."""
+        rng = np.random.default_rng(2)
+        dem = _make_dem()
+        project = _make_project(dem)
+        entity_dicts = []
+        for i in range(3):
+            entity_dict = dict(project.geol_coll.entity_dict)
+            entity_dict.update(
+                name=f"line_{i}",
+                topology="PolyLine",
+                vtk_obj=_make_line(rng=rng, bounds=dem.GetBounds()),
+            )
+            entity_dicts.append(entity_dict)
+        with patch("pzero.collections.AbstractCollection.BaseTableModel"):
+            uids = project.geol_coll.add_entities_from_dicts(entity_dicts)
+        project.signals.reset_mock()
+
+        with patch("pzero.collections.AbstractCollection.BaseTableModel"):
+            new_uids = project_2_dem_entities(
+                project, input_uids=uids, dom_uid=project.dom_uid, replace=False
+            )
+        project.signals.entities_added.emit.assert_called_once()
+        assert len(project.geol_coll.df) == 6
+        for uid, new_uid in zip(uids, new_uids):
+            assert project.geol_coll.get_uid_name(new_uid) == (
+                f"{project.geol_coll.get_uid_name(uid)}_proj_DEM"
+            )
+            points = project.geol_coll.get_uid_vtk_obj(new_uid).points
+            assert np.allclose(
+                points[:, 2], 0.1 * points[:, 0] - 0.2 * points[:, 1] + 100.0
+            )
+            assert "elevation" in project.geol_coll.get_uid_properties_names(new_uid)
+            assert np.all(project.geol_coll.get_uid_vtk_obj(uid).points[:, 2] == 0.0)
+
+        project.signals.reset_mock()
+        with patch("pzero.collections.AbstractCollection.BaseTableModel"):
+            out_uids = project_2_dem_entities(
+                project, input_uids=uids, dom_uid=project.dom_uid, replace=True
+            )
+        assert out_uids == uids
+        project.signals.geom_modified.emit.assert_called_once()
+        project.signals.metadata_modified.emit.assert_called_once()
+        assert np.any(project.geol_coll.get_uid_vtk_obj(uids[0]).points[:, 2] != 0.0)
+
+    def test_raster_close_to_legacy(self):
+        """
+        On a raster DEM, lines between nodes are sampled bilinearly, and differ
+        from the Voronoi kernel by less than one node spacing of slope.
+        """
+        rng = np.random.default_rng(3)
+        dem = _make_dem(nx=200, ny=160, step=5.0)
+        lines = [
+            _make_line(rng=rng, bounds=dem.GetBounds(), n_points=200) for _ in range(5)
+        ]
+        legacy = [_legacy_projection(dem=dem, vtk_obj=line) for line in lines]
+        elevations = project_to_dem(
+            dem=dem, points_list=[line.points for line in lines]
+        )
+        for legacy_elevation, elevation in zip(legacy, elevations):
+            assert np.abs(legacy_elevation - elevation).max() < 0.2 * 5.0
@@ -18,6 +18,7 @@ from pzero.entities_factory import (
     Image3D,
     Well,
     WellMarker,
+    boundary_edges,
 )
 
 from vtk import vtkTexture
@@ -162,6 +163,141 @@ class TestTriSurf:
             assert self.tri_surf_instance.bounds != dilated_copy.bounds
 
 
+# Testing bulk cell construction from Numpy arrays
+class TestBulkCells:
+    points = np.column_stack(
+        [np.arange(10, dtype=float), np.zeros(10), np.arange(10, dtype=float) ** 2]
+    )
+    triangles = np.array([[0, 1, 2], [1, 3, 2], [2, 3, 4], [4, 5, 6]])
+
+    # Testing cells setter on TriSurf, with cells read back unchanged
+    def test_trisurf_cells_setter(self):
+        surf = TriSurf()
+        surf.points = self.points
+        surf.cells = self.triangles
+
+        assert surf.cells_number == len(self.triangles)
+        assert np.array_equal(surf.cells, self.triangles)
+
+        # setting cells again replaces the old ones
+        surf.cells = self.triangles[:2]
+        assert np.array_equal(surf.cells, self.triangles[:2])
+
+    # Testing append_cell with a matrix of cells, equivalent to appending one by one
+    def test_append_cell_matrix(self):
+        one_by_one = TriSurf()
+        bulk = TriSurf()
+        for row in self.triangles:
+            one_by_one.append_cell(row)
+        bulk.append_cell(self.triangles[:1])
+        bulk.append_cell(self.triangles[1:])
+
+        assert np.array_equal(one_by_one.cells, bulk.cells)
+
+    # Testing auto_cells on PolyLine and VertexSet with points
+    def test_auto_cells(self):
+        pline = PolyLine()
+        pline.points = self.points
+        pline.auto_cells()
+        vset = VertexSet()
+        vset.points = self.points
+        vset.auto_cells()
+
+        assert np.array_equal(
+            pline.cells, np.column_stack([np.arange(9), np.arange(1, 10)])
+        )
+        assert vset.GetNumberOfVerts() == 10
+
+    # Testing cell_centers, equal to the mean of the triangle vertexes
+    def test_cell_centers(self):
+        surf = TriSurf()
+        surf.points = self.points
+        surf.cells = self.triangles
+
+        assert np.allclose(surf.cell_centers, self.points[self.triangles].mean(axis=1))
+
+    # Testing cells setter and append_cell on TetraSolid
+    def test_tetra_solid_cells(self):
+        solid = TetraSolid()
+        tetras = np.array([[0, 1, 2, 3], [1, 2, 3, 4]])
+        solid.cells = tetras[:1]
+        solid.append_cell(tetras[1])
+
+        assert solid.GetNumberOfCells() == 2
+        assert np.array_equal(solid.cells, tetras)
+
+
+# Testing boundary edges, boundary_dilation and get_clean_boundary on a tilted grid surface
+class TestTriSurfBoundary:
+    n = 20
+    ids = np.arange(n * n).reshape((n, n))
+    triangles = np.concatenate(
+        [
+            np.column_stack(
+                [ids[:-1, :-1].ravel(), ids[:-1, 1:].ravel(), ids[1:, :-1].ravel()]
+            ),
+            np.column_stack(
+                [ids[:-1, 1:].ravel(), ids[1:, 1:].ravel(), ids[1:, :-1].ravel()]
+            ),
+        ]
+    )
+    x, y = np.meshgrid(np.linspace(0.0, 10.0, n), np.linspace(0.0, 10.0, n))
+    # plane z = 0.5 * x
+    points = np.column_stack([x.ravel(), y.ravel(), 0.5 * x.ravel()])
+
+    def make_surface(self):
+        surf = TriSurf()
+        surf.points = self.points
+        surf.cells = self.triangles
+        return surf
+
+    # Testing boundary_edges, that returns only edges used by a single triangle
+    def test_boundary_edges(self):
+        edges, edge_cells = boundary_edges(self.triangles)
+
+        assert edges.shape == (4 * (self.n - 1), 2)
+        assert set(np.unique(edges)) == set(
+            np.concatenate([self.ids[0], self.ids[-1], self.ids[:, 0], self.ids[:, -1]])
+        )
+        # each edge belongs to its triangle
+        for edge, cell in zip(edges, edge_cells):
+            assert set(edge) <= set(self.triangles[cell])
+
+    # Testing boundary_dilation, that moves boundary points outwards by tol in the surface plane
+    def test_boundary_dilation(self):
+        surf = self.make_surface()
+        dilated = surf.boundary_dilation(tol=0.5)
+        # point ids are renumbered by clean_topology, so compare with the clean surface
+        clean = TriSurf()
+        clean.DeepCopy(surf.clean_topology())
+        displ = np.asarray(dilated.points) - np.asarray(clean.points)
+        on_boundary = np.zeros(self.n * self.n, dtype=bool)
+        on_boundary[np.unique(boundary_edges(clean.cells)[0])] = True
+
+        assert isinstance(dilated, TriSurf)
+        assert np.allclose(displ[~on_boundary], 0.0)
+        assert np.allclose(np.linalg.norm(displ[on_boundary], axis=1), 0.5)
+        # displacements are parallel to the plane z = 0.5 * x
+        assert np.allclose(displ[:, 2], 0.5 * displ[:, 0])
+        # the input surface is not modified
+        assert np.array_equal(surf.points, self.points)
+        # the dilated surface contains the original one
+        assert dilated.bounds[1] - dilated.bounds[0] > surf.bounds[1] - surf.bounds[0]
+        assert dilated.bounds[3] - dilated.bounds[2] > surf.bounds[3] - surf.bounds[2]
+
+    # Testing get_clean_boundary, with one polygon for each part of the surface
+    def test_get_clean_boundary_parts(self):
+        surf = self.make_surface()
+        # add a second part, shifted along y
+        surf.points = np.vstack([self.points, self.points + [0.0, 20.0, 0.0]])
+        surf.cells = np.vstack([self.triangles, self.triangles + self.n * self.n])
+        borders = surf.get_clean_boundary()
+
+        assert borders.GetNumberOfPolys() == 2
+        assert np.allclose(borders.GetBounds(), surf.GetBounds())
+        assert borders.GetNumberOfPoints() >= 2 * 4 * (self.n - 1)
+
+
 # Testing XsVertexSet
 class TestXsVertexSet:
     xs_vertex_instance = XsVertexSet()
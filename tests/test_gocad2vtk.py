@@ -0,0 +1,155 @@
+"""
+test_gocad2vtk.py
+PZero© Andrea Bistacchi
+
+How to run
+----------
+    pytest test_gocad2vtk.py -v
+
+Or together with all other tests:
+
+    pytest -v
+
+"""
+
+import numpy as np
+
+from pzero.entities_factory import TriSurf
+from pzero.imports.gocad2vtk import (
+    gocad_object_to_vtk,
+    read_gocad_objects,
+    write_gocad_records,
+)
+
+# =============================================================================
+# HELPERS
+# =============================================================================
+
+
+def _make_surface(n: int = 400):
+    """
+    Return points and triangles of a regular n x n grid surface with a
+    wavy topography, similar to a large horizon exported from GOCAD.
+    """
+    x, y = np.meshgrid(np.linspace(0.0, 5000.0, n), np.linspace(0.0, 5000.0, n))
+    z = 100.0 * np.sin(x / 500.0) * np.cos(y / 700.0) - 1500.0
+    points = np.column_stack([x.ravel(), y.ravel(), z.ravel()])
+    ids = np.arange(n * n).reshape((n, n))
+    v0 = ids[:-1, :-1].ravel()
+    v1 = ids[:-1, 1:].ravel()
+    v2 = ids[1:, :-1].ravel()
+    v3 = ids[1:, 1:].ravel()
+    triangles = np.concatenate(
+        [np.column_stack([v0, v1, v2]), np.column_stack([v1, v3, v2])]
+    )
+    return points, triangles
+
+
+def _write_tsurf(path, points, triangles, properties=None):
+    """Write a TSurf with the header lines used by vtk2gocad."""
+    with open(path, "w") as fout:
+        fout.write("GOCAD TSurf 1\nHEADER {\nname: test_surface\n}\n")
+        if properties:
+            fout.write("PROPERTIES " + " ".join(properties.keys()) + "\n")
+            fout.write(
+                "ESIZES "
+                + " ".join(
+                    "1" if v.ndim == 1 else str(v.shape[1]) for v in properties.values()
+                )
+                + "\n"
+            )
+            pvrtx = np.column_stack([points] + list(properties.values()))
+            fout.write("TFACE\n")
+            write_gocad_records(fout=fout, keyword="PVRTX", values=pvrtx, numbered=True)
+        else:
+            fout.write("TFACE\n")
+            write_gocad_records(fout=fout, keyword="VRTX", values=points, numbered=True)
+        write_gocad_records(fout=fout, keyword="TRGL", values=triangles + 1)
+        fout.write("END\n")
+
+
+# =============================================================================
+# TEST CLASS
+# =============================================================================
+
+
+class TestGocadRoundTrip:
+    """
+    Tests for read_gocad_objects and write_gocad_records defined in imports/gocad2vtk.py.
+    """
+
+    def test_surface_round_trip(self, tmp_path):
+        """
+        A surface written and read back must have identical points and triangles.
+        """
+        points, triangles = _make_surface(60)
+        path = tmp_path / "surface.ts"
+        _write_tsurf(path, points, triangles)
+        gocad_objects = read_gocad_objects(in_file_name=str(path))
+
+        assert len(gocad_objects) == 1
+        gocad_object = gocad_objects[0]
+        assert gocad_object["type"] == "TSurf"
+        assert "name: test_surface" in gocad_object["header"]
+        assert np.array_equal(gocad_object["points"], points)
+        assert np.array_equal(gocad_object["cells"], triangles)
+
+    def test_properties_and_atoms(self, tmp_path):
+        """
+        Scalar and vector PVRTX properties are split according to ESIZES and
+        ATOM records copy coordinates and properties of their source vertex.
+        """
+        points, triangles = _make_surface(5)
+        properties = {
+            "depth": points[:, 2].copy(),
+            "vector": np.column_stack([points[:, 0], points[:, 1], points[:, 2]]),
+        }
+        path = tmp_path / "props.ts"
+        _write_tsurf(path, points, triangles, properties)
+        with open(path, "rt") as fin:
+            text = fin.read()
+        # Add a chain of atoms (27 -> 26 -> 3) before the END keyword.
+        text = text.replace("END\n", "ATOM 26 3\nATOM 27 26\nEND\n")
+        with open(path, "w") as fout:
+            fout.write(text)
+
+        gocad_object = read_gocad_objects(in_file_name=str(path))[0]
+        assert gocad_object["points"].shape == (27, 3)
+        assert np.array_equal(gocad_object["points"][25], points[2])
+        assert np.array_equal(gocad_object["points"][26], points[2])
+        assert gocad_object["properties"]["depth"].shape == (27,)
+        assert gocad_object["properties"]["vector"].shape == (27, 3)
+        assert np.array_equal(
+            gocad_object["properties"]["vector"][:25], properties["vector"]
+        )
+        assert gocad_object["properties"]["depth"][26] == points[2, 2]
+
+    def test_records_with_flags(self, tmp_path):
+        """
+        Records with trailing non-numeric flags (e.g. CNXYZ) are still read.
+        """
+        path = tmp_path / "flags.pl"
+        with open(path, "w") as fout:
+            fout.write(
+                "GOCAD PLine 1\nHEADER {\nname: line\n}\nILINE\n"
+                "VRTX 1 0.0 0.0 0.0 CNXYZ\nVRTX 2 1.0 0.5 0.0\nVRTX 3 2.0 1.0 0.5\n"
+                "SEG 1 2\nSEG 2 3\nEND\n"
+            )
+        gocad_object = read_gocad_objects(in_file_name=str(path))[0]
+        assert gocad_object["type"] == "PLine"
+        assert np.array_equal(gocad_object["points"][2], [2.0, 1.0, 0.5])
+        assert np.array_equal(gocad_object["cells"], [[0, 1], [1, 2]])
+
+    def test_object_to_vtk(self, tmp_path):
+        """
+        Points, triangles and properties are copied to a TriSurf.
+        """
+        points, triangles = _make_surface(10)
+        path = tmp_path / "small.ts"
+        _write_tsurf(path, points, triangles, {"depth": points[:, 2].copy()})
+        gocad_object = read_gocad_objects(in_file_name=str(path))[0]
+        surf = TriSurf()
+        gocad_object_to_vtk(gocad_object=gocad_object, vtk_obj=surf)
+        assert surf.points_number == points.shape[0]
+        assert np.array_equal(surf.cells, triangles)
+        assert np.allclose(surf.get_point_data("depth"), points[:, 2])
@@ -0,0 +1,157 @@
+"""
+test_grid_slicer.py
+PZero© Andrea Bistacchi
+
+How to run
+----------
+    pytest test_grid_slicer.py -v
+
+Or together with all other tests:
+
+    pytest -v
+
+"""
+
+import numpy as np
+import pytest
+from pyvista import ImageData as pv_ImageData
+from pyvista import wrap as pv_wrap
+from vtkmodules.util.numpy_support import numpy_to_vtk
+
+from pzero.entities_factory import Seismics, Voxet
+from pzero.views.grid_slicer import GridSlice, is_index_sliceable
+
+# =============================================================================
+# HELPERS
+# =============================================================================
+
+# Dimensions, origin and spacing of the test grids, with non-unit spacing and an offset origin.
+DIMENSIONS = (5, 4, 3)
+ORIGIN = (10.0, -5.0, 100.0)
+SPACING = (2.0, 0.5, 3.0)
+
+
+def _add_arrays(grid=None):
+    """Scalar and vector point arrays with a distinct value for each point."""
+    n_points = grid.GetNumberOfPoints()
+    values = np.arange(n_points, dtype=float)
+    scalars = numpy_to_vtk(values, deep=True)
+    scalars.SetName("values")
+    grid.GetPointData().AddArray(scalars)
+    vectors = numpy_to_vtk(np.column_stack([values, -values, 2 * values]), deep=True)
+    vectors.SetName("vectors")
+    grid.GetPointData().AddArray(vectors)
+
+
+def _make_voxet() -> Voxet:
+    voxet = Voxet()
+    voxet.SetDimensions(DIMENSIONS)
+    voxet.SetOrigin(ORIGIN)
+    voxet.SetSpacing(SPACING)
+    _add_arrays(voxet)
+    return voxet
+
+
+def _make_seismics() -> Seismics:
+    """Structured grid with the points of the voxet, sheared along x to be irregular."""
+    grid = pv_ImageData(dimensions=DIMENSIONS, origin=ORIGIN, spacing=SPACING)
+    structured = grid.cast_to_structured_grid()
+    points = np.array(structured.points)
+    points[:, 0] += 0.1 * points[:, 2]
+    structured.points = points
+    seismics = Seismics()
+    seismics.ShallowCopy(structured)
+    _add_arrays(seismics)
+    return seismics
+
+
+def _expected_plane(array=None, axis: int = 0, index: int = 0):
+    """Plane at index along axis of a point array in VTK order, with a numpy slice."""
+    ni, nj, nk = DIMENSIONS
+    volume = np.asarray(array).reshape((nk, nj, ni, -1))
+    plane = np.take(volume, index, axis=2 - axis)
+    plane = plane.reshape((-1, volume.shape[3]))
+    return plane[:, 0] if plane.shape[1] == 1 else plane
+
+
+# =============================================================================
+# TEST CLASS
+# =============================================================================
+
+
+class TestGridSlice:
+    """
+    Tests for the index-based slicer of regular grids defined in
+    views/grid_slicer.py and used by the mesh slicer of View3D.
+    """
+
+    @pytest.mark.parametrize("make_grid", [_make_voxet, _make_seismics])
+    @pytest.mark.parametrize("slice_type", ["X", "Y", "Z"])
+    def test_slices_match_numpy(self, make_grid, slice_type):
+        """Points and point arrays of each slice match a numpy slice of the grid, first and last index included."""
+        grid = make_grid()
+        wrapped = pv_wrap(grid)
+        axis = "XYZ".index(slice_type)
+        n = DIMENSIONS[axis]
+        slicer = GridSlice(entity=grid, slice_type=slice_type)
+        for index in range(n):
+            assert slicer.update(index / (n - 1))
+            assert slicer.index == index
+            output = pv_wrap(slicer.output)
+            plane_dimensions = list(DIMENSIONS)
+            plane_dimensions[axis] = 1
+            assert tuple(output.dimensions) == tuple(plane_dimensions)
+            assert np.allclose(
+                output.points,
+                _expected_plane(wrapped.points, axis, index),
+            )
+            for name in ["values", "vectors"]:
+                assert np.array_equal(
+                    output.point_data[name],
+                    _expected_plane(wrapped.point_data[name], axis, index),
+                )
+
+    def test_world_coordinates(self):
+        """Voxet slices are placed with origin and spacing, at the coordinate of their index."""
+        voxet = _make_voxet()
+        slicer = GridSlice(entity=voxet, slice_type="Z", coordinate_property="Z")
+        slicer.update(0.5)
+        points = pv_wrap(slicer.output).points
+        assert np.allclose(points[:, 2], ORIGIN[2] + SPACING[2])
+        assert np.allclose(
+            np.unique(points[:, 0]), ORIGIN[0] + SPACING[0] * np.arange(5)
+        )
+        assert np.allclose(
+            np.unique(points[:, 1]), ORIGIN[1] + SPACING[1] * np.arange(4)
+        )
+        # The coordinate pseudo-property follows the slice.
+        assert np.allclose(pv_wrap(slicer.output).point_data["Z"], points[:, 2])
+        assert slicer.data_range("Z") == (ORIGIN[2], ORIGIN[2] + 2 * SPACING[2])
+        assert slicer.data_range("values") == (0.0, 59.0)
+        assert slicer.data_range("missing") is None
+
+    def test_out_of_range_and_in_place(self):
+        """Positions out of range are clamped to the first and last index, and moving the slice
+        rewrites the same output buffers."""
+        voxet = _make_voxet()
+        slicer = GridSlice(entity=voxet, slice_type="X")
+        assert slicer.index_from_normalized(-0.5) == 0
+        assert slicer.index_from_normalized(1.5) == DIMENSIONS[0] - 1
+        assert slicer.update(-0.5)
+        assert slicer.index == 0
+        points = slicer.output.GetPoints()
+        values = slicer.output.GetPointData().GetArray("values")
+        assert slicer.update(1.5)
+        assert slicer.index == DIMENSIONS[0] - 1
+        assert np.allclose(
+            pv_wrap(slicer.output).points[:, 0], ORIGIN[0] + 4 * SPACING[0]
+        )
+        # Same index, nothing to do.
+        assert not slicer.update(1.0)
+        assert slicer.output.GetPoints() is points
+        assert slicer.output.GetPointData().GetArray("values") is values
+
+    def test_sliceable(self):
+        assert is_index_sliceable(_make_voxet())
+        assert is_index_sliceable(_make_seismics())
+        assert not is_index_sliceable(pv_wrap(_make_seismics()).extract_surface())
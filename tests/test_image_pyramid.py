@@ -0,0 +1,162 @@
+"""
+test_image_pyramid.py
+PZero© Andrea Bistacchi
+
+How to run
+----------
+    pytest test_image_pyramid.py -v
+
+Or together with all other tests:
+
+    pytest -v
+
+"""
+
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import rasterio
+from rasterio.transform import from_origin
+from vtkmodules.util.numpy_support import numpy_to_vtk, vtk_to_numpy
+
+from pzero.entities_factory import MapImage
+from pzero.helpers.image_pyramid import (
+    downsample,
+    level_for_pixels,
+    pyramid_levels_n,
+    read_bands,
+)
+from pzero.imports.image2vtk import image_file_to_vtk
+
+# =============================================================================
+# HELPERS
+# =============================================================================
+
+
+def _write_geotiff(path, bands: int = 3, rows: int = 1500, columns: int = 2001):
+    """Write a random uint8 GeoTIFF with the given number of bands and return its data."""
+    rng = np.random.default_rng(0)
+    data = rng.integers(0, 256, (bands, rows, columns), dtype=np.uint8)
+    with rasterio.open(
+        path,
+        "w",
+        driver="GTiff",
+        height=rows,
+        width=columns,
+        count=bands,
+        dtype="uint8",
+        transform=from_origin(500000.0, 5000000.0, 0.5, 0.5),
+        tiled=True,
+    ) as dataset:
+        dataset.write(data)
+    return data
+
+
+def _legacy_rgb(rio_image) -> np.ndarray:
+    """RGB array as built by the former image_file_to_vtk."""
+    numpy_array = np.dstack((rio_image.read(1), rio_image.read(2), rio_image.read(3)))
+    return numpy_array.swapaxes(0, 1).reshape((-1, 3), order="F")
+
+
+def _make_image(rows: int = 1000, columns: int = 1500) -> MapImage:
+    """Build a MapImage with a random RGB property."""
+    rng = np.random.default_rng(1)
+    rgb = rng.integers(0, 256, (rows * columns, 3), dtype=np.uint8)
+    image = MapImage()
+    image.SetOrigin([500000.0, 5000000.0, 0.0])
+    image.SetSpacing([2.0, -2.0, 1.0])
+    image.SetDimensions(columns, rows, 1)
+    vtk_array = numpy_to_vtk(rgb, deep=True)
+    vtk_array.SetName("RGB")
+    image.GetPointData().AddArray(vtk_array)
+    image.GetPointData().SetActiveScalars("RGB")
+    return image
+
+
+# =============================================================================
+# TEST CLASS
+# =============================================================================
+
+
+class TestImageImport:
+    """
+    Tests for windowed reading in helpers/image_pyramid.py and imports/image2vtk.py.
+    """
+
+    def test_read_bands(self, tmp_path):
+        """
+        Bands read window by window into the pixel-interleaved buffer match the
+        former per-band read, stack and reorder.
+        """
+        path = tmp_path / "ortho.tif"
+        data = _write_geotiff(path)
+        with rasterio.open(path) as rio_image:
+            legacy = _legacy_rgb(rio_image)
+            vtk_array = image_file_to_vtk(self=MagicMock(), rio_image=rio_image)
+            # Small windows, not aligned to the image size.
+            with patch("pzero.helpers.image_pyramid.WINDOW_BYTES", 100000):
+                small_windows = read_bands(rio_image=rio_image, indexes=[1, 2, 3])
+
+        assert vtk_array.GetName() == "RGB"
+        assert np.array_equal(vtk_to_numpy(vtk_array), legacy)
+        assert np.array_equal(small_windows, data.transpose(1, 2, 0))
+        assert small_windows.flags["C_CONTIGUOUS"]
+
+    def test_read_greyscale(self, tmp_path):
+        """Greyscale images with alpha channel keep the first band only."""
+        path = tmp_path / "grey.tif"
+        data = _write_geotiff(path, bands=2, rows=300, columns=400)
+        with rasterio.open(path) as rio_image:
+            vtk_array = image_file_to_vtk(self=MagicMock(), rio_image=rio_image)
+        assert vtk_array.GetName() == "greyscale"
+        assert np.array_equal(vtk_to_numpy(vtk_array), data[0].ravel())
+
+
+class TestImagePyramid:
+    """
+    Tests for pyramid levels of Image entities defined in entities_factory.py.
+    """
+
+    def test_downsample(self):
+        """Block averages, with the last row and column repeated for odd sizes."""
+        array = np.arange(15, dtype=float).reshape(3, 5)
+        expected = np.array([[3.0, 5.0, 6.5], [10.5, 12.5, 14.0]])
+        assert np.array_equal(downsample(array), expected)
+        rgb = np.full((5, 4, 3), 200, dtype=np.uint8)
+        assert downsample(rgb).shape == (3, 2, 3)
+        assert downsample(rgb).dtype == np.uint8
+
+    def test_levels(self):
+        """Level selection from the image size on screen."""
+        assert pyramid_levels_n(columns=256, rows=100) == 1
+        assert pyramid_levels_n(columns=5000, rows=3000) == 6
+        assert level_for_pixels(image_pixels=5000, screen_pixels=6000, levels_n=6) == 0
+        assert level_for_pixels(image_pixels=5000, screen_pixels=1200, levels_n=6) == 2
+        assert level_for_pixels(image_pixels=5000, screen_pixels=1, levels_n=6) == 5
+
+    def test_pyramid_level(self):
+        """
+        Levels keep the image bounds, halve the size, are cached and are
+        rebuilt when the image scalars change.
+        """
+        image = _make_image()
+        assert image.levels_n == 4
+        assert image.pyramid_level(0) is image
+        level_2 = image.pyramid_level(2)
+        assert level_2.GetDimensions() == (375, 250, 1)
+        assert np.allclose(level_2.GetBounds(), image.GetBounds())
+        assert image.pyramid_level(2) is level_2
+        texture = image.texture_level(2)
+        assert image.texture_level(2) is texture
+        rgb = image.image_data("RGB")
+        expected = downsample(downsample(rgb))
+        assert np.array_equal(
+            vtk_to_numpy(level_2.GetPointData().GetScalars()).reshape(250, 375, 3),
+            expected,
+        )
+        # Levels beyond the coarsest one return the coarsest one.
+        assert image.pyramid_level(10) is image.pyramid_level(3)
+        assert image.level_for_screen(screen_pixels=400) == 1
+
+        image.GetPointData().GetScalars().Modified()
+        assert image.pyramid_level(2) is not level_2
@@ -0,0 +1,131 @@
+"""
+test_isosurface_split.py
+PZero© Andrea Bistacchi
+
+How to run
+----------
+    pytest test_isosurface_split.py -v
+
+Or together with all other tests:
+
+    pytest -v
+
+"""
+
+import numpy as np
+from pyvista import ImageData as pv_ImageData
+from vtkmodules.util.numpy_support import vtk_to_numpy
+from vtkmodules.vtkFiltersCore import vtkContourFilter
+
+from pzero.entities_factory import TriSurf
+from pzero.three_d_surfaces import split_isosurfaces_by_value
+
+# =============================================================================
+# HELPERS
+# =============================================================================
+
+
+def _make_voxet(n: int = 12):
+    """Voxet with scalar field strati_0 = z, so each isosurface is the horizontal plane z = value."""
+    voxet = pv_ImageData(dimensions=(n, n, n), spacing=(1.0, 1.0, 1.0))
+    voxet["strati_0"] = voxet.points[:, 2].copy()
+    voxet["other"] = voxet.points[:, 0].copy()
+    return voxet
+
+
+def _contour(voxet=None, values=None):
+    """Multi-value contour pass, as in implicit_model_loop_structural."""
+    voxet.GetPointData().SetActiveScalars("strati_0")
+    iso_surface = vtkContourFilter()
+    iso_surface.SetInputData(voxet)
+    iso_surface.ComputeScalarsOn()
+    iso_surface.GenerateTrianglesOn()
+    iso_surface.SetNumberOfContours(len(values))
+    for i, value in enumerate(values):
+        iso_surface.SetValue(i, value)
+    iso_surface.Update()
+    return iso_surface.GetOutput()
+
+
+def _n_triangles(surface=None) -> int:
+    return surface.GetNumberOfPolys()
+
+
+# =============================================================================
+# TEST CLASS
+# =============================================================================
+
+
+class TestIsosurfaceSplit:
+    """
+    Tests for split_isosurfaces_by_value in three_d_surfaces.py,
+    used by implicit_model_loop_structural.
+    """
+
+    def test_multi_value(self):
+        """Each TriSurf gets only the triangles of its own value, with compact points and point data."""
+        values = [2.5, 5.5, 7.5]
+        iso_polydata = _contour(_make_voxet(), values)
+        iso_surfaces = split_isosurfaces_by_value(
+            iso_polydata=iso_polydata, values=values, scalar_name="strati_0"
+        )
+        assert list(iso_surfaces) == values
+        for value, surface in iso_surfaces.items():
+            assert isinstance(surface, TriSurf)
+            assert _n_triangles(surface) > 0
+            assert np.allclose(surface.points[:, 2], value)
+            assert np.allclose(
+                vtk_to_numpy(surface.GetPointData().GetArray("strati_0")), value
+            )
+            assert np.allclose(
+                vtk_to_numpy(surface.GetPointData().GetArray("other")),
+                surface.points[:, 0],
+            )
+            # All points are used by a triangle of this surface.
+            connectivity = vtk_to_numpy(surface.GetPolys().GetConnectivityArray())
+            assert np.array_equal(
+                np.unique(connectivity), np.arange(surface.GetNumberOfPoints())
+            )
+        assert sum(_n_triangles(surface) for surface in iso_surfaces.values()) == (
+            iso_polydata.GetNumberOfPolys()
+        )
+
+    def test_single_value(self):
+        """With a single value, the only TriSurf has all triangles of the contour."""
+        iso_polydata = _contour(_make_voxet(), [4.5])
+        iso_surfaces = split_isosurfaces_by_value(
+            iso_polydata=iso_polydata, values=[4.5], scalar_name="strati_0"
+        )
+        assert list(iso_surfaces) == [4.5]
+        assert _n_triangles(iso_surfaces[4.5]) == iso_polydata.GetNumberOfPolys()
+        assert np.allclose(iso_surfaces[4.5].points[:, 2], 4.5)
+
+    def test_empty(self):
+        """Values outside the scalar range give empty TriSurfs, and no values give no surfaces."""
+        values = [100.0, 200.0]
+        iso_surfaces = split_isosurfaces_by_value(
+            iso_polydata=_contour(_make_voxet(), values),
+            values=values,
+            scalar_name="strati_0",
+        )
+        assert list(iso_surfaces) == values
+        assert all(
+            surface.GetNumberOfPoints() == 0 for surface in iso_surfaces.values()
+        )
+        # A value with no triangles among others is left empty.
+        values = [3.5, 100.0]
+        iso_surfaces = split_isosurfaces_by_value(
+            iso_polydata=_contour(_make_voxet(), values),
+            values=values,
+            scalar_name="strati_0",
+        )
+        assert _n_triangles(iso_surfaces[3.5]) > 0
+        assert iso_surfaces[100.0].GetNumberOfPoints() == 0
+        assert (
+            split_isosurfaces_by_value(
+                iso_polydata=_contour(_make_voxet(), [4.5]),
+                values=[],
+                scalar_name="strati_0",
+            )
+            == {}
+        )
@@ -0,0 +1,173 @@
+"""
+test_line_batch.py
+PZero© Andrea Bistacchi
+
+How to run
+----------
+    pytest test_line_batch.py -v
+
+Or together with all other tests:
+
+    pytest -v
+
+"""
+
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+from pandas import DataFrame as pd_DataFrame
+from shapely.geometry import LineString
+
+from pzero.collections.geological_collection import GeologicalCollection
+from pzero.entities_factory import PolyLine
+from pzero.helpers.line_batch import (
+    pack_lines,
+    resample_by_distance,
+    resample_by_number,
+    simplify_lines,
+    unpack_lines,
+)
+from pzero.legend_manager import Legend
+from pzero.two_d_lines import resample_lines_distance
+from pzero.views.view_map import ViewMap
+
+# =============================================================================
+# HELPERS
+# =============================================================================
+
+
+def _make_lines(n: int = 2000, seed: int = 0) -> list:
+    """
+    Return n random-walk lines with 2 to 200 vertexes, similar to digitized
+    contacts, plus a degenerate line with coincident points.
+    """
+    rng = np.random.default_rng(seed)
+    lines = [
+        np.cumsum(rng.normal(size=(rng.integers(2, 200), 2)), axis=0) for _ in range(n)
+    ]
+    lines.append(np.array([[1.0, 1.0], [1.0, 1.0]]))
+    return lines
+
+
+def _shapely_resample(line_uv: np.ndarray, distance: float) -> np.ndarray:
+    """Resampling of a single line as in the former per-line tool."""
+    shp_line = LineString(line_uv)
+    while distance >= shp_line.length:
+        distance = distance / 2
+    points = [
+        shp_line.interpolate(d).coords[0]
+        for d in np.arange(0, shp_line.length, distance)
+    ]
+    points.append(tuple(line_uv[-1]))
+    return np.array(points)
+
+
+def _make_self(lines: list) -> MagicMock:
+    """
+    Build a MagicMock that behaves like a map view, with a real GeologicalCollection
+    containing one selected PolyLine for each line.
+    """
+    self_mock = MagicMock()
+    self_mock.__class__ = ViewMap
+    # The Qt table model needs a real QObject parent, so it is replaced by a mock.
+    with patch("pzero.collections.AbstractCollection.BaseTableModel"):
+        geol_coll = GeologicalCollection(parent=self_mock.parent)
+    geol_coll.legend_df = pd_DataFrame(columns=list(Legend.geol_legend_dict.keys()))
+    entity_dicts = []
+    for i, line_uv in enumerate(lines):
+        pline = PolyLine()
+        pline.points = np.column_stack([line_uv, np.zeros(len(line_uv))])
+        pline.auto_cells()
+        entity_dict = dict(geol_coll.entity_dict)
+        entity_dict["name"] = f"contact_{i}"
+        entity_dict["topology"] = "PolyLine"
+        entity_dict["vtk_obj"] = pline
+        entity_dicts.append(entity_dict)
+    self_mock.selected_uids = geol_coll.add_entities_from_dicts(
+        entity_dicts=entity_dicts
+    )
+    self_mock.parent.geol_coll = geol_coll
+    self_mock.parent.signals.geom_modified.emit.reset_mock()
+    return self_mock
+
+
+# =============================================================================
+# TEST CLASS
+# =============================================================================
+
+
+class TestLineBatch:
+    """
+    Tests for the batch functions defined in helpers/line_batch.py.
+    """
+
+    def test_pack_unpack(self):
+        """Packed lines are split back into the same arrays."""
+        lines = _make_lines(20)
+        flat_uv, offsets = pack_lines(lines)
+        assert offsets[-1] == len(flat_uv)
+        for line_uv, unpacked in zip(lines, unpack_lines(flat_uv, offsets)):
+            assert np.array_equal(line_uv, unpacked)
+
+    def test_resample_by_distance(self):
+        """
+        All lines resampled at once match the former per-line Shapely
+        resampling, including lines shorter than the spacing. Degenerate lines
+        are unchanged.
+        """
+        lines = _make_lines(200)
+        expected = [_shapely_resample(line_uv, 3.0) for line_uv in lines[:-1]]
+        flat_uv, offsets = pack_lines(lines)
+        out_uv, out_offsets, spacing = resample_by_distance(
+            flat_uv=flat_uv, offsets=offsets, distance=3.0
+        )
+
+        resampled = unpack_lines(out_uv, out_offsets)
+        for expected_uv, resampled_uv in zip(expected, resampled):
+            assert np.allclose(expected_uv, resampled_uv)
+        assert np.array_equal(resampled[-1], lines[-1])
+        assert (spacing < 3.0).any()
+
+    def test_resample_by_number(self):
+        """Each line gets the requested number of evenly spaced points."""
+        lines = _make_lines(50)
+        out_uv, out_offsets = resample_by_number(*pack_lines(lines), number_of_points=7)
+        for line_uv, resampled_uv in zip(lines[:-1], unpack_lines(out_uv, out_offsets)):
+            shp_line = LineString(line_uv)
+            expected = [
+                shp_line.interpolate(shp_line.length * i / 6).coords[0]
+                for i in range(7)
+            ]
+            assert np.allclose(expected, resampled_uv)
+
+    def test_simplify(self):
+        """Batch simplification matches Shapely simplify of each line."""
+        lines = _make_lines(200)
+        out_uv, out_offsets = simplify_lines(*pack_lines(lines), tolerance=1.5)
+        for line_uv, simplified_uv in zip(lines, unpack_lines(out_uv, out_offsets)):
+            expected = LineString(line_uv).simplify(1.5, preserve_topology=False)
+            assert np.allclose(np.array(expected.coords), simplified_uv)
+
+
+class TestBatchLineTools:
+    """
+    Tests for the batch line tools defined in two_d_lines.py.
+    """
+
+    def test_resample_tool_single_redraw(self):
+        """
+        Resampling many selected lines replaces all of them in the collection
+        with a single geom_modified signal.
+        """
+        lines = _make_lines(100)[:-1]
+        self_mock = _make_self(lines)
+        uids = list(self_mock.selected_uids)
+        with patch("pzero.two_d_lines.input_one_value_dialog", return_value=2.0):
+            resample_lines_distance(self_mock)
+
+        self_mock.parent.signals.geom_modified.emit.assert_called_once()
+        assert self_mock.parent.signals.geom_modified.emit.call_args[0][0] == uids
+        geol_coll = self_mock.parent.geol_coll
+        for uid, line_uv in zip(uids, lines):
+            new_points = np.asarray(geol_coll.get_uid_vtk_obj(uid).points)
+            assert np.allclose(new_points[:, :2], _shapely_resample(line_uv, 2.0))
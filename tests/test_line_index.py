@@ -0,0 +1,165 @@
+"""
+test_line_index.py
+PZero© Andrea Bistacchi
+
+How to run
+----------
+    pytest test_line_index.py -v
+
+Or together with all other tests:
+
+    pytest -v
+
+"""
+
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+from shapely.geometry import LineString, Point
+
+from pzero.entities_factory import PolyLine
+from pzero.helpers.line_index import LineIndex
+from pzero.two_d_lines import _insert_point_on_line_coords, snap_line
+from pzero.views.view_map import ViewMap
+
+# =============================================================================
+# HELPERS
+# =============================================================================
+
+
+def _make_network(n: int = 1500, seed: int = 0) -> dict:
+    """
+    Return a dictionary of n short random traces with 2 to 5 vertexes in a
+    10 km square, similar to a digitized fault network.
+    """
+    rng = np.random.default_rng(seed)
+    line_uv = {}
+    for i in range(n):
+        start = rng.uniform(0.0, 10000.0, 2)
+        direction = rng.normal(size=2)
+        direction /= np.linalg.norm(direction)
+        steps = rng.uniform(20.0, 150.0, rng.integers(1, 5))
+        line_uv[f"uid_{i}"] = start + np.cumsum(
+            np.vstack([[0.0, 0.0], steps[:, None] * direction]), axis=0
+        )
+    return line_uv
+
+
+def _make_self(line_uv: dict) -> MagicMock:
+    """
+    Build a MagicMock that behaves like a map view, with a geological
+    collection containing one PolyLine for each line in line_uv.
+    """
+    vtk_objs = {}
+    for uid, uv in line_uv.items():
+        pline = PolyLine()
+        pline.points = np.column_stack([uv, np.zeros(len(uv))])
+        pline.auto_cells()
+        vtk_objs[uid] = pline
+    self_mock = MagicMock()
+    self_mock.__class__ = ViewMap
+    self_mock.selected_uids = list(line_uv.keys())
+    geol_coll = self_mock.parent.geol_coll
+    geol_coll.get_uid_topology.return_value = "PolyLine"
+    geol_coll.get_uid_vtk_obj.side_effect = lambda uid: vtk_objs[uid]
+
+    def replace_vtk(uid=None, vtk_object=None):
+        vtk_objs[uid] = vtk_object
+
+    geol_coll.replace_vtk.side_effect = replace_vtk
+    self_mock.vtk_objs = vtk_objs
+    return self_mock
+
+
+# =============================================================================
+# TEST CLASS
+# =============================================================================
+
+
+class TestLineIndex:
+    """
+    Tests for LineIndex defined in helpers/line_index.py.
+    """
+
+    def test_intersecting_pairs(self):
+        """
+        Pairs found with the index are the same found testing every pair,
+        in the same order.
+        """
+        line_uv = _make_network(300)
+        lines = [LineString(uv) for uv in line_uv.values()]
+        uids = list(line_uv.keys())
+        pairwise = [
+            (uids[a], uids[b])
+            for a in range(len(lines))
+            for b in range(a + 1, len(lines))
+            if lines[a].intersects(lines[b])
+        ]
+        indexed = LineIndex(line_uv).intersecting_pairs()
+        assert len(pairwise) > 0
+        assert indexed == pairwise
+
+    def test_update_and_intersections(self):
+        """
+        Lines extended after the index is built are still found, and
+        intersections are returned for the current geometries only.
+        """
+        line_uv = {
+            "a": np.array([[0.0, 0.0], [10.0, 0.0]]),
+            "b": np.array([[20.0, -5.0], [20.0, 5.0]]),
+            "c": np.array([[0.0, 5.0], [10.0, 5.0]]),
+        }
+        index = LineIndex(line_uv)
+        ray = LineString([[15.0, -1.0], [15.0, 10.0]])
+        assert index.candidates(ray) == []
+
+        # Extend a beyond the ray, as in the endpoint snapping step.
+        index.update("a", np.array([[0.0, 0.0], [10.0, 0.0], [17.0, 0.0]]))
+        hits = index.intersections(ray)
+        assert [uid for uid, _ in hits] == ["a"]
+        assert hits[0][1].equals(Point(15.0, 0.0))
+        assert index.candidates(index.geometry("b"), exclude="b") == []
+        assert index.candidates(index.geometry("a"), exclude="a") == []
+
+
+class TestSnapLine:
+    """
+    Tests for snap_line and its helpers defined in two_d_lines.py.
+    """
+
+    def test_insert_point(self):
+        """
+        A point on a segment is inserted after the segment start, points on
+        vertexes or far from the line leave the coordinates unchanged.
+        """
+        coords = np.array([[0.0, 0.0], [10.0, 0.0], [10.0, 10.0]])
+        inserted = _insert_point_on_line_coords(coords, np.array([10.0, 4.0]))
+        assert np.array_equal(
+            inserted, [[0.0, 0.0], [10.0, 0.0], [10.0, 4.0], [10.0, 10.0]]
+        )
+        assert _insert_point_on_line_coords(coords, np.array([10.0, 0.0])) is coords
+        assert _insert_point_on_line_coords(coords, np.array([5.0, 1.0])) is coords
+
+    def test_snap_network(self):
+        """
+        A trace stopping short of another one is extended onto it and a node
+        is added to the target, while a short overhang across a trace is trimmed.
+        """
+        line_uv = {
+            "target": np.array([[0.0, 0.0], [100.0, 0.0]]),
+            "short": np.array([[50.0, 50.0], [50.0, 3.0]]),
+            "overhang": np.array([[80.0, 60.0], [80.0, -2.0]]),
+        }
+        self_mock = _make_self(line_uv)
+        with patch("pzero.two_d_lines.input_one_value_dialog", return_value=5.0):
+            snap_line(self_mock)
+
+        self_mock.print_terminal.assert_called()
+        assert "cannot be started" not in str(self_mock.print_terminal.call_args)
+        short = np.asarray(self_mock.vtk_objs["short"].points)[:, :2]
+        overhang = np.asarray(self_mock.vtk_objs["overhang"].points)[:, :2]
+        target = np.asarray(self_mock.vtk_objs["target"].points)[:, :2]
+        assert np.allclose(short[-1], [50.0, 0.0])
+        assert np.allclose(overhang[-1], [80.0, 0.0])
+        assert any(np.allclose(vertex, [50.0, 0.0]) for vertex in target)
+        assert any(np.allclose(vertex, [80.0, 0.0]) for vertex in target)
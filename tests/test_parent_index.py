@@ -0,0 +1,154 @@
+"""
+test_parent_index.py
+PZero© Andrea Bistacchi
+
+How to run
+----------
+    pytest test_parent_index.py -v
+
+Or together with all other tests:
+
+    pytest -v
+
+"""
+
+from unittest.mock import MagicMock, patch
+
+from pandas import DataFrame as pd_DataFrame
+
+from pzero.collections.geological_collection import GeologicalCollection
+from pzero.collections.xsection_collection import XSectionCollection
+from pzero.entities_factory import PolyLine
+from pzero.helpers.parent_index import ParentIndex
+from pzero.legend_manager import Legend
+
+# =============================================================================
+# HELPERS
+# =============================================================================
+
+
+def _make_project(n_sections: int = 5) -> MagicMock:
+    """
+    Build a MagicMock project with real cross-section and geological
+    collections and a real parent index, updated by the entities_added,
+    entities_removed and metadata_modified signals as in ProjectWindow.
+    """
+    project = MagicMock()
+    project.parent_index = ParentIndex()
+    project.signals.entities_added.emit.side_effect = (
+        lambda uids, collection: project.parent_index.update(
+            uids=uids, collection=collection
+        )
+    )
+    project.signals.metadata_modified.emit.side_effect = (
+        lambda uids, collection: project.parent_index.update(
+            uids=uids, collection=collection
+        )
+    )
+    project.signals.entities_removed.emit.side_effect = (
+        lambda uids, collection: project.parent_index.remove(
+            uids=uids, collection=collection
+        )
+    )
+    with patch("pzero.collections.AbstractCollection.BaseTableModel"):
+        project.xsect_coll = XSectionCollection(parent=project)
+        project.geol_coll = GeologicalCollection(parent=project)
+    project.geol_coll.legend_df = pd_DataFrame(
+        columns=list(Legend.geol_legend_dict.keys())
+    )
+    project.tab_collection_dict = {
+        "tabGeology": "geol_coll",
+        "tabXSections": "xsect_coll",
+    }
+    for i in range(n_sections):
+        entity_dict = dict(project.xsect_coll.entity_dict)
+        entity_dict["name"] = f"section_{i}"
+        entity_dict["length"] = 100.0
+        entity_dict["height"] = 100.0
+        project.xsect_coll.add_entity_from_dict(entity_dict=entity_dict)
+    return project
+
+
+def _geol_dicts(project: MagicMock, n_entities: int = 100) -> list:
+    """Geological entity dictionaries, with every third entity outside cross-sections."""
+    xuids = project.xsect_coll.get_uids
+    template = project.geol_coll.entity_dict
+    entity_dicts = []
+    for i in range(n_entities):
+        entity_dict = dict(template)
+        entity_dict["name"] = f"line_{i}"
+        entity_dict["topology"] = "PolyLine"
+        entity_dict["vtk_obj"] = PolyLine()
+        entity_dict["parent_uid"] = "" if i % 3 == 0 else xuids[i % len(xuids)]
+        entity_dicts.append(entity_dict)
+    return entity_dicts
+
+
+def _legacy_children(collection, xuid: str) -> list:
+    """Children selected with the former cross-section view filter."""
+    return collection.df.query(f'parent_uid.str.contains("{xuid}", na=False)')[
+        "uid"
+    ].tolist()
+
+
+# =============================================================================
+# TEST CLASS
+# =============================================================================
+
+
+class TestParentIndex:
+    """
+    Tests for the parent/child index defined in helpers/parent_index.py.
+    """
+
+    def test_children(self):
+        """The index returns the same children as the former string filter."""
+        project = _make_project()
+        with patch("pzero.collections.AbstractCollection.BaseTableModel"):
+            project.geol_coll.add_entities_from_dicts(_geol_dicts(project))
+        for xuid in project.xsect_coll.get_uids:
+            assert project.geol_coll.get_xuid_uid(xuid=xuid) == _legacy_children(
+                project.geol_coll, xuid
+            )
+            # Cross-sections are their own parent.
+            assert project.parent_index.children(
+                parent_uid=xuid, collection=project.xsect_coll
+            ) == [xuid]
+        xuid = project.xsect_coll.get_uids[1]
+        assert project.xsect_coll.get_all_xsect_entities(xuid=xuid) == {
+            "geol_coll": _legacy_children(project.geol_coll, xuid)
+        }
+        uid = project.geol_coll.get_xuid_uid(xuid=xuid)[0]
+        assert (
+            project.parent_index.parent(uid=uid, collection=project.geol_coll) == xuid
+        )
+
+    def test_incremental_updates(self):
+        """Added, removed and moved entities, and replaced dataframes, are indexed."""
+        project = _make_project(3)
+        xuids = project.xsect_coll.get_uids
+        geol_coll = project.geol_coll
+        with patch("pzero.collections.AbstractCollection.BaseTableModel"):
+            uids = geol_coll.add_entities_from_dicts(_geol_dicts(project, 9))
+        # First query, then incremental updates.
+        assert geol_coll.get_xuid_uid(xuid=xuids[1]) == [uids[1], uids[4], uids[7]]
+        with patch("pzero.collections.AbstractCollection.BaseTableModel"):
+            new_uid = geol_coll.add_entities_from_dicts(_geol_dicts(project, 2)[1:])[0]
+        assert geol_coll.get_xuid_uid(xuid=xuids[1])[-1] == new_uid
+
+        geol_coll.remove_entity(uid=uids[4])
+        geol_coll.set_uid_x_section(uid=uids[7], parent_uid=xuids[2])
+        assert geol_coll.get_xuid_uid(xuid=xuids[1]) == [uids[1], new_uid]
+        assert uids[7] in geol_coll.get_xuid_uid(xuid=xuids[2])
+
+        # Parent edited in the table, that emits metadata_modified.
+        geol_coll.df.loc[geol_coll.df["uid"] == uids[1], "parent_uid"] = ""
+        project.signals.metadata_modified.emit([uids[1]], geol_coll)
+        assert geol_coll.get_xuid_uid(xuid=xuids[1]) == [new_uid]
+
+        # Dataframe replaced without signals, as when a project is opened.
+        geol_coll.df = geol_coll.df.iloc[:2].copy()
+        for xuid in xuids:
+            assert geol_coll.get_xuid_uid(xuid=xuid) == _legacy_children(
+                geol_coll, xuid
+            )
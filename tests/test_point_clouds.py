@@ -21,6 +21,7 @@ import numpy as np
 from unittest.mock import MagicMock
 from unittest.mock import patch
 from pzero.entities_factory import PCDom
+from pzero.helpers.spatial_index import SpatialIndexCache
 from pzero.point_clouds import (
     normals2dd,
     cut_pc,
@@ -112,6 +113,7 @@ def _make_self(
     self_mock = MagicMock()
     self_mock.selected_uids = [uid]
     self_mock.parent.dom_coll.get_uid_name.return_value = name
+    self_mock.parent.spatial_index = SpatialIndexCache()
     self_mock.parent.dom_coll.get_uid_vtk_obj.return_value = vtk_obj
 
     if dip_data:
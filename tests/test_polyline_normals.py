@@ -0,0 +1,133 @@
+"""
+test_polyline_normals.py
+PZero© Andrea Bistacchi
+
+How to run
+----------
+    pytest test_polyline_normals.py -v
+
+Or together with all other tests:
+
+    pytest -v
+
+"""
+
+from unittest.mock import MagicMock
+
+import numpy as np
+from vtk import vtkIdList, vtkPlane
+
+from pzero.entities_factory import PolyLine, XsPolyLine, polyline_normals
+
+# =============================================================================
+# HELPERS
+# =============================================================================
+
+
+def _make_xs_polyline(n: int = 2000) -> XsPolyLine:
+    """
+    Return a densely digitized wavy trace in a NE-SW vertical cross-section,
+    with a mock parent that returns the section plane.
+    """
+    plane = vtkPlane()
+    plane.SetOrigin(0.0, 0.0, 0.0)
+    plane.SetNormal(np.sqrt(0.5), -np.sqrt(0.5), 0.0)
+    parent = MagicMock()
+    parent.xsect_coll.get_uid_vtk_plane.return_value = plane
+    w = np.linspace(0.0, 1000.0, n)
+    z = 50.0 * np.sin(w / 60.0) - 0.1 * w
+    pline = XsPolyLine(x_section_uid="xs", parent=parent)
+    pline.points = np.column_stack([w * np.sqrt(0.5), w * np.sqrt(0.5), z])
+    pline.auto_cells()
+    return pline
+
+
+def _legacy_normals(pline: XsPolyLine):
+    """
+    Segment and point normals calculated with the former per-cell and
+    per-point loops of XsPolyLine.vtk_set_normals (debug prints removed).
+    """
+    normal = np.array(
+        pline.parent.xsect_coll.get_uid_vtk_plane(pline.x_section_uid).GetNormal()
+    )
+    cell_normals = np.zeros((pline.cells_number, 3))
+    for i in range(pline.cells_number):
+        p0 = np.array(pline.GetPoint(pline.cells[i][0]))
+        p1 = np.array(pline.GetPoint(pline.cells[i][1]))
+        seg_normal = np.cross(p1 - p0, normal)
+        cell_normals[i] = seg_normal / np.linalg.norm(seg_normal)
+    point_normals = np.zeros((pline.points_number, 3))
+    for i in range(pline.points_number):
+        cell_list = vtkIdList()
+        pline.GetPointCells(i, cell_list)
+        for j in range(cell_list.GetNumberOfIds()):
+            point_normals[i] += cell_normals[cell_list.GetId(j)]
+        point_normals[i] /= cell_list.GetNumberOfIds()
+    return cell_normals, point_normals
+
+
+# =============================================================================
+# TEST CLASS
+# =============================================================================
+
+
+class TestPolylineNormals:
+    """
+    Tests for polyline_normals and PolyLine/XsPolyLine.vtk_set_normals defined in entities_factory.py.
+    """
+
+    def test_xs_polyline_against_legacy(self):
+        """
+        Normals match the former loop implementation (point normals are now
+        unit vectors) and lie in the cross-section plane.
+        """
+        pline = _make_xs_polyline(200)
+        legacy_cells, legacy_points = _legacy_normals(pline)
+        pline.vtk_set_normals()
+
+        cell_normals = np.asarray(pline.GetCellData().GetNormals())
+        point_normals = pline.get_point_data("Normals")
+        assert np.allclose(cell_normals, legacy_cells, atol=1e-6)
+        assert np.allclose(
+            point_normals,
+            legacy_points / np.linalg.norm(legacy_points, axis=1)[:, None],
+            atol=1e-6,
+        )
+        assert np.allclose(point_normals @ [np.sqrt(0.5), -np.sqrt(0.5), 0.0], 0.0)
+
+    def test_multi_point_cells(self):
+        """
+        Polylines stored as multi-point cells give the same point normals as
+        the same polylines split in two-points lines, and cells do not share segments.
+        """
+        points = np.array(
+            [[0.0, 0.0, 0.0], [1.0, 0.0, 0.0], [2.0, 0.0, 1.0], [5.0, 0.0, 5.0]]
+        )
+        cell_normals, point_normals = polyline_normals(
+            points=points,
+            connectivity=[0, 1, 2, 2, 3],
+            offsets=[0, 3, 5],
+            plane_normal=[0.0, 1.0, 0.0],
+        )
+        split_cells, split_points = polyline_normals(
+            points=points,
+            connectivity=[0, 1, 1, 2, 2, 3],
+            offsets=[0, 2, 4, 6],
+            plane_normal=[0.0, 1.0, 0.0],
+        )
+        assert cell_normals.shape == (2, 3)
+        assert np.allclose(point_normals, split_points)
+        assert np.allclose(cell_normals[1], split_cells[2])
+        assert np.allclose(point_normals[0], [0.0, 0.0, 1.0])
+
+    def test_map_polyline(self):
+        """
+        For a PolyLine in map the default normals are horizontal and
+        perpendicular to the trace.
+        """
+        pline = PolyLine()
+        pline.points = np.array([[0.0, 0.0, 10.0], [0.0, 1.0, 10.0], [0.0, 2.0, 12.0]])
+        pline.auto_cells()
+        pline.vtk_set_normals()
+        assert np.allclose(pline.get_point_data("Normals")[:2], [[1.0, 0.0, 0.0]] * 2)
+        assert np.allclose(pline.get_point_data("Normals")[:, 2], 0.0)
@@ -0,0 +1,268 @@
+"""
+test_project_container.py
+PZero© Andrea Bistacchi
+
+How to run
+----------
+    pytest test_project_container.py -v
+
+Or together with all other tests:
+
+    pytest -v
+
+"""
+
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+from pandas import DataFrame as pd_DataFrame
+from pyvista import ImageData as pv_ImageData
+from pyvista import StructuredGrid as pv_StructuredGrid
+from pyvista import wrap as pv_wrap
+from vtkmodules.util.numpy_support import vtk_to_numpy
+from vtkmodules.vtkCommonCore import vtkPoints, vtkStringArray
+from vtkmodules.vtkCommonDataModel import vtkCellArray
+
+from pzero.collections.geological_collection import GeologicalCollection
+from pzero.entities_factory import DEM, MapImage, PCDom, PolyLine, TriSurf
+from pzero.helpers.project_container import (
+    ARRAYS_FILE,
+    MANIFEST_FILE,
+    STORAGE_CONTAINER,
+    STORAGE_XML,
+    RevisionReader,
+    RevisionWriter,
+)
+from pzero.legend_manager import Legend
+
+# =============================================================================
+# HELPERS
+# =============================================================================
+
+
+def _make_polyline(n_points: int = 50) -> PolyLine:
+    line = PolyLine()
+    points = np.zeros((n_points, 3))
+    points[:, 0] = np.arange(n_points)
+    points[:, 2] = np.sin(points[:, 0])
+    line.points = points
+    line.auto_cells()
+    line.set_point_data("distance", points[:, 0].copy())
+    return line
+
+
+def _make_trisurf(resolution: int = 20) -> TriSurf:
+    surface = TriSurf()
+    grid = (
+        pv_StructuredGrid(
+            *np.meshgrid(
+                np.linspace(0, 100, resolution), np.linspace(0, 50, resolution), 0.0
+            )
+        )
+        .extract_surface()
+        .triangulate()
+    )
+    surface.ShallowCopy(grid)
+    surface.set_point_data(
+        "normal", np.tile([0.0, 0.0, 1.0], (surface.points_number, 1))
+    )
+    surface.GetPointData().SetActiveNormals("normal")
+    surface.GetFieldData().AddArray(_string_array())
+    return surface
+
+
+def _string_array():
+    array = vtkStringArray()
+    array.SetName("label")
+    array.InsertNextValue("a")
+    return array
+
+
+def _make_dem(nx: int = 30, ny: int = 20) -> DEM:
+    xx, yy = np.meshgrid(np.arange(nx) * 10.0, np.arange(ny) * 10.0)
+    temp_obj = pv_StructuredGrid(xx, yy, 0.1 * xx)
+    temp_obj["elevation"] = (0.1 * xx).ravel(order="F")
+    dem = DEM()
+    dem.ShallowCopy(temp_obj)
+    return dem
+
+
+def _make_image() -> MapImage:
+    temp_obj = pv_ImageData(dimensions=(40, 30, 1), spacing=(2.0, 2.0, 1.0))
+    temp_obj.origin = (100.0, 200.0, 0.0)
+    temp_obj["RGB"] = np.arange(1200 * 3, dtype=np.uint8).reshape(-1, 3)
+    image = MapImage()
+    image.ShallowCopy(temp_obj)
+    return image
+
+
+def _make_point_cloud(n_points: int = 1000, seed: int = 0) -> PCDom:
+    rng = np.random.default_rng(seed)
+    point_cloud = PCDom()
+    point_cloud.points = rng.uniform(0.0, 1000.0, (n_points, 3))
+    point_cloud.generate_cells()
+    point_cloud.set_point_data("intensity", rng.uniform(0.0, 1.0, n_points))
+    point_cloud.set_point_data(
+        "RGB", rng.integers(0, 255, (n_points, 3), dtype=np.uint8)
+    )
+    return point_cloud
+
+
+def _make_geol_table() -> pd_DataFrame:
+    """Geological table with text, list and numeric columns, as saved by save_project."""
+    project = MagicMock()
+    with patch("pzero.collections.AbstractCollection.BaseTableModel"):
+        geol_coll = GeologicalCollection(parent=project)
+        geol_coll.legend_df = pd_DataFrame(columns=list(Legend.geol_legend_dict.keys()))
+        for i in range(3):
+            entity_dict = dict(geol_coll.entity_dict)
+            entity_dict.update(
+                name=f"line_{i}",
+                topology="PolyLine",
+                vtk_obj=_make_polyline(),
+            )
+            geol_coll.add_entity_from_dict(entity_dict=entity_dict)
+    out_cols = list(geol_coll.df.columns)
+    out_cols.remove("vtk_obj")
+    return geol_coll.df[out_cols]
+
+
+def _same_dataset(dataset=None, other=None) -> bool:
+    dataset, other = pv_wrap(dataset), pv_wrap(other)
+    if dataset.n_points != other.n_points or dataset.n_cells != other.n_cells:
+        return False
+    if dataset.array_names != other.array_names:
+        return False
+    return all(
+        np.array_equal(dataset[name], other[name])
+        for name in dataset.array_names
+        if name != "label"
+    ) and np.allclose(dataset.points, other.points)
+
+
+def _save(dir_name=None, storage=None, entities=None, tables=None, compression=None):
+    revision = RevisionWriter(
+        dir_name=str(dir_name), storage=storage, compression=compression
+    )
+    for name, df in tables.items():
+        revision.write_table(name=name, df=df)
+    for uid, (vtk_obj, extension) in entities.items():
+        revision.write_entity(uid=uid, vtk_obj=vtk_obj, extension=extension)
+    revision.close()
+
+
+def _open(dir_name=None, entities=None, tables=None):
+    revision = RevisionReader(dir_name=str(dir_name))
+    out_tables = {name: revision.read_table(name=name, dtype=None) for name in tables}
+    out_entities = {
+        uid: revision.read_entity(uid=uid, extension=extension)
+        for uid, (_, extension) in entities.items()
+    }
+    return revision, out_tables, out_entities
+
+
+# =============================================================================
+# TEST CLASS
+# =============================================================================
+
+
+class TestProjectContainer:
+    """
+    Tests for the revision storage defined in helpers/project_container.py
+    and used by save_project and open_project.
+    """
+
+    def _entities(self):
+        return {
+            "line": (_make_polyline(), ".vtp"),
+            "surface": (_make_trisurf(), ".vtp"),
+            "dem": (_make_dem(), ".vts"),
+            "image": (_make_image(), ".vti"),
+            "point_cloud": (_make_point_cloud(), ".vtp"),
+        }
+
+    def _tables(self):
+        return {
+            "geological_table": _make_geol_table(),
+            "geol_legend_table": pd_DataFrame([Legend.geol_legend_dict] * 2),
+        }
+
+    def test_round_trip(self, tmp_path):
+        """Entities and tables saved in the container are opened unchanged, wrapping the memory map."""
+        entities, tables = self._entities(), self._tables()
+        for compression in [None, "zlib"]:
+            dir_name = tmp_path / str(compression)
+            dir_name.mkdir()
+            _save(dir_name, STORAGE_CONTAINER, entities, tables, compression)
+            assert (dir_name / MANIFEST_FILE).is_file()
+            assert (dir_name / ARRAYS_FILE).is_file()
+            assert not list(dir_name.glob("*.vt?"))
+            revision, out_tables, out_entities = _open(dir_name, entities, tables)
+            assert revision.storage == STORAGE_CONTAINER
+            for uid, (vtk_obj, _) in entities.items():
+                assert _same_dataset(vtk_obj, out_entities[uid])
+            for name, df in tables.items():
+                assert out_tables[name].equals(df)
+                assert list(out_tables[name].dtypes) == list(df.dtypes)
+
+            surface = out_entities["surface"]
+            assert surface.GetPointData().GetNormals().GetName() == "normal"
+            assert surface.GetFieldData().GetAbstractArray("label").GetValue(0) == "a"
+            image = out_entities["image"]
+            assert image.GetOrigin() == (100.0, 200.0, 0.0)
+            assert image.GetSpacing() == (2.0, 2.0, 1.0)
+            points = vtk_to_numpy(out_entities["line"].GetPoints().GetData())
+            assert np.shares_memory(points, revision._buffer) == (compression is None)
+
+        # Entities are shallow-copied into the entity classes, as in open_project.
+        line = PolyLine()
+        line.ShallowCopy(out_entities["line"])
+        assert np.allclose(line.points, entities["line"][0].points)
+        # Editing an entity does not modify the saved revision.
+        revision, _, out_entities = _open(tmp_path / "None", entities, tables)
+        line = PolyLine()
+        line.ShallowCopy(out_entities["line"])
+        line.points[:, 2] = 1000.0
+        _, _, out_entities = _open(tmp_path / "None", entities, tables)
+        assert np.allclose(
+            pv_wrap(out_entities["line"]).points, entities["line"][0].points
+        )
+
+    def test_xml_revisions(self, tmp_path):
+        """Revisions with JSON tables and VTK XML files are still written and read."""
+        entities, tables = self._entities(), self._tables()
+        _save(tmp_path, STORAGE_XML, entities, tables)
+        assert not (tmp_path / MANIFEST_FILE).is_file()
+        assert (tmp_path / "dem.vts").is_file()
+        assert (tmp_path / "geological_table.json").is_file()
+        revision, out_tables, out_entities = _open(tmp_path, entities, tables)
+        assert revision.storage == STORAGE_XML
+        assert revision.has_entity(uid="line", extension=".vtp")
+        assert not revision.has_entity(uid="missing", extension=".vtp")
+        assert revision.has_table("geol_legend_table")
+        for uid, (vtk_obj, _) in entities.items():
+            assert _same_dataset(vtk_obj, out_entities[uid])
+        assert list(out_tables["geological_table"]["name"]) == list(
+            tables["geological_table"]["name"]
+        )
+
+    def test_empty_arrays(self, tmp_path):
+        """Revisions with only zero-length arrays have an empty arrays file, and are opened as well."""
+        surface = TriSurf()
+        surface.SetPoints(vtkPoints())
+        surface.SetPolys(vtkCellArray())
+        entities = {"surface": (surface, ".vtp")}
+        tables = {"geological_table": _make_geol_table().iloc[:0]}
+        for compression in [None, "zlib"]:
+            dir_name = tmp_path / str(compression)
+            dir_name.mkdir()
+            _save(dir_name, STORAGE_CONTAINER, entities, tables, compression)
+            assert (dir_name / ARRAYS_FILE).stat().st_size == 0
+            revision, out_tables, out_entities = _open(dir_name, entities, tables)
+            assert revision._buffer is None
+            assert out_entities["surface"].GetNumberOfPoints() == 0
+            assert out_entities["surface"].GetNumberOfCells() == 0
+            assert out_tables["geological_table"].empty
+            assert list(out_tables["geological_table"].columns) == list(
+                tables["geological_table"].columns
+            )
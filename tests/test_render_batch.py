@@ -0,0 +1,320 @@
+"""
+test_render_batch.py
+PZero© Andrea Bistacchi
+
+How to run
+----------
+    pytest test_render_batch.py -v
+
+Or together with all other tests:
+
+    pytest -v
+
+"""
+
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+from pandas import DataFrame as pd_DataFrame
+import vtkmodules.vtkRenderingOpenGL2  # noqa: F401
+from vtkmodules.vtkRenderingCore import vtkCellPicker, vtkRenderer, vtkRenderWindow
+
+from pzero.collections.geological_collection import GeologicalCollection
+from pzero.entities_factory import Attitude, PolyLine, VertexSet
+from pzero.legend_manager import Legend
+from pzero.views.abstract_view_vtk import ViewVTK
+from pzero.views.render_batch import RenderBatch, RenderBatches, batch_style_key
+
+# =============================================================================
+# HELPERS
+# =============================================================================
+
+
+def _make_line(x: float = 0.0) -> PolyLine:
+    """Vertical-plane polyline at X = x, crossing the XY origin of the view."""
+    line = PolyLine()
+    line.points = np.array([[x, -1.0, 0.0], [x, 1.0, 0.0]])
+    line.auto_cells()
+    return line
+
+
+def _make_points(n_points: int = 3) -> VertexSet:
+    points = VertexSet()
+    points.points = np.random.default_rng(0).random((n_points, 3))
+    points.auto_cells()
+    return points
+
+
+class _FakePlotter:
+    """Plotter with the renderer and methods used by batched rendering, without a render window."""
+
+    def __init__(self):
+        self.renderer = MagicMock()
+        self.renderer.actors = {}
+        self.camera_set = True
+
+    def add_actor(self, actor, name=None, **kwargs):
+        self.renderer.actors[name] = actor
+        return actor
+
+    def remove_actor(self, actor, **kwargs):
+        for name, actor_i in list(self.renderer.actors.items()):
+            if name == actor or actor_i is actor:
+                del self.renderer.actors[name]
+
+
+def _make_self(batch_rendering: bool = True) -> MagicMock:
+    """
+    Build a MagicMock that behaves like a ViewVTK, with a real geological
+    collection, real render batches and the batch methods of ViewVTK.
+    """
+    self_mock = MagicMock()
+    with patch("pzero.collections.AbstractCollection.BaseTableModel"):
+        self_mock.parent.geol_coll = GeologicalCollection(parent=self_mock.parent)
+    self_mock.parent.geol_coll.legend_df = pd_DataFrame(
+        columns=list(Legend.geol_legend_dict.keys())
+    )
+    self_mock.batch_rendering = batch_rendering
+    self_mock.render_batches = RenderBatches()
+    self_mock.batch_exclude = set()
+    self_mock.plotter = _FakePlotter()
+    self_mock.actors_df = pd_DataFrame(
+        columns=["uid", "actor", "show", "collection", "show_property"]
+    )
+    for name in [
+        "show_in_batch",
+        "remove_from_batch",
+        "set_actor_visible",
+        "actor_shown",
+        "change_actor_color",
+        "remove_actor_in_view",
+    ]:
+        method = getattr(ViewVTK, name)
+        setattr(
+            self_mock,
+            name,
+            lambda *args, _m=method, **kwargs: _m(self_mock, *args, **kwargs),
+        )
+    return self_mock
+
+
+def _add_entity(self_mock: MagicMock, vtk_obj) -> str:
+    """Add an entity to the geological collection and draw it as at view creation."""
+    entity_dict = dict(GeologicalCollection().entity_dict)
+    entity_dict["topology"] = vtk_obj.__class__.__name__
+    entity_dict["feature"] = "contact"
+    entity_dict["vtk_obj"] = vtk_obj
+    uid = self_mock.parent.geol_coll.add_entity_from_dict(entity_dict)
+    self_mock.show_in_batch(
+        uid=uid, coll_name="geol_coll", show_property=None, visible=True
+    )
+    self_mock.actors_df.loc[len(self_mock.actors_df)] = [
+        uid,
+        None,
+        True,
+        "geol_coll",
+        None,
+    ]
+    return uid
+
+
+# =============================================================================
+# TEST CLASS
+# =============================================================================
+
+
+class TestRenderBatch:
+    """
+    Tests for the batched rendering of entities defined in views/render_batch.py
+    and used by ViewVTK.
+    """
+
+    def test_style_key(self):
+        """Only uniformly coloured geological, fluid and background entities are batched."""
+        line = _make_line()
+        assert batch_style_key(line, "geol_coll", None, 2, 5) == (
+            "geol_coll",
+            "lines",
+            2,
+            5,
+        )
+        assert (
+            batch_style_key(_make_points(), "fluid_coll", "none", 2, 5)[1] == "points"
+        )
+        assert batch_style_key(line, "geol_coll", "Z", 2, 5) is None
+        assert batch_style_key(line, "dom_coll", None, 2, 5) is None
+        assert batch_style_key(PolyLine(), "geol_coll", None, 2, 5) is None
+
+    def test_block_overrides(self):
+        """
+        Colour, visibility and opacity are block overrides, blocks of removed
+        entities are reused and the flat index of the other blocks is kept.
+        """
+        batch = RenderBatch(kind="lines", line_thick=2)
+        lines = [_make_line(x) for x in range(3)]
+        for i, line in enumerate(lines):
+            batch.add(uid=f"uid{i}", vtk_obj=line, color=[1.0, 0.0, 0.0])
+        dataset = batch.dataset
+        batch.set_visibility("uid1", False)
+        batch.set_color("uid2", [0.0, 0.0, 1.0])
+        batch.set_opacity("uid2", 0.5)
+        # The dataset is not rebuilt.
+        assert batch.dataset is dataset
+        assert dataset.GetBlock(1) is lines[1]
+        assert not batch.visibility("uid1")
+        assert batch.attributes.GetBlockOpacity(lines[2]) == 0.5
+        assert batch.uid_at(3) == "uid2"
+
+        batch.remove("uid0")
+        assert len(batch) == 2
+        assert batch.uid_at(1) is None
+        assert batch.uid_at(3) == "uid2"
+        new_line = _make_line(5)
+        batch.add(uid="uid3", vtk_obj=new_line, color=[0.0, 1.0, 0.0])
+        assert batch.uid_at(1) == "uid3"
+
+        # A replaced geometry keeps position and display attributes.
+        replaced = _make_line(7)
+        batch.replace(uid="uid2", vtk_obj=replaced)
+        assert batch.block("uid2") is replaced
+        assert batch.attributes.GetBlockOpacity(replaced) == 0.5
+        assert not batch.attributes.HasBlockOpacity(lines[2])
+
+    def test_batches(self):
+        """Entities move between batches when their style changes, empty batches are returned."""
+        batches = RenderBatches()
+        line = _make_line()
+        batch, created = batches.add(
+            uid="a", vtk_obj=line, key=("geol_coll", "lines", 2, 5), color=[1, 0, 0]
+        )
+        assert created
+        other, created = batches.add(
+            uid="b",
+            vtk_obj=_make_line(1),
+            key=("geol_coll", "lines", 2, 5),
+            color=[0, 1, 0],
+        )
+        assert other is batch and not created
+        moved, created = batches.add(
+            uid="a", vtk_obj=line, key=("geol_coll", "lines", 4, 5), color=[1, 0, 0]
+        )
+        assert created and moved is not batch
+        assert "a" not in batch
+        assert batches.remove("b") is batch
+        assert batches.actors() == [moved.actor]
+
+    def test_pick(self):
+        """A picked block of a batch actor resolves to the uid of the entity."""
+        batches = RenderBatches()
+        for i, x in enumerate([-4.0, 0.0, 4.0]):
+            batches.add(
+                uid=f"uid{i}",
+                vtk_obj=_make_line(x),
+                key=("geol_coll", "lines", 2, 5),
+                color=[1, 0, 0],
+            )
+        # Attitudes in front of the lines are not pickable, as with their own actor.
+        attitude = Attitude()
+        attitude.points = np.array([[0.0, 0.0, 0.5]])
+        attitude.auto_cells()
+        batches.add(
+            uid="att",
+            vtk_obj=attitude,
+            key=("geol_coll", "attitudes", 2, 5),
+            color=[1, 1, 1],
+        )
+        # The render window is never rendered, picking does not need it.
+        renderer = vtkRenderer()
+        window = vtkRenderWindow()
+        window.SetSize(300, 300)
+        window.AddRenderer(renderer)
+        for actor in batches.actors():
+            renderer.AddActor(actor)
+        renderer.ResetCamera()
+        renderer.SetWorldPoint(0.0, 0.0, 0.0, 1.0)
+        renderer.WorldToDisplay()
+        display = renderer.GetDisplayPoint()
+
+        picker = vtkCellPicker()
+        picker.SetTolerance(0.01)
+        picker.Pick(display[0], display[1], 0, renderer)
+        actor = picker.GetActor()
+        assert batches.is_batch_actor(actor)
+        assert batches.uid_from_pick(actor, picker.GetFlatBlockIndex()) == "uid1"
+
+        # Hidden blocks are picked by the cell picker, but not resolved to their uid.
+        batches.batch("uid1").set_visibility("uid1", False)
+        picker.Pick(display[0], display[1], 0, renderer)
+        assert (
+            batches.uid_from_pick(picker.GetActor(), picker.GetFlatBlockIndex()) is None
+        )
+
+    def test_view_batching(self):
+        """
+        In a view with batched rendering, entities share one actor and
+        toggling, recolouring and removing entities does not rebuild the batch.
+        """
+        self_mock = _make_self()
+        uids = [_add_entity(self_mock, _make_line(x)) for x in range(5)]
+        uids.append(_add_entity(self_mock, _make_points()))
+        # One lines batch and one points batch.
+        assert len(self_mock.plotter.renderer.actors) == 2
+        batch = self_mock.render_batches.batch(uids[0])
+        dataset = batch.dataset
+
+        self_mock.set_actor_visible(uid=uids[2], visible=False)
+        assert not self_mock.actor_shown(uids[2])
+        assert self_mock.actor_shown(uids[3])
+        self_mock.parent.geol_coll.set_uid_legend(uid=uids[3], color_R=0)
+        self_mock.uids_in_view = uids
+        self_mock.change_actor_color(
+            updated_uids=[uids[3]], collection=self_mock.parent.geol_coll
+        )
+        assert batch.dataset is dataset
+
+        # An entity showing a property gets its own actor.
+        assert (
+            self_mock.show_in_batch(
+                uid=uids[4], coll_name="geol_coll", show_property="Z", visible=True
+            )
+            is None
+        )
+        assert uids[4] not in self_mock.render_batches
+
+        # Removing the last entity of a batch removes the batch actor.
+        self_mock.remove_actor_in_view(uid=uids[5])
+        assert len(self_mock.plotter.renderer.actors) == 1
+
+        # Batched rendering off, entities leave their batch.
+        self_mock.batch_rendering = False
+        for uid in uids[:4]:
+            self_mock.show_in_batch(
+                uid=uid, coll_name="geol_coll", show_property=None, visible=True
+            )
+        assert len(self_mock.render_batches.batches) == 0
+        assert len(self_mock.plotter.renderer.actors) == 0
+
+    def test_many_entities(self):
+        """
+        Many entities with the same legend style share a single actor, and toggling
+        some of them is a block override that does not rebuild the batch.
+        """
+        batches = RenderBatches()
+        n_entities = 5000
+        lines = [_make_line(float(i)) for i in range(n_entities)]
+        for i, line in enumerate(lines):
+            batches.add(
+                uid=f"uid{i}",
+                vtk_obj=line,
+                key=("geol_coll", "lines", 2, 5),
+                color=[1, 0, 0],
+            )
+        batch = batches.batch("uid0")
+        dataset = batch.dataset
+        for i in range(0, n_entities, 10):
+            batch.set_visibility(f"uid{i}", False)
+        assert batch.dataset is dataset
+        assert not batch.visibility("uid10")
+        assert batch.visibility("uid11")
+        assert len(batches.actors()) == 1
+        assert len(batch) == n_entities
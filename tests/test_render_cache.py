@@ -0,0 +1,160 @@
+"""
+test_render_cache.py
+PZero© Andrea Bistacchi
+
+How to run
+----------
+    pytest test_render_cache.py -v
+
+Or together with all other tests:
+
+    pytest -v
+
+"""
+
+import numpy as np
+from pyvista import Disc as pv_Disc
+from pyvista import wrap as pv_wrap
+from vtk import vtkAppendPolyData
+
+from pzero.entities_factory import Attitude, PCDom
+from pzero.helpers.render_cache import RenderResourceCache, build_normal_discs
+from pzero.orientation_analysis import get_dip_dir_vectors
+
+# =============================================================================
+# HELPERS
+# =============================================================================
+
+
+def _make_attitude(n_points: int = 500, seed: int = 0) -> Attitude:
+    """Build an Attitude with random points and unit normals."""
+    rng = np.random.default_rng(seed)
+    attitude = Attitude()
+    attitude.points = rng.random((n_points, 3)) * 100.0
+    attitude.auto_cells()
+    normals = rng.normal(size=(n_points, 3))
+    attitude.set_point_data(
+        "Normals", normals / np.linalg.norm(normals, axis=1)[:, None]
+    )
+    return attitude
+
+
+def _legacy_discs(attitude: Attitude, r: float):
+    """One disc per point, as formerly built by each view."""
+    appender = vtkAppendPolyData()
+    normals = attitude.get_point_data("Normals")
+    for point, normal in zip(attitude.points, normals):
+        appender.AddInputData(
+            pv_Disc(center=point, normal=normal, inner=0, outer=r, c_res=30)
+        )
+    appender.Update()
+    return appender.GetOutput()
+
+
+# =============================================================================
+# TEST CLASS
+# =============================================================================
+
+
+class TestRenderResourceCache:
+    """
+    Tests for the render resources shared by views defined in helpers/render_cache.py.
+    """
+
+    def test_shared_until_modified(self):
+        """
+        Views get the same resource until the entity changes or is invalidated.
+        """
+        attitude = _make_attitude()
+        cache = RenderResourceCache()
+        discs = cache.get(
+            uid="att", vtk_obj=attitude, kind="normal_discs", params=(2.0,)
+        )
+        for _ in range(4):
+            # Four more views open.
+            assert (
+                cache.get(
+                    uid="att", vtk_obj=attitude, kind="normal_discs", params=(2.0,)
+                )
+                is discs
+            )
+        # Different parameters give a different resource.
+        assert (
+            cache.get(uid="att", vtk_obj=attitude, kind="normal_discs", params=(4.0,))
+            is not discs
+        )
+
+        # Modified normals, the resource is built again.
+        attitude.set_point_data("Normals", -attitude.get_point_data("Normals"))
+        new_discs = cache.get(
+            uid="att", vtk_obj=attitude, kind="normal_discs", params=(2.0,)
+        )
+        assert new_discs is not discs
+        cache.invalidate(["att"])
+        assert (
+            cache.get(uid="att", vtk_obj=attitude, kind="normal_discs", params=(2.0,))
+            is not new_discs
+        )
+
+    def test_normal_discs(self):
+        """
+        Glyph discs cover the same points as one disc per point, with the
+        dip and direction lines appended.
+        """
+        attitude = _make_attitude(200)
+        legacy = _legacy_discs(attitude, 2.0)
+        discs = build_normal_discs(attitude, 2.0)
+        # Each disc point is at distance r or 0 from its center, on the plane normal to the normal.
+        n_disc_points = legacy.GetNumberOfPoints()
+        disc_points = (
+            pv_wrap(discs)
+            .points[:n_disc_points]
+            .reshape(attitude.GetNumberOfPoints(), -1, 3)
+        )
+        offsets = disc_points - attitude.points[:, None, :]
+        normals = attitude.get_point_data("Normals")
+        assert np.allclose(np.einsum("ijk,ik->ij", offsets, normals), 0.0, atol=1e-5)
+        assert np.allclose(
+            np.sort(np.unique(np.round(np.linalg.norm(offsets, axis=2), 4))), [0.0, 2.0]
+        )
+        assert discs.GetNumberOfCells() == legacy.GetNumberOfCells() + 2 * (
+            attitude.GetNumberOfPoints()
+        )
+
+    def test_rgb_total_and_range(self):
+        """RGB arrays and scalar ranges of point clouds are computed once."""
+        rng = np.random.default_rng(1)
+        pc = PCDom()
+        pc.points = rng.random((1000, 3))
+        pc.generate_cells()
+        for i in range(3):
+            pc.set_point_data(f"RGB[{i}]", rng.integers(0, 255, 1000).astype(float))
+        intensity = rng.random(1000)
+        intensity[10] = np.nan
+        pc.set_point_data("intensity", intensity)
+        cache = RenderResourceCache()
+        rgb = cache.get(uid="pc", vtk_obj=pc, kind="rgb_total")
+        assert rgb.shape == (1000, 3)
+        assert np.array_equal(rgb[:, 1], pc.get_point_data("RGB[1]"))
+        assert cache.get(uid="pc", vtk_obj=pc, kind="rgb_total") is rgb
+        scalar_range = cache.get(
+            uid="pc", vtk_obj=pc, kind="scalar_range", params=("intensity",)
+        )
+        assert scalar_range == [np.nanmin(intensity), np.nanmax(intensity)]
+
+    def test_map_glyphs(self):
+        """Map glyphs are horizontal lines, two for each attitude."""
+        attitude = _make_attitude(10)
+        cache = RenderResourceCache()
+        glyphs = cache.get(
+            uid="att", vtk_obj=attitude, kind="normal_map_glyphs", params=(1.0,)
+        )
+        assert glyphs.GetNumberOfCells() == 2 * attitude.GetNumberOfPoints()
+        az_vectors, dir_vectors = get_dip_dir_vectors(
+            attitude.get_point_data("Normals"), az=True
+        )
+        assert np.allclose(az_vectors[:, 2], 0.0)
+        points = pv_wrap(glyphs).points
+        assert np.allclose(
+            np.sort(points[:, 2]), np.sort(np.repeat(attitude.points[:, 2], 4))
+        )
@@ -0,0 +1,249 @@
+"""
+test_section_intersection.py
+PZero© Andrea Bistacchi
+
+How to run
+----------
+    pytest test_section_intersection.py -v
+
+Or together with all other tests:
+
+    pytest -v
+
+"""
+
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+from pandas import DataFrame as pd_DataFrame
+from pyvista import Plane as pv_Plane
+from pyvista import wrap as pv_wrap
+from vtkmodules.vtkCommonDataModel import vtkPlane
+from vtkmodules.vtkFiltersCore import vtkCutter
+
+from pzero.collections.geological_collection import GeologicalCollection
+from pzero.collections.xsection_collection import XSectionCollection
+from pzero.entities_factory import PolyLine, TriSurf
+from pzero.helpers.batch_executor import run_batch
+from pzero.helpers.section_intersection import (
+    cull_groups,
+    intersection_pipeline,
+    plane_groups,
+    polyline_parts,
+)
+from pzero.legend_manager import Legend
+from pzero.three_d_surfaces import intersection_xs_geology
+
+# =============================================================================
+# HELPERS
+# =============================================================================
+
+
+def _make_surface(
+    center=(0.0, 0.0), size: float = 1000.0, resolution: int = 200
+) -> TriSurf:
+    """Wavy triangulated surface with a Z property."""
+    grid = pv_Plane(
+        center=(center[0], center[1], 0.0),
+        i_size=size,
+        j_size=size,
+        i_resolution=resolution,
+        j_resolution=resolution,
+    ).triangulate()
+    grid.points[:, 2] = (
+        50.0 * np.sin(grid.points[:, 0] / 100.0) * np.cos(grid.points[:, 1] / 150.0)
+    )
+    grid.point_data["Z"] = grid.points[:, 2]
+    surface = TriSurf()
+    surface.ShallowCopy(grid)
+    return surface
+
+
+def _make_plane(origin=None, normal=None) -> vtkPlane:
+    plane = vtkPlane()
+    plane.SetOrigin(origin)
+    plane.SetNormal(normal)
+    return plane
+
+
+def _legacy_intersection(vtk_obj, plane) -> list:
+    """One full-geometry cut for each entity/section pair, as formerly done by intersection_xs."""
+    cutter = vtkCutter()
+    cutter.SetCutFunction(plane)
+    cutter.SetInputData(vtk_obj)
+    cutter.Update()
+    return polyline_parts(cutter.GetOutput())
+
+
+def _sorted_points(parts: list) -> np.ndarray:
+    points = np.vstack([pv_wrap(part).points for part in parts])
+    return points[np.lexsort(np.round(points, 3).T)]
+
+
+def _fence(n_sections: int = 20, spacing: float = 150.0) -> list:
+    """North-south sections, alternating normal sign, and one east-west section."""
+    planes = [
+        (
+            f"ns_{i}",
+            _make_plane(
+                origin=(-spacing * n_sections / 2 + i * spacing, 0.0, 0.0),
+                normal=(1.0 if i % 2 else -1.0, 0.0, 0.0),
+            ),
+        )
+        for i in range(n_sections)
+    ]
+    planes.append(("ew", _make_plane(origin=(0.0, 10.0, 0.0), normal=(0.0, 1.0, 0.0))))
+    return planes
+
+
+# =============================================================================
+# TEST CLASS
+# =============================================================================
+
+
+class TestSectionIntersection:
+    """
+    Tests for the multi-plane intersection engine defined in
+    helpers/section_intersection.py and used by intersection_xs.
+    """
+
+    def test_groups_and_culling(self):
+        """Parallel planes share a group, boxes only keep the planes that cross them."""
+        groups = plane_groups(_fence(10, 100.0))
+        assert len(groups) == 2
+        ns_group = [group for group in groups if len(group["keys"]) == 10][0]
+        assert np.all(np.diff(ns_group["offsets"]) > 0)
+        culled = cull_groups(bounds=(-220, -30, -10, 10, -1, 1), groups=groups)
+        assert len(culled) == 2
+        assert sorted(culled[0]["keys"] + culled[1]["keys"]) == ["ew", "ns_3", "ns_4"]
+        assert cull_groups(bounds=(-220, -30, 20, 30, -1, 1), groups=groups)[0][
+            "keys"
+        ] == ["ns_3", "ns_4"]
+
+    def test_same_result_as_legacy(self):
+        """Each section gets the same polylines, with properties, as with one cut per pair."""
+        surface = _make_surface()
+        planes = _fence(12, 75.0)
+        results = dict(
+            intersection_pipeline(
+                (
+                    surface,
+                    cull_groups(
+                        bounds=surface.GetBounds(), groups=plane_groups(planes)
+                    ),
+                )
+            )
+        )
+        for key, plane in planes:
+            legacy = _legacy_intersection(surface, plane)
+            assert len(results[key]) == len(legacy)
+            assert np.allclose(
+                _sorted_points(results[key]), _sorted_points(legacy), atol=1e-4
+            )
+            assert "Z" in pv_wrap(results[key][0]).point_data
+
+        # Polylines give vertex sets.
+        line = PolyLine()
+        line.points = np.array([[-500.0, 5.0, 0.0], [500.0, 5.0, 0.0]])
+        line.auto_cells()
+        results = dict(
+            intersection_pipeline(
+                (
+                    line,
+                    cull_groups(bounds=line.GetBounds(), groups=plane_groups(planes)),
+                )
+            )
+        )
+        assert len(results) == 12
+        assert results["ns_0"][0].GetNumberOfVerts() == 1
+
+    def test_geology_batch(self):
+        """New entities are added to the cross-sections in a single batch."""
+        project = MagicMock()
+        with patch("pzero.collections.AbstractCollection.BaseTableModel"):
+            project.xsect_coll = XSectionCollection(parent=project)
+            project.geol_coll = GeologicalCollection(parent=project)
+        project.geol_coll.legend_df = pd_DataFrame(
+            columns=list(Legend.geol_legend_dict.keys())
+        )
+        xsect_uids = []
+        for i, (origin_x, strike) in enumerate([(0.0, 0.0), (200.0, 0.0)]):
+            entity_dict = dict(project.xsect_coll.entity_dict)
+            entity_dict["name"] = f"section_{i}"
+            entity_dict["origin_x"] = origin_x
+            entity_dict["strike"] = strike
+            entity_dict["dip"] = 90.0
+            entity_dict["length"] = 1000.0
+            entity_dict["height"] = 500.0
+            xsect_uids.append(
+                project.xsect_coll.add_entity_from_dict(entity_dict=entity_dict)
+            )
+        surf_dict = dict(project.geol_coll.entity_dict)
+        surf_dict.update(name="surf", topology="TriSurf", vtk_obj=_make_surface())
+        line = PolyLine()
+        line.points = np.array([[-500.0, 5.0, 0.0], [500.0, 5.0, 0.0]])
+        line.auto_cells()
+        line_dict = dict(project.geol_coll.entity_dict)
+        line_dict.update(
+            name="line", topology="XsPolyLine", vtk_obj=line, parent_uid=xsect_uids[1]
+        )
+        with patch("pzero.collections.AbstractCollection.BaseTableModel"):
+            input_uids = project.geol_coll.add_entities_from_dicts(
+                [surf_dict, line_dict]
+            )
+        project.signals.entities_added.emit.reset_mock()
+
+        with patch("pzero.collections.AbstractCollection.BaseTableModel"):
+            new_uids = intersection_xs_geology(
+                project, input_uids=input_uids, xsect_uids=xsect_uids
+            )
+        project.signals.entities_added.emit.assert_called_once()
+        new_df = project.geol_coll.df.set_index("uid").loc[new_uids]
+        # The line is not intersected with its own section.
+        assert list(new_df["name"]).count("line_int_section_0") == 1
+        assert "line_int_section_1" not in list(new_df["name"])
+        assert set(new_df.loc[new_df["topology"] == "XsPolyLine", "parent_uid"]) == set(
+            xsect_uids
+        )
+        # Results are ordered by cross-section.
+        assert list(new_df["parent_uid"]) == sorted(
+            new_df["parent_uid"], key=xsect_uids.index
+        )
+
+    def test_culled_batch(self):
+        """
+        A fence of sections across a model of many small surfaces, run in a
+        batch with culling, gives the same pairs as one cut per pair.
+        """
+        rng = np.random.default_rng(0)
+        surfaces = [
+            _make_surface(
+                center=rng.uniform(-1500.0, 1500.0, 2), size=150.0, resolution=20
+            )
+            for _ in range(20)
+        ]
+        planes = _fence(20, 150.0)
+        legacy = {}
+        for i, surface in enumerate(surfaces):
+            for key, plane in planes:
+                parts = _legacy_intersection(surface, plane)
+                if parts:
+                    legacy[(i, key)] = parts
+
+        groups = plane_groups(planes)
+        inputs = []
+        for i, surface in enumerate(surfaces):
+            culled = cull_groups(bounds=surface.GetBounds(), groups=groups)
+            if culled:
+                inputs.append((i, (surface, culled)))
+        results = run_batch(pipeline=intersection_pipeline, inputs=inputs)
+        engine = {
+            (result["key"], key): parts
+            for result in results
+            for key, parts in result["output"]
+        }
+        assert len(inputs) < len(surfaces)
+        assert len(legacy) > 0
+        assert engine.keys() == legacy.keys()
+        for pair, parts in legacy.items():
+            assert len(engine[pair]) == len(parts)
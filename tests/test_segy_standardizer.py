@@ -0,0 +1,167 @@
+"""
+test_segy_standardizer.py
+PZero© Andrea Bistacchi
+
+How to run
+----------
+    pytest test_segy_standardizer.py -v
+
+Or together with all other tests:
+
+    pytest -v
+
+"""
+
+import struct
+
+import numpy as np
+
+from pzero.processing.segy_standardizer import (
+    ibm_to_ieee,
+    standardize_segy_for_pzero,
+)
+
+# =============================================================================
+# HELPERS
+# =============================================================================
+
+
+def _ieee_to_ibm(values: np.ndarray) -> np.ndarray:
+    """Encode float64 values as 32-bit IBM floats, returned as unsigned integers."""
+    values = np.asarray(values, dtype=np.float64)
+    out = np.zeros(values.shape, dtype=np.uint32)
+    nonzero = values != 0
+    magnitude = np.abs(values[nonzero])
+    # Smallest power of 16 larger than the magnitude, so that the fraction is in [1/16, 1).
+    exponent = np.floor(np.log2(magnitude) / 4).astype(np.int64) + 1
+    mantissa = np.round(magnitude / 16.0**exponent * 2**24).astype(np.int64)
+    # Rounding can give a fraction equal to 1, renormalize it.
+    overflow = mantissa >= 2**24
+    mantissa[overflow] //= 16
+    exponent[overflow] += 1
+    sign = (values[nonzero] < 0).astype(np.uint32) << 31
+    out[nonzero] = (
+        sign | ((exponent + 64).astype(np.uint32) << 24) | mantissa.astype(np.uint32)
+    )
+    return out
+
+
+def _write_segy(path, samples: np.ndarray, format_code: int, sample_dtype: str):
+    """Write a minimal SEG-Y file with the given samples (traces x samples) and format code."""
+    n_traces, n_samples = samples.shape
+    binary_header = bytearray(400)
+    binary_header[16:18] = struct.pack(">H", 4000)
+    binary_header[20:22] = struct.pack(">H", n_samples)
+    binary_header[24:26] = struct.pack(">H", format_code)
+    trace = np.dtype(
+        [("header", "u1", (240,)), ("samples", sample_dtype, (n_samples,))]
+    )
+    traces = np.zeros(n_traces, dtype=trace)
+    # Field source x coordinate, that must be copied unchanged.
+    traces["header"][:, 72:76] = (
+        np.arange(n_traces, dtype=">i4").view(np.uint8).reshape(-1, 4)
+    )
+    traces["samples"] = samples
+    with open(path, "wb") as file:
+        file.write(b" " * 3200)
+        file.write(binary_header)
+        file.write(traces.tobytes())
+
+
+def _read_output(path, n_samples: int) -> np.ndarray:
+    """Read traces of a standardized file as a structured array."""
+    trace = np.dtype([("header", "u1", (240,)), ("samples", ">f4", (n_samples,))])
+    return np.fromfile(path, dtype=trace, offset=3600)
+
+
+def _legacy_ieee_samples(data: bytes) -> bytearray:
+    """Sample-by-sample conversion of IEEE floats as in the former standardizer."""
+    samples = []
+    for i in range(0, len(data), 4):
+        samples.append(struct.unpack(">f", data[i : i + 4])[0])
+    out = bytearray()
+    for sample in samples:
+        out += struct.pack(">f", sample)
+    return out
+
+
+# =============================================================================
+# TEST CLASS
+# =============================================================================
+
+
+class TestSegyStandardizer:
+    """
+    Tests for the block-based converter in processing/segy_standardizer.py.
+    """
+
+    def test_ibm_to_ieee(self):
+        """Known IBM encodings are decoded correctly."""
+        # -118.625 is the classic example 0xC276A000, 1.0 is 0x41100000.
+        ibm = np.array([0xC276A000, 0x41100000, 0x00000000, 0x3F200000])
+        assert np.array_equal(ibm_to_ieee(ibm), [-118.625, 1.0, 0.0, 0.0078125])
+
+    def test_ibm_file(self, tmp_path):
+        """
+        IBM samples are decoded to IEEE float32, headers are copied and the
+        PZero fields are set on a square grid of traces.
+        """
+        rng = np.random.default_rng(0)
+        samples = rng.normal(scale=1000.0, size=(27, 50))
+        _write_segy(tmp_path / "ibm.sgy", _ieee_to_ibm(samples), 1, ">u4")
+        messages = []
+        standardize_segy_for_pzero(
+            tmp_path / "ibm.sgy", tmp_path / "out.sgy", print_fn=messages.append
+        )
+
+        traces = _read_output(tmp_path / "out.sgy", 50)
+        # 27 traces fill a 5 x 5 grid, the last 2 are dropped.
+        assert len(traces) == 25
+        assert np.allclose(traces["samples"], samples[:25], rtol=1e-6, atol=0.0)
+        headers = traces["header"]
+        assert np.array_equal(
+            headers[:, 72:76].copy().view(">i4").ravel(), np.arange(25)
+        )
+        assert np.array_equal(
+            headers[:, 188:190].copy().view(">u2").ravel(), np.arange(25) // 5 + 1
+        )
+        assert np.array_equal(
+            headers[:, 192:194].copy().view(">u2").ravel(), np.arange(25) % 5 + 1
+        )
+        assert np.array_equal(
+            headers[:, 180:184].copy().view(">i4").ravel(), np.arange(25) // 5 * 100
+        )
+        assert np.all(headers[:, 114:116].copy().view(">u2") == 50)
+        assert np.all(headers[:, 116:118].copy().view(">u2") == 4000)
+        with open(tmp_path / "out.sgy", "rb") as file:
+            file.seek(3224)
+            assert struct.unpack(">H", file.read(2))[0] == 5
+        assert any("25/25" in message for message in messages)
+
+    def test_int16_file(self, tmp_path):
+        """16-bit integer samples are read with their own trace size."""
+        samples = np.arange(16 * 30).reshape(16, 30) - 200
+        _write_segy(tmp_path / "int16.sgy", samples, 3, ">i2")
+        standardize_segy_for_pzero(
+            tmp_path / "int16.sgy", tmp_path / "out.sgy", print_fn=lambda *a: None
+        )
+        traces = _read_output(tmp_path / "out.sgy", 30)
+        assert len(traces) == 16
+        assert np.array_equal(traces["samples"], samples)
+
+    def test_ieee_file(self, tmp_path):
+        """
+        IEEE samples are written unchanged, as with the former sample-by-sample
+        conversion.
+        """
+        rng = np.random.default_rng(1)
+        samples = rng.normal(size=(20 * 20, 500)).astype(np.float32)
+        _write_segy(tmp_path / "ieee.sgy", samples, 5, ">f4")
+        standardize_segy_for_pzero(
+            tmp_path / "ieee.sgy", tmp_path / "out.sgy", print_fn=lambda *a: None
+        )
+        legacy = _legacy_ieee_samples(samples[:200].astype(">f4").tobytes())
+
+        traces = _read_output(tmp_path / "out.sgy", 500)
+        assert np.array_equal(traces["samples"], samples)
+        assert traces["samples"][:200].tobytes() == bytes(legacy)
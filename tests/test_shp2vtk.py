@@ -0,0 +1,244 @@
+"""
+test_shp2vtk.py
+PZero© Andrea Bistacchi
+
+How to run
+----------
+    pytest test_shp2vtk.py -v
+
+Or together with all other tests:
+
+    pytest -v
+
+"""
+
+from copy import deepcopy
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+from geopandas import GeoDataFrame
+from pandas import DataFrame as pd_DataFrame
+from shapely.geometry import LineString, MultiLineString, Point
+from vtkmodules.util.numpy_support import vtk_to_numpy
+
+from pzero.collections.background_collection import BackgroundCollection
+from pzero.collections.geological_collection import GeologicalCollection
+from pzero.entities_factory import Attitude, PolyLine
+from pzero.imports.shp2vtk import shp2vtk
+from pzero.legend_manager import Legend
+
+# =============================================================================
+# HELPERS
+# =============================================================================
+
+
+def _make_self() -> MagicMock:
+    """
+    Build a MagicMock that behaves like the project window, with real
+    geological and background collections.
+    """
+    self_mock = MagicMock()
+    # The Qt table model needs a real QObject parent, so it is replaced by a mock.
+    with patch("pzero.collections.AbstractCollection.BaseTableModel"):
+        self_mock.geol_coll = GeologicalCollection(parent=self_mock)
+        self_mock.backgrnd_coll = BackgroundCollection(parent=self_mock)
+    self_mock.geol_coll.legend_df = pd_DataFrame(
+        columns=list(Legend.geol_legend_dict.keys())
+    )
+    self_mock.backgrnd_coll.legend_df = pd_DataFrame(
+        columns=list(Legend.geol_legend_dict.keys())
+    )
+    return self_mock
+
+
+def _run_import(self_mock: MagicMock, gdf: GeoDataFrame, mapping: dict, collection):
+    """Run shp2vtk on an in-memory GeoDataFrame with the given attribute mapping."""
+    dialog = MagicMock()
+    dialog.return_value.exec.return_value = dict(mapping)
+    with patch("pzero.imports.shp2vtk.gpd_read_file", return_value=gdf), patch(
+        "pzero.imports.shp2vtk.ShapefileAssignmentDialog", dialog
+    ):
+        shp2vtk(self=self_mock, in_file_name="layer.shp", collection=collection)
+
+
+def _random_lines(n: int = 3000, seed: int = 0) -> list:
+    """Return n random-walk 2D lines with 2 to 30 vertexes."""
+    rng = np.random.default_rng(seed)
+    return [
+        LineString(np.cumsum(rng.normal(size=(rng.integers(2, 30), 2)), axis=0))
+        for _ in range(n)
+    ]
+
+
+def _legacy_import(coll, gdf: GeoDataFrame):
+    """Row by row import of LineStrings as in the former shp2vtk."""
+    for row in range(gdf.shape[0]):
+        curr_obj_dict = deepcopy(GeologicalCollection().entity_dict)
+        curr_obj_dict["feature"] = gdf.loc[row, "unit"]
+        curr_obj_dict["topology"] = "PolyLine"
+        curr_obj_dict["vtk_obj"] = PolyLine()
+        out_xyz = np.array(list(gdf.loc[row].geometry.coords), dtype=float)
+        out_xyz = np.column_stack((out_xyz, np.zeros((len(out_xyz), 1))))
+        curr_obj_dict["vtk_obj"].points = out_xyz
+        curr_obj_dict["vtk_obj"].auto_cells()
+        coll.add_entity_from_dict(curr_obj_dict)
+
+
+# =============================================================================
+# TEST CLASS
+# =============================================================================
+
+
+class TestShp2Vtk:
+    """
+    Tests for the vectorized shapefile import defined in imports/shp2vtk.py.
+    """
+
+    def test_lines(self):
+        """
+        LineString and MultiLineString rows give one PolyLine each, with the
+        segments of each part, Z = 0 for 2D lines and a single bulk insert.
+        """
+        gdf = GeoDataFrame(
+            {
+                "unit": ["fault", "contact", "fault"],
+                "geometry": [
+                    LineString([(0, 0, 5), (1, 0, 6), (2, 1, 7)]),
+                    MultiLineString([[(0, 0), (1, 1)], [(5, 5), (6, 5), (7, 6)]]),
+                    LineString([(10, 0), (11, 0)]),
+                ],
+            }
+        )
+        self_mock = _make_self()
+        _run_import(self_mock, gdf, {"feature": "unit"}, "Geology")
+
+        geol_coll = self_mock.geol_coll
+        self_mock.signals.entities_added.emit.assert_called_once()
+        assert len(geol_coll.df) == 3
+        assert geol_coll.df["feature"].to_list() == ["fault", "contact", "fault"]
+        first, multi, last = [
+            geol_coll.get_uid_vtk_obj(uid) for uid in geol_coll.get_uids
+        ]
+        assert np.allclose(first.points, [[0, 0, 5], [1, 0, 6], [2, 1, 7]])
+        assert np.allclose(last.points, [[10, 0, 0], [11, 0, 0]])
+        assert np.allclose(multi.points[:, 2], 0.0)
+        lines = multi.GetLines()
+        assert vtk_to_numpy(lines.GetConnectivityArray()).tolist() == [0, 1, 2, 3, 3, 4]
+        assert vtk_to_numpy(first.GetLines().GetConnectivityArray()).tolist() == [
+            0,
+            1,
+            1,
+            2,
+        ]
+
+    def test_points(self):
+        """
+        Points are grouped by feature into Attitude entities with dip, dip
+        direction converted from strike direction and normals.
+        """
+        gdf = GeoDataFrame(
+            {
+                "unit": ["bedding", "foliation", "bedding"],
+                "dip": [30.0, 60.0, 45.0],
+                "dir": [0.0, 90.0, 180.0],
+                "geometry": [Point(0, 0), Point(1, 1, 3), Point(2, 2)],
+            }
+        )
+        self_mock = _make_self()
+        _run_import(
+            self_mock, gdf, {"feature": "unit", "dip": "dip", "dir": "dir"}, "Geology"
+        )
+
+        geol_coll = self_mock.geol_coll
+        assert geol_coll.df["feature"].to_list() == ["bedding", "foliation"]
+        bedding = geol_coll.get_uid_vtk_obj(geol_coll.get_uids[0])
+        assert isinstance(bedding, Attitude)
+        assert np.allclose(bedding.points, [[0, 0, 0], [2, 2, 0]])
+        assert np.allclose(bedding.get_point_data("dip_dir"), [90.0, 270.0])
+        assert geol_coll.df["properties_names"].values[0] == [
+            "dip",
+            "dip_dir",
+            "Normals",
+        ]
+        normals = bedding.get_point_data("Normals")
+        assert np.allclose(np.linalg.norm(normals, axis=1), 1.0)
+
+    def test_empty_points(self):
+        """
+        Empty points, in the middle and at the end of the layer, are skipped
+        and do not take the coordinates of other rows. A group made only of
+        empty points gives no entity.
+        """
+        gdf = GeoDataFrame(
+            {
+                "unit": ["bedding", "bedding", "foliation", "bedding", "joint"],
+                "dip": [30.0, 60.0, 45.0, 20.0, 80.0],
+                "dir": [0.0, 90.0, 180.0, 270.0, 0.0],
+                "geometry": [
+                    Point(0, 0),
+                    Point(),
+                    Point(1, 1, 3),
+                    Point(2, 2),
+                    Point(),
+                ],
+            }
+        )
+        self_mock = _make_self()
+        _run_import(
+            self_mock, gdf, {"feature": "unit", "dip": "dip", "dir": "dir"}, "Geology"
+        )
+
+        geol_coll = self_mock.geol_coll
+        assert geol_coll.df["feature"].to_list() == ["bedding", "foliation"]
+        bedding, foliation = [
+            geol_coll.get_uid_vtk_obj(uid) for uid in geol_coll.get_uids
+        ]
+        assert np.allclose(bedding.points, [[0, 0, 0], [2, 2, 0]])
+        assert np.allclose(bedding.get_point_data("dip"), [30.0, 20.0])
+        assert np.allclose(foliation.points, [[1, 1, 3]])
+
+    def test_background_labels(self):
+        """Each background line gets its own label as field data."""
+        gdf = GeoDataFrame(
+            {
+                "unit": ["road", "river"],
+                "label": ["A1", "Po"],
+                "geometry": [
+                    LineString([(0, 0), (1, 0)]),
+                    LineString([(0, 1), (1, 1)]),
+                ],
+            }
+        )
+        self_mock = _make_self()
+        _run_import(
+            self_mock, gdf, {"feature": "unit", "label": "label"}, "Background data"
+        )
+        backgrnd_coll = self_mock.backgrnd_coll
+        labels = [
+            backgrnd_coll.get_uid_vtk_obj(uid).get_field_data("name").tolist()
+            for uid in backgrnd_coll.get_uids
+        ]
+        assert labels == [["A1"], ["Po"]]
+
+    def test_against_row_by_row(self):
+        """
+        The vectorized import gives the same points and cells as the row by row import.
+        """
+        lines = _random_lines(50)
+        gdf = GeoDataFrame({"unit": ["contact"] * len(lines), "geometry": lines})
+        legacy_mock = _make_self()
+        _legacy_import(legacy_mock.geol_coll, gdf)
+        self_mock = _make_self()
+        _run_import(self_mock, gdf, {"feature": "unit"}, "Geology")
+
+        legacy_coll = legacy_mock.geol_coll
+        geol_coll = self_mock.geol_coll
+        assert len(geol_coll.df) == len(lines)
+        for legacy_uid, uid in zip(legacy_coll.get_uids, geol_coll.get_uids):
+            legacy_obj = legacy_coll.get_uid_vtk_obj(legacy_uid)
+            vtk_obj = geol_coll.get_uid_vtk_obj(uid)
+            assert np.array_equal(legacy_obj.points, vtk_obj.points)
+            assert np.array_equal(
+                vtk_to_numpy(legacy_obj.GetLines().GetConnectivityArray()),
+                vtk_to_numpy(vtk_obj.GetLines().GetConnectivityArray()),
+            )
@@ -0,0 +1,159 @@
+"""
+test_spatial_index.py
+PZero© Andrea Bistacchi
+
+How to run
+----------
+    pytest test_spatial_index.py -v
+
+Or together with all other tests:
+
+    pytest -v
+
+"""
+
+import pickle
+
+import numpy as np
+import pytest
+from scipy.spatial import cKDTree
+from vtkmodules.vtkFiltersPoints import vtkPCANormalEstimation
+
+from pzero.entities_factory import PCDom
+from pzero.helpers.spatial_index import INDEX_EXTENSION, SpatialIndexCache
+
+# =============================================================================
+# HELPERS
+# =============================================================================
+
+
+def _make_pc(n_points: int = 20000, seed: int = 0) -> PCDom:
+    """Build a PCDom with random points and vertex cells."""
+    rng = np.random.default_rng(seed)
+    pc = PCDom()
+    pc.points = rng.random((n_points, 3)) * 100.0
+    pc.generate_cells()
+    return pc
+
+
+# =============================================================================
+# TEST CLASS
+# =============================================================================
+
+
+class TestSpatialIndexCache:
+    """
+    Tests for the per-entity spatial index cache defined in helpers/spatial_index.py.
+    """
+
+    def test_cached_until_points_change(self):
+        """
+        Indexes are reused when properties change and rebuilt when points change.
+        """
+        pc = _make_pc()
+        cache = SpatialIndexCache()
+        tree = cache.kdtree(uid="pc", vtk_obj=pc)
+        assert cache.kdtree(uid="pc", vtk_obj=pc) is tree
+        pc.set_point_data("prop", np.zeros(pc.GetNumberOfPoints()))
+        pc.GetPointData().SetActiveScalars("prop")
+        assert cache.is_valid(uid="pc", vtk_obj=pc)
+        assert cache.kdtree(uid="pc", vtk_obj=pc) is tree
+
+        locator = cache.point_locator(uid="pc", vtk_obj=pc)
+        assert cache.point_locator(uid="pc", vtk_obj=pc) is locator
+        assert locator.FindClosestPoint(pc.points[10]) == 10
+
+        pc.points = pc.points + 1.0
+        assert not cache.is_valid(uid="pc", vtk_obj=pc)
+        new_tree = cache.kdtree(uid="pc", vtk_obj=pc)
+        assert new_tree is not tree
+        assert np.array_equal(new_tree.data, pc.points)
+        assert cache.kdtree(uid="pc", vtk_obj=pc) is new_tree
+        new_locator = cache.point_locator(uid="pc", vtk_obj=pc)
+        assert new_locator is not locator
+        assert new_locator.FindClosestPoint(pc.points[10]) == 10
+
+    def test_invalidate(self):
+        """Invalidated uids are rebuilt, other uids are kept."""
+        pc_a = _make_pc(1000, seed=1)
+        pc_b = _make_pc(1000, seed=2)
+        cache = SpatialIndexCache()
+        tree_a = cache.kdtree(uid="a", vtk_obj=pc_a)
+        tree_b = cache.kdtree(uid="b", vtk_obj=pc_b)
+        cache.invalidate(["a"])
+        assert cache.kdtree(uid="a", vtk_obj=pc_a) is not tree_a
+        assert cache.kdtree(uid="b", vtk_obj=pc_b) is tree_b
+        cache.invalidate()
+        assert not cache.is_valid(uid="b", vtk_obj=pc_b)
+
+    def test_prefetch(self):
+        """An index built in background is collected by the next call."""
+        pc = _make_pc(50000)
+        cache = SpatialIndexCache()
+        cache.prefetch(uid="pc", vtk_obj=pc)
+        tree = cache.kdtree(uid="pc", vtk_obj=pc)
+        assert isinstance(tree, cKDTree)
+        assert tree.n == pc.GetNumberOfPoints()
+        assert cache.is_valid(uid="pc", vtk_obj=pc)
+
+    def test_filter_locator(self):
+        """A cached locator gives the same normals as the one built by the filter."""
+        pc = _make_pc(5000)
+        cache = SpatialIndexCache()
+        normals_filter = vtkPCANormalEstimation()
+        normals_filter.SetInputData(pc)
+        normals_filter.SetSampleSize(15)
+        normals_filter.Update()
+        expected = normals_filter.GetOutput().GetPointData().GetNormals()
+        pc.vtk_set_normals(locator=cache.point_locator(uid="pc", vtk_obj=pc))
+        normals = pc.get_point_data("Normals")
+        reference = np.array(
+            [expected.GetTuple3(i) for i in range(expected.GetNumberOfTuples())]
+        )
+        assert np.allclose(np.abs(normals), np.abs(reference))
+
+    def test_save_and_load(self, tmp_path):
+        """
+        Saved kd-trees are loaded for the same points and ignored for different
+        points or files with other content.
+        """
+        pc = _make_pc(20000)
+        cache = SpatialIndexCache()
+        path = str(tmp_path / f"pc{INDEX_EXTENSION}")
+        assert not cache.save(uid="pc", vtk_obj=pc, path=path)
+        tree = cache.kdtree(uid="pc", vtk_obj=pc)
+        assert cache.save(uid="pc", vtk_obj=pc, path=path)
+
+        # A project opened again: new vtk object with the same points.
+        reopened = PCDom()
+        reopened.DeepCopy(pc)
+        new_cache = SpatialIndexCache()
+        new_cache.register_saved(uid="pc", path=path)
+        loaded = new_cache.kdtree(uid="pc", vtk_obj=reopened)
+        assert loaded is not tree
+        assert new_cache.kdtree(uid="pc", vtk_obj=reopened) is loaded
+        assert np.array_equal(loaded.indices, tree.indices)
+        assert loaded.query(pc.points[5])[1] == 5
+
+        # Different points, the saved tree is not used.
+        moved = _make_pc(20000, seed=3)
+        new_cache = SpatialIndexCache()
+        new_cache.register_saved(uid="pc", path=path)
+        assert np.array_equal(
+            new_cache.kdtree(uid="pc", vtk_obj=moved).data, moved.points
+        )
+
+        # Files with other objects are refused.
+        with open(path, "wb") as file:
+            pickle.dump({"kdtree": "not a tree"}, file)
+        new_cache = SpatialIndexCache()
+        new_cache.register_saved(uid="pc", path=path)
+        assert isinstance(new_cache.kdtree(uid="pc", vtk_obj=pc), cKDTree)
+
+    @pytest.mark.parametrize("kind", ["kdtree", "point_locator", "octree"])
+    def test_kinds(self, kind):
+        """All kinds of index are built and cached."""
+        pc = _make_pc(2000)
+        cache = SpatialIndexCache()
+        index = cache.get(uid="pc", vtk_obj=pc, kind=kind)
+        assert cache.get(uid="pc", vtk_obj=pc, kind=kind) is index
@@ -0,0 +1,176 @@
+"""
+test_surface_reconstruction.py
+PZero© Andrea Bistacchi
+
+How to run
+----------
+    pytest test_surface_reconstruction.py -v
+
+Or together with all other tests:
+
+    pytest -v
+
+"""
+
+import numpy as np
+import pytest
+from pyvista import wrap as pv_wrap
+from vtkmodules.util.numpy_support import vtk_to_numpy
+from vtkmodules.vtkCommonCore import vtkPoints
+from vtkmodules.vtkCommonDataModel import vtkPolyData
+from vtkmodules.vtkFiltersCore import (
+    vtkAppendPolyData,
+    vtkContourFilter,
+    vtkFeatureEdges,
+)
+from vtkmodules.vtkImagingHybrid import vtkSurfaceReconstructionFilter
+
+from pzero.entities_factory import VertexSet
+from pzero.helpers.surface_reconstruction import (
+    _in_region,
+    density_spacing,
+    gather_points,
+    points_to_polydata,
+    reconstruct_surface,
+    tile_regions,
+)
+
+# =============================================================================
+# HELPERS
+# =============================================================================
+
+
+def _height(x, y):
+    return 30.0 * np.sin(x / 150.0) * np.cos(y / 200.0)
+
+
+def _make_cloud(n_points: int = 10000, size: float = 1000.0, seed: int = 0):
+    """Points sampled at random on a wavy surface."""
+    rng = np.random.default_rng(seed)
+    xy = rng.uniform(0.0, size, (n_points, 2))
+    return np.column_stack((xy, _height(xy[:, 0], xy[:, 1])))
+
+
+def _make_vertex_set(points=None) -> VertexSet:
+    vertex_set = VertexSet()
+    vertex_set.points = points
+    vertex_set.auto_cells()
+    return vertex_set
+
+
+def _legacy_reconstruction(vtk_objs=None, neighborhood_size: int = 20):
+    """Points copied one by one and a single global reconstruction, as formerly done by poisson_interpolation."""
+    vtkappend = vtkAppendPolyData()
+    for vtk_obj in vtk_objs:
+        point_coord = vtk_obj.points
+        points = vtkPoints()
+        x = 0
+        for row in point_coord:
+            points.InsertPoint(
+                x, point_coord[x, 0], point_coord[x, 1], point_coord[x, 2]
+            )
+            x += 1
+        polydata = vtkPolyData()
+        polydata.SetPoints(points)
+        vtkappend.AddInputData(polydata)
+    vtkappend.Update()
+    surf_from_points = vtkSurfaceReconstructionFilter()
+    surf_from_points.SetNeighborhoodSize(neighborhood_size)
+    surf_from_points.SetInputDataObject(vtkappend.GetOutput())
+    surf_from_points.Update()
+    contour_surface = vtkContourFilter()
+    contour_surface.SetInputData(surf_from_points.GetOutput())
+    contour_surface.SetValue(0, 0.0)
+    contour_surface.Update()
+    return contour_surface.GetOutput()
+
+
+def _open_edges(surface=None) -> int:
+    """Number of boundary and non-manifold edges, that grows with the cracks between tiles."""
+    edges = vtkFeatureEdges()
+    edges.SetInputData(surface)
+    edges.BoundaryEdgesOn()
+    edges.NonManifoldEdgesOn()
+    edges.FeatureEdgesOff()
+    edges.ManifoldEdgesOff()
+    edges.Update()
+    return edges.GetOutput().GetNumberOfCells()
+
+
+def _inner_error(surface=None, size: float = 1000.0, border: float = 50.0):
+    """Vertical distance from the true surface of the points of a reconstructed surface, away from its border."""
+    points = pv_wrap(surface).points
+    inner = np.all((points[:, :2] > border) & (points[:, :2] < size - border), axis=1)
+    return np.abs(points[inner, 2] - _height(points[inner, 0], points[inner, 1]))
+
+
+# =============================================================================
+# TEST CLASS
+# =============================================================================
+
+
+class TestSurfaceReconstruction:
+    """
+    Tests for the tiled surface reconstruction defined in
+    helpers/surface_reconstruction.py and used by poisson_interpolation.
+    """
+
+    def test_points_and_tiles(self):
+        """Points are wrapped without copies, and tiles partition the cloud evenly."""
+        points = _make_cloud(20000)
+        polydata = points_to_polydata(points)
+        assert np.shares_memory(vtk_to_numpy(polydata.GetPoints().GetData()), points)
+        vertex_set = _make_vertex_set(points)
+        gathered = gather_points([vertex_set])
+        assert np.shares_memory(gathered, vertex_set.points)
+        assert len(gather_points([vertex_set, vertex_set])) == 40000
+
+        # About one neighbour every 1000 / sqrt(20000) m.
+        assert 5.0 < density_spacing(points) < 10.0
+
+        regions = tile_regions(points=points, max_tile_points=3000)
+        assert len(regions) >= 7
+        counts = [
+            _in_region(coords=points, axes=axes, lows=lows, highs=highs).sum()
+            for axes, lows, highs in regions
+        ]
+        assert sum(counts) == len(points)
+        assert max(counts) <= 3000
+
+    @pytest.mark.parametrize("seed", [0, 1])
+    def test_tiled_surface(self, seed):
+        """
+        Tiles contoured on a shared lattice give the same surface as a single reconstruction,
+        without cracks along their borders, also when normals are oriented differently in some tiles.
+        """
+        points = _make_cloud(12000, seed=seed)
+        single, n_tiles = reconstruct_surface(points=points, max_tile_points=20000)
+        assert n_tiles == 1
+        tiled, n_tiles = reconstruct_surface(points=points, max_tile_points=2000)
+        assert n_tiles >= 6
+        assert np.median(_inner_error(single)) < 0.05
+        assert np.median(_inner_error(tiled)) < 0.05
+        assert np.percentile(_inner_error(tiled), 99) < 0.5
+        assert np.allclose(single.GetBounds()[:4], tiled.GetBounds()[:4], atol=20.0)
+        # The surface is not duplicated where tiles overlap.
+        assert 0.9 < tiled.GetNumberOfPolys() / single.GetNumberOfPolys() < 1.1
+        assert pv_wrap(tiled).point_data.keys() == pv_wrap(single).point_data.keys()
+        # Only the outer border of the surface is open.
+        assert _open_edges(tiled) < 1.1 * _open_edges(single)
+
+    def test_same_result_as_legacy(self):
+        """
+        Points gathered from several entities give the same surface as the
+        former copy of each point and single global reconstruction, within the
+        spacing of the lattice, that now follows the point density.
+        """
+        points = _make_cloud(12000)
+        vtk_objs = [_make_vertex_set(points[i::2].copy()) for i in range(2)]
+        legacy = _legacy_reconstruction(vtk_objs)
+        surface, n_tiles = reconstruct_surface(
+            points=gather_points(vtk_objs), max_tile_points=20000
+        )
+        assert n_tiles == 1
+        assert np.median(_inner_error(legacy)) < 0.05
+        assert np.median(_inner_error(surface)) < 0.05
+        assert np.allclose(legacy.GetBounds()[:4], surface.GetBounds()[:4], atol=20.0)
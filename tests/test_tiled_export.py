@@ -0,0 +1,402 @@
+"""
+test_tiled_export.py
+PZero© Andrea Bistacchi
+
+How to run
+----------
+    pytest test_tiled_export.py -v
+
+Or together with all other tests:
+
+    pytest -v
+
+Rendering tests are skipped when VTK cannot open an off-screen render window
+(e.g. headless machines without OSMesa or EGL).
+"""
+
+import subprocess
+import sys
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+import pyvista as pv
+from vtkmodules.util.numpy_support import numpy_to_vtk
+from vtkmodules.vtkCommonDataModel import vtkImageData
+from vtkmodules.vtkRenderingAnnotation import vtkCornerAnnotation
+from vtkmodules.vtkRenderingCore import (
+    vtkActor,
+    vtkPolyDataMapper,
+    vtkRenderer,
+    vtkRendererCollection,
+    vtkRenderWindow,
+    vtkTextActor,
+)
+
+from pzero.helpers.tiled_export import (
+    _TiledView,
+    add_shared_actors,
+    clone_actor,
+    colormap_lookup_table,
+    render_tiled,
+    scalar_bar_actors,
+    tile_grid,
+)
+
+# =============================================================================
+# HELPERS
+# =============================================================================
+
+
+def _can_render_off_screen() -> bool:
+    """Off-screen rendering is tried in a subprocess, since VTK aborts the process
+    when no display or off-screen context is available."""
+    try:
+        result = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                "import pyvista as pv; p = pv.Plotter(off_screen=True, window_size=[8, 8]); "
+                "p.add_mesh(pv.Sphere()); p.screenshot(return_img=True)",
+            ],
+            capture_output=True,
+            timeout=60,
+        )
+    except Exception:
+        return False
+    return result.returncode == 0
+
+
+def _make_renderer(with_scalars: bool = True) -> vtkRenderer:
+    """Renderer with a scalar-coloured surface, a plain line and a hidden actor."""
+    renderer = vtkRenderer()
+    surface = pv.Plane(i_resolution=20, j_resolution=20)
+    surface["elevation"] = surface.points[:, 0]
+    mapper = vtkPolyDataMapper()
+    mapper.SetInputData(surface)
+    mapper.SetScalarVisibility(with_scalars)
+    mapper.SelectColorArray("elevation")
+    mapper.SetScalarModeToUsePointFieldData()
+    mapper.SetScalarRange(-0.5, 0.5)
+    actor = vtkActor()
+    actor.SetMapper(mapper)
+    actor.GetProperty().SetLineWidth(2.0)
+    actor.GetProperty().SetPointSize(4.0)
+    renderer.AddActor(actor)
+
+    line_mapper = vtkPolyDataMapper()
+    line_mapper.SetInputData(pv.Line())
+    line_mapper.ScalarVisibilityOff()
+    line = vtkActor()
+    line.SetMapper(line_mapper)
+    renderer.AddActor(line)
+
+    hidden_mapper = vtkPolyDataMapper()
+    hidden_mapper.SetInputData(pv.Sphere())
+    hidden = vtkActor()
+    hidden.SetMapper(hidden_mapper)
+    hidden.VisibilityOff()
+    renderer.AddActor(hidden)
+    return renderer
+
+
+class _FakeRenderWindow:
+    """Render window that records renders and alpha bit planes without an OpenGL context."""
+
+    def __init__(
+        self, renderer=None, size=(40, 30), n_tiles: int = 3, rendered: bool = True
+    ):
+        self.n_tiles = n_tiles
+        self.renderers = vtkRendererCollection()
+        self.renderers.AddItem(renderer)
+        self.size = size
+        self.alpha_bit_planes = 0
+        self.never_rendered = 0 if rendered else 1
+        self.finalized = False
+        self.rendered_tiles = []
+
+    def GetSize(self):
+        return self.size
+
+    def GetRenderers(self):
+        return self.renderers
+
+    def GetAlphaBitPlanes(self):
+        return self.alpha_bit_planes
+
+    def SetAlphaBitPlanes(self, value):
+        self.alpha_bit_planes = value
+
+    def GetNeverRendered(self):
+        return self.never_rendered
+
+    def Finalize(self):
+        self.finalized = True
+
+    def Render(self):
+        self.never_rendered = 0
+        self.rendered_tiles.append(
+            _camera_tile(self.renderers.GetItemAsObject(0), self.n_tiles)
+        )
+
+
+def _camera_tile(renderer=None, n_tiles: int = 1):
+    """Tile x, y set by _TiledView, from the window center of the camera (centered view)."""
+    center_x, center_y = renderer.GetActiveCamera().GetWindowCenter()
+    return round((center_x + n_tiles - 1) / 2), round((center_y + n_tiles - 1) / 2)
+
+
+def _fake_window_to_image(scene=None):
+    """Factory of window-to-image filters that return the tile of scene, an image of the whole tiled area
+    with the top row first, shown by the camera of the fake window, with the bottom row first as VTK.
+    """
+
+    class _FakeWindowToImage:
+        def __init__(self):
+            self.channels = 3
+
+        def SetInput(self, render_window):
+            self.render_window = render_window
+
+        def SetInputBufferTypeToRGBA(self):
+            self.channels = 4
+
+        def ReadFrontBufferOff(self):
+            pass
+
+        def ShouldRerenderOff(self):
+            pass
+
+        def Modified(self):
+            pass
+
+        def Update(self):
+            width, height = self.render_window.GetSize()
+            x, y = self.render_window.rendered_tiles[-1]
+            top = scene.shape[0] - (y + 1) * height
+            tile = scene[top : top + height, x * width : (x + 1) * width]
+            tile = np.ascontiguousarray(tile[::-1, :, : self.channels])
+            self.output = vtkImageData()
+            self.output.SetDimensions(width, height, 1)
+            self.output.GetPointData().SetScalars(
+                numpy_to_vtk(tile.reshape(-1, self.channels), deep=True)
+            )
+
+        def GetOutput(self):
+            return self.output
+
+    return _FakeWindowToImage
+
+
+# =============================================================================
+# TEST CLASS
+# =============================================================================
+
+
+class TestTiledExport:
+    """
+    Tests for the actor sharing and tiled rendering defined in
+    helpers/tiled_export.py and used by the screenshot and GIF export dialogs.
+    """
+
+    def test_tile_grid(self):
+        """Tiles are never larger than the tile size and cover the whole image."""
+        assert tile_grid(width=1920, height=1080) == (1, 1920, 1080)
+        assert tile_grid(width=7680, height=4320) == (4, 1920, 1080)
+        n_tiles, tile_width, tile_height = tile_grid(width=5001, height=3001)
+        assert n_tiles == 3
+        assert max(tile_width, tile_height) <= 2048
+        assert 5001 <= n_tiles * tile_width < 5001 + n_tiles
+        assert 3001 <= n_tiles * tile_height < 3001 + n_tiles
+
+    def test_shared_actors(self):
+        """Clones share data and lookup tables with the view, and own their mapper and property."""
+        source = _make_renderer()
+        actor = list(source.GetActors())[0]
+        clone = clone_actor(actor=actor, line_width_scale=3.0, point_size_scale=0.1)
+        assert clone.GetMapper() is not actor.GetMapper()
+        assert clone.GetMapper().GetInput() is actor.GetMapper().GetInput()
+        assert clone.GetMapper().GetLookupTable() is actor.GetMapper().GetLookupTable()
+        assert clone.GetMapper().GetArrayName() == "elevation"
+        assert clone.GetProperty() is not actor.GetProperty()
+        assert clone.GetProperty().GetLineWidth() == 6.0
+        assert clone.GetProperty().GetPointSize() == 3.0
+        assert actor.GetProperty().GetLineWidth() == 2.0
+
+        target = vtkRenderer()
+        scalar_clones = add_shared_actors(
+            source_renderer=source, target_renderer=target
+        )
+        assert target.GetActors().GetNumberOfItems() == 2
+        assert len(scalar_clones) == 1
+        # Scalar clones with another colormap get a lookup table of their own.
+        target = vtkRenderer()
+        scalar_clones = add_shared_actors(
+            source_renderer=source,
+            target_renderer=target,
+            lookup_table_factory=lambda scalar_range: colormap_lookup_table(
+                "viridis", scalar_range
+            ),
+        )
+        lookup_table = scalar_clones[0].GetMapper().GetLookupTable()
+        assert lookup_table is not actor.GetMapper().GetLookupTable()
+        assert tuple(lookup_table.GetTableRange()) == (-0.5, 0.5)
+        assert actor.GetMapper().GetLookupTable() is not lookup_table
+        # One scalar bar for each property.
+        bars = scalar_bar_actors(clones=scalar_clones + scalar_clones)
+        assert len(bars) == 1
+        assert bars[0].GetTitle() == "elevation"
+        assert (
+            scalar_bar_actors(
+                clones=add_shared_actors(
+                    source_renderer=_make_renderer(with_scalars=False),
+                    target_renderer=vtkRenderer(),
+                )
+            )
+            == []
+        )
+
+    def test_tiled_view(self):
+        """Camera, 2D actors and corner annotations are set up for each tile and then restored."""
+        render_window = vtkRenderWindow()
+        render_window.OffScreenRenderingOn()
+        render_window.SetSize(400, 300)
+        renderer = vtkRenderer()
+        render_window.AddRenderer(renderer)
+        overlay = vtkRenderer()
+        render_window.AddRenderer(overlay)
+        renderer.GradientBackgroundOn()
+        renderer.SetBackground(0.0, 0.0, 0.0)
+        renderer.SetBackground2(1.0, 1.0, 1.0)
+        camera = renderer.GetActiveCamera()
+        camera.SetViewAngle(30.0)
+        camera.SetParallelScale(10.0)
+        text = vtkTextActor()
+        text.SetInput("title")
+        text.GetPositionCoordinate().SetCoordinateSystemToNormalizedViewport()
+        text.SetPosition(0.5, 0.5)
+        renderer.AddActor2D(text)
+        corner = vtkCornerAnnotation()
+        corner.SetText(7, "upper edge")
+        renderer.AddActor2D(corner)
+
+        tiled_view = _TiledView(
+            render_window=render_window, renderer=renderer, n_tiles=4
+        )
+        half_angle = np.tan(np.radians(camera.GetViewAngle()) / 2.0)
+        assert np.isclose(half_angle * 4, np.tan(np.radians(15.0)))
+        assert camera.GetParallelScale() == 2.5
+        assert not corner.GetVisibility()
+        corner_texts = tiled_view.corner_texts
+        assert [actor.GetInput() for actor in corner_texts] == ["upper edge"]
+
+        tiled_view.set_tile(x=0, y=0)
+        assert np.allclose(camera.GetWindowCenter(), (-3.0, -3.0))
+        assert np.allclose(text.GetPosition()[:2], (800.0, 600.0))
+        assert overlay.GetDraw()
+        assert np.allclose(renderer.GetBackground2(), (0.25, 0.25, 0.25))
+        tiled_view.set_tile(x=3, y=2)
+        assert np.allclose(camera.GetWindowCenter(), (3.0, 1.0))
+        assert np.allclose(text.GetPosition()[:2], (800.0 - 1200.0, 600.0 - 600.0))
+        assert np.allclose(
+            corner_texts[0].GetPosition()[:2], (800.0 - 1200.0, 1195.0 - 600.0)
+        )
+        assert not overlay.GetDraw()
+        assert np.allclose(renderer.GetBackground(), (0.5, 0.5, 0.5))
+
+        tiled_view.restore()
+        assert camera.GetViewAngle() == 30.0
+        assert camera.GetParallelScale() == 10.0
+        assert np.allclose(camera.GetWindowCenter(), (0.0, 0.0))
+        assert text.GetPositionCoordinate().GetCoordinateSystemAsString() == (
+            "Normalized Viewport"
+        )
+        assert np.allclose(text.GetPosition()[:2], (0.5, 0.5))
+        assert corner.GetVisibility()
+        assert renderer.GetActors2D().GetNumberOfItems() == 2
+        assert overlay.GetDraw()
+        assert np.allclose(renderer.GetBackground2(), (1.0, 1.0, 1.0))
+
+    @pytest.mark.parametrize("transparent", [False, True])
+    def test_tile_stitching(self, transparent):
+        """
+        Tiles rendered by a stubbed window are placed from the bottom left corner, flipped to the top row
+        first, and the extra pixels are cropped evenly on each side. A transparent background needs alpha bit
+        planes, and the context of a window already rendered without them is recreated.
+        """
+        renderer = vtkRenderer()
+        renderer.SetBackgroundAlpha(1.0)
+        render_window = _FakeRenderWindow(renderer=renderer, size=(40, 30))
+        # Every pixel of the 120 x 90 tiled area has a distinct value.
+        rows, cols = np.mgrid[0:90, 0:120]
+        scene = np.stack(
+            [rows, cols, (rows + cols) % 256, np.full_like(rows, 200)], axis=2
+        ).astype(np.uint8)
+        with patch(
+            "pzero.helpers.tiled_export.vtkWindowToImageFilter",
+            _fake_window_to_image(scene),
+        ):
+            image = render_tiled(
+                render_window=render_window,
+                renderer=renderer,
+                width=115,
+                height=88,
+                transparent=transparent,
+            )
+        assert render_window.rendered_tiles == [
+            (x, y) for y in range(3) for x in range(3)
+        ]
+        assert image.shape == (88, 115, 4 if transparent else 3)
+        assert np.array_equal(image, scene[1:89, 2:117, : image.shape[2]])
+        assert bool(render_window.alpha_bit_planes) == transparent
+        assert render_window.finalized == transparent
+        assert renderer.GetBackgroundAlpha() == 1.0
+        assert renderer.GetActiveCamera().GetWindowCenter() == (0.0, 0.0)
+        # A window not rendered yet gets alpha bit planes without being finalized.
+        render_window = _FakeRenderWindow(renderer=renderer, rendered=False)
+        with patch(
+            "pzero.helpers.tiled_export.vtkWindowToImageFilter",
+            _fake_window_to_image(scene),
+        ):
+            render_tiled(
+                render_window=render_window,
+                renderer=renderer,
+                width=120,
+                height=90,
+                transparent=True,
+            )
+        assert render_window.alpha_bit_planes and not render_window.finalized
+
+    @pytest.mark.skipif(
+        not _can_render_off_screen(), reason="off-screen rendering not available"
+    )
+    def test_tiled_rendering(self):
+        """
+        Tiles stitched together match a single render of the whole image.
+        """
+        mesh = pv.ParametricRandomHills()
+        mesh["elevation"] = mesh.points[:, 2]
+
+        def _plotter(size):
+            plotter = pv.Plotter(off_screen=True, window_size=size)
+            plotter.set_background("black", top="white")
+            plotter.add_mesh(mesh, scalars="elevation", show_scalar_bar=False)
+            plotter.camera_position = "iso"
+            return plotter
+
+        plotter = _plotter([800, 600])
+        direct = plotter.screenshot(return_img=True)
+        plotter.close()
+
+        plotter = _plotter([200, 150])
+        plotter.screenshot(return_img=True)
+        tiled = render_tiled(
+            render_window=plotter.ren_win,
+            renderer=plotter.renderer,
+            width=800,
+            height=600,
+        )
+        plotter.close()
+        assert tiled.shape == direct.shape
+        difference = np.abs(tiled.astype(float) - direct.astype(float))
+        assert np.mean(difference) < 3.0
@@ -0,0 +1,274 @@
+"""
+test_view_population.py
+PZero© Andrea Bistacchi
+
+How to run
+----------
+    pytest test_view_population.py -v
+
+Or together with all other tests:
+
+    pytest -v
+
+"""
+
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+from pandas import DataFrame as pd_DataFrame
+
+from pzero.collections.geological_collection import GeologicalCollection
+from pzero.entities_factory import PCDom, PolyLine
+from pzero.legend_manager import Legend
+from pzero.views.abstract_base_view import BaseView
+from pzero.views.abstract_view_vtk import ViewVTK
+from pzero.views.render_batch import RenderBatches
+from pzero.views.view_population import (
+    PopulationQueue,
+    bounds_outline,
+    entity_proxy,
+    valid_bounds,
+)
+
+# =============================================================================
+# HELPERS
+# =============================================================================
+
+# Seconds spent building each actor by the fake view, on the fake clock, and time budget of each slice.
+# Both are exact binary fractions, so a slice builds exactly SLICE_ACTORS actors.
+BUILD_TIME = 0.0625
+SLICE_TIME = 0.25
+SLICE_ACTORS = 5
+
+
+class _FakeClock:
+    """Clock that replaces perf_counter in the view, advanced only by the fake actor builds."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _make_line(x: float = 0.0, length: float = 1.0) -> PolyLine:
+    line = PolyLine()
+    line.points = np.array([[x, 0.0, 0.0], [x, length, 0.0]])
+    line.auto_cells()
+    return line
+
+
+class _FakePlotter:
+    """Plotter with the renderer and methods used by progressive population, without a render window."""
+
+    def __init__(self):
+        self.renderer = MagicMock()
+        self.renderer.actors = {}
+        self.renderer.GetActiveCamera.return_value.GetPosition.return_value = (
+            0.0,
+            0.0,
+            100.0,
+        )
+        self.renderer.GetActiveCamera.return_value.GetParallelProjection.return_value = (
+            0
+        )
+        self.camera_set = False
+        self.n_renders = 0
+
+    def add_actor(self, actor, name=None, **kwargs):
+        self.renderer.actors[name] = actor
+        return actor
+
+    def remove_actor(self, actor, **kwargs):
+        for name, actor_i in list(self.renderer.actors.items()):
+            if name == actor or actor_i is actor:
+                del self.renderer.actors[name]
+
+    def render(self):
+        self.n_renders += 1
+
+
+def _make_self(n_entities: int = 50) -> MagicMock:
+    """
+    Build a MagicMock that behaves like a ViewVTK showing a real geological
+    collection, with a slow fake show_actor_with_property() and the population
+    methods of BaseView and ViewVTK.
+    """
+    self_mock = MagicMock()
+    with patch("pzero.collections.AbstractCollection.BaseTableModel"):
+        self_mock.parent.geol_coll = GeologicalCollection(parent=self_mock.parent)
+    self_mock.parent.geol_coll.legend_df = pd_DataFrame(
+        columns=list(Legend.geol_legend_dict.keys())
+    )
+    for i in range(n_entities):
+        entity_dict = dict(GeologicalCollection().entity_dict)
+        entity_dict["topology"] = "PolyLine"
+        entity_dict["vtk_obj"] = _make_line(x=float(i), length=1.0 + i)
+        self_mock.parent.geol_coll.add_entity_from_dict(entity_dict)
+    self_mock.tree_collection_dict = {"geol_tree": "geol_coll"}
+    self_mock.view_filter = "uid != ''"
+    self_mock.actors_df = pd_DataFrame(
+        columns=["uid", "actor", "show", "collection", "show_property"]
+    )
+    self_mock.plotter = _FakePlotter()
+    self_mock.render_batches = RenderBatches()
+    self_mock.population_queue = None
+    self_mock.placeholders = None
+    self_mock.population_slice_time = SLICE_TIME
+    self_mock.clock = _FakeClock()
+    self_mock.built_uids = []
+    self_mock.PLACEHOLDER_COLOR = ViewVTK.PLACEHOLDER_COLOR
+
+    def show_actor_with_property(
+        uid=None, coll_name=None, show_property=None, visible=None
+    ):
+        self_mock.clock.now += BUILD_TIME
+        self_mock.built_uids.append(uid)
+        actor = MagicMock()
+        actor.visible = visible
+        self_mock.plotter.renderer.actors[uid] = actor
+        return actor
+
+    self_mock.show_actor_with_property = show_actor_with_property
+    for cls, names in [
+        (BaseView, ["add_all_entities", "build_entity_actor", "view_uids"]),
+        (
+            ViewVTK,
+            [
+                "populate_entities",
+                "populate_slice",
+                "finish_population",
+                "is_pending",
+                "build_pending",
+                "get_actor_by_uid",
+                "actor_shown",
+                "remove_actor_in_view",
+            ],
+        ),
+    ]:
+        for name in names:
+            method = getattr(cls, name)
+            setattr(
+                self_mock,
+                name,
+                lambda *args, _m=method, **kwargs: _m(self_mock, *args, **kwargs),
+            )
+    return self_mock
+
+
+# =============================================================================
+# TEST CLASS
+# =============================================================================
+
+
+class TestViewPopulation:
+    """
+    Tests for the progressive population of VTK views defined in
+    views/view_population.py and used by ViewVTK.
+    """
+
+    def test_proxies(self):
+        """Placeholders are bounding box outlines, or subsamples of large point clouds."""
+        outline = bounds_outline((0, 1, 0, 2, 0, 3))
+        assert outline.GetNumberOfPoints() == 8
+        assert outline.GetNumberOfLines() == 12
+        assert outline.GetBounds() == (0, 1, 0, 2, 0, 3)
+
+        pc = PCDom()
+        pc.points = np.random.default_rng(0).random((50000, 3))
+        pc.generate_cells()
+        proxy = entity_proxy(vtk_obj=pc, bounds=valid_bounds(pc), max_points=1000)
+        assert 500 < proxy.GetNumberOfPoints() <= 1000
+        assert proxy.GetNumberOfVerts() == proxy.GetNumberOfPoints()
+        assert valid_bounds(PolyLine()) is None
+
+    def test_queue_order(self):
+        """Entities largest on screen are built first."""
+        queue = PopulationQueue()
+        queue.add(uid="small", coll_name="geol_coll", bounds=(0, 1, 0, 1, 0, 1))
+        queue.add(uid="large", coll_name="geol_coll", bounds=(0, 10, 0, 10, 0, 10))
+        queue.add(
+            uid="far_large", coll_name="geol_coll", bounds=(0, 10, 0, 10, 990, 1000)
+        )
+        # Parallel projection, only the size counts.
+        entries = queue.pop_largest(
+            camera_position=(0, 0, -100), parallel_projection=True
+        )
+        assert [entry[0] for entry in entries][2] == "small"
+        assert len(queue) == 0
+        # Perspective projection, distant entities are smaller on screen.
+        for entry in entries:
+            queue.add(*entry)
+        entries = queue.pop_largest(
+            camera_position=(0, 0, -100), parallel_projection=False
+        )
+        assert [entry[0] for entry in entries] == ["large", "small", "far_large"]
+
+    def test_time_to_first_frame(self):
+        """
+        The view is ready to be shown as soon as placeholders are drawn, without
+        building actors, then actors are built in slices within the time budget,
+        entities largest on screen first.
+        """
+        n_entities = 50
+        self_mock = _make_self(n_entities)
+        self_mock.add_all_entities()
+        assert self_mock.built_uids == []
+        assert len(self_mock.actors_df) == n_entities
+        assert "population_placeholders" in self_mock.plotter.renderer.actors
+        assert len(self_mock.population_queue) == n_entities
+        assert len(self_mock.placeholders) == n_entities
+        self_mock.schedule_population.assert_called_once()
+
+        # A tool that needs an actor gets it at once.
+        uid = self_mock.actors_df["uid"].iloc[10]
+        assert self_mock.get_actor_by_uid(uid) is self_mock.plotter.renderer.actors[uid]
+        assert not self_mock.is_pending(uid)
+        assert self_mock.built_uids == [uid]
+
+        # A pending entity hidden or removed before it is built.
+        hidden_uid = self_mock.actors_df["uid"].iloc[20]
+        self_mock.actors_df.loc[self_mock.actors_df["uid"] == hidden_uid, "show"] = (
+            False
+        )
+        self_mock.placeholders.set_visibility(hidden_uid, False)
+        assert not self_mock.actor_shown(hidden_uid)
+        removed_uid = self_mock.actors_df["uid"].iloc[30]
+        self_mock.remove_actor_in_view(uid=removed_uid)
+        n_pending = n_entities - 2
+        assert len(self_mock.placeholders) == n_pending
+
+        # Each slice stops after the first actor built past the budget.
+        slice_sizes = []
+        placeholder_counts = []
+        with patch("pzero.views.abstract_view_vtk.perf_counter", self_mock.clock):
+            while self_mock.population_queue is not None:
+                n_built = len(self_mock.built_uids)
+                self_mock.populate_slice()
+                slice_sizes.append(len(self_mock.built_uids) - n_built)
+                if self_mock.placeholders is not None:
+                    placeholder_counts.append(len(self_mock.placeholders))
+        assert sum(slice_sizes) == n_pending
+        assert slice_sizes[:-1] == [SLICE_ACTORS] * (len(slice_sizes) - 1)
+        assert 0 < slice_sizes[-1] <= SLICE_ACTORS
+        assert placeholder_counts == [
+            n_pending - n_built for n_built in np.cumsum(slice_sizes)[:-1]
+        ]
+        # Longer lines are larger on screen, so actors are built from the last entity backwards.
+        pending_uids = [
+            uid
+            for uid in self_mock.actors_df["uid"]
+            if uid not in [self_mock.built_uids[0], removed_uid]
+        ]
+        assert self_mock.built_uids[1:] == pending_uids[::-1]
+        assert self_mock.schedule_population.call_count == len(slice_sizes)
+        assert "population_placeholders" not in self_mock.plotter.renderer.actors
+        assert removed_uid not in self_mock.plotter.renderer.actors
+        assert self_mock.plotter.renderer.actors[hidden_uid].visible is False
+        # The largest entity (the last one) was built in the first slice.
+        assert self_mock.actors_df["actor"].iloc[-1] is not None
+        assert self_mock.actors_df["actor"].isna().sum() == 1  # only the removed entity
+
+        # Entities already in the view are not added again.
+        self_mock.add_all_entities()
+        assert len(self_mock.actors_df) == n_entities
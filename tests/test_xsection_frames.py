@@ -0,0 +1,179 @@
+"""
+test_xsection_frames.py
+PZero© Andrea Bistacchi
+
+How to run
+----------
+    pytest test_xsection_frames.py -v
+
+Or together with all other tests:
+
+    pytest -v
+
+"""
+
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+from pzero.collections.xsection_collection import XSectionCollection
+
+# =============================================================================
+# HELPERS
+# =============================================================================
+
+
+def _make_collection(n: int = 20, seed: int = 0) -> XSectionCollection:
+    """
+    Build a real XSectionCollection with n dipping cross-sections with
+    origins in UTM-like coordinates.
+    """
+    rng = np.random.default_rng(seed)
+    # The Qt table model needs a real QObject parent, so it is replaced by a mock.
+    with patch("pzero.collections.AbstractCollection.BaseTableModel"):
+        xsect_coll = XSectionCollection(parent=MagicMock())
+    for i in range(n):
+        entity_dict = dict(xsect_coll.entity_dict)
+        entity_dict["name"] = f"section_{i}"
+        entity_dict["origin_x"] = 500000.0 + rng.uniform(0.0, 10000.0)
+        entity_dict["origin_y"] = 5000000.0 + rng.uniform(0.0, 10000.0)
+        entity_dict["origin_z"] = rng.uniform(-500.0, 500.0)
+        entity_dict["strike"] = rng.uniform(0.0, 360.0)
+        entity_dict["dip"] = rng.uniform(20.0, 90.0)
+        entity_dict["length"] = 5000.0
+        entity_dict["height"] = 2000.0
+        xsect_coll.add_entity_from_dict(entity_dict=entity_dict)
+    return xsect_coll
+
+
+def _legacy_world2plane(
+    xsect_coll: XSectionCollection, uid: str, xyz: np.ndarray
+) -> np.ndarray:
+    """World to plane transformation computed from the DataFrame parameters as in the former implementation."""
+    strike = np.deg2rad(xsect_coll.get_uid_strike(uid))
+    dip = np.deg2rad(xsect_coll.get_uid_dip(uid))
+    strike_vct = np.array([np.sin(strike), np.cos(strike), 0.0])
+    dip_vct = np.array(
+        [
+            np.sin(strike + np.pi / 2) * np.cos(dip),
+            np.cos(strike + np.pi / 2) * np.cos(dip),
+            -np.sin(dip),
+        ]
+    )
+    origin_2_point = xyz - xsect_coll.get_uid_origin(uid)
+    return np.column_stack([origin_2_point @ strike_vct, origin_2_point @ dip_vct])
+
+
+def _batch_and_loop(xsect_coll=None, n_points: int = None):
+    """
+    Transform random points on random sections of xsect_coll to world coordinates
+    and back, both with the batch methods and with one call for each section.
+    """
+    uids = np.array(xsect_coll.get_uids)
+    rng = np.random.default_rng(2)
+    point_uids = uids[rng.integers(0, len(uids), n_points)]
+    uv = rng.uniform(0.0, 2000.0, (len(point_uids), 2))
+
+    xyz_batch = xsect_coll.plane2world_batch(section_uids=point_uids, UV=uv)
+    uvw_batch = xsect_coll.world2plane_batch(section_uids=point_uids, XYZ=xyz_batch)
+    xyz_loop = np.empty_like(xyz_batch)
+    uv_loop = np.empty_like(uv)
+    for uid in uids:
+        selected = point_uids == uid
+        xyz_loop[selected] = xsect_coll.plane2world(
+            section_uid=uid, U=uv[selected, 0], V=uv[selected, 1], as_arr=True
+        )
+        uv_loop[selected] = xsect_coll.world2plane(
+            section_uid=uid,
+            X=xyz_loop[selected, 0],
+            Y=xyz_loop[selected, 1],
+            Z=xyz_loop[selected, 2],
+            as_arr=True,
+        )
+    return uids, uv, xyz_batch, uvw_batch, uv_loop, xyz_loop
+
+
+# =============================================================================
+# TEST CLASS
+# =============================================================================
+
+
+class TestXSectionFrames:
+    """
+    Tests for cached frames and coordinate transformations defined in
+    collections/xsection_collection.py.
+    """
+
+    def test_round_trip_precision(self):
+        """
+        Points in UTM coordinates go to the plane and back with float64
+        precision, and match the transformation computed from the DataFrame.
+        """
+        xsect_coll = _make_collection(n=1)
+        uid = xsect_coll.get_uids[0]
+        rng = np.random.default_rng(1)
+        u = rng.uniform(0.0, 5000.0, 1000)
+        v = rng.uniform(0.0, 2000.0, 1000)
+        x, y, z = xsect_coll.plane2world(section_uid=uid, U=u, V=v)
+        assert x.dtype == np.float64
+        new_u, new_v = xsect_coll.world2plane(section_uid=uid, X=x, Y=y, Z=z)
+        assert np.abs(new_u - u).max() < 1e-6
+        assert np.abs(new_v - v).max() < 1e-6
+        assert np.allclose(
+            np.column_stack([new_u, new_v]),
+            _legacy_world2plane(xsect_coll, uid, np.column_stack([x, y, z])),
+        )
+        # Scalars are still returned as scalars.
+        x0, y0, z0 = xsect_coll.plane2world(section_uid=uid, U=0.0, V=0.0)
+        assert np.allclose([x0, y0, z0], xsect_coll.get_uid_origin(uid))
+
+    def test_cache_invalidation(self):
+        """
+        The cached frame is rebuilt after the section parameters are modified
+        and after set_geometry, and it is dropped when the section is removed.
+        """
+        xsect_coll = _make_collection(n=2)
+        uid = xsect_coll.get_uids[0]
+        frame = xsect_coll.get_uid_frame(section_uid=uid)
+        assert xsect_coll.get_uid_frame(section_uid=uid) is frame
+
+        xsect_coll.set_uid_strike(uid, 45.0)
+        xsect_coll.set_uid_origin_x(uid, 600000.0)
+        u, v = xsect_coll.world2plane(
+            section_uid=uid, X=[600000.0], Y=[xsect_coll.get_uid_origin_y(uid)], Z=[0.0]
+        )
+        assert np.allclose(
+            [u[0], v[0]],
+            _legacy_world2plane(
+                xsect_coll,
+                uid,
+                np.array([[600000.0, xsect_coll.get_uid_origin_y(uid), 0.0]]),
+            )[0],
+        )
+        assert np.allclose(
+            xsect_coll.get_uid_strike_vect(section_uid=uid),
+            [np.sqrt(0.5), np.sqrt(0.5), 0.0],
+        )
+
+        xsect_coll.df.loc[xsect_coll.df["uid"] == uid, "dip"] = 30.0
+        xsect_coll.set_geometry(uid=uid)
+        assert np.isclose(xsect_coll.get_uid_dip_vect(section_uid=uid)[2], -0.5)
+
+        xsect_coll.remove_entity(uid=uid)
+        assert uid not in xsect_coll._frames
+
+    def test_batch_transforms(self):
+        """
+        Points belonging to many sections are transformed in a single call with
+        the same results as one call for each section.
+        """
+        xsect_coll = _make_collection(n=50)
+        uids, uv, xyz_batch, uvw_batch, uv_loop, xyz_loop = _batch_and_loop(
+            xsect_coll=xsect_coll, n_points=20000
+        )
+        assert np.allclose(xyz_batch, xyz_loop, rtol=0.0, atol=1e-6)
+        assert np.allclose(uvw_batch[:, :2], uv_loop, rtol=0.0, atol=1e-6)
+        assert np.abs(uvw_batch[:, 2]).max() < 1e-6
+        # A single uid is applied to all points.
+        single = xsect_coll.world2plane_batch(section_uids=uids[0], XYZ=xyz_batch[:3])
+        assert single.shape == (3, 3)